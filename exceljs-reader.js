@@ -9,6 +9,7 @@ const fs = require('fs');
 const path = require('path');
 const os = require('os');
 const AdmZip = require('adm-zip');
+const { computeRowFingerprints } = require('./python/excel_row_delta');
 let XlsxPopulate = null; // Lazy-load für Passwort-Entschlüsselung
 
 /**
@@ -59,9 +60,10 @@ function parseRangeString(rangeStr) {
  * @param {Object} cellStyles - Map von "rowIndex-colIndex" zu Style-Objekt mit fill
  * @param {number} rowCount - Anzahl der Datenzeilen
  * @param {number} colCount - Anzahl der Spalten
+ * @param {number} [startRow=0] - Erster Zeilenindex (für Teilbereiche beim Streaming)
  * @returns {Array} Array von [rowIndex, colorName] Paaren
  */
-function detectRowHighlights(cellStyles, rowCount, colCount) {
+function detectRowHighlights(cellStyles, rowCount, colCount, startRow = 0) {
     const highlights = [];
     
     // Mapping von ARGB-Farben zu Highlight-Namen (ohne Alpha-Kanal)
@@ -82,7 +84,7 @@ function detectRowHighlights(cellStyles, rowCount, colCount) {
     };
     
     // Für jede Zeile prüfen
-    for (let rowIdx = 0; rowIdx < rowCount; rowIdx++) {
+    for (let rowIdx = startRow; rowIdx < startRow + rowCount; rowIdx++) {
         const rowFills = [];
         
         // Alle Zellen in der Zeile durchgehen
@@ -702,6 +704,7 @@ async function readSheetWithExcelJS(filePath, sheetName, password = null) {
             success: true,
             headers,
             data,
+            rowFingerprints: computeRowFingerprints(data.slice(1)),  // Für Delta-Writes beim Speichern (ohne Header)
             hiddenColumns,
             hiddenRows,
             cellStyles,
@@ -738,5 +741,7 @@ async function readSheetWithExcelJS(filePath, sheetName, password = null) {
 
 module.exports = {
     readSheetWithExcelJS,
-    extractFillsFromXLSX
+    extractFillsFromXLSX,
+    parseRangeString,
+    detectRowHighlights
 };
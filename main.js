@@ -1,7 +1,7 @@
 const { app, BrowserWindow, ipcMain, dialog, Menu } = require('electron');
 const path = require('path');
 const XlsxPopulate = require('xlsx-populate'); // LEGACY: Nur noch für Backup/Fallback
-const { readSheetWithExcelJS } = require('./exceljs-reader'); // PRIMÄR: ExcelJS Reader
+const { readSheetWithExcelJS, parseRangeString, detectRowHighlights } = require('./exceljs-reader'); // PRIMÄR: ExcelJS Reader
 const { exportSheetWithExcelJS } = require('./exceljs-writer'); // PRIMÄR: ExcelJS Writer
 const pythonBridge = require('./python/python_bridge'); // NEU: Python/openpyxl für bessere Kompatibilität
 const fs = require('fs');
@@ -15,9 +15,17 @@ app.commandLine.appendSwitch('js-flags', '--max-old-space-size=16384');
 const workbookCache = new Map();
 const CACHE_MAX_SIZE = 3; // Maximal 3 Workbooks cachen
 const CACHE_MAX_AGE = 5 * 60 * 1000; // 5 Minuten
+// Passwort nie im Klartext im Cache-Key: HMAC mit einem Schlüssel, der nur in diesem Prozess lebt
+const CACHE_KEY_SECRET = require('crypto').randomBytes(32);
+
+function workbookCacheKey(filePath, password) {
+    if (!password) return `${filePath}:`;
+    const digest = require('crypto').createHmac('sha256', CACHE_KEY_SECRET).update(String(password)).digest('hex');
+    return `${filePath}:${digest}`;
+}
 
 function getCachedWorkbook(filePath, password = null) {
-    const key = `${filePath}:${password || ''}`;
+    const key = workbookCacheKey(filePath, password);
     const cached = workbookCache.get(key);
     
     if (cached && (Date.now() - cached.timestamp < CACHE_MAX_AGE)) {
@@ -30,7 +38,7 @@ function getCachedWorkbook(filePath, password = null) {
 }
 
 function setCachedWorkbook(filePath, password = null, workbook) {
-    const key = `${filePath}:${password || ''}`;
+    const key = workbookCacheKey(filePath, password);
     
     // LRU: Ältesten Cache-Eintrag entfernen wenn voll
     if (workbookCache.size >= CACHE_MAX_SIZE) {
@@ -62,6 +70,36 @@ function clearWorkbookCache() {
     console.log('[Cache] Cache geleert');
 }
 
+// SHEET-PREFETCH: Nachbar- und zuletzt benutzte Sheets im Hintergrund vorlesen (Python),
+// damit ein Sheet-Wechsel im Data Explorer sofort aus dem Cache bedient wird
+const { SheetPrefetchScheduler } = require('./python/excel_prefetch_scheduler');
+const sheetOrderByFile = new Map(); // Dateipfad -> Sheet-Namen (aus excel:readFile)
+
+const sheetPrefetch = new SheetPrefetchScheduler({
+    readSheet: async (filePath, sheetName, signal) => {
+        let sheetResult = null;
+        await pythonBridge.readWorkbook(filePath, [sheetName], ({ result }) => {
+            sheetResult = result;
+        }, { signal, lowPriority: true });
+        return sheetResult && sheetResult.success ? toExplorerSheetResult(sheetResult) : sheetResult;
+    },
+    log: (message) => console.log(message)
+});
+
+// Der Vorab-Cache ist nach dem lokalen Pfad geführt (bei Netzlaufwerken die
+// gestagte Kopie, siehe excel:readSheet) - mit demselben Pfad verwerfen
+function invalidatePrefetch(filePath) {
+    sheetPrefetch.invalidate(pythonBridge.getNetworkStaging().localPath(filePath));
+}
+
+// Ergebnis von excel_workbook_reader.py in das Format von excel:readSheet bringen
+function toExplorerSheetResult(result) {
+    result.mergedCells = (result.mergedCells || []).map(parseRangeString).filter(Boolean);
+    result.rowHighlights = detectRowHighlights(result.cellStyles, result.data.length, result.headers.length);
+    result.dataValidations = {};
+    return result;
+}
+
 /**
  * Direkte ZIP-Manipulation für Partial-Cell-Mode
  * Ändert nur die betroffenen Zellen im sheet.xml ohne die gesamte Datei zu laden
@@ -1439,6 +1477,8 @@ app.whenReady().then(async () => {
 
     // Network-Logger initialisieren (für Netzlaufwerk-Protokollierung)
     networkLog.init();
+    // Netzlaufwerk-Modus: Python-Reader/-Writer arbeiten auf lokalen Kopien
+    pythonBridge.getNetworkStaging().setNetworkPathDetector(filePath => networkLog.isNetworkPath(filePath));
 
     // Excel-Verfügbarkeit prüfen und loggen
     try {
@@ -1474,6 +1514,13 @@ app.on('window-all-closed', () => {
     }
 });
 
+app.on('will-quit', () => {
+    // Excel-Instanzen des xlwings-Workers beenden
+    pythonBridge.shutdownXlwingsWorker();
+    // Entschlüsselte Pakete im Speicher verwerfen
+    pythonBridge.shutdownPackageWorker();
+});
+
 app.on('activate', () => {
     // Nur wenn App bereit ist und kein Fenster offen ist
     if (app.isReady() && BrowserWindow.getAllWindows().length === 0) {
@@ -1953,9 +2000,22 @@ ipcMain.handle('excel:readFile', async (event, filePath, password = null) => {
         // Prüfe auf Pivot-Tabellen
         const hasPivotTables = await checkForPivotTables(filePath);
 
-        const options = password ? { password } : {};
-        const workbook = await XlsxPopulate.fromFileAsync(filePath, options);
-        const sheets = workbook.sheets().map(ws => ws.name());
+        // Passwort: einmal im Package-Worker entschlüsseln - spätere readSheet/Exporte nutzen den Cache
+        let sheets = null;
+        if (password) {
+            const listed = await pythonBridge.listSheets(filePath, { password });
+            if (listed.success) {
+                sheets = listed.sheets;
+            } else if (listed.needsPassword) {
+                return { success: false, error: listed.error, isPasswordProtected: true, needsPassword: true };
+            }
+        }
+        if (!sheets) {
+            const options = password ? { password } : {};
+            const workbook = await XlsxPopulate.fromFileAsync(filePath, options);
+            sheets = workbook.sheets().map(ws => ws.name());
+        }
+        sheetOrderByFile.set(filePath, sheets);
 
         return {
             success: true,
@@ -2039,24 +2099,46 @@ ipcMain.handle('excel:readSheet', async (event, filePath, sheetName, password =
     }
 
     try {
-        // Nutze ExcelJS Reader
-        const result = await readSheetWithExcelJS(filePath, sheetName, password);
+        // Nutze ExcelJS Reader (Netzlaufwerk: lokale Cache-Kopie, spätere Exporte nutzen sie mit)
+        const localPath = await pythonBridge.getNetworkStaging().pull(filePath);
         
-        if (!result.success) {
-            return result;
-        }
+        // Vorab gelesenes Sheet aus dem Prefetch-Cache oder im Vordergrund lesen
+        // (Passwort-Dateien werden weder gecacht noch vorgelesen)
+        const finalResult = await sheetPrefetch.foreground(localPath, sheetName, async () => {
+            // Passwort: Python-Reader auf dem entschlüsselten Paket im Package-Worker
+            // (kein erneutes Entschlüsseln, keine temporäre Klartext-Datei); sonst wie bisher ExcelJS
+            if (password) {
+                const decrypted = await pythonBridge.readSheet(localPath, sheetName, { password });
+                if (decrypted.success) {
+                    return { ...decrypted, dataValidations: {} };
+                }
+                if (decrypted.needsPassword) {
+                    return decrypted;
+                }
+                console.log(`[Load] Package-Worker: ${decrypted.error} - verwende ExcelJS`);
+            }
+            const result = await readSheetWithExcelJS(localPath, sheetName, password);
+            
+            if (!result.success) {
+                return result;
+            }
+            
+            // Füge zusätzliche Felder hinzu für Kompatibilität
+            return {
+                ...result,
+                dataValidations: {}, // TODO: Später implementieren wenn benötigt
+                // mergedCells kommt bereits vom ExcelJS-Reader
+                mergedCells: result.mergedCells || [],
+                // richTextCells kommt bereits vom ExcelJS-Reader
+                richTextCells: result.richTextCells || {},
+                // autoFilterRange kommt bereits vom ExcelJS-Reader
+                autoFilterRange: result.autoFilterRange || null
+            };
+        }, { cache: !password });
         
-        // Füge zusätzliche Felder hinzu für Kompatibilität
-        const finalResult = {
-            ...result,
-            dataValidations: {}, // TODO: Später implementieren wenn benötigt
-            // mergedCells kommt bereits vom ExcelJS-Reader
-            mergedCells: result.mergedCells || [],
-            // richTextCells kommt bereits vom ExcelJS-Reader
-            richTextCells: result.richTextCells || {},
-            // autoFilterRange kommt bereits vom ExcelJS-Reader
-            autoFilterRange: result.autoFilterRange || null
-        };
+        if (finalResult.success && !password) {
+            sheetPrefetch.schedule(localPath, sheetName, sheetOrderByFile.get(filePath));
+        }
         
         return finalResult;
         
@@ -2076,6 +2158,160 @@ ipcMain.handle('excel:readSheet', async (event, filePath, sheetName, password =
     }
 });
 
+// Lese-Ergebnis eines Sheets (Header an Position 0): aus dem Prefetch-Cache,
+// sonst einmal lesen. null wenn das Sheet nicht gelesen werden kann.
+async function loadSheetResult(filePath, sheetName) {
+    const localPath = await pythonBridge.getNetworkStaging().pull(filePath);
+    const result = sheetPrefetch.get(localPath, sheetName) || await readSheetWithExcelJS(localPath, sheetName);
+    return result && result.success ? result : null;
+}
+
+// Datenzeilen eines Sheets (ohne Header) für Indizes
+async function loadSheetRows(filePath, sheetName) {
+    const result = await loadSheetResult(filePath, sheetName);
+    return result ? result.data.slice(1) : null;
+}
+
+// SUCH-INDEX: Trigramm-Index über die Quelldaten (Aufbau im Worker-Thread,
+// gespeichert neben dem Netzwerk-Cache)
+const { SearchIndexStore } = require('./python/excel_search_index');
+const searchIndexStore = new SearchIndexStore({ log: (message) => console.log(message) });
+
+// Index nach dem Öffnen eines Quell-Sheets aufbauen bzw. von der Platte laden
+ipcMain.handle('search:buildIndex', async (event, { filePath, sheetName, columns = null }) => {
+    // Sicherheitsprüfung: Pfad validieren
+    if (!isValidFilePath(filePath)) {
+        return { success: false, error: 'Ungültiger Dateipfad' };
+    }
+
+    try {
+        const index = await searchIndexStore.ensure(filePath, sheetName, columns, () => loadSheetRows(filePath, sheetName));
+        if (!index) {
+            return { success: false, error: `Sheet "${sheetName}" konnte nicht gelesen werden` };
+        }
+        return { success: true, rowCount: index.rowCount, trigrams: index.terms.length };
+    } catch (error) {
+        console.error('[SearchIndex] Fehler beim Aufbau:', error);
+        return { success: false, error: error.message };
+    }
+});
+
+// Kandidaten-Zeilen für eine geparste Suchanfrage. candidates = null: Index
+// (noch) nicht verfügbar oder Anfrage nicht einschränkbar - alle Zeilen prüfen.
+ipcMain.handle('search:query', async (event, { filePath, sheetName, query, rowCount, columns = null }) => {
+    if (!isValidFilePath(filePath)) {
+        return { success: false, error: 'Ungültiger Dateipfad' };
+    }
+
+    try {
+        const index = searchIndexStore.get(filePath, sheetName, columns);
+        // Index muss zu den geladenen Zeilen des Renderers passen
+        if (!index || index.rowCount !== rowCount) {
+            return { success: true, candidates: null };
+        }
+        return { success: true, candidates: index.candidates(query) };
+    } catch (error) {
+        console.error('[SearchIndex] Fehler bei der Suche:', error);
+        return { success: false, error: error.message };
+    }
+});
+
+// Mehrere Sheets in einem Aufruf lesen ("Datei öffnen" im Data Explorer)
+// Python parst die gemeinsamen Teile einmal und liest die Sheets parallel.
+// Jedes fertige Sheet wird sofort als 'excel:workbookSheet' an den Renderer geschickt.
+ipcMain.handle('excel:readWorkbook', async (event, filePath, sheetNames, requestId) => {
+    // Sicherheitsprüfung: Pfad validieren
+    if (!isValidFilePath(filePath)) {
+        return { success: false, error: 'Ungültiger Dateipfad' };
+    }
+
+    try {
+        return await pythonBridge.readWorkbook(filePath, sheetNames, ({ sheetName, index, result }) => {
+            if (result.success) {
+                // Gleiches Format wie excel:readSheet (ExcelJS-Reader)
+                toExplorerSheetResult(result);
+            }
+            if (!event.sender.isDestroyed()) {
+                event.sender.send('excel:workbookSheet', { requestId, sheetName, index, result });
+            }
+        });
+    } catch (error) {
+        return { success: false, error: error.message };
+    }
+});
+
+// Ein Sheet progressiv lesen: Header zuerst, dann Zeilen-Batches (~5000 Zeilen)
+// samt Styles, zuletzt verbundene Zellen/Hyperlinks. Jeder Datensatz wird sofort
+// als 'excel:sheetStream' weitergeleitet - der Main-Prozess hält nie das ganze Sheet.
+ipcMain.handle('excel:readSheetStream', async (event, filePath, sheetName, requestId) => {
+    // Sicherheitsprüfung: Pfad validieren
+    if (!isValidFilePath(filePath)) {
+        return { success: false, error: 'Ungültiger Dateipfad' };
+    }
+
+    try {
+        const localPath = await pythonBridge.getNetworkStaging().pull(filePath);
+        
+        // Bereits vorgelesen: komplettes Ergebnis direkt zurückgeben
+        const cached = sheetPrefetch.get(localPath, sheetName);
+        if (cached) {
+            return { success: true, cached };
+        }
+        
+        let columnCount = 0;
+        const send = (record) => {
+            if (!event.sender.isDestroyed()) {
+                event.sender.send('excel:sheetStream', { requestId, record });
+            }
+        };
+        
+        // Als Vordergrund-Anfrage: laufendes Vorab-Lesen pausiert
+        const end = await sheetPrefetch.foreground(localPath, sheetName, () =>
+            pythonBridge.readSheetStream(localPath, sheetName, (record) => {
+                if (record.type === 'meta') {
+                    columnCount = record.columnCount;
+                } else if (record.type === 'rows') {
+                    // Zeilenfarben pro Batch (Style-Keys: Datenzeile + 1)
+                    const width = columnCount || Math.max(0, ...record.rows.map(row => row.length));
+                    record.rowHighlights = detectRowHighlights(record.cellStyles, record.rows.length, width, record.start);
+                } else if (record.type === 'end' && record.success) {
+                    record.mergedCells = (record.mergedCells || []).map(parseRangeString).filter(Boolean);
+                }
+                send(record);
+            }), { cache: false });
+        
+        if (end.success) {
+            sheetPrefetch.schedule(localPath, sheetName, sheetOrderByFile.get(filePath));
+        }
+        return { success: end.success, error: end.error, rowCount: end.rowCount };
+    } catch (error) {
+        return { success: false, error: error.message };
+    }
+});
+
+// "Neuer Monat" für viele Dateien: Vorlage einmal lesen, pro Abteilung/Monat
+// nur Sheet-Name und Header-Zellen patchen (excel_month_batch.py). Jede fertige
+// Datei wird sofort als 'excel:monthBatchProgress' gemeldet.
+ipcMain.handle('excel:createMonthFiles', async (event, params, requestId) => {
+    const jobs = (params && params.jobs) || [];
+    // Sicherheitsprüfung: Pfade validieren
+    if (!params || !isValidFilePath(params.templatePath) || jobs.some(job => !isValidFilePath(job.outputPath))) {
+        return { success: false, error: 'Ungültiger Dateipfad' };
+    }
+
+    try {
+        const done = await pythonBridge.createMonthFiles(params, (record) => {
+            if (!event.sender.isDestroyed()) {
+                event.sender.send('excel:monthBatchProgress', { requestId, record });
+            }
+        });
+        securityLog.log('INFO', 'MONTH_FILES_CREATED', { template: params.templatePath, files: done.files, failed: done.failed });
+        return done;
+    } catch (error) {
+        return { success: false, error: error.message };
+    }
+});
+
 // ======================================================================
 // Python/openpyxl Export - Behält ALLE Formatierungen bei
 // Vorteile gegenüber ExcelJS:
@@ -2084,7 +2320,7 @@ ipcMain.handle('excel:readSheet', async (event, filePath, sheetName, password =
 // - Theme-Farben werden korrekt behandelt
 // - Identisches Verhalten wie MS Excel
 // ======================================================================
-ipcMain.handle('python:exportMultipleSheets', async (event, { sourcePath, originalSourcePath, targetPath, sheets, password = null, sourcePassword = null }) => {
+ipcMain.handle('python:exportMultipleSheets', async (event, { sourcePath, originalSourcePath, targetPath, sheets, password = null, sourcePassword = null, compression = null }) => {
     // Sicherheitsprüfung: Pfade validieren
     if (!isValidFilePath(sourcePath) || !isValidFilePath(targetPath)) {
         return { success: false, error: 'Ungültiger Dateipfad' };
@@ -2094,7 +2330,7 @@ ipcMain.handle('python:exportMultipleSheets', async (event, { sourcePath, origin
         const startTime = Date.now();
         
         // Export mit Python/openpyxl durchführen
-        const result = await pythonBridge.exportMultipleSheets(sourcePath, targetPath, sheets, { password, sourcePassword, originalSourcePath });
+        const result = await pythonBridge.exportMultipleSheets(sourcePath, targetPath, sheets, { password, sourcePassword, originalSourcePath, compression });
         
         const duration = Date.now() - startTime;
         
@@ -2131,6 +2367,7 @@ ipcMain.handle('python:exportMultipleSheets', async (event, { sourcePath, origin
             success: true,
             message: result.message,
             sheetsExported: result.sheetsExported,
+            rowFingerprints: result.rowFingerprints || {},  // Für Delta-Writes nach Überschreiben
             passwordProtected: !!password,
             stats: { totalTimeMs: duration }
         };
@@ -2840,12 +3077,49 @@ ipcMain.handle('excel:readSheet', async (event, filePath, sheetName, password =
 
 // ==================== SHEET-VERWALTUNG ====================
 
+/**
+ * Sheet-Operation auf Paketebene (python/excel_sheet_ops.py) - schreibt nur
+ * workbook.xml, Beziehungen und betroffene Formeln neu statt die ganze Datei
+ * mit xlsx-populate zu laden und zu speichern.
+ * Gibt null zurück, wenn das Paket nicht so bearbeitet werden konnte
+ * (z.B. Python fehlt) - dann übernimmt xlsx-populate.
+ */
+async function manageSheetInPackage(operation, filePath, args) {
+    try {
+        const result = await pythonBridge.manageSheet(operation, filePath, args);
+        if (result && !result.packageError) {
+            if (result.success) {
+                clearWorkbookCache();
+                invalidatePrefetch(filePath);
+                sheetOrderByFile.set(filePath, result.sheets);
+                console.log(`[SheetOps] ${operation}: ${result.writtenMembers} Teile neu, ${result.copiedMembers} übernommen (${result.durationMs}ms)`);
+            }
+            return result;
+        }
+        console.warn(`[SheetOps] ${operation} auf Paketebene nicht möglich, nutze xlsx-populate:`, result && result.error);
+    } catch (error) {
+        console.warn(`[SheetOps] ${operation} auf Paketebene fehlgeschlagen, nutze xlsx-populate:`, error.message);
+    }
+    return null;
+}
+
 // Neues Arbeitsblatt hinzufügen
 ipcMain.handle('excel:addSheet', async (event, { filePath, sheetName }) => {
     if (!isValidFilePath(filePath)) {
         return { success: false, error: 'Ungültiger Dateipfad' };
     }
     try {
+        const packageResult = await manageSheetInPackage('add', filePath, [sheetName]);
+        if (packageResult) {
+            if (packageResult.success) {
+                securityLog.log('INFO', 'SHEET_ADDED', {
+                    file: path.basename(filePath),
+                    sheet: sheetName
+                });
+            }
+            return { success: packageResult.success, sheets: packageResult.sheets, error: packageResult.error };
+        }
+
         const workbook = await XlsxPopulate.fromFileAsync(filePath);
 
         // Prüfe ob Name bereits existiert
@@ -2878,6 +3152,17 @@ ipcMain.handle('excel:deleteSheet', async (event, { filePath, sheetName }) => {
         return { success: false, error: 'Ungültiger Dateipfad' };
     }
     try {
+        const packageResult = await manageSheetInPackage('delete', filePath, [sheetName]);
+        if (packageResult) {
+            if (packageResult.success) {
+                securityLog.log('INFO', 'SHEET_DELETED', {
+                    file: path.basename(filePath),
+                    sheet: sheetName
+                });
+            }
+            return { success: packageResult.success, sheets: packageResult.sheets, error: packageResult.error };
+        }
+
         const workbook = await XlsxPopulate.fromFileAsync(filePath);
 
         // Mindestens ein Blatt muss bleiben
@@ -2909,6 +3194,11 @@ ipcMain.handle('excel:renameSheet', async (event, { filePath, oldName, newName }
         return { success: false, error: 'Ungültiger Dateipfad' };
     }
     try {
+        const packageResult = await manageSheetInPackage('rename', filePath, [oldName, newName]);
+        if (packageResult) {
+            return { success: packageResult.success, sheets: packageResult.sheets, error: packageResult.error };
+        }
+
         const workbook = await XlsxPopulate.fromFileAsync(filePath);
 
         // Prüfe ob neuer Name bereits existiert
@@ -2940,6 +3230,11 @@ ipcMain.handle('excel:cloneSheet', async (event, { filePath, sheetName, newName
         return { success: false, error: 'Ungültiger Dateipfad' };
     }
     try {
+        const packageResult = await manageSheetInPackage('clone', filePath, [sheetName, newName]);
+        if (packageResult) {
+            return { success: packageResult.success, sheets: packageResult.sheets, error: packageResult.error };
+        }
+
         const workbook = await XlsxPopulate.fromFileAsync(filePath);
 
         // Prüfe ob neuer Name bereits existiert
@@ -2971,6 +3266,11 @@ ipcMain.handle('excel:moveSheet', async (event, { filePath, sheetName, newIndex
         return { success: false, error: 'Ungültiger Dateipfad' };
     }
     try {
+        const packageResult = await manageSheetInPackage('move', filePath, [sheetName, newIndex]);
+        if (packageResult) {
+            return { success: packageResult.success, sheets: packageResult.sheets, error: packageResult.error };
+        }
+
         const workbook = await XlsxPopulate.fromFileAsync(filePath);
 
         workbook.moveSheet(sheetName, newIndex);
@@ -2985,102 +3285,321 @@ ipcMain.handle('excel:moveSheet', async (event, { filePath, sheetName, newIndex
     }
 });
 
-// Zeilen in Excel einfuegen (MIT Formatierungserhalt dank xlsx-populate!)
-ipcMain.handle('excel:insertRows', async (event, { filePath, sheetName, rows, startColumn, enableFlag = true, enableComment = true, flagColumn = 1, commentColumn = 2, sourceFilePath = null, sourceSheetName = null, sourceColumns = [] }) => {
-    // Sicherheitsprüfung: Pfad validieren
-    if (!isValidFilePath(filePath)) {
-        return { success: false, error: 'Ungültiger Dateipfad' };
-    }
+// Hilfsfunktion: Deutsches Datum zu Excel-Datum konvertieren
+function parseGermanDateToExcel(dateStr) {
+    if (!dateStr || typeof dateStr !== 'string') return null;
 
-    try {
-        const workbook = await XlsxPopulate.fromFileAsync(filePath);
-        const worksheet = workbook.sheet(sheetName);
+    // Deutsches Datum: dd.mm.yyyy oder dd.mm.yyyy hh:mm
+    const dateTimeMatch = dateStr.match(/^(\d{1,2})\.(\d{1,2})\.(\d{4})\s+(\d{1,2}):(\d{2})$/);
+    const dateMatch = dateStr.match(/^(\d{1,2})\.(\d{1,2})\.(\d{4})$/);
 
-        if (!worksheet) {
-            return { success: false, error: `Sheet "${sheetName}" nicht gefunden` };
+    if (dateTimeMatch) {
+        const day = parseInt(dateTimeMatch[1], 10);
+        const month = parseInt(dateTimeMatch[2], 10);
+        const year = parseInt(dateTimeMatch[3], 10);
+        const hours = parseInt(dateTimeMatch[4], 10);
+        const minutes = parseInt(dateTimeMatch[5], 10);
+
+        // Validierung
+        if (day < 1 || day > 31 || month < 1 || month > 12 || year < 1900 || year > 2100) {
+            return null;
         }
 
-        // Hilfsfunktion: Deutsches Datum zu Excel-Datum konvertieren
-        function parseGermanDateToExcel(dateStr) {
-            if (!dateStr || typeof dateStr !== 'string') return null;
+        // Excel-Datum berechnen (UTC um Zeitzonenproblemen vorzubeugen)
+        const jsDate = Date.UTC(year, month - 1, day, hours, minutes);
+        const excelEpoch = Date.UTC(1899, 11, 30);
+        const excelDate = (jsDate - excelEpoch) / 86400000;
+        return excelDate;
+    } else if (dateMatch) {
+        const day = parseInt(dateMatch[1], 10);
+        const month = parseInt(dateMatch[2], 10);
+        const year = parseInt(dateMatch[3], 10);
+
+        // Validierung
+        if (day < 1 || day > 31 || month < 1 || month > 12 || year < 1900 || year > 2100) {
+            return null;
+        }
 
-            // Deutsches Datum: dd.mm.yyyy oder dd.mm.yyyy hh:mm
-            const dateTimeMatch = dateStr.match(/^(\d{1,2})\.(\d{1,2})\.(\d{4})\s+(\d{1,2}):(\d{2})$/);
-            const dateMatch = dateStr.match(/^(\d{1,2})\.(\d{1,2})\.(\d{4})$/);
+        // Excel-Datum berechnen (UTC)
+        const jsDate = Date.UTC(year, month - 1, day);
+        const excelEpoch = Date.UTC(1899, 11, 30);
+        const excelDate = Math.floor((jsDate - excelEpoch) / 86400000);
+        return excelDate;
+    }
 
-            if (dateTimeMatch) {
-                const day = parseInt(dateTimeMatch[1], 10);
-                const month = parseInt(dateTimeMatch[2], 10);
-                const year = parseInt(dateTimeMatch[3], 10);
-                const hours = parseInt(dateTimeMatch[4], 10);
-                const minutes = parseInt(dateTimeMatch[5], 10);
+    return null;
+}
 
-                // Validierung
-                if (day < 1 || day > 31 || month < 1 || month > 12 || year < 1900 || year > 2100) {
-                    return null;
-                }
+// Hilfsfunktion: Wert der Zeilenübertragung intelligent konvertieren
+function convertTransferValue(value) {
+    if (value === null || value === undefined || value === '') {
+        return { value: value, isDate: false };
+    }
 
-                // Excel-Datum berechnen (UTC um Zeitzonenproblemen vorzubeugen)
-                const jsDate = Date.UTC(year, month - 1, day, hours, minutes);
-                const excelEpoch = Date.UTC(1899, 11, 30);
-                const excelDate = (jsDate - excelEpoch) / 86400000;
-                return excelDate;
-            } else if (dateMatch) {
-                const day = parseInt(dateMatch[1], 10);
-                const month = parseInt(dateMatch[2], 10);
-                const year = parseInt(dateMatch[3], 10);
-
-                // Validierung
-                if (day < 1 || day > 31 || month < 1 || month > 12 || year < 1900 || year > 2100) {
-                    return null;
-                }
+    // Pr�fe ob es ein deutsches Datum ist
+    const excelDate = parseGermanDateToExcel(value);
+    if (excelDate !== null) {
+        return { value: excelDate, isDate: true };
+    }
 
-                // Excel-Datum berechnen (UTC)
-                const jsDate = Date.UTC(year, month - 1, day);
-                const excelEpoch = Date.UTC(1899, 11, 30);
-                const excelDate = Math.floor((jsDate - excelEpoch) / 86400000);
-                return excelDate;
+    // Pr�fe ob es eine Zahl ist (mit deutschen Dezimaltrennzeichen)
+    if (typeof value === 'string') {
+        // Deutsche Zahlen: 1.234,56 -> 1234.56
+        const germanNumberMatch = value.match(/^-?\d{1,3}(\.\d{3})*(,\d+)?$/);
+        if (germanNumberMatch) {
+            const normalized = value.replace(/\./g, '').replace(',', '.');
+            const num = parseFloat(normalized);
+            if (!isNaN(num)) {
+                return { value: num, isDate: false };
             }
+        }
 
-            return null;
+        // Englische Zahlen oder einfache Zahlen
+        const simpleNumber = value.match(/^-?\d+(\.\d+)?$/);
+        if (simpleNumber) {
+            const num = parseFloat(value);
+            if (!isNaN(num)) {
+                return { value: num, isDate: false };
+            }
         }
+    }
 
-        // Hilfsfunktion: Wert intelligent konvertieren
-        function convertValue(value, targetCell) {
-            if (value === null || value === undefined || value === '') {
-                return { value: value, isDate: false };
+    // Als String belassen
+    return { value: value, isDate: false };
+}
+
+// Zeilen der Übertragung als Zellen [Spalte, Wert, istDatum] - dieselbe Belegung
+// wie beim Schreiben mit xlsx-populate (Leerzeile, Flag, Kommentar, Daten)
+function buildAppendRows(rows, { startColumn, enableFlag, enableComment, flagColumn, commentColumn }) {
+    return rows.map(row => {
+        const cells = [];
+        if (row.flag === 'leer') {
+            // Leerzeichen markiert die Zeile als belegt
+            cells.push([enableFlag ? flagColumn : startColumn, ' ', false]);
+            if (enableComment && row.comment) cells.push([commentColumn, row.comment, false]);
+            return cells;
+        }
+        if (enableFlag && row.flag) cells.push([flagColumn, row.flag, false]);
+        if (enableComment && row.comment) cells.push([commentColumn, row.comment, false]);
+        for (const key of Object.keys(row.data || {})) {
+            const value = row.data[key];
+            if (value !== null && value !== undefined && value !== '') {
+                const converted = convertTransferValue(value);
+                cells.push([startColumn + parseInt(key), converted.value, converted.isDate]);
             }
+        }
+        return cells;
+    });
+}
 
-            // Pr�fe ob es ein deutsches Datum ist
-            const excelDate = parseGermanDateToExcel(value);
-            if (excelDate !== null) {
-                return { value: excelDate, isDate: true };
+// Zeilen direkt im Sheet-XML anhängen (excel_row_append.py). Gibt null zurück,
+// wenn das Paket so nicht bearbeitet werden kann - dann xlsx-populate.
+async function appendRowsInPackage(filePath, sheetName, rows, options) {
+    try {
+        const result = await pythonBridge.appendRows(filePath, sheetName, buildAppendRows(rows, options), {
+            checkColumns: [options.enableFlag ? options.flagColumn : options.startColumn, options.startColumn],
+            templateRow: options.templateRow
+        });
+        if (result && !result.packageError) {
+            if (result.success) {
+                clearWorkbookCache();
+                invalidatePrefetch(filePath);
+                console.log(`[RowAppend] ${result.insertedCount} Zeile(n) ab Zeile ${result.startRow}: ${result.writtenMembers} Teile neu, ${result.copiedMembers} übernommen (${result.durationMs}ms)`);
             }
+            return result;
+        }
+        console.warn('[RowAppend] Anhängen auf Paketebene nicht möglich, nutze xlsx-populate:', result && result.error);
+    } catch (error) {
+        console.warn('[RowAppend] Anhängen auf Paketebene fehlgeschlagen, nutze xlsx-populate:', error.message);
+    }
+    return null;
+}
 
-            // Pr�fe ob es eine Zahl ist (mit deutschen Dezimaltrennzeichen)
-            if (typeof value === 'string') {
-                // Deutsche Zahlen: 1.234,56 -> 1234.56
-                const germanNumberMatch = value.match(/^-?\d{1,3}(\.\d{3})*(,\d+)?$/);
-                if (germanNumberMatch) {
-                    const normalized = value.replace(/\./g, '').replace(',', '.');
-                    const num = parseFloat(normalized);
-                    if (!isNaN(num)) {
-                        return { value: num, isDate: false };
-                    }
-                }
+// Netzwerk-Log für Datenübertragung (Ziel- und Quelldatei, falls auf Netzlaufwerk)
+async function logDataTransfer(filePath, sheetName, insertedCount, insertRow, sourceFilePath, sourceSheetName) {
+    await networkLog.log(filePath, 'DATA_TRANSFER', {
+        file: path.basename(filePath),
+        sheet: sheetName,
+        rowsInserted: insertedCount,
+        startRow: insertRow,
+        sourceFile: sourceFilePath ? path.basename(sourceFilePath) : null,
+        sourceSheet: sourceSheetName
+    });
 
-                // Englische Zahlen oder einfache Zahlen
-                const simpleNumber = value.match(/^-?\d+(\.\d+)?$/);
-                if (simpleNumber) {
-                    const num = parseFloat(value);
-                    if (!isNaN(num)) {
-                        return { value: num, isDate: false };
-                    }
-                }
+    if (sourceFilePath) {
+        await networkLog.log(sourceFilePath, 'DATA_TRANSFER_SOURCE', {
+            targetFile: path.basename(filePath),
+            targetSheet: sheetName,
+            rowsTransferred: insertedCount
+        });
+    }
+}
+
+// DUPLIKAT-INDEX: Persistenter Schlüssel-Index je (Zieldatei, Sheet, Spalten),
+// damit die Warteschlange nicht Wert für Wert die kompletten Zieldaten durchsucht
+const { KeyIndexStore, fileFingerprint } = require('./python/excel_key_index');
+const keyIndexStore = new KeyIndexStore({ log: (message) => console.log(message) });
+
+// Schlüssel der übertragenen Zeilen als [Wert, Excel-Zeile] (Datumswerte im
+// Eingabeformat dd.mm.yyyy - so liefert sie auch der Reader zurück)
+function transferKeyEntries(rows, startRow, options) {
+    const entries = [];
+    buildAppendRows(rows, options).forEach((cells, i) => {
+        for (const [col, value, isDate] of cells) {
+            if (col < options.startColumn) continue;
+            entries.push([isDate ? rows[i].data[col - options.startColumn] : value, startRow + i]);
+        }
+    });
+    return entries;
+}
+
+// Index nach erfolgreichem Anhängen nachtragen (nur wenn er zum alten Dateistand passte)
+function updateKeyIndex(filePath, sheetName, previousFingerprint, rows, startRow, options) {
+    try {
+        const columns = { startColumn: options.startColumn };
+        const updated = keyIndexStore.update(filePath, sheetName, columns, previousFingerprint,
+            transferKeyEntries(rows, startRow, options));
+        if (updated) console.log(`[KeyIndex] ${rows.length} Zeile(n) nachgetragen`);
+    } catch (error) {
+        console.warn('[KeyIndex] Nachtragen fehlgeschlagen:', error.message);
+    }
+}
+
+// Duplikatprüfung für alle Prüfwerte einer Warteschlange in einem Aufruf
+ipcMain.handle('excel:checkDuplicates', async (event, { filePath, sheetName, startColumn = 1, keyColumn = null, values = [] }) => {
+    // Sicherheitsprüfung: Pfad validieren
+    if (!isValidFilePath(filePath)) {
+        return { success: false, error: 'Ungültiger Dateipfad' };
+    }
+
+    try {
+        const columns = keyColumn ? { keyColumn } : { startColumn };
+        const index = await keyIndexStore.ensure(filePath, sheetName, columns, () => loadSheetRows(filePath, sheetName));
+        if (!index) {
+            return { success: false, error: `Sheet "${sheetName}" konnte nicht gelesen werden` };
+        }
+        return { success: true, rows: index.lookupMany(values), indexSize: index.size };
+    } catch (error) {
+        console.error('[KeyIndex] Fehler bei der Duplikatprüfung:', error);
+        return { success: false, error: error.message };
+    }
+});
+
+// DATA JOIN: Hash-Join der Quelle (Schlüsselspalte) mit den Ziel-Schlüsseln in
+// einem Durchlauf. Liefert pro Zielzeile die Quellzeile (-1 = kein Treffer),
+// eine Formatierungs-Vorlage pro importierter Spalte und die Join-Statistik.
+const { joinSheet } = require('./python/excel_data_join');
+
+ipcMain.handle('excel:dataJoin', async (event, { sourcePath, sourceSheet, sourceKeyColumn, targetKeys = [], originalKeys = null, columns = [] }) => {
+    // Sicherheitsprüfung: Pfad validieren
+    if (!isValidFilePath(sourcePath)) {
+        return { success: false, error: 'Ungültiger Dateipfad' };
+    }
+
+    try {
+        const started = Date.now();
+        const sheet = await loadSheetResult(sourcePath, sourceSheet);
+        if (!sheet) {
+            return { success: false, error: `Sheet "${sourceSheet}" konnte nicht gelesen werden` };
+        }
+        // Original-Daten (vor Bearbeitung) werden gegen dieselbe Hash-Tabelle geprüft
+        const { rows, originalRows, templates, stats } = joinSheet(sheet, sourceKeyColumn, targetKeys, { columns, originalKeys });
+        console.log(`[DataJoin] ${stats.matched} von ${stats.targetRows} Zeilen verbunden, ${stats.duplicateKeys} doppelte Schlüssel in der Quelle (${Date.now() - started} ms)`);
+        return { success: true, rows, originalRows, templates, stats };
+    } catch (error) {
+        console.error('[DataJoin] Fehler beim Verbinden:', error);
+        return { success: false, error: error.message };
+    }
+});
+
+// Schlüsselbasierter Vergleich zweier Sheets (excel_sheet_diff.py): beide Sheets
+// werden gestreamt und per Hash-Join verbunden - liefert hinzugefügte, gelöschte
+// und geänderte Zeilen (mit geänderten Spalten), ohne die Sheets zu laden.
+ipcMain.handle('excel:diffSheets', async (event, { sourcePath, sourceSheet, targetPath, targetSheet, keyColumn = 1, maxMemoryRows = null }) => {
+    // Sicherheitsprüfung: Pfade validieren
+    if (!isValidFilePath(sourcePath) || !isValidFilePath(targetPath)) {
+        return { success: false, error: 'Ungültiger Dateipfad' };
+    }
+
+    try {
+        const staging = pythonBridge.getNetworkStaging();
+        const [localSource, localTarget] = await Promise.all([staging.pull(sourcePath), staging.pull(targetPath)]);
+        const result = await pythonBridge.diffSheets(localSource, sourceSheet, localTarget, targetSheet, { keyColumn, maxMemoryRows });
+        if (result.success) {
+            console.log(`[SheetDiff] ${result.added.length} hinzugefügt, ${result.deleted.length} gelöscht, ${result.changed.length} geändert (${result.durationMs} ms${result.spilled ? `, ${result.partitions} Partitionen` : ''})`);
+        }
+        return result;
+    } catch (error) {
+        console.error('[SheetDiff] Fehler beim Vergleich:', error);
+        return { success: false, error: error.message };
+    }
+});
+
+// Export nur der markierten bzw. ausgewählten Zeilen (excel_filtered_export.py):
+// Kopfzeile + Treffer werden direkt im Sheet-XML übernommen und neu nummeriert,
+// Shared Strings gekürzt, Bereiche (Tabellen, autoFilter, verbundene Zellen,
+// bedingte Formatierung) umgerechnet - ohne den Writer mit rowMapping.
+ipcMain.handle('excel:exportFilteredRows', async (event, { sourcePath, targetPath, sheetName, rows = null, flagColumn = null, flagValues = null, headerRow = 1 }) => {
+    // Sicherheitsprüfung: Pfade validieren
+    if (!isValidFilePath(sourcePath) || !isValidFilePath(targetPath)) {
+        return { success: false, error: 'Ungültiger Dateipfad' };
+    }
+
+    const staging = pythonBridge.getNetworkStaging();
+    const localTarget = staging.isNetworkPath(targetPath) ? staging.createWorkFile(targetPath) : targetPath;
+    try {
+        const localSource = await staging.pull(sourcePath);
+        const result = await pythonBridge.exportFilteredRows(localSource, localTarget, sheetName, { rows, flagColumn, flagValues, headerRow });
+        if (!result.success) {
+            if (localTarget !== targetPath) staging.discardWorkFile(localTarget);
+            return result;
+        }
+        if (localTarget !== targetPath) {
+            await staging.push(localTarget, targetPath);
+        }
+        console.log(`[FilteredExport] ${result.keptRows} von ${result.sourceRows} Zeilen exportiert, ${result.removedSharedStrings} Shared Strings entfernt (${result.durationMs} ms)`);
+        return result;
+    } catch (error) {
+        if (localTarget !== targetPath) staging.discardWorkFile(localTarget);
+        console.error('[FilteredExport] Fehler beim Export:', error);
+        return { success: false, error: error.message };
+    }
+});
+
+// Zeilen in Excel einfuegen (MIT Formatierungserhalt dank xlsx-populate!)
+ipcMain.handle('excel:insertRows', async (event, { filePath, sheetName, rows, startColumn, enableFlag = true, enableComment = true, flagColumn = 1, commentColumn = 2, sourceFilePath = null, sourceSheetName = null, sourceColumns = [], templateRow = null }) => {
+    // Sicherheitsprüfung: Pfad validieren
+    if (!isValidFilePath(filePath)) {
+        return { success: false, error: 'Ungültiger Dateipfad' };
+    }
+
+    try {
+        // Dateistand vor dem Schreiben (für das Nachtragen des Duplikat-Index)
+        const previousFingerprint = fileFingerprint(filePath);
+
+        // Schneller Weg: nur das Sheet-XML durchlaufen und die Zeilen anhängen
+        const appendResult = await appendRowsInPackage(filePath, sheetName, rows, {
+            startColumn, enableFlag, enableComment, flagColumn, commentColumn, templateRow
+        });
+        if (appendResult) {
+            if (!appendResult.success) {
+                return { success: false, error: appendResult.error };
             }
+            updateKeyIndex(filePath, sheetName, previousFingerprint, rows, appendResult.startRow, { startColumn, enableFlag, enableComment, flagColumn, commentColumn });
+            await logDataTransfer(filePath, sheetName, appendResult.insertedCount, appendResult.startRow, sourceFilePath, sourceSheetName);
+            return {
+                success: true,
+                message: `${appendResult.insertedCount} Zeile(n) ab Zeile ${appendResult.startRow} eingefuegt`,
+                insertedCount: appendResult.insertedCount,
+                startRow: appendResult.startRow
+            };
+        }
+
+        const workbook = await XlsxPopulate.fromFileAsync(filePath);
+        const worksheet = workbook.sheet(sheetName);
 
-            // Als String belassen
-            return { value: value, isDate: false };
+        if (!worksheet) {
+            return { success: false, error: `Sheet "${sheetName}" nicht gefunden` };
         }
 
         // Formatvorlage aus Header-Zeile oder vorhandenen Zeilen ermitteln
@@ -3237,7 +3756,7 @@ ipcMain.handle('excel:insertRows', async (event, { filePath, sheetName, rows, st
                         // (Quelldatei kann bedingte Formatierungen nicht liefern)
                         copyStyleFromTemplate(targetCell, colNumber);
 
-                        const converted = convertValue(value, targetCell);
+                        const converted = convertTransferValue(value);
                         targetCell.value(converted.value);
 
                         // Wenn es ein Datum ist, prüfe ob schon ein Format von Template kopiert wurde
@@ -3269,25 +3788,10 @@ ipcMain.handle('excel:insertRows', async (event, { filePath, sheetName, rows, st
 
         // Speichern (xlsx-populate erhält die originale Formatierung!)
         await saveWorkbookOptimized(workbook, filePath, {}, filePath);
+        updateKeyIndex(filePath, sheetName, previousFingerprint, rows, insertRow, { startColumn, enableFlag, enableComment, flagColumn, commentColumn });
 
         // Netzwerk-Log für Datenübertragung (falls auf Netzlaufwerk)
-        await networkLog.log(filePath, 'DATA_TRANSFER', {
-            file: path.basename(filePath),
-            sheet: sheetName,
-            rowsInserted: insertedCount,
-            startRow: insertRow,
-            sourceFile: sourceFilePath ? path.basename(sourceFilePath) : null,
-            sourceSheet: sourceSheetName
-        });
-
-        // Auch Quelldatei loggen (falls auf anderem Netzlaufwerk)
-        if (sourceFilePath) {
-            await networkLog.log(sourceFilePath, 'DATA_TRANSFER_SOURCE', {
-                targetFile: path.basename(filePath),
-                targetSheet: sheetName,
-                rowsTransferred: insertedCount
-            });
-        }
+        await logDataTransfer(filePath, sheetName, insertedCount, insertRow, sourceFilePath, sourceSheetName);
 
         return {
             success: true,
@@ -28,13 +28,59 @@ contextBridge.exposeInMainWorld('electronAPI', {
     // Excel-Operationen
     readExcelFile: (filePath, password) => ipcRenderer.invoke('excel:readFile', filePath, password),
     readExcelSheet: (filePath, sheetName, password) => ipcRenderer.invoke('excel:readSheet', filePath, sheetName, password),
+    // Mehrere Sheets in einem Aufruf - onSheet(sheetName, result) pro fertigem Sheet
+    readExcelWorkbook: async (filePath, sheetNames, onSheet) => {
+        const requestId = `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+        const listener = (event, message) => {
+            if (message.requestId === requestId) onSheet(message.sheetName, message.result);
+        };
+        ipcRenderer.on('excel:workbookSheet', listener);
+        try {
+            return await ipcRenderer.invoke('excel:readWorkbook', filePath, sheetNames, requestId);
+        } finally {
+            ipcRenderer.removeListener('excel:workbookSheet', listener);
+        }
+    },
+    // Ein Sheet progressiv (meta, rows-Batches, end) - onRecord(record) pro Datensatz.
+    // Liegt das Sheet schon im Vorab-Cache, kommt es komplett als { cached }.
+    readExcelSheetStream: async (filePath, sheetName, onRecord) => {
+        const requestId = `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+        const listener = (event, message) => {
+            if (message.requestId === requestId) onRecord(message.record);
+        };
+        ipcRenderer.on('excel:sheetStream', listener);
+        try {
+            return await ipcRenderer.invoke('excel:readSheetStream', filePath, sheetName, requestId);
+        } finally {
+            ipcRenderer.removeListener('excel:sheetStream', listener);
+        }
+    },
     insertExcelRows: (params) => ipcRenderer.invoke('excel:insertRows', params),
+    checkDuplicates: (params) => ipcRenderer.invoke('excel:checkDuplicates', params),
+    dataJoin: (params) => ipcRenderer.invoke('excel:dataJoin', params),
+    diffSheets: (params) => ipcRenderer.invoke('excel:diffSheets', params),
+    exportFilteredRows: (params) => ipcRenderer.invoke('excel:exportFilteredRows', params),
+    buildSearchIndex: (params) => ipcRenderer.invoke('search:buildIndex', params),
+    querySearchIndex: (params) => ipcRenderer.invoke('search:query', params),
     copyExcelFile: (params) => ipcRenderer.invoke('excel:copyFile', params),
     exportData: (params) => ipcRenderer.invoke('excel:exportData', params),
     exportWithAllSheets: (params) => ipcRenderer.invoke('excel:exportWithAllSheets', params),
     exportMultipleSheets: (params) => ipcRenderer.invoke('excel:exportMultipleSheets', params),
     saveExcelFile: (params) => ipcRenderer.invoke('excel:saveFile', params),
     createTemplateFromSource: (params) => ipcRenderer.invoke('excel:createTemplateFromSource', params),
+    // Viele Monatsdateien aus einer Vorlage - onFile(record) pro fertiger Datei.
+    createMonthFiles: async (params, onFile) => {
+        const requestId = `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+        const listener = (event, message) => {
+            if (message.requestId === requestId && onFile) onFile(message.record);
+        };
+        ipcRenderer.on('excel:monthBatchProgress', listener);
+        try {
+            return await ipcRenderer.invoke('excel:createMonthFiles', params, requestId);
+        } finally {
+            ipcRenderer.removeListener('excel:monthBatchProgress', listener);
+        }
+    },
     
     // Python/openpyxl Writer (behält CF und Formatierungen)
     pythonExportMultipleSheets: (params) => ipcRenderer.invoke('python:exportMultipleSheets', params),
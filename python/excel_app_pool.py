@@ -0,0 +1,551 @@
+#!/usr/bin/env python3
+"""
+Excel App Pool - langlebige Excel-Instanzen für Reader und Writer
+
+Bisher startet jeder xlwings-Aufruf ein eigenes Excel (vorher werden alle
+laufenden Instanzen beendet) - der Excel-Start ist der teuerste Teil eines
+Speichervorgangs. Im persistenten Worker (excel_xlwings_worker.py) leihen
+Reader und Writer stattdessen eine warme Instanz aus dem Pool:
+
+- Health-Check beim Ausleihen (tote Instanz -> beenden und neu starten)
+- Workbook-Isolation: bei Rückgabe werden alle während der Ausleihe
+  geöffneten Workbooks ohne Speichern geschlossen
+- Recycling nach max_uses Operationen oder über max_memory_mb Speicher
+- Crash-Recovery: schlägt eine Operation fehl, wird die Instanz geprüft
+  und ggf. ersetzt
+
+Die Excel-Anbindung steckt hinter ExcelAppBackend. FakeAppBackend ist eine
+In-Process-Implementierung ohne Excel, damit Pool-Verhalten und
+Wiederverwendung auch unter Linux testbar sind.
+"""
+
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+# Standardwerte (über den Worker konfigurierbar)
+DEFAULT_POOL_SIZE = 1
+DEFAULT_MAX_USES = 50
+DEFAULT_MAX_MEMORY_MB = 1500
+# Wie lange acquire() auf eine freie Instanz wartet
+DEFAULT_ACQUIRE_TIMEOUT = 120.0
+
+
+def _log(message: str):
+    print(f"[AppPool] {message}", file=sys.stderr, flush=True)
+
+
+def process_memory_bytes(pid: Optional[int]) -> Optional[int]:
+    """Arbeitsspeicher (RSS) eines Prozesses, None wenn nicht ermittelbar"""
+    if not pid:
+        return None
+    try:
+        import psutil  # auf macOS Abhängigkeit von xlwings
+        return psutil.Process(pid).memory_info().rss
+    except ImportError:
+        pass
+    except Exception:
+        return None
+
+    if platform.system() == 'Windows':
+        # Embedded Python ohne psutil: GetProcessMemoryInfo über ctypes
+        try:
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                            ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                            ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                            ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                            ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                            ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+            handle = ctypes.windll.kernel32.OpenProcess(0x0410, False, pid)  # QUERY_INFORMATION | VM_READ
+            if not handle:
+                return None
+            try:
+                counters = PROCESS_MEMORY_COUNTERS()
+                counters.cb = ctypes.sizeof(counters)
+                if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                    return counters.WorkingSetSize
+            finally:
+                ctypes.windll.kernel32.CloseHandle(handle)
+        except Exception:
+            return None
+        return None
+
+    try:
+        result = subprocess.run(['ps', '-o', 'rss=', '-p', str(pid)], capture_output=True, text=True, timeout=2)
+        if result.returncode == 0 and result.stdout.strip():
+            return int(result.stdout.strip()) * 1024
+    except Exception:
+        pass
+    return None
+
+
+# =============================================================================
+# Backends
+# =============================================================================
+
+class ExcelAppBackend:
+    """Abstrakte Anbindung an eine Excel-Instanz (eine Implementierung pro Plattform/Test)"""
+
+    name = 'abstract'
+
+    def start(self) -> Any:
+        """Startet eine neue, unsichtbare Instanz und gibt das App-Objekt zurück"""
+        raise NotImplementedError
+
+    def is_alive(self, app: Any) -> bool:
+        """Health-Check: reagiert die Instanz noch?"""
+        raise NotImplementedError
+
+    def open_books(self, app: Any) -> List[Any]:
+        """Aktuell geöffnete Workbooks"""
+        raise NotImplementedError
+
+    def close_book(self, app: Any, book: Any):
+        """Schließt ein Workbook ohne zu speichern"""
+        raise NotImplementedError
+
+    def book_key(self, book: Any) -> Any:
+        """
+        Stabile Identität eines Workbooks über mehrere open_books()-Aufrufe.
+        xlwings liefert bei jeder Abfrage neue Book-Wrapper (id() taugt nicht,
+        ids werden zudem wiederverwendet) - daher Pfad, ersatzweise Name.
+        """
+        try:
+            return book.fullname
+        except Exception:
+            return book.name
+
+    def memory_bytes(self, app: Any) -> Optional[int]:
+        """Speicherverbrauch der Instanz (None = unbekannt)"""
+        return None
+
+    def quit(self, app: Any):
+        """Beendet die Instanz regulär"""
+        raise NotImplementedError
+
+    def kill(self, app: Any):
+        """Beendet die Instanz hart (nach Absturz/Hänger)"""
+        raise NotImplementedError
+
+
+class XlwingsAppBackend(ExcelAppBackend):
+    """Echtes Excel über xlwings"""
+
+    name = 'xlwings'
+
+    def __init__(self):
+        import xlwings as xw
+        self.xw = xw
+
+    def start(self):
+        app = self.xw.App(visible=False, add_book=False)
+        app.display_alerts = False
+        app.screen_updating = False
+        try:
+            app.visible = False
+        except Exception:
+            pass
+        return app
+
+    def is_alive(self, app) -> bool:
+        try:
+            # Billiger Roundtrip: hängt oder wirft, wenn Excel weg ist
+            app.books.count
+            return True
+        except Exception:
+            return False
+
+    def open_books(self, app):
+        return list(app.books)
+
+    def close_book(self, app, book):
+        book.close()
+
+    def memory_bytes(self, app):
+        try:
+            return process_memory_bytes(app.pid)
+        except Exception:
+            return None
+
+    def quit(self, app):
+        for book in list(app.books):
+            try:
+                book.close()
+            except Exception:
+                pass
+        app.quit()
+
+    def kill(self, app):
+        app.kill()
+
+
+class FakeDocument:
+    """Geöffnetes Workbook in einer FakeApp (der Zustand hinter den Wrappern)"""
+
+    def __init__(self, path: str, read_only: bool = False):
+        self.path = path
+        self.read_only = read_only
+        self.closed = False
+
+
+class FakeBook:
+    """Wrapper wie xlwings.Book: jede Abfrage liefert ein neues Objekt"""
+
+    def __init__(self, app: 'FakeApp', document: FakeDocument):
+        self.app = app
+        self.document = document
+
+    @property
+    def fullname(self):
+        return os.path.abspath(self.document.path)
+
+    @property
+    def name(self):
+        return os.path.basename(self.document.path)
+
+    @property
+    def read_only(self):
+        return self.document.read_only
+
+    @property
+    def closed(self):
+        return self.document.closed
+
+    def close(self):
+        self.document.closed = True
+        self.app._documents.remove(self.document)
+
+
+class FakeApp:
+    """Minimaler Ersatz für xlwings.App (Zähler statt Excel)"""
+
+    _next_pid = 1000
+
+    def __init__(self):
+        FakeApp._next_pid += 1
+        self.pid = FakeApp._next_pid
+        self.alive = True
+        self.memory = 100 * 1024 * 1024
+        self._documents: List[FakeDocument] = []
+        self.opened = 0
+
+    @property
+    def books(self):
+        return self
+
+    def open(self, path, read_only=False):
+        if not self.alive:
+            raise RuntimeError('Excel-Instanz reagiert nicht')
+        document = FakeDocument(path, read_only)
+        self._documents.append(document)
+        self.opened += 1
+        return FakeBook(self, document)
+
+    def __iter__(self):
+        return iter([FakeBook(self, document) for document in self._documents])
+
+    def __len__(self):
+        return len(self._documents)
+
+    def crash(self):
+        """Simuliert einen Absturz der Instanz"""
+        self.alive = False
+
+
+class FakeAppBackend(ExcelAppBackend):
+    """In-Process-Backend für Tests: zählt Starts, Beendigungen und Kills"""
+
+    name = 'fake'
+
+    def __init__(self, start_delay: float = 0.0):
+        self.start_delay = start_delay
+        self.started: List[FakeApp] = []
+        self.quit_count = 0
+        self.kill_count = 0
+
+    def start(self):
+        if self.start_delay:
+            time.sleep(self.start_delay)
+        app = FakeApp()
+        self.started.append(app)
+        return app
+
+    def is_alive(self, app) -> bool:
+        return app.alive
+
+    def open_books(self, app):
+        return list(app)
+
+    def close_book(self, app, book):
+        book.close()
+
+    def memory_bytes(self, app):
+        return app.memory
+
+    def quit(self, app):
+        if not app.alive:
+            raise RuntimeError('Excel-Instanz reagiert nicht')
+        app.alive = False
+        self.quit_count += 1
+
+    def kill(self, app):
+        app.alive = False
+        self.kill_count += 1
+
+
+# =============================================================================
+# Pool
+# =============================================================================
+
+class PooledApp:
+    """Eine Instanz im Pool mit Nutzungszähler"""
+
+    def __init__(self, app: Any, slot: int):
+        self.app = app
+        self.slot = slot
+        self.uses = 0
+        self.started_at = time.time()
+
+
+class AppLease:
+    """Ausgeliehene Instanz - über release() oder den lease()-Kontext zurückgeben"""
+
+    def __init__(self, pool: 'ExcelAppPool', entry: PooledApp, books_before: List[Any]):
+        self.pool = pool
+        self.entry = entry
+        self.app = entry.app
+        self.books_before = books_before
+        self.released = False
+
+    def release(self, failed: bool = False):
+        if not self.released:
+            self.released = True
+            self.pool.release(self, failed=failed)
+
+
+class ExcelAppPool:
+    """
+    Pool warmer Excel-Instanzen. Thread-sicher; acquire() blockiert, bis eine
+    Instanz frei ist (höchstens size Instanzen gleichzeitig).
+    """
+
+    def __init__(self, backend: ExcelAppBackend, size: int = DEFAULT_POOL_SIZE,
+                 max_uses: int = DEFAULT_MAX_USES, max_memory_mb: Optional[float] = DEFAULT_MAX_MEMORY_MB):
+        self.backend = backend
+        self.size = max(1, size)
+        self.max_uses = max_uses
+        self.max_memory_mb = max_memory_mb
+        self._idle: List[PooledApp] = []
+        self._leased = 0
+        self._next_slot = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self.stats = {'starts': 0, 'reuses': 0, 'leases': 0, 'recycled': 0,
+                      'crashes': 0, 'strayBooksClosed': 0}
+
+    # --- Ausleihen / Zurückgeben ---------------------------------------------
+
+    def acquire(self, timeout: float = DEFAULT_ACQUIRE_TIMEOUT) -> AppLease:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while not self._idle and self._leased >= self.size:
+                if self._closed:
+                    raise RuntimeError('App-Pool ist geschlossen')
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError('Keine Excel-Instanz frei')
+                self._cond.wait(remaining)
+            if self._closed:
+                raise RuntimeError('App-Pool ist geschlossen')
+            entry = self._idle.pop() if self._idle else None
+            self._leased += 1
+
+        try:
+            # Start und Health-Check außerhalb des Locks (kann Sekunden dauern)
+            if entry is not None and not self.backend.is_alive(entry.app):
+                _log(f"Instanz {entry.slot} reagiert nicht - wird ersetzt")
+                self._count('crashes')
+                self._discard(entry, kill=True)
+                entry = None
+            if entry is None:
+                entry = self._start_entry()
+            else:
+                self._count('reuses')
+            books_before = self._safe_books(entry.app)
+        except Exception:
+            with self._cond:
+                self._leased -= 1
+                self._cond.notify()
+            raise
+
+        entry.uses += 1
+        self._count('leases')
+        return AppLease(self, entry, books_before)
+
+    def release(self, lease: AppLease, failed: bool = False):
+        entry = lease.entry
+        keep = True
+
+        if failed and not self.backend.is_alive(entry.app):
+            _log(f"Instanz {entry.slot} nach Fehler abgestürzt - wird verworfen")
+            self._count('crashes')
+            self._discard(entry, kill=True)
+            keep = False
+
+        if keep:
+            # Workbook-Isolation: nichts aus dieser Ausleihe bleibt offen
+            before = {self.backend.book_key(book) for book in lease.books_before}
+            for book in self._safe_books(entry.app):
+                if self.backend.book_key(book) in before:
+                    continue
+                try:
+                    self.backend.close_book(entry.app, book)
+                    self._count('strayBooksClosed')
+                except Exception as e:
+                    _log(f"Workbook konnte nicht geschlossen werden ({e}) - Instanz wird verworfen")
+                    self._discard(entry, kill=True)
+                    keep = False
+                    break
+
+        if keep and self._needs_recycling(entry):
+            self._count('recycled')
+            self._discard(entry, kill=False)
+            keep = False
+
+        with self._cond:
+            self._leased -= 1
+            if keep and not self._closed:
+                self._idle.append(entry)
+            elif keep:
+                self._discard(entry, kill=False)
+            self._cond.notify()
+
+    @contextmanager
+    def lease(self, timeout: float = DEFAULT_ACQUIRE_TIMEOUT):
+        """with pool.lease() as app: ... - bei Exception wird die Instanz geprüft"""
+        lease = self.acquire(timeout)
+        try:
+            yield lease.app
+        except BaseException:
+            lease.release(failed=True)
+            raise
+        lease.release()
+
+    # --- Verwaltung ------------------------------------------------------------
+
+    def warm_up(self):
+        """Startet alle Instanzen vorab, damit der erste Aufruf nicht wartet"""
+        while True:
+            with self._cond:
+                if self._closed or len(self._idle) + self._leased >= self.size:
+                    return
+                self._leased += 1
+            try:
+                entry = self._start_entry()
+            finally:
+                with self._cond:
+                    self._leased -= 1
+                    self._cond.notify()
+            with self._cond:
+                self._idle.append(entry)
+                self._cond.notify()
+
+    def shutdown(self):
+        """Beendet alle freien Instanzen; ausgeliehene werden bei Rückgabe beendet"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for entry in idle:
+            self._discard(entry, kill=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return dict(self.stats, backend=self.backend.name, size=self.size,
+                        idle=len(self._idle), leased=self._leased,
+                        maxUses=self.max_uses, maxMemoryMb=self.max_memory_mb)
+
+    # --- intern ----------------------------------------------------------------
+
+    def _count(self, key: str):
+        with self._cond:
+            self.stats[key] += 1
+
+    def _start_entry(self) -> PooledApp:
+        started = time.perf_counter()
+        app = self.backend.start()
+        with self._cond:
+            slot = self._next_slot
+            self._next_slot += 1
+        self._count('starts')
+        _log(f"Instanz {slot} gestartet ({time.perf_counter() - started:.2f} s)")
+        return PooledApp(app, slot)
+
+    def _needs_recycling(self, entry: PooledApp) -> bool:
+        if self.max_uses and entry.uses >= self.max_uses:
+            _log(f"Instanz {entry.slot} nach {entry.uses} Operationen recycelt")
+            return True
+        if self.max_memory_mb:
+            memory = self.backend.memory_bytes(entry.app)
+            if memory is not None and memory > self.max_memory_mb * 1024 * 1024:
+                _log(f"Instanz {entry.slot} über Speichergrenze ({memory // (1024 * 1024)} MB) - recycelt")
+                return True
+        return False
+
+    def _discard(self, entry: PooledApp, kill: bool):
+        try:
+            if kill:
+                self.backend.kill(entry.app)
+            else:
+                self.backend.quit(entry.app)
+        except Exception:
+            # Regulär beenden fehlgeschlagen -> hart beenden
+            try:
+                self.backend.kill(entry.app)
+            except Exception as e:
+                _log(f"Instanz {entry.slot} konnte nicht beendet werden: {e}")
+
+    def _safe_books(self, app) -> List[Any]:
+        try:
+            return self.backend.open_books(app)
+        except Exception:
+            return []
+
+
+# =============================================================================
+# Aktiver Pool (nur im persistenten Worker gesetzt)
+# =============================================================================
+
+_active_pool: Optional[ExcelAppPool] = None
+
+
+def set_active_pool(pool: Optional[ExcelAppPool]):
+    """Setzt den Pool, den Reader/Writer verwenden (None = Einzelaufruf-Modus)"""
+    global _active_pool
+    _active_pool = pool
+
+
+def get_active_pool() -> Optional[ExcelAppPool]:
+    """
+    Pool des Workers oder None. Ohne Pool (Skript-Aufruf pro Operation)
+    starten Reader/Writer wie bisher eine eigene Instanz.
+    """
+    return _active_pool
+
+
+def create_backend(name: str) -> ExcelAppBackend:
+    if name == 'fake':
+        return FakeAppBackend()
+    if name == 'xlwings':
+        return XlwingsAppBackend()
+    raise ValueError(f'Unbekanntes App-Backend: {name}')
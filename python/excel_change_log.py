@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Excel Change Log - Versionierte Änderungen für inkrementelles getData
+
+Die Live-Session zählt eine Version hoch und protokolliert pro Operation,
+was sich geändert hat (Zellen oder strukturelle Verschiebung). Das Frontend
+holt nach einer Bearbeitung nur noch getChanges(sinceVersion) statt des
+ganzen Sheets. Ist das Protokoll über die Version des Clients hinaus
+verdichtet, muss der Client einen vollständigen Snapshot laden.
+
+Die Deltas enthalten nur die direkt gesetzten Zellen. Das Excel-Backend
+rechnet Formeln nach und antwortet deshalb bei Änderungen immer mit einem
+Snapshot; inkrementell arbeitet das Memory-Backend.
+
+Delta-Typen (Indizes 0-basiert, Zeilen ohne Header):
+    cells          cells: [[zeile, spalte, wert], ...]
+    insertRows     index, count
+    deleteRows     index
+    moveRow        from, to
+    hideRow        index, hidden
+    highlightRow   index, color
+    insertColumns  index, count, headers
+    deleteColumns  index
+    moveColumn     from, to
+    hideColumn     index, hidden
+"""
+
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+# Maximale Anzahl protokollierter Operationen (ältere werden verdichtet)
+DEFAULT_MAX_ENTRIES = 5000
+
+
+def delta_for_command(cmd: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Delta einer erfolgreich ausgeführten Operation (None = keine Änderung)"""
+    action = cmd.get('action')
+    if action == 'setCellValue':
+        return {'type': 'cells', 'cells': [[cmd.get('rowIndex'), cmd.get('colIndex'), cmd.get('value')]]}
+    if action == 'deleteRow':
+        return {'type': 'deleteRows', 'index': cmd.get('rowIndex')}
+    if action == 'insertRow':
+        return {'type': 'insertRows', 'index': cmd.get('rowIndex'), 'count': cmd.get('count', 1)}
+    if action == 'moveRow':
+        return {'type': 'moveRow', 'from': cmd.get('fromIndex'), 'to': cmd.get('toIndex')}
+    if action == 'hideRow':
+        return {'type': 'hideRow', 'index': cmd.get('rowIndex'), 'hidden': cmd.get('hidden', True)}
+    if action == 'highlightRow':
+        return {'type': 'highlightRow', 'index': cmd.get('rowIndex'), 'color': cmd.get('color')}
+    if action == 'deleteColumn':
+        return {'type': 'deleteColumns', 'index': cmd.get('colIndex')}
+    if action == 'insertColumn':
+        return {'type': 'insertColumns', 'index': cmd.get('colIndex'), 'count': cmd.get('count', 1),
+                'headers': cmd.get('headers')}
+    if action == 'moveColumn':
+        return {'type': 'moveColumn', 'from': cmd.get('fromIndex'), 'to': cmd.get('toIndex')}
+    if action == 'hideColumn':
+        return {'type': 'hideColumn', 'index': cmd.get('colIndex'), 'hidden': cmd.get('hidden', True)}
+    return None
+
+
+class ChangeLog:
+    """Monoton steigende Version + begrenztes Protokoll der Deltas"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.version = 0
+        self.entries = deque()  # (version, delta)
+        # Älteste Version, ab der lückenlos protokolliert ist
+        self.base_version = 0
+
+    def record(self, delta: Optional[Dict[str, Any]]) -> int:
+        """Protokolliert ein Delta und liefert die neue Version"""
+        if delta is None:
+            return self.version
+        self.version += 1
+        self.entries.append((self.version, delta))
+        while len(self.entries) > self.max_entries:
+            self.base_version = self.entries.popleft()[0]
+        return self.version
+
+    def reset(self) -> int:
+        """
+        Verwirft das Protokoll (z.B. neue Datei geöffnet). Die Version steigt
+        trotzdem, damit Clients mit älterem Stand einen Snapshot laden.
+        """
+        self.version += 1
+        self.entries.clear()
+        self.base_version = self.version
+        return self.version
+
+    def since(self, version: Any) -> Optional[List[Dict[str, Any]]]:
+        """
+        Deltas nach version. None = nicht mehr rekonstruierbar (Snapshot nötig).
+        Aufeinanderfolgende Zell-Deltas werden zu einem zusammengefasst.
+        """
+        if not isinstance(version, int) or isinstance(version, bool):
+            return None
+        if version < self.base_version or version > self.version:
+            return None
+
+        changes: List[Dict[str, Any]] = []
+        for entry_version, delta in self.entries:
+            if entry_version <= version:
+                continue
+            if delta['type'] == 'cells' and changes and changes[-1]['type'] == 'cells':
+                merged = changes[-1]
+                merged['cells'].extend(delta['cells'])
+                merged['version'] = entry_version
+                continue
+            item = dict(delta, version=entry_version)
+            if delta['type'] == 'cells':
+                item['cells'] = list(delta['cells'])
+            changes.append(item)
+
+        # Mehrfach geänderte Zellen: nur der letzte Wert (Reihenfolge bleibt erhalten)
+        for item in changes:
+            if item['type'] == 'cells' and len(item['cells']) > 1:
+                latest = {}
+                for row, col, value in item['cells']:
+                    latest.pop((row, col), None)
+                    latest[(row, col)] = value
+                item['cells'] = [[row, col, value] for (row, col), value in latest.items()]
+        return changes
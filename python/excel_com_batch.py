@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Excel COM Batch - wenige Excel-Aufrufe statt einem pro Zeile/Spalte
+
+Jeder Zugriff über xlwings ist ein Roundtrip zu Excel (COM auf Windows,
+AppleScript auf macOS). Zeilen einzeln auszublenden, zu färben oder zu
+löschen kostet bei tausenden Zeilen Minuten. ComBatcher fasst Indizes zu
+zusammenhängenden Bereichen zusammen und setzt eine Eigenschaft einmal pro
+Mehrfachbereich ("2:5,9:9,12:20"). Excel-Adressen sind auf 255 Zeichen
+begrenzt - längere Listen werden in mehrere Aufrufe aufgeteilt.
+
+Lehnt Excel einen Mehrfachbereich für eine Operation ab (je nach Plattform),
+wird diese Art ab dann bereichsweise ausgeführt - immer noch ein Aufruf pro
+zusammenhängendem Bereich statt pro Zeile. Scheitert ein einzelner Bereich
+(z.B. verbundene oder geschützte Zellen), werden nur seine Zeilen/Spalten
+einzeln wiederholt; die übrigen Bereiche laufen normal weiter. Was auch
+einzeln scheitert, steht in failed und im Rückgabewert.
+
+Alle Indizes hier sind Excel-Indizes (1-basiert, inklusive Header-Zeile).
+"""
+
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Maximale Länge einer Adresse für Sheet.Range()
+MAX_ADDRESS_LENGTH = 255
+
+
+def column_letter(col_idx: int) -> str:
+    """1-basierter Spaltenindex -> Buchstabe (1 = A, 27 = AA)"""
+    result = ''
+    while col_idx > 0:
+        col_idx, remainder = divmod(col_idx - 1, 26)
+        result = chr(65 + remainder) + result
+    return result
+
+
+def index_runs(indices: Iterable[int]) -> List[Tuple[int, int]]:
+    """Indizes -> aufsteigende, zusammenhängende Bereiche [(erster, letzter), ...]"""
+    runs: List[List[int]] = []
+    for idx in sorted(set(indices)):
+        if runs and runs[-1][1] + 1 == idx:
+            runs[-1][1] = idx
+        else:
+            runs.append([idx, idx])
+    return [(first, last) for first, last in runs]
+
+
+def pack_addresses(addresses: List[str], max_length: int = MAX_ADDRESS_LENGTH) -> List[List[str]]:
+    """Teilt Adressen in Gruppen, deren Union-Adresse höchstens max_length Zeichen hat"""
+    chunks: List[List[str]] = []
+    current: List[str] = []
+    length = 0
+    for address in addresses:
+        added = len(address) + (1 if current else 0)
+        if current and length + added > max_length:
+            chunks.append(current)
+            current, length = [], 0
+            added = len(address)
+        current.append(address)
+        length += added
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def row_address(first: int, last: int) -> str:
+    return f'{first}:{last}'
+
+
+def column_address(first: int, last: int) -> str:
+    return f'{column_letter(first)}:{column_letter(last)}'
+
+
+class ComBatcher:
+    """
+    Gebündelte Operationen auf einem xlwings-Sheet mit Aufruf-Zähler.
+
+    calls zählt Excel-Operationen pro Art (ein Eigenschafts-Setzen bzw.
+    Löschen/Einfügen je Aufruf), unbatched die Operationen, die eine
+    Einzel-Verarbeitung gebraucht hätte, failed die Adressen pro Art, die
+    auch einzeln nicht gingen.
+
+    Die Bereichs-Methoden geben die gescheiterten Adressen zurück (leer = alles
+    angewendet); delete_rows/delete_columns werfen stattdessen RuntimeError,
+    weil eine fehlende Löschung alle folgenden Indizes verschiebt.
+    """
+
+    def __init__(self, ws: Any, max_length: int = MAX_ADDRESS_LENGTH):
+        self.ws = ws
+        self.max_length = max_length
+        self.calls: Counter = Counter()
+        self.unbatched: Counter = Counter()
+        self.failed: Dict[str, List[str]] = {}
+        # Arten, für die Excel keinen Mehrfachbereich akzeptiert hat
+        self._single_area = set()
+
+    # --- Zeilen / Spalten --------------------------------------------------------
+
+    def set_row_height(self, rows: Iterable[int], height: float) -> List[str]:
+        """Setzt die Höhe ganzer Zeilen (0 = ausgeblendet)"""
+        runs = index_runs(rows)
+        self.unbatched['rowHeight'] += sum(last - first + 1 for first, last in runs)
+        return self._apply('rowHeight', runs, row_address,
+                           lambda rng: setattr(rng, 'row_height', height))
+
+    def set_column_width(self, columns: Iterable[int], width: float) -> List[str]:
+        """Setzt die Breite ganzer Spalten (0 = ausgeblendet)"""
+        runs = index_runs(columns)
+        self.unbatched['columnWidth'] += sum(last - first + 1 for first, last in runs)
+        return self._apply('columnWidth', runs, column_address,
+                           lambda rng: setattr(rng, 'column_width', width))
+
+    def set_row_color(self, rows: Iterable[int], first_col: int, last_col: int, rgb: Optional[tuple],
+                      unbatched_per_row: int = 1) -> List[str]:
+        """Färbt die Zeilen im Spaltenbereich (rgb None = Füllung entfernen)"""
+        runs = index_runs(rows)
+        first_letter, last_letter = column_letter(first_col), column_letter(last_col)
+        self.unbatched['color'] += sum(last - first + 1 for first, last in runs) * unbatched_per_row
+        return self._apply('color', runs, lambda f, l: f'{first_letter}{f}:{last_letter}{l}',
+                           lambda rng: setattr(rng, 'color', rgb))
+
+    def set_row_colors(self, colors: Dict[int, Optional[tuple]], first_col: int, last_col: int) -> List[str]:
+        """Färbt Zeilen mit unterschiedlichen Farben - ein Durchlauf pro Farbe"""
+        by_color: Dict[Optional[tuple], List[int]] = {}
+        for row, rgb in colors.items():
+            by_color.setdefault(tuple(rgb) if rgb is not None else None, []).append(row)
+        failed: List[str] = []
+        for rgb, rows in by_color.items():
+            failed += self.set_row_color(rows, first_col, last_col, rgb)
+        return failed
+
+    def delete_rows(self, rows: Iterable[int]):
+        """Löscht ganze Zeilen (Excel-Indizes vom Stand vor dem Löschen)"""
+        runs = index_runs(rows)
+        self.unbatched['delete'] += sum(last - first + 1 for first, last in runs)
+        # Von unten nach oben: spätere Stücke verschieben frühere nicht
+        self._raise_failed('Zeilen', self._apply('delete', list(reversed(runs)), row_address,
+                                                 lambda rng: rng.delete(), bottom_up=True))
+
+    def delete_columns(self, columns: Iterable[int]):
+        """Löscht ganze Spalten (Excel-Indizes vom Stand vor dem Löschen)"""
+        runs = index_runs(columns)
+        self.unbatched['delete'] += sum(last - first + 1 for first, last in runs)
+        self._raise_failed('Spalten', self._apply('delete', list(reversed(runs)), column_address,
+                                                  lambda rng: rng.delete(), bottom_up=True))
+
+    def insert_columns(self, first: int, count: int):
+        """Fügt count leere Spalten vor Spalte first ein (ein Aufruf)"""
+        self.unbatched['insert'] += count
+        self.calls['insert'] += 1
+        self.ws.range(column_address(first, first + count - 1)).insert(shift='right')
+
+    # --- Zellen einer Spalte -------------------------------------------------------
+
+    def set_column_cells(self, rows: Iterable[int], col: int, kind: str,
+                         action: Callable[[Any], None]) -> List[str]:
+        """Wendet action auf die Zellen der Spalte in den Zeilen an (ein Aufruf pro Mehrfachbereich)"""
+        runs = index_runs(rows)
+        letter = column_letter(col)
+        self.unbatched[kind] += sum(last - first + 1 for first, last in runs)
+        return self._apply(kind, runs, lambda f, l: f'{letter}{f}:{letter}{l}', action)
+
+    def write_row_values(self, row: int, first_col: int, values: List[Any]):
+        """Schreibt Werte nebeneinander in eine Zeile (ein Aufruf)"""
+        if not values:
+            return
+        self.unbatched['value'] += len(values)
+        self.calls['value'] += 1
+        self.ws.range((row, first_col)).value = [list(values)]
+
+    # --- Auswertung --------------------------------------------------------------
+
+    def summary(self) -> Dict[str, Any]:
+        """Aufruf-Statistik für das Ergebnis des Writers"""
+        summary = {
+            'total': sum(self.calls.values()),
+            'unbatched': sum(self.unbatched.values()),
+            'byKind': dict(self.calls)
+        }
+        if self.failed:
+            summary['failed'] = {kind: len(addresses) for kind, addresses in self.failed.items()}
+        return summary
+
+    # --- intern ------------------------------------------------------------------
+
+    def _apply(self, kind: str, runs: List[Tuple[int, int]], address: Callable[[int, int], str],
+               action: Callable[[Any], None], bottom_up: bool = False) -> List[str]:
+        """
+        Wendet action auf die Bereiche an: Mehrfachbereich -> Bereich -> einzeln.
+
+        Args:
+            runs: Bereiche [(erster, letzter), ...] in Ausführungsreihenfolge
+            address: (erster, letzter) -> Excel-Adresse
+            bottom_up: Einzel-Wiederholung von hinten nach vorn (Löschen)
+
+        Returns:
+            Adressen, die auch einzeln gescheitert sind
+        """
+        areas = {address(first, last): (first, last) for first, last in runs}
+        failed: List[str] = []
+        for chunk in pack_addresses(list(areas), self.max_length):
+            if len(chunk) > 1 and kind not in self._single_area:
+                self.calls[kind] += 1
+                try:
+                    action(self.ws.range(','.join(chunk)))
+                    continue
+                except Exception:
+                    # Mehrfachbereich nicht unterstützt - ab jetzt bereichsweise
+                    self._single_area.add(kind)
+            for area in chunk:
+                failed += self._apply_area(kind, area, areas[area], address, action, bottom_up)
+        if failed:
+            self.failed.setdefault(kind, []).extend(failed)
+        return failed
+
+    def _apply_area(self, kind: str, area: str, run: Tuple[int, int], address: Callable[[int, int], str],
+                    action: Callable[[Any], None], bottom_up: bool) -> List[str]:
+        """Ein Bereich; scheitert er, seine Zeilen/Spalten einzeln"""
+        self.calls[kind] += 1
+        try:
+            action(self.ws.range(area))
+            return []
+        except Exception:
+            first, last = run
+            if first == last:
+                return [area]
+        failed = []
+        for idx in (range(last, first - 1, -1) if bottom_up else range(first, last + 1)):
+            item = address(idx, idx)
+            self.calls[kind] += 1
+            try:
+                action(self.ws.range(item))
+            except Exception:
+                failed.append(item)
+        return failed
+
+    @staticmethod
+    def _raise_failed(what: str, failed: List[str]):
+        if failed:
+            shown = ', '.join(failed[:10]) + (' ...' if len(failed) > 10 else '')
+            raise RuntimeError(f'{what} konnten nicht gelöscht werden: {shown}')
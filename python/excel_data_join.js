@@ -0,0 +1,165 @@
+/**
+ * Data Join für Excel Data Sync Pro (Spalten aus einer anderen Datei hinzufügen)
+ *
+ * Bisher hat der Renderer pro Einfügeposition eine Map über die Quelldaten
+ * aufgebaut, pro Zeile nachgeschlagen und die Formatierung jeder einzelnen
+ * importierten Zelle in cellStyles/cellFonts/numberFormats kopiert.
+ *
+ * Hier wird der Join einmal im Main-Prozess ausgeführt: Hash-Tabelle über die
+ * Schlüsselspalte der Quelle, danach alle Ziel-Schlüssel in einem Durchlauf
+ * nachschlagen. Ergebnis ist pro Zielzeile der Index der Quellzeile (-1 = kein
+ * Treffer) - die Werte holt sich der Renderer aus den bereits geladenen
+ * Quelldaten. Statt Formatierung pro Zelle gibt es pro importierter Spalte eine
+ * Vorlage (häufigste Formatierung der getroffenen Zellen) mit den Zielzeilen,
+ * die einen Treffer haben - nur diese Zeilen bekommen den Style, Zeilen ohne
+ * Treffer bleiben unformatiert. Vom häufigsten Format abweichende Einzelzellen
+ * der Quelle (z.B. eine hervorgehobene Zelle) werden nicht übernommen.
+ *
+ * Schlüssel wie bisher im Renderer: String(wert || '').trim(), leer = kein Schlüssel.
+ * Doppelte Schlüssel in der Quelle: das erste Vorkommen zählt, weitere werden gezählt.
+ */
+
+/**
+ * Normalisierter Join-Schlüssel ('' = kein Schlüssel)
+ * @param {*} value - Zellwert
+ * @returns {string}
+ */
+function joinKey(value) {
+    return String(value || '').trim();
+}
+
+/**
+ * Hash-Tabelle Schlüssel -> Quellzeile (erstes Vorkommen)
+ * @param {Array<Array>} sourceRows - Datenzeilen der Quelle (ohne Header)
+ * @param {number} keyIndex - Schlüsselspalte (0-basiert)
+ * @returns {{table: Map<string, number>, duplicateKeys: number}}
+ */
+function buildJoinTable(sourceRows, keyIndex) {
+    const table = new Map();
+    let duplicateKeys = 0;
+    for (let i = 0; i < sourceRows.length; i++) {
+        const row = sourceRows[i];
+        const key = row ? joinKey(row[keyIndex]) : '';
+        if (!key) continue;
+        if (table.has(key)) {
+            duplicateKeys++;
+        } else {
+            table.set(key, i);
+        }
+    }
+    return { table, duplicateKeys };
+}
+
+/**
+ * Schlägt alle Ziel-Schlüssel in einem Durchlauf nach
+ * @param {Map<string, number>} table - aus buildJoinTable
+ * @param {Array} targetKeys - Schlüsselwerte der Zielzeilen
+ * @returns {{rows: Int32Array, matched: number, unmatched: number, emptyKeys: number}}
+ */
+function probeJoinTable(table, targetKeys) {
+    const rows = new Int32Array(targetKeys.length).fill(-1);
+    let matched = 0;
+    let emptyKeys = 0;
+    for (let i = 0; i < targetKeys.length; i++) {
+        const key = joinKey(targetKeys[i]);
+        if (!key) {
+            emptyKeys++;
+            continue;
+        }
+        const sourceRow = table.get(key);
+        if (sourceRow !== undefined) {
+            rows[i] = sourceRow;
+            matched++;
+        }
+    }
+    return { rows, matched, unmatched: targetKeys.length - matched - emptyKeys, emptyKeys };
+}
+
+/**
+ * Häufigster Wert einer Spalte in einem "zeile-spalte"-Dict über die getroffenen Quellzeilen
+ * (Zeilen-Keys inkl. Header-Zeile: Datenzeile i -> i + 1). Zellen ohne Eintrag zählen mit -
+ * sind sie in der Mehrheit, gibt es keine Vorlage (null).
+ */
+function dominantValue(cellDict, sourceRows, column) {
+    if (!cellDict) return null;
+    const counts = new Map();
+    let best = null;
+    let bestCount = 0;
+    for (const sourceRow of sourceRows) {
+        const entry = cellDict[`${sourceRow + 1}-${column}`];
+        const value = entry === undefined ? null : entry;
+        const id = value === null ? null : (typeof value === 'string' ? value : JSON.stringify(value));
+        const count = (counts.get(id) || 0) + 1;
+        counts.set(id, count);
+        if (count > bestCount) {
+            best = value;
+            bestCount = count;
+        }
+    }
+    return best;
+}
+
+/**
+ * Formatierungs-Vorlage pro importierter Spalte
+ * @param {Object} sheet - Lese-Ergebnis der Quelle (cellStyles, cellFonts, numberFormats)
+ * @param {Int32Array} rows - Quellzeile pro Zielzeile (aus probeJoinTable)
+ * @param {number[]} columns - importierte Quellspalten (0-basiert)
+ * @returns {Object} Quellspalte -> { style, font, numberFormat, headerStyle, rows }
+ *                   (rows: Zielzeilen mit Treffer, aufsteigend - nur dort gilt die Vorlage)
+ */
+function columnStyleTemplates(sheet, rows, columns) {
+    const matchedRows = [...new Set(rows.filter(row => row >= 0))];
+    const targetRows = [];
+    for (let i = 0; i < rows.length; i++) {
+        if (rows[i] >= 0) targetRows.push(i);
+    }
+    const templates = {};
+    for (const column of columns) {
+        templates[column] = {
+            style: dominantValue(sheet.cellStyles, matchedRows, column),
+            font: dominantValue(sheet.cellFonts, matchedRows, column),
+            numberFormat: dominantValue(sheet.numberFormats, matchedRows, column),
+            headerStyle: (sheet.cellStyles && sheet.cellStyles[`0-${column}`]) || null,
+            rows: targetRows
+        };
+    }
+    return templates;
+}
+
+/**
+ * Kompletter Join: Hash-Tabelle, Abfrage aller Ziel-Schlüssel, Spalten-Vorlagen
+ * @param {Object} sheet - Lese-Ergebnis der Quelle (data inkl. Header an Position 0)
+ * @param {number} sourceKeyIndex - Schlüsselspalte der Quelle (0-basiert)
+ * @param {Array} targetKeys - Schlüsselwerte der Zielzeilen
+ * @param {Object} [options] - { columns: importierte Quellspalten (ohne = nur Statistik),
+ *                               originalKeys: Schlüssel der Original-Daten (gleiche Tabelle) }
+ * @returns {{rows: Int32Array, originalRows: Int32Array|null, templates: Object, stats: Object}}
+ */
+function joinSheet(sheet, sourceKeyIndex, targetKeys, options = {}) {
+    const columns = options.columns || [];
+    const sourceRows = sheet.data.slice(1);
+    const { table, duplicateKeys } = buildJoinTable(sourceRows, sourceKeyIndex);
+    const { rows, matched, unmatched, emptyKeys } = probeJoinTable(table, targetKeys);
+    return {
+        rows,
+        originalRows: options.originalKeys ? probeJoinTable(table, options.originalKeys).rows : null,
+        templates: columns.length > 0 ? columnStyleTemplates(sheet, rows, columns) : {},
+        stats: {
+            targetRows: targetKeys.length,
+            sourceRows: sourceRows.length,
+            matched,
+            unmatched,
+            emptyKeys,
+            duplicateKeys
+        }
+    };
+}
+
+module.exports = {
+    joinKey,
+    buildJoinTable,
+    probeJoinTable,
+    dominantValue,
+    columnStyleTemplates,
+    joinSheet
+};
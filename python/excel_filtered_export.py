@@ -0,0 +1,604 @@
+#!/usr/bin/env python3
+"""
+Excel Filtered Export - nur markierte bzw. gefilterte Zeilen exportieren
+
+Der Export "nur gefilterte Zeilen" lief bisher über den kompletten Writer mit
+rowMapping (openpyxl-Umordnung oder ZIP-ANSATZ mit vollem lxml-Baum). Dabei
+ändert sich am Sheet nur, welche Zeilen übrig bleiben - das geht auch direkt
+auf dem Sheet-XML:
+
+- <row>-Elemente in einem Durchlauf: Kopfzeile(n) unverändert, Treffer mit
+  fortlaufender Zeilennummer (r an <row> und <c>), alles andere entfällt
+- Treffer: explizite Zeilen (Datenzeilen-Indizes wie rowMapping im Renderer)
+  oder Prädikat auf der Flag-Spalte (bestimmte Werte bzw. nicht leer)
+- Shared Strings werden dabei neu nummeriert, sharedStrings.xml enthält
+  danach nur noch die verwendeten Einträge (auch die der anderen Sheets)
+- dimension, autoFilter, verbundene Zellen, bedingte Formatierung,
+  Datenüberprüfungen, Hyperlinks (auch x14) sowie Tabellen-ref und
+  _xlnm._FilterDatabase werden auf die neuen Zeilennummern umgerechnet;
+  Bereiche ohne verbliebene Zeile und nicht mehr vollständige verbundene
+  Zellen entfallen
+
+Formeln bleiben unverändert stehen (wie beim bisherigen Umordnen), nur
+gemeinsame Formeln (t="shared") werden zu ihrem zwischengespeicherten Wert -
+ihre Master-Zelle kann weggefallen sein. calcChain.xml wird entfernt (Excel
+baut sie beim Öffnen neu auf). Kommentare und Zeichnungen bleiben an ihrer
+Position.
+
+Alle anderen Members werden roh übernommen (excel_sheet_ops._Package),
+die Quelldatei bleibt unverändert.
+
+Nur Standardbibliothek (das eingebettete Windows-Python hat kein lxml).
+
+Aufruf (Konfiguration als JSON über stdin):
+    {"sourcePath": "...", "outputPath": "...", "sheetName": "...", "headerRow": 1,
+     "rows": [0, 4, 7]}                                   # explizite Datenzeilen (0-basiert)
+    {"sourcePath": "...", "outputPath": "...", "sheetName": "...",
+     "flagColumn": 1, "flagValues": ["x", "Ja"]}           # Prädikat (ohne flagValues: nicht leer)
+"""
+
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from bisect import bisect_left, bisect_right
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from xml.sax.saxutils import unescape
+
+from excel_row_append import (_REF_RE, _ROW_NUMBER_RE, _SI_RE, _SQREF_ELEMENT_RE, _TEXT_RE, _SheetScan,
+                              _column_letter, _column_number)
+from excel_sheet_ops import SheetOpError, _Package, _Workbook, _attrs, _decode, _encode, _set_attr
+from excel_zip_writer import rewrite_archive
+
+_CELL_REF_RE = re.compile(rb'(<(?:\w+:)?c\b[^>]*?\sr="[A-Z]{1,3})\d+"')
+_SHARED_CELL_RE = re.compile(rb'(<(?:\w+:)?c\b[^>]*?\st="s"[^>]*>\s*<(?:\w+:)?v>)(\d+)(?=<)')
+_FORMULA_RE = re.compile(rb'<((?:\w+:)?)f\b([^>]*?)(?:/>|>.*?</\1f>)', re.S)
+_PHONETIC_RE = re.compile(rb'<(?:\w+:)?rPh\b.*?</(?:\w+:)?rPh>', re.S)
+_SST_TAG_RE = re.compile(rb'<((?:\w+:)?)sst\b[^>]*>')
+_INLINE_TEXT_RE = re.compile(rb'<(?:\w+:)?is>(.*?)</(?:\w+:)?is>', re.S)
+_VALUE_RE = re.compile(rb'<(?:\w+:)?v>(.*?)</(?:\w+:)?v>', re.S)
+_XML_ENTITIES = {'&quot;': '"', '&apos;': "'"}
+# Letzte Zeile eines Sheets - Bereiche bis hierhin (z.B. A2:A1048576) bleiben offen
+MAX_ROW = 1048576
+
+# Elemente nach <sheetData>, deren Bereich umgerechnet wird: (Name, Attribut)
+_RANGE_ELEMENTS = (('mergeCell', 'ref'), ('conditionalFormatting', 'sqref'), ('dataValidation', 'sqref'),
+                   ('hyperlink', 'ref'), ('protectedRange', 'sqref'), ('ignoredError', 'sqref'))
+# Sammel-Elemente, die ohne Kinder entfernt werden bzw. ein count-Attribut haben
+_WRAPPERS = (('mergeCells', 'mergeCell'), ('dataValidations', 'dataValidation'), ('hyperlinks', 'hyperlink'),
+             ('conditionalFormattings', 'conditionalFormatting'), ('protectedRanges', 'protectedRange'),
+             ('ignoredErrors', 'ignoredError'))
+
+
+# =============================================================================
+# Zeilen-Zuordnung
+# =============================================================================
+
+class _RowMap:
+    """
+    Alte -> neue Zeilennummer. Zeilen bis headerRow bleiben, Datenzeilen werden
+    aufsteigend hinzugefügt; Zeilen hinter der letzten Datenzeile rücken nach.
+    """
+
+    def __init__(self, header_row: int):
+        self.header_row = header_row
+        self.old: List[int] = []
+        self.new: List[int] = []
+        self._index: Dict[int, int] = {}
+        self.last_old = header_row
+
+    def add(self, old: int) -> int:
+        number = (self.new[-1] if self.new else self.header_row) + 1
+        self._index[old] = number
+        self.old.append(old)
+        self.new.append(number)
+        return number
+
+    def finish(self, last_row: int):
+        self.last_old = max(last_row, self.old[-1] if self.old else self.header_row, self.header_row)
+
+    @property
+    def last_new(self) -> int:
+        return self.new[-1] if self.new else self.header_row
+
+    def _shift(self, row: int) -> int:
+        return row - (self.last_old - self.last_new)
+
+    def kept(self, old: int) -> bool:
+        return old in self._index
+
+    def row(self, old: int) -> Optional[int]:
+        if old in self._index:
+            return self._index[old]
+        if old <= self.header_row:
+            return old
+        if old > self.last_old:
+            return self._shift(old)
+        return None
+
+    def first_at_or_after(self, row: int) -> int:
+        if row <= self.header_row:
+            return row
+        if row > self.last_old:
+            return self._shift(row)
+        index = bisect_left(self.old, row)
+        return self.new[index] if index < len(self.new) else self._shift(self.last_old + 1)
+
+    def last_at_or_before(self, row: int) -> int:
+        if row >= MAX_ROW:
+            return row
+        if row > self.last_old:
+            return self._shift(row)
+        if row <= self.header_row:
+            return row
+        index = bisect_right(self.old, row) - 1
+        return self.new[index] if index >= 0 else self.header_row
+
+    def span(self, first: int, last: int) -> Optional[Tuple[int, int]]:
+        """Neuer Zeilenbereich oder None (keine Zeile übrig)"""
+        start, end = self.first_at_or_after(first), self.last_at_or_before(last)
+        return (start, end) if start <= end else None
+
+    def intact(self, first: int, last: int) -> bool:
+        """Alle Zeilen first..last übrig (und damit weiterhin zusammenhängend)?"""
+        start, end = self.row(first), self.row(last)
+        return start is not None and end is not None and end - start == last - first
+
+    def ref(self, ref: str, whole: bool = False) -> Optional[str]:
+        """
+        Bereich A1 bzw. A1:B2 umrechnen (None = entfällt). whole: nur behalten,
+        wenn alle Zeilen übrig sind (verbundene Zellen).
+        """
+        match = _REF_RE.match(ref)
+        if not match:
+            return ref  # ganze Spalten/Zeilen o.ä. bleiben unverändert
+        start_col, first = match.group(1), int(match.group(2))
+        end_col, last = match.group(3), int(match.group(4) or first)
+        if whole:
+            if not self.intact(first, last):
+                return None
+            span = (self.row(first), self.row(last))
+        else:
+            span = self.span(first, last)
+            if span is None:
+                return None
+        if not end_col:
+            return f'{start_col}{span[0]}'
+        return f'{start_col}{span[0]}:{end_col}{span[1]}'
+
+    def sqref(self, sqref: str) -> str:
+        return ' '.join(ref for ref in (self.ref(part) for part in sqref.split()) if ref)
+
+
+# =============================================================================
+# Shared Strings
+# =============================================================================
+
+class _SharedStrings:
+    """sharedStrings.xml - Einträge in Reihenfolge der ersten Verwendung neu nummeriert"""
+
+    def __init__(self, data: Optional[bytes]):
+        self.data = data
+        self.items = [(m.start(), m.end()) for m in _SI_RE.finditer(data)] if data else []
+        self.mapping: Dict[int, int] = {}
+        self.order: List[int] = []
+        self.references = 0
+        self._texts: Dict[int, str] = {}
+
+    def remap(self, match) -> bytes:
+        self.references += 1
+        old = int(match.group(2))
+        new = self.mapping.get(old)
+        if new is None:
+            new = self.mapping[old] = len(self.order)
+            self.order.append(old)
+        return match.group(1) + b'%d' % new
+
+    def text(self, index: int) -> str:
+        if index not in self._texts:
+            if 0 <= index < len(self.items):
+                start, end = self.items[index]
+                item = _PHONETIC_RE.sub(b'', self.data[start:end])
+                self._texts[index] = _xml_text(b''.join(_TEXT_RE.findall(item)))
+            else:
+                self._texts[index] = ''
+        return self._texts[index]
+
+    def build(self) -> bytes:
+        tag = _SST_TAG_RE.search(self.data)
+        if not tag:
+            raise ValueError('sharedStrings.xml ohne <sst>')
+        open_tag = _decode(tag.group(0))
+        for name, value in (('count', self.references), ('uniqueCount', len(self.order))):
+            open_tag = _set_attr(open_tag, name, str(value))
+        tail = self.data[self.items[-1][1]:] if self.items else self.data[tag.end():]
+        if not self.items and open_tag.endswith('/>'):
+            return self.data[:tag.start()] + _encode(open_tag)
+        body = b''.join(self.data[self.items[old][0]:self.items[old][1]]
+                        for old in self.order if old < len(self.items))
+        return self.data[:tag.start()] + _encode(open_tag) + body + tail
+
+
+def _xml_text(raw: bytes) -> str:
+    return unescape(_decode(raw), _XML_ENTITIES)
+
+
+# =============================================================================
+# Zeilen
+# =============================================================================
+
+def _flag_predicate(scan_prefix: bytes, column: int, values: Optional[List[str]],
+                    shared: _SharedStrings) -> Callable[[bytes], bool]:
+    """Prädikat auf den Zeileninhalt: Flag-Zelle hat einen der Werte (ohne values: nicht leer)"""
+    cell_re = re.compile(rb'<' + re.escape(scan_prefix) + rb'c\b([^>]*?\sr="' + _column_letter(column).encode() +
+                         rb'\d+"[^>]*?)(?:/>|>(.*?)</' + re.escape(scan_prefix) + rb'c>)', re.S)
+    wanted = {str(value).strip() for value in values} if values else None
+
+    def matches(content: bytes) -> bool:
+        cell = cell_re.search(content)
+        if not cell or not cell.group(2):
+            return False
+        attrs, inner = cell.group(1), cell.group(2)
+        if b't="s"' in attrs:
+            value = _VALUE_RE.search(inner)
+            text = shared.text(int(value.group(1))) if value else ''
+        elif b't="inlineStr"' in attrs:
+            inline = _INLINE_TEXT_RE.search(inner)
+            text = _xml_text(b''.join(_TEXT_RE.findall(_PHONETIC_RE.sub(b'', inline.group(1))))) if inline else ''
+        else:
+            value = _VALUE_RE.search(inner)
+            text = _xml_text(value.group(1)) if value else ''
+        text = text.strip()
+        return text in wanted if wanted is not None else text != ''
+    return matches
+
+
+def _renumber_row(row: bytes, content_start: int, content_end: int, new_number: int,
+                  shared: _SharedStrings) -> bytes:
+    """<row> mit neuer Nummer; Zell-Referenzen, Shared-String-Indizes und Formeln anpassen"""
+    open_tag = _ROW_NUMBER_RE.sub(b'r="%d"' % new_number, row[:content_start], count=1)
+    content = row[content_start:content_end]
+    content = _CELL_REF_RE.sub(lambda m: m.group(1) + b'%d"' % new_number, content)
+    if shared.data is not None and b't="s"' in content:
+        content = _SHARED_CELL_RE.sub(shared.remap, content)
+    if b'<f' in content or b':f' in content:
+        content = _FORMULA_RE.sub(lambda m: _fix_formula(m, new_number), content)
+    return open_tag + content + row[content_end:]
+
+
+def _fix_formula(match, new_number: int) -> bytes:
+    attrs = _attrs(_decode(match.group(2)))
+    if attrs.get('t') == 'shared':
+        return b''  # zwischengespeicherter Wert (<v>) bleibt stehen
+    if attrs.get('t') == 'array' and attrs.get('ref'):
+        ref = _REF_RE.match(attrs['ref'])
+        if not ref or (ref.group(4) and ref.group(4) != ref.group(2)):
+            return b''  # Matrixformel über mehrere Zeilen
+        new_ref = f'{ref.group(1)}{new_number}' + (f':{ref.group(3)}{new_number}' if ref.group(3) else '')
+        return re.sub(rb'\bref="[^"]*"', b'ref="%s"' % new_ref.encode(), match.group(0), count=1)
+    return match.group(0)
+
+
+# =============================================================================
+# Bereiche nach <sheetData>
+# =============================================================================
+
+def _remap_elements(xml: str, row_map: _RowMap) -> Tuple[str, int, int]:
+    """Bereiche umrechnen, leer gewordene Elemente entfernen -> (xml, geändert, entfernt)"""
+    changed = removed = 0
+
+    def fix(match, attr: str, whole: bool):
+        nonlocal changed, removed
+        tag = match.group(0)
+        value = _attrs(match.group(3)).get(attr)
+        if value is not None:
+            new_value = row_map.ref(value, whole=True) if whole else row_map.sqref(value)
+            if not new_value:
+                removed += 1
+                return ''
+            if new_value != value:
+                changed += 1
+                head = f'<{match.group(1)}{match.group(2)}' + match.group(3)
+                tag = _set_attr(head, attr, new_value) + tag[len(head):]
+            return tag
+        # x14: Bereich als <xm:sqref>-Element
+        element = _SQREF_ELEMENT_RE.search(tag)
+        if not element:
+            return tag
+        new_value = row_map.sqref(element.group(2))
+        if not new_value:
+            removed += 1
+            return ''
+        if new_value != element.group(2):
+            changed += 1
+            tag = (tag[:element.start()] + f'<{element.group(1)}sqref>{new_value}</{element.group(1)}sqref>' +
+                   tag[element.end():])
+        return tag
+
+    for name, attr in _RANGE_ELEMENTS:
+        pattern = re.compile(r'<((?:\w+:)?)(%s)\b([^>]*?)(?:/>|>.*?</\1\2>)' % name, re.S)
+        xml = pattern.sub(lambda m, a=attr, w=(name == 'mergeCell'): fix(m, a, w), xml)
+
+    for wrapper, child in _WRAPPERS:
+        xml = _fix_wrapper(xml, wrapper, child)
+
+    xml = re.sub(r'<(?:\w+:)?autoFilter\b[^>]*>',
+                 lambda m: _set_attr(m.group(0), 'ref', row_map.sqref(_attrs(m.group(0))['ref']) or
+                                     _attrs(m.group(0))['ref'])
+                 if _attrs(m.group(0)).get('ref') else m.group(0), xml, count=1)
+    return xml, changed, removed
+
+
+def _fix_wrapper(xml: str, wrapper: str, child: str) -> str:
+    """Sammel-Element ohne Kinder entfernen, count anpassen"""
+    pattern = re.compile(r'<((?:\w+:)?)%s\b([^>]*?)(?:/>|>(.*?)</\1%s>)' % (wrapper, wrapper), re.S)
+    child_re = re.compile(r'<(?:\w+:)?%s\b' % child)
+
+    def fix(match):
+        count = len(child_re.findall(match.group(3) or ''))
+        if count == 0:
+            return ''
+        element = match.group(0)
+        head_end = element.index('>') + 1
+        head = element[:head_end]
+        if 'count' in _attrs(match.group(2)):
+            head = _set_attr(head, 'count', str(count))
+        return head + element[head_end:]
+    return pattern.sub(fix, xml)
+
+
+def _remap_tables(package: _Package, sheet_part: str, row_map: _RowMap) -> int:
+    """Tabellen-ref und ihren autoFilter umrechnen (mindestens eine Datenzeile bleibt)"""
+    updated = 0
+    for part, attrs, tag, text in _tables(package, sheet_part):
+        ref = attrs.get('ref', '')
+        match = _REF_RE.match(ref)
+        if not match or not match.group(3):
+            continue
+        span = row_map.span(int(match.group(2)), int(match.group(4)))
+        if span is None:
+            continue
+        start, end = span
+        minimum = start + (1 if attrs.get('headerRowCount', '1') != '0' else 0)
+        new_ref = f'{match.group(1)}{start}:{match.group(3)}{max(end, minimum)}'
+        if new_ref == ref:
+            continue
+        text = text[:tag.start()] + _set_attr(tag.group(0), 'ref', new_ref) + text[tag.end():]
+        text = re.sub(r'<(?:\w+:)?autoFilter\b[^>]*>',
+                      lambda m: _set_attr(m.group(0), 'ref', row_map.sqref(_attrs(m.group(0))['ref']) or new_ref)
+                      if _attrs(m.group(0)).get('ref') else m.group(0), text, count=1)
+        package.write_text(part, text)
+        updated += 1
+    return updated
+
+
+def _tables(package: _Package, sheet_part: str):
+    for rel in package.relationships(sheet_part):
+        if not rel.get('Type', '').endswith('/table') or 'part' not in rel:
+            continue
+        text = package.read_text(rel['part'])
+        tag = re.search(r'<(?:\w+:)?table\b[^>]*>', text or '')
+        if tag:
+            yield rel['part'], _attrs(tag.group(0)), tag, text
+
+
+def _fixed_table_rows(package: _Package, sheet_part: str, header_row: int) -> Set[int]:
+    """Kopf- und Ergebniszeilen von Tabellen im Datenbereich bleiben immer erhalten"""
+    rows = set()
+    for _, attrs, _, _ in _tables(package, sheet_part):
+        match = _REF_RE.match(attrs.get('ref', ''))
+        if not match or not match.group(3):
+            continue
+        first, last = int(match.group(2)), int(match.group(4))
+        if attrs.get('headerRowCount', '1') != '0' and first > header_row:
+            rows.add(first)
+        totals = int(attrs.get('totalsRowCount', '0') or 0)
+        rows.update(range(last - totals + 1, last + 1))
+    return rows
+
+
+def _remap_filter_database(workbook: _Workbook, index: int, row_map: _RowMap) -> bool:
+    """_xlnm._FilterDatabase des Sheets an den neuen autoFilter-Bereich anpassen"""
+    pattern = re.compile(r'(<(?:\w+:)?definedName\b([^>]*)>)([^<]*)(</(?:\w+:)?definedName>)')
+    changed = False
+
+    def fix(match):
+        nonlocal changed
+        attrs = _attrs(match.group(2))
+        if attrs.get('name') != '_xlnm._FilterDatabase' or attrs.get('localSheetId') != str(index):
+            return match.group(0)
+        formula = match.group(3)
+        sheet, _, ref = formula.rpartition('!')
+        ref_match = re.match(r'^(\$?[A-Z]{1,3}\$?)(\d+)(?::(\$?[A-Z]{1,3}\$?)(\d+))?$', ref)
+        if not ref_match or not ref_match.group(3):
+            return match.group(0)
+        span = row_map.span(int(ref_match.group(2)), int(ref_match.group(4)))
+        if span is None:
+            return match.group(0)
+        new_ref = f'{ref_match.group(1)}{span[0]}:{ref_match.group(3)}{span[1]}'
+        changed = changed or new_ref != ref
+        return match.group(1) + (f'{sheet}!' if sheet else '') + new_ref + match.group(4)
+
+    text = pattern.sub(fix, workbook.text)
+    if changed:
+        workbook.text = text
+        workbook.package.write_text(workbook.part, text)
+    return changed
+
+
+# =============================================================================
+# Export
+# =============================================================================
+
+def _export(source_path: str, output_path: str, operation: Callable[[_Package, _Workbook], Dict],
+            compression=None) -> Dict:
+    """Wie excel_sheet_ops._run, schreibt aber in eine neue Datei (Quelle bleibt unverändert)"""
+    start = time.time()
+    if not os.path.isfile(source_path):
+        return {'success': False, 'error': f'Datei nicht gefunden: {source_path}'}
+    package = None
+    temp_path = None
+    try:
+        package = _Package(source_path)
+        workbook = _Workbook(package)
+        result = operation(package, workbook)
+        directory = os.path.dirname(os.path.abspath(output_path))
+        fd, temp_path = tempfile.mkstemp(suffix='.xlsx', prefix='.filtered-', dir=directory)
+        os.close(fd)
+        stats = rewrite_archive(source_path, temp_path, package.changes, list(package.added.items()),
+                                compression=compression)
+        package.close()
+        os.replace(temp_path, output_path)
+        temp_path = None
+        result.update({'success': True, 'copiedMembers': stats['copied'], 'writtenMembers': stats['written'],
+                       'durationMs': int((time.time() - start) * 1000)})
+        sys.stderr.write(f"[FilteredExport] {result['keptRows']} von {result['sourceRows']} Zeilen, "
+                         f"{result['sharedStrings']} Shared Strings, {stats['written']} Teile geschrieben, "
+                         f"{stats['copied']} roh übernommen in {result['durationMs']}ms\n")
+        return result
+    except SheetOpError as e:
+        return {'success': False, 'error': str(e)}
+    except Exception as e:
+        # Paket nicht wie erwartet aufgebaut - Aufrufer weicht auf den Writer aus
+        return {'success': False, 'error': f'Gefilterter Export fehlgeschlagen: {e}', 'packageError': True}
+    finally:
+        if package is not None:
+            package.close()
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def export_filtered_rows(source_path: str, output_path: str, sheet_name: str, rows: Optional[List[int]] = None,
+                         flag_column=None, flag_values: Optional[List[str]] = None, header_row: int = 1,
+                         compression=None) -> Dict:
+    """
+    Sheet auf Kopfzeile(n) + ausgewählte Zeilen reduziert nach output_path exportieren.
+
+    Args:
+        rows: Datenzeilen (0-basiert, Zeile headerRow + 1 + i) in Datei-Reihenfolge;
+              Lücken (Zeilen ohne <row>) bleiben als leere Zeilen erhalten
+        flag_column: statt rows - Flag-Spalte (1-basiert oder Buchstabe)
+        flag_values: Werte, die eine Zeile markieren (ohne Angabe: Zelle nicht leer)
+        header_row: letzte Kopfzeile - sie und alle Zeilen darüber bleiben unverändert
+    """
+    if rows is None and flag_column is None:
+        return {'success': False, 'error': 'Weder Zeilen noch Flag-Spalte angegeben'}
+    if rows is not None and any(b <= a for a, b in zip(rows, rows[1:])):
+        return {'success': False, 'error': 'Zeilen müssen aufsteigend sortiert sein (Datei-Reihenfolge)'}
+
+    def operation(package: _Package, workbook: _Workbook):
+        index = next((i for i, name in enumerate(workbook.names) if name == sheet_name), None)
+        if index is None:
+            raise SheetOpError(f'Sheet "{sheet_name}" nicht gefunden')
+        sheet_part = workbook.sheet_part(index)
+        related = {rel.get('Type', '').rsplit('/', 1)[-1]: (rel_id, rel.get('part'))
+                   for rel_id, rel in workbook.rels.items()}
+        shared_part = related.get('sharedStrings', (None, None))[1]
+        shared = _SharedStrings(package.read(shared_part) if shared_part else None)
+
+        data = package.read(sheet_part)
+        scan = _SheetScan(data, lambda: None)
+        fixed_rows = _fixed_table_rows(package, sheet_part, header_row)
+        row_map = _RowMap(header_row)
+
+        if rows is not None:
+            selected = sorted(fixed_rows | {header_row + 1 + int(i) for i in rows})
+            for old in selected:
+                row_map.add(old)
+
+            def keep(number, content):
+                return row_map.kept(number)
+        else:
+            column = flag_column if isinstance(flag_column, int) else (
+                int(flag_column) if str(flag_column).isdigit() else _column_number(str(flag_column).upper()))
+            predicate = _flag_predicate(scan.prefix, column, flag_values, shared)
+
+            def keep(number, content):
+                if number in fixed_rows or predicate(content):
+                    row_map.add(number)
+                    return True
+                return False
+
+        parts = []
+        source_rows = last_row = 0
+        for number, start, content_start, content_end, end in scan.rows(scan.start):
+            last_row = number
+            if number <= header_row:
+                row = data[start:end]
+                if shared.data is not None and b't="s"' in row:
+                    row = _SHARED_CELL_RE.sub(shared.remap, row)
+                parts.append(row)
+                continue
+            source_rows += 1
+            if not keep(number, data[content_start:content_end]):
+                continue
+            parts.append(_renumber_row(data[start:end], content_start - start, content_end - start,
+                                       row_map.row(number), shared))
+        row_map.finish(last_row)
+
+        head = _decode(data[:scan.tag.start()])
+        head = re.sub(r'<(?:\w+:)?dimension\b[^>]*>',
+                      lambda m: _set_attr(m.group(0), 'ref', row_map.ref(_attrs(m.group(0)).get('ref', 'A1')) or 'A1'),
+                      head, count=1)
+        prefix = scan.prefix
+        if scan.empty:
+            sheet_data = data[scan.tag.start():scan.tag.end()]
+            tail_start = scan.tag.end()
+        else:
+            sheet_data = (data[scan.tag.start():scan.start] + b''.join(parts) +
+                          b'</' + prefix + b'sheetData>')
+            tail_start = scan.end + len(b'</' + prefix + b'sheetData>')
+        tail, changed_ranges, removed_ranges = _remap_elements(_decode(data[tail_start:]), row_map)
+        package.write(sheet_part, _encode(head) + sheet_data + _encode(tail))
+
+        tables = _remap_tables(package, sheet_part, row_map)
+        _remap_filter_database(workbook, index, row_map)
+
+        # Shared Strings der übrigen Sheets auf die neue Nummerierung umstellen
+        if shared.data is not None:
+            for rel_id, rel in workbook.rels.items():
+                part = rel.get('part')
+                if part == sheet_part or not rel.get('Type', '').endswith('/worksheet') or not part:
+                    continue
+                other = package.read(part)
+                if other and b't="s"' in other:
+                    package.write(part, _SHARED_CELL_RE.sub(shared.remap, other))
+            package.write(shared_part, shared.build())
+
+        # Berechnungskette verweist auf alte Zellen - Excel baut sie neu auf
+        calc_rel, calc_part = related.get('calcChain', (None, None))
+        if calc_part and package.exists(calc_part):
+            package.remove_part(calc_part)
+            workbook.remove_rel(calc_rel)
+
+        return {'method': 'filtered-xml', 'sheetName': sheet_name, 'sourceRows': source_rows, 'keptRows': len(row_map.old),
+                'lastRow': row_map.last_new, 'sharedStrings': len(shared.order) if shared.data else 0,
+                'removedSharedStrings': len(shared.items) - len(shared.order) if shared.data else 0,
+                'updatedRanges': changed_ranges, 'removedRanges': removed_ranges, 'updatedTables': tables}
+    return _export(source_path, output_path, operation, compression)
+
+
+def main():
+    """Hauptfunktion - Konfiguration als JSON über stdin, Ergebnis als JSON"""
+    import io
+    if sys.platform == 'win32':
+        sys.stdin = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    try:
+        config = json.loads(sys.stdin.read())
+        rows = config.get('rows')
+        result = export_filtered_rows(config['sourcePath'], config['outputPath'], config['sheetName'],
+                                      rows=[int(i) for i in rows] if rows is not None else None,
+                                      flag_column=config.get('flagColumn'), flag_values=config.get('flagValues'),
+                                      header_row=int(config.get('headerRow') or 1),
+                                      compression=config.get('compression'))
+    except (KeyError, ValueError) as e:
+        result = {'success': False, 'error': f'Ungültige Konfiguration: {e}'}
+    print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,426 @@
+/**
+ * Persistenter Schlüssel-Index für die Duplikatprüfung beim Übertragen
+ *
+ * Bisher wurde jeder Prüfwert der Warteschlange einzeln gegen die komplett
+ * geladenen Zieldaten verglichen (O(Zeilen x Spalten) pro Wert) - und nach
+ * jedem Neustart bzw. Neuladen der Zieldatei begann alles von vorn.
+ *
+ * Der Index hält pro (Zieldatei, Sheet, Schlüsselspalten) eine sortierte
+ * Liste von 53-bit Schlüssel-Hashes (Float64Array) plus die jeweils erste
+ * Excel-Zeile (Uint32Array). Er liegt als Binärdatei neben dem Netzwerk-Cache
+ * und wird über den Datei-Fingerprint (Größe + mtime) validiert.
+ *
+ * - build(): einmaliger Aufbau aus den gelesenen Sheet-Daten
+ * - add(): angehängte Zeilen inkrementell nachtragen (ohne Neuaufbau)
+ * - lookupMany(): alle Prüfwerte einer Warteschlange in einem Aufruf
+ *
+ * Die Normalisierung entspricht checkForDuplicate() im Renderer
+ * (String, Kleinbuchstaben, getrimmt). Bei einer Hash-Kollision meldet der
+ * Index einen Kandidaten - der Renderer bestätigt Treffer gegen die Zeile.
+ */
+
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const crypto = require('crypto');
+
+// Standard-Verzeichnis (neben dem Netzwerk-Cache)
+const DEFAULT_INDEX_DIR = path.join(os.tmpdir(), 'excel-data-sync-pro', 'key-index');
+// Maximale Anzahl Index-Dateien auf der Platte (älteste werden verworfen)
+const DEFAULT_MAX_ENTRIES = 16;
+// Anzahl Indizes im Speicher
+const DEFAULT_MAX_MEMORY_ENTRIES = 4;
+// Dateikennung + Version
+const MAGIC = Buffer.from('EDSKIDX1');
+// 2^21 - Multiplikator für den oberen Hash-Teil (32 + 21 = 53 bit)
+const HIGH_FACTOR = 0x200000;
+
+/**
+ * Normalisiert einen Zellwert wie checkForDuplicate() im Renderer
+ * @param {*} value - Zellwert
+ * @returns {string} Leerer String = kein Schlüssel
+ */
+function normalizeKey(value) {
+    if (!value) return '';
+    return String(value).toLowerCase().trim();
+}
+
+/**
+ * 53-bit Hash eines normalisierten Schlüssels (exakt als Double darstellbar)
+ * Zwei unabhängige 32-bit Hashes (FNV-1a und ein Murmur-artiger Mix).
+ * @param {string} key - Normalisierter Schlüssel
+ * @returns {number}
+ */
+function hashKey(key) {
+    let h1 = 0x811c9dc5;
+    let h2 = 0x9747b28c ^ key.length;
+    for (let i = 0; i < key.length; i++) {
+        const c = key.charCodeAt(i);
+        h1 = Math.imul(h1 ^ c, 0x01000193);
+        h2 = Math.imul(h2 ^ c, 0x5bd1e995);
+        h2 ^= h2 >>> 15;
+    }
+    h2 = Math.imul(h2 ^ (h2 >>> 13), 0xc2b2ae35);
+    h2 ^= h2 >>> 16;
+    return (h1 >>> 0) * HIGH_FACTOR + ((h2 >>> 0) & (HIGH_FACTOR - 1));
+}
+
+/**
+ * Binäre Suche in einem sortierten Float64Array
+ * @returns {number} Index oder -1
+ */
+function searchSorted(keys, hash) {
+    let lo = 0;
+    let hi = keys.length - 1;
+    while (lo <= hi) {
+        const mid = (lo + hi) >>> 1;
+        const value = keys[mid];
+        if (value < hash) lo = mid + 1;
+        else if (value > hash) hi = mid - 1;
+        else return mid;
+    }
+    return -1;
+}
+
+/**
+ * Beschreibung der Schlüsselspalten als String (Teil des Index-Keys)
+ * @param {Object} columns
+ * @param {number} [columns.keyColumn] - Einzelne Schlüsselspalte (1-basiert)
+ * @param {number} [columns.startColumn] - Alle Spalten ab dieser (1-basiert)
+ */
+function columnSpec(columns = {}) {
+    if (columns.keyColumn) return `col:${columns.keyColumn}`;
+    return `from:${columns.startColumn || 1}`;
+}
+
+class KeyIndex {
+    /**
+     * @param {Object} options
+     * @param {Float64Array} options.keys - Sortierte Schlüssel-Hashes
+     * @param {Uint32Array} options.rows - Excel-Zeile je Hash (erstes Vorkommen)
+     * @param {string} options.columns - Spaltenbeschreibung (siehe columnSpec)
+     * @param {string|null} options.fingerprint - Fingerprint der Zieldatei
+     */
+    constructor({ keys, rows, columns, fingerprint }) {
+        this.keys = keys;
+        this.rows = rows;
+        this.columns = columns;
+        this.fingerprint = fingerprint;
+        this.pending = new Map(); // Nachgetragene Hashes -> Zeile (noch nicht einsortiert)
+    }
+
+    /**
+     * Baut den Index aus Sheet-Daten (ohne Header-Zeile, wie state.file2.data)
+     * @param {Array<Array>} data - Datenzeilen; data[0] ist Excel-Zeile 2
+     * @param {Object} columns - { keyColumn } oder { startColumn }
+     * @param {string|null} fingerprint
+     * @returns {KeyIndex}
+     */
+    static build(data, columns, fingerprint = null) {
+        const first = new Map();
+        const from = (columns.keyColumn || columns.startColumn || 1) - 1;
+        for (let i = 0; i < data.length; i++) {
+            const row = data[i];
+            if (!row) continue;
+            const to = columns.keyColumn ? Math.min(from + 1, row.length) : row.length;
+            for (let j = from; j < to; j++) {
+                const key = normalizeKey(row[j]);
+                if (!key) continue;
+                const hash = hashKey(key);
+                if (!first.has(hash)) first.set(hash, i + 2);
+            }
+        }
+        const keys = Float64Array.from(first.keys()).sort();
+        const rows = new Uint32Array(keys.length);
+        for (let i = 0; i < keys.length; i++) rows[i] = first.get(keys[i]);
+        return new KeyIndex({ keys, rows, columns: columnSpec(columns), fingerprint });
+    }
+
+    get size() {
+        return this.keys.length + this.pending.size;
+    }
+
+    /**
+     * Erste Excel-Zeile, in der der Wert vorkommt
+     * @param {*} value - Prüfwert (wird normalisiert)
+     * @returns {number|null}
+     */
+    lookup(value) {
+        const key = normalizeKey(value);
+        if (!key) return null;
+        const hash = hashKey(key);
+        const index = searchSorted(this.keys, hash);
+        if (index >= 0) return this.rows[index];
+        const row = this.pending.get(hash);
+        return row === undefined ? null : row;
+    }
+
+    /**
+     * Batch-Abfrage für eine ganze Warteschlange
+     * @param {Array} values - Prüfwerte
+     * @returns {Array<number|null>} Zeile oder null je Wert
+     */
+    lookupMany(values) {
+        return values.map(value => this.lookup(value));
+    }
+
+    /**
+     * Trägt angehängte Zeilen nach (bestehende Einträge behalten ihre kleinere Zeile)
+     * @param {Array<[*, number]>} entries - [Wert, Excel-Zeile]
+     * @returns {number} Anzahl neuer Schlüssel
+     */
+    add(entries) {
+        let added = 0;
+        for (const [value, row] of entries) {
+            const key = normalizeKey(value);
+            if (!key) continue;
+            const hash = hashKey(key);
+            if (searchSorted(this.keys, hash) >= 0 || this.pending.has(hash)) continue;
+            this.pending.set(hash, row);
+            added++;
+        }
+        return added;
+    }
+
+    /**
+     * Sortiert nachgetragene Schlüssel ein (Merge zweier sortierter Listen)
+     */
+    compact() {
+        if (this.pending.size === 0) return;
+        const extra = Float64Array.from(this.pending.keys()).sort();
+        const keys = new Float64Array(this.keys.length + extra.length);
+        const rows = new Uint32Array(keys.length);
+        let a = 0;
+        let b = 0;
+        for (let i = 0; i < keys.length; i++) {
+            if (b >= extra.length || (a < this.keys.length && this.keys[a] < extra[b])) {
+                keys[i] = this.keys[a];
+                rows[i] = this.rows[a++];
+            } else {
+                keys[i] = extra[b];
+                rows[i] = this.pending.get(extra[b++]);
+            }
+        }
+        this.keys = keys;
+        this.rows = rows;
+        this.pending.clear();
+    }
+
+    /**
+     * Binärformat: MAGIC | uint32 Header-Länge | JSON-Header | Padding auf 8 | Hashes | Zeilen
+     * @returns {Buffer}
+     */
+    serialize() {
+        this.compact();
+        const header = Buffer.from(JSON.stringify({
+            count: this.keys.length,
+            columns: this.columns,
+            fingerprint: this.fingerprint
+        }));
+        const offset = Math.ceil((MAGIC.length + 4 + header.length) / 8) * 8;
+        const buffer = Buffer.alloc(offset + this.keys.length * 12);
+        MAGIC.copy(buffer, 0);
+        buffer.writeUInt32LE(header.length, MAGIC.length);
+        header.copy(buffer, MAGIC.length + 4);
+        Buffer.from(this.keys.buffer, this.keys.byteOffset, this.keys.byteLength).copy(buffer, offset);
+        Buffer.from(this.rows.buffer, this.rows.byteOffset, this.rows.byteLength)
+            .copy(buffer, offset + this.keys.byteLength);
+        return buffer;
+    }
+
+    /**
+     * Liest einen serialisierten Index
+     * @param {Buffer} buffer
+     * @returns {KeyIndex|null} null bei ungültigem Format
+     */
+    static deserialize(buffer) {
+        if (buffer.length < MAGIC.length + 4 || !buffer.subarray(0, MAGIC.length).equals(MAGIC)) return null;
+        const headerLength = buffer.readUInt32LE(MAGIC.length);
+        let header;
+        try {
+            header = JSON.parse(buffer.toString('utf8', MAGIC.length + 4, MAGIC.length + 4 + headerLength));
+        } catch (e) {
+            return null;
+        }
+        const offset = Math.ceil((MAGIC.length + 4 + headerLength) / 8) * 8;
+        if (buffer.length < offset + header.count * 12) return null;
+        // Kopie auf eigenen ArrayBuffer (Buffer-Pool ist nicht 8-Byte-ausgerichtet)
+        const body = new Uint8Array(buffer.subarray(offset, offset + header.count * 12)).buffer;
+        return new KeyIndex({
+            keys: new Float64Array(body, 0, header.count),
+            rows: new Uint32Array(body, header.count * 8, header.count),
+            columns: header.columns,
+            fingerprint: header.fingerprint
+        });
+    }
+}
+
+function fileFingerprint(filePath) {
+    try {
+        const stat = fs.statSync(filePath);
+        return `${stat.size}:${stat.mtimeMs}`;
+    } catch (e) {
+        return null;
+    }
+}
+
+class KeyIndexStore {
+    /**
+     * @param {Object} [options]
+     * @param {string} [options.indexDir] - Verzeichnis für Index-Dateien
+     * @param {number} [options.maxEntries] - Maximale Anzahl Index-Dateien
+     * @param {number} [options.maxMemoryEntries] - Maximale Anzahl Indizes im Speicher
+     * @param {Function} [options.log] - Logger
+     */
+    constructor(options = {}) {
+        this.indexDir = options.indexDir || DEFAULT_INDEX_DIR;
+        this.maxEntries = options.maxEntries || DEFAULT_MAX_ENTRIES;
+        this.maxMemoryEntries = options.maxMemoryEntries || DEFAULT_MAX_MEMORY_ENTRIES;
+        this.log = options.log || (() => {});
+        this.memory = new Map(); // Index-Key -> KeyIndex (LRU über Einfügereihenfolge)
+        this.pending = new Map(); // Laufende Aufbauten pro Index-Key
+        this.stats = { hits: 0, loads: 0, builds: 0, updates: 0 };
+    }
+
+    _key(filePath, sheetName, columns) {
+        return crypto.createHash('sha1')
+            .update(`${path.resolve(filePath)}\0${sheetName}\0${columnSpec(columns)}`)
+            .digest('hex').substring(0, 20);
+    }
+
+    _indexPath(key) {
+        return path.join(this.indexDir, key + '.idx');
+    }
+
+    _remember(key, index) {
+        this.memory.delete(key);
+        this.memory.set(key, index);
+        while (this.memory.size > this.maxMemoryEntries) {
+            this.memory.delete(this.memory.keys().next().value);
+        }
+    }
+
+    /**
+     * Liefert einen gültigen Index aus Speicher oder Platte
+     * @returns {KeyIndex|null}
+     */
+    get(filePath, sheetName, columns, fingerprint = fileFingerprint(filePath)) {
+        if (!fingerprint) return null;
+        const key = this._key(filePath, sheetName, columns);
+        const cached = this.memory.get(key);
+        if (cached && cached.fingerprint === fingerprint) {
+            this.stats.hits++;
+            this._remember(key, cached);
+            return cached;
+        }
+        let index = null;
+        try {
+            index = KeyIndex.deserialize(fs.readFileSync(this._indexPath(key)));
+        } catch (e) {
+            return null;
+        }
+        if (!index || index.fingerprint !== fingerprint) return null;
+        this.stats.loads++;
+        this._remember(key, index);
+        return index;
+    }
+
+    /**
+     * Liefert den Index, baut ihn bei Bedarf aus den Sheet-Daten auf
+     * @param {string} filePath - Zieldatei (lokaler Pfad)
+     * @param {string} sheetName
+     * @param {Object} columns - { keyColumn } oder { startColumn }
+     * @param {Function} loadData - async () => Datenzeilen ohne Header
+     * @returns {Promise<KeyIndex|null>}
+     */
+    async ensure(filePath, sheetName, columns, loadData) {
+        const fingerprint = fileFingerprint(filePath);
+        const existing = this.get(filePath, sheetName, columns, fingerprint);
+        if (existing) return existing;
+
+        const key = this._key(filePath, sheetName, columns);
+        if (this.pending.has(key)) return this.pending.get(key);
+
+        const promise = (async () => {
+            const data = await loadData();
+            if (!data) return null;
+            const started = Date.now();
+            const index = KeyIndex.build(data, columns, fingerprint);
+            this.stats.builds++;
+            this.log(`[KeyIndex] ${index.size} Schlüssel aus ${data.length} Zeilen in ${Date.now() - started}ms aufgebaut`);
+            // Datei wurde während des Lesens geändert - nicht persistieren
+            if (fileFingerprint(filePath) === fingerprint) this._save(key, index);
+            return index;
+        })().finally(() => this.pending.delete(key));
+        this.pending.set(key, promise);
+        return promise;
+    }
+
+    /**
+     * Trägt angehängte Zeilen in einen vorhandenen Index nach
+     * Nur wenn der Index zum Stand VOR dem Schreiben passt - sonst wird er
+     * beim nächsten Zugriff neu aufgebaut.
+     * @param {string} previousFingerprint - Fingerprint vor dem Schreiben
+     * @param {Array<[*, number]>} entries - [Wert, Excel-Zeile]
+     * @returns {boolean} true wenn nachgetragen
+     */
+    update(filePath, sheetName, columns, previousFingerprint, entries) {
+        const index = this.get(filePath, sheetName, columns, previousFingerprint);
+        if (!index) return false;
+        index.add(entries);
+        index.fingerprint = fileFingerprint(filePath);
+        this.stats.updates++;
+        this._save(this._key(filePath, sheetName, columns), index);
+        return true;
+    }
+
+    _save(key, index) {
+        this._remember(key, index);
+        try {
+            fs.mkdirSync(this.indexDir, { recursive: true });
+            const target = this._indexPath(key);
+            const tempFile = `${target}.${process.pid}-${Date.now()}.part`;
+            fs.writeFileSync(tempFile, index.serialize());
+            fs.renameSync(tempFile, target);
+            this._evict(key);
+        } catch (e) {
+            // Persistenz ist optional - Index bleibt im Speicher gültig
+            this.log(`[KeyIndex] Speichern fehlgeschlagen: ${e.message}`);
+        }
+    }
+
+    _evict(keepKey) {
+        let files;
+        try {
+            files = fs.readdirSync(this.indexDir).filter(name => name.endsWith('.idx'));
+        } catch (e) {
+            return;
+        }
+        if (files.length <= this.maxEntries) return;
+
+        const entries = files
+            .map(name => {
+                const filePath = path.join(this.indexDir, name);
+                try {
+                    return { filePath, key: name.slice(0, -4), mtimeMs: fs.statSync(filePath).mtimeMs };
+                } catch (e) {
+                    return null;
+                }
+            })
+            .filter(entry => entry && entry.key !== keepKey)
+            .sort((a, b) => a.mtimeMs - b.mtimeMs);
+
+        for (const entry of entries.slice(0, files.length - this.maxEntries)) {
+            try { fs.unlinkSync(entry.filePath); } catch (e) { /* ignorieren */ }
+        }
+    }
+}
+
+module.exports = {
+    KeyIndex,
+    KeyIndexStore,
+    normalizeKey,
+    hashKey,
+    searchSorted,
+    fileFingerprint
+};
@@ -74,17 +74,21 @@ function getPythonPath() {
 class ExcelLiveSession {
     constructor() {
         this.pythonProcess = null;
-        this.commandQueue = [];
-        this.currentResolve = null;
-        this.currentReject = null;
+        // Offene Anfragen (Request-ID -> { resolve, reject, timer }) in Sende-Reihenfolge.
+        // Mehrere Befehle dürfen gleichzeitig unterwegs sein (Pipelining).
+        this.pending = new Map();
+        this.nextRequestId = 1;
         this.isReady = false;
         this.responseBuffer = '';
     }
 
     /**
      * Startet die Python Live-Session
+     * @param {Object} [options]
+     * @param {string} [options.backend] - 'excel', 'memory' oder 'auto' (Standard:
+     *        Excel wenn installiert, sonst In-Memory-Modell)
      */
-    async start() {
+    async start(options = {}) {
         if (this.pythonProcess) {
             console.log('[LiveSession] Bereits gestartet');
             return { success: true };
@@ -96,7 +100,8 @@ class ExcelLiveSession {
 
             console.log('[LiveSession] Starte Python-Prozess:', pythonPath, pythonScript);
             
-            this.pythonProcess = spawn(pythonPath, [pythonScript], {
+            const backend = options.backend || 'auto';
+            this.pythonProcess = spawn(pythonPath, [pythonScript, '--backend', backend], {
                 stdio: ['pipe', 'pipe', 'pipe'],
                 cwd: __dirname
             });
@@ -117,12 +122,7 @@ class ExcelLiveSession {
                 for (const line of lines) {
                     if (line.trim()) {
                         try {
-                            const response = JSON.parse(line);
-                            if (this.currentResolve) {
-                                this.currentResolve(response);
-                                this.currentResolve = null;
-                                this.currentReject = null;
-                            }
+                            this._handleResponse(JSON.parse(line));
                         } catch (e) {
                             console.error('[LiveSession] JSON Parse Error:', e, 'Line:', line);
                         }
@@ -139,9 +139,7 @@ class ExcelLiveSession {
                 console.log('[LiveSession] Prozess beendet mit Code:', code);
                 this.pythonProcess = null;
                 this.isReady = false;
-                if (this.currentReject) {
-                    this.currentReject(new Error('Python process closed'));
-                }
+                this._rejectAll(new Error('Python process closed'));
             });
 
             // Ping um sicherzugehen dass der Prozess läuft
@@ -162,7 +160,9 @@ class ExcelLiveSession {
     }
 
     /**
-     * Sendet einen Befehl an Python und wartet auf Antwort
+     * Sendet einen Befehl an Python und wartet auf Antwort.
+     * Wartet NICHT auf vorherige Befehle - Python arbeitet sie in Sende-Reihenfolge ab,
+     * die Antwort wird über die Request-ID zugeordnet.
      */
     _sendCommand(command) {
         return new Promise((resolve, reject) => {
@@ -171,20 +171,57 @@ class ExcelLiveSession {
                 return;
             }
 
-            this.currentResolve = resolve;
-            this.currentReject = reject;
-
-            const cmdJson = JSON.stringify(command) + '\n';
-            this.pythonProcess.stdin.write(cmdJson);
-
-            // Timeout
-            setTimeout(() => {
-                if (this.currentReject === reject) {
+            const id = this.nextRequestId++;
+            const timer = setTimeout(() => {
+                if (this.pending.delete(id)) {
                     reject(new Error('Timeout waiting for response'));
-                    this.currentResolve = null;
-                    this.currentReject = null;
                 }
             }, 30000);
+            this.pending.set(id, { resolve, reject, timer });
+
+            const cmdJson = JSON.stringify({ ...command, id }) + '\n';
+            this.pythonProcess.stdin.write(cmdJson);
+        });
+    }
+
+    /**
+     * Ordnet eine Antwort der offenen Anfrage zu
+     */
+    _handleResponse(response) {
+        let id = response.id;
+        if (id === undefined || !this.pending.has(id)) {
+            // Antwort ohne ID (z.B. ungültiges JSON): gehört zur ältesten offenen Anfrage
+            id = this.pending.keys().next().value;
+            if (id === undefined) return;
+        }
+        const entry = this.pending.get(id);
+        this.pending.delete(id);
+        clearTimeout(entry.timer);
+        delete response.id;
+        entry.resolve(response);
+    }
+
+    _rejectAll(error) {
+        for (const entry of this.pending.values()) {
+            clearTimeout(entry.timer);
+            entry.reject(error);
+        }
+        this.pending.clear();
+    }
+
+    /**
+     * Führt mehrere Befehle in EINEM Roundtrip aus
+     * @param {Array<Object>} commands - Befehle wie bei _sendCommand, z.B.
+     *        [{ action: 'deleteRow', rowIndex: 5 }, { action: 'hideRow', rowIndex: 2 }]
+     * @param {Object} [options]
+     * @param {boolean} [options.stopOnError=false] - Nach dem ersten Fehler abbrechen
+     * @returns {Promise<{success: boolean, results: Array<Object>, executed: number, failed: number}>}
+     */
+    async batch(commands, options = {}) {
+        return this._sendCommand({
+            action: 'batch',
+            commands: commands,
+            stopOnError: !!options.stopOnError
         });
     }
 
@@ -263,6 +300,20 @@ class ExcelLiveSession {
         return this._sendCommand({ action: 'getData' });
     }
 
+    /**
+     * Liefert nur die Änderungen seit einer Version (inkrementelles Aktualisieren).
+     * Jede erfolgreiche Antwort (auch getData) enthält die aktuelle `version`.
+     *
+     * @param {number} sinceVersion - Version des Client-Stands
+     * @returns {Promise<Object>} { snapshot: false, changes: [...], version } oder
+     *          { snapshot: true, headers, data, version } wenn das Protokoll bereits
+     *          weiter verdichtet ist oder das Excel-Backend Formeln neu berechnet hat
+     *          (dort gibt es Deltas nur, wenn sich seit sinceVersion nichts geändert hat)
+     */
+    async getChanges(sinceVersion) {
+        return this._sendCommand({ action: 'getChanges', sinceVersion: sinceVersion });
+    }
+
     // =========================================================================
     // ZEILEN-OPERATIONEN
     // =========================================================================
@@ -279,6 +330,17 @@ class ExcelLiveSession {
         });
     }
 
+    /**
+     * Löscht mehrere Zeilen in einem Roundtrip (Mehrfachauswahl)
+     * @param {number[]} rowIndices - 0-basierte Indizes im aktuellen Stand
+     */
+    async deleteRows(rowIndices) {
+        // Von hinten nach vorne, damit die übrigen Indizes gültig bleiben
+        const sorted = [...new Set(rowIndices)].sort((a, b) => b - a);
+        console.log('[LiveSession] deleteRows:', sorted.length);
+        return this.batch(sorted.map(rowIndex => ({ action: 'deleteRow', rowIndex })));
+    }
+
     /**
      * Fügt leere Zeilen ein
      * @param {number} rowIndex - Position für die neuen Zeilen
@@ -12,6 +12,11 @@ Vorteile:
 - Formatierung bleibt IMMER erhalten
 
 Kommunikation: JSON über stdin/stdout
+
+Backends (Argument --backend):
+- excel:  xlwings, jede Operation sofort in Excel (diese Datei)
+- memory: Arbeitsmappe im Speicher, kein Excel nötig (excel_memory_session.py)
+- auto:   excel wenn Microsoft Excel verfügbar ist, sonst memory (Standard)
 """
 
 import json
@@ -19,8 +24,11 @@ import sys
 import os
 import platform
 import time
+from contextlib import contextmanager
 from typing import Optional, Dict, Any
 
+from excel_change_log import ChangeLog, delta_for_command
+
 # Für embedded Python auf Windows: pywin32 DLLs finden
 if platform.system() == 'Windows':
     pywin32_dll = os.path.join(sys.prefix, 'Lib', 'site-packages', 'pywin32_system32')
@@ -38,14 +46,23 @@ if platform.system() == 'Windows':
 
 try:
     import xlwings as xw
+    XLWINGS_AVAILABLE = True
+    XLWINGS_IMPORT_ERROR = None
 except ImportError as e:
-    print(json.dumps({"success": False, "error": f"xlwings import failed: {e}"}), flush=True)
-    sys.exit(1)
+    xw = None
+    XLWINGS_AVAILABLE = False
+    XLWINGS_IMPORT_ERROR = str(e)
 
 
 class ExcelLiveSession:
     """Persistente Excel-Session für Live-Editing"""
     
+    backend = 'excel'
+    # Excel rechnet Formeln nach jeder Operation neu - die Deltas enthalten nur
+    # die gesetzten Zellen, nicht die neu berechneten. getChanges liefert hier
+    # daher bei jeder Änderung einen Snapshot (siehe get_changes).
+    incremental_changes = False
+    
     def __init__(self):
         self.app: Optional[xw.App] = None
         self.workbook: Optional[xw.Book] = None
@@ -53,6 +70,8 @@ class ExcelLiveSession:
         self.file_path: Optional[str] = None
         self.sheet_name: Optional[str] = None
         self._is_running = True
+        # Versionierte Änderungen für getChanges (inkrementelles Aktualisieren)
+        self.changes = ChangeLog()
     
     def _log(self, message: str):
         """Logging zu stderr (nicht stdout, das ist für JSON)"""
@@ -352,16 +371,16 @@ class ExcelLiveSession:
                 return {'success': False, 'error': 'Keine Datei geöffnet'}
             
             excel_col = col_index + 1
+            first_letter = self._get_column_letter(excel_col)
+            last_letter = self._get_column_letter(excel_col + count - 1)
             
-            for i in range(count):
-                insert_letter = self._get_column_letter(excel_col + i)
-                self._log(f"Füge Spalte {insert_letter} ein")
-                self.worksheet.range(f'{insert_letter}:{insert_letter}').insert(shift='right')
+            # Alle Spalten in einem Aufruf einfügen
+            self._log(f"Füge {count} Spalte(n) bei {first_letter} ein")
+            self.worksheet.range(f'{first_letter}:{last_letter}').insert(shift='right')
             
-            # Header setzen falls vorhanden
+            # Header setzen falls vorhanden (eine Zeile, ein Aufruf)
             if headers:
-                for i, header in enumerate(headers):
-                    self.worksheet.range((1, excel_col + i)).value = header
+                self.worksheet.range((1, excel_col)).value = list(headers)
             
             return {'success': True, 'insertedAt': col_index, 'count': count}
             
@@ -437,6 +456,102 @@ class ExcelLiveSession:
             self._log(f"Fehler beim Verstecken der Spalte: {e}")
             return {'success': False, 'error': str(e)}
     
+    # =========================================================================
+    # ZUSAMMENGEFASSTE OPERATIONEN (siehe excel_op_coalescer.py)
+    # =========================================================================
+    
+    def _axis_address(self, axis: str, first: int, last: int) -> str:
+        """Ganze Zeilen/Spalten als Adresse (0-basierte Indizes ohne Header)"""
+        if axis == 'row':
+            return f'{first + 2}:{last + 2}'
+        first_letter = self._get_column_letter(first + 1)
+        return f'{first_letter}:{self._get_column_letter(last + 1)}'
+    
+    def delete_ranges(self, axis: str, ranges: list) -> Dict[str, Any]:
+        """
+        Löscht mehrere Bereiche [(start, anzahl), ...] (absteigend sortiert,
+        Indizes vom Stand vor dem Löschen) als Union in möglichst wenigen Aufrufen.
+        """
+        try:
+            if not self.worksheet:
+                return {'success': False, 'error': 'Keine Datei geöffnet', 'untouched': True}
+            
+            addresses = [self._axis_address(axis, start, start + count - 1) for start, count in ranges]
+            # Excel-Adressen sind auf 255 Zeichen begrenzt - in Stücken von unten nach oben
+            chunk = []
+            for address in addresses + [None]:
+                if address is not None and len(','.join(chunk + [address])) <= 255:
+                    chunk.append(address)
+                    continue
+                if chunk:
+                    self._delete_union(chunk)
+                chunk = [address] if address is not None else []
+            
+            self._log(f"{len(addresses)} {'Zeilen' if axis == 'row' else 'Spalten'}-Bereich(e) gelöscht")
+            return {'success': True}
+            
+        except Exception as e:
+            self._log(f"Fehler beim Löschen der Bereiche: {e}")
+            return {'success': False, 'error': str(e)}
+    
+    def _delete_union(self, addresses: list):
+        try:
+            self.worksheet.range(','.join(addresses)).delete()
+        except Exception:
+            if len(addresses) == 1:
+                raise
+            # Mehrfachbereich nicht unterstützt - einzeln von unten nach oben
+            for address in addresses:
+                self.worksheet.range(address).delete()
+    
+    def insert_block(self, axis: str, position: int, count: int, headers: list = None) -> Dict[str, Any]:
+        """Fügt count leere Zeilen/Spalten bei position ein"""
+        if axis == 'row':
+            return self.insert_row(position, count)
+        return self.insert_column(position, count, headers)
+    
+    def permute(self, axis: str, start: int, order: list) -> Dict[str, Any]:
+        """
+        Ordnet das Fenster start..start+len(order)-1 um (order[ziel] = quelle, relativ).
+        Ersetzt eine Kette von Moves: Block dahinter einfügen, zusammenhängende
+        Quell-Blöcke kopieren, altes Fenster löschen.
+        """
+        from excel_op_coalescer import permutation_runs
+        try:
+            if not self.worksheet:
+                return {'success': False, 'error': 'Keine Datei geöffnet', 'untouched': True}
+            
+            runs = permutation_runs(order)
+            if len(runs) == 1:
+                return {'success': True}  # Moves heben sich auf
+            
+            size = len(order)
+            target = start + size  # neuer Block direkt hinter dem Fenster
+            self.worksheet.range(self._axis_address(axis, target, target + size - 1)).insert(
+                shift='down' if axis == 'row' else 'right')
+            
+            # Ganze Zeilen/Spalten kopieren: Höhe/Breite und versteckt wandern mit
+            for source, dest, length in runs:
+                source_rng = self.worksheet.range(
+                    self._axis_address(axis, start + source, start + source + length - 1))
+                if axis == 'row':
+                    dest_rng = self.worksheet.range(f'A{target + dest + 2}')
+                else:
+                    dest_rng = self.worksheet.range(f'{self._get_column_letter(target + dest + 1)}1')
+                if platform.system() == 'Windows':
+                    source_rng.api.Copy(Destination=dest_rng.api)
+                else:
+                    source_rng.api.copy_range(destination=dest_rng.api)
+            
+            self.worksheet.range(self._axis_address(axis, start, start + size - 1)).delete()
+            self._log(f"{'Zeilen' if axis == 'row' else 'Spalten'} {start}..{start + size - 1} umgeordnet "
+                      f"({len(runs)} Block-Kopien)")
+            return {'success': True}
+            
+        except Exception as e:
+            self._log(f"Fehler beim Umordnen: {e}")
+            return {'success': False, 'error': str(e)}
+    
     # =========================================================================
     # ZELL-OPERATIONEN
     # =========================================================================
@@ -495,6 +610,7 @@ class ExcelLiveSession:
             'save': lambda: self.save_file(cmd.get('outputPath')),
             'close': lambda: self.close_session(),
             'getData': lambda: self.get_data(),
+            'getChanges': lambda: self.get_changes(cmd.get('sinceVersion')),
             
             # Zeilen
             'deleteRow': lambda: self.delete_row(cmd.get('rowIndex')),
@@ -512,16 +628,125 @@ class ExcelLiveSession:
             # Zellen
             'setCellValue': lambda: self.set_cell_value(cmd.get('rowIndex'), cmd.get('colIndex'), cmd.get('value')),
             
+            # Mehrere Befehle in einem Roundtrip
+            'batch': lambda: self.run_batch(cmd.get('commands') or [], cmd.get('stopOnError', False)),
+            
             # Session
-            'ping': lambda: {'success': True, 'pong': True},
+            'ping': lambda: {'success': True, 'pong': True, 'backend': self.backend},
             'quit': lambda: self._quit(),
         }
         
         handler = handlers.get(action)
-        if handler:
-            return handler()
-        else:
+        if not handler:
             return {'success': False, 'error': f'Unbekannte Aktion: {action}'}
+        
+        result = handler()
+        if result.get('success'):
+            if action in ('open', 'close'):
+                self.changes.reset()
+            else:
+                self.changes.record(delta_for_command(cmd))
+            result['version'] = self.changes.version
+        return result
+    
+    def get_changes(self, since_version) -> Dict[str, Any]:
+        """
+        Änderungen seit since_version. Ist das Protokoll bereits weiter verdichtet
+        (oder die Version unbekannt), kommt ein vollständiger Snapshot wie bei getData.
+        Ohne incremental_changes (Excel-Backend) gibt es Deltas nur, wenn sich
+        nichts geändert hat - sonst ebenfalls einen Snapshot.
+        """
+        changes = self.changes.since(since_version)
+        if changes and not self.incremental_changes:
+            changes = None
+        if changes is None:
+            data = self.get_data()
+            if not data.get('success'):
+                return data
+            return dict(data, snapshot=True)
+        return {'success': True, 'snapshot': False, 'changes': changes}
+    
+    def run_batch(self, commands: list, stop_on_error: bool = False) -> Dict[str, Any]:
+        """
+        Führt eine geordnete Liste von Befehlen in einem Roundtrip aus.
+        Jeder Befehl sieht den Zustand nach dem vorherigen (gleiche Semantik wie
+        einzeln gesendet). Liefert ein Ergebnis pro Befehl.
+        """
+        from excel_op_coalescer import coalesce_commands, member_result
+        
+        results = []
+        with self._batch_context():
+            for step in coalesce_commands(commands):
+                if step['kind'] == 'single':
+                    step_results = [self._run_single(commands[step['members'][0]])]
+                else:
+                    step_results = self._run_coalesced(step, commands, member_result)
+                results.extend(step_results)
+                if stop_on_error and not all(r.get('success') for r in step_results):
+                    # Nur bis zum ersten Fehler melden
+                    results = results[:len(results) - len(step_results)]
+                    for r in step_results:
+                        results.append(r)
+                        if not r.get('success'):
+                            break
+                    break
+        
+        failed = sum(1 for r in results if not r.get('success'))
+        return {
+            'success': failed == 0,
+            'results': results,
+            'executed': len(results),
+            'failed': failed
+        }
+    
+    def _run_single(self, sub) -> Dict[str, Any]:
+        action = sub.get('action') if isinstance(sub, dict) else None
+        if action in ('batch', 'quit'):
+            return {'success': False, 'error': f'Aktion "{action}" ist im Batch nicht erlaubt'}
+        try:
+            return self.handle_command(sub)
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+    
+    def _run_coalesced(self, step, commands, member_result) -> list:
+        """Führt einen zusammengefassten Schritt aus, Ergebnis pro Befehl"""
+        members = [commands[i] for i in step['members']]
+        if step['kind'] == 'delete':
+            result = self.delete_ranges(step['axis'], step['ranges'])
+        elif step['kind'] == 'insert':
+            result = self.insert_block(step['axis'], step['position'], step['count'], step['headers'])
+        else:
+            result = self.permute(step['axis'], step['start'], step['order'])
+        
+        if result.get('success'):
+            results = []
+            for cmd in members:
+                self.changes.record(delta_for_command(cmd))
+                results.append(dict(member_result(cmd), version=self.changes.version))
+            return results
+        if result.get('untouched'):
+            # Nichts verändert (z.B. Index ungültig) - einzeln ausführen für genaue Fehler
+            return [self._run_single(cmd) for cmd in members]
+        return [{'success': False, 'error': result.get('error')} for _ in members]
+    
+    @contextmanager
+    def _batch_context(self):
+        """Excel: Neuberechnung während eines Batches aussetzen"""
+        previous = None
+        if self.app:
+            try:
+                previous = self.app.calculation
+                self.app.calculation = 'manual'
+            except Exception:
+                previous = None
+        try:
+            yield
+        finally:
+            if previous and self.app:
+                try:
+                    self.app.calculation = previous
+                except Exception:
+                    pass
     
     def _quit(self) -> Dict[str, Any]:
         """Beendet die Session"""
@@ -534,6 +759,7 @@ class ExcelLiveSession:
         self._log("Live Session gestartet, warte auf Befehle...")
         
         while self._is_running:
+            cmd = None
             try:
                 line = sys.stdin.readline()
                 if not line:
@@ -551,6 +777,9 @@ class ExcelLiveSession:
                     continue
                 
                 result = self.handle_command(cmd)
+                # Request-ID zurückgeben - die Bridge ordnet Antworten darüber zu (Pipelining)
+                if isinstance(cmd, dict) and 'id' in cmd:
+                    result = dict(result, id=cmd['id'])
                 self._respond(result)
                 
             except KeyboardInterrupt:
@@ -558,14 +787,44 @@ class ExcelLiveSession:
                 break
             except Exception as e:
                 self._log(f"Fehler: {e}")
-                self._respond({'success': False, 'error': str(e)})
+                error = {'success': False, 'error': str(e)}
+                if isinstance(cmd, dict) and 'id' in cmd:
+                    error['id'] = cmd['id']
+                self._respond(error)
         
         self.close_session()
         self._log("Session beendet")
 
 
+def _select_backend(requested: str) -> str:
+    """Ermittelt das Backend ('excel' oder 'memory')"""
+    if requested in ('excel', 'memory'):
+        return requested
+    if not XLWINGS_AVAILABLE:
+        return 'memory'
+    try:
+        from excel_utils import is_excel_installed
+        return 'excel' if is_excel_installed() else 'memory'
+    except Exception:
+        return 'memory'
+
+
 def main():
-    session = ExcelLiveSession()
+    requested = 'auto'
+    if '--backend' in sys.argv:
+        idx = sys.argv.index('--backend')
+        if idx + 1 < len(sys.argv):
+            requested = sys.argv[idx + 1]
+    
+    backend = _select_backend(requested)
+    if backend == 'excel':
+        if not XLWINGS_AVAILABLE:
+            print(json.dumps({"success": False, "error": f"xlwings import failed: {XLWINGS_IMPORT_ERROR}"}), flush=True)
+            sys.exit(1)
+        session = ExcelLiveSession()
+    else:
+        from excel_memory_session import MemoryLiveSession
+        session = MemoryLiveSession()
     session.run()
 
 
@@ -0,0 +1,611 @@
+#!/usr/bin/env python3
+"""
+Excel Memory Session - Live-Session ohne Excel
+
+Gleiches JSON-Protokoll wie excel_live_session.py, aber die Arbeitsmappe
+wird nur im Speicher modelliert:
+
+- Zeilen- und Spaltenreihenfolge als Positionsliste (PositionIndex):
+  balancierter Baum über zusammenhängende Bereiche, jede Operation O(log n)
+- Zell-Änderungen als dünn besetztes Overlay {(Zeilen-Key, Spalten-Key): Wert}
+- Versteckt/Markiert hängt am Zeilen-/Spalten-Key und wandert mit
+
+Keine Datei-Zugriffe pro Operation. Erst `save` schreibt alles in EINEM
+Durchlauf über den Writer (excel_writer.write_sheet). Läuft headless
+(auch unter Linux) für Tests und Benchmarks.
+"""
+
+import random
+from typing import Optional, Dict, Any, List
+
+from excel_live_session import ExcelLiveSession
+
+
+# =============================================================================
+# POSITIONSLISTE (Implicit Treap über Bereiche)
+# =============================================================================
+
+class _RunNode:
+    """Knoten: zusammenhängender Key-Bereich [start, start + length)"""
+
+    __slots__ = ('start', 'length', 'priority', 'left', 'right', 'size')
+
+    def __init__(self, start, length, priority=None):
+        self.start = start
+        self.length = length
+        self.priority = random.random() if priority is None else priority
+        self.left = None
+        self.right = None
+        self.size = length
+
+
+def _size(node):
+    return node.size if node else 0
+
+
+def _update(node):
+    node.size = _size(node.left) + node.length + _size(node.right)
+    return node
+
+
+def _merge(left, right):
+    if not left:
+        return right
+    if not right:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        return _update(left)
+    right.left = _merge(left, right.left)
+    return _update(right)
+
+
+def _split(node, count):
+    """Teilt in (erste count Elemente, Rest). Bereiche werden bei Bedarf geteilt."""
+    if not node:
+        return None, None
+    left_size = _size(node.left)
+    if count <= left_size:
+        left, node.left = _split(node.left, count)
+        return left, _update(node)
+    if count >= left_size + node.length:
+        node.right, right = _split(node.right, count - left_size - node.length)
+        return _update(node), right
+
+    # Schnitt mitten im Bereich: Knoten in zwei Bereiche aufteilen
+    offset = count - left_size
+    head = _RunNode(node.start, offset, node.priority)
+    head.left = node.left
+    tail = _RunNode(node.start + offset, node.length - offset, node.priority)
+    tail.right = node.right
+    return _update(head), _update(tail)
+
+
+class PositionIndex:
+    """
+    Geordnete Liste von Keys mit O(log n) Einfügen, Löschen, Verschieben und
+    Positionszugriff. Knoten speichern Bereiche, daher bleibt der Baum klein:
+    Eine frisch geöffnete Datei mit 1 Mio. Zeilen ist ein einziger Knoten.
+    """
+
+    def __init__(self, count=0):
+        self._root = _RunNode(0, count) if count > 0 else None
+
+    def __len__(self):
+        return _size(self._root)
+
+    def key_at(self, position):
+        """Key an Position (0-basiert)"""
+        if position < 0 or position >= len(self):
+            raise IndexError(f'Position {position} außerhalb von 0..{len(self) - 1}')
+        node = self._root
+        while True:
+            left_size = _size(node.left)
+            if position < left_size:
+                node = node.left
+            elif position < left_size + node.length:
+                return node.start + position - left_size
+            else:
+                position -= left_size + node.length
+                node = node.right
+
+    def insert(self, position, start_key, count=1):
+        """Fügt die Keys start_key..start_key+count-1 vor Position ein"""
+        if position < 0 or position > len(self):
+            raise IndexError(f'Position {position} außerhalb von 0..{len(self)}')
+        left, right = _split(self._root, position)
+        self._root = _merge(_merge(left, _RunNode(start_key, count)), right)
+
+    def delete(self, position, count=1):
+        """Entfernt count Keys ab Position"""
+        if position < 0 or position + count > len(self):
+            raise IndexError(f'Bereich {position}+{count} außerhalb von 0..{len(self) - 1}')
+        left, rest = _split(self._root, position)
+        _, right = _split(rest, count)
+        self._root = _merge(left, right)
+
+    def move(self, from_position, to_position):
+        """Verschiebt einen Key (wie list.insert(to, list.pop(from)))"""
+        if from_position < 0 or from_position >= len(self):
+            raise IndexError(f'Position {from_position} außerhalb von 0..{len(self) - 1}')
+        if to_position < 0 or to_position >= len(self):
+            raise IndexError(f'Position {to_position} außerhalb von 0..{len(self) - 1}')
+        left, rest = _split(self._root, from_position)
+        moved, right = _split(rest, 1)
+        remaining = _merge(left, right)
+        left, right = _split(remaining, to_position)
+        self._root = _merge(_merge(left, moved), right)
+
+    def runs(self):
+        """Bereiche (start, length) in Reihenfolge"""
+        stack = []
+        node = self._root
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.start, node.length
+            node = node.right
+
+    def keys(self):
+        """Alle Keys in Reihenfolge"""
+        for start, length in self.runs():
+            yield from range(start, start + length)
+
+
+# =============================================================================
+# SESSION
+# =============================================================================
+
+class MemoryLiveSession(ExcelLiveSession):
+    """Live-Session auf einem In-Memory-Modell (kein Excel nötig)"""
+
+    backend = 'memory'
+    # Keine Neuberechnung - die Deltas beschreiben den Stand vollständig
+    incremental_changes = True
+
+    def __init__(self):
+        super().__init__()
+        self._reset_model()
+
+    def _reset_model(self):
+        self.headers: List[Any] = []       # Original-Header (Index = Spalten-Key)
+        self.base_data: List[list] = []    # Original-Daten (Index = Zeilen-Key)
+        self.rows = PositionIndex()
+        self.columns = PositionIndex()
+        self.base_row_count = 0            # Keys >= base_row_count sind neue Zeilen
+        self.base_col_count = 0
+        self.next_row_key = 0
+        self.next_col_key = 0
+        self.new_headers: Dict[int, Any] = {}          # Spalten-Key -> Header neuer Spalten
+        self.overlay: Dict[tuple, Any] = {}            # (Zeilen-Key, Spalten-Key) -> Wert
+        self.hidden_row_keys = set()
+        self.hidden_col_keys = set()
+        self.highlights: Dict[int, str] = {}           # Zeilen-Key -> Farbe
+        self.cleared_highlights = set()                # Zeilen-Keys mit entfernter Farbe
+        self.hidden_rows_changed = False
+        self.hidden_cols_changed = False
+        self.dirty = False
+
+    def _hide_excel(self):
+        pass
+
+    def _require_open(self):
+        if self.file_path is None:
+            return {'success': False, 'error': 'Keine Datei geöffnet'}
+        return None
+
+    def _load_from_rows(self, headers, data, hidden_rows, hidden_cols):
+        """Setzt das Modell auf einen neuen Basis-Zustand"""
+        self._reset_model()
+        col_count = max([len(headers)] + [len(row) for row in data]) if (headers or data) else 0
+        self.headers = list(headers) + [None] * (col_count - len(headers))
+        self.base_data = data
+        self.base_row_count = self.next_row_key = len(data)
+        self.base_col_count = self.next_col_key = col_count
+        self.rows = PositionIndex(len(data))
+        self.columns = PositionIndex(col_count)
+        self.hidden_row_keys = set(hidden_rows)
+        self.hidden_col_keys = set(hidden_cols)
+
+    # =========================================================================
+    # SESSION-MANAGEMENT
+    # =========================================================================
+
+    def open_file(self, file_path: str, sheet_name: str) -> Dict[str, Any]:
+        """Liest Werte und versteckte Zeilen/Spalten einmal ein"""
+        try:
+            from openpyxl import load_workbook
+            self._log(f"Öffne Datei (Memory): {file_path}, Sheet: {sheet_name}")
+
+            wb = load_workbook(file_path, data_only=True)
+            sheet_names = wb.sheetnames
+            if sheet_name not in sheet_names:
+                wb.close()
+                return {'success': False, 'error': f'Sheet "{sheet_name}" nicht gefunden'}
+
+            ws = wb[sheet_name]
+            max_col = ws.max_column
+            rows = ws.iter_rows(min_row=1, max_col=max_col, values_only=True)
+            headers = list(next(rows, ()))
+            data = [list(row) for row in rows]
+
+            hidden_rows = [r - 2 for r, dim in ws.row_dimensions.items()
+                           if dim.hidden and 2 <= r < len(data) + 2]
+            hidden_cols = set()
+            for dim in ws.column_dimensions.values():
+                if dim.hidden and dim.min:
+                    hidden_cols.update(c - 1 for c in range(dim.min, (dim.max or dim.min) + 1) if c <= max_col)
+            wb.close()
+
+            self._load_from_rows(headers, data, hidden_rows, hidden_cols)
+            self.file_path = file_path
+            self.sheet_name = sheet_name
+
+            self._log(f"Datei geöffnet: {len(data)} Zeilen, {max_col} Spalten")
+            return {'success': True, 'sheets': sheet_names}
+
+        except Exception as e:
+            self._log(f"Fehler beim Öffnen: {e}")
+            return {'success': False, 'error': str(e)}
+
+    def save_file(self, output_path: Optional[str] = None) -> Dict[str, Any]:
+        """Schreibt alle Änderungen in einem Durchlauf über den Writer"""
+        try:
+            error = self._require_open()
+            if error:
+                return error
+
+            target = output_path or self.file_path
+            if not self.dirty and target == self.file_path:
+                return {'success': True, 'outputPath': self.file_path}
+
+            from excel_writer import write_sheet
+            changes = self._build_changes()
+            self._log(f"Speichere unter: {target}")
+            result = write_sheet(self.file_path, target, self.sheet_name, changes)
+            if not result.get('success'):
+                return result
+
+            # Gespeicherter Stand wird neue Basis. Markierungen bleiben Zeilen-Zustand
+            # und werden beim nächsten Speichern wieder über alle Spalten gelegt.
+            current = self.get_data()
+            row_keys = list(self.rows.keys())
+            hidden_rows = [pos for pos, key in enumerate(row_keys) if key in self.hidden_row_keys]
+            hidden_cols = [pos for pos, key in enumerate(self.columns.keys()) if key in self.hidden_col_keys]
+            highlights = {pos: self.highlights[key] for pos, key in enumerate(row_keys) if key in self.highlights}
+            headers, data = self._trim_like_file(current['headers'], current['data'], highlights)
+            if len(data) != len(current['data']) or len(headers) != len(current['headers']):
+                # Leere Zeilen/Spalten am Ende entfallen - Clients brauchen einen Snapshot
+                self.changes.reset()
+            self._load_from_rows(headers, data,
+                                 [pos for pos in hidden_rows if pos < len(data)],
+                                 [pos for pos in hidden_cols if pos < len(headers)])
+            self.highlights = highlights
+            self.file_path = target
+
+            return {'success': True, 'outputPath': target, 'method': result.get('method', 'openpyxl')}
+
+        except Exception as e:
+            self._log(f"Fehler beim Speichern: {e}")
+            return {'success': False, 'error': str(e)}
+
+    def close_session(self) -> Dict[str, Any]:
+        self._reset_model()
+        self.file_path = None
+        self.sheet_name = None
+        return {'success': True}
+
+    def _build_changes(self) -> Dict[str, Any]:
+        """
+        Übersetzt das Modell in ein changes-Dict für write_sheet (Pipeline-Format):
+        deletedRowIndices/rowOrder/insertedRowInfo, deletedColumns/insertedColumns/columnOrder,
+        editedCells in finalen Koordinaten.
+        """
+        row_keys = list(self.rows.keys())
+        col_keys = list(self.columns.keys())
+        changes: Dict[str, Any] = {
+            'headers': self._current_headers(col_keys),
+            'data': [],
+            'incremental': True,
+            'rowHighlights': None,
+            'hiddenRows': None,
+            'hiddenColumns': None,
+        }
+
+        # --- Zeilen ---
+        kept = [key for key in row_keys if key < self.base_row_count]
+        kept_set = set(kept)
+        deleted = [key for key in range(self.base_row_count) if key not in kept_set]
+        if deleted:
+            changes['deletedRowIndices'] = deleted
+        if kept != sorted(kept):
+            after_delete = {key: idx for idx, key in enumerate(sorted(kept))}
+            changes['rowOrder'] = [after_delete[key] for key in kept]
+        inserted = self._new_key_runs(row_keys, self.base_row_count)
+        if inserted:
+            changes['insertedRowInfo'] = {'operations': [{'position': pos, 'count': count}
+                                                         for pos, count in inserted]}
+
+        # --- Spalten ---
+        kept_cols = [key for key in col_keys if key < self.base_col_count]
+        kept_cols_set = set(kept_cols)
+        deleted_cols = [key for key in range(self.base_col_count) if key not in kept_cols_set]
+        if deleted_cols:
+            changes['deletedColumns'] = deleted_cols
+        new_col_runs = self._new_key_runs(col_keys, self.base_col_count)
+        if new_col_runs:
+            changes['insertedColumns'] = {'operations': [
+                {'position': pos, 'count': count,
+                 'headers': [self.new_headers.get(col_keys[pos + i]) for i in range(count)]}
+                for pos, count in new_col_runs]}
+        if kept_cols != sorted(kept_cols):
+            # Pipeline: erst löschen, dann neue Spalten an ihren finalen Positionen einfügen,
+            # dann umsortieren. Zwischen-Layout: neue Spalten fest, Rest in Original-Reihenfolge
+            layout = [key if key >= self.base_col_count else None for key in col_keys]
+            originals = iter(sorted(kept_cols))
+            layout = [key if key is not None else next(originals) for key in layout]
+            layout_pos = {key: idx for idx, key in enumerate(layout)}
+            changes['columnOrder'] = [layout_pos[key] for key in col_keys]
+
+        # --- Zell-Änderungen (finale Koordinaten) ---
+        if self.overlay:
+            row_pos = {key: pos for pos, key in enumerate(row_keys)}
+            col_pos = {key: pos for pos, key in enumerate(col_keys)}
+            edited = {}
+            for (row_key, col_key), value in self.overlay.items():
+                if row_key in row_pos and col_key in col_pos:
+                    edited[f'{row_pos[row_key]}-{col_pos[col_key]}'] = value
+            changes['editedCells'] = edited
+
+        # --- Versteckt / Markiert ---
+        if self.hidden_rows_changed or 'rowOrder' in changes or deleted or inserted:
+            changes['hiddenRows'] = [pos for pos, key in enumerate(row_keys) if key in self.hidden_row_keys]
+        if self.hidden_cols_changed or deleted_cols or new_col_runs or 'columnOrder' in changes:
+            changes['hiddenColumns'] = [pos for pos, key in enumerate(col_keys) if key in self.hidden_col_keys]
+        if self.highlights or self.cleared_highlights:
+            row_pos = {key: pos for pos, key in enumerate(row_keys)}
+            changes['rowHighlights'] = {str(row_pos[key]): color for key, color in self.highlights.items()
+                                        if key in row_pos}
+            changes['clearedRowHighlights'] = [row_pos[key] for key in self.cleared_highlights
+                                               if key in row_pos and key not in self.highlights]
+        return changes
+
+    @staticmethod
+    def _trim_like_file(headers, data, highlights):
+        """
+        Leere Zeilen/Spalten am Ende existieren in der Datei nicht (max_row/max_column
+        zählen nur Zellen). Die neue Basis muss exakt der Datei entsprechen, sonst
+        passen die Indizes beim nächsten Speichern nicht mehr.
+        """
+        row_count = len(data)
+        while row_count > 0 and row_count - 1 not in highlights and \
+                all(value is None for value in data[row_count - 1]):
+            row_count -= 1
+        data = data[:row_count]
+
+        col_count = len(headers)
+        while col_count > 0 and headers[col_count - 1] is None and \
+                all(len(row) < col_count or row[col_count - 1] is None for row in data):
+            col_count -= 1
+        return headers[:col_count], [row[:col_count] for row in data]
+
+    @staticmethod
+    def _new_key_runs(keys, base_count):
+        """Positionen neuer Keys als zusammenhängende (position, count)-Blöcke"""
+        runs = []
+        for pos, key in enumerate(keys):
+            if key < base_count:
+                continue
+            if runs and runs[-1][0] + runs[-1][1] == pos:
+                runs[-1][1] += 1
+            else:
+                runs.append([pos, 1])
+        return [tuple(run) for run in runs]
+
+    def _current_headers(self, col_keys=None):
+        col_keys = col_keys if col_keys is not None else self.columns.keys()
+        return [self.headers[key] if key < self.base_col_count else self.new_headers.get(key)
+                for key in col_keys]
+
+    # =========================================================================
+    # ZEILEN-OPERATIONEN
+    # =========================================================================
+
+    def delete_row(self, row_index: int) -> Dict[str, Any]:
+        error = self._require_open()
+        if error:
+            return error
+        try:
+            self.rows.delete(row_index)
+        except IndexError as e:
+            return {'success': False, 'error': str(e)}
+        self.dirty = True
+        return {'success': True, 'deletedRow': row_index}
+
+    def insert_row(self, row_index: int, count: int = 1) -> Dict[str, Any]:
+        error = self._require_open()
+        if error:
+            return error
+        try:
+            self.rows.insert(row_index, self.next_row_key, count)
+        except IndexError as e:
+            return {'success': False, 'error': str(e)}
+        self.next_row_key += count
+        self.dirty = True
+        return {'success': True, 'insertedAt': row_index, 'count': count}
+
+    def move_row(self, from_index: int, to_index: int) -> Dict[str, Any]:
+        error = self._require_open()
+        if error:
+            return error
+        try:
+            self.rows.move(from_index, to_index)
+        except IndexError as e:
+            return {'success': False, 'error': str(e)}
+        self.dirty = True
+        return {'success': True, 'movedFrom': from_index, 'movedTo': to_index}
+
+    def hide_row(self, row_index: int, hidden: bool = True) -> Dict[str, Any]:
+        error = self._require_open()
+        if error:
+            return error
+        try:
+            key = self.rows.key_at(row_index)
+        except IndexError as e:
+            return {'success': False, 'error': str(e)}
+        if hidden:
+            self.hidden_row_keys.add(key)
+        else:
+            self.hidden_row_keys.discard(key)
+        self.hidden_rows_changed = self.dirty = True
+        return {'success': True, 'row': row_index, 'hidden': hidden}
+
+    def highlight_row(self, row_index: int, color: Optional[str] = None) -> Dict[str, Any]:
+        error = self._require_open()
+        if error:
+            return error
+        try:
+            key = self.rows.key_at(row_index)
+        except IndexError as e:
+            return {'success': False, 'error': str(e)}
+        if color is None:
+            self.highlights.pop(key, None)
+            self.cleared_highlights.add(key)
+        else:
+            self.highlights[key] = color
+        self.dirty = True
+        return {'success': True, 'row': row_index, 'color': color}
+
+    # =========================================================================
+    # SPALTEN-OPERATIONEN
+    # =========================================================================
+
+    def delete_column(self, col_index: int) -> Dict[str, Any]:
+        error = self._require_open()
+        if error:
+            return error
+        try:
+            self.columns.delete(col_index)
+        except IndexError as e:
+            return {'success': False, 'error': str(e)}
+        self.dirty = True
+        return {'success': True, 'deletedColumn': col_index}
+
+    def insert_column(self, col_index: int, count: int = 1, headers: list = None) -> Dict[str, Any]:
+        error = self._require_open()
+        if error:
+            return error
+        try:
+            self.columns.insert(col_index, self.next_col_key, count)
+        except IndexError as e:
+            return {'success': False, 'error': str(e)}
+        for i, header in enumerate((headers or [])[:count]):
+            self.new_headers[self.next_col_key + i] = header
+        self.next_col_key += count
+        self.dirty = True
+        return {'success': True, 'insertedAt': col_index, 'count': count}
+
+    def move_column(self, from_index: int, to_index: int) -> Dict[str, Any]:
+        error = self._require_open()
+        if error:
+            return error
+        try:
+            self.columns.move(from_index, to_index)
+        except IndexError as e:
+            return {'success': False, 'error': str(e)}
+        self.dirty = True
+        return {'success': True, 'movedFrom': from_index, 'movedTo': to_index}
+
+    def hide_column(self, col_index: int, hidden: bool = True) -> Dict[str, Any]:
+        error = self._require_open()
+        if error:
+            return error
+        try:
+            key = self.columns.key_at(col_index)
+        except IndexError as e:
+            return {'success': False, 'error': str(e)}
+        if hidden:
+            self.hidden_col_keys.add(key)
+        else:
+            self.hidden_col_keys.discard(key)
+        self.hidden_cols_changed = self.dirty = True
+        return {'success': True, 'column': col_index, 'hidden': hidden}
+
+    # =========================================================================
+    # ZUSAMMENGEFASSTE OPERATIONEN (siehe excel_op_coalescer.py)
+    # =========================================================================
+
+    def _axis_index(self, axis):
+        return self.rows if axis == 'row' else self.columns
+
+    def delete_ranges(self, axis: str, ranges: list) -> Dict[str, Any]:
+        error = self._require_open()
+        if error:
+            return dict(error, untouched=True)
+        index = self._axis_index(axis)
+        if any(start < 0 or start + count > len(index) for start, count in ranges):
+            return {'success': False, 'error': 'Bereich außerhalb der Tabelle', 'untouched': True}
+        for start, count in sorted(ranges, reverse=True):
+            index.delete(start, count)
+        self.dirty = True
+        return {'success': True}
+
+    def insert_block(self, axis: str, position: int, count: int, headers: list = None) -> Dict[str, Any]:
+        if axis == 'row':
+            result = self.insert_row(position, count)
+        else:
+            result = self.insert_column(position, count, headers)
+        if not result.get('success'):
+            result['untouched'] = True
+        return result
+
+    def permute(self, axis: str, start: int, order: list) -> Dict[str, Any]:
+        error = self._require_open()
+        if error:
+            return dict(error, untouched=True)
+        index = self._axis_index(axis)
+        if start < 0 or start + len(order) > len(index):
+            return {'success': False, 'error': 'Bereich außerhalb der Tabelle', 'untouched': True}
+        keys = [index.key_at(start + offset) for offset in range(len(order))]
+        index.delete(start, len(order))
+        position = start
+        for key in (keys[source] for source in order):
+            index.insert(position, key, 1)
+            position += 1
+        self.dirty = True
+        return {'success': True}
+
+    # =========================================================================
+    # ZELL-OPERATIONEN
+    # =========================================================================
+
+    def set_cell_value(self, row_index: int, col_index: int, value: Any) -> Dict[str, Any]:
+        error = self._require_open()
+        if error:
+            return error
+        try:
+            key = (self.rows.key_at(row_index), self.columns.key_at(col_index))
+        except IndexError as e:
+            return {'success': False, 'error': str(e)}
+        self.overlay[key] = value
+        self.dirty = True
+        return {'success': True, 'row': row_index, 'col': col_index, 'value': value}
+
+    def _cell(self, row_key, col_key):
+        if (row_key, col_key) in self.overlay:
+            return self.overlay[(row_key, col_key)]
+        if row_key < self.base_row_count and col_key < self.base_col_count:
+            row = self.base_data[row_key]
+            return row[col_key] if col_key < len(row) else None
+        return None
+
+    def get_data(self) -> Dict[str, Any]:
+        """Aktueller Stand (Basis + Positionslisten + Overlay)"""
+        error = self._require_open()
+        if error:
+            return error
+        col_keys = list(self.columns.keys())
+        data = [[self._cell(row_key, col_key) for col_key in col_keys] for row_key in self.rows.keys()]
+        return {'success': True, 'headers': self._current_headers(col_keys), 'data': data}
@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+Excel Month Batch - viele Monatsdateien aus EINER Vorlage ("Neuer Monat")
+
+Zum Monatsende entstehen aus einer Vorlage Dateien für jede Abteilung.
+Bisher: pro Datei Vorlage kopieren, mit xlsx-populate laden, Sheet
+umbenennen, speichern. Hier wird die Vorlage EINMAL gelesen (rohe,
+komprimierte Members + entpackte XML-Teile) und jede Ausgabe nur durch
+Patchen im Speicher erzeugt:
+
+- Sheet-Name (mit Formeln, definierten Namen, Diagrammen - excel_sheet_ops)
+- Header-Zellen (als Inline-Strings, sharedStrings.xml bleibt unverändert)
+
+Alle anderen Members (Styles, bedingte Formatierung im Sheet, Bilder ...)
+werden roh übernommen. Große Sheets, deren Formeln den Sheet-Namen enthalten
+(bedingte Formatierung, Filter), werden beim Lesen der Vorlage in Segmente
+zerlegt: unveränderliche Abschnitte einmal komprimiert, pro Datei nur die
+betroffenen Formeln/Zeilen - die DEFLATE-Blöcke werden aneinandergehängt.
+Die Dateien werden auf Worker-Prozesse verteilt.
+
+Konfiguration (JSON auf stdin):
+    {
+      "templatePath": "...",
+      "sheetName": "Vorlage",                 # optional, sonst aktives Sheet
+      "sheetNamePattern": "{month}",          # optional, Platzhalter aus dem Job
+      "cells": {"A1": "{department} {month}"},# optional, Header-Zellen
+      "jobs": [{"outputPath": "...", "department": "Vertrieb", "month": "2026-10",
+                "cells": {...}, "sheetName": "..."}],   # cells/sheetName je Job optional
+      "compression": "default", "workers": 4
+    }
+
+Ausgabe (NDJSON auf stdout):
+    {"type": "template", "members": n, "jobs": n, "workers": n}
+    {"type": "file", "index": i, "outputPath": "...", "success": true, "durationMs": ...}
+    {"type": "done", "success": true, "files": n, "failed": n, "filesPerSecond": ...}
+
+Nur Standardbibliothek (das eingebettete Windows-Python hat kein lxml).
+"""
+
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+from xml.sax.saxutils import escape
+
+from excel_sheet_ops import (SheetOpError, _FORMULA_RE, _Package, _Workbook, _decode, _name_needles,
+                             _quote_sheet_name, _rewrite_formulas, apply_rename, replace_sheet_refs, validate_sheet_name)
+from excel_zip_writer import (DeflatedMember, _deflate_block, get_output_compression,
+                              read_raw_archive, resolve_compression, write_passthrough_archive)
+
+# Ab so vielen Dateien lohnen sich Worker-Prozesse (Start ~100 ms pro Prozess)
+PARALLEL_MIN_JOBS = 8
+# Maximale Anzahl Worker-Prozesse
+MAX_WORKERS = 4
+# Ab dieser Größe werden Worksheet-Teile in Segmente zerlegt (siehe _prepare_segments)
+SEGMENT_MIN_BYTES = 256 * 1024
+
+_PLACEHOLDER_RE = re.compile(r'\{(\w+)\}')
+_CELL_REF_RE = re.compile(r'^([A-Z]{1,3})(\d+)$')
+
+
+# =============================================================================
+# Vorlage
+# =============================================================================
+
+def load_template(template_path: str, sheet_name: Optional[str] = None,
+                  header_rows: Optional[List[int]] = None, compression=None) -> Dict[str, Any]:
+    """
+    Liest die Vorlage einmal: ZipInfos, rohe komprimierte Bytes, die
+    entpackten Members (für das Patchen pro Datei) und die Segmente großer
+    Worksheets.
+
+    Args:
+        header_rows: Zeilen, in die Header-Zellen geschrieben werden
+        compression: Kompression der Ausgabe (für die Segmente)
+    """
+    items, raw = read_raw_archive(template_path)
+    with zipfile.ZipFile(template_path, 'r') as zf:
+        parts = {item.filename: zf.read(item.filename) for item in items}
+
+    package = _Package(None, parts)
+    workbook = _Workbook(package)
+    names = workbook.names
+    if sheet_name is None:
+        view = re.search(r'<(?:\w+:)?workbookView\b[^>]*\bactiveTab="(\d+)"', workbook.text)
+        index = int(view.group(1)) if view and int(view.group(1)) < len(names) else 0
+    elif sheet_name in names:
+        index = names.index(sheet_name)
+    else:
+        raise SheetOpError(f'Sheet "{sheet_name}" nicht in der Vorlage gefunden')
+
+    template = {'path': template_path, 'items': items, 'raw': raw, 'parts': parts,
+                'sheetIndex': index, 'sheetName': names[index], 'segments': {}, 'static': set()}
+
+    method, level = resolve_compression(compression if compression is not None else get_output_compression())
+    if method == zipfile.ZIP_DEFLATED:
+        template_part = workbook.sheet_part(index)
+        for i in range(len(names)):
+            part = workbook.sheet_part(i)
+            if len(parts.get(part, b'')) < SEGMENT_MIN_BYTES:
+                continue
+            rows = header_rows if part == template_part else None
+            segments = _prepare_segments(_decode(parts[part]), names[index], rows or [], level)
+            if segments is None:
+                continue
+            if segments['dynamic']:
+                template['segments'][part] = segments
+            else:
+                template['static'].add(part)  # Keine Formel mit dem Sheet-Namen - bleibt roh
+    return template
+
+
+def _prepare_segments(text: str, sheet_name: str, rows: List[int], level: int) -> Optional[Dict[str, Any]]:
+    """
+    Zerlegt ein großes Sheet-XML in feste und veränderliche Abschnitte.
+
+    Veränderlich sind Formel-Elemente, die sheet_name referenzieren, und die
+    Header-Zeilen. Feste Abschnitte werden EINMAL komprimiert (Z_SYNC_FLUSH,
+    byte-aligned) - pro Datei werden nur die veränderlichen Abschnitte
+    komprimiert und alle Blöcke aneinandergehängt.
+
+    Returns:
+        {'pieces': [(fest?, Text oder komprimierte Bytes, Bytes)], 'dynamic': n, 'rows': {...}}
+        oder None, wenn eine Header-Zeile in der Vorlage fehlt (dann ganzes XML patchen)
+    """
+    spans = []
+    for row in rows:
+        match = re.search(r'<row\b[^>]*\br="%d"[^>]*?(?:/>|>.*?</row>)' % row, text, re.S)
+        if not match:
+            return None
+        spans.append((match.start(), match.end()))
+
+    lowered = text.lower()
+    if any(needle.decode('utf-8') in lowered for needle in _name_needles(sheet_name)):
+        for match in _FORMULA_RE.finditer(text):
+            if replace_sheet_refs(match.group(3), sheet_name, '\x00') != match.group(3):
+                spans.append((match.start(), match.end()))
+
+    # Überlappende Abschnitte (Formel in einer Header-Zeile) zusammenfassen
+    merged: List[List[int]] = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+
+    pieces = []
+    position = 0
+    for start, end in merged:
+        data = text[position:start].encode('utf-8')
+        pieces.append((True, _deflate_block(data, level, None, False), data))
+        pieces.append((False, text[start:end], None))
+        position = end
+    data = text[position:].encode('utf-8')
+    pieces.append((True, _deflate_block(data, level, None, True), data))
+    return {'pieces': pieces, 'dynamic': len(merged), 'rows': set(rows), 'level': level}
+
+
+def _render_segments(segments: Dict[str, Any], old_name: str, prefix: Optional[str],
+                     by_row: Dict[int, Dict[int, tuple]]) -> DeflatedMember:
+    """Segmente einer Ausgabe zusammensetzen: feste Blöcke + neu komprimierte Abschnitte"""
+    blocks, crc, size = [], 0, 0
+    for is_static, content, data in segments['pieces']:
+        if not is_static:
+            if prefix:
+                content = _rewrite_formulas(content, old_name, prefix)
+            if by_row:
+                content = _patch_rows(content, by_row, insert_missing=False)
+            data = content.encode('utf-8')
+            content = _deflate_block(data, segments['level'], None, False)
+        blocks.append(content)
+        crc = zlib.crc32(data, crc)
+        size += len(data)
+    return DeflatedMember(crc & 0xFFFFFFFF, size, blocks)
+
+
+# =============================================================================
+# Patchen
+# =============================================================================
+
+def fill_placeholders(text: str, values: Dict[str, Any]) -> str:
+    """'{department} {month}' -> 'Vertrieb 2026-10' (unbekannte Platzhalter bleiben stehen)"""
+    return _PLACEHOLDER_RE.sub(lambda m: str(values[m.group(1)]) if m.group(1) in values else m.group(0), text)
+
+
+def _column_number(letters: str) -> int:
+    number = 0
+    for ch in letters:
+        number = number * 26 + ord(ch) - 64
+    return number
+
+
+def _cell_xml(ref: str, value: Any, style: Optional[str]) -> str:
+    style_attr = f' s="{style}"' if style else ''
+    if value is None or value == '':
+        return f'<c r="{ref}"{style_attr}/>'
+    if isinstance(value, bool):
+        return f'<c r="{ref}"{style_attr} t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c r="{ref}"{style_attr}><v>{value}</v></c>'
+    return (f'<c r="{ref}"{style_attr} t="inlineStr"><is><t xml:space="preserve">'
+            f'{escape(str(value))}</t></is></c>')
+
+
+def _cells_by_row(cells: Dict[str, Any]) -> Dict[int, Dict[int, tuple]]:
+    """{'B1': wert} -> {zeile: {spalte: ('B1', wert)}}"""
+    by_row: Dict[int, Dict[int, tuple]] = {}
+    for ref, value in cells.items():
+        match = _CELL_REF_RE.match(ref.upper().replace('$', ''))
+        if not match:
+            raise SheetOpError(f'Ungültige Zelladresse: {ref}')
+        by_row.setdefault(int(match.group(2)), {})[_column_number(match.group(1))] = (match.group(0), value)
+    return by_row
+
+
+def _patch_rows(rows_xml: str, by_row: Dict[int, Dict[int, tuple]], insert_missing: bool = True) -> str:
+    """Zellwerte in <row>-Elementen setzen (fehlende Zeilen/Zellen in Reihenfolge einfügen)"""
+    for row_number, row_cells in sorted(by_row.items()):
+        row_match = re.search(r'<row\b[^>]*\br="%d"[^>]*?(?:/>|>(.*?)</row>)' % row_number, rows_xml, re.S)
+        if not row_match and not insert_missing:
+            continue
+        if row_match:
+            open_tag = row_match.group(0)[:row_match.group(0).index('>') + 1]
+            if open_tag.endswith('/>'):
+                open_tag = open_tag[:-2] + '>'
+            existing = re.findall(r'<c\b[^>]*?(?:/>|>.*?</c>)', row_match.group(1) or '', re.S)
+        else:
+            open_tag = f'<row r="{row_number}">'
+            existing = []
+
+        cells_by_col = {}
+        for cell in existing:
+            ref = re.search(r'\br="([A-Z]+)\d+"', cell)
+            cells_by_col[_column_number(ref.group(1)) if ref else len(cells_by_col) + 1] = cell
+        for col, (ref, value) in row_cells.items():
+            style = None
+            if col in cells_by_col:
+                style_match = re.search(r'\bs="(\d+)"', cells_by_col[col][:cells_by_col[col].index('>')])
+                style = style_match.group(1) if style_match else None
+            cells_by_col[col] = _cell_xml(ref, value, style)
+        row_xml = open_tag + ''.join(cells_by_col[col] for col in sorted(cells_by_col)) + '</row>'
+
+        if row_match:
+            rows_xml = rows_xml[:row_match.start()] + row_xml + rows_xml[row_match.end():]
+        else:
+            # Vor der ersten Zeile mit größerer Nummer einfügen
+            position = len(rows_xml)
+            for later in re.finditer(r'<row\b[^>]*\br="(\d+)"', rows_xml):
+                if int(later.group(1)) > row_number:
+                    position = later.start()
+                    break
+            rows_xml = rows_xml[:position] + row_xml + rows_xml[position:]
+    return rows_xml
+
+
+def set_cell_values(sheet_xml: str, cells: Dict[str, Any]) -> str:
+    """
+    Setzt Zellwerte im Sheet-XML (Format der Zelle bleibt erhalten).
+    Für die wenigen Header-Zellen einer Vorlage - Zeilen und Zellen werden
+    bei Bedarf in der richtigen Reihenfolge eingefügt.
+    """
+    by_row = _cells_by_row(cells)
+    data = re.search(r'<sheetData\s*/>|<sheetData\b[^>]*>(.*?)</sheetData>', sheet_xml, re.S)
+    if not data:
+        raise SheetOpError('Sheet-XML ohne <sheetData>')
+    rows_xml = _patch_rows(data.group(1) or '', by_row)
+    return sheet_xml[:data.start()] + '<sheetData>' + rows_xml + '</sheetData>' + sheet_xml[data.end():]
+
+
+def build_month_file(template: Dict[str, Any], job: Dict[str, Any], defaults: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Erzeugt eine Ausgabedatei aus der Vorlage.
+
+    Args:
+        job: outputPath, Platzhalter-Werte (department, month, ...), optional
+             sheetName/cells als Überschreibung der Vorgaben
+        defaults: sheetNamePattern, cells, compression aus der Konfiguration
+    """
+    output_path = job['outputPath']
+    values = {key: value for key, value in job.items() if not isinstance(value, (dict, list))}
+    package = _Package(None, template['parts'])
+    workbook = _Workbook(package)
+    index = template['sheetIndex']
+
+    segments = template['segments']
+    old_name = template['sheetName']
+    prefix = None
+
+    pattern = job.get('sheetName') or defaults.get('sheetNamePattern')
+    if pattern:
+        new_name = fill_placeholders(pattern, values)
+        if new_name != old_name:
+            validate_sheet_name(new_name)
+            if workbook.has_name(new_name, ignore_index=index):
+                raise SheetOpError(f'Ein Arbeitsblatt mit dem Namen "{new_name}" existiert bereits')
+            apply_rename(package, workbook, index, new_name, skip_parts=set(segments) | template['static'])
+            prefix = _quote_sheet_name(new_name)
+
+    cells = dict(defaults.get('cells') or {})
+    cells.update(job.get('cells') or {})
+    by_row = {}
+    if cells:
+        part = workbook.sheet_part(index)
+        filled = {ref: fill_placeholders(value, values) if isinstance(value, str) else value
+                  for ref, value in cells.items()}
+        by_row = _cells_by_row(filled)
+        if part not in segments or any(row not in segments[part]['rows'] for row in by_row):
+            # Kleines Sheet (oder Zeile ohne eigenen Abschnitt): ganzes XML patchen
+            segments = {name: seg for name, seg in segments.items() if name != part}
+            text = package.read_text(part)
+            if prefix:
+                text = _rewrite_formulas(text, old_name, prefix)
+            package.write_text(part, set_cell_values(text, filled))
+
+    replacements: Dict[str, Any] = dict(package.changes)
+    if prefix or by_row:
+        for part, segment in segments.items():
+            replacements[part] = _render_segments(segment, old_name, prefix,
+                                                  by_row if segment['rows'] else {})
+
+    directory = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(suffix='.xlsx', prefix='.month-', dir=directory)
+    os.close(fd)
+    try:
+        raw = template['raw']
+        stats = write_passthrough_archive(temp_path, template['items'], lambda item: raw[item.filename],
+                                          replacements, list(package.added.items()),
+                                          compression=defaults.get('compression'))
+        os.replace(temp_path, output_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return {'sheetName': workbook.names[index], 'copiedMembers': stats['copied'],
+            'writtenMembers': stats['written']}
+
+
+# =============================================================================
+# Batch
+# =============================================================================
+
+_worker_state: Optional[Dict[str, Any]] = None
+
+
+def _init_worker(template: Dict[str, Any], defaults: Dict[str, Any]):
+    """Initializer: Vorlage einmal pro Prozess übernehmen"""
+    global _worker_state
+    _worker_state = {'template': template, 'defaults': defaults}
+
+
+def _build_in_worker(index: int, job: Dict[str, Any]) -> Dict[str, Any]:
+    start = time.time()
+    record = {'type': 'file', 'index': index, 'outputPath': job.get('outputPath')}
+    try:
+        if not job.get('outputPath'):
+            raise SheetOpError('Kein Ausgabepfad angegeben')
+        record.update(build_month_file(_worker_state['template'], job, _worker_state['defaults']))
+        record['success'] = True
+    except Exception as e:
+        record.update({'success': False, 'error': str(e)})
+    record['durationMs'] = int((time.time() - start) * 1000)
+    return record
+
+
+def run_month_batch(config: Dict[str, Any], emit=None, max_workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Erzeugt alle Dateien aus config['jobs'] und übergibt jedes Ergebnis
+    sofort an emit(record). Gibt den Abschluss-Datensatz zurück.
+    """
+    start = time.time()
+    emit = emit or (lambda record: None)
+    header_rows = set()
+    for cells in [config.get('cells') or {}] + [job.get('cells') or {} for job in config.get('jobs') or []]:
+        header_rows.update(_cells_by_row(cells))
+    template = load_template(config['templatePath'], config.get('sheetName'), sorted(header_rows),
+                             config.get('compression'))
+    defaults = {'sheetNamePattern': config.get('sheetNamePattern'), 'cells': config.get('cells') or {},
+                'compression': config.get('compression')}
+    jobs = list(enumerate(config.get('jobs') or []))
+
+    max_workers = max_workers or config.get('workers')
+    workers = min(len(jobs), max_workers or MAX_WORKERS, os.cpu_count() or 1)
+    if len(jobs) < 2 or (max_workers is None and len(jobs) < PARALLEL_MIN_JOBS):
+        workers = 0  # Wenige Dateien: Prozessstart wäre teurer als das Schreiben
+
+    emit({'type': 'template', 'sheetName': template['sheetName'], 'members': len(template['items']),
+          'jobs': len(jobs), 'workers': workers})
+
+    results: Dict[int, Dict[str, Any]] = {}
+    pending = dict(jobs)
+    if workers:
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(template, defaults)) as pool:
+                futures = [pool.submit(_build_in_worker, index, job) for index, job in jobs]
+                for future in as_completed(futures):
+                    record = future.result()
+                    pending.pop(record['index'], None)
+                    results[record['index']] = record
+                    emit(record)
+        except Exception as e:
+            # Pool nicht verfügbar oder abgestürzt: Rest im eigenen Prozess erzeugen
+            print(f'[MonthBatch] Worker-Prozesse fehlgeschlagen ({e}) - erzeuge sequentiell', file=sys.stderr)
+
+    _init_worker(template, defaults)
+    for index, job in sorted(pending.items()):
+        record = _build_in_worker(index, job)
+        results[index] = record
+        emit(record)
+
+    duration = time.time() - start
+    failed = sum(1 for record in results.values() if not record['success'])
+    return {'type': 'done', 'success': failed == 0, 'files': len(jobs) - failed, 'failed': failed,
+            'workers': workers, 'durationMs': int(duration * 1000),
+            'filesPerSecond': round(len(jobs) / duration, 1) if duration > 0 else None}
+
+
+def main():
+    """Hauptfunktion - Konfiguration als JSON über stdin, Ergebnis als NDJSON"""
+    import io
+    if sys.platform == 'win32':
+        sys.stdin = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    def emit(record):
+        sys.stdout.write(json.dumps(record, ensure_ascii=False) + '\n')
+        sys.stdout.flush()
+
+    try:
+        config = json.loads(sys.stdin.read())
+        if not config.get('templatePath'):
+            raise SheetOpError('Keine Vorlage angegeben')
+        emit(run_month_batch(config, emit))
+    except Exception as e:
+        emit({'type': 'done', 'success': False, 'error': str(e)})
+
+
+if __name__ == '__main__':
+    main()
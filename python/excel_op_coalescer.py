@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Excel Op Coalescer - Zusammenfassen von Zeilen-/Spalten-Operationen
+
+Sitzt zwischen Protokoll (batch-Befehl der Live-Session) und Backend.
+Aufeinanderfolgende strukturelle Befehle werden zu möglichst wenigen
+zusammenhängenden Bereichs-Operationen zusammengefasst:
+
+- deleteRow/deleteColumn-Folgen  -> EIN Löschen über alle Bereiche
+  (Indizes beziehen sich auf den Stand VOR der Folge)
+- insertRow/insertColumn an angrenzenden Positionen -> EIN Einfügen
+- moveRow/moveColumn-Ketten      -> EINE Permutation eines Fensters
+
+Das Ergebnis ist identisch zur Einzel-Ausführung der Befehle in Reihenfolge.
+Reine Python-Logik ohne Excel - das Backend führt die Schritte aus.
+"""
+
+from bisect import insort
+from typing import Any, Dict, List, Optional
+
+# Aktion -> (Art, Achse)
+_STRUCTURAL = {
+    'deleteRow': ('delete', 'row'),
+    'insertRow': ('insert', 'row'),
+    'moveRow': ('move', 'row'),
+    'deleteColumn': ('delete', 'column'),
+    'insertColumn': ('insert', 'column'),
+    'moveColumn': ('move', 'column'),
+}
+
+_INDEX_KEY = {'row': 'rowIndex', 'column': 'colIndex'}
+
+# Eine Permutation kostet Einfügen + Kopie pro Block + Löschen. Einzelne Moves
+# kosten je Einfügen + Kopie + Löschen. Nur zusammenfassen, wenn es weniger Aufrufe sind.
+CALLS_PER_MOVE = 3
+
+
+def _is_index(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+def _to_ranges(indices: List[int]) -> List[tuple]:
+    """Sortierte Indizes -> [(start, count), ...] zusammenhängender Bereiche"""
+    ranges = []
+    for idx in indices:
+        if ranges and ranges[-1][0] + ranges[-1][1] == idx:
+            ranges[-1][1] += 1
+        else:
+            ranges.append([idx, 1])
+    return [tuple(r) for r in ranges]
+
+
+def permutation_runs(order: List[int]) -> List[tuple]:
+    """
+    Zerlegt eine Permutation in Blöcke, die am Stück kopiert werden können:
+    [(quell_offset, ziel_offset, länge), ...]
+    """
+    runs = []
+    for target, source in enumerate(order):
+        if runs and runs[-1][0] + runs[-1][2] == source and runs[-1][1] + runs[-1][2] == target:
+            runs[-1][2] += 1
+        else:
+            runs.append([source, target, 1])
+    return [tuple(r) for r in runs]
+
+
+class _Group:
+    """Offene Gruppe gleichartiger Befehle"""
+
+    def __init__(self, kind: str, axis: str):
+        self.kind = kind
+        self.axis = axis
+        self.members: List[int] = []
+        # delete: Original-Indizes (sortiert)
+        self.deleted: List[int] = []
+        # insert: Position, Anzahl, Header
+        self.position = 0
+        self.count = 0
+        self.headers: List[Any] = []
+        # move: Liste der Züge
+        self.moves: List[tuple] = []
+
+    def try_add(self, cmd: Dict[str, Any]) -> bool:
+        if self.kind == 'delete':
+            return self._add_delete(cmd.get(_INDEX_KEY[self.axis]))
+        if self.kind == 'insert':
+            return self._add_insert(cmd)
+        return self._add_move(cmd.get('fromIndex'), cmd.get('toIndex'))
+
+    def _add_delete(self, index) -> bool:
+        if not _is_index(index):
+            return False
+        # Aktuellen Index auf den Stand vor der Gruppe zurückrechnen
+        original = index
+        for deleted in self.deleted:
+            if deleted <= original:
+                original += 1
+            else:
+                break
+        insort(self.deleted, original)
+        return True
+
+    def _add_insert(self, cmd) -> bool:
+        position = cmd.get(_INDEX_KEY[self.axis])
+        count = cmd.get('count', 1)
+        if not _is_index(position) or not _is_index(count) or count == 0:
+            return False
+        headers = list(cmd.get('headers') or [])[:count]
+        headers += [None] * (count - len(headers))
+        if not self.members:
+            self.position, self.count, self.headers = position, count, headers
+            return True
+        # Angrenzend/innerhalb des bisherigen Blocks: leere Zeilen/Spalten verschmelzen
+        if self.position <= position <= self.position + self.count:
+            offset = position - self.position
+            self.headers[offset:offset] = headers
+            self.count += count
+            return True
+        return False
+
+    def _add_move(self, from_index, to_index) -> bool:
+        if not _is_index(from_index) or not _is_index(to_index):
+            return False
+        self.moves.append((from_index, to_index))
+        return True
+
+    def to_step(self) -> Optional[Dict[str, Any]]:
+        """Schritt für das Backend; None = Einzel-Ausführung ist günstiger"""
+        if self.kind == 'delete':
+            if len(self.members) < 2:
+                return None
+            # Absteigend: Backend löscht von unten nach oben
+            return {'kind': 'delete', 'axis': self.axis, 'members': self.members,
+                    'ranges': list(reversed(_to_ranges(self.deleted)))}
+
+        if self.kind == 'insert':
+            if len(self.members) < 2:
+                return None
+            return {'kind': 'insert', 'axis': self.axis, 'members': self.members,
+                    'position': self.position, 'count': self.count,
+                    'headers': self.headers if any(h is not None for h in self.headers) else None}
+
+        if len(self.moves) < 2:
+            return None
+        start = min(min(f, t) for f, t in self.moves)
+        end = max(max(f, t) for f, t in self.moves)
+        order = list(range(end - start + 1))
+        for from_index, to_index in self.moves:
+            order.insert(to_index - start, order.pop(from_index - start))
+        runs = permutation_runs(order)
+        identity = len(runs) == 1
+        if not identity and len(runs) + 2 >= CALLS_PER_MOVE * len(self.moves):
+            return None
+        return {'kind': 'permute', 'axis': self.axis, 'members': self.members,
+                'start': start, 'order': order}
+
+
+def coalesce_commands(commands: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Plant die Ausführung einer Befehlsliste.
+
+    Returns:
+        Liste von Schritten in Ausführungsreihenfolge:
+        - {'kind': 'single', 'members': [i]}                       einzeln ausführen
+        - {'kind': 'delete', 'axis', 'members', 'ranges'}           Bereiche (absteigend)
+        - {'kind': 'insert', 'axis', 'members', 'position', 'count', 'headers'}
+        - {'kind': 'permute', 'axis', 'members', 'start', 'order'}  order[ziel] = quelle
+    """
+    steps: List[Dict[str, Any]] = []
+    group: Optional[_Group] = None
+
+    def flush():
+        if group is None:
+            return
+        step = group.to_step()
+        if step is None:
+            steps.extend({'kind': 'single', 'members': [i]} for i in group.members)
+        else:
+            steps.append(step)
+
+    for i, cmd in enumerate(commands):
+        action = cmd.get('action') if isinstance(cmd, dict) else None
+        spec = _STRUCTURAL.get(action)
+
+        if spec and group is not None and (group.kind, group.axis) == spec and group.try_add(cmd):
+            group.members.append(i)
+            continue
+
+        flush()
+        group = None
+        if spec:
+            candidate = _Group(*spec)
+            if candidate.try_add(cmd):
+                candidate.members.append(i)
+                group = candidate
+                continue
+        steps.append({'kind': 'single', 'members': [i]})
+
+    flush()
+    return steps
+
+
+def member_result(cmd: Dict[str, Any]) -> Dict[str, Any]:
+    """Antwort eines zusammengefassten Befehls (wie bei Einzel-Ausführung)"""
+    action = cmd.get('action')
+    if action == 'deleteRow':
+        return {'success': True, 'deletedRow': cmd.get('rowIndex')}
+    if action == 'deleteColumn':
+        return {'success': True, 'deletedColumn': cmd.get('colIndex')}
+    if action in ('insertRow', 'insertColumn'):
+        return {'success': True, 'insertedAt': cmd.get(_INDEX_KEY[_STRUCTURAL[action][1]]),
+                'count': cmd.get('count', 1)}
+    return {'success': True, 'movedFrom': cmd.get('fromIndex'), 'movedTo': cmd.get('toIndex')}
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Cache für entschlüsselte Pakete passwortgeschützter Quelldateien
+
+Bisher wurde eine Datei mit Passwort bei jedem Lesen, Export und Speichern
+in JS komplett entschlüsselt (xlsx-populate) und als temporäre Datei ohne
+Passwort auf die Platte geschrieben.
+
+Hier wird einmal pro (Datei-Fingerprint, Passwort-Hash) entschlüsselt
+(excel_package_crypto) und der Klartext (das ZIP) in einem anonymen mmap
+gehalten - außerhalb des Python-Heaps, nie auf der Platte. Reader und Writer
+bekommen ein seekbares Datei-Objekt darauf (zipfile/openpyxl nehmen es
+direkt). Sinnvoll in einem langlebigen Prozess (excel_package_worker.py).
+
+- Fingerprint: Pfad + Größe + mtime_ns - eine geänderte Datei wird neu entschlüsselt
+- Passwort: nur als HMAC-SHA256 mit einem zufälligen Prozess-Schlüssel im Key
+- Budget (Bytes, EXCEL_SYNC_DECRYPT_CACHE_MB): LRU, ältere Einträge werden verdrängt
+- Verdrängte Einträge werden mit Nullen überschrieben, sobald kein Reader mehr offen ist
+"""
+
+import hashlib
+import hmac
+import io
+import mmap
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+from excel_package_crypto import iter_decrypted, is_encrypted, PackageCryptoError
+
+# Umgebungsvariable für das Speicher-Budget (MB)
+BUDGET_ENV = 'EXCEL_SYNC_DECRYPT_CACHE_MB'
+DEFAULT_BUDGET_MB = 512
+
+# Schlüssel für die Passwort-Hashes - lebt nur in diesem Prozess
+_PROCESS_SECRET = os.urandom(32)
+
+_ZERO_CHUNK = bytes(1024 * 1024)
+
+
+def _password_digest(password):
+    return hmac.new(_PROCESS_SECRET, password.encode('utf-8'), hashlib.sha256).digest()
+
+
+def _fingerprint(path):
+    st = os.stat(path)
+    return (os.path.normcase(os.path.realpath(path)), st.st_size, st.st_mtime_ns)
+
+
+class _Plaintext:
+    """Entschlüsseltes Paket in einem anonymen mmap (Fallback: bytearray)"""
+
+    def __init__(self, size):
+        self.size = size
+        try:
+            self.buffer = mmap.mmap(-1, max(size, 1))
+        except (OSError, ValueError):
+            self.buffer = bytearray(max(size, 1))
+        self.filled = 0
+        self.readers = 0
+        self.evicted = False
+
+    def append(self, chunk):
+        end = self.filled + len(chunk)
+        if end > self.size:
+            raise PackageCryptoError('Entschlüsseltes Paket größer als angegeben')
+        self.buffer[self.filled:end] = chunk
+        self.filled = end
+
+    def zeroize(self):
+        """Klartext überschreiben und Speicher freigeben"""
+        if self.buffer is None:
+            return
+        for start in range(0, len(self.buffer), len(_ZERO_CHUNK)):
+            end = min(start + len(_ZERO_CHUNK), len(self.buffer))
+            self.buffer[start:end] = _ZERO_CHUNK[:end - start]
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+        self.buffer = None
+
+
+class PackageReader(io.RawIOBase):
+    """
+    Seekbare Sicht auf ein entschlüsseltes Paket (für zipfile.ZipFile / load_workbook).
+    Hält den Eintrag, bis close() aufgerufen wird.
+    """
+
+    def __init__(self, cache, plaintext, label):
+        super().__init__()
+        self._cache = cache
+        self._plaintext = plaintext
+        self._position = 0
+        self.name = label
+
+    def __repr__(self):
+        return f'<entschlüsselt: {os.path.basename(self.name)}>'
+
+    __str__ = __repr__
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, target):
+        if self.closed:
+            raise ValueError('Reader ist geschlossen')
+        size = self._plaintext.size
+        count = max(0, min(len(target), size - self._position))
+        target[:count] = self._plaintext.buffer[self._position:self._position + count]
+        self._position += count
+        return count
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self._plaintext.size + offset
+        else:
+            raise ValueError(f'Ungültiges whence: {whence}')
+        if position < 0:
+            raise ValueError('Negative Position')
+        self._position = position
+        return position
+
+    def tell(self):
+        return self._position
+
+    def close(self):
+        if not self.closed:
+            self._cache._release(self._plaintext)
+        super().close()
+
+
+class DecryptedPackageCache:
+    """LRU-Cache entschlüsselter Pakete mit Speicher-Budget"""
+
+    def __init__(self, budget_bytes=None):
+        if budget_bytes is None:
+            budget_bytes = int(float(os.environ.get(BUDGET_ENV) or DEFAULT_BUDGET_MB) * 1024 * 1024)
+        self.budget = budget_bytes
+        self._entries = OrderedDict()   # (Fingerprint, Passwort-Hash) -> _Plaintext
+        self._lock = threading.Lock()
+        self._size = 0
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'uncached': 0}
+
+    def open(self, path, password):
+        """
+        Reader auf den Klartext von path - beim ersten Zugriff wird entschlüsselt.
+
+        Raises:
+            PackageCryptoError bei falschem Passwort bzw. ungültiger Datei
+        """
+        fingerprint = _fingerprint(path)
+        key = (fingerprint, _password_digest(password))
+        with self._lock:
+            plaintext = self._entries.get(key)
+            if plaintext is not None:
+                self._entries.move_to_end(key)
+                plaintext.readers += 1
+                self._stats['hits'] += 1
+                return PackageReader(self, plaintext, path)
+            self._stats['misses'] += 1
+            # Ältere Stände derselben Datei sind nicht mehr gültig
+            for stale in [k for k in self._entries if k[0][0] == fingerprint[0] and k[0] != fingerprint]:
+                self._evict(stale)
+
+        plaintext = self._decrypt(path, password)
+        with self._lock:
+            plaintext.readers += 1
+            if plaintext.size > self.budget or key in self._entries:
+                # Zu groß für den Cache (bzw. parallel schon entschlüsselt): nur für diesen Reader
+                plaintext.evicted = True
+                self._stats['uncached'] += 1
+            else:
+                self._entries[key] = plaintext
+                self._size += plaintext.size
+                while self._size > self.budget:
+                    self._evict(next(iter(self._entries)))
+        sys.stderr.write(f"[PackageCache] Entschlüsselt: {os.path.basename(path)} "
+                         f"({plaintext.size / 1024 / 1024:.1f} MB)\n")
+        return PackageReader(self, plaintext, path)
+
+    def _decrypt(self, path, password):
+        holder = {}
+
+        def allocate(size):
+            holder['plaintext'] = _Plaintext(size)
+
+        try:
+            for chunk in iter_decrypted(path, password, on_size=allocate):
+                holder['plaintext'].append(chunk)
+        except BaseException:
+            if 'plaintext' in holder:
+                holder['plaintext'].zeroize()
+            raise
+        plaintext = holder['plaintext']
+        if plaintext.filled != plaintext.size:
+            plaintext.zeroize()
+            raise PackageCryptoError('Entschlüsseltes Paket unvollständig')
+        return plaintext
+
+    def _evict(self, key):
+        """Eintrag entfernen (Lock gehalten) - Zeroize sofort oder beim letzten Reader"""
+        plaintext = self._entries.pop(key)
+        self._size -= plaintext.size
+        plaintext.evicted = True
+        self._stats['evictions'] += 1
+        if plaintext.readers == 0:
+            plaintext.zeroize()
+
+    def _release(self, plaintext):
+        with self._lock:
+            plaintext.readers -= 1
+            if plaintext.evicted and plaintext.readers == 0:
+                plaintext.zeroize()
+
+    def evict(self, path=None):
+        """Einträge einer Datei (bzw. alle) verwerfen. Returns: Anzahl"""
+        with self._lock:
+            target = os.path.normcase(os.path.realpath(path)) if path else None
+            keys = [k for k in self._entries if target is None or k[0][0] == target]
+            for key in keys:
+                self._evict(key)
+            return len(keys)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), size=self._size, budget=self.budget)
+
+
+_cache = None
+
+
+def get_package_cache(budget_bytes=None):
+    """Prozessweiter Cache (lazy) - budget_bytes gilt nur beim ersten Aufruf"""
+    global _cache
+    if _cache is None:
+        _cache = DecryptedPackageCache(budget_bytes)
+    return _cache
+
+
+# =============================================================================
+# Quellen für Reader und Writer: Pfad oder entschlüsseltes Paket
+# =============================================================================
+
+def open_source(path, password=None):
+    """
+    Quelle zum Lesen: der Pfad selbst oder - bei verschlüsselter Datei mit
+    Passwort - ein PackageReader aus dem Cache. Mit close_source freigeben.
+    """
+    if password and path and is_encrypted(path):
+        return get_package_cache().open(path, password)
+    return path
+
+
+def close_source(source):
+    if isinstance(source, PackageReader):
+        source.close()
+
+
+def source_exists(source):
+    """os.path.exists für Pfade und entschlüsselte Pakete"""
+    if isinstance(source, PackageReader):
+        return not source.closed
+    return bool(source) and os.path.exists(source)
+
+
+def copy_source(source, target_path):
+    """Quelle (Pfad oder entschlüsseltes Paket) nach target_path kopieren"""
+    if not isinstance(source, PackageReader):
+        from excel_staging import fast_copy
+        fast_copy(source, target_path)
+        return
+    source.seek(0)
+    with open(target_path, 'wb') as out:
+        while True:
+            chunk = source.read(1024 * 1024)
+            if not chunk:
+                break
+            out.write(chunk)
+
+
+def copy_package(source_path, target_path, source_password=None, password=None):
+    """
+    Quelle unverändert übernehmen - entschlüsselt (bzw. mit password neu
+    verschlüsselt), atomar über eine Staging-Datei im Zielverzeichnis.
+    """
+    from excel_staging import StagedOutput
+    from excel_package_crypto import encrypt_package
+    source = open_source(source_path, source_password)
+    try:
+        with StagedOutput(target_path) as staged:
+            if password:
+                encrypt_package(source, staged.path, password)
+            else:
+                copy_source(source, staged.path)
+            staged.commit()
+    finally:
+        close_source(source)
+    return {'success': True, 'outputPath': target_path, 'encrypted': bool(password)}
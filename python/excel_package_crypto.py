@@ -0,0 +1,740 @@
+#!/usr/bin/env python3
+"""
+Passwortschutz für XLSX-Ausgaben (ECMA-376 Agile Encryption)
+
+Bisher wurde die fertige Ausgabe mit xlsx-populate ein zweites Mal komplett
+geladen und mit {password} gespeichert. Hier ist die Verschlüsselung eine
+Ausgabestufe des ZIP-Writers (excel_zip_writer): das Paket wird beim
+Schreiben in 4096-Byte-Segmenten verschlüsselt (AES-CBC, IV pro Segment)
+und direkt als Sektoren in den CFB-Container (Compound File, Version 4)
+geschrieben. Im Speicher liegt nie mehr als ein Segment-Puffer.
+
+Format wie bei xlsx-populate (Streams EncryptionInfo + EncryptedPackage,
+AES-256, SHA-512, 100.000 Runden) - Dateien lassen sich dort wieder öffnen.
+Die HMAC (dataIntegrity) läuft über den ganzen EncryptedPackage-Stream
+inkl. Größenfeld; das steht erst am Ende fest, deshalb wird der Stream dafür
+einmal sequenziell von der Platte gelesen (nur Hash, kein Entschlüsseln).
+
+AES kommt per ctypes aus der OpenSSL-Bibliothek, gegen die Pythons hashlib
+gebaut ist (das eingebettete Python hat weder cryptography noch lxml). Fehlt
+sie, ist available() False und der Aufrufer bleibt bei xlsx-populate.
+
+Aufruf (Konfiguration als JSON über stdin):
+    {"action": "encrypt", "sourcePath": "...", "targetPath": "...", "password": "..."}
+    {"action": "decrypt", "sourcePath": "...", "targetPath": "...", "password": "..."}
+"""
+
+import base64
+import contextlib
+import ctypes
+import hashlib
+import hmac
+import json
+import os
+import struct
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+# Segmentgröße des EncryptedPackage-Streams (MS-OFFCRYPTO 2.3.4.15)
+SEGMENT_SIZE = 4096
+# Runden der Passwort-Ableitung (wie Excel und xlsx-populate)
+SPIN_COUNT = 100000
+
+# Block-Keys (MS-OFFCRYPTO 2.3.4.11 - 2.3.4.14)
+_BLOCK_VERIFIER_INPUT = bytes([0xfe, 0xa7, 0xd2, 0x76, 0x3b, 0x4b, 0x9e, 0x79])
+_BLOCK_VERIFIER_VALUE = bytes([0xd7, 0xaa, 0x0f, 0x6d, 0x30, 0x61, 0x34, 0x4e])
+_BLOCK_KEY_VALUE = bytes([0x14, 0x6e, 0x0b, 0xe7, 0xab, 0xac, 0xd0, 0xd6])
+_BLOCK_HMAC_KEY = bytes([0x5f, 0xb2, 0xad, 0x01, 0x0c, 0xb9, 0xe1, 0xf6])
+_BLOCK_HMAC_VALUE = bytes([0xa0, 0x67, 0x7f, 0x02, 0xb2, 0x2c, 0x84, 0x33])
+
+_NS_ENCRYPTION = 'http://schemas.microsoft.com/office/2006/encryption'
+_NS_PASSWORD = 'http://schemas.microsoft.com/office/2006/keyEncryptor/password'
+# Version 4.4, Reserved 0x40 (Agile)
+_ENCRYPTION_INFO_HEADER = bytes([0x04, 0x00, 0x04, 0x00, 0x40, 0x00, 0x00, 0x00])
+
+# Compound File Binary (MS-CFB)
+_CFB_SIGNATURE = bytes([0xd0, 0xcf, 0x11, 0xe0, 0xa1, 0xb1, 0x1a, 0xe1])
+_SECTOR = 4096
+_MINI_SECTOR = 64
+_MINI_CUTOFF = 4096
+_DIFAT_IN_HEADER = 109
+_FREE, _END, _FAT_SECT, _DIFAT_SECT, _NO_STREAM = 0xFFFFFFFF, 0xFFFFFFFE, 0xFFFFFFFD, 0xFFFFFFFC, 0xFFFFFFFF
+
+
+class PackageCryptoError(Exception):
+    """Verschlüsselung nicht möglich (OpenSSL fehlt, falsches Passwort, ungültiger Container)"""
+
+
+# =============================================================================
+# AES über OpenSSL (ctypes)
+# =============================================================================
+
+_libcrypto = None
+_libcrypto_error = None
+
+
+def _load_libcrypto():
+    """OpenSSL der laufenden Python-Installation (schon durch hashlib geladen)"""
+    global _libcrypto, _libcrypto_error
+    if _libcrypto is not None or _libcrypto_error is not None:
+        return _libcrypto
+
+    candidates = []
+    if sys.platform == 'win32':
+        # Von _hashlib bereits geladen - LoadLibrary liefert dasselbe Modul
+        candidates = ['libcrypto-3-x64', 'libcrypto-3', 'libcrypto-3-arm64', 'libcrypto-1_1-x64', 'libcrypto-1_1']
+    else:
+        try:
+            import _hashlib
+            if getattr(_hashlib, '__file__', None):
+                # dlsym über das Modul findet auch die Symbole seiner Abhängigkeiten
+                candidates.append(_hashlib.__file__)
+        except ImportError:
+            pass
+        candidates.append(None)  # statisch gelinkt: Symbole im Prozess
+        # Bewusst kein /usr/lib/libcrypto.dylib - macOS bricht das Laden dort ab
+        if sys.platform.startswith('linux'):
+            candidates += ['libcrypto.so.3', 'libcrypto.so.1.1']
+
+    for candidate in candidates:
+        try:
+            lib = ctypes.CDLL(candidate)
+            lib.EVP_aes_256_cbc  # noqa: B018 - Symbol vorhanden?
+        except (OSError, AttributeError):
+            continue
+        for name in ('EVP_aes_128_cbc', 'EVP_aes_192_cbc', 'EVP_aes_256_cbc'):
+            getattr(lib, name).restype = ctypes.c_void_p
+        lib.EVP_CIPHER_CTX_new.restype = ctypes.c_void_p
+        lib.EVP_CIPHER_CTX_free.argtypes = [ctypes.c_void_p]
+        lib.EVP_CIPHER_CTX_set_padding.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        lib.EVP_CipherInit_ex.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p,
+                                          ctypes.c_char_p, ctypes.c_char_p, ctypes.c_int]
+        lib.EVP_CipherUpdate.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.POINTER(ctypes.c_int),
+                                         ctypes.c_char_p, ctypes.c_int]
+        _libcrypto = lib
+        return lib
+
+    _libcrypto_error = 'OpenSSL (libcrypto) nicht gefunden'
+    return None
+
+
+def available():
+    """Kann hier verschlüsselt werden (OpenSSL per ctypes erreichbar)?"""
+    return _load_libcrypto() is not None
+
+
+class _AesCbc:
+    """AES-CBC ohne Padding; der IV wird pro Aufruf gesetzt (ein Kontext für alle Segmente)"""
+
+    def __init__(self, key, encrypt):
+        lib = _load_libcrypto()
+        if lib is None:
+            raise PackageCryptoError(_libcrypto_error)
+        cipher = {16: lib.EVP_aes_128_cbc, 24: lib.EVP_aes_192_cbc, 32: lib.EVP_aes_256_cbc}.get(len(key))
+        if cipher is None:
+            raise PackageCryptoError(f'Nicht unterstützte Schlüssellänge: {len(key) * 8} Bit')
+        self._lib = lib
+        self._encrypt = 1 if encrypt else 0
+        self._ctx = lib.EVP_CIPHER_CTX_new()
+        if not self._ctx or not lib.EVP_CipherInit_ex(self._ctx, cipher(), None, bytes(key), None, self._encrypt):
+            raise PackageCryptoError('AES-Kontext konnte nicht angelegt werden')
+        lib.EVP_CIPHER_CTX_set_padding(self._ctx, 0)
+
+    def run(self, iv, data):
+        if len(data) % 16:
+            raise PackageCryptoError('AES-Daten nicht auf 16 Byte aufgefüllt')
+        out = ctypes.create_string_buffer(len(data) + 16)
+        written = ctypes.c_int(0)
+        if not self._lib.EVP_CipherInit_ex(self._ctx, None, None, None, bytes(iv), self._encrypt) or \
+                not self._lib.EVP_CipherUpdate(self._ctx, out, ctypes.byref(written), bytes(data), len(data)):
+            raise PackageCryptoError('AES fehlgeschlagen')
+        return out.raw[:written.value]
+
+    def close(self):
+        if self._ctx:
+            self._lib.EVP_CIPHER_CTX_free(self._ctx)
+            self._ctx = None
+
+    def __del__(self):
+        self.close()
+
+
+def _pad(data, block_size=16):
+    remainder = len(data) % block_size
+    return data + b'\x00' * (block_size - remainder) if remainder else data
+
+
+def _fit(data, size, fill):
+    """Auf size kürzen bzw. mit fill auffüllen (Schlüssel/IV-Ableitung)"""
+    return data[:size] if len(data) >= size else data + fill * (size - len(data))
+
+
+def _encrypt_once(key, iv, data):
+    aes = _AesCbc(key, True)
+    try:
+        return aes.run(iv, _pad(data))
+    finally:
+        aes.close()
+
+
+def _decrypt_once(key, iv, data):
+    aes = _AesCbc(key, False)
+    try:
+        return aes.run(iv, data)
+    finally:
+        aes.close()
+
+
+# =============================================================================
+# Schlüssel (MS-OFFCRYPTO 2.3.4.11)
+# =============================================================================
+
+def _password_hash(password, salt, spin_count, hash_name):
+    digest = hashlib.new(hash_name, salt + password.encode('utf-16-le')).digest()
+    for i in range(spin_count):
+        digest = hashlib.new(hash_name, struct.pack('<I', i) + digest).digest()
+    return digest
+
+
+def _derive_key(password_hash, block_key, key_bytes, hash_name):
+    return _fit(hashlib.new(hash_name, password_hash + block_key).digest(), key_bytes, b'\x36')
+
+
+def _segment_iv(salt, index, block_size, hash_name):
+    return _fit(hashlib.new(hash_name, salt + struct.pack('<I', index)).digest(), block_size, b'\x36')
+
+
+def _block_iv(salt, block_key, block_size, hash_name):
+    return _fit(hashlib.new(hash_name, salt + block_key).digest(), block_size, b'\x36')
+
+
+def _b64(data):
+    return base64.b64encode(data).decode('ascii')
+
+
+# =============================================================================
+# Compound File schreiben
+# =============================================================================
+
+def _dir_entry(name, entry_type, start, size, left=_NO_STREAM, right=_NO_STREAM, child=_NO_STREAM):
+    encoded = (name + '\x00').encode('utf-16-le') if name else b''
+    return (encoded.ljust(64, b'\x00') + struct.pack('<HBBIII', len(encoded), entry_type, 1, left, right, child) +
+            b'\x00' * 16 + struct.pack('<IQQIQ', 0, 0, 0, start, size))
+
+
+class EncryptedPackageWriter:
+    """
+    Datei-ähnliches Ziel für den ZIP-Writer: write() nimmt Klartext an,
+    close() schließt den CFB-Container ab. Kein seek() - zipfile schreibt
+    dann Data Descriptors, _RawZipWriter schreibt ohnehin nur sequentiell.
+    """
+
+    def __init__(self, target_path, password, spin_count=SPIN_COUNT):
+        if not available():
+            raise PackageCryptoError(_libcrypto_error)
+        self.target_path = target_path
+        self._password = password
+        self._spin_count = spin_count
+        self._key = os.urandom(32)
+        self._key_salt = os.urandom(16)
+        self._aes = _AesCbc(self._key, True)
+        self._buffer = bytearray()
+        self._segment = 0
+        self._size = 0          # Klartext-Bytes
+        self._written = 8       # Bytes im EncryptedPackage-Stream (inkl. Größenfeld)
+        self._fp = open(target_path, 'w+b')
+        self._fp.write(b'\x00' * _SECTOR)     # Header, wird am Ende geschrieben
+        self._fp.write(b'\x00' * 8)           # Größenfeld, wird am Ende geschrieben
+        self.closed = False
+
+    # --- Datei-Schnittstelle ---------------------------------------------------------
+
+    def write(self, data):
+        self._buffer += data
+        self._size += len(data)
+        if len(self._buffer) >= SEGMENT_SIZE:
+            full = len(self._buffer) - len(self._buffer) % SEGMENT_SIZE
+            view = memoryview(self._buffer)
+            for start in range(0, full, SEGMENT_SIZE):
+                self._write_segment(view[start:start + SEGMENT_SIZE])
+            view.release()
+            del self._buffer[:full]
+        return len(data)
+
+    def tell(self):
+        return self._size
+
+    def flush(self):
+        pass
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    # --- Abschluss ---------------------------------------------------------------------
+
+    def _write_segment(self, plain):
+        iv = _segment_iv(self._key_salt, self._segment, 16, 'sha512')
+        encrypted = self._aes.run(iv, _pad(bytes(plain)))
+        self._fp.write(encrypted)
+        self._written += len(encrypted)
+        self._segment += 1
+
+    def abort(self):
+        """Abbruch: Ausgabe verwerfen"""
+        if not self.closed:
+            self.closed = True
+            self._aes.close()
+            self._fp.close()
+            try:
+                os.remove(self.target_path)
+            except OSError:
+                pass
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            if self._buffer:
+                self._write_segment(self._buffer)
+                self._buffer = bytearray()
+            self._aes.close()
+            fp = self._fp
+            if self._written < _MINI_CUTOFF:
+                # Kleine Streams gehörten in den Mini-Stream - stattdessen auf ein volles
+                # Segment auffüllen (Leser schneiden auf das Größenfeld zu)
+                fp.write(b'\x00' * (8 + SEGMENT_SIZE - self._written))
+                self._written = 8 + SEGMENT_SIZE
+            fp.seek(_SECTOR)
+            fp.write(struct.pack('<Q', self._size))
+
+            # HMAC über den kompletten Stream (Größenfeld steht jetzt fest)
+            hmac_key = os.urandom(64)
+            mac = hmac.new(hmac_key, digestmod=hashlib.sha512)
+            fp.seek(_SECTOR)
+            remaining = self._written
+            while remaining:
+                chunk = fp.read(min(remaining, 1024 * 1024))
+                if not chunk:
+                    raise PackageCryptoError('EncryptedPackage unvollständig')
+                mac.update(chunk)
+                remaining -= len(chunk)
+
+            info = self._encryption_info(hmac_key, mac.digest())
+            self._write_container(info)
+            fp.close()
+        except BaseException:
+            self._fp.close()
+            try:
+                os.remove(self.target_path)
+            except OSError:
+                pass
+            raise
+
+    def _encryption_info(self, hmac_key, hmac_value):
+        password_salt = os.urandom(16)
+        password_hash = _password_hash(self._password, password_salt, self._spin_count, 'sha512')
+        verifier = os.urandom(16)
+
+        def encrypt_with(block_key, data):
+            return _encrypt_once(_derive_key(password_hash, block_key, 32, 'sha512'), password_salt, data)
+
+        common = ('saltSize="16" blockSize="16" keyBits="256" hashSize="64" cipherAlgorithm="AES" '
+                  'cipherChaining="ChainingModeCBC" hashAlgorithm="SHA512"')
+        encrypted_hmac_key = _encrypt_once(self._key, _block_iv(self._key_salt, _BLOCK_HMAC_KEY, 16, 'sha512'),
+                                           hmac_key)
+        encrypted_hmac_value = _encrypt_once(self._key, _block_iv(self._key_salt, _BLOCK_HMAC_VALUE, 16, 'sha512'),
+                                             hmac_value)
+        xml = (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\r\n'
+            f'<encryption xmlns="{_NS_ENCRYPTION}" xmlns:p="{_NS_PASSWORD}" '
+            'xmlns:c="http://schemas.microsoft.com/office/2006/keyEncryptor/certificate">'
+            f'<keyData {common} saltValue="{_b64(self._key_salt)}"/>'
+            f'<dataIntegrity encryptedHmacKey="{_b64(encrypted_hmac_key)}" '
+            f'encryptedHmacValue="{_b64(encrypted_hmac_value)}"/>'
+            f'<keyEncryptors><keyEncryptor uri="{_NS_PASSWORD}">'
+            f'<p:encryptedKey spinCount="{self._spin_count}" {common} saltValue="{_b64(password_salt)}" '
+            f'encryptedVerifierHashInput="{_b64(encrypt_with(_BLOCK_VERIFIER_INPUT, verifier))}" '
+            f'encryptedVerifierHashValue="{_b64(encrypt_with(_BLOCK_VERIFIER_VALUE, hashlib.sha512(verifier).digest()))}" '
+            f'encryptedKeyValue="{_b64(encrypt_with(_BLOCK_KEY_VALUE, self._key))}"/>'
+            '</keyEncryptor></keyEncryptors></encryption>'
+        )
+        return _ENCRYPTION_INFO_HEADER + xml.encode('utf-8')
+
+    def _write_container(self, info):
+        """Mini-Stream (EncryptionInfo), MiniFAT, Verzeichnis, FAT/DIFAT und Header anhängen"""
+        fp = self._fp
+        package_sectors = -(-self._written // _SECTOR)
+        mini_stream = info.ljust(-(-len(info) // _MINI_SECTOR) * _MINI_SECTOR, b'\x00')
+        mini_sectors = -(-len(mini_stream) // _SECTOR)
+        mini_count = len(mini_stream) // _MINI_SECTOR
+
+        mini_start = package_sectors
+        minifat_start = mini_start + mini_sectors
+        dir_start = minifat_start + 1
+        data_sectors = dir_start + 1
+
+        # FAT- und DIFAT-Sektoren decken auch sich selbst ab
+        fat_sectors = difat_sectors = 0
+        while True:
+            total = data_sectors + fat_sectors + difat_sectors
+            needed_fat = -(-total // (_SECTOR // 4))
+            needed_difat = max(0, -(-(needed_fat - _DIFAT_IN_HEADER) // (_SECTOR // 4 - 1)))
+            if needed_fat == fat_sectors and needed_difat == difat_sectors:
+                break
+            fat_sectors, difat_sectors = needed_fat, needed_difat
+        fat_start = data_sectors
+        difat_start = fat_start + fat_sectors
+
+        # Daten ab dem Ende des Pakets
+        fp.seek(_SECTOR + self._written)
+        fp.write(b'\x00' * (package_sectors * _SECTOR - self._written))
+        fp.write(mini_stream.ljust(mini_sectors * _SECTOR, b'\x00'))
+        minifat = [i + 1 for i in range(mini_count - 1)] + [_END]
+        fp.write(struct.pack(f'<{len(minifat)}I', *minifat).ljust(_SECTOR, b'\xff'))
+        # Verzeichnis: Root, EncryptedPackage (Wurzel des Baums), EncryptionInfo (kürzer = links)
+        directory = (_dir_entry('Root Entry', 5, mini_start, len(mini_stream), child=1) +
+                     _dir_entry('EncryptedPackage', 2, 0, self._written, left=2) +
+                     _dir_entry('EncryptionInfo', 2, 0, len(info)))
+        empty = _dir_entry('', 0, 0, 0)
+        fp.write(directory + empty * (_SECTOR // 128 - 3))
+
+        # FAT in Sektor-Blöcken schreiben (bei großen Paketen nicht alles im Speicher)
+        entries_per_sector = _SECTOR // 4
+
+        def fat_entry(sector):
+            if sector < package_sectors:
+                return sector + 1 if sector + 1 < package_sectors else _END
+            if sector < minifat_start:
+                return sector + 1 if sector + 1 < minifat_start else _END
+            if sector < data_sectors:
+                return _END  # MiniFAT bzw. Verzeichnis: je ein Sektor
+            if sector < difat_start:
+                return _FAT_SECT
+            if sector < difat_start + difat_sectors:
+                return _DIFAT_SECT
+            return _FREE
+
+        for block in range(fat_sectors):
+            first = block * entries_per_sector
+            fp.write(struct.pack(f'<{entries_per_sector}I', *(fat_entry(s) for s in range(first, first + entries_per_sector))))
+
+        fat_locations = list(range(fat_start, fat_start + fat_sectors))
+        for index in range(difat_sectors):
+            chunk = fat_locations[_DIFAT_IN_HEADER + index * (entries_per_sector - 1):
+                                  _DIFAT_IN_HEADER + (index + 1) * (entries_per_sector - 1)]
+            next_sector = difat_start + index + 1 if index + 1 < difat_sectors else _END
+            fp.write(struct.pack(f'<{len(chunk)}I', *chunk).ljust(_SECTOR - 4, b'\xff') +
+                     struct.pack('<I', next_sector))
+
+        header_difat = fat_locations[:_DIFAT_IN_HEADER]
+        header = (_CFB_SIGNATURE + b'\x00' * 16 +
+                  struct.pack('<HHHHH', 0x003E, 0x0004, 0xFFFE, 12, 6) + b'\x00' * 6 +
+                  struct.pack('<IIIIIIIII', 1, fat_sectors, dir_start, 0, _MINI_CUTOFF,
+                              minifat_start, 1, difat_start if difat_sectors else _END, difat_sectors) +
+                  struct.pack(f'<{len(header_difat)}I', *header_difat).ljust(_DIFAT_IN_HEADER * 4, b'\xff'))
+        fp.seek(0)
+        fp.write(header.ljust(_SECTOR, b'\x00'))
+
+
+# =============================================================================
+# Compound File lesen
+# =============================================================================
+
+class _CompoundFile:
+    """Minimaler CFB-Leser (v3/v4): Streams als Sektor-Ketten, große Streams werden gestreamt"""
+
+    def __init__(self, fp):
+        self._fp = fp
+        header = fp.read(512)
+        if len(header) < 512 or header[:8] != _CFB_SIGNATURE:
+            raise PackageCryptoError('Keine verschlüsselte Office-Datei (CFB-Signatur fehlt)')
+        self.sector_size = 1 << struct.unpack('<H', header[30:32])[0]
+        self.mini_size = 1 << struct.unpack('<H', header[32:34])[0]
+        (fat_count, dir_start, _, self.mini_cutoff, minifat_start, _,
+         difat_start, difat_count) = struct.unpack('<IIIIIIII', header[44:76])
+        fat_locations = [s for s in struct.unpack('<109I', header[76:512]) if s < _DIFAT_SECT]
+        per_sector = self.sector_size // 4
+        sector = difat_start
+        for _ in range(difat_count):
+            if sector >= _DIFAT_SECT:
+                break
+            values = struct.unpack(f'<{per_sector}I', self._sector(sector))
+            fat_locations += [s for s in values[:-1] if s < _DIFAT_SECT]
+            sector = values[-1]
+        self.fat = []
+        for location in fat_locations[:fat_count]:
+            self.fat.extend(struct.unpack(f'<{per_sector}I', self._sector(location)))
+
+        directory = b''.join(self._sector(s) for s in self._chain(dir_start))
+        self.entries = {}
+        for offset in range(0, len(directory), 128):
+            entry = directory[offset:offset + 128]
+            name_length = struct.unpack('<H', entry[64:66])[0]
+            if entry[66] == 0 or not name_length:
+                continue
+            name = entry[:max(0, name_length - 2)].decode('utf-16-le')
+            start, size = struct.unpack('<IQ', entry[116:128])
+            if self.sector_size == 512:
+                size &= 0xFFFFFFFF
+            self.entries[name] = (entry[66], start, size)
+
+        root = next((e for e in self.entries.values() if e[0] == 5), None)
+        self._mini_stream = b''.join(self._sector(s) for s in self._chain(root[1])) if root else b''
+        self._minifat = []
+        if minifat_start < _DIFAT_SECT:
+            for s in self._chain(minifat_start):
+                self._minifat.extend(struct.unpack(f'<{per_sector}I', self._sector(s)))
+
+    def _sector(self, index):
+        self._fp.seek((index + 1) * self.sector_size)
+        return self._fp.read(self.sector_size)
+
+    def _chain(self, start):
+        sector, seen = start, 0
+        while sector < _DIFAT_SECT:
+            yield sector
+            seen += 1
+            if seen > len(self.fat) or sector >= len(self.fat):
+                raise PackageCryptoError('Beschädigte Sektor-Kette')
+            sector = self.fat[sector]
+
+    def read_stream(self, name):
+        """Kleiner Stream komplett (z.B. EncryptionInfo)"""
+        return b''.join(self.iter_stream(name))
+
+    def iter_stream(self, name, chunk_size=1024 * 1024):
+        """Stream in Blöcken (zusammenhängende Sektoren werden am Stück gelesen)"""
+        if name not in self.entries:
+            raise PackageCryptoError(f'Stream "{name}" fehlt - keine verschlüsselte Excel-Datei')
+        _, start, size = self.entries[name]
+        if size < self.mini_cutoff:
+            data, sector = [], start
+            while sector < _DIFAT_SECT and sum(len(d) for d in data) < size:
+                offset = sector * self.mini_size
+                data.append(self._mini_stream[offset:offset + self.mini_size])
+                sector = self._minifat[sector]
+            yield b''.join(data)[:size]
+            return
+        remaining = size
+        run_start = run_length = None
+        for sector in self._chain(start):
+            if run_start is not None and sector == run_start + run_length and \
+                    (run_length + 1) * self.sector_size <= chunk_size:
+                run_length += 1
+                continue
+            if run_start is not None:
+                data = self._read_run(run_start, run_length, remaining)
+                remaining -= len(data)
+                yield data
+            run_start, run_length = sector, 1
+        if run_start is not None and remaining > 0:
+            yield self._read_run(run_start, run_length, remaining)
+
+    def _read_run(self, start, length, remaining):
+        self._fp.seek((start + 1) * self.sector_size)
+        return self._fp.read(min(length * self.sector_size, remaining))
+
+
+# =============================================================================
+# Öffentliche API
+# =============================================================================
+
+def is_encrypted(path):
+    """Liegt ein CFB-Container vor (verschlüsseltes Office-Dokument) statt eines ZIP?"""
+    try:
+        with open(path, 'rb') as fp:
+            return fp.read(8) == _CFB_SIGNATURE
+    except OSError:
+        return False
+
+
+def encrypt_package(source_path, target_path, password, chunk_size=1024 * 1024):
+    """
+    Fertiges XLSX (ZIP) verschlüsseln - die Quelle wird nur sequentiell
+    gelesen (kein Entpacken, kein Parsen). source_path darf auch ein
+    seekbares Datei-Objekt sein (z.B. entschlüsseltes Paket aus dem Cache).
+
+    Returns:
+        Dict mit Statistik {'size', 'encryptedSize'}
+    """
+    if hasattr(source_path, 'read'):
+        source_path.seek(0)
+        fin = contextlib.nullcontext(source_path)
+    else:
+        fin = open(source_path, 'rb')
+    with fin as fin, EncryptedPackageWriter(target_path, password) as writer:
+        while True:
+            chunk = fin.read(chunk_size)
+            if not chunk:
+                break
+            writer.write(chunk)
+        size = writer.tell()
+    return {'size': size, 'encryptedSize': os.path.getsize(target_path)}
+
+
+def iter_decrypted(source_path, password, verify=True, on_size=None):
+    """
+    Entschlüsselt Segment für Segment und liefert den Klartext (ZIP) in Blöcken.
+    on_size(size) wird vor dem ersten Block mit der Klartext-Größe aufgerufen.
+
+    Raises:
+        PackageCryptoError bei falschem Passwort, nicht unterstütztem Verfahren
+        oder verletzter Integrität (verify)
+    """
+    with open(source_path, 'rb') as fp:
+        container = _CompoundFile(fp)
+        info = container.read_stream('EncryptionInfo')
+        if len(info) < 8 or struct.unpack('<HH', info[:4]) != (4, 4):
+            raise PackageCryptoError('Nur Agile Encryption (Version 4.4) wird unterstützt')
+        try:
+            root = ET.fromstring(info[8:])
+        except ET.ParseError as e:
+            raise PackageCryptoError(f'EncryptionInfo ungültig: {e}') from None
+        key_data = root.find(f'{{{_NS_ENCRYPTION}}}keyData')
+        encrypted_key = root.find(f'.//{{{_NS_PASSWORD}}}encryptedKey')
+        if key_data is None or encrypted_key is None:
+            raise PackageCryptoError('Kein Passwort-Schlüssel in EncryptionInfo')
+        if key_data.get('cipherAlgorithm') != 'AES' or encrypted_key.get('cipherAlgorithm') != 'AES' or \
+                key_data.get('cipherChaining') != 'ChainingModeCBC':
+            raise PackageCryptoError('Nur AES-CBC wird unterstützt')
+
+        # Paket-Schlüssel aus dem Passwort
+        hash_name = encrypted_key.get('hashAlgorithm', 'SHA512').lower().replace('-', '')
+        password_salt = base64.b64decode(encrypted_key.get('saltValue'))
+        key_bytes = int(encrypted_key.get('keyBits')) // 8
+        password_hash = _password_hash(password, password_salt, int(encrypted_key.get('spinCount')), hash_name)
+
+        def decrypt_with(block_key, attribute):
+            return _decrypt_once(_derive_key(password_hash, block_key, key_bytes, hash_name), password_salt,
+                                 base64.b64decode(encrypted_key.get(attribute)))
+
+        verifier = decrypt_with(_BLOCK_VERIFIER_INPUT, 'encryptedVerifierHashInput')
+        verifier_hash = decrypt_with(_BLOCK_VERIFIER_VALUE, 'encryptedVerifierHashValue')
+        expected = hashlib.new(hash_name, verifier[:int(encrypted_key.get('saltSize', 16))]).digest()
+        if not hmac.compare_digest(verifier_hash[:len(expected)], expected):
+            raise PackageCryptoError('Falsches Passwort')
+        package_key = decrypt_with(_BLOCK_KEY_VALUE, 'encryptedKeyValue')[:int(key_data.get('keyBits')) // 8]
+
+        data_hash = key_data.get('hashAlgorithm', 'SHA512').lower().replace('-', '')
+        key_salt = base64.b64decode(key_data.get('saltValue'))
+        data_block = int(key_data.get('blockSize', 16))
+        mac = None
+        integrity = root.find(f'{{{_NS_ENCRYPTION}}}dataIntegrity')
+        if verify and integrity is not None:
+            hash_size = int(key_data.get('hashSize', 64))
+            hmac_key = _decrypt_once(package_key, _block_iv(key_salt, _BLOCK_HMAC_KEY, data_block, data_hash),
+                                     base64.b64decode(integrity.get('encryptedHmacKey')))[:hash_size]
+            expected_mac = _decrypt_once(package_key, _block_iv(key_salt, _BLOCK_HMAC_VALUE, data_block, data_hash),
+                                         base64.b64decode(integrity.get('encryptedHmacValue')))[:hash_size]
+            mac = hmac.new(hmac_key, digestmod=data_hash)
+
+        aes = _AesCbc(package_key, False)
+        try:
+            size = None
+            segment = 0
+            pending = bytearray()
+            for chunk in container.iter_stream('EncryptedPackage'):
+                if mac is not None:
+                    mac.update(chunk)
+                pending += chunk
+                if size is None:
+                    if len(pending) < 8:
+                        continue
+                    size = struct.unpack('<Q', pending[:8])[0]
+                    del pending[:8]
+                    if on_size is not None:
+                        on_size(size)
+                full = len(pending) - len(pending) % SEGMENT_SIZE
+                out = []
+                for start in range(0, full, SEGMENT_SIZE):
+                    out.append(aes.run(_segment_iv(key_salt, segment, data_block, data_hash),
+                                       bytes(pending[start:start + SEGMENT_SIZE])))
+                    segment += 1
+                del pending[:full]
+                if out:
+                    plain = b''.join(out)
+                    yield plain[:size]
+                    size -= min(size, len(plain))
+            if pending and size:
+                tail = bytes(pending[:len(pending) - len(pending) % 16])
+                yield aes.run(_segment_iv(key_salt, segment, data_block, data_hash), tail)[:size]
+        finally:
+            aes.close()
+        if mac is not None and not hmac.compare_digest(mac.digest(), expected_mac):
+            raise PackageCryptoError('Integritätsprüfung fehlgeschlagen (HMAC)')
+
+
+def decrypt_package(source_path, target_path, password, verify=True):
+    """Verschlüsselte Datei als normales XLSX nach target_path schreiben"""
+    size = 0
+    try:
+        with open(target_path, 'wb') as out:
+            for chunk in iter_decrypted(source_path, password, verify):
+                out.write(chunk)
+                size += len(chunk)
+    except BaseException:
+        try:
+            os.remove(target_path)
+        except OSError:
+            pass
+        raise
+    return {'size': size}
+
+
+def main():
+    """Hauptfunktion - Konfiguration als JSON über stdin, Ergebnis als JSON"""
+    import io
+    if sys.platform == 'win32':
+        sys.stdin = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    from excel_staging import atomic_replace, staging_path
+    start = time.time()
+    staged = None
+    try:
+        config = json.loads(sys.stdin.read())
+        action = config.get('action', 'encrypt')
+        source_path, target_path, password = config['sourcePath'], config['targetPath'], config['password']
+        if not os.path.isfile(source_path):
+            raise PackageCryptoError(f'Datei nicht gefunden: {source_path}')
+        # Über eine Staging-Datei, damit auch Quelle == Ziel funktioniert
+        staged = staging_path(target_path)
+        if action == 'encrypt':
+            stats = encrypt_package(source_path, staged, password)
+        elif action == 'decrypt':
+            stats = decrypt_package(source_path, staged, password)
+        else:
+            raise PackageCryptoError(f'Unbekannte Aktion: {action}')
+        atomic_replace(staged, target_path)
+        staged = None
+        result = {'success': True, **stats, 'durationMs': int((time.time() - start) * 1000)}
+        sys.stderr.write(f"[PackageCrypto] {action}: {stats['size']} Bytes in {result['durationMs']}ms\n")
+    except (KeyError, ValueError) as e:
+        result = {'success': False, 'error': f'Ungültige Konfiguration: {e}'}
+    except PackageCryptoError as e:
+        result = {'success': False, 'error': str(e), 'cryptoUnavailable': not available()}
+    except OSError as e:
+        result = {'success': False, 'error': f'Datei konnte nicht geschrieben werden: {e}'}
+    finally:
+        if staged and os.path.exists(staged):
+            os.remove(staged)
+    print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
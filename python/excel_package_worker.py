@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Package Worker - persistenter Prozess für passwortgeschützte Dateien
+
+Hält den Cache entschlüsselter Pakete (excel_package_cache.py): eine Datei
+wird einmal pro (Fingerprint, Passwort) entschlüsselt, danach lesen Reader
+und Writer direkt aus dem Klartext im Speicher - ohne temporäre Dateien und
+ohne erneutes Ableiten des Schlüssels (100.000 SHA-512-Runden).
+
+Gleiches Protokoll wie der xlwings-Worker (JSON-Zeilen mit Request-ID):
+
+    {"id": 1, "action": "readSheet", "filePath": "...", "sheetName": "...", "password": "..."}
+    {"id": 2, "action": "listSheets", "filePath": "...", "password": "..."}
+    {"id": 3, "action": "writeSheet", "filePath": "...", "outputPath": "...", "sheetName": "...",
+     "changes": {}, "originalPath": "...", "compression": null, "password": null, "sourcePassword": "..."}
+    (große Daten: changes.dataStream = {"rows": N} statt changes.data, danach N
+     Datenzeilen als NDJSON - wie beim Script, siehe excel_stream_input.py)
+    {"id": 4, "action": "copyPackage", "filePath": "...", "outputPath": "...", "sourcePassword": "...", "password": null}
+    {"id": 5, "action": "evict", "filePath": "..."}   (ohne filePath: alles)
+    {"id": 6, "action": "stats"} / {"action": "ping"} / {"action": "quit"}
+
+Antworten als JSON-Zeile auf stdout (mit derselben id), Logs auf stderr.
+Passwörter werden weder geloggt noch zurückgegeben.
+
+Aufruf:
+    python excel_package_worker.py [--budget-mb N]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from excel_package_cache import DecryptedPackageCache, get_package_cache, copy_package
+from excel_package_crypto import PackageCryptoError
+from excel_stream_input import attach_streamed_rows
+
+
+class PackageWorker:
+    """Befehlsschleife um den Paket-Cache"""
+
+    def __init__(self, cache: DecryptedPackageCache):
+        self.cache = cache
+        self._is_running = True
+
+    def _log(self, msg):
+        print(f"[PackageWorker] {msg}", file=sys.stderr, flush=True)
+
+    def _respond(self, data):
+        print(json.dumps(data, ensure_ascii=False, default=str), flush=True)
+
+    def handle_command(self, cmd):
+        action = cmd.get('action') if isinstance(cmd, dict) else None
+
+        if action == 'ping':
+            return {'success': True, 'message': 'pong'}
+
+        if action == 'stats':
+            return {'success': True, 'stats': self.cache.stats()}
+
+        if action == 'evict':
+            return {'success': True, 'evicted': self.cache.evict(cmd.get('filePath'))}
+
+        if action == 'quit':
+            self._is_running = False
+            return {'success': True, 'message': 'Worker beendet'}
+
+        if action == 'readSheet':
+            from excel_reader import read_sheet
+            return read_sheet(cmd.get('filePath'), cmd.get('sheetName'), cmd.get('options') or {},
+                              password=cmd.get('password'))
+
+        if action == 'listSheets':
+            from excel_reader import list_sheets
+            return list_sheets(cmd.get('filePath'), password=cmd.get('password'))
+
+        if action == 'writeSheet':
+            from excel_writer import write_sheet
+            result = write_sheet(cmd.get('filePath'), cmd.get('outputPath'), cmd.get('sheetName'),
+                                 cmd.get('changes') or {}, cmd.get('originalPath'), cmd.get('compression'),
+                                 cmd.get('password'), cmd.get('sourcePassword'))
+            # Ausgabe über eine zwischengespeicherte Datei: deren alter Stand ist ungültig
+            if result.get('success') and cmd.get('outputPath'):
+                self.cache.evict(cmd.get('outputPath'))
+            return result
+
+        if action == 'copyPackage':
+            try:
+                return copy_package(cmd.get('filePath'), cmd.get('outputPath'),
+                                    cmd.get('sourcePassword'), cmd.get('password'))
+            except PackageCryptoError as e:
+                return {'success': False, 'error': str(e), 'needsPassword': True}
+
+        return {'success': False, 'error': f'Unbekannte Aktion: {action}'}
+
+    def run(self):
+        """Hauptschleife - liest JSON-Befehle von stdin"""
+        self._log(f"Worker gestartet (Budget: {self.cache.budget / 1024 / 1024:.0f} MB)")
+
+        while self._is_running:
+            cmd = None
+            try:
+                line = sys.stdin.readline()
+                if not line:
+                    self._log("EOF erreicht, beende...")
+                    break
+
+                line = line.strip()
+                if not line:
+                    continue
+
+                try:
+                    cmd = json.loads(line)
+                except json.JSONDecodeError as e:
+                    self._respond({'success': False, 'error': f'Ungültiges JSON: {e}'})
+                    continue
+
+                rows = attach_streamed_rows(cmd, sys.stdin) if isinstance(cmd, dict) else None
+                try:
+                    result = self.handle_command(cmd)
+                finally:
+                    # Nicht gelesene Datenzeilen überspringen - sonst wären sie die nächsten Befehle
+                    if rows is not None:
+                        skipped = rows.drain()
+                        if skipped:
+                            self._log(f"{skipped} nicht gelesene Datenzeilen übersprungen")
+                if isinstance(cmd, dict) and 'id' in cmd:
+                    result = dict(result, id=cmd['id'])
+                self._respond(result)
+
+            except KeyboardInterrupt:
+                self._log("Interrupted, beende...")
+                break
+            except Exception as e:
+                self._log(f"Fehler: {e}")
+                error = {'success': False, 'error': str(e)}
+                if isinstance(cmd, dict) and 'id' in cmd:
+                    error['id'] = cmd['id']
+                self._respond(error)
+
+        # Klartext nicht bis zum Prozessende im Speicher lassen
+        self.cache.evict()
+        self._log("Worker beendet")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Persistenter Worker für passwortgeschützte Dateien')
+    parser.add_argument('--budget-mb', type=float, default=None)
+    args = parser.parse_args()
+
+    # Auf Windows: stdin/stdout als UTF-8
+    if sys.platform == 'win32':
+        import io
+        sys.stdin = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    budget = int(args.budget_mb * 1024 * 1024) if args.budget_mb is not None else None
+    PackageWorker(get_package_cache(budget)).run()
+
+
+if __name__ == '__main__':
+    main()
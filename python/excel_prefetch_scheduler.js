@@ -0,0 +1,306 @@
+/**
+ * Sheet Prefetch Scheduler
+ *
+ * Liest nach dem Laden eines Sheets im Hintergrund die Nachbar-Sheets und
+ * die zuletzt benutzten Sheets vor und legt die Ergebnisse in einen
+ * größenbegrenzten Cache. Ein Sheet-Wechsel wird dadurch sofort bedient.
+ *
+ * Regeln:
+ * - Immer nur EIN Vorab-Lesevorgang gleichzeitig (niedrige Priorität).
+ * - Kommt eine Vordergrund-Anfrage, wird ein laufender Vorab-Lesevorgang
+ *   sofort abgebrochen - außer er liest genau das angeforderte Sheet, dann
+ *   wird auf ihn gewartet. Die Warteschlange läuft erst weiter, wenn keine
+ *   Vordergrund-Anfrage mehr aktiv ist.
+ * - Cache-Einträge gelten nur für den Dateistand (Größe + Änderungszeit),
+ *   mit dem sie gelesen wurden. Nach einem Speichern greifen sie nicht mehr.
+ */
+
+const fs = require('fs');
+
+// Cache-Obergrenze (geschätzte Größe der Ergebnisse)
+const DEFAULT_MAX_BYTES = 256 * 1024 * 1024;
+// Nachbarn links/rechts des aktiven Sheets
+const DEFAULT_NEIGHBOURS = 1;
+// Zuletzt benutzte Sheets pro Datei, die vorgelesen werden
+const DEFAULT_RECENT = 3;
+// Wartezeit nach einer Vordergrund-Anfrage, bevor im Hintergrund gelesen wird
+const DEFAULT_IDLE_DELAY_MS = 300;
+
+/**
+ * Grobe Größenschätzung eines Sheet-Ergebnisses in Bytes (ohne JSON.stringify,
+ * das bei großen Sheets selbst teuer wäre)
+ */
+function estimateResultBytes(result) {
+    let bytes = 1024;
+    for (const row of result.data || []) {
+        bytes += 16;
+        for (const value of row) {
+            bytes += typeof value === 'string' ? 16 + value.length * 2 : 16;
+        }
+    }
+    for (const key of ['cellStyles', 'cellFormulas', 'cellHyperlinks', 'richTextCells']) {
+        bytes += Object.keys(result[key] || {}).length * 96;
+    }
+    return bytes;
+}
+
+function fileSignature(filePath) {
+    try {
+        const stat = fs.statSync(filePath);
+        return `${stat.size}:${stat.mtimeMs}`;
+    } catch (e) {
+        return null;
+    }
+}
+
+class SheetPrefetchScheduler {
+    /**
+     * @param {Object} options
+     * @param {Function} options.readSheet - async (filePath, sheetName, signal) => Ergebnis (Hintergrund-Leser)
+     * @param {number} [options.maxBytes] - Cache-Obergrenze
+     * @param {number} [options.neighbours] - Nachbarn links/rechts
+     * @param {number} [options.recent] - Zuletzt benutzte Sheets
+     * @param {number} [options.idleDelayMs] - Pause vor dem Hintergrund-Lesen
+     * @param {Function} [options.log]
+     */
+    constructor(options) {
+        this.readSheet = options.readSheet;
+        this.maxBytes = options.maxBytes || DEFAULT_MAX_BYTES;
+        this.neighbours = options.neighbours !== undefined ? options.neighbours : DEFAULT_NEIGHBOURS;
+        this.recent = options.recent !== undefined ? options.recent : DEFAULT_RECENT;
+        this.idleDelayMs = options.idleDelayMs !== undefined ? options.idleDelayMs : DEFAULT_IDLE_DELAY_MS;
+        this.log = options.log || (() => {});
+
+        // Map-Reihenfolge = LRU (ältester Eintrag zuerst)
+        this.cache = new Map();   // "datei\u0000sheet" -> { signature, result, bytes }
+        this.cacheBytes = 0;
+        this.recentByFile = new Map();  // datei -> [sheetName, ...] (zuletzt benutzt zuerst)
+        this.queue = [];                // [{ filePath, sheetName }]
+        this.inflight = null;           // { key, filePath, sheetName, controller, promise }
+        this.foregroundCount = 0;
+        this.timer = null;
+        this.stats = { hits: 0, misses: 0, prefetched: 0, cancelled: 0, joined: 0, evicted: 0, failed: 0 };
+    }
+
+    _key(filePath, sheetName) {
+        return `${filePath}\u0000${sheetName}`;
+    }
+
+    /**
+     * Cache-Treffer für den aktuellen Dateistand oder null
+     */
+    get(filePath, sheetName) {
+        const key = this._key(filePath, sheetName);
+        const entry = this.cache.get(key);
+        if (!entry) return null;
+        if (entry.signature !== fileSignature(filePath)) {
+            this._evict(key);
+            return null;
+        }
+        // LRU auffrischen
+        this.cache.delete(key);
+        this.cache.set(key, entry);
+        return entry.result;
+    }
+
+    /**
+     * Vordergrund-Anfrage: Cache, laufender Vorab-Lesevorgang für dasselbe
+     * Sheet oder loader(). Hintergrund-Arbeit pausiert bis zum Ende.
+     *
+     * @param {Function} loader - async () => Ergebnis
+     * @param {Object} [options] - { cache: false } für Ergebnisse, die nicht
+     *                             gecacht werden dürfen (z.B. mit Passwort)
+     */
+    async foreground(filePath, sheetName, loader, options = {}) {
+        const useCache = options.cache !== false;
+        const key = this._key(filePath, sheetName);
+        this._touchRecent(filePath, sheetName);
+
+        if (useCache) {
+            const cached = this.get(filePath, sheetName);
+            if (cached) {
+                this.stats.hits++;
+                return cached;
+            }
+        }
+        this.stats.misses++;
+
+        this.foregroundCount++;
+        clearTimeout(this.timer);
+        this.timer = null;
+        try {
+            const inflight = this.inflight;
+            if (inflight && inflight.key === key && useCache) {
+                // Wird gerade vorgelesen - abwarten statt neu zu beginnen
+                this.stats.joined++;
+                const result = await inflight.promise.catch(() => null);
+                if (result && result.success) return result;
+            } else if (inflight) {
+                this._cancelInflight();
+            }
+
+            const signature = fileSignature(filePath);
+            const result = await loader();
+            if (useCache && result && result.success && signature) {
+                this._store(key, signature, result);
+            }
+            return result;
+        } finally {
+            this.foregroundCount--;
+            this._scheduleIdle();
+        }
+    }
+
+    /**
+     * Plant das Vorlesen rund um das aktive Sheet
+     * @param {string[]} sheetOrder - Alle Sheets der Datei in Reihenfolge
+     */
+    schedule(filePath, activeSheet, sheetOrder) {
+        const candidates = [];
+        const index = (sheetOrder || []).indexOf(activeSheet);
+        if (index >= 0) {
+            for (let distance = 1; distance <= this.neighbours; distance++) {
+                if (index + distance < sheetOrder.length) candidates.push(sheetOrder[index + distance]);
+                if (index - distance >= 0) candidates.push(sheetOrder[index - distance]);
+            }
+        }
+        for (const sheetName of (this.recentByFile.get(filePath) || []).slice(0, this.recent + 1)) {
+            candidates.push(sheetName);
+        }
+
+        // Alte Warteschlange verwerfen - nur die Umgebung des aktiven Sheets zählt
+        this.queue = [];
+        const seen = new Set([activeSheet]);
+        for (const sheetName of candidates) {
+            if (seen.has(sheetName) || (sheetOrder && !sheetOrder.includes(sheetName))) continue;
+            seen.add(sheetName);
+            if (!this.get(filePath, sheetName)) {
+                this.queue.push({ filePath, sheetName });
+            }
+        }
+        this._scheduleIdle();
+    }
+
+    /**
+     * Verwirft alle Einträge einer Datei (z.B. nach dem Speichern)
+     */
+    invalidate(filePath) {
+        for (const key of [...this.cache.keys()]) {
+            if (key.startsWith(`${filePath}\u0000`)) this._evict(key);
+        }
+        // Erst abbrechen (stellt das Sheet wieder in die Warteschlange), dann filtern
+        if (this.inflight && this.inflight.filePath === filePath) this._cancelInflight();
+        this.queue = this.queue.filter(job => job.filePath !== filePath);
+    }
+
+    /**
+     * Bricht alles ab und leert den Cache
+     */
+    clear() {
+        clearTimeout(this.timer);
+        this.timer = null;
+        this.queue = [];
+        this._cancelInflight();
+        this.cache.clear();
+        this.cacheBytes = 0;
+    }
+
+    getStats() {
+        return {
+            ...this.stats,
+            entries: this.cache.size,
+            bytes: this.cacheBytes,
+            queued: this.queue.length,
+            inflight: this.inflight ? this.inflight.sheetName : null
+        };
+    }
+
+    // --- intern ------------------------------------------------------------------
+
+    _touchRecent(filePath, sheetName) {
+        const list = (this.recentByFile.get(filePath) || []).filter(name => name !== sheetName);
+        list.unshift(sheetName);
+        this.recentByFile.set(filePath, list.slice(0, this.recent + 1));
+    }
+
+    _store(key, signature, result) {
+        const bytes = estimateResultBytes(result);
+        if (bytes > this.maxBytes) return;
+        this._evict(key);
+        this.cache.set(key, { signature, result, bytes });
+        this.cacheBytes += bytes;
+        for (const oldest of this.cache.keys()) {
+            if (this.cacheBytes <= this.maxBytes) break;
+            this._evict(oldest);
+            this.stats.evicted++;
+        }
+    }
+
+    _evict(key) {
+        const entry = this.cache.get(key);
+        if (entry) {
+            this.cache.delete(key);
+            this.cacheBytes -= entry.bytes;
+        }
+    }
+
+    _cancelInflight() {
+        if (!this.inflight) return;
+        this.log(`[Prefetch] Abgebrochen für Vordergrund: ${this.inflight.sheetName}`);
+        this.inflight.controller.abort();
+        // Abgebrochenes Sheet später erneut versuchen
+        this.queue.unshift({ filePath: this.inflight.filePath, sheetName: this.inflight.sheetName });
+        this.inflight = null;
+        this.stats.cancelled++;
+    }
+
+    _scheduleIdle() {
+        if (this.timer || this.foregroundCount > 0 || this.inflight || this.queue.length === 0) return;
+        this.timer = setTimeout(() => {
+            this.timer = null;
+            this._pump();
+        }, this.idleDelayMs);
+    }
+
+    _pump() {
+        if (this.foregroundCount > 0 || this.inflight) return;
+        const job = this.queue.shift();
+        if (!job) return;
+        const key = this._key(job.filePath, job.sheetName);
+        const signature = fileSignature(job.filePath);
+        if (!signature || this.get(job.filePath, job.sheetName)) {
+            this._pump();
+            return;
+        }
+
+        const controller = new AbortController();
+        const inflight = { key, filePath: job.filePath, sheetName: job.sheetName, controller };
+        const startTime = Date.now();
+        inflight.promise = this.readSheet(job.filePath, job.sheetName, controller.signal);
+        this.inflight = inflight;
+
+        inflight.promise.then((result) => {
+            if (controller.signal.aborted) return;
+            if (result && result.success && signature === fileSignature(job.filePath)) {
+                this._store(key, signature, result);
+                this.stats.prefetched++;
+                this.log(`[Prefetch] "${job.sheetName}" vorgelesen in ${Date.now() - startTime}ms`);
+            } else {
+                this.stats.failed++;
+            }
+        }).catch((error) => {
+            if (!controller.signal.aborted) {
+                this.stats.failed++;
+                this.log(`[Prefetch] Fehler bei "${job.sheetName}": ${error.message}`);
+            }
+        }).finally(() => {
+            if (this.inflight === inflight) this.inflight = null;
+            this._scheduleIdle();
+        });
+    }
+}
+
+module.exports = {
+    SheetPrefetchScheduler,
+    estimateResultBytes
+};
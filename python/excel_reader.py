@@ -13,6 +13,10 @@ from openpyxl.utils import get_column_letter
 from openpyxl.styles import PatternFill
 from openpyxl.formatting.rule import CellIsRule, FormulaRule, ColorScaleRule, DataBarRule
 
+from excel_row_delta import compute_row_fingerprints
+from excel_package_cache import open_source, close_source
+from excel_package_crypto import PackageCryptoError
+
 
 def argb_to_hex(argb):
     """Konvertiert ARGB (z.B. 'FF00FF00') zu Hex ('#00FF00')"""
@@ -96,7 +100,7 @@ def serialize_value(value):
     return str(value)
 
 
-def read_sheet(file_path, sheet_name=None, options=None):
+def read_sheet(file_path, sheet_name=None, options=None, password=None):
     """
     Liest ein Excel-Sheet und gibt Daten + Metadaten zurück
     
@@ -104,18 +108,23 @@ def read_sheet(file_path, sheet_name=None, options=None):
         file_path: Pfad zur Excel-Datei
         sheet_name: Name des Sheets (None = aktives Sheet)
         options: Dict mit Optionen (extractStyles, etc.)
+        password: Passwort einer verschlüsselten Datei (entschlüsselt über excel_package_cache)
     
     Returns:
         Dict mit headers, data, styles, etc.
     """
     options = options or {}
     extract_styles = options.get('extractStyles', True)
+    source = None
     
     try:
+        # Verschlüsselte Datei: Klartext aus dem Cache (keine temporäre Datei)
+        source = open_source(file_path, password)
+        
         # Workbook laden
         # WICHTIG: read_only=False ist nötig für vollständige Style-Extraktion
         # aber wir können data_only=True nicht verwenden, da wir Formeln brauchen
-        wb = load_workbook(file_path, data_only=False, read_only=False)
+        wb = load_workbook(source, data_only=False, read_only=False)
         
         # Sheet auswählen
         if sheet_name:
@@ -148,6 +157,7 @@ def read_sheet(file_path, sheet_name=None, options=None):
             'success': True,
             'headers': headers,
             'data': data,
+            'rowFingerprints': compute_row_fingerprints(data),  # Für Delta-Writes
             'sheetName': ws.title,
             'rowCount': max_row - 1,  # Ohne Header
             'columnCount': max_col
@@ -236,19 +246,29 @@ def read_sheet(file_path, sheet_name=None, options=None):
         wb.close()
         return result
         
+    except PackageCryptoError as e:
+        return {'success': False, 'error': str(e), 'needsPassword': True}
     except Exception as e:
         return {'success': False, 'error': str(e)}
+    finally:
+        close_source(source)
 
 
-def list_sheets(file_path):
+def list_sheets(file_path, password=None):
     """Listet alle Sheets in einer Excel-Datei"""
+    source = None
     try:
-        wb = load_workbook(file_path, read_only=True)
+        source = open_source(file_path, password)
+        wb = load_workbook(source, read_only=True)
         sheets = wb.sheetnames
         wb.close()
         return {'success': True, 'sheets': sheets}
+    except PackageCryptoError as e:
+        return {'success': False, 'error': str(e), 'needsPassword': True}
     except Exception as e:
         return {'success': False, 'error': str(e)}
+    finally:
+        close_source(source)
 
 
 def main():
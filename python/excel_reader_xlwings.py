@@ -35,8 +35,11 @@ if platform.system() == 'Windows':
         sys.path.insert(0, win32_lib)
 
 import xlwings as xw
-from openpyxl import load_workbook
-from openpyxl.utils import get_column_letter
+from concurrent.futures import ThreadPoolExecutor
+
+from excel_row_delta import compute_row_fingerprints
+from excel_sheet_metadata import read_sheet_metadata, clip_metadata
+from excel_app_pool import get_active_pool
 
 
 def kill_excel_instances():
@@ -209,6 +212,29 @@ def get_font_info_xlwings(cell):
     return None
 
 
+def _open_app():
+    """
+    Excel-App zum Lesen: im persistenten Worker aus dem Pool geliehen,
+    sonst eine eigene Instanz (bleibt danach laufen).
+    
+    Returns:
+        (app, lease) - lease ist None ohne Pool
+    """
+    pool = get_active_pool()
+    if pool is not None:
+        lease = pool.acquire()
+        return lease.app, lease
+    
+    # Excel-App starten (ohne with-Kontext, um Cleanup-Probleme zu vermeiden)
+    app = xw.App(visible=False, add_book=False)
+    app.display_alerts = False
+    app.screen_updating = False
+    
+    # Verstecke Excel sofort nach dem Start
+    hide_excel()
+    return app, None
+
+
 def read_sheet_xlwings(file_path, sheet_name=None, options=None):
     """
     Liest ein Excel-Sheet mit xlwings und gibt Daten + Metadaten zurück
@@ -231,15 +257,16 @@ def read_sheet_xlwings(file_path, sheet_name=None, options=None):
     
     app = None
     wb = None
+    lease = None
+    failed = False
+    
+    # Metadaten (Merged, Hidden, AutoFilter, Breiten, Styles) parallel zum
+    # Excel-Lesen aus dem XML holen - ein Durchlauf, kein openpyxl-Laden
+    metadata_executor = ThreadPoolExecutor(max_workers=1)
+    metadata_future = metadata_executor.submit(read_sheet_metadata, file_path, sheet_name, extract_styles)
     
     try:
-        # Excel-App starten (ohne with-Kontext, um Cleanup-Probleme zu vermeiden)
-        app = xw.App(visible=False, add_book=False)
-        app.display_alerts = False
-        app.screen_updating = False
-        
-        # Verstecke Excel sofort nach dem Start
-        hide_excel()
+        app, lease = _open_app()
         
         # Workbook öffnen (read_only für schnelleres Lesen)
         wb = app.books.open(file_path, read_only=True)
@@ -291,147 +318,68 @@ def read_sheet_xlwings(file_path, sheet_name=None, options=None):
             else:
                 data.append([serialize_value(row)])
         
-        # Column Widths - nur bei kleineren Dateien (sonst zu langsam)
-        col_widths = {}
-        if max_col <= 100:  # Nur bei max 100 Spalten
-            for col_idx in range(1, max_col + 1):
-                try:
-                    width = ws.range((1, col_idx)).column_width
-                    if width:
-                        col_widths[str(col_idx - 1)] = width
-                except:
-                    pass
-        
         # Formeln überspringen - werden von openpyxl gelesen (schneller)
         cell_formulas = {}
         
         # Workbook schließen (Excel bleibt laufen für weitere Operationen)
         wb.close()
         
-        # Jetzt Struktur-Metadaten mit openpyxl lesen (ohne Excel zu öffnen!)
         result = {
             'success': True,
             'headers': headers,
             'data': data,
+            'rowFingerprints': compute_row_fingerprints(data),  # Für Delta-Writes
             'sheetName': actual_sheet_name,
             'rowCount': max_row - 1,
             'columnCount': max_col,
-            'columnWidths': col_widths,
             'cellFormulas': cell_formulas
         }
         
-        # Styles, Merged Cells, AutoFilter etc. mit openpyxl lesen (kein Excel nötig!)
+        # Styles, Merged Cells, AutoFilter, Breiten aus dem XML-Durchlauf (kein Excel nötig!)
         try:
-            wb_xl = load_workbook(file_path, read_only=False, data_only=True)
-            ws_xl = wb_xl[actual_sheet_name] if actual_sheet_name else wb_xl.active
-            
-            # Merged Cells
-            merged = [str(r) for r in ws_xl.merged_cells.ranges]
-            result['mergedCells'] = merged
-            
-            # AutoFilter
-            if ws_xl.auto_filter and ws_xl.auto_filter.ref:
-                result['autoFilterRange'] = ws_xl.auto_filter.ref
-            
-            # Hidden Columns
-            hidden_cols = []
-            for col_idx in range(1, max_col + 1):
-                try:
-                    col_letter = get_column_letter(col_idx)
-                    col_dim = ws_xl.column_dimensions.get(col_letter)
-                    if col_dim and col_dim.hidden:
-                        hidden_cols.append(col_idx - 1)
-                except:
-                    pass
-            result['hiddenColumns'] = hidden_cols
-            
-            # Hidden Rows
-            hidden_rows = []
-            for row_idx in range(2, max_row + 1):
-                try:
-                    row_dim = ws_xl.row_dimensions.get(row_idx)
-                    if row_dim and row_dim.hidden:
-                        hidden_rows.append(row_idx - 2)
-                except:
-                    pass
-            result['hiddenRows'] = hidden_rows
-            
-            wb_xl.close()
-        except Exception:
-            result['mergedCells'] = []
-            result['hiddenColumns'] = []
-            result['hiddenRows'] = []
+            meta = metadata_future.result()
+            if meta['sheetName'] != actual_sheet_name:
+                # Aktives Sheet laut Excel weicht von workbook.xml ab
+                meta = read_sheet_metadata(file_path, actual_sheet_name, extract_styles)
+            clipped = clip_metadata(meta, max_row, max_col)
+        except Exception as e:
+            print(f"[xlwings_reader] Metadaten nicht lesbar: {e}", file=sys.stderr)
+            clipped = {'mergedCells': [], 'hiddenColumns': [], 'hiddenRows': [],
+                       'columnWidths': {}, 'cellStyles': {}, 'cellFonts': {}}
         
-        # Styles mit openpyxl extrahieren (kein Excel nötig, schneller!)
+        result['mergedCells'] = clipped['mergedCells']
+        if clipped.get('autoFilterRange'):
+            result['autoFilterRange'] = clipped['autoFilterRange']
+        result['hiddenColumns'] = clipped['hiddenColumns']
+        result['hiddenRows'] = clipped['hiddenRows']
+        result['columnWidths'] = clipped['columnWidths']
         if extract_styles:
-            try:
-                wb_styles = load_workbook(file_path, read_only=False, data_only=False)
-                ws_styles = wb_styles[actual_sheet_name] if actual_sheet_name else wb_styles.active
-                
-                cell_styles = {}
-                cell_fonts = {}
-                
-                for row_idx in range(1, max_row + 1):
-                    for col_idx in range(1, max_col + 1):
-                        key = f"{row_idx - 1}-{col_idx - 1}"
-                        cell = ws_styles.cell(row=row_idx, column=col_idx)
-                        
-                        # Fill Color
-                        if cell.fill and cell.fill.fgColor and cell.fill.fgColor.rgb:
-                            rgb = cell.fill.fgColor.rgb
-                            if isinstance(rgb, str) and len(rgb) >= 6 and rgb != '00000000':
-                                hex_color = argb_to_hex(rgb)
-                                if hex_color:
-                                    cell_styles[key] = hex_color
-                        
-                        # Font Info
-                        font = cell.font
-                        if font:
-                            font_info = {}
-                            if font.bold:
-                                font_info['bold'] = True
-                            if font.italic:
-                                font_info['italic'] = True
-                            if font.color and font.color.rgb and font.color.rgb != '00000000':
-                                hex_color = argb_to_hex(font.color.rgb)
-                                if hex_color and hex_color != '#000000':
-                                    font_info['color'] = hex_color
-                            if font.size and font.size != 11:
-                                font_info['size'] = font.size
-                            if font.name and font.name.lower() not in ['calibri', 'arial']:
-                                font_info['name'] = font.name
-                            if font_info:
-                                cell_fonts[key] = font_info
-                
-                result['cellStyles'] = cell_styles
-                result['cellFonts'] = cell_fonts
-                result['defaultFont'] = {'name': 'Calibri', 'size': 11}
-                
-                wb_styles.close()
-            except Exception:
-                result['cellStyles'] = {}
-                result['cellFonts'] = {}
+            result['cellStyles'] = clipped['cellStyles']
+            result['cellFonts'] = clipped['cellFonts']
+            result['defaultFont'] = {'name': 'Calibri', 'size': 11}
         
         # Excel bleibt laufen für weitere Sheet-Operationen
         return result
         
     except Exception as e:
         import traceback
+        failed = True
         return {'success': False, 'error': str(e), 'traceback': traceback.format_exc()}
+    finally:
+        metadata_executor.shutdown(wait=False)
+        # Pool: Instanz zurückgeben (offene Workbooks werden dort geschlossen)
+        if lease is not None:
+            lease.release(failed=failed)
 
 
 def list_sheets_xlwings(file_path):
     """Listet alle Sheets in einer Excel-Datei mit xlwings"""
     # NICHT am Anfang beenden!
     
+    lease = None
+    failed = False
     try:
-        # Excel-App starten (ohne with-Kontext)
-        app = xw.App(visible=False, add_book=False)
-        app.display_alerts = False
-        app.screen_updating = False
-        
-        # Verstecke Excel sofort
-        hide_excel()
+        app, lease = _open_app()
         
         wb = app.books.open(file_path, read_only=True)
         sheets = [s.name for s in wb.sheets]
@@ -440,7 +388,11 @@ def list_sheets_xlwings(file_path):
         # Excel bleibt laufen für weitere Operationen
         return {'success': True, 'sheets': sheets}
     except Exception as e:
+        failed = True
         return {'success': False, 'error': str(e)}
+    finally:
+        if lease is not None:
+            lease.release(failed=failed)
 
 
 def main():
@@ -0,0 +1,534 @@
+#!/usr/bin/env python3
+"""
+Excel Row Append - Zeilen ohne Objektmodell an ein Sheet anhängen
+
+Die Zeilenübertragung (excel:insertRows) hängt meist nur wenige Zeilen an
+eine große Zieldatei an. Mit xlsx-populate bedeutet das: ganze Arbeitsmappe
+laden, Zeilen schreiben, ganze Datei neu speichern. Hier wird nur das
+Sheet-XML durchlaufen:
+
+- erste freie Zeile suchen (wie bisher: ab Zeile 2, Flag- und Datenspalte leer)
+- alles davor unverändert durchreichen, die neuen <row>-Elemente einsetzen
+  (vorhandene leere, formatierte Zeilen werden ergänzt)
+- Formate (Style-IDs) aus der letzten Datenzeile oder einer konfigurierten
+  Vorlagenzeile übernehmen; Datumswerte ohne Datumsformat erhalten das
+  Spaltenformat bzw. DD.MM.YYYY (neue xf-Einträge in styles.xml)
+- dimension, Tabellen-ref, autoFilter, bedingte Formatierung und
+  Datenüberprüfungen, die bis an die neuen Zeilen reichen, werden erweitert
+
+Texte werden als Inline-Strings geschrieben (sharedStrings.xml bleibt
+unverändert), alle anderen Members roh übernommen (excel_sheet_ops._Package).
+Die Umwandlung deutscher Zahlen/Datumswerte erfolgt vorher in main.js - hier
+kommen fertige Werte an.
+
+Nur Standardbibliothek (das eingebettete Windows-Python hat kein lxml).
+
+Aufruf (Konfiguration als JSON über stdin):
+    {"filePath": "...", "sheetName": "...", "checkColumns": [1, 3], "templateRow": null,
+     "rows": [[[spalte, wert, istDatum], ...], ...]}
+"""
+
+import json
+import re
+import sys
+from typing import Any, Dict, List, Optional, Set, Tuple
+from xml.sax.saxutils import escape
+
+from excel_sheet_ops import SheetOpError, _Package, _Workbook, _attrs, _decode, _encode, _run, _set_attr
+
+# Deutsches Standard-Datumsformat (wie bisher bei xlsx-populate)
+DEFAULT_DATE_FORMAT = 'DD.MM.YYYY'
+# Bis zu dieser Zeile wird nach einem Spaltenformat für Datumswerte gesucht
+FORMAT_SCAN_ROWS = 100
+# Erste benutzerdefinierte numFmtId
+FIRST_CUSTOM_NUM_FMT = 164
+
+_ROW_RE = re.compile(rb'<(?:\w+:)?row\b([^>]*?)(/?)>')
+_ROW_NUMBER_RE = re.compile(rb'\br="(\d+)"')
+_CELL_RE = re.compile(r'<(?:\w+:)?c\b([^>]*?)(?:/>|>(.*?)</(?:\w+:)?c>)', re.S)
+_VALUE_RE = re.compile(rb'<(?:\w+:)?v>(.*?)</(?:\w+:)?v>', re.S)
+_TEXT_RE = re.compile(rb'<(?:\w+:)?t\b[^>]*>(.*?)</(?:\w+:)?t>', re.S)
+_TEXT_NODE_RE = re.compile(rb'>[^<]')
+_SI_RE = re.compile(rb'<(?:\w+:)?si\b[^>]*?(?:/>|>(.*?)</(?:\w+:)?si>)', re.S)
+_REF_RE = re.compile(r'^\$?([A-Z]{1,3})\$?(\d+)(?::\$?([A-Z]{1,3})\$?(\d+))?$')
+_RANGE_TAG_RE = re.compile(r'<(?:\w+:)?(?:autoFilter|conditionalFormatting|dataValidation)\b[^>]*>')
+_SQREF_ELEMENT_RE = re.compile(r'<((?:\w+:)?)sqref>(.*?)</\1sqref>', re.S)
+_INVALID_XML_CHARS_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+# =============================================================================
+# Zellen und Bereiche
+# =============================================================================
+
+def _column_letter(number: int) -> str:
+    letters = ''
+    while number > 0:
+        number, rest = divmod(number - 1, 26)
+        letters = chr(65 + rest) + letters
+    return letters
+
+
+def _column_number(letters: str) -> int:
+    number = 0
+    for ch in letters:
+        number = number * 26 + ord(ch) - 64
+    return number
+
+
+def _cell_xml(prefix: str, ref: str, value: Any, style: Optional[int]) -> str:
+    style_attr = f' s="{style}"' if style else ''
+    if isinstance(value, bool):
+        return f'<{prefix}c r="{ref}"{style_attr} t="b"><{prefix}v>{int(value)}</{prefix}v></{prefix}c>'
+    if isinstance(value, (int, float)):
+        return f'<{prefix}c r="{ref}"{style_attr}><{prefix}v>{value!r}</{prefix}v></{prefix}c>'
+    # Steuerzeichen sind in XML nicht erlaubt - Excel-Schreibweise _xHHHH_
+    text = _INVALID_XML_CHARS_RE.sub(lambda m: '_x%04X_' % ord(m.group(0)), str(value))
+    return (f'<{prefix}c r="{ref}"{style_attr} t="inlineStr"><{prefix}is><{prefix}t xml:space="preserve">'
+            f'{escape(text)}</{prefix}t></{prefix}is></{prefix}c>')
+
+
+def _parse_cells(row_xml: str) -> Dict[int, Tuple[Optional[int], str]]:
+    """Zellen einer Zeile: {spalte: (style, xml)}"""
+    cells = {}
+    for match in _CELL_RE.finditer(row_xml):
+        attrs = _attrs(match.group(1))
+        ref = re.match(r'([A-Z]+)', attrs.get('r', ''))
+        if not ref:
+            raise ValueError('Zelle ohne Adresse (r-Attribut)')
+        style = attrs.get('s')
+        cells[_column_number(ref.group(1))] = (int(style) if style else None, match.group(0))
+    return cells
+
+
+def _extend_ref(ref: str, first_new: int, last_new: int) -> str:
+    """
+    Bereich bis last_new verlängern, wenn er an die neuen Zeilen grenzt
+    (endet in der Zeile darüber oder innerhalb). Reine Kopfzeilen-Bereiche
+    und ganze Spalten bleiben unverändert.
+    """
+    match = _REF_RE.match(ref)
+    if not match or not match.group(3):
+        return ref
+    start_col, start_row, end_col, end_row = match.group(1), int(match.group(2)), match.group(3), int(match.group(4))
+    if start_row < first_new and end_row >= 2 and first_new - 1 <= end_row < last_new:
+        return f'{start_col}{start_row}:{end_col}{last_new}'
+    return ref
+
+
+def _extend_sqref(sqref: str, first_new: int, last_new: int) -> str:
+    return ' '.join(_extend_ref(ref, first_new, last_new) for ref in sqref.split())
+
+
+def _extend_dimension(ref: str, first_new: int, last_new: int, last_col: int) -> str:
+    match = _REF_RE.match(ref)
+    if not match:
+        return ref
+    start_col, start_row = match.group(1), int(match.group(2))
+    end_col = match.group(3) or start_col
+    end_row = int(match.group(4) or start_row)
+    start_row = min(start_row, first_new)
+    end_row = max(end_row, last_new)
+    end_col = _column_letter(max(_column_number(end_col), last_col))
+    return f'{start_col}{start_row}:{end_col}{end_row}'
+
+
+# =============================================================================
+# Styles
+# =============================================================================
+
+class _Styles:
+    """cellXfs und numFmts aus styles.xml - neue Einträge werden nur angehängt"""
+
+    def __init__(self, package: _Package, part: Optional[str]):
+        self.package = package
+        self.part = part
+        self.text = package.read_text(part) if part else None
+        self.changed = False
+        self._derived: Dict[Tuple[int, int], int] = {}
+        block = re.search(r'<((?:\w+:)?)cellXfs\b[^>]*>(.*?)</\1cellXfs>', self.text or '', re.S)
+        self.xfs: List[str] = re.findall(r'<(?:\w+:)?xf\b[^>]*?(?:/>|>.*?</(?:\w+:)?xf>)', block.group(2), re.S) \
+            if block else []
+        self.num_fmts: Dict[int, str] = {
+            int(attrs['numFmtId']): attrs.get('formatCode', '')
+            for attrs in (_attrs(tag) for tag in re.findall(r'<(?:\w+:)?numFmt\b[^>]*>', self.text or ''))
+            if attrs.get('numFmtId', '').isdigit()}
+        self._new_fmts: List[int] = []
+
+    def num_fmt(self, style: Optional[int]) -> int:
+        style = style or 0
+        if style >= len(self.xfs):
+            return 0
+        value = _attrs(self.xfs[style][:self.xfs[style].index('>') + 1]).get('numFmtId', '0')
+        return int(value) if value.isdigit() else 0
+
+    def date_format(self) -> int:
+        """numFmtId für DD.MM.YYYY (vorhanden oder neu angelegt)"""
+        for fmt_id, code in self.num_fmts.items():
+            if code == DEFAULT_DATE_FORMAT:
+                return fmt_id
+        fmt_id = max([FIRST_CUSTOM_NUM_FMT - 1] + list(self.num_fmts)) + 1
+        self.num_fmts[fmt_id] = DEFAULT_DATE_FORMAT
+        self._new_fmts.append(fmt_id)
+        self.changed = True
+        return fmt_id
+
+    def with_num_fmt(self, style: Optional[int], fmt_id: int) -> Optional[int]:
+        """Style mit anderem Zahlenformat (neuer xf-Eintrag, einmal pro Kombination)"""
+        style = style or 0
+        if self.num_fmt(style) == fmt_id or not self.xfs:
+            return style
+        key = (style, fmt_id)
+        if key not in self._derived:
+            base = self.xfs[style] if style < len(self.xfs) else self.xfs[0]
+            split = base.index('>') + 1
+            if base[split - 2] == '/':
+                split -= 2
+            open_tag = _set_attr(_set_attr(base[:split] + '>', 'numFmtId', str(fmt_id)), 'applyNumberFormat', '1')
+            derived = open_tag[:-1] + base[split:]
+            # Aus einem früheren Anhängen vorhanden? Dann wiederverwenden statt duplizieren
+            if derived in self.xfs:
+                self._derived[key] = self.xfs.index(derived)
+            else:
+                self.xfs.append(derived)
+                self._derived[key] = len(self.xfs) - 1
+                self.changed = True
+        return self._derived[key]
+
+    def save(self):
+        if not self.changed:
+            return
+        text = self.text
+        block = re.search(r'(<((?:\w+:)?)cellXfs\b[^>]*>)(.*?)(</\2cellXfs>)', text, re.S)
+        open_tag = _set_attr(block.group(1), 'count', str(len(self.xfs)))
+        text = text[:block.start()] + open_tag + ''.join(self.xfs) + block.group(4) + text[block.end():]
+
+        if self._new_fmts:
+            prefix = re.match(r'<((?:\w+:)?)', block.group(1)).group(1)
+            new_fmts = ''.join(f'<{prefix}numFmt numFmtId="{fmt_id}" formatCode="{escape(self.num_fmts[fmt_id])}"/>'
+                               for fmt_id in self._new_fmts)
+            existing = re.search(r'<((?:\w+:)?)numFmts\b[^>]*?(/?)>', text)
+            if existing and not existing.group(2):
+                end = text.index(f'</{existing.group(1)}numFmts>', existing.end())
+                count_tag = _set_attr(existing.group(0), 'count', str(len(self.num_fmts)))
+                text = text[:existing.start()] + count_tag + text[existing.end():end] + new_fmts + text[end:]
+            else:
+                # numFmts muss das erste Kind von styleSheet sein
+                element = f'<{prefix}numFmts count="{len(self._new_fmts)}">{new_fmts}</{prefix}numFmts>'
+                if existing:
+                    text = text[:existing.start()] + element + text[existing.end():]
+                else:
+                    root = re.search(r'<(?:\w+:)?styleSheet\b[^>]*>', text)
+                    text = text[:root.end()] + element + text[root.end():]
+        self.package.write_text(self.part, text)
+
+
+# =============================================================================
+# Sheet-XML
+# =============================================================================
+
+class _SheetScan:
+    """Zeilen des Sheet-XML (Bytes) bis zur ersten freien Zeile durchlaufen"""
+
+    def __init__(self, data: bytes, shared_strings):
+        self.data = data
+        self._shared_strings = shared_strings
+        self._non_empty_strings: Optional[List[bool]] = None
+        tag = re.search(rb'<((?:\w+:)?)sheetData\b[^>]*?(/?)>', data)
+        if not tag:
+            raise ValueError('Sheet-XML ohne <sheetData>')
+        self.prefix = tag.group(1)
+        self.tag = tag
+        self.empty = bool(tag.group(2))
+        self.start = tag.end()
+        self.end = tag.end() if self.empty else data.rindex(b'</' + self.prefix + b'sheetData>')
+        self._row_close = b'</' + self.prefix + b'row>'
+
+    def rows(self, position: int):
+        """(Zeilennummer, Start, Inhalt-Start, Inhalt-Ende, Ende) ab position"""
+        while True:
+            match = _ROW_RE.search(self.data, position, self.end)
+            if not match:
+                return
+            number = _ROW_NUMBER_RE.search(match.group(1))
+            if not number:
+                raise ValueError('Zeile ohne Nummer (r-Attribut)')
+            if match.group(2):
+                yield int(number.group(1)), match.start(), match.end(), match.end(), match.end()
+                position = match.end()
+            else:
+                close = self.data.index(self._row_close, match.end())
+                position = close + len(self._row_close)
+                yield int(number.group(1)), match.start(), match.end(), close, position
+
+    def has_value(self, attrs: bytes, inner: bytes) -> bool:
+        """Hat die Zelle einen nicht-leeren Wert (wie cell.value() bei xlsx-populate)?"""
+        if b't="s"' in attrs:
+            value = _VALUE_RE.search(inner)
+            return bool(value) and self._shared_string_has_text(value.group(1))
+        # Wert, Inline-Text oder Formel (auch ohne zwischengespeichertes Ergebnis)
+        return _TEXT_NODE_RE.search(inner) is not None
+
+    def filled_rows(self, columns: List[int], r_first: bool = True) -> Set[int]:
+        """
+        Zeilen, in denen mindestens eine der Spalten einen Wert hat - ein
+        Regex-Durchlauf. r_first: r ist das erste Attribut (Excel, openpyxl,
+        xlsx-populate) - deutlich schneller als die allgemeine Suche.
+        """
+        letters = b'|'.join(_column_letter(col).encode() for col in columns)
+        tag = re.escape(b'<' + self.prefix + b'c')
+        attrs_before = rb' ' if r_first else rb'\b[^>]*?\s'
+        pattern = re.compile(tag + rb'(' + attrs_before + rb'r="(?:' + letters + rb')(\d+)"[^>]*?)(?:/>|>(.*?)' +
+                             re.escape(b'</' + self.prefix + b'c>') + rb')', re.S)
+        return {int(number) for attrs, number, inner in pattern.findall(self.data, self.start, self.end)
+                if inner and self.has_value(attrs, inner)}
+
+    def row_is_filled(self, number: int, columns: List[int]) -> bool:
+        """Genaue Prüfung einer Zeile (Attribute in beliebiger Reihenfolge)"""
+        row = self.find_row(number)
+        if not row:
+            return False
+        for cell in _CELL_RE.finditer(_decode(self.data[row[2]:row[3]])):
+            ref = re.match(r'([A-Z]+)', _attrs(cell.group(1)).get('r', ''))
+            if ref and _column_number(ref.group(1)) in columns and \
+                    self.has_value(_encode(cell.group(1)), _encode(cell.group(2) or '')):
+                return True
+        return False
+
+    def find_row(self, number: int) -> Optional[Tuple[int, int, int, int, int]]:
+        """Bereich der Zeile number (wie rows()) oder None - gesucht wird vom Ende her"""
+        index = self.data.rfind(b'<' + self.prefix + b'row r="%d"' % number, self.start, self.end)
+        if index == -1 and not self.data.startswith(b'<' + self.prefix + b'row r="', self.start):
+            match = re.compile(rb'<(?:\w+:)?row\b[^>]*?\sr="%d"' % number).search(self.data, self.start, self.end)
+            index = match.start() if match else -1
+        return next(self.rows(index), None) if index != -1 else None
+
+    def _shared_string_has_text(self, index: bytes) -> bool:
+        if self._non_empty_strings is None:
+            data = self._shared_strings() or b''
+            self._non_empty_strings = [bool(m.group(1)) and any(_TEXT_RE.findall(m.group(1)))
+                                       for m in _SI_RE.finditer(data)]
+        try:
+            return self._non_empty_strings[int(index)]
+        except (ValueError, IndexError):
+            return True
+
+
+def _first_free_row(scan: _SheetScan, check_columns: List[int]) -> Tuple[int, int, Dict[int, Tuple[int, int]]]:
+    """
+    Erste freie Zeile ab Zeile 2 (Zeile 1 = Header): fehlende Zeile oder
+    Zeile, in der alle Prüfspalten leer sind.
+
+    Returns:
+        (Zeilennummer, Byte-Position zum Einfügen, {Zeile: Inhaltsbereich} der Zeile davor)
+    """
+    filled = scan.filled_rows(check_columns)
+    number = 2
+    while number in filled:
+        number += 1
+    if scan.row_is_filled(number, check_columns):
+        # Zellen mit r nicht als erstem Attribut - allgemeine Suche
+        filled = scan.filled_rows(check_columns, r_first=False)
+        number = 2
+        while number in filled:
+            number += 1
+    # Die Zeile davor ist belegt (oder der Header) - eingefügt wird direkt dahinter
+    previous = scan.find_row(number - 1)
+    if previous:
+        return number, previous[4], {number - 1: (previous[2], previous[3])}
+    # Kein Header: vor der ersten Zeile ab number einfügen
+    for row_number, start, _, _, _ in scan.rows(scan.start):
+        if row_number >= number:
+            return number, start, {}
+    return number, scan.end, {}
+
+
+def _column_formats(scan: _SheetScan, styles: _Styles, columns: List[int]) -> Dict[int, int]:
+    """Erstes Zahlenformat (nicht Standard) pro Spalte in Zeilen 2-100 (wie getColumnFormat)"""
+    formats: Dict[int, int] = {}
+    for number, _, content_start, content_end, _ in scan.rows(scan.start):
+        if number > FORMAT_SCAN_ROWS or len(formats) == len(columns):
+            break
+        if number < 2:
+            continue
+        cells = _parse_cells(_decode(scan.data[content_start:content_end]))
+        for col in columns:
+            if col in formats or col not in cells:
+                continue
+            style, xml = cells[col]
+            fmt_id = styles.num_fmt(style)
+            if fmt_id:
+                cell = _CELL_RE.match(xml)
+                if scan.has_value(_encode(cell.group(1)), _encode(cell.group(2) or '')):
+                    formats[col] = fmt_id
+    return formats
+
+
+def _extend_ranges(xml: str, first_new: int, last_new: int) -> Tuple[str, int]:
+    """autoFilter-ref, sqref der bedingten Formatierung/Datenüberprüfung (auch x14) erweitern"""
+    count = 0
+
+    def fix_tag(match):
+        nonlocal count
+        tag = match.group(0)
+        for name in ('ref', 'sqref'):
+            value = _attrs(tag).get(name)
+            if value:
+                extended = _extend_sqref(value, first_new, last_new)
+                if extended != value:
+                    tag = _set_attr(tag, name, extended)
+                    count += 1
+        return tag
+
+    def fix_element(match):
+        nonlocal count
+        extended = _extend_sqref(match.group(2), first_new, last_new)
+        if extended == match.group(2):
+            return match.group(0)
+        count += 1
+        return f'<{match.group(1)}sqref>{extended}</{match.group(1)}sqref>'
+
+    xml = _RANGE_TAG_RE.sub(fix_tag, xml)
+    return _SQREF_ELEMENT_RE.sub(fix_element, xml), count
+
+
+def _extend_tables(package: _Package, sheet_part: str, first_new: int, last_new: int) -> int:
+    """Tabellen (ref + autoFilter), die bis an die neuen Zeilen reichen, verlängern"""
+    extended = 0
+    for rel in package.relationships(sheet_part):
+        if not rel.get('Type', '').endswith('/table') or 'part' not in rel:
+            continue
+        text = package.read_text(rel['part'])
+        tag = re.search(r'<(?:\w+:)?table\b[^>]*>', text or '')
+        if not tag:
+            continue
+        attrs = _attrs(tag.group(0))
+        if int(attrs.get('totalsRowCount', '0') or 0) > 0:
+            continue  # Ergebniszeile bleibt die letzte Tabellenzeile
+        ref = attrs.get('ref', '')
+        new_ref = _extend_ref(ref, first_new, last_new)
+        if new_ref == ref:
+            continue
+        text = text[:tag.start()] + _set_attr(tag.group(0), 'ref', new_ref) + text[tag.end():]
+        text = re.sub(r'<(?:\w+:)?autoFilter\b[^>]*>',
+                      lambda m: _set_attr(m.group(0), 'ref', new_ref) if _attrs(m.group(0)).get('ref') == ref
+                      else m.group(0), text, count=1)
+        package.write_text(rel['part'], text)
+        extended += 1
+    return extended
+
+
+# =============================================================================
+# Anhängen
+# =============================================================================
+
+def append_rows(file_path: str, sheet_name: str, rows: List[List[list]], check_columns: List[int],
+                template_row: Optional[int] = None) -> Dict:
+    """
+    Zeilen ab der ersten freien Zeile einsetzen.
+
+    Args:
+        rows: pro Zeile [[Spalte (1-basiert), Wert, istDatum], ...] - bereits umgewandelt
+        check_columns: Spalten, die eine belegte Zeile kennzeichnen (Flag-/Datenspalte)
+        template_row: Zeile, deren Formate übernommen werden (Standard: letzte Datenzeile)
+    """
+    def operation(package: _Package, workbook: _Workbook):
+        index = next((i for i, name in enumerate(workbook.names) if name == sheet_name), None)
+        if index is None:
+            raise SheetOpError(f'Sheet "{sheet_name}" nicht gefunden')
+        sheet_part = workbook.sheet_part(index)
+        related = {rel.get('Type', '').rsplit('/', 1)[-1]: rel.get('part') for rel in workbook.rels.values()}
+
+        data = package.read(sheet_part)
+        scan = _SheetScan(data, lambda: package.read(related['sharedStrings']) if related.get('sharedStrings') else None)
+        insert_row, insert_pos, seen = _first_free_row(scan, check_columns)
+        if not rows:
+            return {'insertedCount': 0, 'startRow': insert_row}
+        last_new = insert_row + len(rows) - 1
+        prefix = _decode(scan.prefix)
+
+        # Vorhandene (leere, formatierte) Zeilen im Zielbereich
+        existing: Dict[int, Tuple[str, Dict[int, Tuple[Optional[int], str]]]] = {}
+        consumed = insert_pos
+        for number, start, content_start, content_end, end in scan.rows(insert_pos):
+            if number > last_new:
+                break
+            open_tag = _decode(data[start:content_start])
+            if open_tag.endswith('/>'):
+                open_tag = open_tag[:-2].rstrip() + '>'
+            existing[number] = (_set_attr(open_tag, 'spans', None),
+                                _parse_cells(_decode(data[content_start:content_end])))
+            consumed = end
+
+        # Vorlagenzeile für die Formate
+        source_row = int(template_row) if template_row else (insert_row - 1 if insert_row > 2 else 2)
+        if source_row in existing:
+            template_cells = existing[source_row][1]
+        elif source_row in seen:
+            template_cells = _parse_cells(_decode(data[seen[source_row][0]:seen[source_row][1]]))
+        else:
+            template_cells = {}
+            for number, _, content_start, content_end, _ in scan.rows(scan.start):
+                if number >= source_row:
+                    if number == source_row:
+                        template_cells = _parse_cells(_decode(data[content_start:content_end]))
+                    break
+
+        styles = _Styles(package, related.get('styles'))
+        date_columns = sorted({col for row in rows for col, value, is_date in row if is_date})
+        column_formats = None
+
+        row_xml = []
+        last_col = 0
+        for offset, row in enumerate(rows):
+            number = insert_row + offset
+            open_tag, cells = existing.get(number, (f'<{prefix}row r="{number}">', {}))
+            cells = dict(cells)
+            for col, value, is_date in row:
+                col = int(col)
+                style = template_cells[col][0] if col in template_cells else (cells[col][0] if col in cells else None)
+                if is_date and styles.num_fmt(style) == 0:
+                    if column_formats is None:
+                        column_formats = _column_formats(scan, styles, date_columns)
+                    style = styles.with_num_fmt(style, column_formats.get(col) or styles.date_format())
+                cells[col] = (style, _cell_xml(prefix, f'{_column_letter(col)}{number}', value, style))
+                last_col = max(last_col, col)
+            row_xml.append(open_tag + ''.join(cells[col][1] for col in sorted(cells)) + f'</{prefix}row>')
+        styles.save()
+
+        head = _decode(data[:scan.tag.start()])
+        head = re.sub(r'<(?:\w+:)?dimension\b[^>]*>',
+                      lambda m: _set_attr(m.group(0), 'ref', _extend_dimension(
+                          _attrs(m.group(0)).get('ref', 'A1'), insert_row, last_new, last_col)), head, count=1)
+        if scan.empty:
+            sheet_data = _encode(f'<{prefix}sheetData>' + ''.join(row_xml) + f'</{prefix}sheetData>')
+            tail, ranges = _extend_ranges(_decode(data[scan.tag.end():]), insert_row, last_new)
+        else:
+            sheet_data = data[scan.tag.start():insert_pos] + _encode(''.join(row_xml)) + data[consumed:scan.end]
+            tail, ranges = _extend_ranges(_decode(data[scan.end:]), insert_row, last_new)
+        package.write(sheet_part, _encode(head) + sheet_data + _encode(tail))
+
+        tables = _extend_tables(package, sheet_part, insert_row, last_new)
+        return {'insertedCount': len(rows), 'startRow': insert_row, 'extendedTables': tables,
+                'extendedRanges': ranges}
+    return _run(file_path, operation)
+
+
+def main():
+    """Hauptfunktion - Konfiguration als JSON über stdin, Ergebnis als JSON"""
+    import io
+    if sys.platform == 'win32':
+        sys.stdin = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    try:
+        config = json.loads(sys.stdin.read())
+        result = append_rows(config['filePath'], config['sheetName'], config.get('rows') or [],
+                             [int(col) for col in config.get('checkColumns') or [1]],
+                             config.get('templateRow'))
+    except (KeyError, ValueError) as e:
+        result = {'success': False, 'error': f'Ungültige Konfiguration: {e}'}
+    print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
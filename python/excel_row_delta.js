@@ -0,0 +1,86 @@
+/**
+ * Zeilen-Fingerprints und Delta-Writes für Excel Data Sync Pro
+ *
+ * Gegenstück zu excel_row_delta.py. Die Reader liefern pro Datenzeile einen
+ * 64-bit Fingerprint (16 Hex-Zeichen). Beim Speichern mit fullRewrite werden
+ * nur die Zeilen an den Python-Writer geschickt, deren Fingerprint sich
+ * geändert hat.
+ *
+ * WICHTIG: Die Kanonisierung muss mit der Python-Variante übereinstimmen.
+ * Abweichungen in Randfällen führen nur dazu, dass eine Zeile neu geschrieben wird.
+ */
+
+const crypto = require('crypto');
+
+// Trennzeichen zwischen Zellwerten (Unit Separator)
+const FIELD_SEPARATOR = '\x1f';
+
+/**
+ * Kanonische String-Darstellung eines Zellwerts
+ * @param {*} value - Zellwert
+ * @returns {string}
+ */
+function canonicalValue(value) {
+    if (value === null || value === undefined || value === '') return '';
+    if (typeof value === 'boolean') return value ? 'b1' : 'b0';
+    if (typeof value === 'number') {
+        // Ganzzahlige Floats wie Python als Integer darstellen (1.0 -> "n1")
+        if (Number.isInteger(value)) return 'n' + BigInt(value).toString();
+        return 'n' + String(value);
+    }
+    if (typeof value === 'string') return 's' + value;
+    // Datum ohne Zeitzone (wie datetime.isoformat in Python)
+    if (value instanceof Date) return 'd' + value.toISOString().substring(0, 23);
+    return 'j' + JSON.stringify(value);
+}
+
+/**
+ * Berechnet den Fingerprint einer Datenzeile
+ * @param {Array} row - Zellwerte der Zeile
+ * @returns {string} 16 Hex-Zeichen (64 bit)
+ */
+function rowFingerprint(row) {
+    const parts = (row || []).map(canonicalValue);
+    // Leere Werte am Zeilenende ignorieren
+    while (parts.length > 0 && parts[parts.length - 1] === '') {
+        parts.pop();
+    }
+    return crypto.createHash('sha1')
+        .update(parts.join(FIELD_SEPARATOR), 'utf8')
+        .digest('hex')
+        .substring(0, 16);
+}
+
+/**
+ * Fingerprints für alle Datenzeilen
+ * @param {Array<Array>} data - Datenzeilen (ohne Header)
+ * @returns {string[]}
+ */
+function computeRowFingerprints(data) {
+    return (data || []).map(rowFingerprint);
+}
+
+/**
+ * Erstellt ein Zeilen-Delta: nur Zeilen deren Fingerprint abweicht
+ * @param {Array<Array>} data - Aktuelle Datenzeilen
+ * @param {string[]} fingerprints - Fingerprints beim Laden
+ * @param {string[]} [currentFingerprints] - Bereits berechnete Fingerprints von data
+ * @returns {{rowCount: number, rows: Array}} rows = [[rowIdx, values], ...]
+ */
+function buildRowDelta(data, fingerprints, currentFingerprints = null) {
+    const current = currentFingerprints || computeRowFingerprints(data);
+    const rows = [];
+    const known = fingerprints.length;
+    for (let rowIdx = 0; rowIdx < data.length; rowIdx++) {
+        if (rowIdx >= known || current[rowIdx] !== fingerprints[rowIdx]) {
+            rows.push([rowIdx, data[rowIdx]]);
+        }
+    }
+    return { rowCount: data.length, rows };
+}
+
+module.exports = {
+    rowFingerprint,
+    computeRowFingerprints,
+    buildRowDelta
+};
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Zeilen-Fingerprints und Delta-Writes für Excel Data Sync Pro
+
+Die Reader liefern pro Datenzeile einen kompakten 64-bit Fingerprint
+(16 Hex-Zeichen) mit. Beim Speichern mit fullRewrite vergleicht die
+Bridge die aktuellen Zeilen mit diesen Fingerprints und schickt nur noch
+die geänderten Zeilen (rowDelta) an den Writer.
+
+WICHTIG: Die Kanonisierung muss mit excel_row_delta.js übereinstimmen.
+Weicht sie in Randfällen ab (z.B. exotische Float-Darstellungen), wird
+die Zeile lediglich als geändert betrachtet und neu geschrieben - es
+gehen nie Änderungen verloren.
+"""
+
+import hashlib
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+# Trennzeichen zwischen Zellwerten (Unit Separator, kommt in Excel-Werten praktisch nie vor)
+_FIELD_SEPARATOR = '\x1f'
+
+
+def _js_number(value):
+    """
+    Nicht-ganzzahliger Float wie JavaScripts Number.prototype.toString
+    (0.00001 statt 1e-05, 1.5e-7 statt 1.5e-07). Beide nutzen die kürzeste
+    eindeutige Ziffernfolge, nur die Schreibweise unterscheidet sich.
+    """
+    digits_tuple = Decimal(repr(abs(value))).normalize().as_tuple()
+    digits = ''.join(str(d) for d in digits_tuple.digits)
+    k = len(digits)
+    n = digits_tuple.exponent + k  # Position des Dezimalpunkts
+    if 0 < n <= 21:
+        text = digits[:n] + '.' + digits[n:]
+    elif -6 < n <= 0:
+        text = '0.' + '0' * -n + digits
+    else:
+        exponent = n - 1
+        text = digits[0] + ('.' + digits[1:] if k > 1 else '') + ('e+' if exponent >= 0 else 'e-') + str(abs(exponent))
+    return ('-' if value < 0 else '') + text
+
+
+def _canonical_value(value):
+    """Kanonische String-Darstellung eines Zellwerts (identisch zur JS-Variante)"""
+    if value is None or value == '':
+        return ''
+    if isinstance(value, bool):
+        return 'b1' if value else 'b0'
+    if isinstance(value, int):
+        return 'n' + str(value)
+    if isinstance(value, float):
+        if value.is_integer():
+            return 'n' + str(int(value))
+        return 'n' + _js_number(value)
+    if isinstance(value, str):
+        return 's' + value
+    if isinstance(value, (date, datetime)):
+        # Wie toISOString() ohne Zeitzone (ExcelJS-Datumswerte sind UTC = Wandzeit)
+        if not isinstance(value, datetime):
+            value = datetime(value.year, value.month, value.day)
+        return 'd' + value.replace(tzinfo=None).isoformat(timespec='milliseconds')
+    return 'j' + json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+def row_fingerprint(row):
+    """
+    Berechnet den Fingerprint einer Datenzeile.
+
+    Leere Werte am Zeilenende werden ignoriert, damit [a, ''] und [a]
+    denselben Fingerprint haben.
+
+    Returns:
+        16 Hex-Zeichen (64 bit)
+    """
+    parts = [_canonical_value(v) for v in (row or [])]
+    while parts and parts[-1] == '':
+        parts.pop()
+    payload = _FIELD_SEPARATOR.join(parts).encode('utf-8')
+    return hashlib.sha1(payload).hexdigest()[:16]
+
+
+def compute_row_fingerprints(data):
+    """Fingerprints für alle Datenzeilen (Index = Datenzeilen-Index)"""
+    return [row_fingerprint(row) for row in data]
+
+
+def build_row_delta(data, row_fingerprints):
+    """
+    Erstellt ein Zeilen-Delta aus aktuellen Daten und Original-Fingerprints.
+
+    Returns:
+        Dict {'rowCount': N, 'rows': [[rowIdx, values], ...]}
+    """
+    rows = []
+    known = len(row_fingerprints)
+    for row_idx, row in enumerate(data):
+        if row_idx >= known or row_fingerprint(row) != row_fingerprints[row_idx]:
+            rows.append([row_idx, row])
+    return {'rowCount': len(data), 'rows': rows}
+
+
+def resolve_rows_to_write(data, row_delta=None, row_fingerprints=None):
+    """
+    Ermittelt welche Zeilen der Writer tatsächlich schreiben muss.
+
+    Priorität:
+    1. rowDelta: nur die gelisteten Zeilen (data wird nicht benötigt)
+    2. rowFingerprints: data komplett, unveränderte Zeilen werden übersprungen
+    3. sonst: alle Zeilen aus data
+
+    Die Zeilen werden lazy geliefert (einmal iterierbar), damit gestreamte
+    Daten (StreamedRows) nicht vollständig im Speicher liegen müssen.
+
+    Returns:
+        Tuple (row_count, Iterator über (row_idx, values))
+    """
+    if row_delta:
+        row_count = row_delta.get('rowCount')
+        if row_count is None:
+            row_count = len(data)
+        rows = ((int(entry[0]), entry[1] or []) for entry in row_delta.get('rows', []))
+        return int(row_count), rows
+
+    if row_fingerprints:
+        known = len(row_fingerprints)
+        rows = ((row_idx, row) for row_idx, row in enumerate(data)
+                if row_idx >= known or row_fingerprint(row) != row_fingerprints[row_idx])
+        return len(data), rows
+
+    return len(data), enumerate(data)
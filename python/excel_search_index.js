@@ -0,0 +1,570 @@
+/**
+ * Trigramm-Index für die Suche in der Quelldatei
+ *
+ * Die Suche (Teilstring sowie Platzhalter * und ?) lief bei jeder Anfrage
+ * linear über alle geladenen Zeilen. Beim Öffnen eines Quell-Sheets baut ein
+ * Worker-Thread einen invertierten Index: für jedes Trigramm (3 Zeichen,
+ * kleingeschrieben, nie über Zellgrenzen hinweg) die Liste der Zeilen, in
+ * denen es vorkommt - als Delta-kodierte Varint-Folge komprimiert.
+ *
+ * Dazu kommen Posting-Listen für einzelne Zeichen und Zeichenpaare
+ * (Unigramme, Bigramme), damit kurze Begriffe wie "ab" oder "*ln" nicht in
+ * eine Prüfung aller Zeilen fallen.
+ *
+ * Eine Anfrage zerlegt jeden Suchbegriff in seine N-Gramme (Abschnitte ab 3
+ * Zeichen in Trigramme, kürzere als Ganzes), schneidet die Posting-Listen
+ * und liefert Kandidaten-Zeilen. Die Prüfung mit der bisherigen Logik
+ * (Verifikation) läuft nur noch über diese Kandidaten und endet, sobald die
+ * angeforderte Seite voll ist. Nur reine Platzhalter ("*", "?") schränken
+ * nichts ein - dann wird wie bisher jede Zeile geprüft.
+ *
+ * Der Index liegt als Binärdatei neben dem Netzwerk-Cache und wird über den
+ * Datei-Fingerprint validiert - erneutes Öffnen baut ihn nicht neu auf.
+ */
+
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const crypto = require('crypto');
+const { Worker, isMainThread, parentPort, workerData } = require('worker_threads');
+const { searchSorted, fileFingerprint } = require('./excel_key_index');
+
+// Standard-Verzeichnis (neben dem Netzwerk-Cache)
+const DEFAULT_INDEX_DIR = path.join(os.tmpdir(), 'excel-data-sync-pro', 'search-index');
+// Maximale Anzahl Index-Dateien auf der Platte (älteste werden verworfen)
+const DEFAULT_MAX_ENTRIES = 8;
+// Anzahl Indizes im Speicher
+const DEFAULT_MAX_MEMORY_ENTRIES = 2;
+// Dateikennung + Version (2: mit Uni- und Bigrammen)
+const MAGIC = Buffer.from('EDSTRGM2');
+// Weitere Posting-Listen nur schneiden, solange sie höchstens so viel länger sind
+const INTERSECT_RATIO = 16;
+// Trennzeichen zwischen Zellen im Zeilentext (N-Gramme darüber werden ausgelassen)
+const CELL_SEPARATOR = '\u0000';
+
+/**
+ * Zeilentext für den Index: Zellen der Suchspalten, getrennt durch CELL_SEPARATOR
+ * @param {Array} row - Zellwerte
+ * @param {number[]|null} columns - Suchspalten (0-basiert) oder null = alle
+ * @returns {string}
+ */
+function rowText(row, columns = null) {
+    const cells = columns ? columns.map(col => row[col]) : row;
+    let text = '';
+    for (const cell of cells) {
+        if (cell) text += String(cell) + CELL_SEPARATOR;
+    }
+    return text;
+}
+
+/**
+ * Schlüssel eines N-Gramms aus UTF-16-Zeichen (exakt als Double). Kein
+ * Zeichen ist 0 (CELL_SEPARATOR), daher überschneiden sich die Bereiche nicht:
+ * Unigramm < 2^16 <= Bigramm < 2^32 <= Trigramm
+ */
+function unigramKey(c0) {
+    return c0;
+}
+
+function bigramKey(c0, c1) {
+    return c0 * 0x10000 + c1;
+}
+
+function trigramKey(c0, c1, c2) {
+    return c0 * 0x100000000 + c1 * 0x10000 + c2;
+}
+
+/**
+ * N-Gramme eines Suchbegriffs (wie matchesTerm im Renderer: Teilstring oder
+ * Platzhalter-Muster, Groß-/Kleinschreibung egal). Abschnitte ab 3 Zeichen
+ * liefern ihre Trigramme, kürzere ihr Bi- bzw. Unigramm.
+ * @param {string} term
+ * @returns {number[]|null} null = Begriff schränkt über den Index nicht ein
+ */
+function termNgrams(term) {
+    const lower = String(term).toLowerCase();
+    const fragments = /[*?]/.test(lower) ? lower.split(/[*?]+/) : [lower];
+    const keys = new Set();
+    for (const fragment of fragments) {
+        const code = (i) => fragment.charCodeAt(i);
+        if (fragment.length === 1) keys.add(unigramKey(code(0)));
+        else if (fragment.length === 2) keys.add(bigramKey(code(0), code(1)));
+        for (let i = 0; i + 3 <= fragment.length; i++) {
+            keys.add(trigramKey(code(i), code(i + 1), code(i + 2)));
+        }
+    }
+    return keys.size ? [...keys] : null;
+}
+
+// Schnitt zweier aufsteigend sortierter Zeilenlisten
+function intersectSorted(a, b) {
+    const result = new Uint32Array(Math.min(a.length, b.length));
+    let count = 0;
+    let i = 0;
+    let j = 0;
+    while (i < a.length && j < b.length) {
+        if (a[i] < b[j]) i++;
+        else if (a[i] > b[j]) j++;
+        else { result[count++] = a[i]; i++; j++; }
+    }
+    return result.subarray(0, count);
+}
+
+// Vereinigung zweier aufsteigend sortierter Zeilenlisten
+function unionSorted(a, b) {
+    const result = new Uint32Array(a.length + b.length);
+    let count = 0;
+    let i = 0;
+    let j = 0;
+    while (i < a.length || j < b.length) {
+        if (j >= b.length || (i < a.length && a[i] < b[j])) result[count++] = a[i++];
+        else if (i >= a.length || b[j] < a[i]) result[count++] = b[j++];
+        else { result[count++] = a[i]; i++; j++; }
+    }
+    return result.subarray(0, count);
+}
+
+class TrigramIndex {
+    /**
+     * @param {Object} options
+     * @param {Float64Array} options.terms - Sortierte N-Gramm-Schlüssel (Uni-, Bi-, Trigramme)
+     * @param {Uint32Array} options.offsets - Start der Posting-Liste je N-Gramm (+1 Endmarke)
+     * @param {Uint32Array} options.counts - Anzahl Zeilen je N-Gramm
+     * @param {Uint8Array} options.postings - Delta-kodierte Varint-Zeilennummern
+     * @param {number} options.rowCount - Anzahl indizierter Zeilen
+     * @param {string|null} options.fingerprint - Fingerprint der Quelldatei
+     */
+    constructor({ terms, offsets, counts, postings, rowCount, fingerprint = null }) {
+        this.terms = terms;
+        this.offsets = offsets;
+        this.counts = counts;
+        this.postings = postings;
+        this.rowCount = rowCount;
+        this.fingerprint = fingerprint;
+    }
+
+    /**
+     * Baut den Index aus Zeilentexten (siehe rowText)
+     * @param {string[]} texts - Ein Text je Datenzeile (Index = rowIndex)
+     * @returns {TrigramIndex}
+     */
+    static build(texts, fingerprint = null) {
+        const ids = new Map();     // N-Gramm -> laufende Nummer
+        const keys = [];
+        const buffers = [];        // Varint-Bytes je N-Gramm
+        const lengths = [];
+        const counts = [];
+        let lastRow = new Int32Array(4096);
+
+        // Zeile an die Posting-Liste eines N-Gramms anhängen (einmal pro Zeile)
+        const add = (key, row) => {
+            let id = ids.get(key);
+            if (id === undefined) {
+                id = keys.length;
+                ids.set(key, id);
+                keys.push(key);
+                buffers.push(new Uint8Array(8));
+                lengths.push(0);
+                counts.push(0);
+                if (id >= lastRow.length) {
+                    const grown = new Int32Array(lastRow.length * 2);
+                    grown.set(lastRow);
+                    lastRow = grown;
+                }
+                lastRow[id] = -1;
+            } else if (lastRow[id] === row) {
+                return;
+            }
+
+            // Delta zur vorherigen Zeile als Varint anhängen
+            let delta = row - lastRow[id];
+            lastRow[id] = row;
+            counts[id]++;
+            let buffer = buffers[id];
+            let length = lengths[id];
+            if (length + 5 > buffer.length) {
+                const grown = new Uint8Array(buffer.length * 2);
+                grown.set(buffer);
+                buffer = buffers[id] = grown;
+            }
+            while (delta >= 0x80) {
+                buffer[length++] = (delta & 0x7f) | 0x80;
+                delta >>>= 7;
+            }
+            buffer[length++] = delta;
+            lengths[id] = length;
+        };
+
+        for (let row = 0; row < texts.length; row++) {
+            const text = texts[row].toLowerCase();
+            for (let i = 0; i < text.length; i++) {
+                // Nie über CELL_SEPARATOR hinweg (charCodeAt hinter dem Ende: NaN)
+                const c0 = text.charCodeAt(i);
+                if (c0 === 0) continue;
+                add(unigramKey(c0), row);
+                const c1 = text.charCodeAt(i + 1);
+                if (!(c1 > 0)) continue;
+                add(bigramKey(c0, c1), row);
+                const c2 = text.charCodeAt(i + 2);
+                if (!(c2 > 0)) continue;
+                add(trigramKey(c0, c1, c2), row);
+            }
+        }
+
+        const order = keys.map((key, id) => id).sort((a, b) => keys[a] - keys[b]);
+        const terms = new Float64Array(order.length);
+        const offsets = new Uint32Array(order.length + 1);
+        const termCounts = new Uint32Array(order.length);
+        let total = 0;
+        for (const id of order) total += lengths[id];
+        const postings = new Uint8Array(total);
+        let position = 0;
+        order.forEach((id, i) => {
+            terms[i] = keys[id];
+            offsets[i] = position;
+            termCounts[i] = counts[id];
+            postings.set(buffers[id].subarray(0, lengths[id]), position);
+            position += lengths[id];
+        });
+        offsets[order.length] = position;
+        return new TrigramIndex({ terms, offsets, counts: termCounts, postings, rowCount: texts.length, fingerprint });
+    }
+
+    /**
+     * Dekodiert die Posting-Liste eines N-Gramms
+     * @returns {Uint32Array} Aufsteigende Zeilennummern
+     */
+    _postingList(position) {
+        const rows = new Uint32Array(this.counts[position]);
+        const postings = this.postings;
+        let offset = this.offsets[position];
+        let row = -1;
+        for (let n = 0; n < rows.length; n++) {
+            let delta = 0;
+            let shift = 0;
+            let byte;
+            do {
+                byte = postings[offset++];
+                delta += (byte & 0x7f) * 2 ** shift;
+                shift += 7;
+            } while (byte & 0x80);
+            row += delta;
+            rows[n] = row;
+        }
+        return rows;
+    }
+
+    /**
+     * Kandidaten für einen Suchbegriff
+     * @param {string} term - Teilstring oder Platzhalter-Muster
+     * @returns {Uint32Array|null} null = keine Einschränkung möglich
+     */
+    termCandidates(term) {
+        const ngrams = termNgrams(term);
+        if (!ngrams) return null;
+        const positions = [];
+        for (const ngram of ngrams) {
+            const position = searchSorted(this.terms, ngram);
+            if (position < 0) return new Uint32Array(0);
+            positions.push(position);
+        }
+        // Kürzeste Liste zuerst - Schnitt wird schnell klein
+        positions.sort((a, b) => this.counts[a] - this.counts[b]);
+        let rows = this._postingList(positions[0]);
+        for (let i = 1; i < positions.length && rows.length; i++) {
+            // Sehr lange Listen kosten beim Dekodieren mehr als die Verifikation spart
+            if (this.counts[positions[i]] > rows.length * INTERSECT_RATIO) break;
+            rows = intersectSorted(rows, this._postingList(positions[i]));
+        }
+        return rows;
+    }
+
+    /**
+     * Kandidaten für eine geparste Suchanfrage (parseSearchQuery im Renderer)
+     * @param {Object} parsed - { type: 'simple'|'and'|'or', term, terms, parts }
+     * @returns {Uint32Array|null} Aufsteigende Zeilen oder null = alle prüfen
+     */
+    candidates(parsed) {
+        if (parsed.type === 'simple') return this.termCandidates(parsed.term);
+
+        if (parsed.type === 'and') {
+            // Ein einschränkender Begriff genügt, die übrigen prüft die Verifikation
+            let rows = null;
+            for (const term of parsed.terms) {
+                const termRows = this.termCandidates(term);
+                if (termRows) rows = rows ? intersectSorted(rows, termRows) : termRows;
+            }
+            return rows;
+        }
+
+        if (parsed.type === 'or') {
+            let rows = new Uint32Array(0);
+            const parts = parsed.parts || parsed.terms.map(term => ({ type: 'simple', term }));
+            for (const part of parts) {
+                const partRows = this.candidates(part);
+                if (!partRows) return null;
+                rows = unionSorted(rows, partRows);
+            }
+            return rows;
+        }
+
+        return null;
+    }
+
+    /**
+     * Suche mit Verifikation und Seitenaufteilung
+     *
+     * Die Verifikation endet, sobald offset + limit Treffer gefunden sind -
+     * total ist dann hochgerechnet (Trefferquote der geprüften Kandidaten auf
+     * die übrigen), totalExact = false. Ohne limit wird alles geprüft.
+     * @param {Object} parsed - Geparste Suchanfrage
+     * @param {Function} matches - (rowIndex) => boolean, die exakte Prüfung
+     * @param {Object} [page] - { offset, limit }
+     * @returns {{rows: number[], total: number, totalExact: boolean, candidates: number}}
+     */
+    search(parsed, matches, { offset = 0, limit = Infinity } = {}) {
+        const candidates = this.candidates(parsed);
+        const count = candidates ? candidates.length : this.rowCount;
+        const wanted = offset + limit;
+        const rows = [];
+        let hits = 0;
+        let checked = 0;
+        while (checked < count && hits < wanted) {
+            const rowIndex = candidates ? candidates[checked] : checked;
+            checked++;
+            if (!matches(rowIndex)) continue;
+            if (hits >= offset) rows.push(rowIndex);
+            hits++;
+        }
+        const totalExact = checked === count;
+        const total = totalExact ? hits : hits + Math.round((count - checked) * hits / checked);
+        return { rows, total, totalExact, candidates: count };
+    }
+
+    /**
+     * Binärformat: MAGIC | uint32 Header-Länge | JSON-Header | Padding auf 8 |
+     * N-Gramme | Offsets | Anzahlen | Postings
+     * @returns {Buffer}
+     */
+    serialize() {
+        const header = Buffer.from(JSON.stringify({
+            termCount: this.terms.length,
+            postingBytes: this.postings.length,
+            rowCount: this.rowCount,
+            fingerprint: this.fingerprint
+        }));
+        const offset = Math.ceil((MAGIC.length + 4 + header.length) / 8) * 8;
+        const parts = [this.terms, this.offsets, this.counts, this.postings];
+        const buffer = Buffer.alloc(offset + parts.reduce((sum, part) => sum + part.byteLength, 0));
+        MAGIC.copy(buffer, 0);
+        buffer.writeUInt32LE(header.length, MAGIC.length);
+        header.copy(buffer, MAGIC.length + 4);
+        let position = offset;
+        for (const part of parts) {
+            Buffer.from(part.buffer, part.byteOffset, part.byteLength).copy(buffer, position);
+            position += part.byteLength;
+        }
+        return buffer;
+    }
+
+    /**
+     * Liest einen serialisierten Index
+     * @param {Buffer|Uint8Array} buffer
+     * @returns {TrigramIndex|null} null bei ungültigem Format
+     */
+    static deserialize(buffer) {
+        buffer = Buffer.from(buffer.buffer, buffer.byteOffset, buffer.byteLength);
+        if (buffer.length < MAGIC.length + 4 || !buffer.subarray(0, MAGIC.length).equals(MAGIC)) return null;
+        const headerLength = buffer.readUInt32LE(MAGIC.length);
+        let header;
+        try {
+            header = JSON.parse(buffer.toString('utf8', MAGIC.length + 4, MAGIC.length + 4 + headerLength));
+        } catch (e) {
+            return null;
+        }
+        const offset = Math.ceil((MAGIC.length + 4 + headerLength) / 8) * 8;
+        const count = header.termCount;
+        const size = count * 8 + (count + 1) * 4 + count * 4 + header.postingBytes;
+        if (buffer.length < offset + size) return null;
+        // Kopie auf eigenen ArrayBuffer (Buffer-Pool ist nicht 8-Byte-ausgerichtet)
+        const body = new Uint8Array(buffer.subarray(offset, offset + size)).buffer;
+        return new TrigramIndex({
+            terms: new Float64Array(body, 0, count),
+            offsets: new Uint32Array(body, count * 8, count + 1),
+            counts: new Uint32Array(body, count * 12 + 4, count),
+            postings: new Uint8Array(body, count * 16 + 4, header.postingBytes),
+            rowCount: header.rowCount,
+            fingerprint: header.fingerprint
+        });
+    }
+}
+
+/**
+ * Baut den Index in einem Worker-Thread (blockiert den Hauptprozess nicht)
+ * @param {string[]} texts - Zeilentexte
+ * @param {string|null} fingerprint
+ * @returns {Promise<TrigramIndex>}
+ */
+function buildInWorker(texts, fingerprint = null) {
+    // In der gepackten App liegt python/ entpackt neben app.asar
+    const workerFile = __filename.replace(`app.asar${path.sep}`, `app.asar.unpacked${path.sep}`);
+    return new Promise((resolve, reject) => {
+        const worker = new Worker(workerFile, { workerData: { task: 'trigramIndex', texts, fingerprint } });
+        worker.once('message', (bytes) => resolve(TrigramIndex.deserialize(bytes)));
+        worker.once('error', reject);
+        worker.once('exit', (code) => {
+            if (code !== 0) reject(new Error(`Index-Worker beendet mit Code ${code}`));
+        });
+    });
+}
+
+class SearchIndexStore {
+    /**
+     * @param {Object} [options]
+     * @param {string} [options.indexDir] - Verzeichnis für Index-Dateien
+     * @param {number} [options.maxEntries] - Maximale Anzahl Index-Dateien
+     * @param {number} [options.maxMemoryEntries] - Maximale Anzahl Indizes im Speicher
+     * @param {Function} [options.build] - async (texts, fingerprint) => TrigramIndex
+     * @param {Function} [options.log] - Logger
+     */
+    constructor(options = {}) {
+        this.indexDir = options.indexDir || DEFAULT_INDEX_DIR;
+        this.maxEntries = options.maxEntries || DEFAULT_MAX_ENTRIES;
+        this.maxMemoryEntries = options.maxMemoryEntries || DEFAULT_MAX_MEMORY_ENTRIES;
+        this.build = options.build || buildInWorker;
+        this.log = options.log || (() => {});
+        this.memory = new Map(); // Index-Key -> TrigramIndex (LRU über Einfügereihenfolge)
+        this.pending = new Map(); // Laufende Aufbauten pro Index-Key
+        this.stats = { hits: 0, loads: 0, builds: 0 };
+    }
+
+    _key(filePath, sheetName, columns) {
+        return crypto.createHash('sha1')
+            .update(`${path.resolve(filePath)}\0${sheetName}\0${columns ? columns.join(',') : '*'}`)
+            .digest('hex').substring(0, 20);
+    }
+
+    _indexPath(key) {
+        return path.join(this.indexDir, key + '.tri');
+    }
+
+    _remember(key, index) {
+        this.memory.delete(key);
+        this.memory.set(key, index);
+        while (this.memory.size > this.maxMemoryEntries) {
+            this.memory.delete(this.memory.keys().next().value);
+        }
+    }
+
+    /**
+     * Liefert einen gültigen Index aus Speicher oder Platte (baut nie auf)
+     * @returns {TrigramIndex|null}
+     */
+    get(filePath, sheetName, columns = null, fingerprint = fileFingerprint(filePath)) {
+        if (!fingerprint) return null;
+        const key = this._key(filePath, sheetName, columns);
+        const cached = this.memory.get(key);
+        if (cached && cached.fingerprint === fingerprint) {
+            this.stats.hits++;
+            this._remember(key, cached);
+            return cached;
+        }
+        let index = null;
+        try {
+            index = TrigramIndex.deserialize(fs.readFileSync(this._indexPath(key)));
+        } catch (e) {
+            return null;
+        }
+        if (!index || index.fingerprint !== fingerprint) return null;
+        this.stats.loads++;
+        this._remember(key, index);
+        return index;
+    }
+
+    /**
+     * Liefert den Index, baut ihn bei Bedarf im Worker auf und speichert ihn
+     * @param {string} filePath - Quelldatei
+     * @param {string} sheetName
+     * @param {number[]|null} columns - Suchspalten (0-basiert) oder null = alle
+     * @param {Function} loadData - async () => Datenzeilen ohne Header
+     * @returns {Promise<TrigramIndex|null>}
+     */
+    async ensure(filePath, sheetName, columns, loadData) {
+        const fingerprint = fileFingerprint(filePath);
+        const existing = this.get(filePath, sheetName, columns, fingerprint);
+        if (existing) return existing;
+
+        const key = this._key(filePath, sheetName, columns);
+        if (this.pending.has(key)) return this.pending.get(key);
+
+        const promise = (async () => {
+            const data = await loadData();
+            if (!data) return null;
+            const started = Date.now();
+            const index = await this.build(data.map(row => rowText(row || [], columns)), fingerprint);
+            this.stats.builds++;
+            this.log(`[SearchIndex] ${index.terms.length} N-Gramme über ${index.rowCount} Zeilen in ${Date.now() - started}ms aufgebaut (${(index.postings.length / 1048576).toFixed(1)} MB Postings)`);
+            this._remember(key, index);
+            // Datei wurde während des Lesens geändert - nicht persistieren
+            if (fileFingerprint(filePath) === fingerprint) this._save(key, index);
+            return index;
+        })().finally(() => this.pending.delete(key));
+        this.pending.set(key, promise);
+        return promise;
+    }
+
+    _save(key, index) {
+        try {
+            fs.mkdirSync(this.indexDir, { recursive: true });
+            const target = this._indexPath(key);
+            const tempFile = `${target}.${process.pid}-${Date.now()}.part`;
+            fs.writeFileSync(tempFile, index.serialize());
+            fs.renameSync(tempFile, target);
+            this._evict(key);
+        } catch (e) {
+            // Persistenz ist optional - Index bleibt im Speicher gültig
+            this.log(`[SearchIndex] Speichern fehlgeschlagen: ${e.message}`);
+        }
+    }
+
+    _evict(keepKey) {
+        let files;
+        try {
+            files = fs.readdirSync(this.indexDir).filter(name => name.endsWith('.tri'));
+        } catch (e) {
+            return;
+        }
+        if (files.length <= this.maxEntries) return;
+
+        const entries = files
+            .map(name => {
+                const filePath = path.join(this.indexDir, name);
+                try {
+                    return { filePath, key: name.slice(0, -4), mtimeMs: fs.statSync(filePath).mtimeMs };
+                } catch (e) {
+                    return null;
+                }
+            })
+            .filter(entry => entry && entry.key !== keepKey)
+            .sort((a, b) => a.mtimeMs - b.mtimeMs);
+
+        for (const entry of entries.slice(0, files.length - this.maxEntries)) {
+            try { fs.unlinkSync(entry.filePath); } catch (e) { /* ignorieren */ }
+        }
+    }
+}
+
+// Worker-Einstieg (siehe buildInWorker)
+if (!isMainThread && workerData && workerData.task === 'trigramIndex') {
+    const bytes = TrigramIndex.build(workerData.texts, workerData.fingerprint).serialize();
+    const view = new Uint8Array(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+    parentPort.postMessage(view, [bytes.buffer]);
+}
+
+module.exports = {
+    TrigramIndex,
+    SearchIndexStore,
+    buildInWorker,
+    rowText,
+    termNgrams
+};
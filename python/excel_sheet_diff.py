@@ -0,0 +1,503 @@
+#!/usr/bin/env python3
+"""
+Excel Sheet Diff - schlüsselbasierter Vergleich zweier Sheets
+
+Welche Zeilen als hinzugefügt (A), gelöscht (D) oder geändert (C) gelten,
+wurde bisher im Renderer ermittelt - mit beiden Sheets komplett im Speicher.
+Hier werden beide Sheets gestreamt und über eine Schlüsselspalte per
+Hash-Join verbunden:
+
+1. Ziel-Sheet (alter Stand) lesen: pro Zeile Schlüssel, Datenzeilen-Index
+   und Zeilen-Fingerprint (je Spalte ein 64-bit Hash des Zellwerts).
+2. Quell-Sheet (neuer Stand) lesen und gegen diese Tabelle prüfen:
+   fehlt der Schlüssel -> hinzugefügt, Fingerprint anders -> geändert
+   (mit Liste der geänderten Spalten), übrig gebliebene Ziel-Zeilen -> gelöscht.
+
+Speicher ist begrenzt: Übersteigt das Ziel-Sheet max_memory_rows Schlüssel
+(oder kündigen die <dimension>-Angaben das an), werden beide Seiten nach
+Schlüssel-Hash auf Partitionsdateien verteilt und Partition für Partition
+verbunden (Grace-Hash-Join).
+
+Gelesen wird nur, was der Vergleich braucht: kein Objektmodell, keine Styles,
+Datumswerte als Seriennummer. Spalten werden nach Position verglichen.
+Schlüssel: Zahlen ohne ".0", Texte getrimmt. Doppelte Schlüssel: das erste
+Vorkommen zählt, weitere werden gezählt. Die Zell-Hashes (hash()) gelten nur
+innerhalb eines Laufs - sie werden nie gespeichert oder weitergegeben.
+
+Zeilen-Indizes sind Datenzeilen-Indizes (0 = Excel-Zeile 2), wie in den Readern.
+
+Nur Standardbibliothek (das eingebettete Windows-Python hat kein lxml).
+
+Aufruf (Konfiguration als JSON über stdin):
+    {"sourcePath": "...", "sourceSheet": "...", "targetPath": "...", "targetSheet": "...",
+     "keyColumn": 1 | "Header", "maxMemoryRows": 500000}
+"""
+
+import html
+import json
+import os
+import pickle
+import re
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from excel_sheet_metadata import NS_REL, _column_index
+from excel_workbook_reader import _M, _read_rels
+
+# Schlüssel im Speicher, ab denen auf Partitionsdateien ausgelagert wird
+DEFAULT_MAX_MEMORY_ROWS = 500000
+# Mindestanzahl Partitionen beim Auslagern
+MIN_PARTITIONS = 16
+# Datensätze pro Partition, die vor dem Schreiben gesammelt werden
+SPILL_BUFFER_RECORDS = 4096
+# Lesegröße für das Sheet-XML
+READ_CHUNK_BYTES = 1024 * 1024
+
+# Schneller Weg: übliche Zelle mit Wert in einem Treffer (Spalte, Zeile, Typ, Rohwert).
+# Blöcke mit anderen Zellformen (Formeln, Inline-Strings, Präfixe) gehen über _TOKEN_RE.
+_FAST_CELL_RE = re.compile(rb'<c r="([A-Z]+)(\d+)"(?: s="\d+")?(?: t="(\w+)")?(?: s="\d+")?><v>([^<]*)</v></c>')
+# Ein Treffer je <row>-Start oder Zelle: (row, Zeilen-Attribute, Zellen-Attribute, Zellinhalt)
+_TOKEN_RE = re.compile(rb'<(?:\w+:)?(?:(row)\b([^>]*)|c\b([^>]*?)(?:/>|>([^<]*(?:<(?!/(?:\w+:)?c>)[^<]*)*)</(?:\w+:)?c>))', re.S)
+_ROW_NUMBER_RE = re.compile(rb'\br="(\d+)"')
+_CELL_REF_RE = re.compile(rb'\br="([A-Z]+)')
+_CELL_TYPE_RE = re.compile(rb'\bt="(\w+)"')
+_VALUE_RE = re.compile(rb'<(?:\w+:)?v>([^<]*)</(?:\w+:)?v>')
+_TEXT_RE = re.compile(rb'<(?:\w+:)?t(?:\s[^>]*)?>([^<]*)</(?:\w+:)?t>')
+_DIMENSION_RE = re.compile(rb'<(?:\w+:)?dimension\b[^>]*\bref="[A-Z]*\d*:?[A-Z]*(\d+)"')
+_ROW_END = re.compile(rb'</(?:\w+:)?row>')
+# Shared Strings: je <si> der Inhalt; einfache Einträge (nur ein <t>) direkt als Text
+_SHARED_RE = re.compile(rb'<(?:\w+:)?si\b[^>]*?(?:/>|>(?:<(?:\w+:)?t(?:\s[^>]*)?>([^<]*)</(?:\w+:)?t>|(.*?))</(?:\w+:)?si>)', re.S)
+_PHONETIC_RE = re.compile(rb'<(?:\w+:)?rPh\b.*?</(?:\w+:)?rPh>', re.S)
+
+
+class DiffError(Exception):
+    """Vergleich nicht möglich (Sheet fehlt, Schlüsselspalte unbekannt)"""
+
+
+def _text(raw: bytes) -> str:
+    text = raw.decode('utf-8')
+    return html.unescape(text) if '&' in text else text
+
+
+def _key_of(value: Any) -> Optional[str]:
+    """Normalisierter Schlüssel (None = Zeile ohne Schlüssel)"""
+    if value == '' or value is None:
+        return None
+    if isinstance(value, bool):
+        return 'WAHR' if value else 'FALSCH'
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else repr(value)
+    key = str(value).strip()
+    return key or None
+
+
+class _SheetStream:
+    """
+    Zeilen eines Sheets roh als (Datenzeilen-Index, [(Spalte 0-basiert, Typ, Rohwert)]),
+    gestreamt über das XML. Rohwert ist der Inhalt von <v> (bei Inline-Strings
+    der Text). Werte und Hashes werden erst bei Bedarf ermittelt.
+    """
+
+    def __init__(self, file_path: str, sheet_name: str):
+        with zipfile.ZipFile(file_path) as zf:
+            # Nur Sheet-Zuordnung und Shared Strings - Styles und Rich Text braucht der Vergleich nicht
+            workbook = ET.fromstring(zf.read('xl/workbook.xml'))
+            rels = _read_rels(zf, 'xl/workbook.xml')
+            parts = {}
+            for sheet in workbook.findall(f'{_M}sheets/{_M}sheet'):
+                rel = rels.get(sheet.get(f'{{{NS_REL}}}id'))
+                if rel:
+                    parts[sheet.get('name')] = rel[1]
+            if sheet_name not in parts:
+                raise DiffError(f'Sheet "{sheet_name}" nicht gefunden in {os.path.basename(file_path)}')
+            shared_part = next((target for rel_type, target, _ in rels.values()
+                                if rel_type.endswith('/sharedStrings')), 'xl/sharedStrings.xml')
+            self.shared_strings = _read_shared_strings(zf, shared_part)
+            # Zeilenzahl laut <dimension> (0 = unbekannt) - entscheidet vorab über das Auslagern
+            with zf.open(parts[sheet_name]) as stream:
+                match = _DIMENSION_RE.search(stream.read(64 * 1024))
+        self.row_hint = int(match.group(1)) if match else 0
+        self.file_path = file_path
+        self.part = parts[sheet_name]
+        # Hash je Shared String einmal vorab - Zellen mit t="s" kosten dann nur einen Listenzugriff
+        self.shared_hashes = [(hash(text) or 1) if text else 0 for text in self.shared_strings]
+        self.columns: Dict[bytes, int] = {}
+
+    def value(self, cell_type: bytes, raw: Union[bytes, str]) -> Any:
+        """Zellwert (Datum bleibt Seriennummer). '' = leer"""
+        if not raw:
+            return ''
+        if cell_type == b's':
+            index = int(raw)
+            return self.shared_strings[index] if index < len(self.shared_strings) else ''
+        if cell_type == b'inlineStr':
+            return raw
+        if cell_type == b'b':
+            return raw == b'1'
+        if cell_type in (b'str', b'e', b'd'):
+            return _text(raw)
+        try:
+            return float(raw)
+        except ValueError:
+            return _text(raw)
+
+    def cell_hash(self, cell_type: bytes, raw: Union[bytes, str]) -> int:
+        """64-bit Hash des Zellwerts (0 = leer). Wahrheitswerte getrennt von 0/1."""
+        if cell_type == b's':
+            index = int(raw) if raw else -1
+            return self.shared_hashes[index] if 0 <= index < len(self.shared_hashes) else 0
+        value = self.value(cell_type, raw)
+        if value == '':
+            return 0
+        if value is True or value is False:
+            return hash(('b', value)) or 1
+        return hash(value) or 1
+
+    def _column(self, letters: bytes) -> int:
+        col = self.columns.get(letters)
+        if col is None:
+            col = self.columns[letters] = _column_index(letters.decode('ascii')) - 1
+        return col
+
+    def _fast_rows(self, cells_found: list):
+        columns = self.columns
+        number = None
+        cells: List[Tuple[int, bytes, bytes]] = []
+        for letters, row, cell_type, raw in cells_found:
+            if row != number:
+                if cells:
+                    yield int(number) - 2, cells
+                    cells = []
+                number = row
+            col = columns.get(letters)
+            cells.append((self._column(letters) if col is None else col, cell_type, raw))
+        if cells:
+            yield int(number) - 2, cells
+
+    def _token_rows(self, block: bytes):
+        row_number = 0
+        cells: List[Tuple[int, bytes, Union[bytes, str]]] = []
+        col = -1
+        for is_row, row_attrs, attrs, content in _TOKEN_RE.findall(block):
+            if is_row:
+                if cells:
+                    yield row_number - 2, cells
+                    cells = []
+                number = _ROW_NUMBER_RE.search(row_attrs)
+                row_number = int(number.group(1)) if number else row_number + 1
+                col = -1
+                continue
+            ref = _CELL_REF_RE.search(attrs)
+            col = self._column(ref.group(1)) if ref else col + 1
+            if not content:
+                continue
+            cell_type = _CELL_TYPE_RE.search(attrs)
+            cell_type = cell_type.group(1) if cell_type else b''
+            if cell_type == b'inlineStr':
+                raw = ''.join(_text(part) for part in _TEXT_RE.findall(content))
+            else:
+                value = _VALUE_RE.search(content)
+                raw = value.group(1) if value else b''
+            if raw:
+                cells.append((col, cell_type, raw))
+        if cells:
+            yield row_number - 2, cells
+
+    def rows(self) -> Iterator[Tuple[int, List[Tuple[int, bytes, Union[bytes, str]]]]]:
+        with zipfile.ZipFile(self.file_path) as zf, zf.open(self.part) as stream:
+            buffer = b''
+            while True:
+                chunk = stream.read(READ_CHUNK_BYTES)
+                if chunk:
+                    buffer += chunk
+                    # Nur vollständige Zeilen verarbeiten, der Rest wartet auf den nächsten Block
+                    last = None
+                    for last in _ROW_END.finditer(buffer):
+                        pass
+                    if last is None:
+                        continue
+                    block, buffer = buffer[:last.end()], buffer[last.end():]
+                else:
+                    block, buffer = buffer, b''
+
+                # Schneller Weg nur, wenn er jede Zelle mit Inhalt erfasst hat
+                cells_found = _FAST_CELL_RE.findall(block)
+                if len(cells_found) == block.count(b'</c>') and b':c>' not in block:
+                    yield from self._fast_rows(cells_found)
+                else:
+                    yield from self._token_rows(block)
+                if not chunk:
+                    break
+
+
+def _read_shared_strings(zf: zipfile.ZipFile, part: str) -> List[str]:
+    """Texte der Shared Strings (Runs verbunden, ohne Phonetik)"""
+    if part not in zf.namelist():
+        return []
+    strings = []
+    for simple, content in _SHARED_RE.findall(zf.read(part)):
+        if simple:
+            strings.append(_text(simple))
+        elif content:
+            if b'rPh' in content:
+                content = _PHONETIC_RE.sub(b'', content)
+            strings.append(''.join(_text(part) for part in _TEXT_RE.findall(content)))
+        else:
+            strings.append('')
+    return strings
+
+
+def _resolve_key_column(stream: _SheetStream, key_column: Union[int, str]) -> Tuple[int, Iterator]:
+    """
+    Schlüsselspalte (0-basiert) und Iterator über die Datenzeilen.
+    key_column: 1-basierte Spaltennummer, Spaltenbuchstabe oder Header-Text.
+    """
+    rows = stream.rows()
+    if isinstance(key_column, int) or str(key_column).isdigit():
+        return int(key_column) - 1, rows
+    if re.fullmatch(r'[A-Z]{1,3}', str(key_column)):
+        return _column_index(str(key_column)) - 1, rows
+
+    # Header-Text: in der Header-Zeile suchen (Excel-Zeile 1 = Index -1)
+    for row_index, cells in rows:
+        if row_index == -1:
+            for col, cell_type, raw in cells:
+                if str(stream.value(cell_type, raw)).strip() == str(key_column).strip():
+                    return col, rows
+        break
+    raise DiffError(f'Schlüsselspalte "{key_column}" nicht gefunden')
+
+
+def _records(stream: _SheetStream, key_column: Union[int, str], counters: Dict[str, int]):
+    """(Schlüssel, Datenzeilen-Index, Fingerprint) je Datenzeile"""
+    key_col, rows = _resolve_key_column(stream, key_column)
+    cell_hash = stream.cell_hash
+    shared_hashes = stream.shared_hashes
+    for row_index, cells in rows:
+        if row_index < 0:
+            continue  # Header-Zeile
+        hashes = [0] * (cells[-1][0] + 1)
+        key = None
+        for col, cell_type, raw in cells:
+            # Häufigste Fälle direkt: Shared String und Zahl
+            if cell_type == b's':
+                try:
+                    hashes[col] = shared_hashes[int(raw)]
+                except IndexError:
+                    pass
+            elif not cell_type or cell_type == b'n':
+                try:
+                    hashes[col] = hash(float(raw)) or 1
+                except ValueError:
+                    hashes[col] = cell_hash(cell_type, raw)
+            else:
+                hashes[col] = cell_hash(cell_type, raw)
+            if col == key_col:
+                key = _key_of(stream.value(cell_type, raw))
+        if not any(hashes):
+            continue  # Nur leere Zellen (z.B. formatierte Leerzeilen)
+        counters['rows'] += 1
+        if key is None:
+            counters['unkeyed'] += 1
+            continue
+        yield key, row_index, array('q', hashes).tobytes()
+
+
+def _changed_columns(old: bytes, new: bytes) -> List[int]:
+    """Spalten (0-basiert), deren Zell-Hash sich unterscheidet"""
+    old_hashes = array('q', old)
+    new_hashes = array('q', new)
+    width = max(len(old_hashes), len(new_hashes))
+    return [col for col in range(width)
+            if (old_hashes[col] if col < len(old_hashes) else 0) != (new_hashes[col] if col < len(new_hashes) else 0)]
+
+
+class _Partitions:
+    """Datensätze nach Schlüssel-Hash auf Dateien verteilen (je Seite eine Datei pro Partition)"""
+
+    def __init__(self, directory: str, count: int):
+        self.directory = directory
+        self.count = count
+        self.buffers = {side: [[] for _ in range(count)] for side in ('target', 'source')}
+        self.files = {side: [open(os.path.join(directory, f'{side}-{i}.part'), 'wb') for i in range(count)]
+                      for side in ('target', 'source')}
+
+    def add(self, side: str, record: Tuple[str, int, bytes]):
+        partition = hash(record[0]) % self.count
+        buffer = self.buffers[side][partition]
+        buffer.append(record)
+        if len(buffer) >= SPILL_BUFFER_RECORDS:
+            pickle.dump(buffer, self.files[side][partition], pickle.HIGHEST_PROTOCOL)
+            buffer.clear()
+
+    def finish(self, side: str):
+        for partition, buffer in enumerate(self.buffers[side]):
+            if buffer:
+                pickle.dump(buffer, self.files[side][partition], pickle.HIGHEST_PROTOCOL)
+                buffer.clear()
+            self.files[side][partition].close()
+
+    def close(self):
+        for files in self.files.values():
+            for f in files:
+                f.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def read(self, side: str, partition: int) -> Iterator[Tuple[str, int, bytes]]:
+        with open(os.path.join(self.directory, f'{side}-{partition}.part'), 'rb') as f:
+            while True:
+                try:
+                    yield from pickle.load(f)
+                except EOFError:
+                    return
+
+
+class _JoinResult:
+    def __init__(self):
+        self.added: List[int] = []
+        self.deleted: List[int] = []
+        self.changed: List[List[Any]] = []
+        self.unchanged = 0
+        self.duplicates = {'source': 0, 'target': 0}
+
+    def build(self, records) -> Dict[str, list]:
+        table: Dict[str, list] = {}
+        for key, row_index, fingerprint in records:
+            if key in table:
+                self.duplicates['target'] += 1
+            else:
+                table[key] = [row_index, fingerprint, False]
+        return table
+
+    def probe(self, table: Dict[str, list], records):
+        added_keys = set()
+        for key, row_index, fingerprint in records:
+            entry = table.get(key)
+            if entry is None:
+                if key in added_keys:
+                    self.duplicates['source'] += 1
+                    continue
+                added_keys.add(key)
+                self.added.append(row_index)
+            elif entry[2]:
+                self.duplicates['source'] += 1
+            else:
+                entry[2] = True
+                if entry[1] == fingerprint:
+                    self.unchanged += 1
+                else:
+                    self.changed.append([row_index, entry[0], _changed_columns(entry[1], fingerprint)])
+        self.deleted.extend(entry[0] for entry in table.values() if not entry[2])
+
+
+def diff_sheets(source_path: str, source_sheet: str, target_path: str, target_sheet: str,
+                key_column: Union[int, str] = 1, max_memory_rows: int = DEFAULT_MAX_MEMORY_ROWS,
+                spill_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Vergleicht Quell-Sheet (neu) mit Ziel-Sheet (alt) über eine Schlüsselspalte
+
+    Returns:
+        Dict mit success, added (Quell-Zeilen), deleted (Ziel-Zeilen),
+        changed ([Quell-Zeile, Ziel-Zeile, [geänderte Spalten]]), unchanged,
+        duplicateKeys, unkeyedRows, sourceRows, targetRows, spilled, partitions
+    """
+    start = time.time()
+    try:
+        source = _SheetStream(source_path, source_sheet)
+        target = _SheetStream(target_path, target_sheet)
+    except (DiffError, KeyError, zipfile.BadZipFile) as e:
+        return {'success': False, 'error': str(e)}
+
+    counters = {side: {'rows': 0, 'unkeyed': 0} for side in ('source', 'target')}
+    result = _JoinResult()
+    partitions: Optional[_Partitions] = None
+    try:
+        target_records = _records(target, key_column, counters['target'])
+        source_records = _records(source, key_column, counters['source'])
+
+        def spill():
+            hint = max(target.row_hint, source.row_hint, len(table))
+            count = max(MIN_PARTITIONS, 2 * -(-hint // max_memory_rows))
+            return _Partitions(tempfile.mkdtemp(prefix='excel-diff-', dir=spill_dir), count)
+
+        # Laut <dimension> zu groß für den Speicher: von Anfang an auslagern
+        table: Dict[str, list] = {}
+        if max(target.row_hint, source.row_hint) > max_memory_rows:
+            partitions = spill()
+        for key, row_index, fingerprint in target_records:
+            if partitions:
+                partitions.add('target', (key, row_index, fingerprint))
+                continue
+            if key in table:
+                result.duplicates['target'] += 1
+                continue
+            table[key] = [row_index, fingerprint, False]
+            if len(table) > max_memory_rows:
+                partitions = spill()
+                for known_key, (known_row, known_fingerprint, _) in table.items():
+                    partitions.add('target', (known_key, known_row, known_fingerprint))
+                table = {}
+
+        if partitions:
+            partitions.finish('target')
+            for record in source_records:
+                partitions.add('source', record)
+            partitions.finish('source')
+            for partition in range(partitions.count):
+                partition_table = result.build(partitions.read('target', partition))
+                result.probe(partition_table, partitions.read('source', partition))
+        else:
+            result.probe(table, source_records)
+    except DiffError as e:
+        return {'success': False, 'error': str(e)}
+    finally:
+        if partitions:
+            partitions.close()
+
+    result.added.sort()
+    result.deleted.sort()
+    result.changed.sort()
+    return {
+        'success': True,
+        'added': result.added,
+        'deleted': result.deleted,
+        'changed': result.changed,
+        'unchanged': result.unchanged,
+        'duplicateKeys': result.duplicates,
+        'unkeyedRows': {side: counters[side]['unkeyed'] for side in counters},
+        'sourceRows': counters['source']['rows'],
+        'targetRows': counters['target']['rows'],
+        'spilled': partitions is not None,
+        'partitions': partitions.count if partitions else 0,
+        'durationMs': int((time.time() - start) * 1000)
+    }
+
+
+def main():
+    """Hauptfunktion - Konfiguration als JSON über stdin, Ergebnis als JSON"""
+    import io
+    if sys.platform == 'win32':
+        sys.stdin = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    try:
+        config = json.loads(sys.stdin.read())
+        result = diff_sheets(config['sourcePath'], config['sourceSheet'],
+                             config['targetPath'], config['targetSheet'],
+                             config.get('keyColumn') or 1,
+                             int(config.get('maxMemoryRows') or DEFAULT_MAX_MEMORY_ROWS))
+    except (KeyError, ValueError) as e:
+        result = {'success': False, 'error': f'Ungültige Konfiguration: {e}'}
+    except Exception as e:
+        result = {'success': False, 'error': str(e)}
+    print(json.dumps(result, ensure_ascii=False, separators=(',', ':')))
+
+
+if __name__ == '__main__':
+    main()
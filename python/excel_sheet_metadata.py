@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Excel Sheet Metadata - Struktur und Styles in EINEM Durchlauf über das XML
+
+Der xlwings-Reader holt die Werte aus Excel. Alles Weitere (verbundene
+Zellen, AutoFilter, ausgeblendete Zeilen/Spalten, Spaltenbreiten,
+Füllfarben und Schriften) steht direkt im Paket:
+
+- xl/workbook.xml + Rels      -> Pfad des Sheets
+- xl/styles.xml               -> Fonts, Fills, cellXfs (klein, komplett geparst)
+- xl/worksheets/sheetN.xml    -> gestreamt mit iterparse, Elemente werden
+                                 nach der Verarbeitung verworfen
+
+Damit entfallen die beiden vollständigen openpyxl-Ladevorgänge. Nur
+Standardbibliothek (das eingebettete Windows-Python hat kein lxml).
+"""
+
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, List, Optional, Tuple
+
+NS_MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+NS_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+NS_PKG_REL = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+_M = '{%s}' % NS_MAIN
+
+# Schriften, die nicht als Abweichung gemeldet werden (wie bisher)
+_DEFAULT_FONT_NAMES = ('calibri', 'arial')
+
+
+def _argb_to_hex(argb: Optional[str]) -> Optional[str]:
+    """ARGB ('FF00FF00') -> '#00FF00'"""
+    if not argb or argb == '00000000':
+        return None
+    if len(argb) == 8:
+        return '#' + argb[2:].upper()
+    if len(argb) == 6:
+        return '#' + argb.upper()
+    return None
+
+
+def _column_index(letters: str) -> int:
+    """'A' -> 1, 'AA' -> 27"""
+    number = 0
+    for ch in letters:
+        number = number * 26 + ord(ch) - 64
+    return number
+
+
+def _split_ref(ref: str) -> Tuple[int, int]:
+    """'B12' -> (12, 2)"""
+    i = 0
+    while i < len(ref) and ref[i].isalpha():
+        i += 1
+    return int(ref[i:]), _column_index(ref[:i].upper())
+
+
+def _flag(element: Optional[ET.Element]) -> bool:
+    """<b/>, <b val="1"/> -> True; <b val="0"/> oder fehlend -> False"""
+    if element is None:
+        return False
+    return element.get('val', '1').lower() not in ('0', 'false')
+
+
+def _is_true(value: Optional[str]) -> bool:
+    return value is not None and value.lower() in ('1', 'true')
+
+
+# =============================================================================
+# Workbook / Styles
+# =============================================================================
+
+def resolve_sheet_part(zf: zipfile.ZipFile, sheet_name: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Sheet-Name -> Pfad im Paket. Ohne Namen das aktive Sheet (bookViews/activeTab).
+
+    Returns:
+        (sheet_name, part_name)
+    """
+    workbook = ET.fromstring(zf.read('xl/workbook.xml'))
+    sheets = workbook.findall(f'{_M}sheets/{_M}sheet')
+    if not sheets:
+        raise ValueError('Keine Sheets in der Arbeitsmappe')
+
+    if sheet_name is None:
+        view = workbook.find(f'{_M}bookViews/{_M}workbookView')
+        active = int(view.get('activeTab', 0)) if view is not None else 0
+        sheet = sheets[active] if active < len(sheets) else sheets[0]
+    else:
+        sheet = next((s for s in sheets if s.get('name') == sheet_name), None)
+        if sheet is None:
+            raise KeyError(f'Sheet "{sheet_name}" nicht gefunden')
+
+    rel_id = sheet.get(f'{{{NS_REL}}}id')
+    rels = ET.fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+    for rel in rels.findall(f'{{{NS_PKG_REL}}}Relationship'):
+        if rel.get('Id') == rel_id:
+            target = rel.get('Target')
+            part = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+            return sheet.get('name'), part
+    raise KeyError(f'Sheet-Teil für "{sheet.get("name")}" nicht gefunden')
+
+
+def read_cell_formats(zf: zipfile.ZipFile) -> List[Tuple[Optional[str], Dict[str, Any]]]:
+    """
+    styles.xml -> pro cellXfs-Index (Füllfarbe als Hex oder None, Font-Abweichungen).
+    Gleiche Regeln wie bisher mit openpyxl: nur explizite RGB-Farben.
+    """
+    try:
+        styles = ET.fromstring(zf.read('xl/styles.xml'))
+    except KeyError:
+        return []
+
+    fonts = []
+    for font in styles.findall(f'{_M}fonts/{_M}font'):
+        info: Dict[str, Any] = {}
+        if _flag(font.find(f'{_M}b')):
+            info['bold'] = True
+        if _flag(font.find(f'{_M}i')):
+            info['italic'] = True
+        color = font.find(f'{_M}color')
+        hex_color = _argb_to_hex(color.get('rgb')) if color is not None else None
+        if hex_color and hex_color != '#000000':
+            info['color'] = hex_color
+        size = font.find(f'{_M}sz')
+        if size is not None and size.get('val'):
+            value = float(size.get('val'))
+            if value != 11:
+                info['size'] = int(value) if value.is_integer() else value
+        name = font.find(f'{_M}name')
+        if name is not None and name.get('val') and name.get('val').lower() not in _DEFAULT_FONT_NAMES:
+            info['name'] = name.get('val')
+        fonts.append(info)
+
+    fills = []
+    for fill in styles.findall(f'{_M}fills/{_M}fill'):
+        fg = fill.find(f'{_M}patternFill/{_M}fgColor')
+        rgb = fg.get('rgb') if fg is not None else None
+        fills.append(_argb_to_hex(rgb) if rgb and len(rgb) >= 6 else None)
+
+    formats = []
+    for xf in styles.findall(f'{_M}cellXfs/{_M}xf'):
+        font_id = int(xf.get('fontId', 0))
+        fill_id = int(xf.get('fillId', 0))
+        formats.append((fills[fill_id] if fill_id < len(fills) else None,
+                        fonts[font_id] if font_id < len(fonts) else {}))
+    return formats
+
+
+# =============================================================================
+# Sheet
+# =============================================================================
+
+def read_sheet_metadata(file_path: str, sheet_name: Optional[str] = None,
+                        extract_styles: bool = True) -> Dict[str, Any]:
+    """
+    Liest alle Metadaten eines Sheets in einem Durchlauf.
+
+    Returns:
+        Dict mit sheetName, mergedCells, autoFilterRange, hiddenColumnRanges
+        [(erste, letzte), 1-basiert], hiddenRows (1-basiert), columnWidths
+        {(erste, letzte): breite}, cellFormats {(zeile, spalte): xf}, formats
+        (siehe read_cell_formats)
+    """
+    with zipfile.ZipFile(file_path) as zf:
+        actual_name, part = resolve_sheet_part(zf, sheet_name)
+        formats = read_cell_formats(zf) if extract_styles else []
+        # Nur Formate mit Inhalt merken - der Rest erzeugt keine Style-Einträge
+        relevant = {i for i, (fill, font) in enumerate(formats) if fill or font}
+
+        merged: List[str] = []
+        auto_filter = None
+        hidden_cols: List[Tuple[int, int]] = []
+        col_widths: Dict[Tuple[int, int], float] = {}
+        hidden_rows: List[int] = []
+        cell_formats: Dict[Tuple[int, int], int] = {}
+
+        sheet_data = None
+        row_number = 0
+        col_number = 0
+        with zf.open(part) as stream:
+            for event, element in ET.iterparse(stream, events=('start', 'end')):
+                tag = element.tag
+                if event == 'start':
+                    if tag == f'{_M}sheetData':
+                        sheet_data = element
+                    elif tag == f'{_M}row':
+                        row_number = int(element.get('r', row_number + 1))
+                        col_number = 0
+                        if _is_true(element.get('hidden')):
+                            hidden_rows.append(row_number)
+                    elif tag == f'{_M}c':
+                        ref = element.get('r')
+                        col_number = _split_ref(ref)[1] if ref else col_number + 1
+                        if relevant:
+                            style = int(element.get('s', 0))
+                            # Mit gestyltem Standardformat zählt jede vorhandene Zelle
+                            if style in relevant or 0 in relevant:
+                                cell_formats[(row_number, col_number)] = style
+                    continue
+
+                if tag == f'{_M}col':
+                    first, last = int(element.get('min')), int(element.get('max'))
+                    if _is_true(element.get('hidden')):
+                        hidden_cols.append((first, last))
+                    elif element.get('width'):
+                        col_widths[(first, last)] = float(element.get('width'))
+                elif tag == f'{_M}mergeCell':
+                    merged.append(element.get('ref'))
+                elif tag == f'{_M}autoFilter':
+                    auto_filter = element.get('ref')
+                elif tag == f'{_M}row':
+                    # Verarbeitete Zeile verwerfen (auch aus sheetData), Speicher bleibt konstant
+                    element.clear()
+                    sheet_data.clear()
+                elif tag in (f'{_M}cols', f'{_M}mergeCells'):
+                    element.clear()
+
+    return {
+        'sheetName': actual_name,
+        'mergedCells': merged,
+        'autoFilterRange': auto_filter,
+        'hiddenColumnRanges': hidden_cols,
+        'hiddenRows': hidden_rows,
+        'columnWidths': col_widths,
+        'cellFormats': cell_formats,
+        'formats': formats
+    }
+
+
+def clip_metadata(meta: Dict[str, Any], max_row: int, max_col: int) -> Dict[str, Any]:
+    """
+    Metadaten auf den von Excel gelesenen Bereich beschränken und ins
+    Ergebnisformat des Readers bringen (0-basierte Indizes, Styles pro Zelle).
+    """
+    hidden_columns = sorted({col - 1
+                             for first, last in meta['hiddenColumnRanges']
+                             for col in range(first, min(last, max_col) + 1)})
+    hidden_rows = [row - 2 for row in meta['hiddenRows'] if 2 <= row <= max_row]
+
+    widths: Dict[str, float] = {}
+    for (first, last), width in meta['columnWidths'].items():
+        for col in range(first, min(last, max_col) + 1):
+            widths[str(col - 1)] = width
+
+    formats = meta['formats']
+    cell_styles: Dict[str, str] = {}
+    cell_fonts: Dict[str, Dict[str, Any]] = {}
+
+    def add(row, col, xf):
+        fill, font = formats[xf] if xf < len(formats) else (None, None)
+        key = f'{row - 1}-{col - 1}'
+        if fill:
+            cell_styles[key] = fill
+        if font:
+            cell_fonts[key] = dict(font)
+
+    for (row, col), xf in meta['cellFormats'].items():
+        if row <= max_row and col <= max_col:
+            add(row, col, xf)
+
+    # Zellen ohne Eintrag im XML haben das Standardformat (cellXfs[0])
+    if formats and (formats[0][0] or formats[0][1]):
+        for row in range(1, max_row + 1):
+            for col in range(1, max_col + 1):
+                if (row, col) not in meta['cellFormats']:
+                    add(row, col, 0)
+
+    return {
+        'mergedCells': meta['mergedCells'],
+        'autoFilterRange': meta['autoFilterRange'],
+        'hiddenColumns': hidden_columns,
+        'hiddenRows': hidden_rows,
+        'columnWidths': widths,
+        'cellStyles': cell_styles,
+        'cellFonts': cell_fonts
+    }
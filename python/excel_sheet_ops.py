@@ -0,0 +1,955 @@
+#!/usr/bin/env python3
+"""
+Excel Sheet Ops - Arbeitsblätter auf Paketebene verwalten
+
+Hinzufügen, Löschen, Umbenennen, Kopieren und Verschieben von Sheets haben
+bisher die komplette Arbeitsmappe mit xlsx-populate geladen und neu
+gespeichert - bei großen Dateien Sekunden für eine Änderung an wenigen
+hundert Bytes. Hier werden nur die betroffenen Teile des Pakets neu
+geschrieben:
+
+- xl/workbook.xml             -> <sheets>, definedNames, activeTab/firstSheet
+- xl/_rels/workbook.xml.rels  -> Beziehung zum Sheet-Teil
+- [Content_Types].xml         -> Overrides für neue/gelöschte Teile
+- docProps/app.xml            -> Sheet-Namen in TitlesOfParts
+- Formeln anderer Sheets, Diagramme, definierte Namen und Pivot-Quellen,
+  die den Sheet-Namen enthalten (Umbenennen: neuer Name, Löschen: #REF!)
+
+Kopieren dupliziert den Sheet-Teil mit seinen abhängigen Teilen (Tabellen mit
+eindeutigen Namen, Zeichnungen, Diagramme, Kommentare). Bilder und
+Pivot-Caches werden gemeinsam genutzt. Alle übrigen Members werden als rohe,
+komprimierte Bytes übernommen (excel_zip_writer.rewrite_archive).
+
+Die XML-Teile werden als Text bearbeitet statt mit ElementTree neu
+serialisiert - ElementTree vergibt eigene Namespace-Präfixe, womit
+mc:Ignorable-Angaben nicht mehr stimmen und Excel die Datei "repariert".
+
+Nur Standardbibliothek (das eingebettete Windows-Python hat kein lxml).
+
+Aufruf:
+    python excel_sheet_ops.py add <datei> <name>
+    python excel_sheet_ops.py delete <datei> <name>
+    python excel_sheet_ops.py rename <datei> <alter-name> <neuer-name>
+    python excel_sheet_ops.py clone <datei> <name> <neuer-name>
+    python excel_sheet_ops.py move <datei> <name> <neuer-index>
+"""
+
+import json
+import os
+import posixpath
+import re
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from xml.sax.saxutils import escape, unescape
+
+from excel_zip_writer import rewrite_archive
+
+CONTENT_TYPES = '[Content_Types].xml'
+WORKBOOK_PART = 'xl/workbook.xml'
+APP_PART = 'docProps/app.xml'
+
+WORKSHEET_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml'
+WORKSHEET_REL_TYPE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet'
+
+# Beziehungen, deren Ziel beim Kopieren gemeinsam genutzt statt dupliziert wird
+_SHARED_REL_TYPES = ('/image', '/pivotCacheDefinition', '/slicerCache', '/timelineCache',
+                     '/externalLink', '/hyperlink', '/video', '/audio', '/media')
+
+# Excel-Grenzen für Sheet-Namen
+MAX_SHEET_NAME_LENGTH = 31
+_INVALID_NAME_CHARS = set('[]:*?/\\')
+
+_EMPTY_WORKSHEET = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<dimension ref="A1"/><sheetViews><sheetView workbookViewId="0"/></sheetViews>'
+    '<sheetFormatPr defaultRowHeight="15"/><sheetData/>'
+    '<pageMargins left="0.7" right="0.7" top="0.78740157499999996" bottom="0.78740157499999996" '
+    'header="0.3" footer="0.3"/></worksheet>'
+).encode('utf-8')
+
+_ATTR_RE = re.compile(r'([\w:.-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+_SHEETS_RE = re.compile(r'<((?:\w+:)?)sheets\b[^>]*?(?:/>|>(.*?)</\1sheets>)', re.S)
+_SHEET_RE = re.compile(r'<(?:\w+:)?sheet\b[^>]*?/>', re.S)
+_DEFINED_NAME_RE = re.compile(r'<((?:\w+:)?)definedName\b([^>]*?)(?:/>|>(.*?)</\1definedName>)', re.S)
+_WORKBOOK_VIEW_RE = re.compile(r'<(?:\w+:)?workbookView\b[^>]*?/?>', re.S)
+_RELATIONSHIP_RE = re.compile(r'<(?:\w+:)?Relationship\b[^>]*?/?>', re.S)
+_OVERRIDE_RE = re.compile(r'<(?:\w+:)?Override\b[^>]*?/?>', re.S)
+_FORMULA_RE = re.compile(r'<((?:\w+:)?(?:f|formula|formula1|formula2))((?:\s[^>]*?)?)(?<!/)>(.*?)</\1>', re.S)
+_IDENT_CHAR_RE = re.compile(r'[\w.]', re.U)
+_CELL_LIKE_RE = re.compile(r'^([A-Za-z]{1,3}\d+|[Rr]\d*[Cc]\d*|[Rr]\d*|[Cc]\d*)$')
+
+
+class SheetOpError(Exception):
+    """Fachlicher Fehler (Name existiert, Sheet fehlt ...) - Meldung geht an die GUI"""
+
+
+# =============================================================================
+# Text-Hilfen für XML-Tags
+# =============================================================================
+
+def _attrs(tag: str) -> Dict[str, str]:
+    """Attribute eines Start-Tags (Werte entschlüsselt)"""
+    return {m.group(1): unescape(m.group(2) if m.group(2) is not None else m.group(3),
+                                 {'&quot;': '"', '&apos;': "'"})
+            for m in _ATTR_RE.finditer(tag)}
+
+
+def _attr_name(tag: str, local_name: str) -> Optional[str]:
+    """Attributname mit beliebigem Präfix ('r:id') zum lokalen Namen ('id') - nur mit Präfix"""
+    for m in _ATTR_RE.finditer(tag):
+        if ':' in m.group(1) and m.group(1).split(':', 1)[1] == local_name and not m.group(1).startswith('xmlns'):
+            return m.group(1)
+    return None
+
+
+def _set_attr(tag: str, name: str, value: Optional[str]) -> str:
+    """Setzt, ersetzt oder entfernt (value None) ein Attribut im Start-Tag"""
+    pattern = re.compile(r'\s' + re.escape(name) + r'\s*=\s*(?:"[^"]*"|\'[^\']*\')')
+    if value is None:
+        return pattern.sub('', tag, count=1)
+    encoded = ' %s="%s"' % (name, escape(value, {'"': '&quot;'}))
+    if pattern.search(tag):
+        return pattern.sub(lambda _: encoded, tag, count=1)
+    end = len(tag) - (2 if tag.endswith('/>') else 1)
+    return tag[:end].rstrip() + encoded + tag[end:]
+
+
+def _decode(data: bytes) -> str:
+    return data.decode('utf-8')
+
+
+def _encode(text: str) -> bytes:
+    return text.encode('utf-8')
+
+
+# =============================================================================
+# Sheet-Namen in Formeln
+# =============================================================================
+
+def _quote_sheet_name(name: str) -> str:
+    """Sheet-Name als Formel-Präfix ('Mein Blatt' -> "'Mein Blatt'")"""
+    simple = (name and (name[0].isalpha() or name[0] == '_')
+              and all(_IDENT_CHAR_RE.match(ch) for ch in name)
+              and not _CELL_LIKE_RE.match(name)
+              and name.upper() not in ('TRUE', 'FALSE'))
+    return name if simple else "'" + name.replace("'", "''") + "'"
+
+
+def replace_sheet_refs(formula: str, old_name: str, prefix: str) -> str:
+    """
+    Ersetzt Verweise 'Alt'!A1 bzw. Alt!A1 durch prefix!A1.
+
+    Zeichenketten in Anführungszeichen und externe Verweise ([1]Alt!A1)
+    bleiben unverändert. Vergleich ohne Groß-/Kleinschreibung wie in Excel.
+    """
+    old = old_name.lower()
+    out = []
+    i, length = 0, len(formula)
+    while i < length:
+        ch = formula[i]
+        if ch == '"':
+            j = i + 1
+            while j < length:
+                if formula[j] == '"':
+                    if j + 1 < length and formula[j + 1] == '"':
+                        j += 2
+                        continue
+                    break
+                j += 1
+            out.append(formula[i:j + 1])
+            i = j + 1
+        elif ch == "'":
+            j = i + 1
+            while j < length:
+                if formula[j] == "'":
+                    if j + 1 < length and formula[j + 1] == "'":
+                        j += 2
+                        continue
+                    break
+                j += 1
+            name = formula[i + 1:j].replace("''", "'")
+            if j + 1 < length and formula[j + 1] == '!' and name.lower() == old:
+                out.append(prefix)
+            else:
+                out.append(formula[i:j + 1])
+            i = j + 1
+        elif _IDENT_CHAR_RE.match(ch) and (i == 0 or not (_IDENT_CHAR_RE.match(formula[i - 1])
+                                                          or formula[i - 1] == ']')):
+            j = i
+            while j < length and _IDENT_CHAR_RE.match(formula[j]):
+                j += 1
+            word = formula[i:j]
+            if j < length and formula[j] == '!' and word.lower() == old:
+                out.append(prefix)
+            else:
+                out.append(word)
+            i = j
+        else:
+            out.append(ch)
+            i += 1
+    return ''.join(out)
+
+
+def _name_needles(name: str) -> List[bytes]:
+    """
+    Byte-Muster, an denen ein Verweis auf das Sheet in einem XML-Teil erkannt
+    wird (Vorfilter): Name!, 'Name'! - auch mit &apos; kodiert
+    """
+    needles = set()
+    for text in (name + '!', "'" + name.replace("'", "''") + "'!"):
+        for encoded in (escape(text), escape(text, {"'": '&apos;', '"': '&quot;'})):
+            needles.add(_encode(encoded).lower())
+    return sorted(needles)
+
+
+def _rewrite_formulas(xml: str, old_name: str, prefix: str) -> str:
+    """Alle Formel-Elemente (<f>, <c:f>, <formula1> ...) eines XML-Teils umschreiben"""
+    def replace(match):
+        text = unescape(match.group(3), {'&quot;': '"', '&apos;': "'"})
+        rewritten = replace_sheet_refs(text, old_name, prefix)
+        if rewritten == text:
+            return match.group(0)
+        return '<%s%s>%s</%s>' % (match.group(1), match.group(2), escape(rewritten), match.group(1))
+    return _FORMULA_RE.sub(replace, xml)
+
+
+# =============================================================================
+# Paket
+# =============================================================================
+
+def _rels_path(part: str) -> str:
+    """'xl/workbook.xml' -> 'xl/_rels/workbook.xml.rels' ('' = Paket-Wurzel)"""
+    directory, name = posixpath.split(part)
+    return posixpath.join(directory, '_rels', name + '.rels')
+
+
+def _resolve_target(source: str, target: str) -> str:
+    if target.startswith('/'):
+        return target.lstrip('/')
+    return posixpath.normpath(posixpath.join(posixpath.dirname(source), target))
+
+
+class _Package:
+    """
+    Arbeitskopie eines XLSX-Pakets: liest Members bei Bedarf, merkt Änderungen
+    und schreibt am Ende nur diese neu (alles andere roh kopiert).
+    """
+
+    def __init__(self, file_path: Optional[str], parts: Optional[Dict[str, bytes]] = None):
+        """
+        Args:
+            file_path: XLSX-Datei
+            parts: Alternativ bereits entpackte Members {Name: bytes} (Vorlage
+                   im Speicher, siehe excel_month_batch) - dann kein commit()
+        """
+        self.file_path = file_path
+        self._parts = parts
+        self._zf = zipfile.ZipFile(file_path, 'r') if parts is None else None
+        self.names: List[str] = list(parts) if parts is not None else [item.filename for item in self._zf.infolist()]
+        self._existing = set(self.names)
+        self.changes: Dict[str, Optional[bytes]] = {}   # Name -> neue Bytes oder None (gelöscht)
+        self.added: Dict[str, bytes] = {}
+
+    def close(self):
+        if self._zf is not None:
+            self._zf.close()
+
+    def exists(self, name: str) -> bool:
+        if name in self.added:
+            return True
+        return name in self._existing and self.changes.get(name, b'') is not None
+
+    def read(self, name: str) -> Optional[bytes]:
+        if name in self.added:
+            return self.added[name]
+        if name in self.changes:
+            return self.changes[name]
+        if name not in self._existing:
+            return None
+        if self._parts is not None:
+            return self._parts[name]
+        return self._zf.read(name)
+
+    def read_text(self, name: str) -> Optional[str]:
+        data = self.read(name)
+        return _decode(data) if data is not None else None
+
+    def write(self, name: str, data: bytes):
+        if name in self._existing:
+            self.changes[name] = data
+        else:
+            self.added[name] = data
+
+    def write_text(self, name: str, text: str):
+        self.write(name, _encode(text))
+
+    def remove(self, name: str):
+        if name in self.added:
+            del self.added[name]
+        elif name in self._existing:
+            self.changes[name] = None
+
+    def part_names(self) -> List[str]:
+        return [n for n in self.names if self.exists(n)] + list(self.added)
+
+    def unique_part_name(self, template: str) -> str:
+        """'xl/worksheets/sheet2.xml' -> freier Name 'xl/worksheets/sheetN.xml' im selben Ordner"""
+        directory, name = posixpath.split(template)
+        match = re.match(r'^(.*?)(\d*)(\.[^.]+)$', name)
+        stem, ext = (match.group(1), match.group(3)) if match else (name, '')
+        pattern = re.compile(r'^' + re.escape(stem) + r'(\d+)' + re.escape(ext) + r'$', re.I)
+        used = [int(m.group(1)) for n in self.part_names()
+                if posixpath.dirname(n) == directory
+                for m in [pattern.match(posixpath.basename(n))] if m]
+        number = max(used, default=0) + 1
+        return posixpath.join(directory, f'{stem}{number}{ext}')
+
+    # --- Beziehungen -------------------------------------------------------------
+
+    def relationships(self, part: str) -> List[Dict[str, str]]:
+        """Beziehungen eines Teils: [{Id, Type, Target, TargetMode, part (aufgelöst), tag}]"""
+        text = self.read_text(_rels_path(part))
+        if not text:
+            return []
+        rels = []
+        for match in _RELATIONSHIP_RE.finditer(text):
+            rel = _attrs(match.group(0))
+            rel['tag'] = match.group(0)
+            if rel.get('TargetMode') != 'External' and rel.get('Target'):
+                rel['part'] = _resolve_target(part, rel['Target'])
+            rels.append(rel)
+        return rels
+
+    def reachable(self, skip: Optional[Tuple[str, str]] = None, start: str = '') -> Set[str]:
+        """Alle über Beziehungen erreichbaren Teile (skip = (Quelle, Id) wird ignoriert)"""
+        seen: Set[str] = set()
+        stack = [start] if start else [rel['part'] for rel in self.relationships('') if 'part' in rel]
+        while stack:
+            part = stack.pop()
+            if part in seen or not self.exists(part):
+                continue
+            seen.add(part)
+            for rel in self.relationships(part):
+                if 'part' in rel and (part, rel.get('Id')) != skip:
+                    stack.append(rel['part'])
+        return seen
+
+    # --- Content Types -----------------------------------------------------------
+
+    def content_override(self, part: str) -> Optional[str]:
+        text = self.read_text(CONTENT_TYPES) or ''
+        for match in _OVERRIDE_RE.finditer(text):
+            attrs = _attrs(match.group(0))
+            if attrs.get('PartName', '').lstrip('/') == part:
+                return attrs.get('ContentType')
+        return None
+
+    def set_content_override(self, part: str, content_type: Optional[str]):
+        """Override hinzufügen bzw. entfernen (content_type None)"""
+        text = self.read_text(CONTENT_TYPES)
+        text = _OVERRIDE_RE.sub(lambda m: '' if _attrs(m.group(0)).get('PartName', '').lstrip('/') == part
+                                else m.group(0), text)
+        if content_type:
+            override = '<Override PartName="/%s" ContentType="%s"/>' % (escape(part), escape(content_type))
+            close = text.rfind('</')
+            text = text[:close] + override + text[close:]
+        self.write_text(CONTENT_TYPES, text)
+
+    def remove_part(self, part: str):
+        """Teil samt Beziehungsdatei und Override entfernen"""
+        self.remove(part)
+        self.remove(_rels_path(part))
+        if self.content_override(part):
+            self.set_content_override(part, None)
+
+    def commit(self, compression=None) -> Dict[str, int]:
+        """Änderungen in die Datei schreiben (temporäre Datei im selben Ordner + Ersetzen)"""
+        directory = os.path.dirname(os.path.abspath(self.file_path))
+        fd, temp_path = tempfile.mkstemp(suffix='.xlsx', prefix='.sheetops-', dir=directory)
+        os.close(fd)
+        try:
+            stats = rewrite_archive(self.file_path, temp_path, self.changes,
+                                    list(self.added.items()), compression=compression)
+            self.close()
+            shutil.copymode(self.file_path, temp_path)
+            os.replace(temp_path, self.file_path)
+            return stats
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+
+# =============================================================================
+# Workbook
+# =============================================================================
+
+class _Workbook:
+    """Sheet-Liste und definierte Namen aus xl/workbook.xml (Text bleibt erhalten)"""
+
+    def __init__(self, package: _Package):
+        self.package = package
+        # Pfad des Workbook-Teils aus den Paket-Beziehungen (fast immer xl/workbook.xml)
+        self.part = next((rel['part'] for rel in package.relationships('')
+                          if rel.get('Type', '').endswith('/officeDocument') and 'part' in rel), WORKBOOK_PART)
+        self.text = package.read_text(self.part)
+        if self.text is None:
+            raise SheetOpError('Keine gültige Excel-Arbeitsmappe (Workbook-Teil fehlt)')
+        match = _SHEETS_RE.search(self.text)
+        self.sheet_tags: List[str] = _SHEET_RE.findall(match.group(2) or '') if match else []
+        if not self.sheet_tags:
+            raise SheetOpError('Keine Sheets in der Arbeitsmappe')
+        self.rels = {rel.get('Id'): rel for rel in package.relationships(self.part)}
+
+    # --- Sheets ------------------------------------------------------------------
+
+    @property
+    def names(self) -> List[str]:
+        return [_attrs(tag).get('name', '') for tag in self.sheet_tags]
+
+    def index_of(self, name: str) -> int:
+        try:
+            return self.names.index(name)
+        except ValueError:
+            raise SheetOpError('Arbeitsblatt nicht gefunden') from None
+
+    def has_name(self, name: str, ignore_index: Optional[int] = None) -> bool:
+        """Namensvergleich ohne Groß-/Kleinschreibung (wie Excel)"""
+        return any(i != ignore_index and existing.lower() == name.lower()
+                   for i, existing in enumerate(self.names))
+
+    def rel_id(self, index: int) -> str:
+        tag = self.sheet_tags[index]
+        return _attrs(tag).get(_attr_name(tag, 'id') or 'r:id', '')
+
+    def sheet_part(self, index: int) -> str:
+        rel = self.rels.get(self.rel_id(index))
+        if not rel or 'part' not in rel:
+            raise SheetOpError(f'Sheet-Teil für "{self.names[index]}" nicht gefunden')
+        return rel['part']
+
+    def visible_count(self) -> int:
+        return sum(1 for tag in self.sheet_tags if _attrs(tag).get('state', 'visible') == 'visible')
+
+    def new_sheet_tag(self, name: str, rel_id: str) -> str:
+        sheet_ids = [int(_attrs(tag).get('sheetId', 0) or 0) for tag in self.sheet_tags]
+        template = self.sheet_tags[0]
+        prefix = template[1:template.index('sheet')]
+        rel_attr = _attr_name(template, 'id') or 'r:id'
+        # Manche Writer (openpyxl) deklarieren den r-Namespace am <sheet>-Element selbst
+        declarations = ''.join(' %s="%s"' % (key, escape(value, {'"': '&quot;'}))
+                               for key, value in _attrs(template).items() if key.startswith('xmlns'))
+        return '<%ssheet%s name="%s" sheetId="%d" %s="%s"/>' % (
+            prefix, declarations, escape(name, {'"': '&quot;'}), max(sheet_ids, default=0) + 1, rel_attr, rel_id)
+
+    # --- workbook.xml -------------------------------------------------------------
+
+    def save(self, order_map: Optional[Dict[int, Optional[int]]] = None,
+             formula_rewrite: Optional[Callable[[str], str]] = None,
+             extra_names: Optional[List[str]] = None):
+        """
+        Schreibt workbook.xml mit der aktuellen Sheet-Liste.
+
+        Args:
+            order_map: Alter Sheet-Index -> neuer Index (None = gelöscht) für
+                       localSheetId, activeTab und firstSheet
+            formula_rewrite: Umschreiben der Formeln definierter Namen
+            extra_names: Zusätzliche <definedName>-Elemente (Kopie)
+        """
+        text = self.text
+        match = _SHEETS_RE.search(text)
+        prefix = match.group(1)
+        sheets_open = match.group(0)[:match.group(0).index('>') + 1]
+        if sheets_open.endswith('/>'):
+            sheets_open = sheets_open[:-2] + '>'
+        sheets_xml = sheets_open + ''.join(self.sheet_tags) + '</%ssheets>' % prefix
+        text = text[:match.start()] + sheets_xml + text[match.end():]
+
+        count = len(self.sheet_tags)
+
+        def remap(value: str) -> Optional[str]:
+            if order_map is None or not value.isdigit():
+                return value
+            mapped = order_map.get(int(value), int(value))
+            return str(mapped) if mapped is not None else None
+
+        def fix_view(m):
+            tag = m.group(0)
+            attrs = _attrs(tag)
+            # Das aktive Sheet wandert mit, firstSheet (erster sichtbarer Tab) bleibt stehen
+            for attr, follow in (('activeTab', True), ('firstSheet', False)):
+                if attr in attrs and attrs[attr].isdigit():
+                    value = remap(attrs[attr]) if follow else attrs[attr]
+                    if value is None:
+                        # Gelöschtes Sheet war aktiv: Nachfolger (bzw. letztes Sheet)
+                        value = attrs[attr]
+                    value = str(min(int(value), count - 1))
+                    tag = _set_attr(tag, attr, value if value != '0' else None)
+            return tag
+        text = _WORKBOOK_VIEW_RE.sub(fix_view, text)
+
+        def fix_name(m):
+            attrs_text = m.group(2)
+            attrs = _attrs(attrs_text)
+            if 'localSheetId' in attrs:
+                value = remap(attrs['localSheetId'])
+                if value is None:
+                    return ''
+                attrs_text = _set_attr('<x' + attrs_text + '>', 'localSheetId', value)[2:-1]
+            body = m.group(3)
+            if body is not None and formula_rewrite:
+                formula = unescape(body, {'&quot;': '"', '&apos;': "'"})
+                rewritten = formula_rewrite(formula)
+                if rewritten != formula:
+                    body = escape(rewritten)
+            if body is None:
+                return '<%sdefinedName%s/>' % (m.group(1), attrs_text)
+            return '<%sdefinedName%s>%s</%sdefinedName>' % (m.group(1), attrs_text, body, m.group(1))
+        text = _DEFINED_NAME_RE.sub(fix_name, text)
+
+        if extra_names:
+            close = re.search(r'</(?:\w+:)?definedNames>', text)
+            if close:
+                text = text[:close.start()] + ''.join(extra_names) + text[close.start():]
+            else:
+                position = text.index('</%ssheets>' % prefix) + len('</%ssheets>' % prefix)
+                text = (text[:position] + '<%sdefinedNames>%s</%sdefinedNames>' % (prefix, ''.join(extra_names), prefix)
+                        + text[position:])
+
+        # Leer gewordene definedNames entfernen (Excel lehnt <definedNames/> ohne Inhalt ab)
+        text = re.sub(r'<((?:\w+:)?)definedNames>\s*</\1definedNames>', '', text)
+        self.text = text
+        self.package.write_text(self.part, text)
+
+    def local_names(self, index: int) -> List[Tuple[str, str, Optional[str]]]:
+        """Definierte Namen mit localSheetId == index: [(Präfix, Attribut-Text, Inhalt)]"""
+        result = []
+        for m in _DEFINED_NAME_RE.finditer(self.text):
+            if _attrs(m.group(2)).get('localSheetId') == str(index):
+                result.append((m.group(1), m.group(2), m.group(3)))
+        return result
+
+    # --- Workbook-Beziehungen ------------------------------------------------------
+
+    def add_rel(self, rel_type: str, target: str) -> str:
+        path = _rels_path(self.part)
+        text = self.package.read_text(path)
+        ids = [int(m.group(1)) for m in re.finditer(r'Id="rId(\d+)"', text)]
+        rel_id = f'rId{max(ids, default=0) + 1}'
+        tag = '<Relationship Id="%s" Type="%s" Target="%s"/>' % (rel_id, rel_type, escape(target))
+        close = text.rfind('</')
+        self.package.write_text(path, text[:close] + tag + text[close:])
+        return rel_id
+
+    def remove_rel(self, rel_id: str):
+        path = _rels_path(self.part)
+        text = self.package.read_text(path)
+        text = _RELATIONSHIP_RE.sub(lambda m: '' if _attrs(m.group(0)).get('Id') == rel_id else m.group(0), text)
+        self.package.write_text(path, text)
+        self.rels.pop(rel_id, None)
+
+
+# =============================================================================
+# Sheet-Namen in abhängigen Teilen
+# =============================================================================
+
+def _update_app_properties(package: _Package, old_names: List[str], new_names: List[str]):
+    """
+    docProps/app.xml: Sheet-Namen in TitlesOfParts und Anzahl in HeadingPairs.
+    Nur wenn die erste Gruppe genau die bisherigen Sheets enthält - sonst
+    bleibt die Datei unverändert (Excel ergänzt die Angaben beim Speichern).
+    """
+    text = package.read_text(APP_PART)
+    if not text:
+        return
+    heading = re.search(r'(<HeadingPairs>.*?<vt:i4>)(\d+)(</vt:i4>)', text, re.S)
+    titles = re.search(r'(<TitlesOfParts>\s*<vt:vector\b[^>]*\bsize=")(\d+)("[^>]*>)(.*?)(</vt:vector>)', text, re.S)
+    if not heading or not titles or int(heading.group(2)) != len(old_names):
+        return
+    entries = re.findall(r'<vt:lpstr>(.*?)</vt:lpstr>|<vt:lpstr/>', titles.group(4), re.S)
+    if [unescape(e) for e in entries[:len(old_names)]] != old_names:
+        return
+    others = entries[len(old_names):]
+    body = ''.join('<vt:lpstr>%s</vt:lpstr>' % escape(name) for name in new_names)
+    body += ''.join('<vt:lpstr>%s</vt:lpstr>' % entry for entry in others)
+    text = (text[:titles.start()] + titles.group(1) + str(len(new_names) + len(others)) + titles.group(3)
+            + body + titles.group(5) + text[titles.end():])
+    heading = re.search(r'(<HeadingPairs>.*?<vt:i4>)(\d+)(</vt:i4>)', text, re.S)
+    text = text[:heading.start(2)] + str(len(new_names)) + text[heading.end(2):]
+    package.write_text(APP_PART, text)
+
+
+def _rewrite_sheet_references(package: _Package, workbook: _Workbook, old_name: str,
+                              prefix: str, skip_parts: Set[str]) -> int:
+    """
+    Formeln in Worksheets und Diagrammen, die old_name referenzieren, auf
+    prefix umschreiben. Teile ohne den Namen im Text werden nicht angefasst.
+
+    Returns:
+        Anzahl geänderter Teile
+    """
+    needles = _name_needles(old_name)
+    candidates = []
+    for index in range(len(workbook.sheet_tags)):
+        try:
+            candidates.append(workbook.sheet_part(index))
+        except SheetOpError:
+            continue
+    candidates += [name for name in package.part_names()
+                   if name.startswith('xl/charts/') and name.endswith('.xml') and '/_rels/' not in name]
+
+    changed = 0
+    for part in candidates:
+        if part in skip_parts:
+            continue
+        data = package.read(part)
+        if data is None:
+            continue
+        lowered = data.lower()
+        if not any(needle in lowered for needle in needles):
+            continue
+        text = _decode(data)
+        rewritten = _rewrite_formulas(text, old_name, prefix)
+        if rewritten != text:
+            package.write_text(part, rewritten)
+            changed += 1
+    return changed
+
+
+def _rename_pivot_sources(package: _Package, old_name: str, new_name: str):
+    """worksheetSource sheet="..." in Pivot-Caches auf den neuen Namen setzen"""
+    for part in package.part_names():
+        if not part.startswith('xl/pivotCache/pivotCacheDefinition') or '/_rels/' in part:
+            continue
+        text = package.read_text(part)
+
+        def replace(m):
+            tag = m.group(0)
+            if _attrs(tag).get('sheet', '').lower() == old_name.lower():
+                return _set_attr(tag, 'sheet', new_name)
+            return tag
+        rewritten = re.sub(r'<(?:\w+:)?worksheetSource\b[^>]*?/?>', replace, text)
+        if rewritten != text:
+            package.write_text(part, rewritten)
+
+
+# =============================================================================
+# Kopieren abhängiger Teile
+# =============================================================================
+
+def _unique_table_name(base: str, used: Set[str]) -> str:
+    number = 2
+    while f'{base}_{number}'.lower() in used:
+        number += 1
+    name = f'{base}_{number}'
+    used.add(name.lower())
+    return name
+
+
+def _table_names(package: _Package) -> Tuple[Set[str], int]:
+    """Alle Tabellennamen (klein) und die höchste Tabellen-id der Arbeitsmappe"""
+    names, max_id = set(), 0
+    for part in package.part_names():
+        if not part.startswith('xl/tables/') or not part.endswith('.xml') or '/_rels/' in part:
+            continue
+        match = re.search(r'<(?:\w+:)?table\b[^>]*>', package.read_text(part))
+        if match:
+            attrs = _attrs(match.group(0))
+            names.update(attrs.get(key, '').lower() for key in ('name', 'displayName'))
+            if attrs.get('id', '').isdigit():
+                max_id = max(max_id, int(attrs['id']))
+    return names, max_id
+
+
+def _copy_part(package: _Package, source: str, target: str, state: Dict) -> None:
+    """Kopiert einen Teil und rekursiv seine nicht gemeinsam genutzten Abhängigkeiten"""
+    data = package.read(source)
+    content_type = package.content_override(source)
+
+    if posixpath.basename(posixpath.dirname(source)) == 'tables':
+        text = _decode(data)
+        match = re.search(r'<(?:\w+:)?table\b[^>]*>', text)
+        if match:
+            tag = match.group(0)
+            attrs = _attrs(tag)
+            state['table_id'] += 1
+            tag = _set_attr(tag, 'id', str(state['table_id']))
+            new_name = _unique_table_name(attrs.get('displayName') or attrs.get('name') or 'Tabelle',
+                                          state['table_names'])
+            for key in ('name', 'displayName'):
+                if key in attrs:
+                    tag = _set_attr(tag, key, new_name)
+            data = _encode(text[:match.start()] + tag + text[match.end():])
+
+    package.write(target, data)
+    if content_type:
+        package.set_content_override(target, content_type)
+
+    rels_text = package.read_text(_rels_path(source))
+    if not rels_text:
+        return
+
+    def copy_rel(m):
+        tag = m.group(0)
+        attrs = _attrs(tag)
+        rel_type = attrs.get('Type', '')
+        if attrs.get('TargetMode') == 'External' or not attrs.get('Target') or rel_type.endswith(_SHARED_REL_TYPES):
+            return tag
+        dependency = _resolve_target(source, attrs['Target'])
+        if not package.exists(dependency):
+            return tag
+        copied = state['copied'].get(dependency)
+        if copied is None:
+            copied = package.unique_part_name(dependency)
+            state['copied'][dependency] = copied
+            _copy_part(package, dependency, copied, state)
+        target_attr = posixpath.join(posixpath.dirname(attrs['Target']), posixpath.basename(copied))
+        return _set_attr(tag, 'Target', target_attr)
+
+    package.write_text(_rels_path(target), _RELATIONSHIP_RE.sub(copy_rel, rels_text))
+
+
+# =============================================================================
+# Operationen
+# =============================================================================
+
+def validate_sheet_name(name: str) -> None:
+    """Excel-Regeln für Sheet-Namen (max. 31 Zeichen, keine []:*?/\\)"""
+    if not name or not name.strip():
+        raise SheetOpError('Der Name des Arbeitsblatts darf nicht leer sein')
+    if len(name) > MAX_SHEET_NAME_LENGTH:
+        raise SheetOpError(f'Der Name des Arbeitsblatts darf höchstens {MAX_SHEET_NAME_LENGTH} Zeichen lang sein')
+    if any(ch in _INVALID_NAME_CHARS for ch in name) or name.startswith("'") or name.endswith("'"):
+        raise SheetOpError('Der Name des Arbeitsblatts enthält ungültige Zeichen ([ ] : * ? / \\ oder \' am Rand)')
+    if name.lower() == 'history':
+        raise SheetOpError('"History" ist ein reservierter Name')
+
+
+def _run(file_path: str, operation: Callable[[_Package, _Workbook], Dict]) -> Dict:
+    start = time.time()
+    if not os.path.isfile(file_path):
+        return {'success': False, 'error': f'Datei nicht gefunden: {file_path}'}
+    package = None
+    try:
+        package = _Package(file_path)
+        workbook = _Workbook(package)
+        result = operation(package, workbook)
+        if package.changes or package.added:
+            stats = package.commit()
+        else:
+            stats = {'copied': 0, 'written': 0}
+        result.update({'success': True, 'sheets': workbook.names,
+                       'copiedMembers': stats['copied'], 'writtenMembers': stats['written'],
+                       'durationMs': int((time.time() - start) * 1000)})
+        sys.stderr.write(f"[SheetOps] {stats['written']} Teile geschrieben, {stats['copied']} roh "
+                         f"übernommen in {result['durationMs']}ms\n")
+        return result
+    except SheetOpError as e:
+        return {'success': False, 'error': str(e)}
+    except Exception as e:
+        # Paket nicht wie erwartet aufgebaut (oder gesperrt) - Aufrufer kann auf
+        # die vollständige Verarbeitung mit xlsx-populate ausweichen
+        return {'success': False, 'error': f'Arbeitsmappe konnte nicht bearbeitet werden: {e}',
+                'packageError': True}
+    finally:
+        if package is not None:
+            package.close()
+
+
+def add_sheet(file_path: str, sheet_name: str) -> Dict:
+    """Leeres Arbeitsblatt am Ende anfügen"""
+    def operation(package: _Package, workbook: _Workbook):
+        validate_sheet_name(sheet_name)
+        if workbook.has_name(sheet_name):
+            raise SheetOpError('Ein Arbeitsblatt mit diesem Namen existiert bereits')
+        old_names = workbook.names
+        part = package.unique_part_name(workbook.sheet_part(0))
+        package.write(part, _EMPTY_WORKSHEET)
+        package.set_content_override(part, WORKSHEET_CONTENT_TYPE)
+        rel_target = posixpath.relpath(part, posixpath.dirname(workbook.part))
+        rel_id = workbook.add_rel(WORKSHEET_REL_TYPE, rel_target)
+        workbook.sheet_tags.append(workbook.new_sheet_tag(sheet_name, rel_id))
+        workbook.save()
+        _update_app_properties(package, old_names, workbook.names)
+        return {}
+    return _run(file_path, operation)
+
+
+def delete_sheet(file_path: str, sheet_name: str) -> Dict:
+    """Arbeitsblatt samt nur von ihm genutzten Teilen entfernen, Verweise werden #REF!"""
+    def operation(package: _Package, workbook: _Workbook):
+        index = workbook.index_of(sheet_name)
+        if len(workbook.sheet_tags) <= 1:
+            raise SheetOpError('Das letzte Arbeitsblatt kann nicht gelöscht werden')
+        if _attrs(workbook.sheet_tags[index]).get('state', 'visible') == 'visible' and workbook.visible_count() <= 1:
+            raise SheetOpError('Das letzte sichtbare Arbeitsblatt kann nicht gelöscht werden')
+
+        old_names = workbook.names
+        part = workbook.sheet_part(index)
+        rel_id = workbook.rel_id(index)
+
+        # Teile, die nur über dieses Sheet erreichbar sind
+        owned = package.reachable(start=part)
+        remaining = package.reachable(skip=(workbook.part, rel_id))
+        for dependent in sorted(owned - remaining):
+            package.remove_part(dependent)
+
+        # calcChain verweist auf Zellen des gelöschten Sheets - Excel baut sie neu auf
+        for rel in list(workbook.rels.values()):
+            if rel.get('Type', '').endswith('/calcChain') and 'part' in rel:
+                package.remove_part(rel['part'])
+                workbook.remove_rel(rel['Id'])
+
+        workbook.remove_rel(rel_id)
+        del workbook.sheet_tags[index]
+
+        order_map = {i: (None if i == index else i - (i > index)) for i in range(len(old_names))}
+        workbook.save(order_map, lambda formula: replace_sheet_refs(formula, sheet_name, '#REF'))
+        changed = _rewrite_sheet_references(package, workbook, sheet_name, '#REF', set())
+        _update_app_properties(package, old_names, workbook.names)
+        return {'removedParts': len(owned - remaining), 'updatedParts': changed}
+    return _run(file_path, operation)
+
+
+def apply_rename(package: _Package, workbook: _Workbook, index: int, new_name: str,
+                 skip_parts: Optional[Set[str]] = None) -> int:
+    """
+    Benennt Sheet index im Paket um (ohne Prüfungen) - workbook.xml, Formeln,
+    Diagramme, Pivot-Quellen und app.xml.
+
+    Args:
+        skip_parts: Teile, deren Formeln der Aufrufer selbst umschreibt
+
+    Returns:
+        Anzahl geänderter Worksheet-/Diagramm-Teile
+    """
+    old_names = workbook.names
+    old_name = old_names[index]
+    prefix = _quote_sheet_name(new_name)
+    workbook.sheet_tags[index] = _set_attr(workbook.sheet_tags[index], 'name', new_name)
+    workbook.save(formula_rewrite=lambda formula: replace_sheet_refs(formula, old_name, prefix))
+    changed = _rewrite_sheet_references(package, workbook, old_name, prefix, skip_parts or set())
+    _rename_pivot_sources(package, old_name, new_name)
+    _update_app_properties(package, old_names, workbook.names)
+    return changed
+
+
+def rename_sheet(file_path: str, old_name: str, new_name: str) -> Dict:
+    """Arbeitsblatt umbenennen - Formeln, Namen und Diagramme folgen"""
+    def operation(package: _Package, workbook: _Workbook):
+        index = workbook.index_of(old_name)
+        validate_sheet_name(new_name)
+        if workbook.has_name(new_name, ignore_index=index):
+            raise SheetOpError('Ein Arbeitsblatt mit diesem Namen existiert bereits')
+
+        return {'updatedParts': apply_rename(package, workbook, index, new_name)}
+    return _run(file_path, operation)
+
+
+def clone_sheet(file_path: str, sheet_name: str, new_name: str) -> Dict:
+    """Arbeitsblatt mit abhängigen Teilen kopieren und am Ende anfügen"""
+    def operation(package: _Package, workbook: _Workbook):
+        index = workbook.index_of(sheet_name)
+        validate_sheet_name(new_name)
+        if workbook.has_name(new_name):
+            raise SheetOpError('Ein Arbeitsblatt mit diesem Namen existiert bereits')
+
+        old_names = workbook.names
+        source = workbook.sheet_part(index)
+        target = package.unique_part_name(source)
+        table_names, table_id = _table_names(package)
+        state = {'copied': {source: target}, 'table_names': table_names, 'table_id': table_id}
+        _copy_part(package, source, target, state)
+
+        # Die Kopie ist nicht mit ausgewählt (sonst wären beide Tabs gruppiert)
+        text = package.read_text(target)
+        rewritten = re.sub(r'<(?:\w+:)?sheetView\b[^>]*?/?>',
+                           lambda m: _set_attr(m.group(0), 'tabSelected', None), text, count=1)
+        if rewritten != text:
+            package.write_text(target, rewritten)
+        if not package.content_override(target):
+            package.set_content_override(target, package.content_override(source) or WORKSHEET_CONTENT_TYPE)
+
+        rel_target = posixpath.relpath(target, posixpath.dirname(workbook.part))
+        rel_id = workbook.add_rel(WORKSHEET_REL_TYPE, rel_target)
+        new_tag = workbook.new_sheet_tag(new_name, rel_id)
+        state_attr = _attrs(workbook.sheet_tags[index]).get('state')
+        if state_attr:
+            new_tag = _set_attr(new_tag, 'state', state_attr)
+        workbook.sheet_tags.append(new_tag)
+
+        # Sheet-lokale Namen (Druckbereich, Filter) für die Kopie übernehmen
+        new_index = len(workbook.sheet_tags) - 1
+        prefix = _quote_sheet_name(new_name)
+        extra = []
+        for ns, attrs_text, body in workbook.local_names(index):
+            attrs_text = _set_attr('<x' + attrs_text + '>', 'localSheetId', str(new_index))[2:-1]
+            if body is not None:
+                formula = replace_sheet_refs(unescape(body, {'&quot;': '"', '&apos;': "'"}), sheet_name, prefix)
+                extra.append('<%sdefinedName%s>%s</%sdefinedName>' % (ns, attrs_text, escape(formula), ns))
+        workbook.save(extra_names=extra)
+        _update_app_properties(package, old_names, workbook.names)
+        return {'copiedParts': len(state['copied'])}
+    return _run(file_path, operation)
+
+
+def move_sheet(file_path: str, sheet_name: str, new_index: int) -> Dict:
+    """Arbeitsblatt an Position new_index verschieben (0-basiert, Position nach dem Verschieben)"""
+    def operation(package: _Package, workbook: _Workbook):
+        index = workbook.index_of(sheet_name)
+        count = len(workbook.sheet_tags)
+        target = max(0, min(int(new_index), count - 1))
+        if target == index:
+            return {}
+
+        old_names = workbook.names
+        order = list(range(count))
+        order.insert(target, order.pop(index))
+        workbook.sheet_tags = [workbook.sheet_tags[i] for i in order]
+        workbook.save({old: new for new, old in enumerate(order)})
+        _update_app_properties(package, old_names, workbook.names)
+        return {}
+    return _run(file_path, operation)
+
+
+OPERATIONS = {
+    'add': (add_sheet, 1),
+    'delete': (delete_sheet, 1),
+    'rename': (rename_sheet, 2),
+    'clone': (clone_sheet, 2),
+    'move': (move_sheet, 2),
+}
+
+
+def main():
+    """Hauptfunktion - Operation und Argumente über argv, Ergebnis als JSON"""
+    import io
+    if sys.platform == 'win32':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command not in OPERATIONS or len(sys.argv) < 3 + OPERATIONS[command][1]:
+        print(json.dumps({'success': False, 'error': 'Aufruf: add|delete <datei> <name> | '
+                                                     'rename|clone <datei> <name> <neuer-name> | '
+                                                     'move <datei> <name> <index>'}))
+        sys.exit(1)
+
+    function, arg_count = OPERATIONS[command]
+    args = sys.argv[2:3 + arg_count]
+    if command == 'move':
+        try:
+            args[2] = int(args[2])
+        except ValueError:
+            print(json.dumps({'success': False, 'error': f'Ungültiger Index: {args[2]}'}))
+            sys.exit(1)
+    print(json.dumps(function(*args), ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Datei-Staging für Excel Data Sync Pro
+
+Schreibvorgänge laufen nicht mehr direkt auf der Zieldatei:
+1. Das Ergebnis wird in einer temporären Datei im Zielverzeichnis aufgebaut
+2. Erst am Ende wird sie EINMAL atomar per os.replace() an die Zielposition gebracht
+
+So sehen andere Prozesse (Excel, Virenscanner, Sync-Clients) nie eine halb
+geschriebene Datei, und Zwischenstände werden per Rename statt per Kopie
+übernommen.
+
+Kopien laufen über fast_copy():
+- Reflink/Clone (Linux FICLONE, macOS clonefile) - kein Daten-Kopieren
+- os.copy_file_range (Linux, Kopie im Kernel)
+- Gepufferte Kopie als Fallback
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import time
+
+# ioctl-Nummer für FICLONE (Linux, _IOW(0x94, 9, int))
+_FICLONE = 0x40049409
+
+# Puffergröße für die Fallback-Kopie
+_COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def _try_reflink(src, dst):
+    """Versucht eine Reflink-Kopie (Copy-on-Write). Gibt True bei Erfolg zurück."""
+    if sys.platform.startswith('linux'):
+        try:
+            import fcntl
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+            return True
+        except (OSError, ImportError):
+            return False
+
+    if sys.platform == 'darwin':
+        try:
+            import ctypes
+            import ctypes.util
+            libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            if not hasattr(libc, 'clonefile'):
+                return False
+            # clonefile() verlangt, dass das Ziel noch nicht existiert
+            if os.path.exists(dst):
+                os.remove(dst)
+            return libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) == 0
+        except (OSError, AttributeError):
+            return False
+
+    return False
+
+
+def _try_copy_file_range(src, dst):
+    """Kopie im Kernel via os.copy_file_range (Linux). Gibt True bei Erfolg zurück."""
+    if not hasattr(os, 'copy_file_range'):
+        return False
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            remaining = os.fstat(fsrc.fileno()).st_size
+            while remaining > 0:
+                copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+            return remaining == 0
+    except OSError:
+        return False
+
+
+def fast_copy(src, dst):
+    """
+    Kopiert src nach dst (inkl. Zeitstempel wie shutil.copy2) mit der
+    schnellsten verfügbaren Methode.
+
+    Returns:
+        Verwendete Methode: 'reflink', 'copy_file_range' oder 'buffered'
+    """
+    if _try_reflink(src, dst):
+        method = 'reflink'
+    elif _try_copy_file_range(src, dst):
+        method = 'copy_file_range'
+    else:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            shutil.copyfileobj(fsrc, fdst, _COPY_BUFFER_SIZE)
+        method = 'buffered'
+
+    try:
+        shutil.copystat(src, dst)
+    except OSError:
+        pass
+    return method
+
+
+def staging_path(target_path):
+    """
+    Legt eine leere temporäre Datei im Zielverzeichnis an und gibt ihren Pfad zurück.
+    Die Dateiendung bleibt erhalten (Excel öffnet nur bekannte Endungen).
+    """
+    target_dir = os.path.dirname(os.path.abspath(target_path)) or '.'
+    base, ext = os.path.splitext(os.path.basename(target_path))
+    fd, path = tempfile.mkstemp(prefix=f'.~stage-{base}-', suffix=ext or '.tmp', dir=target_dir)
+    os.close(fd)
+    return path
+
+
+def _apply_target_mode(staged_path, target_path):
+    """
+    Übernimmt die Dateirechte der bisherigen Zieldatei (mkstemp legt 0600 an).
+    Existiert das Ziel noch nicht, gelten die Standardrechte laut umask.
+    """
+    try:
+        if os.path.exists(target_path):
+            shutil.copymode(target_path, staged_path)
+        else:
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(staged_path, 0o666 & ~umask)
+    except OSError:
+        pass
+
+
+def atomic_replace(staged_path, target_path, retries=5, delay=0.2):
+    """
+    Ersetzt target_path atomar durch staged_path (Rename im selben Verzeichnis).
+
+    Unter Windows schlägt os.replace() fehl solange ein anderer Prozess die
+    Zieldatei geöffnet hat - daher einige Wiederholungen.
+    """
+    _apply_target_mode(staged_path, target_path)
+    for attempt in range(retries):
+        try:
+            os.replace(staged_path, target_path)
+            return
+        except PermissionError:
+            if attempt == retries - 1:
+                raise
+            time.sleep(delay)
+
+
+def _remove_quietly(path):
+    try:
+        if path and os.path.exists(path):
+            os.remove(path)
+    except OSError:
+        pass
+
+
+class StagedOutput:
+    """
+    Temporäre Ausgabedatei im Zielverzeichnis, die am Ende atomar übernommen wird.
+
+    Verwendung:
+        with StagedOutput(output_path) as staged:
+            wb.save(staged.path)
+            staged.commit()
+        # Ohne commit() (oder bei Exception) wird die Staging-Datei verworfen
+    """
+
+    def __init__(self, target_path, seed_from=None):
+        """
+        Args:
+            target_path: Endgültiger Pfad
+            seed_from: Optional - Datei, mit der die Staging-Datei vorbelegt wird (fast_copy)
+        """
+        self.target_path = target_path
+        self.path = staging_path(target_path)
+        self.committed = False
+        if seed_from:
+            try:
+                fast_copy(seed_from, self.path)
+            except BaseException:
+                _remove_quietly(self.path)
+                raise
+
+    def has_content(self):
+        try:
+            return os.path.getsize(self.path) > 0
+        except OSError:
+            return False
+
+    def commit(self):
+        """Übernimmt die Staging-Datei atomar als Zieldatei"""
+        if not self.committed:
+            atomic_replace(self.path, self.target_path)
+            self.committed = True
+
+    def discard(self):
+        """Verwirft die Staging-Datei (Zieldatei bleibt unverändert)"""
+        if not self.committed:
+            _remove_quietly(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.discard()
+        return False
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Streaming-Eingabe für write_sheet (NDJSON über stdin)
+
+Protokoll (siehe python_bridge.js, writeConfigToStdin):
+    Zeile 1:   Konfiguration als JSON, bei Streaming mit changes.dataStream = {"rows": N}
+               und OHNE changes.data
+    Zeile 2..: N Datenzeilen, jede als JSON-Array in einer eigenen Zeile
+
+Ohne dataStream ist Zeile 1 die komplette Konfiguration (bisheriges Format,
+JSON.stringify erzeugt keine Zeilenumbrüche). Dadurch bleibt das alte
+Format kompatibel.
+
+Die Datenzeilen werden erst beim Iterieren geparst. So existiert der
+Payload nie gleichzeitig als JS-String, Python-String und Objektgraph.
+
+Im Package-Worker folgt der Stream einer Befehlszeile (mit id und action) auf
+dem gemeinsamen stdin - danach muss er vollständig gelesen sein (drain).
+"""
+
+import json
+
+
+class StreamedRows:
+    """
+    Lazy-Sequenz der Datenzeilen aus dem NDJSON-Stream.
+
+    - len() ist sofort bekannt (aus dem Header)
+    - Einmaliges Iterieren parst Zeile für Zeile ohne Zwischenspeicher
+    - Indexzugriff oder ein zweites Iterieren lädt alle Zeilen (materialize)
+    """
+
+    def __init__(self, stream, row_count):
+        self._stream = stream
+        self._row_count = int(row_count)
+        self._rows = None        # Materialisierte Zeilen (nur bei Bedarf)
+        self._consumed = False   # Stream wurde bereits (teilweise) gelesen
+        self._remaining = self._row_count  # Noch nicht gelesene Zeilen im Stream
+
+    def __len__(self):
+        return self._row_count
+
+    def __bool__(self):
+        return self._row_count > 0
+
+    def _read_row(self):
+        line = self._stream.readline()
+        if not line:
+            raise ValueError('Datenstream vorzeitig beendet')
+        self._remaining -= 1
+        return json.loads(line)
+
+    def __iter__(self):
+        if self._rows is not None:
+            return iter(self._rows)
+        if self._consumed:
+            raise RuntimeError('Datenstream wurde bereits gelesen')
+        self._consumed = True
+        return self._iter_stream()
+
+    def _iter_stream(self):
+        for _ in range(self._row_count):
+            yield self._read_row()
+
+    def materialize(self):
+        """Liest alle Zeilen in eine Liste (für Pfade mit wahlfreiem Zugriff)"""
+        if self._rows is None:
+            if self._consumed:
+                raise RuntimeError('Datenstream wurde bereits gelesen')
+            self._consumed = True
+            self._rows = [self._read_row() for _ in range(self._row_count)]
+        return self._rows
+
+    def __getitem__(self, index):
+        return self.materialize()[index]
+
+    def drain(self):
+        """
+        Überliest die noch nicht gelesenen Zeilen (z.B. nach einem Fehler),
+        damit der Stream wieder am nächsten Befehl steht.
+
+        Returns:
+            Anzahl übersprungener Zeilen
+        """
+        skipped = 0
+        while self._remaining > 0:
+            if not self._stream.readline():
+                break
+            self._remaining -= 1
+            skipped += 1
+        self._consumed = True
+        return skipped
+
+
+def materialize_rows(data):
+    """Gibt data als Liste zurück (StreamedRows werden vollständig gelesen)"""
+    if isinstance(data, StreamedRows):
+        return data.materialize()
+    return data
+
+
+def read_write_params(stream):
+    """
+    Liest die write_sheet-Parameter von stdin.
+
+    Returns:
+        Dict mit den Parametern; bei Streaming ist changes['data'] ein StreamedRows-Objekt
+
+    Raises:
+        json.JSONDecodeError bei ungültigem JSON
+    """
+    first_line = stream.readline()
+    try:
+        params = json.loads(first_line)
+    except json.JSONDecodeError:
+        # Mehrzeiliges JSON (z.B. formatiert aus Test-Skripten) - Rest mitlesen
+        params = json.loads(first_line + stream.read())
+
+    attach_streamed_rows(params, stream)
+    return params
+
+
+def attach_streamed_rows(params, stream):
+    """
+    Ersetzt changes.dataStream durch ein StreamedRows-Objekt auf stream.
+
+    Returns:
+        Das StreamedRows-Objekt oder None (keine gestreamten Daten)
+    """
+    changes = params.get('changes') or {}
+    data_stream = changes.pop('dataStream', None)
+    if not data_stream:
+        return None
+    rows = StreamedRows(stream, data_stream.get('rows', 0))
+    changes['data'] = rows
+    params['changes'] = changes
+    return rows
@@ -272,10 +272,10 @@ def structural_change_with_excel(file_path, output_path, sheet_name,
     
     try:
         import xlwings as xw
-        import shutil
+        from excel_staging import fast_copy
         
-        # Kopiere Original-Datei zuerst
-        shutil.copy2(file_path, output_path)
+        # Kopiere Original-Datei zuerst (Reflink/copy_file_range wenn möglich)
+        fast_copy(file_path, output_path)
         
         # Excel starten (unsichtbar)
         app = xw.App(visible=False)
@@ -0,0 +1,697 @@
+#!/usr/bin/env python3
+"""
+Excel Workbook Reader - mehrere Sheets in einem Aufruf ("Datei öffnen")
+
+Der Data Explorer hat bisher jedes Sheet über einen eigenen readSheet-Aufruf
+gelesen - jedes Mal wurde das komplette Paket neu geöffnet und geparst.
+read_workbook liest die gemeinsamen Teile (workbook.xml, sharedStrings.xml,
+styles.xml) EINMAL und verteilt die angeforderten Sheet-Teile auf
+Worker-Prozesse. Jedes Sheet wird ausgegeben, sobald es fertig ist - das
+erste Sheet kann angezeigt werden, bevor die übrigen gelesen sind.
+
+Ausgabe (NDJSON auf stdout, eine Zeile pro Datensatz):
+    {"type": "workbook", "sheets": [...], "requested": [...], "workers": n}
+    {"type": "sheet", "sheetName": "...", "index": i, "result": {...}}
+    {"type": "done", "success": true, "sheetCount": n, "durationMs": ...}
+
+Das Ergebnis pro Sheet hat das Format des ExcelJS-Readers (exceljs-reader.js):
+headers, data (Header an Position 0), cellStyles, cellFormulas,
+cellHyperlinks, richTextCells, hiddenColumns, hiddenRows, autoFilterRange,
+rowFingerprints. mergedCells kommen als Range-Strings ("A1:H1"), die
+Umwandlung in Objekte und die Zeilenfarben-Erkennung macht main.js.
+
+read_sheet liefert ein einzelnes Sheet progressiv: zuerst ein meta-Datensatz
+mit den Headern, dann "rows"-Datensätze mit je ~5000 Zeilen samt ihrer Styles,
+zuletzt ein end-Datensatz mit verbundenen Zellen, ausgeblendeten Spalten,
+Hyperlinks und Zählern (siehe iter_sheet_records). Keine Seite hält dabei
+das komplette serialisierte Ergebnis.
+
+Nur Standardbibliothek (das eingebettete Windows-Python hat kein lxml).
+
+Aufruf:
+    python excel_workbook_reader.py read_workbook <datei> ['["Sheet1", "Sheet2"]']
+    python excel_workbook_reader.py read_sheet <datei> [sheet] [batch-zeilen]
+"""
+
+import json
+import os
+import posixpath
+import re
+import sys
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from excel_row_delta import compute_row_fingerprints
+from excel_sheet_metadata import NS_MAIN, NS_PKG_REL, NS_REL, _column_index, _flag, _is_true, _split_ref
+
+_M = '{%s}' % NS_MAIN
+
+# Ab dieser Größe (unkomprimierte Sheet-XMLs) lohnt der Start von Worker-Prozessen
+PARALLEL_MIN_BYTES = 4 * 1024 * 1024
+# Mehr Prozesse bringen kaum etwas - das Entpacken ist pro Sheet sequentiell
+MAX_WORKERS = 4
+# Datenzeilen pro "rows"-Datensatz beim Streaming (read_sheet)
+ROW_BATCH_SIZE = 5000
+
+# Eingebaute Datumsformate (wie ExcelJS, damit die Anzeige übereinstimmt)
+_BUILTIN_DATE_FORMATS = {
+    14: 'mm-dd-yy', 15: 'd-mmm-yy', 16: 'd-mmm', 17: 'mmm-yy',
+    18: 'h:mm AM/PM', 19: 'h:mm:ss AM/PM', 20: 'h:mm', 21: 'h:mm:ss',
+    22: 'm/d/yy h:mm', 45: 'mm:ss', 46: '[h]:mm:ss', 47: 'mmss.0'
+}
+
+_EPOCH_1900 = datetime(1899, 12, 30)
+_EPOCH_1904 = datetime(1904, 1, 1)
+
+# Zellbezug in einer Formel (nicht Teil eines Namens/Funktionsnamens)
+_FORMULA_REF = re.compile(r'(?<![A-Za-z0-9_.$])(\$?)([A-Z]{1,3})(\$?)(\d+)(?![A-Za-z0-9_(])')
+
+
+def _is_date_format(code: Optional[str]) -> bool:
+    """Gleiche Regel wie ExcelJS: Datums-/Zeitzeichen außerhalb von [..] und "..." """
+    if not code:
+        return False
+    clean = re.sub(r'\[[^\]]*\]', '', code)
+    clean = re.sub(r'"[^"]*"', '', clean)
+    return re.search(r'[ymdhMsb]', clean) is not None
+
+
+def _column_letter(col_idx: int) -> str:
+    result = ''
+    while col_idx > 0:
+        col_idx, remainder = divmod(col_idx - 1, 26)
+        result = chr(65 + remainder) + result
+    return result
+
+
+def _rgb_hex(color: Optional[ET.Element]) -> Optional[str]:
+    """<color rgb="FF00B050"/> -> '#00B050' (Theme-/Indexfarben: None)"""
+    if color is None:
+        return None
+    rgb = color.get('rgb')
+    if not rgb or len(rgb) < 6:
+        return None
+    return '#' + rgb[-6:].upper()
+
+
+def _text_of(element: ET.Element) -> str:
+    """Text eines <si>/<is>: direkte <t> und <r><t>, ohne Phonetik (<rPh>)"""
+    parts = []
+    for child in element:
+        if child.tag == f'{_M}t':
+            parts.append(child.text or '')
+        elif child.tag == f'{_M}r':
+            t = child.find(f'{_M}t')
+            if t is not None:
+                parts.append(t.text or '')
+    return ''.join(parts)
+
+
+def _rich_runs(element: ET.Element) -> Optional[List[Dict[str, Any]]]:
+    """<r>-Runs im Format des ExcelJS-Readers (None wenn kein Rich Text)"""
+    runs = element.findall(f'{_M}r')
+    if not runs:
+        return None
+    result = []
+    for run in runs:
+        t = run.find(f'{_M}t')
+        props = run.find(f'{_M}rPr')
+        styles = {'bold': False, 'italic': False, 'underline': False, 'strikethrough': False,
+                  'color': None, 'fontSize': None, 'fontName': None}
+        if props is not None:
+            styles['bold'] = _flag(props.find(f'{_M}b'))
+            styles['italic'] = _flag(props.find(f'{_M}i'))
+            underline = props.find(f'{_M}u')
+            styles['underline'] = underline is not None and underline.get('val', 'single') != 'none'
+            styles['strikethrough'] = _flag(props.find(f'{_M}strike'))
+            styles['color'] = _rgb_hex(props.find(f'{_M}color'))
+            size = props.find(f'{_M}sz')
+            if size is not None and size.get('val'):
+                value = float(size.get('val'))
+                styles['fontSize'] = int(value) if value.is_integer() else value
+            font = props.find(f'{_M}rFont')
+            if font is not None:
+                styles['fontName'] = font.get('val')
+        result.append({'text': (t.text or '') if t is not None else '', 'styles': styles})
+    return result
+
+
+def _rels_path(part: str) -> str:
+    directory, name = posixpath.split(part)
+    return posixpath.join(directory, '_rels', name + '.rels')
+
+
+def _read_rels(zf: zipfile.ZipFile, part: str) -> Dict[str, Tuple[str, str, str]]:
+    """Relationships eines Teils: Id -> (Type, Target aufgelöst, TargetMode)"""
+    try:
+        root = ET.fromstring(zf.read(_rels_path(part)))
+    except KeyError:
+        return {}
+    base = posixpath.dirname(part)
+    rels = {}
+    for rel in root.findall(f'{{{NS_PKG_REL}}}Relationship'):
+        target = rel.get('Target', '')
+        mode = rel.get('TargetMode', '')
+        if mode != 'External':
+            target = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join(base, target))
+        rels[rel.get('Id')] = (rel.get('Type', ''), target, mode)
+    return rels
+
+
+# =============================================================================
+# Gemeinsame Teile (einmal pro Arbeitsmappe)
+# =============================================================================
+
+def read_workbook_context(file_path: str) -> Dict[str, Any]:
+    """
+    Parst die Teile, die alle Sheets brauchen. Das Ergebnis besteht nur aus
+    einfachen Datentypen und wird einmal an jeden Worker-Prozess übergeben.
+    """
+    with zipfile.ZipFile(file_path) as zf:
+        workbook = ET.fromstring(zf.read('xl/workbook.xml'))
+        props = workbook.find(f'{_M}workbookPr')
+        date1904 = props is not None and _is_true(props.get('date1904'))
+
+        rels = _read_rels(zf, 'xl/workbook.xml')
+        sheets: List[Tuple[str, str]] = []
+        for sheet in workbook.findall(f'{_M}sheets/{_M}sheet'):
+            rel = rels.get(sheet.get(f'{{{NS_REL}}}id'))
+            if rel:
+                sheets.append((sheet.get('name'), rel[1]))
+
+        shared_strings: List[str] = []
+        shared_rich: Dict[int, List[Dict[str, Any]]] = {}
+        shared_part = next((target for rel_type, target, _ in rels.values()
+                            if rel_type.endswith('/sharedStrings')), 'xl/sharedStrings.xml')
+        if shared_part in zf.namelist():
+            with zf.open(shared_part) as stream:
+                for _, element in ET.iterparse(stream):
+                    if element.tag == f'{_M}si':
+                        runs = _rich_runs(element)
+                        if runs:
+                            shared_rich[len(shared_strings)] = runs
+                        shared_strings.append(_text_of(element))
+                        element.clear()
+
+        xf_styles, xf_dates = _read_styles(zf)
+        sizes = {part: zf.getinfo(part).file_size for _, part in sheets if part in zf.namelist()}
+
+    return {
+        'filePath': file_path,
+        'sheets': sheets,
+        'sizes': sizes,
+        'date1904': date1904,
+        'sharedStrings': shared_strings,
+        'sharedRich': shared_rich,
+        'xfStyles': xf_styles,
+        'xfDates': xf_dates
+    }
+
+
+def _read_styles(zf: zipfile.ZipFile) -> Tuple[List[Optional[Dict[str, Any]]], List[Optional[str]]]:
+    """
+    styles.xml -> pro cellXfs-Index das Style-Objekt für die GUI (wie der
+    ExcelJS-Reader: bold, italic, underline, strikethrough, fontSize, fontColor,
+    fill) und das Zahlenformat, falls es ein Datumsformat ist.
+    """
+    try:
+        styles = ET.fromstring(zf.read('xl/styles.xml'))
+    except KeyError:
+        return [], []
+
+    num_formats = dict(_BUILTIN_DATE_FORMATS)
+    for fmt in styles.findall(f'{_M}numFmts/{_M}numFmt'):
+        num_formats[int(fmt.get('numFmtId'))] = fmt.get('formatCode')
+
+    fonts = []
+    for font in styles.findall(f'{_M}fonts/{_M}font'):
+        info: Dict[str, Any] = {}
+        if _flag(font.find(f'{_M}b')):
+            info['bold'] = True
+        if _flag(font.find(f'{_M}i')):
+            info['italic'] = True
+        underline = font.find(f'{_M}u')
+        if underline is not None and underline.get('val', 'single') != 'none':
+            info['underline'] = True
+        if _flag(font.find(f'{_M}strike')):
+            info['strikethrough'] = True
+        size = font.find(f'{_M}sz')
+        if size is not None and size.get('val'):
+            value = float(size.get('val'))
+            if value != 11:
+                info['fontSize'] = int(value) if value.is_integer() else value
+        color = _rgb_hex(font.find(f'{_M}color'))
+        if color and color != '#000000':
+            info['fontColor'] = color
+        fonts.append(info)
+
+    fills = []
+    for fill in styles.findall(f'{_M}fills/{_M}fill'):
+        color = _rgb_hex(fill.find(f'{_M}patternFill/{_M}fgColor'))
+        fills.append(color if color and color != '#FFFFFF' else None)
+
+    xf_styles: List[Optional[Dict[str, Any]]] = []
+    xf_dates: List[Optional[str]] = []
+    for xf in styles.findall(f'{_M}cellXfs/{_M}xf'):
+        style = dict(fonts[int(xf.get('fontId', 0))]) if int(xf.get('fontId', 0)) < len(fonts) else {}
+        fill_id = int(xf.get('fillId', 0))
+        if xf.get('applyFill') != '0' and fill_id < len(fills) and fills[fill_id]:
+            style['fill'] = fills[fill_id]
+        xf_styles.append(style or None)
+        code = num_formats.get(int(xf.get('numFmtId', 0)))
+        xf_dates.append(code if _is_date_format(code) else None)
+    return xf_styles, xf_dates
+
+
+# =============================================================================
+# Ein Sheet
+# =============================================================================
+
+def _format_date(serial: float, code: str, date1904: bool) -> str:
+    """Datumswert wie der ExcelJS-Reader formatieren"""
+    moment = (_EPOCH_1904 if date1904 else _EPOCH_1900) + timedelta(milliseconds=round(serial * 86400000))
+    if 'h' in code or 'H' in code or ':' in code:
+        return moment.strftime('%Y-%m-%d %H:%M:%S')
+    day = f'{moment.day:02d}' if 'dd' in code else str(moment.day)
+    month = f'{moment.month:02d}' if 'mm' in code else str(moment.month)
+    year = str(moment.year)
+    if 'yyyy' not in code and 'yy' in code:
+        year = year[2:]
+    if '-' in code and '.' not in code:
+        return f'{month}-{day}-{year}'
+    return f'{day}.{month}.{year}'
+
+
+def _number(text: str):
+    value = float(text)
+    return int(value) if value.is_integer() and abs(value) < 1e16 else value
+
+
+def _slide_formula(formula: str, row_offset: int, col_offset: int) -> str:
+    """Shared Formula des Master-Zellbezugs auf eine abhängige Zelle verschieben"""
+    def shift(match):
+        col_abs, col, row_abs, row = match.groups()
+        if not col_abs:
+            col = _column_letter(_column_index(col) + col_offset)
+        if not row_abs:
+            row = str(int(row) + row_offset)
+        return f'{col_abs}{col}{row_abs}{row}'
+
+    # Nur außerhalb von String-Literalen ersetzen
+    parts = formula.split('"')
+    for i in range(0, len(parts), 2):
+        parts[i] = _FORMULA_REF.sub(shift, parts[i])
+    return '"'.join(parts)
+
+
+def iter_sheet_records(context: Dict[str, Any], sheet_name: str, part: str,
+                       batch_rows: int = ROW_BATCH_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Liest ein Sheet-XML gestreamt und liefert es als Folge von Datensätzen:
+
+        {"type": "meta", headers, columnCount, rowCount (Schätzung aus <dimension>),
+         hiddenColumns, cellStyles/cellFormulas/richTextCells der Header-Zeile}
+        {"type": "rows", start (Datenzeilen-Index), rows, rowFingerprints,
+         cellStyles, cellFormulas, richTextCells, hiddenRows}   je batch_rows Zeilen
+        {"type": "end", rowCount, columnCount, mergedCells, autoFilterRange,
+         cellHyperlinks, hiddenColumns, hiddenRowCount, formulaCount}
+
+    Weder Zeilen noch Styles werden über ihren Batch hinaus gehalten.
+    Style-Keys sind "zeile-spalte" (0 = Header-Zeile), wie beim ExcelJS-Reader.
+    """
+    shared_strings = context['sharedStrings']
+    shared_rich = context['sharedRich']
+    xf_styles = context['xfStyles']
+    xf_dates = context['xfDates']
+    date1904 = context['date1904']
+
+    hidden_col_ranges: List[Tuple[int, int]] = []
+    merged: List[str] = []
+    hyperlinks: List[Tuple[str, Optional[str], Optional[str]]] = []
+    table_ids: List[str] = []
+    auto_filter = None
+    shared_formulas: Dict[str, Tuple[str, int, int]] = {}
+
+    # Breite aus <dimension> (falls vorhanden), sonst bisher größte Spalte
+    width = 0
+    row_hint = 0
+    max_row = 0
+    formula_count = 0
+    hidden_row_count = 0
+
+    batch = _new_batch(0)
+    meta_sent = False
+    cells: Dict[int, Any] = {}
+    row_number = 0
+    col_number = 0
+
+    def meta_record(header_cells):
+        headers = [''] * width
+        for col, value in header_cells.items():
+            if value:
+                headers[col - 1] = value if isinstance(value, str) else json.dumps(value)
+        hidden = _expand_ranges(hidden_col_ranges, width) if width else []
+        record = {'type': 'meta', 'sheetName': sheet_name, 'headers': headers,
+                  'columnCount': width, 'rowCount': max(row_hint - 1, 0), 'hiddenColumns': hidden,
+                  'cellStyles': batch['cellStyles'], 'cellFormulas': batch['cellFormulas'],
+                  'richTextCells': batch['richTextCells']}
+        return record
+
+    def add_data_row(number, row_cells):
+        # Lücken (Zeilen ohne <row>) als leere Zeilen auffüllen
+        while batch['start'] + len(batch['rows']) < number - 2:
+            batch['rows'].append([''] * width)
+        row_data = [''] * width
+        for col, value in row_cells.items():
+            row_data[col - 1] = value
+        batch['rows'].append(row_data)
+
+    with zipfile.ZipFile(context['filePath']) as zf:
+        with zf.open(part) as stream:
+            sheet_data = None
+            for event, element in ET.iterparse(stream, events=('start', 'end')):
+                tag = element.tag
+                if event == 'start':
+                    if tag == f'{_M}sheetData':
+                        sheet_data = element
+                    elif tag == f'{_M}row':
+                        row_number = int(element.get('r', row_number + 1))
+                        col_number = 0
+                        cells = {}
+                        max_row = max(max_row, row_number)
+                        if row_number >= 2 and not meta_sent:
+                            # Sheet ohne Header-Zeile
+                            yield meta_record({})
+                            batch = _new_batch(0)
+                            meta_sent = True
+                        if row_number >= 2 and _is_true(element.get('hidden')):
+                            batch['hiddenRows'].append(row_number - 2)
+                            hidden_row_count += 1
+                    continue
+
+                if tag == f'{_M}c':
+                    ref = element.get('r')
+                    col_number = _split_ref(ref)[1] if ref else col_number + 1
+                    width = max(width, col_number)
+                    key = f'{row_number - 1}-{col_number - 1}'
+                    xf = int(element.get('s', 0))
+
+                    style = xf_styles[xf] if xf < len(xf_styles) else None
+                    if style:
+                        batch['cellStyles'][key] = dict(style)
+
+                    formula = element.find(f'{_M}f')
+                    if formula is not None:
+                        text = formula.text
+                        if formula.get('t') == 'shared':
+                            index = formula.get('si')
+                            if text:
+                                shared_formulas[index] = (text, row_number, col_number)
+                            elif index in shared_formulas:
+                                master, master_row, master_col = shared_formulas[index]
+                                text = _slide_formula(master, row_number - master_row, col_number - master_col)
+                        if text:
+                            batch['cellFormulas'][key] = text
+                            formula_count += 1
+
+                    cell_type = element.get('t', 'n')
+                    value_element = element.find(f'{_M}v')
+                    raw = value_element.text if value_element is not None else None
+                    value: Any = ''
+                    if cell_type == 'inlineStr':
+                        inline = element.find(f'{_M}is')
+                        if inline is not None:
+                            value = _text_of(inline)
+                            runs = _rich_runs(inline)
+                            if runs:
+                                batch['richTextCells'][key] = runs
+                    elif raw is not None:
+                        if cell_type == 's':
+                            index = int(raw)
+                            value = shared_strings[index] if index < len(shared_strings) else ''
+                            if index in shared_rich and formula is None:
+                                batch['richTextCells'][key] = shared_rich[index]
+                        elif cell_type == 'b':
+                            value = raw == '1'
+                        elif cell_type in ('str', 'e'):
+                            value = raw
+                        elif cell_type == 'd':
+                            value = raw.replace('T', ' ')[:19]
+                        else:
+                            date_code = xf_dates[xf] if xf < len(xf_dates) else None
+                            value = _format_date(float(raw), date_code, date1904) if date_code else _number(raw)
+                    if value != '':
+                        cells[col_number] = value
+                elif tag == f'{_M}row':
+                    if row_number == 1:
+                        yield meta_record(cells)
+                        batch = _new_batch(0)
+                        meta_sent = True
+                    elif row_number >= 2:
+                        add_data_row(row_number, cells)
+                        if len(batch['rows']) >= batch_rows:
+                            yield _finish_batch(batch)
+                            batch = _new_batch(batch['start'] + len(batch['rows']))
+                    # Verarbeitete Zeile verwerfen (auch aus sheetData), Speicher bleibt konstant
+                    element.clear()
+                    if sheet_data is not None:
+                        sheet_data.clear()
+                elif tag == f'{_M}dimension':
+                    last = element.get('ref', '').split(':')[-1]
+                    if last and last[0].isalpha():
+                        row_hint, width = _split_ref(last)
+                elif tag == f'{_M}col':
+                    if _is_true(element.get('hidden')):
+                        hidden_col_ranges.append((int(element.get('min')), int(element.get('max'))))
+                elif tag == f'{_M}mergeCell':
+                    merged.append(element.get('ref'))
+                elif tag == f'{_M}autoFilter':
+                    auto_filter = element.get('ref')
+                elif tag == f'{_M}hyperlink':
+                    hyperlinks.append((element.get('ref'), element.get(f'{{{NS_REL}}}id'), element.get('location')))
+                elif tag == f'{_M}tablePart':
+                    table_ids.append(element.get(f'{{{NS_REL}}}id'))
+
+        if not meta_sent:
+            yield meta_record(cells if row_number == 1 else {})
+            batch = _new_batch(0)
+        if batch['rows'] or batch['hiddenRows']:
+            yield _finish_batch(batch)
+
+        cell_hyperlinks: Dict[str, str] = {}
+        if hyperlinks or (table_ids and not auto_filter):
+            rels = _read_rels(zf, part)
+            for ref, rel_id, location in hyperlinks:
+                target = rels[rel_id][1] if rel_id in rels else (f'#{location}' if location else None)
+                if not target or not ref:
+                    continue
+                first, _, last = ref.partition(':')
+                first_row, first_col = _split_ref(first)
+                last_row, last_col = _split_ref(last) if last else (first_row, first_col)
+                for row in range(first_row, min(last_row, max_row) + 1):
+                    for col in range(first_col, min(last_col, width) + 1):
+                        cell_hyperlinks[f'{row - 1}-{col - 1}'] = target
+            # Kein AutoFilter am Sheet: Bereich der ersten Excel-Tabelle verwenden
+            for rel_id in table_ids if not auto_filter else []:
+                if rel_id in rels:
+                    table = ET.fromstring(zf.read(rels[rel_id][1]))
+                    table_filter = table.find(f'{_M}autoFilter')
+                    auto_filter = table_filter.get('ref') if table_filter is not None else table.get('ref')
+                    if auto_filter:
+                        break
+
+    yield {
+        'type': 'end',
+        'success': True,
+        'sheetName': sheet_name,
+        'rowCount': max(max_row - 1, 0),
+        'columnCount': width,
+        'mergedCells': merged,
+        'autoFilterRange': auto_filter,
+        'cellHyperlinks': cell_hyperlinks,
+        'hiddenColumns': _expand_ranges(hidden_col_ranges, width),
+        'hiddenRowCount': hidden_row_count,
+        'formulaCount': formula_count
+    }
+
+
+def _new_batch(start: int) -> Dict[str, Any]:
+    return {'type': 'rows', 'start': start, 'rows': [], 'cellStyles': {}, 'cellFormulas': {},
+            'richTextCells': {}, 'hiddenRows': []}
+
+
+def _finish_batch(batch: Dict[str, Any]) -> Dict[str, Any]:
+    batch['rowFingerprints'] = compute_row_fingerprints(batch['rows'])
+    return batch
+
+
+def _expand_ranges(ranges: List[Tuple[int, int]], limit: int) -> List[int]:
+    """[(erste, letzte)] 1-basiert -> sortierte 0-basierte Indizes bis limit"""
+    return sorted({col - 1 for first, last in ranges for col in range(first, min(last, limit) + 1)})
+
+
+def read_sheet_part(context: Dict[str, Any], sheet_name: str, part: str) -> Dict[str, Any]:
+    """
+    Ein Sheet komplett im Format des ExcelJS-Readers (aus den Datensätzen
+    von iter_sheet_records zusammengesetzt)
+    """
+    result: Dict[str, Any] = {}
+    data: List[List[Any]] = []
+    for record in iter_sheet_records(context, sheet_name, part):
+        kind = record['type']
+        if kind == 'meta':
+            data.append(record['headers'])
+            result = {'success': True, 'sheetName': sheet_name, 'headers': record['headers'], 'data': data,
+                      'rowFingerprints': [], 'hiddenColumns': [], 'hiddenRows': [],
+                      'cellStyles': record['cellStyles'], 'cellFormulas': record['cellFormulas'],
+                      'cellHyperlinks': {}, 'richTextCells': record['richTextCells']}
+        elif kind == 'rows':
+            data.extend(record['rows'])
+            result['rowFingerprints'].extend(record['rowFingerprints'])
+            result['hiddenRows'].extend(record['hiddenRows'])
+            for key in ('cellStyles', 'cellFormulas', 'richTextCells'):
+                result[key].update(record[key])
+        else:
+            width = record['columnCount']
+            for row in data:
+                if len(row) < width:
+                    row.extend([''] * (width - len(row)))
+            result.update({
+                'hiddenColumns': record['hiddenColumns'],
+                'cellHyperlinks': record['cellHyperlinks'],
+                'mergedCells': record['mergedCells'],
+                'autoFilterRange': record['autoFilterRange'],
+                'stats': {'rows': len(data), 'columns': width}
+            })
+    return result
+
+# =============================================================================
+# Worker-Prozesse
+# =============================================================================
+
+_worker_context: Optional[Dict[str, Any]] = None
+
+
+def _init_worker(context: Dict[str, Any]):
+    """Initializer: gemeinsame Teile einmal pro Prozess übernehmen"""
+    global _worker_context
+    _worker_context = context
+
+
+def _read_in_worker(sheet_name: str, part: str) -> Dict[str, Any]:
+    start = time.time()
+    try:
+        result = read_sheet_part(_worker_context, sheet_name, part)
+    except Exception as e:
+        result = {'success': False, 'error': str(e), 'sheetName': sheet_name}
+    result.setdefault('stats', {})['loadTimeMs'] = int((time.time() - start) * 1000)
+    return result
+
+
+def read_workbook(file_path: str, sheets: Optional[List[str]] = None, emit=None,
+                  max_workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Liest die angeforderten Sheets (None = alle) und übergibt jedes Ergebnis
+    sofort an emit(record). Gibt den Abschluss-Datensatz zurück.
+    """
+    start = time.time()
+    emit = emit or (lambda record: None)
+    context = read_workbook_context(file_path)
+    parts = dict(context['sheets'])
+    names = [name for name, _ in context['sheets']]
+    requested = list(sheets) if sheets else names
+
+    jobs = [(index, name) for index, name in enumerate(requested) if name in parts]
+    total_bytes = sum(context['sizes'].get(parts[name], 0) for _, name in jobs)
+    workers = min(len(jobs), max_workers or MAX_WORKERS, os.cpu_count() or 1)
+    if len(jobs) < 2 or (max_workers is None and total_bytes < PARALLEL_MIN_BYTES):
+        workers = 0  # Kleine Mappen: Prozessstart wäre teurer als das Lesen
+
+    emit({'type': 'workbook', 'sheets': names, 'requested': requested, 'workers': workers})
+
+    for index, name in enumerate(requested):
+        if name not in parts:
+            emit({'type': 'sheet', 'sheetName': name, 'index': index,
+                  'result': {'success': False, 'error': f'Sheet "{name}" nicht gefunden'}})
+
+    pending = dict(jobs)
+    if workers:
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(context,)) as pool:
+                # In Anforderungsreihenfolge einreichen: das erste Sheet startet zuerst
+                futures = {pool.submit(_read_in_worker, name, parts[name]): index for index, name in jobs}
+                for future in as_completed(futures):
+                    index = futures[future]
+                    emit({'type': 'sheet', 'sheetName': pending.pop(index), 'index': index,
+                          'result': future.result()})
+        except Exception as e:
+            # Pool nicht verfügbar oder abgestürzt: Rest im eigenen Prozess lesen
+            print(f'[WorkbookReader] Worker-Prozesse fehlgeschlagen ({e}) - lese sequentiell',
+                  file=sys.stderr)
+
+    _init_worker(context)
+    for index, name in sorted(pending.items()):
+        emit({'type': 'sheet', 'sheetName': name, 'index': index,
+              'result': _read_in_worker(name, parts[name])})
+
+    return {'type': 'done', 'success': True, 'sheetCount': len(requested),
+            'workers': workers, 'durationMs': int((time.time() - start) * 1000)}
+
+
+def read_sheet_stream(file_path: str, sheet_name: Optional[str], emit,
+                      batch_rows: int = ROW_BATCH_SIZE):
+    """
+    Ein Sheet als Datensatz-Stream (meta, rows..., end) an emit übergeben.
+    Ohne Sheet-Namen das erste Sheet.
+    """
+    context = read_workbook_context(file_path)
+    parts = dict(context['sheets'])
+    if sheet_name is None and context['sheets']:
+        sheet_name = context['sheets'][0][0]
+    if sheet_name not in parts:
+        emit({'type': 'end', 'success': False, 'error': f'Sheet "{sheet_name}" nicht gefunden'})
+        return
+    for record in iter_sheet_records(context, sheet_name, parts[sheet_name], batch_rows):
+        emit(record)
+
+
+def main():
+    """Hauptfunktion - Befehl und Argumente über argv, Ergebnis als NDJSON"""
+    import io
+    if sys.platform == 'win32':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    def emit(record):
+        sys.stdout.write(json.dumps(record, ensure_ascii=False) + '\n')
+        sys.stdout.flush()
+
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+
+    if command == 'read_workbook' and len(sys.argv) >= 3:
+        sheets = json.loads(sys.argv[3]) if len(sys.argv) > 3 else None
+        try:
+            emit(read_workbook(sys.argv[2], sheets, emit))
+        except Exception as e:
+            emit({'type': 'done', 'success': False, 'error': str(e)})
+
+    elif command == 'read_sheet' and len(sys.argv) >= 3:
+        sheet_name = sys.argv[3] if len(sys.argv) > 3 else None
+        batch_rows = int(sys.argv[4]) if len(sys.argv) > 4 else ROW_BATCH_SIZE
+        try:
+            read_sheet_stream(sys.argv[2], sheet_name, emit, batch_rows)
+        except Exception as e:
+            emit({'type': 'end', 'success': False, 'error': str(e)})
+
+    else:
+        emit({'type': 'done', 'success': False,
+              'error': 'Aufruf: read_workbook <datei> [sheets-json] | read_sheet <datei> [sheet] [batch-zeilen]'})
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
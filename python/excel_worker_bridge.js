@@ -0,0 +1,193 @@
+/**
+ * Excel xlwings Worker Bridge
+ *
+ * Client für den persistenten xlwings-Worker (excel_xlwings_worker.py).
+ * Der Worker hält einen Pool warmer Excel-Instanzen - Lesen und Schreiben
+ * mit xlwings sparen so den Python- und Excel-Start pro Operation.
+ *
+ * Protokoll wie bei der Live-Session: JSON-Zeilen mit Request-ID.
+ * Der Prozess wird beim ersten Aufruf gestartet und nach einem Absturz
+ * beim nächsten Aufruf neu gestartet.
+ *
+ * Auch für andere Worker mit diesem Protokoll (excel_package_worker.py, options.name).
+ * Eine Anfrage kann nach ihrer Befehlszeile weitere Zeilen senden (writeBody,
+ * z.B. NDJSON-Datenzeilen) - stdin-Schreibvorgänge laufen dafür nacheinander,
+ * keine andere Anfrage landet mitten in einem solchen Block.
+ */
+
+const { spawn } = require('child_process');
+
+// Schreiben großer Sheets kann dauern - Timeout pro Anfrage
+const REQUEST_TIMEOUT_MS = 10 * 60 * 1000;
+
+class XlwingsWorkerClient {
+    /**
+     * @param {Object} options
+     * @param {string} options.pythonPath - Python-Interpreter
+     * @param {string} options.scriptPath - Pfad zu excel_xlwings_worker.py
+     * @param {string[]} [options.args] - Zusätzliche Argumente (z.B. ['--pool-size', '2'])
+     * @param {Function} [options.log] - Log-Funktion für stderr des Workers
+     * @param {string} [options.name] - Name für Logs und Fehlermeldungen (Standard: XlwingsWorker)
+     */
+    constructor(options) {
+        this.options = options;
+        this.process = null;
+        this.pending = new Map();
+        this.nextRequestId = 1;
+        this.buffer = '';
+        this.lastError = null;  // Fehlermeldung ohne Request-ID (z.B. Import-Fehler beim Start)
+        this.name = options.name || 'XlwingsWorker';
+        this.writeQueue = Promise.resolve();  // stdin-Schreibvorgänge der Reihe nach
+    }
+
+    _start() {
+        if (this.process) return;
+        const { pythonPath, scriptPath, args = [], log } = this.options;
+        const name = this.name;
+
+        const proc = spawn(pythonPath, [scriptPath, ...args], { stdio: ['pipe', 'pipe', 'pipe'] });
+        this.process = proc;
+        this.buffer = '';
+        this.lastError = null;
+
+        proc.stderr.on('data', (data) => {
+            if (log) log(`[${name}] ${data.toString().trim()}`);
+        });
+
+        proc.stdout.on('data', (data) => {
+            this.buffer += data.toString();
+            const lines = this.buffer.split('\n');
+            this.buffer = lines.pop();
+            for (const line of lines) {
+                if (!line.trim()) continue;
+                try {
+                    this._handleResponse(JSON.parse(line));
+                } catch (e) {
+                    if (log) log(`[${name}] JSON Parse Error: ${e.message}`);
+                }
+            }
+        });
+
+        const onExit = (error) => {
+            if (this.process !== proc) return;
+            this.process = null;
+            this._rejectAll(error);
+        };
+        proc.on('error', (error) => onExit(error));
+        proc.on('close', (code) => onExit(new Error(
+            `${name} beendet (Code ${code})${this.lastError ? `: ${this.lastError}` : ''}`)));
+        // EPIPE nach Absturz nicht als unbehandelten Fehler werfen
+        proc.stdin.on('error', () => {});
+    }
+
+    /**
+     * Sendet einen Befehl an den Worker (startet ihn bei Bedarf)
+     * @param {Object} command - Befehl (eine JSON-Zeile)
+     * @param {number} [timeoutMs] - Timeout ab dem Absenden
+     * @param {Function} [writeBody] - async (stdin) => ..., schreibt weitere Zeilen direkt
+     *   nach der Befehlszeile (bei Backpressure auf 'drain' warten)
+     * @returns {Promise<Object>} Antwort des Workers (ohne Request-ID)
+     */
+    request(command, timeoutMs = REQUEST_TIMEOUT_MS, writeBody = null) {
+        return new Promise((resolve, reject) => {
+            try {
+                this._start();
+            } catch (error) {
+                reject(error);
+                return;
+            }
+
+            const id = this.nextRequestId++;
+            const timer = setTimeout(() => {
+                if (this.pending.delete(id)) {
+                    const error = new Error(`Timeout: ${this.name} antwortet nicht`);
+                    error.timedOut = true;
+                    reject(error);
+                    // Hängendes Excel: Worker sofort beenden (ein quit stünde hinter dem
+                    // hängenden Auftrag), nächster Aufruf startet neu
+                    this.kill(new Error(`${this.name} nach Timeout beendet`));
+                }
+            }, timeoutMs);
+            this.pending.set(id, { resolve, reject, timer });
+            this._write(this.process, JSON.stringify({ ...command, id }) + '\n', writeBody);
+        });
+    }
+
+    _write(proc, line, writeBody) {
+        const write = async () => {
+            // Worker inzwischen beendet/neu gestartet: die Anfrage ist bereits abgewiesen
+            if (this.process !== proc || !proc.stdin.writable) return;
+            proc.stdin.write(line);
+            if (writeBody) await writeBody(proc.stdin);
+        };
+        this.writeQueue = this.writeQueue.then(write).catch((error) => {
+            // Halber Block: der Worker wartet auf Zeilen, die nicht mehr kommen
+            if (this.process === proc) {
+                this.kill(new Error(`${this.name}: Schreiben fehlgeschlagen (${error.message})`));
+            }
+        });
+    }
+
+    _handleResponse(response) {
+        const id = response.id;
+        if (id === undefined || !this.pending.has(id)) {
+            // Verspätete Antwort (Timeout) oder Meldung ohne ID - keiner anderen Anfrage zuordnen
+            if (id === undefined && response.error) this.lastError = response.error;
+            const log = this.options.log;
+            if (log) log(`[${this.name}] Antwort ohne passende Anfrage verworfen (ID ${id})`);
+            return;
+        }
+        const entry = this.pending.get(id);
+        this.pending.delete(id);
+        clearTimeout(entry.timer);
+        delete response.id;
+        entry.resolve(response);
+    }
+
+    _rejectAll(error) {
+        for (const entry of this.pending.values()) {
+            clearTimeout(entry.timer);
+            entry.reject(error);
+        }
+        this.pending.clear();
+    }
+
+    get isRunning() {
+        return this.process !== null;
+    }
+
+    /**
+     * Beendet den Worker sofort (hängender Auftrag). Offene Anfragen werden abgewiesen.
+     */
+    kill(error = new Error(`${this.name} abgebrochen`)) {
+        const proc = this.process;
+        if (!proc) return;
+        this.process = null;
+        proc.kill();
+        this._rejectAll(error);
+    }
+
+    /**
+     * Beendet den Worker (Excel-Instanzen im Pool werden regulär beendet)
+     */
+    async stop() {
+        const proc = this.process;
+        if (!proc) return;
+        try {
+            await Promise.race([
+                this.request({ action: 'quit' }, 10000),
+                new Promise(resolve => proc.once('close', resolve))
+            ]);
+        } catch (e) {
+            // Ignorieren, Prozess wird ohnehin beendet
+        }
+        if (this.process === proc) {
+            proc.kill();
+            this.process = null;
+        }
+    }
+}
+
+module.exports = {
+    XlwingsWorkerClient
+};
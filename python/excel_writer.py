@@ -76,6 +76,34 @@ def _patched_from_tree(cls, node):
 _OriginalPatternFill.from_tree = _patched_from_tree
 # ============================================================================
 
+# ============================================================================
+# openpyxl-Speichern ohne Kompression (nur innerhalb von write_sheet)
+# Die Ausgabe ist dort immer ein Zwischenstand: Fixups packen das Archiv ggf.
+# neu, komprimiert wird am Ende EINMAL parallel (excel_zip_writer.finalize_archive)
+# ============================================================================
+import datetime as _datetime
+import zipfile as _zipfile
+from openpyxl.writer.excel import ExcelWriter as _ExcelWriter
+
+
+def _save_workbook_stored(wb, path):
+    """
+    Wie wb.save(path), aber unkomprimiert: das Archiv wird hier mit
+    ZIP_STORED geöffnet und an openpyxls ExcelWriter übergeben (wie
+    save_workbook). Kein Eingriff in openpyxl-Interna, nur diese Speicherung.
+    """
+    if wb.read_only:
+        raise TypeError('Workbook is read-only')
+    if wb.write_only and not wb.worksheets:
+        wb.create_sheet()
+    archive = _zipfile.ZipFile(path, 'w', _zipfile.ZIP_STORED, allowZip64=True)
+    try:
+        wb.properties.modified = _datetime.datetime.now(tz=_datetime.timezone.utc).replace(tzinfo=None)
+        _ExcelWriter(wb, archive).save()  # schließt das Archiv
+    finally:
+        archive.close()
+# ============================================================================
+
 from openpyxl import load_workbook
 from openpyxl.utils import get_column_letter, column_index_from_string
 from openpyxl.utils.cell import range_boundaries, coordinate_from_string
@@ -100,6 +128,32 @@ THEME_COLORS = [
 ]
 
 
+def replace_archive_members(target_path, replacements, additions=None, compression='stored'):
+    """
+    Ersetzt einzelne Members eines XLSX-Archivs und tauscht target_path atomar aus.
+    
+    Das neue Archiv entsteht per rewrite_archive als Staging-Datei im
+    Zielverzeichnis (unveränderte Members roh übernommen) und wird per
+    os.replace() übernommen. Nichts wird entpackt - bei verschlüsselten
+    Arbeitsmappen landet kein Klartext in einem temporären Verzeichnis.
+    
+    Standardmäßig unkomprimiert (Zwischenstand) - write_sheet komprimiert die
+    Ausgabe am Ende einmal mit der konfigurierten Kompression.
+    
+    Args:
+        replacements: Dict {Name: bytes oder None} - None entfernt das Member
+        additions: Liste von (Name, bytes) - neue Members
+    """
+    staged = staging_path(target_path)
+    try:
+        rewrite_archive(target_path, staged, replacements, additions, compression=compression)
+        atomic_replace(staged, target_path)
+    except Exception:
+        if os.path.exists(staged):
+            os.remove(staged)
+        raise
+
+
 def fix_xlsx_relationships(xlsx_path):
     """
     Repariert openpyxl-gespeicherte XLSX-Dateien.
@@ -114,118 +168,85 @@ def fix_xlsx_relationships(xlsx_path):
     Dies führt dazu, dass Excel die Datei als beschädigt erkennt und Tables/AutoFilter entfernt.
     """
     import zipfile
-    import tempfile
-    import shutil
+    import posixpath
+    import re
     
     XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
     
-    # Erstelle temporäre Kopie
-    temp_dir = tempfile.mkdtemp()
-    temp_xlsx = os.path.join(temp_dir, 'fixed.xlsx')
+    replacements = {}
     
-    try:
-        # Extrahiere die XLSX
-        with zipfile.ZipFile(xlsx_path, 'r') as zf:
-            zf.extractall(temp_dir)
-        
-        fixed_count = 0
-        
-        # Durchsuche alle XML-Dateien
-        for root, dirs, files in os.walk(temp_dir):
-            for f in files:
-                if not f.endswith('.xml') and not f.endswith('.rels'):
-                    continue
-                    
-                full_path = os.path.join(root, f)
-                
-                with open(full_path, 'r', encoding='utf-8') as fp:
-                    content = fp.read()
-                
-                original_content = content
-                
-                # FIX 1: Füge XML-Header hinzu wenn er fehlt
-                if not content.startswith('<?xml'):
-                    content = XML_HEADER + content
-                
-                # FIX 2: Konvertiere absolute Pfade zu relativen (nur für .rels Dateien)
-                if f.endswith('.rels'):
-                    rel_root = root.replace(temp_dir, '').lstrip(os.sep)
-                    
-                    if 'worksheets/_rels' in rel_root or 'worksheets\\_rels' in rel_root:
-                        content = content.replace('Target="/xl/tables/', 'Target="../tables/')
-                        content = content.replace('Target="/xl/drawings/', 'Target="../drawings/')
-                        content = content.replace('Target="/xl/printerSettings/', 'Target="../printerSettings/')
-                    elif '_rels' in rel_root:
-                        content = content.replace('Target="/xl/', 'Target="')
-                
-                # FIX 3: Repariere Table-XML (table*.xml Dateien)
-                if f.startswith('table') and f.endswith('.xml') and 'tables' in root:
-                    # openpyxl setzt xmlns am Ende der Attribute, aber es muss am Anfang sein
-                    # Außerdem fügt es headerRowCount="1" hinzu, was Probleme macht
-                    import re
-                    
-                    # Entferne headerRowCount="1" - das Original hat es nicht
-                    content = re.sub(r'\s+headerRowCount="1"', '', content)
-                    
-                    # Stelle sicher, dass xmlns direkt nach <table kommt
-                    # Pattern: <table ...andere attribute... xmlns="...">
-                    # Ziel:    <table xmlns="..." ...andere attribute...>
-                    match = re.search(r'<table\s+([^>]*?)xmlns="([^"]+)"([^>]*)>', content)
-                    if match:
-                        before_xmlns = match.group(1).strip()
-                        xmlns_value = match.group(2)
-                        after_xmlns = match.group(3).strip()
-                        
-                        # Nur umordnen wenn xmlns nicht schon am Anfang ist
-                        if before_xmlns:
-                            all_attrs = f'{before_xmlns} {after_xmlns}'.strip()
-                            new_table_tag = f'<table xmlns="{xmlns_value}" {all_attrs}>'
-                            content = content[:match.start()] + new_table_tag + content[match.end():]
-                
-                # FIX 4: Repariere leere inlineStr Zellen in sheet*.xml
-                # openpyxl schreibt <c r="X1" t="inlineStr"></c> ohne <is> Element
-                # xlsx-populate erwartet aber <is><t>...</t></is> bei t="inlineStr"
-                # Lösung: Entferne t="inlineStr" bei leeren Zellen
-                if f.startswith('sheet') and f.endswith('.xml') and 'worksheets' in root:
-                    import re
-                    # Pattern: <c ... t="inlineStr"></c> oder <c ... t="inlineStr"/>
-                    # Diese leeren inlineStr-Zellen müssen repariert werden
-                    content = re.sub(
-                        r'<c\s+([^>]*?)t="inlineStr"([^>]*?)></c>',
-                        r'<c \1\2/>',
-                        content
-                    )
-                    content = re.sub(
-                        r'<c\s+([^>]*?)t="inlineStr"([^>]*?)/>', 
-                        r'<c \1\2/>',
-                        content
-                    )
-                    # Auch leere Rows entfernen: <row r="2"></row> -> entfernen
-                    content = re.sub(r'<row r="\d+"></row>', '', content)
-                
-                if content != original_content:
-                    fixed_count += 1
-                    with open(full_path, 'w', encoding='utf-8') as fp:
-                        fp.write(content)
-        
-        if fixed_count > 0:
-            
-            # Erstelle neue XLSX aus den reparierten Dateien
-            with zipfile.ZipFile(temp_xlsx, 'w', zipfile.ZIP_DEFLATED) as zf:
-                for root, dirs, files in os.walk(temp_dir):
-                    for f in files:
-                        if f == 'fixed.xlsx':
-                            continue
-                        full_path = os.path.join(root, f)
-                        arc_name = full_path.replace(temp_dir + os.sep, '')
-                        zf.write(full_path, arc_name)
+    # Alle XML-Dateien direkt im Archiv prüfen (ohne Entpacken)
+    with zipfile.ZipFile(xlsx_path, 'r') as zf:
+        for name in zf.namelist():
+            if not name.endswith('.xml') and not name.endswith('.rels'):
+                continue
             
-            # Ersetze Original mit reparierter Version
-            shutil.copy2(temp_xlsx, xlsx_path)
+            root, f = posixpath.split(name)
+            content = zf.read(name).decode('utf-8')
+            original_content = content
+            
+            # FIX 1: Füge XML-Header hinzu wenn er fehlt
+            if not content.startswith('<?xml'):
+                content = XML_HEADER + content
+            
+            # FIX 2: Konvertiere absolute Pfade zu relativen (nur für .rels Dateien)
+            if f.endswith('.rels'):
+                if 'worksheets/_rels' in root:
+                    content = content.replace('Target="/xl/tables/', 'Target="../tables/')
+                    content = content.replace('Target="/xl/drawings/', 'Target="../drawings/')
+                    content = content.replace('Target="/xl/printerSettings/', 'Target="../printerSettings/')
+                elif '_rels' in root:
+                    content = content.replace('Target="/xl/', 'Target="')
+            
+            # FIX 3: Repariere Table-XML (table*.xml Dateien)
+            if f.startswith('table') and f.endswith('.xml') and 'tables' in root:
+                # openpyxl setzt xmlns am Ende der Attribute, aber es muss am Anfang sein
+                # Außerdem fügt es headerRowCount="1" hinzu, was Probleme macht
+                
+                # Entferne headerRowCount="1" - das Original hat es nicht
+                content = re.sub(r'\s+headerRowCount="1"', '', content)
+                
+                # Stelle sicher, dass xmlns direkt nach <table kommt
+                # Pattern: <table ...andere attribute... xmlns="...">
+                # Ziel:    <table xmlns="..." ...andere attribute...>
+                match = re.search(r'<table\s+([^>]*?)xmlns="([^"]+)"([^>]*)>', content)
+                if match:
+                    before_xmlns = match.group(1).strip()
+                    xmlns_value = match.group(2)
+                    after_xmlns = match.group(3).strip()
+                    
+                    # Nur umordnen wenn xmlns nicht schon am Anfang ist
+                    if before_xmlns:
+                        all_attrs = f'{before_xmlns} {after_xmlns}'.strip()
+                        new_table_tag = f'<table xmlns="{xmlns_value}" {all_attrs}>'
+                        content = content[:match.start()] + new_table_tag + content[match.end():]
+            
+            # FIX 4: Repariere leere inlineStr Zellen in sheet*.xml
+            # openpyxl schreibt <c r="X1" t="inlineStr"></c> ohne <is> Element
+            # xlsx-populate erwartet aber <is><t>...</t></is> bei t="inlineStr"
+            # Lösung: Entferne t="inlineStr" bei leeren Zellen
+            if f.startswith('sheet') and f.endswith('.xml') and 'worksheets' in root:
+                # Pattern: <c ... t="inlineStr"></c> oder <c ... t="inlineStr"/>
+                # Diese leeren inlineStr-Zellen müssen repariert werden
+                content = re.sub(
+                    r'<c\s+([^>]*?)t="inlineStr"([^>]*?)></c>',
+                    r'<c \1\2/>',
+                    content
+                )
+                content = re.sub(
+                    r'<c\s+([^>]*?)t="inlineStr"([^>]*?)/>', 
+                    r'<c \1\2/>',
+                    content
+                )
+                # Auch leere Rows entfernen: <row r="2"></row> -> entfernen
+                content = re.sub(r'<row r="\d+"></row>', '', content)
+            
+            if content != original_content:
+                replacements[name] = content.encode('utf-8')
     
-    finally:
-        # Cleanup
-        shutil.rmtree(temp_dir, ignore_errors=True)
+    if replacements:
+        # Nur die reparierten Members neu schreiben und das Original atomar ersetzen
+        replace_archive_members(xlsx_path, replacements)
 
 
 def restore_table_xml_from_original(output_path, original_path, table_changes=None):
@@ -236,15 +257,16 @@ def restore_table_xml_from_original(output_path, original_path, table_changes=No
     Diese Funktion stellt die Original-Struktur wieder her und passt nur die
     notwendigen Felder an.
     
+    Beide Archive werden direkt gelesen - original_path darf ein PackageReader
+    (entschlüsselte Quelle) sein, ohne dass der Klartext entpackt wird.
+    
     Args:
         output_path: Pfad zur Export-Datei (wird modifiziert)
-        original_path: Pfad zur Original-Datei
+        original_path: Pfad zur Original-Datei oder PackageReader
         table_changes: Dict mit {table_name: {'ref': new_ref, 'columns': [col_names]}}
                        Wenn None oder leer, werden alle Tables vom Original kopiert.
     """
     import zipfile
-    import tempfile
-    import shutil
     import re
     import sys
     
@@ -253,7 +275,7 @@ def restore_table_xml_from_original(output_path, original_path, table_changes=No
         sys.stderr.write(f"[restore_table_xml] Übersprungen: original_path={original_path}, output_path={output_path}\n")
         return
     
-    if not os.path.exists(original_path):
+    if not source_exists(original_path):
         sys.stderr.write(f"[restore_table_xml] Original existiert nicht: {original_path}\n")
         return
     
@@ -263,146 +285,108 @@ def restore_table_xml_from_original(output_path, original_path, table_changes=No
     if table_changes is None:
         table_changes = {}
     
-    temp_dir = tempfile.mkdtemp()
-    temp_xlsx = os.path.join(temp_dir, 'restored.xlsx')
-    orig_temp_dir = tempfile.mkdtemp()
+    replacements = {}
     
-    try:
-        # Extrahiere beide XLSX-Dateien
-        with zipfile.ZipFile(output_path, 'r') as zf:
-            zf.extractall(temp_dir)
-        with zipfile.ZipFile(original_path, 'r') as zf:
-            zf.extractall(orig_temp_dir)
-        
-        fixed_count = 0
-        
-        # Finde alle table*.xml Dateien
-        tables_dir = os.path.join(temp_dir, 'xl', 'tables')
-        orig_tables_dir = os.path.join(orig_temp_dir, 'xl', 'tables')
-        
+    with zipfile.ZipFile(output_path, 'r') as zf, zipfile.ZipFile(original_path, 'r') as orig_zf:
+        orig_names = set(orig_zf.namelist())
         
-        if os.path.exists(tables_dir) and os.path.exists(orig_tables_dir):
-            for f in os.listdir(tables_dir):
-                if not f.startswith('table') or not f.endswith('.xml'):
-                    continue
-                
-                
-                export_table_path = os.path.join(tables_dir, f)
-                orig_table_path = os.path.join(orig_tables_dir, f)
-                
-                if not os.path.exists(orig_table_path):
-                    continue
-                
-                # Lies beide Dateien
-                with open(export_table_path, 'r', encoding='utf-8') as fp:
-                    export_content = fp.read()
-                with open(orig_table_path, 'r', encoding='utf-8') as fp:
-                    orig_content = fp.read()
-                
-                # Extrahiere table name aus Export
-                name_match = re.search(r'name="([^"]+)"', export_content)
-                if not name_match:
-                    continue
-                table_name = name_match.group(1)
-                
-                # Prüfe ob wir Änderungen für diese Table haben
-                if table_name not in table_changes:
-                    # Keine Änderungen - kopiere einfach das Original
-                    with open(export_table_path, 'w', encoding='utf-8') as fp:
-                        fp.write(orig_content)
-                    fixed_count += 1
-                    continue
-                
-                changes = table_changes[table_name]
-                new_ref = changes.get('ref')
-                new_columns = changes.get('columns', [])
-                
-                # Starte mit dem Original-Content
-                new_content = orig_content
-                
-                # Aktualisiere ref in <table> und <autoFilter>
-                if new_ref:
-                    # Table ref
-                    new_content = re.sub(r'(<table[^>]*\s)ref="[^"]+"', f'\\1ref="{new_ref}"', new_content)
-                    # AutoFilter ref
-                    new_content = re.sub(r'(<autoFilter[^>]*\s)ref="[^"]+"', f'\\1ref="{new_ref}"', new_content)
-                
-                # Aktualisiere tableColumns
-                if new_columns:
-                    # Finde den tableColumns-Block
-                    tc_match = re.search(r'<tableColumns[^>]*>.*?</tableColumns>', new_content, re.DOTALL)
-                    if tc_match:
-                        # Extrahiere die Original-Columns
-                        orig_columns = re.findall(r'<tableColumn\s[^/]*(?:/>|>.*?</tableColumn>)', tc_match.group(0), re.DOTALL)
-                        
-                        # Erstelle ein Dict: orig_name -> Liste von (index, xml) für Duplikate
-                        orig_by_name = {}
-                        for idx, orig_col in enumerate(orig_columns):
-                            name_match = re.search(r'name="([^"]+)"', orig_col)
-                            if name_match:
-                                orig_name = name_match.group(1)
-                                if orig_name not in orig_by_name:
-                                    orig_by_name[orig_name] = []
-                                orig_by_name[orig_name].append((idx, orig_col))
-                        
-                        # Zähler für bereits verwendete Duplikate pro Name
-                        used_count = {}
-                        
-                        # Baue neue tableColumns
-                        new_tc_content = f'<tableColumns count="{len(new_columns)}">'
+        # Finde alle xl/tables/table*.xml Dateien, die in beiden Archiven vorkommen
+        for name in zf.namelist():
+            folder, f = name.rsplit('/', 1) if '/' in name else ('', name)
+            if folder != 'xl/tables' or not f.startswith('table') or not f.endswith('.xml'):
+                continue
+            if name not in orig_names:
+                continue
+            
+            # Lies beide Dateien
+            export_content = zf.read(name).decode('utf-8')
+            orig_content = orig_zf.read(name).decode('utf-8')
+            
+            # Extrahiere table name aus Export
+            name_match = re.search(r'name="([^"]+)"', export_content)
+            if not name_match:
+                continue
+            table_name = name_match.group(1)
+            
+            # Prüfe ob wir Änderungen für diese Table haben
+            if table_name not in table_changes:
+                # Keine Änderungen - übernimm einfach das Original
+                replacements[name] = orig_content.encode('utf-8')
+                continue
+            
+            changes = table_changes[table_name]
+            new_ref = changes.get('ref')
+            new_columns = changes.get('columns', [])
+            
+            # Starte mit dem Original-Content
+            new_content = orig_content
+            
+            # Aktualisiere ref in <table> und <autoFilter>
+            if new_ref:
+                # Table ref
+                new_content = re.sub(r'(<table[^>]*\s)ref="[^"]+"', f'\\1ref="{new_ref}"', new_content)
+                # AutoFilter ref
+                new_content = re.sub(r'(<autoFilter[^>]*\s)ref="[^"]+"', f'\\1ref="{new_ref}"', new_content)
+            
+            # Aktualisiere tableColumns
+            if new_columns:
+                # Finde den tableColumns-Block
+                tc_match = re.search(r'<tableColumns[^>]*>.*?</tableColumns>', new_content, re.DOTALL)
+                if tc_match:
+                    # Extrahiere die Original-Columns
+                    orig_columns = re.findall(r'<tableColumn\s[^/]*(?:/>|>.*?</tableColumn>)', tc_match.group(0), re.DOTALL)
+                    
+                    # Erstelle ein Dict: orig_name -> Liste von (index, xml) für Duplikate
+                    orig_by_name = {}
+                    for idx, orig_col in enumerate(orig_columns):
+                        name_match = re.search(r'name="([^"]+)"', orig_col)
+                        if name_match:
+                            orig_name = name_match.group(1)
+                            if orig_name not in orig_by_name:
+                                orig_by_name[orig_name] = []
+                            orig_by_name[orig_name].append((idx, orig_col))
+                    
+                    # Zähler für bereits verwendete Duplikate pro Name
+                    used_count = {}
+                    
+                    # Baue neue tableColumns
+                    new_tc_content = f'<tableColumns count="{len(new_columns)}">'
+                    
+                    for i, col_name in enumerate(new_columns):
+                        matching_orig = None
                         
-                        for i, col_name in enumerate(new_columns):
-                            matching_orig = None
-                            
-                            # Suche nach Original-Column mit gleichem Namen
-                            if col_name in orig_by_name:
-                                # Wie viele mit diesem Namen haben wir schon verwendet?
-                                used = used_count.get(col_name, 0)
-                                available = orig_by_name[col_name]
-                                
-                                if used < len(available):
-                                    # Nimm die nächste verfügbare mit diesem Namen
-                                    matching_orig = available[used][1]
-                                    used_count[col_name] = used + 1
+                        # Suche nach Original-Column mit gleichem Namen
+                        if col_name in orig_by_name:
+                            # Wie viele mit diesem Namen haben wir schon verwendet?
+                            used = used_count.get(col_name, 0)
+                            available = orig_by_name[col_name]
                             
-                            if matching_orig:
-                                # Nutze Original-Column und aktualisiere nur die ID und den Namen
-                                col_xml = re.sub(r'id="\d+"', f'id="{i+1}"', matching_orig)
-                                # Name auch aktualisieren (für den Fall dass er sich geändert hat)
-                                safe_name = col_name.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;')
-                                col_xml = re.sub(r'name="[^"]+"', f'name="{safe_name}"', col_xml)
-                                new_tc_content += col_xml
-                            else:
-                                # Neue Spalte ohne xr3:uid
-                                # Escape special XML chars in name
-                                safe_name = col_name.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;')
-                                new_tc_content += f'<tableColumn id="{i+1}" name="{safe_name}"/>'
+                            if used < len(available):
+                                # Nimm die nächste verfügbare mit diesem Namen
+                                matching_orig = available[used][1]
+                                used_count[col_name] = used + 1
                         
-                        new_tc_content += '</tableColumns>'
-                        new_content = new_content[:tc_match.start()] + new_tc_content + new_content[tc_match.end():]
-                
-                # Schreibe die reparierte Datei
-                with open(export_table_path, 'w', encoding='utf-8') as fp:
-                    fp.write(new_content)
-                fixed_count += 1
-        
-        
-        if fixed_count > 0:
-            # Erstelle neue XLSX
-            with zipfile.ZipFile(temp_xlsx, 'w', zipfile.ZIP_DEFLATED) as zf:
-                for root, dirs, files in os.walk(temp_dir):
-                    for f in files:
-                        if f == 'restored.xlsx':
-                            continue
-                        full_path = os.path.join(root, f)
-                        arc_name = full_path.replace(temp_dir + os.sep, '')
-                        zf.write(full_path, arc_name)
-            
-            shutil.copy2(temp_xlsx, output_path)
-    
-    finally:
-        shutil.rmtree(temp_dir, ignore_errors=True)
-        shutil.rmtree(orig_temp_dir, ignore_errors=True)
+                        if matching_orig:
+                            # Nutze Original-Column und aktualisiere nur die ID und den Namen
+                            col_xml = re.sub(r'id="\d+"', f'id="{i+1}"', matching_orig)
+                            # Name auch aktualisieren (für den Fall dass er sich geändert hat)
+                            safe_name = col_name.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;')
+                            col_xml = re.sub(r'name="[^"]+"', f'name="{safe_name}"', col_xml)
+                            new_tc_content += col_xml
+                        else:
+                            # Neue Spalte ohne xr3:uid
+                            # Escape special XML chars in name
+                            safe_name = col_name.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;')
+                            new_tc_content += f'<tableColumn id="{i+1}" name="{safe_name}"/>'
+                    
+                    new_tc_content += '</tableColumns>'
+                    new_content = new_content[:tc_match.start()] + new_tc_content + new_content[tc_match.end():]
+            
+            replacements[name] = new_content.encode('utf-8')
+    
+    if replacements:
+        # Nur die Table-XML neu schreiben und die Ausgabe atomar ersetzen
+        replace_archive_members(output_path, replacements)
 
 
 def restore_external_links_from_original(output_path, original_path):
@@ -411,127 +395,77 @@ def restore_external_links_from_original(output_path, original_path):
     
     openpyxl verliert wichtige XML-Namespaces wie xmlns:mc, mc:Ignorable, xmlns:x14 etc.,
     vereinfacht definedNames (entfernt localSheetId Attribute) und verliert Slicers komplett.
+    
+    Wie restore_table_xml_from_original ohne Entpacken: original_path darf ein
+    PackageReader sein.
     """
-    import tempfile
-    import shutil
     import zipfile
-    import re
     
     if not original_path or original_path == output_path:
         return
     
-    if not os.path.exists(original_path):
+    if not source_exists(original_path):
         return
     
-    temp_dir = None
-    orig_temp_dir = None
+    def folder_files(names, folder, suffix):
+        """Dateien direkt in folder (ohne Unterordner) mit der Endung suffix"""
+        prefix = folder + '/'
+        return [name for name in names
+                if name.startswith(prefix) and '/' not in name[len(prefix):] and name.endswith(suffix)]
     
-    try:
-        temp_dir = tempfile.mkdtemp()
-        orig_temp_dir = tempfile.mkdtemp()
-        temp_xlsx = os.path.join(temp_dir, 'restored.xlsx')
-        
-        with zipfile.ZipFile(output_path, 'r') as zf:
-            zf.extractall(temp_dir)
-        with zipfile.ZipFile(original_path, 'r') as zf:
-            zf.extractall(orig_temp_dir)
-        
-        ext_links_dir = os.path.join(temp_dir, 'xl', 'externalLinks')
-        orig_ext_links_dir = os.path.join(orig_temp_dir, 'xl', 'externalLinks')
-        
-        fixed_count = 0
-        
-        if os.path.exists(orig_ext_links_dir) and os.path.exists(ext_links_dir):
-            # Kopiere alle externalLink*.xml Dateien
-            for f in os.listdir(orig_ext_links_dir):
-                if f.startswith('externalLink') and f.endswith('.xml'):
-                    orig_file = os.path.join(orig_ext_links_dir, f)
-                    dest_file = os.path.join(ext_links_dir, f)
-                    if os.path.exists(dest_file):
-                        shutil.copy2(orig_file, dest_file)
-                        fixed_count += 1
-            
-            # WICHTIG: Auch die _rels Dateien kopieren (openpyxl verliert Relationships)
-            orig_rels_dir = os.path.join(orig_ext_links_dir, '_rels')
-            dest_rels_dir = os.path.join(ext_links_dir, '_rels')
-            if os.path.exists(orig_rels_dir) and os.path.exists(dest_rels_dir):
-                for f in os.listdir(orig_rels_dir):
-                    if f.endswith('.xml.rels'):
-                        orig_rels = os.path.join(orig_rels_dir, f)
-                        dest_rels = os.path.join(dest_rels_dir, f)
-                        if os.path.exists(dest_rels):
-                            shutil.copy2(orig_rels, dest_rels)
-                            fixed_count += 1
+    with zipfile.ZipFile(output_path, 'r') as zf:
+        output_names = set(zf.namelist())
+    
+    replacements = {}
+    additions = {}
+    
+    def copy_member(orig_zf, name):
+        """Member aus dem Original übernehmen (ersetzen oder neu anlegen)"""
+        if name in output_names:
+            replacements[name] = orig_zf.read(name)
+        else:
+            additions[name] = orig_zf.read(name)
+    
+    with zipfile.ZipFile(original_path, 'r') as orig_zf:
+        orig_names = [name for name in orig_zf.namelist() if not name.endswith('/')]
+        
+        # Alle externalLink*.xml, die auch in der Ausgabe vorkommen
+        for name in folder_files(orig_names, 'xl/externalLinks', '.xml'):
+            if name.rsplit('/', 1)[1].startswith('externalLink') and name in output_names:
+                copy_member(orig_zf, name)
+        
+        # WICHTIG: Auch die _rels Dateien kopieren (openpyxl verliert Relationships)
+        for name in folder_files(orig_names, 'xl/externalLinks/_rels', '.xml.rels'):
+            if name in output_names:
+                copy_member(orig_zf, name)
         
         # Kopiere slicerCaches aus dem Original (openpyxl verliert Slicers komplett)
-        orig_slicer_dir = os.path.join(orig_temp_dir, 'xl', 'slicerCaches')
-        dest_slicer_dir = os.path.join(temp_dir, 'xl', 'slicerCaches')
-        if os.path.exists(orig_slicer_dir):
-            if not os.path.exists(dest_slicer_dir):
-                os.makedirs(dest_slicer_dir)
-            for f in os.listdir(orig_slicer_dir):
-                if f.endswith('.xml'):
-                    shutil.copy2(os.path.join(orig_slicer_dir, f), os.path.join(dest_slicer_dir, f))
-                    fixed_count += 1
-        
-        # Kopiere slicers Ordner auch (falls vorhanden)
-        orig_slicers_dir = os.path.join(orig_temp_dir, 'xl', 'slicers')
-        dest_slicers_dir = os.path.join(temp_dir, 'xl', 'slicers')
-        if os.path.exists(orig_slicers_dir):
-            if os.path.exists(dest_slicers_dir):
-                shutil.rmtree(dest_slicers_dir)
-            shutil.copytree(orig_slicers_dir, dest_slicers_dir)
-            fixed_count += 1
+        for name in folder_files(orig_names, 'xl/slicerCaches', '.xml'):
+            copy_member(orig_zf, name)
+        
+        # Kopiere slicers Ordner auch (falls vorhanden) - ersetzt den Ordner der Ausgabe
+        orig_slicers = [name for name in orig_names if name.startswith('xl/slicers/')]
+        if orig_slicers:
+            for name in output_names:
+                if name.startswith('xl/slicers/') and name not in orig_slicers:
+                    replacements[name] = None
+            for name in orig_slicers:
+                copy_member(orig_zf, name)
         
         # Kopiere sharedStrings.xml (Original verwendet shared strings, openpyxl inline strings)
-        orig_shared_strings = os.path.join(orig_temp_dir, 'xl', 'sharedStrings.xml')
-        dest_shared_strings = os.path.join(temp_dir, 'xl', 'sharedStrings.xml')
-        if os.path.exists(orig_shared_strings):
-            shutil.copy2(orig_shared_strings, dest_shared_strings)
-            fixed_count += 1
+        # und stelle workbook.xml.rels (slicerCache Referenzen) sowie [Content_Types].xml
+        # (slicerCache ContentTypes) aus dem Original wieder her
+        for name in ('xl/sharedStrings.xml', 'xl/_rels/workbook.xml.rels', '[Content_Types].xml'):
+            if name in orig_names:
+                copy_member(orig_zf, name)
         
         # Stelle workbook.xml aus Original wieder her (behält definedNames, externalReferences, slicerCaches-Refs)
-        workbook_path = os.path.join(temp_dir, 'xl', 'workbook.xml')
-        orig_workbook_path = os.path.join(orig_temp_dir, 'xl', 'workbook.xml')
-        
-        if os.path.exists(workbook_path) and os.path.exists(orig_workbook_path):
-            # Kopiere komplett das Original workbook.xml
-            shutil.copy2(orig_workbook_path, workbook_path)
-            fixed_count += 1
-        
-        # Stelle workbook.xml.rels aus Original wieder her (enthält slicerCache Referenzen)
-        rels_path = os.path.join(temp_dir, 'xl', '_rels', 'workbook.xml.rels')
-        orig_rels_path = os.path.join(orig_temp_dir, 'xl', '_rels', 'workbook.xml.rels')
-        if os.path.exists(orig_rels_path):
-            shutil.copy2(orig_rels_path, rels_path)
-            fixed_count += 1
-        
-        # Stelle [Content_Types].xml aus Original wieder her (enthält slicerCache ContentTypes)
-        content_types_path = os.path.join(temp_dir, '[Content_Types].xml')
-        orig_content_types_path = os.path.join(orig_temp_dir, '[Content_Types].xml')
-        if os.path.exists(orig_content_types_path):
-            shutil.copy2(orig_content_types_path, content_types_path)
-            fixed_count += 1
-        
-        if fixed_count > 0:
-            
-            # Erstelle neue XLSX
-            with zipfile.ZipFile(temp_xlsx, 'w', zipfile.ZIP_DEFLATED) as zf:
-                for root, dirs, files in os.walk(temp_dir):
-                    for f in files:
-                        if f == 'restored.xlsx':
-                            continue
-                        full_path = os.path.join(root, f)
-                        arc_name = full_path.replace(temp_dir + os.sep, '')
-                        zf.write(full_path, arc_name)
-            
-            shutil.copy2(temp_xlsx, output_path)
+        if 'xl/workbook.xml' in output_names and 'xl/workbook.xml' in orig_names:
+            copy_member(orig_zf, 'xl/workbook.xml')
     
-    finally:
-        if temp_dir:
-            shutil.rmtree(temp_dir, ignore_errors=True)
-        if orig_temp_dir:
-            shutil.rmtree(orig_temp_dir, ignore_errors=True)
+    if replacements or additions:
+        # Nur die übernommenen Members neu schreiben und die Ausgabe atomar ersetzen
+        replace_archive_members(output_path, replacements, list(additions.items()))
 
 
 def apply_tint(rgb_hex, tint):
@@ -698,6 +632,20 @@ except ImportError:
     def structural_change_with_excel(*args, **kwargs):
         return False
 
+# Zeilen-Delta (nur geänderte Zeilen schreiben bei fullRewrite)
+from excel_row_delta import resolve_rows_to_write
+# Streaming-Eingabe (NDJSON über stdin)
+from excel_stream_input import read_write_params, materialize_rows
+# Staging: temporäre Ausgabe im Zielverzeichnis + atomares Ersetzen
+from excel_staging import StagedOutput, staging_path, atomic_replace
+# ZIP-Ausgabe: konfigurierbare Kompression, parallele DEFLATE-Blöcke
+from excel_zip_writer import (rewrite_archive, set_output_compression,
+                              archive_needs_finalize, finalize_archive)
+# Passwortschutz der Ausgabe (ECMA-376 Agile, AES über OpenSSL per ctypes)
+from excel_package_crypto import encrypt_package, available as encryption_available, PackageCryptoError
+# Passwortgeschützte Quellen: entschlüsseltes Paket aus dem Cache statt Datei
+from excel_package_cache import open_source, close_source, source_exists, copy_source
+
 
 def hex_to_argb(hex_color):
     """Konvertiert Hex ('#FF0000') zu ARGB ('FFFF0000')"""
@@ -1114,7 +1062,89 @@ def apply_cell_value(cell, value):
         cell.value = str(value)
 
 
-def write_sheet(file_path, output_path, sheet_name, changes, original_path=None):
+def write_sheet(file_path, output_path, sheet_name, changes, original_path=None, compression=None,
+                password=None, source_password=None):
+    """
+    Schreibt Änderungen in ein Excel-Sheet (Details siehe _write_sheet).
+    
+    Alle Schreibvorgänge laufen auf einer Staging-Datei im Zielverzeichnis.
+    Die Zieldatei wird am Ende genau einmal atomar ersetzt - andere Prozesse
+    sehen nie eine halb geschriebene Datei.
+    
+    Zwischenstände (openpyxl-Save, Fixups, ZIP-Ansatz) werden unkomprimiert
+    geschrieben und vor dem Ersetzen einmal parallel komprimiert.
+    
+    Mit password wird die Ausgabe im selben Durchlauf verschlüsselt
+    (excel_package_crypto). Ist das hier nicht möglich (kein OpenSSL), wird
+    unverschlüsselt geschrieben und encryptionError gesetzt - der Aufrufer
+    verschlüsselt dann selbst.
+    
+    Ist die Quelle (bzw. das Original) verschlüsselt, liest der Writer mit
+    source_password direkt aus dem entschlüsselten Paket (excel_package_cache).
+    
+    Args:
+        compression: 'fast' | 'default' | 'best' | 'stored' (None = EXCEL_SYNC_ZIP_COMPRESSION bzw. 'default')
+        password: Ausgabe mit Passwort schützen (ECMA-376 Agile Encryption)
+        source_password: Passwort der Quelldatei
+    """
+    try:
+        set_output_compression(compression)
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}
+    
+    encrypt = bool(password) and encryption_available()
+    
+    source = original = None
+    try:
+        source = open_source(file_path, source_password)
+        if original_path is None or original_path == file_path:
+            original = source
+        else:
+            original = open_source(original_path, source_password)
+    except PackageCryptoError as e:
+        close_source(source)
+        return {'success': False, 'error': str(e), 'needsPassword': True}
+    
+    try:
+        with StagedOutput(output_path) as staged:
+            result = _write_sheet(source, staged.path, sheet_name, changes, original)
+            if result.get('success'):
+                if staged.has_content():
+                    finalize = archive_needs_finalize(staged.path)
+                    if finalize or encrypt:
+                        final_path = staging_path(output_path)
+                        try:
+                            if finalize:
+                                # Komprimieren und Verschlüsseln in einem Durchlauf
+                                finalize_archive(staged.path, final_path, password=password if encrypt else None)
+                            else:
+                                encrypt_package(staged.path, final_path, password)
+                            atomic_replace(final_path, staged.path)
+                        except Exception:
+                            if os.path.exists(final_path):
+                                os.remove(final_path)
+                            raise
+                    staged.commit()
+                elif encrypt:
+                    # Nichts geschrieben - Eingabe verschlüsselt übernehmen
+                    encrypt_package(source, staged.path, password)
+                    staged.commit()
+                elif file_path != output_path or source is not file_path:
+                    # Nichts geschrieben - Ausgabe entspricht der (entschlüsselten) Eingabe
+                    copy_source(source, staged.path)
+                    staged.commit()
+                result['outputPath'] = output_path
+                if password:
+                    result['encrypted'] = encrypt
+                    if not encrypt:
+                        result['encryptionError'] = 'Verschlüsselung im Python-Writer nicht verfügbar (OpenSSL fehlt)'
+            return result
+    finally:
+        close_source(source)
+        close_source(original)
+
+
+def _write_sheet(file_path, output_path, sheet_name, changes, original_path=None):
     """
     Schreibt Änderungen in ein Excel-Sheet
     
@@ -1122,11 +1152,11 @@ def write_sheet(file_path, output_path, sheet_name, changes, original_path=None)
     NEUEN Daten geschrieben. Die Original-Struktur wird beibehalten wo möglich.
     
     Args:
-        file_path: Pfad zur Arbeitsdatei (kopierte Datei)
+        file_path: Pfad zur Arbeitsdatei (kopierte Datei) oder entschlüsseltes Paket (PackageReader)
         output_path: Pfad zur Ausgabe-Datei
         sheet_name: Name des Sheets
         changes: Dict mit allen Änderungen
-        original_path: Pfad zur Original-Datei (für restore_table_xml)
+        original_path: Pfad zur Original-Datei (für restore_table_xml) oder entschlüsseltes Paket
     
     Returns:
         Dict mit success und ggf. error
@@ -1174,9 +1204,19 @@ def write_sheet(file_path, output_path, sheet_name, changes, original_path=None)
         structural_change = changes.get('structuralChange', False)
         frontend_auto_filter = changes.get('autoFilterRange')  # AutoFilter vom Frontend
         
+        # Delta-Writes: rowDelta = {'rowCount': N, 'rows': [[rowIdx, values], ...]}
+        # oder rowFingerprints = Fingerprints der Original-Zeilen (unveränderte Zeilen überspringen)
+        row_delta = changes.get('rowDelta')
+        row_fingerprints = changes.get('rowFingerprints')
+        
         cleared_row_highlights = changes.get('clearedRowHighlights', [])
         affected_rows = changes.get('affectedRows', [])
         
+        # incremental: editedCells/clearedRowHighlights beziehen sich auf die FINALEN
+        # Positionen und werden auch in der Pipeline angewendet (Memory-Live-Session).
+        # Vorhandene Formatierungen bleiben erhalten - kein Zurücksetzen der Fills.
+        incremental = changes.get('incremental', False)
+        
         # Zeilen-Operationen (analog zu Spalten-Operationen)
         deleted_rows = changes.get('deletedRowIndices', [])
         inserted_rows = changes.get('insertedRowInfo')
@@ -1189,13 +1229,27 @@ def write_sheet(file_path, output_path, sheet_name, changes, original_path=None)
         sys.stderr.write(f"[WRITE_SHEET] deleted_rows={deleted_rows}, inserted_rows={bool(inserted_rows)}, row_order={bool(row_order)}\n")
         sys.stderr.write(f"[WRITE_SHEET] deleted_columns={deleted_columns}, inserted_columns={bool(inserted_columns)}, column_order={bool(column_order)}\n")
         
+        has_structure_ops = bool(row_mapping or deleted_columns or inserted_columns or column_order
+                                 or deleted_rows or inserted_rows or row_order)
+        
+        # Delta-Writes sind nur gültig, wenn Zeilen- und Spaltenpositionen unverändert sind
+        if (row_delta or row_fingerprints) and has_structure_ops:
+            if row_delta:
+                return {'success': False, 'error': 'rowDelta ist bei strukturellen Änderungen nicht erlaubt'}
+            row_fingerprints = None  # Volle Daten vorhanden - einfach alles schreiben
+        
+        # Gestreamte Daten (NDJSON) bleiben nur im reinen Daten-Pfad von FALL 2 lazy.
+        # Alle anderen Pfade greifen per Index auf data zu und brauchen die komplette Liste.
+        if has_structure_ops or from_file or not (structural_change or full_rewrite):
+            data = materialize_rows(data)
+        
         # =====================================================================
         # FALL 1: fromFile - Nur versteckte Spalten/Zeilen setzen
         # =====================================================================
         if from_file:
             _apply_hidden_columns(ws, hidden_columns)
             _apply_hidden_rows(ws, hidden_rows)
-            wb.save(output_path)
+            _save_workbook_stored(wb, output_path)
             wb.close()
             fix_xlsx_relationships(output_path)
             return {'success': True, 'outputPath': output_path}
@@ -1249,6 +1303,10 @@ def write_sheet(file_path, output_path, sheet_name, changes, original_path=None)
             # =====================================================================
             
             has_any_row_change = deleted_rows or (row_order and len(row_order) > 0)
+            # incremental: eingefügte Zeilen direkt beim Neuschreiben in Schritt 4 anlegen
+            # statt einzeln per insert_rows (verschiebt jedes Mal alle Zellen darunter)
+            inserts_in_rewrite = bool(incremental and inserted_rows)
+            has_any_row_change = has_any_row_change or inserts_in_rewrite
             
             if has_any_row_change:
                 max_col = ws.max_column
@@ -1265,13 +1323,11 @@ def write_sheet(file_path, output_path, sheet_name, changes, original_path=None)
                         cell = ws.cell(row=excel_row, column=col)
                         if isinstance(cell, MergedCell):
                             continue
+                        # _style = Indizes in die Style-Tabellen der Mappe (Fill, Font,
+                        # Alignment, Border, Zahlenformat) - Kopie ohne Style-Objekte
                         all_rows_backup[row_idx][col] = {
                             'value': cell.value,
-                            'fill': copy(cell.fill) if cell.fill else None,
-                            'font': copy(cell.font) if cell.font else None,
-                            'alignment': copy(cell.alignment) if cell.alignment else None,
-                            'border': copy(cell.border) if cell.border else None,
-                            'number_format': cell.number_format,
+                            'style': copy(cell._style),
                             'hyperlink': cell.hyperlink.target if cell.hyperlink else None
                         }
                 
@@ -1305,6 +1361,12 @@ def write_sheet(file_path, output_path, sheet_name, changes, original_path=None)
                     final_row_order = [idx for idx in range(len(all_rows_backup)) if idx not in deleted_set]
                     sys.stderr.write(f"[PIPELINE] Schritt 2: Nur Löschen, behalte {len(final_row_order)} Zeilen\n")
                 
+                if inserts_in_rewrite:
+                    # Positionen sind final und aufsteigend - Platzhalter None = leere Zeile
+                    for op in sorted(inserted_rows.get('operations', []), key=lambda x: x['position']):
+                        position = op['position']
+                        final_row_order[position:position] = [None] * op.get('count', 1)
+                
                 # SCHRITT 3: Überschüssige Zeilen löschen (von hinten)
                 target_row_count = len(final_row_order)
                 current_data_rows = original_max_row - 1  # Ohne Header
@@ -1312,14 +1374,25 @@ def write_sheet(file_path, output_path, sheet_name, changes, original_path=None)
                 if current_data_rows > target_row_count:
                     rows_to_delete = current_data_rows - target_row_count
                     sys.stderr.write(f"[PIPELINE] Schritt 3: Lösche {rows_to_delete} überschüssige Zeilen\n")
-                    for _ in range(rows_to_delete):
-                        ws.delete_rows(ws.max_row, 1)
+                    ws.delete_rows(target_row_count + 2, rows_to_delete)
                 
                 # SCHRITT 4: Zeilen in neuer Reihenfolge schreiben
                 sys.stderr.write(f"[PIPELINE] Schritt 4: Schreibe {len(final_row_order)} Zeilen in neuer Reihenfolge\n")
                 for new_idx, original_idx in enumerate(final_row_order):
                     new_excel_row = new_idx + 2
                     
+                    if original_idx is None:
+                        # Eingefügte Zeile: leer, Formatierung von der Zeile darüber
+                        for col in range(1, max_col + 1):
+                            cell = ws.cell(row=new_excel_row, column=col)
+                            if isinstance(cell, MergedCell):
+                                continue
+                            cell.value = None
+                            cell.hyperlink = None
+                            if new_excel_row > 2:
+                                cell._style = copy(ws.cell(row=new_excel_row - 1, column=col)._style)
+                        continue
+                    
                     if original_idx not in all_rows_backup:
                         continue
                     
@@ -1328,21 +1401,12 @@ def write_sheet(file_path, output_path, sheet_name, changes, original_path=None)
                         if isinstance(cell, MergedCell):
                             continue
                         cell.value = data_item['value']
-                        if data_item['fill']:
-                            cell.fill = data_item['fill']
-                        if data_item['font']:
-                            cell.font = data_item['font']
-                        if data_item['alignment']:
-                            cell.alignment = data_item['alignment']
-                        if data_item['border']:
-                            cell.border = data_item['border']
-                        if data_item['number_format']:
-                            cell.number_format = data_item['number_format']
+                        cell._style = copy(data_item['style'])
                         if data_item['hyperlink']:
                             cell.hyperlink = data_item['hyperlink']
             
             # ===== SCHRITT 5: Zeilen EINFÜGEN =====
-            if inserted_rows:
+            if inserted_rows and not inserts_in_rewrite:
                 operations = inserted_rows.get('operations', [])
                 operations.sort(key=lambda x: x['position'])
                 sys.stderr.write(f"[PIPELINE] Schritt 5: Füge Zeilen ein {[op['position'] for op in operations]}\n")
@@ -1544,14 +1608,27 @@ def write_sheet(file_path, output_path, sheet_name, changes, original_path=None)
                             if data_item['hyperlink']:
                                 cell.hyperlink = data_item['hyperlink']
             
+            # ===== SCHRITT 9b: Zell-Edits (nur incremental, finale Koordinaten) =====
+            if incremental and edited_cells:
+                sys.stderr.write(f"[PIPELINE] Schritt 9b: {len(edited_cells)} Zell-Edits\n")
+                _apply_edited_cells(ws, edited_cells)
+            
             # ===== SCHRITT 10: Versteckte Spalten =====
             sys.stderr.write(f"[PIPELINE] Schritt 10: Spalten verstecken\n")
             _apply_hidden_columns(ws, hidden_columns)
             
+            # ===== SCHRITT 10b: Data Join - Formatierung importierter Spalten =====
+            imported_column_styles = changes.get('importedColumnStyles', {})
+            if imported_column_styles and headers:
+                sys.stderr.write(f"[PIPELINE] Schritt 10b: {len(imported_column_styles)} importierte Spalten formatieren\n")
+                _apply_imported_column_styles(ws, headers, imported_column_styles, len(data) if data else ws.max_row - 1)
+            
             # ===== SCHRITT 11: Row Highlights =====
             sys.stderr.write(f"[PIPELINE] Schritt 11: Row Highlights\n")
             if row_highlights:
                 _apply_row_highlights(ws, row_highlights, len(headers) if headers else 0)
+            if incremental and cleared_row_highlights:
+                _clear_row_fills(ws, cleared_row_highlights)
             
             # ===== SCHRITT 12: Tables reparieren =====
             sys.stderr.write(f"[PIPELINE] Schritt 12: Tables reparieren\n")
@@ -1578,7 +1655,7 @@ def write_sheet(file_path, output_path, sheet_name, changes, original_path=None)
             
             # ===== SCHRITT 13: EINMAL speichern =====
             sys.stderr.write(f"[PIPELINE] Schritt 13: Speichern\n")
-            wb.save(output_path)
+            _save_workbook_stored(wb, output_path)
             wb.close()
             fix_xlsx_relationships(output_path)
             
@@ -1736,7 +1813,7 @@ def write_sheet(file_path, output_path, sheet_name, changes, original_path=None)
                 table.tableColumns = new_columns
             
             # Einmal speichern
-            wb.save(output_path)
+            _save_workbook_stored(wb, output_path)
             wb.close()
             fix_xlsx_relationships(output_path)
             
@@ -1921,7 +1998,7 @@ def write_sheet(file_path, output_path, sheet_name, changes, original_path=None)
                 table.tableColumns = new_columns
             
             # Einmal speichern
-            wb.save(output_path)
+            _save_workbook_stored(wb, output_path)
             wb.close()
             fix_xlsx_relationships(output_path)
             
@@ -2000,7 +2077,7 @@ def write_sheet(file_path, output_path, sheet_name, changes, original_path=None)
                     'columns': col_names
                 }
             
-            wb.save(output_path)
+            _save_workbook_stored(wb, output_path)
             wb.close()
             fix_xlsx_relationships(output_path)
             
@@ -2112,7 +2189,7 @@ def write_sheet(file_path, output_path, sheet_name, changes, original_path=None)
                     'columns': col_names
                 }
             
-            wb.save(output_path)
+            _save_workbook_stored(wb, output_path)
             wb.close()
             fix_xlsx_relationships(output_path)
             
@@ -2175,7 +2252,7 @@ def write_sheet(file_path, output_path, sheet_name, changes, original_path=None)
                     if row_highlights:
                         _apply_row_highlights(ws, row_highlights, len(headers))
                     
-                    wb.save(output_path)
+                    _save_workbook_stored(wb, output_path)
                     wb.close()
                     fix_xlsx_relationships(output_path)
                     return {
@@ -2212,7 +2289,6 @@ def write_sheet(file_path, output_path, sheet_name, changes, original_path=None)
                 # - Zeilen eingefügt wurden (rows_changed < 0)
                 # - Zeilen umsortiert wurden (row_mapping != identity_mapping)
                 if row_mapping != identity_mapping or rows_changed != 0:
-                    import shutil
                     import tempfile
                     import zipfile
                     import re
@@ -2230,7 +2306,8 @@ def write_sheet(file_path, output_path, sheet_name, changes, original_path=None)
                     sys.stderr.write(f"[ZIP-ANSATZ] Basis-Datei: {basis_datei}\n")
                     
                     # Immer die Basis-Datei zur Ausgabe kopieren (erhält ALLE Formatierungen!)
-                    shutil.copy2(basis_datei, output_path)
+                    # copy_source nutzt fast_copy (Reflink/copy_file_range wenn möglich)
+                    copy_source(basis_datei, output_path)
                     sys.stderr.write(f"[ZIP-ANSATZ] Datei kopiert: {basis_datei} -> {output_path}\n")
                     
                     # Jetzt direkt die XML im ZIP manipulieren
@@ -2639,19 +2716,14 @@ def write_sheet(file_path, output_path, sheet_name, changes, original_path=None)
                         except Exception as e:
                             sys.stderr.write(f"[ZIP-ANSATZ] Table-Anpassung Fehler: {e}\n")
                         
-                        # ZIP aktualisieren mit allen Änderungen
-                        temp_zip = output_path + '.tmp'
-                        with zipfile.ZipFile(output_path, 'r') as zin:
-                            with zipfile.ZipFile(temp_zip, 'w', zipfile.ZIP_DEFLATED) as zout:
-                                for item in zin.infolist():
-                                    if item.filename == sheet_xml_path:
-                                        zout.writestr(item, new_sheet_xml)
-                                    elif item.filename in modified_tables:
-                                        zout.writestr(item, modified_tables[item.filename])
-                                    else:
-                                        zout.writestr(item, zin.read(item.filename))
+                        # ZIP aktualisieren mit allen Änderungen (Staging-Datei + atomares Ersetzen)
+                        # Unkomprimiert - write_sheet komprimiert am Ende einmal parallel
+                        temp_zip = staging_path(output_path)
+                        replacements = dict(modified_tables)
+                        replacements[sheet_xml_path] = new_sheet_xml
+                        rewrite_archive(output_path, temp_zip, replacements, compression='stored')
                         
-                        shutil.move(temp_zip, output_path)
+                        atomic_replace(temp_zip, output_path)
                         
                         # Row Highlights müssen NACH dem ZIP-Ansatz angewendet werden
                         # Da ZIP nur XML manipuliert, öffnen wir die Datei erneut für Highlights
@@ -2673,7 +2745,7 @@ def write_sheet(file_path, output_path, sheet_name, changes, original_path=None)
                                         cell = ws_hl.cell(row=excel_row, column=col_idx)
                                         cell.fill = PatternFill()  # Keine Füllung
                             
-                            wb_hl.save(output_path)
+                            _save_workbook_stored(wb_hl, output_path)
                             wb_hl.close()
                             fix_xlsx_relationships(output_path)
                             restore_table_xml_from_original(output_path, original_path, table_changes=None)
@@ -2739,7 +2811,7 @@ def write_sheet(file_path, output_path, sheet_name, changes, original_path=None)
                             pass
                     
                     # Speichern und fertig
-                    wb.save(output_path)
+                    _save_workbook_stored(wb, output_path)
                     wb.close()
                     fix_xlsx_relationships(output_path)
                     
@@ -3105,16 +3177,22 @@ def write_sheet(file_path, output_path, sheet_name, changes, original_path=None)
                 if not isinstance(cell, MergedCell):
                     cell.value = header
             
+            # Zu schreibende Zeilen bestimmen (bei Delta nur die geänderten)
+            # rows_to_write ist ein Iterator (gestreamte Daten werden nur einmal gelesen)
+            data_row_count, rows_to_write = resolve_rows_to_write(data, row_delta, row_fingerprints)
+            
             # ================================================================
             # SCHRITT 3.5: RICHTEXT UND HYPERLINKS VOR DEM SCHREIBEN SAMMELN
             # Wenn kein row_mapping existiert, müssen wir trotzdem RichText
-            # und Hyperlinks sammeln, da SCHRITT 4 alle Werte überschreibt
+            # und Hyperlinks sammeln, da SCHRITT 4 alle Werte überschreibt.
+            # Gesammelt wird zeilenweise direkt vor dem Schreiben in SCHRITT 4.
             # ================================================================
+            collect_rich_text = False
             try:
                 # Prüfe ob rich_text_cells_to_restore bereits existiert (von SCHRITT 0.5)
                 _ = rich_text_cells_to_restore
             except NameError:
-                # Kein row_mapping - sammle RichText und Hyperlinks jetzt
+                # Kein row_mapping - sammle RichText und Hyperlinks in SCHRITT 4
                 try:
                     from openpyxl.cell.rich_text import CellRichText
                     has_rich_text_support = True
@@ -3123,10 +3201,17 @@ def write_sheet(file_path, output_path, sheet_name, changes, original_path=None)
                 
                 rich_text_cells_to_restore = {}
                 hyperlinks_to_restore = {}
+                collect_rich_text = True
+            
+            # ================================================================
+            # SCHRITT 4: DATEN SCHREIBEN (Werte)
+            # Bei Delta-Writes nur die geänderten Zeilen
+            # ================================================================
+            rows_written = 0
+            for row_idx, row_data in rows_to_write:
+                excel_row = row_idx + 2  # +2 für Header (1-basiert)
                 
-                # Sammle RichText und Hyperlinks von allen Datenzellen
-                for row_idx in range(len(data)):
-                    excel_row = row_idx + 2  # +2: Excel 1-basiert + Header
+                if collect_rich_text:
                     for col_idx in range(1, len(headers) + 1):
                         cell = ws.cell(row=excel_row, column=col_idx)
                         if isinstance(cell, MergedCell):
@@ -3139,15 +3224,14 @@ def write_sheet(file_path, output_path, sheet_name, changes, original_path=None)
                         # Hyperlink prüfen
                         if cell.hyperlink and cell.hyperlink.target:
                             hyperlinks_to_restore[f"{excel_row}-{col_idx}"] = cell.hyperlink.target
-            
-            # ================================================================
-            # SCHRITT 4: DATEN SCHREIBEN (Werte)
-            # ================================================================
-            for row_idx, row_data in enumerate(data):
-                excel_row = row_idx + 2  # +2 für Header (1-basiert)
+                
                 for col_idx, value in enumerate(row_data):
                     cell = ws.cell(row=excel_row, column=col_idx + 1)
                     apply_cell_value(cell, value)
+                rows_written += 1
+            
+            if row_delta or row_fingerprints:
+                sys.stderr.write(f"[FALL 2] Delta-Write: {rows_written} von {data_row_count} Zeilen geändert\n")
             
             # ================================================================
             # SCHRITT 4.5: RICHTEXT UND HYPERLINKS WIEDERHERSTELLEN
@@ -3204,7 +3288,15 @@ def write_sheet(file_path, output_path, sheet_name, changes, original_path=None)
             # ================================================================
             # SCHRITT 7: VERSTECKTE ZEILEN
             # ================================================================
-            _apply_hidden_rows(ws, hidden_rows, len(data))
+            _apply_hidden_rows(ws, hidden_rows, data_row_count)
+            
+            # ================================================================
+            # SCHRITT 7.5: DATA JOIN - Formatierung importierter Spalten
+            # (vor den Row Highlights, damit Zeilenmarkierungen erhalten bleiben)
+            # ================================================================
+            imported_column_styles = changes.get('importedColumnStyles', {})
+            if imported_column_styles:
+                _apply_imported_column_styles(ws, headers, imported_column_styles, data_row_count)
             
             # ================================================================
             # SCHRITT 8: ROW HIGHLIGHTS
@@ -3240,7 +3332,7 @@ def write_sheet(file_path, output_path, sheet_name, changes, original_path=None)
             # Wenn Zeilen gelöscht wurden, kann die Datei mehr Zeilen haben als
             # wir jetzt Daten haben. Diese müssen entfernt werden.
             # ================================================================
-            final_data_row_count = len(data)  # Anzahl der Datenzeilen (ohne Header)
+            final_data_row_count = data_row_count  # Anzahl der Datenzeilen (ohne Header)
             final_max_row = final_data_row_count + 1  # +1 für Header
             
             # Entferne Merged Cells die außerhalb des neuen Datenbereichs liegen
@@ -3278,7 +3370,7 @@ def write_sheet(file_path, output_path, sheet_name, changes, original_path=None)
             af_source = frontend_auto_filter or original_auto_filter
             if af_source:
                 try:
-                    final_max_row = len(data) + 1  # +1 für Header
+                    final_max_row = data_row_count + 1  # +1 für Header
                     final_af_ref = f"A1:{get_column_letter(target_col_count)}{final_max_row}"
                     ws.auto_filter.ref = final_af_ref
                 except Exception as e:
@@ -3296,7 +3388,7 @@ def write_sheet(file_path, output_path, sheet_name, changes, original_path=None)
                     'columns': col_names
                 }
             
-            wb.save(output_path)
+            _save_workbook_stored(wb, output_path)
             wb.close()
             fix_xlsx_relationships(output_path)
             
@@ -3322,12 +3414,11 @@ def write_sheet(file_path, output_path, sheet_name, changes, original_path=None)
         
         # Wenn NUR Highlights (keine echten Edits), lade von Original-Datei neu (falls verfügbar)
         # Das stellt sicher dass alte Highlights nicht erhalten bleiben
-        if row_highlights is not None and not real_edits:
-            if original_path and original_path != file_path and os.path.exists(original_path):
+        if row_highlights is not None and not real_edits and not incremental:
+            if original_path and original_path != file_path and source_exists(original_path):
                 wb.close()
-                import shutil
-                shutil.copy2(original_path, output_path)
-                wb = load_workbook(output_path, rich_text=True)
+                # Direkt aus dem Original laden - _save_workbook_stored(wb, output_path) schreibt später die Ausgabe
+                wb = load_workbook(original_path, rich_text=True)
                 ws = wb[sheet_name]
             else:
                 # Kein Original verfügbar - entferne alle Fills in Zeilen die NICHT markiert sind
@@ -3335,14 +3426,7 @@ def write_sheet(file_path, output_path, sheet_name, changes, original_path=None)
                 _clear_all_row_fills_except(ws, row_highlights)
         
         if real_edits:
-            for key, value in real_edits.items():
-                parts = key.split('-')
-                if len(parts) != 2:
-                    continue
-                row_idx = int(parts[0])
-                col_idx = int(parts[1])
-                cell = ws.cell(row=row_idx + 2, column=col_idx + 1)
-                apply_cell_value(cell, value)
+            _apply_edited_cells(ws, real_edits)
         
         # Versteckte Spalten/Zeilen setzen
         _apply_hidden_columns(ws, hidden_columns)
@@ -3355,13 +3439,9 @@ def write_sheet(file_path, output_path, sheet_name, changes, original_path=None)
         # Cleared Row Highlights (Markierungen entfernen)
         if cleared_row_highlights:
             sys.stderr.write(f"[FALL 3] Entferne {len(cleared_row_highlights)} Row Highlights\n")
-            for row_idx in cleared_row_highlights:
-                excel_row = row_idx + 2  # 0-basiert nach 1-basiert + Header
-                for col_idx in range(1, ws.max_column + 1):
-                    cell = ws.cell(row=excel_row, column=col_idx)
-                    cell.fill = PatternFill()  # Keine Füllung
+            _clear_row_fills(ws, cleared_row_highlights)
         
-        wb.save(output_path)
+        _save_workbook_stored(wb, output_path)
         wb.close()
         fix_xlsx_relationships(output_path)
         
@@ -3389,6 +3469,29 @@ def write_sheet(file_path, output_path, sheet_name, changes, original_path=None)
         }
 
 
+def _apply_edited_cells(ws, edited_cells):
+    """Schreibt editedCells {"zeile-spalte": wert} (0-basiert, ohne Header)"""
+    for key, value in edited_cells.items():
+        if key.startswith('_'):
+            continue
+        parts = key.split('-')
+        if len(parts) != 2:
+            continue
+        row_idx = int(parts[0])
+        col_idx = int(parts[1])
+        cell = ws.cell(row=row_idx + 2, column=col_idx + 1)
+        apply_cell_value(cell, value)
+
+
+def _clear_row_fills(ws, row_indices):
+    """Entfernt die Füllung der angegebenen Zeilen (0-basiert, ohne Header)"""
+    for row_idx in row_indices:
+        excel_row = row_idx + 2  # 0-basiert nach 1-basiert + Header
+        for col_idx in range(1, ws.max_column + 1):
+            cell = ws.cell(row=excel_row, column=col_idx)
+            cell.fill = PatternFill()  # Keine Füllung
+
+
 def _apply_hidden_columns(ws, hidden_columns, max_cols=None):
     """Setzt versteckte Spalten"""
     if hidden_columns is None:
@@ -3520,6 +3623,69 @@ def _apply_imported_cell_styles(ws, cell_styles):
             cell.fill = PatternFill(fill_type=None)
 
 
+def _imported_template_rows(template, data_row_count):
+    """
+    Datenzeilen (0-basiert), für die eine Data-Join-Vorlage gilt: die Zeilen mit
+    Treffer (rows). Ältere Vorlagen ohne rows gelten für die ganze Spalte.
+    """
+    rows = template.get('rows')
+    if rows is None:
+        return list(range(data_row_count))
+    return sorted({int(row) for row in rows if 0 <= int(row) < data_row_count})
+
+
+def _apply_imported_column_styles(ws, headers, column_styles, data_row_count):
+    """
+    Wendet die Formatierung per Data Join importierter Spalten an.
+    Pro Spalte gibt es eine Vorlage (Header-Name -> {style, font, numberFormat, rows}):
+    sie wird einmal an der ersten Trefferzeile aufgebaut, alle weiteren Trefferzeilen
+    übernehmen denselben Style-Eintrag statt eigener Font/Fill-Objekte. Zeilen ohne
+    Treffer bleiben unverändert.
+    """
+    for header, template in column_styles.items():
+        if not template or header not in headers or data_row_count <= 0:
+            continue
+        rows = _imported_template_rows(template, data_row_count)
+        if not rows:
+            continue
+        col_idx = headers.index(header) + 1
+        style = template.get('style') or {}
+        font_info = template.get('font') or {}
+        first = ws.cell(row=rows[0] + 2, column=col_idx)
+        
+        font_kwargs = {}
+        if font_info.get('name') or style.get('fontName'):
+            font_kwargs['name'] = font_info.get('name') or style.get('fontName')
+        if font_info.get('size') or style.get('fontSize'):
+            font_kwargs['size'] = font_info.get('size') or style.get('fontSize')
+        if font_info.get('bold') or style.get('bold'):
+            font_kwargs['bold'] = True
+        if font_info.get('italic') or style.get('italic'):
+            font_kwargs['italic'] = True
+        if style.get('underline'):
+            font_kwargs['underline'] = 'single'
+        if style.get('strikethrough'):
+            font_kwargs['strike'] = True
+        color = font_info.get('color') or style.get('fontColor')
+        if isinstance(color, str) and color:
+            font_kwargs['color'] = hex_to_argb(color) if color.startswith('#') else color
+        if font_kwargs:
+            first.font = Font(**font_kwargs)
+        
+        fill = style.get('fill')
+        if isinstance(fill, str) and fill:
+            argb = hex_to_argb(fill) if fill.startswith('#') else (fill if len(fill) == 8 else f'FF{fill}')
+            first.fill = PatternFill(start_color=argb, end_color=argb, fill_type='solid')
+        if style.get('textAlign'):
+            first.alignment = Alignment(horizontal=style['textAlign'])
+        if template.get('numberFormat'):
+            first.number_format = template['numberFormat']
+        
+        # Alle weiteren Trefferzeilen teilen sich den Style der ersten
+        for row_idx in rows[1:]:
+            ws.cell(row=row_idx + 2, column=col_idx)._style = copy(first._style)
+
+
 def _apply_row_highlights(ws, row_highlights, num_columns):
     """Wendet Zeilen-Highlights an"""
     highlight_colors = {
@@ -3562,9 +3728,9 @@ def main():
     
     if command == 'write_sheet':
         # Daten von stdin lesen (für große Datenmengen)
-        input_data = sys.stdin.read()
+        # Datenzeilen werden bei Streaming erst beim Schreiben geparst
         try:
-            params = json.loads(input_data)
+            params = read_write_params(sys.stdin)
         except json.JSONDecodeError as e:
             print(json.dumps({'success': False, 'error': f'JSON Parse Error: {str(e)}'}))
             sys.exit(1)
@@ -3574,7 +3740,10 @@ def main():
             params.get('outputPath'),
             params.get('sheetName'),
             params.get('changes', {}),
-            params.get('originalPath')  # NEU: Original-Datei für restore_table_xml
+            params.get('originalPath'),  # NEU: Original-Datei für restore_table_xml
+            params.get('compression'),
+            params.get('password'),
+            params.get('sourcePassword')
         )
         print(json.dumps(result, ensure_ascii=False))
     
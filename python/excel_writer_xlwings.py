@@ -47,6 +47,15 @@ except Exception as e:
     print(json.dumps({"success": False, "error": f"xlwings import error: {e}"}))
     sys.exit(1)
 
+# Streaming-Eingabe (NDJSON über stdin)
+from excel_stream_input import read_write_params, materialize_rows
+# Staging: temporäre Ausgabe im Zielverzeichnis + atomares Ersetzen
+from excel_staging import StagedOutput
+# Warme Excel-Instanzen im persistenten Worker
+from excel_app_pool import get_active_pool
+# Gebündelte Excel-Aufrufe (Mehrfachbereiche statt Einzelzeilen)
+from excel_com_batch import ComBatcher
+
 
 def kill_excel_instances():
     """Beendet alle laufenden Excel-Instanzen - plattformübergreifend"""
@@ -179,7 +188,65 @@ def apply_cell_value(cell, value):
         cell.value = str(value)
 
 
+def _start_app():
+    """
+    Excel-App für einen Schreibvorgang: im persistenten Worker aus dem Pool
+    geliehen, sonst wie bisher frisch gestartet (vorher alle Instanzen beenden).
+    
+    Returns:
+        (app, lease) - lease ist None ohne Pool
+    """
+    pool = get_active_pool()
+    if pool is not None:
+        print("[xlwings_writer] Leihe Excel-App aus dem Pool...", file=sys.stderr)
+        lease = pool.acquire()
+        return lease.app, lease
+    
+    import time
+    
+    # WICHTIG: Beende zuerst alle laufenden Excel-Instanzen
+    # um Dialog-Probleme zu vermeiden ("Änderungen speichern?")
+    print("[xlwings_writer] Beende Excel-Instanzen...", file=sys.stderr)
+    kill_excel_instances()
+    time.sleep(0.3)  # Kurz warten bis Excel wirklich beendet ist
+    
+    # Excel-App starten (ohne with-Kontext, um Cleanup-Probleme zu vermeiden)
+    print("[xlwings_writer] Starte Excel-App...", file=sys.stderr)
+    app = xw.App(visible=False, add_book=False)
+    print("[xlwings_writer] Excel-App gestartet!", file=sys.stderr)
+    app.display_alerts = False
+    app.screen_updating = False
+    
+    # Excel verstecken
+    hide_excel()
+    return app, None
+
+
+def _finish_app(lease, failed=False):
+    """Gibt die Pool-Instanz zurück bzw. beendet Excel (Einzelaufruf)"""
+    if lease is not None:
+        # Pool schließt offene Workbooks und ersetzt abgestürzte Instanzen
+        lease.release(failed=failed)
+    elif get_active_pool() is None:
+        kill_excel_instances()
+
+
 def write_sheet_xlwings(file_path, output_path, sheet_name, changes):
+    """
+    Schreibt Änderungen in ein Excel-Sheet mit xlwings (Details siehe _write_sheet_xlwings).
+    
+    Excel arbeitet auf einer Staging-Kopie im Zielverzeichnis (Reflink wenn
+    möglich), die nach dem Speichern einmal atomar als Zieldatei übernommen wird.
+    """
+    with StagedOutput(output_path, seed_from=file_path) as staged:
+        result = _write_sheet_xlwings(staged.path, staged.path, sheet_name, changes)
+        if result.get('success'):
+            staged.commit()
+            result['outputPath'] = output_path
+        return result
+
+
+def _write_sheet_xlwings(file_path, output_path, sheet_name, changes):
     """
     Schreibt Änderungen in ein Excel-Sheet mit xlwings
     
@@ -208,6 +275,7 @@ def write_sheet_xlwings(file_path, output_path, sheet_name, changes):
     print(f"[xlwings_writer] data count: {len(changes.get('data', []))}", file=sys.stderr)
     print(f"[xlwings_writer] editedCells count: {len(changes.get('editedCells', {}))}", file=sys.stderr)
     
+    lease = None
     try:
         # Parameter extrahieren
         headers = changes.get('headers', [])
@@ -227,28 +295,14 @@ def write_sheet_xlwings(file_path, output_path, sheet_name, changes):
         cleared_row_highlights = changes.get('clearedRowHighlights', [])
         row_mapping = changes.get('rowMapping')  # Filter-Mapping: [originalIndex, ...]
         column_order = changes.get('columnOrder')  # Spalten-Reihenfolge: [oldIdx0, oldIdx1, ...]
+        row_delta = changes.get('rowDelta')  # Delta-Write: {'rowCount': N, 'rows': [[rowIdx, values], ...]}
+        data_row_count = row_delta.get('rowCount', len(data)) if row_delta else len(data)
         
         # Kopiere Original-Datei zum Ziel (falls unterschiedlich)
         if file_path != output_path:
             shutil.copy2(file_path, output_path)
         
-        import time
-        
-        # WICHTIG: Beende zuerst alle laufenden Excel-Instanzen
-        # um Dialog-Probleme zu vermeiden ("Änderungen speichern?")
-        print("[xlwings_writer] Beende Excel-Instanzen...", file=sys.stderr)
-        kill_excel_instances()
-        time.sleep(0.3)  # Kurz warten bis Excel wirklich beendet ist
-        
-        # Excel-App starten (ohne with-Kontext, um Cleanup-Probleme zu vermeiden)
-        print("[xlwings_writer] Starte Excel-App...", file=sys.stderr)
-        app = xw.App(visible=False, add_book=False)
-        print("[xlwings_writer] Excel-App gestartet!", file=sys.stderr)
-        app.display_alerts = False
-        app.screen_updating = False
-        
-        # Excel verstecken
-        hide_excel()
+        app, lease = _start_app()
         
         # Workbook öffnen
         print(f"[xlwings_writer] Öffne Workbook: {output_path}", file=sys.stderr)
@@ -259,21 +313,22 @@ def write_sheet_xlwings(file_path, output_path, sheet_name, changes):
         sheet_names = [s.name for s in wb.sheets]
         if sheet_name not in sheet_names:
             wb.close()
-            kill_excel_instances()
+            _finish_app(lease)
             return {'success': False, 'error': f'Sheet "{sheet_name}" nicht gefunden'}
         
         ws = wb.sheets[sheet_name]
+        com = ComBatcher(ws)
         
         # =====================================================================
         # FALL 1: fromFile - Nur versteckte Spalten/Zeilen setzen
         # =====================================================================
         if from_file:
-            _apply_hidden_columns_xlwings(ws, hidden_columns)
-            _apply_hidden_rows_xlwings(ws, hidden_rows)
+            _apply_hidden_columns_xlwings(com, hidden_columns)
+            _apply_hidden_rows_xlwings(com, hidden_rows)
             wb.save()
             wb.close()
-            kill_excel_instances()
-            return {'success': True, 'outputPath': output_path, 'method': 'xlwings'}
+            _finish_app(lease)
+            return {'success': True, 'outputPath': output_path, 'method': 'xlwings', 'comCalls': com.summary()}
         
         # =====================================================================
         # FALL 2: Strukturelle Änderungen
@@ -288,11 +343,9 @@ def write_sheet_xlwings(file_path, output_path, sheet_name, changes):
         # ZEILEN-OPERATIONEN ZUERST
         # =====================================================================
         
-        # SCHRITT 1: ZEILEN LÖSCHEN (von hinten nach vorne)
+        # SCHRITT 1: ZEILEN LÖSCHEN (zusammenhängende Bereiche, von hinten nach vorne)
         if deleted_rows:
-            for row_idx in sorted(deleted_rows, reverse=True):
-                excel_row = row_idx + 2  # +2 für Header (1-basiert)
-                ws.range(f'{excel_row}:{excel_row}').delete()
+            com.delete_rows(row_idx + 2 for row_idx in deleted_rows)  # +2 für Header (1-basiert)
         
         # SCHRITT 2: ZEILEN VERSCHIEBEN (rowOrder)
         # Die Daten wurden bereits im Frontend umgeordnet - schreibe als Block
@@ -310,7 +363,7 @@ def write_sheet_xlwings(file_path, output_path, sheet_name, changes):
             rows_reordered = True
         
         # SCHRITT 3: ZEILEN AUSBLENDEN
-        _apply_hidden_rows_xlwings(ws, hidden_rows, len(data) if data else None)
+        _apply_hidden_rows_xlwings(com, hidden_rows, data_row_count or None)
         
         # SCHRITT 4: ZEILEN EINFÜGEN
         # Muss VOR dem Schreiben der Daten passieren, damit Excel genug Zeilen hat!
@@ -342,16 +395,15 @@ def write_sheet_xlwings(file_path, output_path, sheet_name, changes):
         
         # SCHRITT 5: ZEILEN MARKIEREN (ROW HIGHLIGHTS)
         if row_highlights and len(row_highlights) > 0:
-            _apply_row_highlights_xlwings(ws, row_highlights, len(headers) if headers else ws.used_range.last_cell.column)
+            _apply_row_highlights_xlwings(com, row_highlights, len(headers) if headers else ws.used_range.last_cell.column)
         
         # SCHRITT 5b: CLEARED ROW HIGHLIGHTS
         if cleared_row_highlights and len(cleared_row_highlights) > 0:
-            for row_idx in cleared_row_highlights:
-                excel_row = row_idx + 2
-                num_cols = len(headers) if headers else ws.used_range.last_cell.column
-                for col_idx in range(1, num_cols + 1):
-                    cell = ws.range((excel_row, col_idx))
-                    cell.color = None  # Farbe entfernen
+            num_cols = len(headers) if headers else ws.used_range.last_cell.column
+            # Farbe entfernen - ein Aufruf für alle Zeilen statt einer pro Zelle
+            _log_com_failures('Markierung entfernen',
+                              com.set_row_color([row_idx + 2 for row_idx in cleared_row_highlights], 1, num_cols,
+                                                None, unbatched_per_row=num_cols))
         
         # SCHRITT 6: ZWISCHENSPEICHERN nach Zeilen-Operationen
         print(f"[xlwings_writer] Zwischenspeichern nach Zeilen-Operationen...", file=sys.stderr)
@@ -361,14 +413,10 @@ def write_sheet_xlwings(file_path, output_path, sheet_name, changes):
         # SPALTEN-OPERATIONEN DANACH
         # =====================================================================
         
-        # SCHRITT 7: SPALTEN LÖSCHEN (von hinten nach vorne)
+        # SCHRITT 7: SPALTEN LÖSCHEN (zusammenhängende Bereiche, von hinten nach vorne)
         # Verwende xlwings native Syntax (funktioniert auf macOS und Windows)
         if deleted_columns:
-            for col_idx in sorted(deleted_columns, reverse=True):
-                excel_col = col_idx + 1  # 1-basiert
-                col_letter = _get_column_letter(excel_col)
-                # Verwende Spalten-Range mit delete() - funktioniert plattformübergreifend
-                ws.range(f'{col_letter}:{col_letter}').delete()
+            com.delete_columns(col_idx + 1 for col_idx in deleted_columns)  # 1-basiert
         
         # SCHRITT 8: SPALTEN VERSCHIEBEN (columnOrder)
         # WICHTIG: Wir müssen Spalten WIRKLICH in Excel verschieben, damit Formatierung erhalten bleibt!
@@ -476,19 +524,15 @@ def write_sheet_xlwings(file_path, output_path, sheet_name, changes):
                 op_headers = op.get('headers', [])
                 excel_col = pos + 1  # 1-basiert
                 
-                for i in range(count):
-                    insert_letter = _get_column_letter(excel_col + i)
-                    
-                    # Insert-Befehl: Fügt vor der angegebenen Spalte ein
-                    # shift='right' verschiebt existierende Zellen nach rechts
-                    ws.range(f'{insert_letter}:{insert_letter}').insert(shift='right')
+                # Insert-Befehl: Fügt alle Spalten vor der angegebenen Spalte ein
+                # shift='right' verschiebt existierende Zellen nach rechts
+                com.insert_columns(excel_col, count)
                 
-                # Header setzen
-                for i, header in enumerate(op_headers):
-                    ws.range((1, excel_col + i)).value = header
+                # Header setzen (nebeneinander in einem Aufruf)
+                com.write_row_values(1, excel_col, op_headers)
         
         # SCHRITT 10: SPALTEN AUSBLENDEN
-        _apply_hidden_columns_xlwings(ws, hidden_columns, len(headers) if headers else None)
+        _apply_hidden_columns_xlwings(com, hidden_columns, len(headers) if headers else None)
         
         # =====================================================================
         # WEITERE OPERATIONEN
@@ -501,7 +545,7 @@ def write_sheet_xlwings(file_path, output_path, sheet_name, changes):
         # WICHTIG: Überspringe wenn bereits rows_reordered oder rows_inserted (Daten schon geschrieben)
         used_range = ws.used_range
         original_row_count = used_range.last_cell.row - 1 if used_range else 0  # Ohne Header
-        new_row_count = len(data)
+        new_row_count = data_row_count
         
         if row_mapping and len(row_mapping) > 0 and not rows_reordered and not rows_inserted and not column_order_applied:
             # Filter aktiv: Lösche Zeilen die nicht im Mapping sind
@@ -515,36 +559,9 @@ def write_sheet_xlwings(file_path, output_path, sheet_name, changes):
             
             if rows_to_delete:
                 print(f"[xlwings_writer] Filter: Lösche {len(rows_to_delete)} Zeilen (behalte {len(rows_to_keep)})", file=sys.stderr)
-                # OPTIMIERUNG: Finde zusammenhängende Bereiche und lösche diese auf einmal
-                # Sortiere absteigend damit Indizes beim Löschen stimmen
-                sorted_rows = sorted(rows_to_delete, reverse=True)
-                
-                # Finde zusammenhängende Bereiche
-                ranges_to_delete = []
-                if sorted_rows:
-                    range_end = sorted_rows[0]
-                    range_start = sorted_rows[0]
-                    
-                    for i in range(1, len(sorted_rows)):
-                        if sorted_rows[i] == range_start - 1:
-                            # Zusammenhängend
-                            range_start = sorted_rows[i]
-                        else:
-                            # Lücke - speichere aktuellen Bereich
-                            ranges_to_delete.append((range_start, range_end))
-                            range_end = sorted_rows[i]
-                            range_start = sorted_rows[i]
-                    
-                    # Letzten Bereich hinzufügen
-                    ranges_to_delete.append((range_start, range_end))
-                
-                print(f"[xlwings_writer] Lösche {len(ranges_to_delete)} zusammenhängende Bereiche", file=sys.stderr)
-                
-                # Lösche Bereiche (bereits absteigend sortiert)
-                for range_start, range_end in ranges_to_delete:
-                    excel_start = range_start + 2  # +2 für Header und 1-basiert
-                    excel_end = range_end + 2
-                    ws.range(f'{excel_start}:{excel_end}').delete()
+                # OPTIMIERUNG: Zusammenhängende Bereiche als Mehrfachbereich löschen
+                # (von hinten nach vorne, damit Indizes beim Löschen stimmen)
+                com.delete_rows(orig_idx + 2 for orig_idx in rows_to_delete)  # +2 für Header und 1-basiert
             
             # KEINE Daten neu schreiben - die Zeilen sind schon korrekt!
             
@@ -556,6 +573,23 @@ def write_sheet_xlwings(file_path, output_path, sheet_name, changes):
             print(f"[xlwings_writer] Lösche Zeilen {first_row_to_delete} bis {last_row_to_delete} ({rows_to_delete} Zeilen)", file=sys.stderr)
             ws.range(f'{first_row_to_delete}:{last_row_to_delete}').delete()
         
+        # SCHRITT 11b: DELTA-ZEILEN (nur geänderte Zeilen bei fullRewrite)
+        # Zusammenhängende Zeilen werden als ein Block geschrieben
+        if row_delta and row_delta.get('rows'):
+            delta_rows = sorted(row_delta['rows'], key=lambda entry: entry[0])
+            print(f"[xlwings_writer] Delta-Write: {len(delta_rows)} von {data_row_count} Zeilen", file=sys.stderr)
+            run = [delta_rows[0]]
+            for entry in delta_rows[1:] + [None]:
+                if entry is not None and entry[0] == run[-1][0] + 1:
+                    run.append(entry)
+                    continue
+                width = max(len(values or []) for _, values in run) or 1
+                block = [list(values or []) + [None] * (width - len(values or [])) for _, values in run]
+                start_row = run[0][0] + 2  # +2 für Header (1-basiert)
+                ws.range((start_row, 1), (start_row + len(run) - 1, width)).value = block
+                if entry is not None:
+                    run = [entry]
+        
         # SCHRITT 12: ZELL-EDITS (geänderte Zellen)
         # NUR wenn nicht bereits durch Block-Write geschrieben (columnOrder, rowsInserted, rowsReordered)
         # OPTIMIERUNG: Gruppiere nach Spalten und schreibe spaltenweise statt zellweise
@@ -599,18 +633,25 @@ def write_sheet_xlwings(file_path, output_path, sheet_name, changes):
                         apply_cell_value(cell, value)
                     print(f"[xlwings_writer] Spalte {col_idx}: {len(cells)} einzelne Zellen", file=sys.stderr)
         
+        # SCHRITT 13: DATA JOIN - Formatierung importierter Spalten (nur Trefferzeilen)
+        imported_column_styles = changes.get('importedColumnStyles') or {}
+        if imported_column_styles and headers:
+            _apply_imported_column_styles_xlwings(com, headers, imported_column_styles, data_row_count, row_highlights)
+        
         # Speichern und schließen
         wb.save()
         wb.close()
         
-        # SOFORT Excel beenden!
-        kill_excel_instances()
+        # SOFORT Excel beenden! (bzw. Instanz an den Pool zurückgeben)
+        _finish_app(lease)
         
+        print(f"[xlwings_writer] Excel-Aufrufe (gebündelt): {com.summary()}", file=sys.stderr)
         return {
             'success': True, 
             'outputPath': output_path,
             'method': 'xlwings',
-            'cfPreserved': True
+            'cfPreserved': True,
+            'comCalls': com.summary()
         }
         
     except Exception as e:
@@ -619,7 +660,7 @@ def write_sheet_xlwings(file_path, output_path, sheet_name, changes):
         tb = traceback.format_exc()
         print(f"[xlwings Writer] ERROR: {error_msg}", file=sys.stderr, flush=True)
         print(f"[xlwings Writer] Traceback: {tb}", file=sys.stderr, flush=True)
-        kill_excel_instances()  # Auch bei Fehler beenden
+        _finish_app(lease, failed=True)  # Auch bei Fehler beenden
         return {
             'success': False, 
             'error': error_msg,
@@ -627,50 +668,44 @@ def write_sheet_xlwings(file_path, output_path, sheet_name, changes):
         }
 
 
-def _apply_hidden_columns_xlwings(ws, hidden_columns, max_cols=None):
+def _log_com_failures(label, failed):
+    """Meldet Adressen, die der ComBatcher auch einzeln nicht setzen konnte"""
+    if failed:
+        shown = ', '.join(failed[:20]) + (' ...' if len(failed) > 20 else '')
+        print(f"[xlwings] {label} FEHLER ({len(failed)} Bereiche): {shown}", file=sys.stderr, flush=True)
+
+
+def _apply_hidden_columns_xlwings(com, hidden_columns, max_cols=None):
     """Setzt versteckte Spalten mit xlwings
     
     Auf macOS funktioniert api.column_hidden nicht zuverlässig.
-    Stattdessen verwenden wir column_width = 0.
+    Stattdessen verwenden wir column_width = 0 - einmal pro Mehrfachbereich.
+    Scheitert ein Bereich, wiederholt der ComBatcher nur dessen Spalten einzeln.
     """
     if hidden_columns is None or not hidden_columns:
         return
     
-    hidden_set = set(hidden_columns)
-    
-    for col_idx in hidden_set:
-        try:
-            col_letter = _get_column_letter(col_idx + 1)
-            col_range = ws.range(f'{col_letter}:{col_letter}')
-            # macOS: column_width = 0 funktioniert zuverlässig
-            col_range.column_width = 0
-        except Exception as e:
-            print(f"[xlwings] Hidden column {col_idx} FEHLER: {e}", file=sys.stderr, flush=True)
+    # macOS: column_width = 0 funktioniert zuverlässig
+    _log_com_failures('Hidden columns', com.set_column_width((col_idx + 1 for col_idx in hidden_columns), 0))
 
 
-def _apply_hidden_rows_xlwings(ws, hidden_rows, max_rows=None):
+def _apply_hidden_rows_xlwings(com, hidden_rows, max_rows=None):
     """Setzt versteckte Zeilen mit xlwings
     
     Auf macOS funktioniert api.row_hidden nicht zuverlässig.
-    Stattdessen verwenden wir row_height = 0.
+    Stattdessen verwenden wir row_height = 0 - einmal pro Mehrfachbereich.
+    Scheitert ein Bereich, wiederholt der ComBatcher nur dessen Zeilen einzeln.
     """
     if hidden_rows is None or not hidden_rows:
         return
     
-    hidden_set = set(hidden_rows)
-    
-    for row_idx in hidden_set:
-        try:
-            excel_row = row_idx + 2  # +2 für Header (1-basiert)
-            row_range = ws.range(f'{excel_row}:{excel_row}')
-            # macOS: row_height = 0 funktioniert zuverlässig
-            row_range.row_height = 0
-        except Exception as e:
-            print(f"[xlwings] Hidden row {row_idx} FEHLER: {e}", file=sys.stderr, flush=True)
+    # macOS: row_height = 0 funktioniert zuverlässig
+    _log_com_failures('Hidden rows',
+                      com.set_row_height((row_idx + 2 for row_idx in hidden_rows), 0))  # +2 für Header (1-basiert)
 
 
-def _apply_row_highlights_xlwings(ws, row_highlights, num_columns):
-    """Wendet Zeilen-Highlights an mit xlwings"""
+def _apply_row_highlights_xlwings(com, row_highlights, num_columns):
+    """Wendet Zeilen-Highlights an mit xlwings (ein Aufruf pro Farbe und Mehrfachbereich)"""
     
     highlight_colors = {
         'green': (144, 238, 144),   # LightGreen
@@ -681,11 +716,9 @@ def _apply_row_highlights_xlwings(ws, row_highlights, num_columns):
         'purple': (221, 160, 221)   # Plum
     }
     
-    last_col_letter = _get_column_letter(num_columns)
-    
+    colors = {}
     for row_idx_str, color in row_highlights.items():
-        row_idx = int(row_idx_str)
-        excel_row = row_idx + 2  # +2 für 1-basiert und Header
+        excel_row = int(row_idx_str) + 2  # +2 für 1-basiert und Header
         
         if isinstance(color, str) and color.startswith('#'):
             rgb = hex_to_rgb(color)
@@ -693,12 +726,67 @@ def _apply_row_highlights_xlwings(ws, row_highlights, num_columns):
             rgb = highlight_colors.get(color, (255, 255, 0))
         
         if rgb:
-            # Ganze Zeile auf einmal färben (VIEL schneller als einzelne Zellen!)
-            try:
-                row_range = ws.range(f'A{excel_row}:{last_col_letter}{excel_row}')
-                row_range.color = rgb
-            except Exception as e:
-                print(f"[xlwings] Fehler beim Färben von Zeile {excel_row}: {e}", file=sys.stderr, flush=True)
+            colors[excel_row] = rgb
+    
+    # Ganze Zeilen auf einmal färben (VIEL schneller als einzelne Zellen!)
+    _log_com_failures('Zeilen färben', com.set_row_colors(colors, 1, num_columns))
+
+
+def _apply_imported_column_styles_xlwings(com, headers, column_styles, data_row_count, row_highlights=None):
+    """Wendet die Vorlagen per Data Join importierter Spalten an (wie im openpyxl-Writer)
+    
+    Nur Zeilen mit Treffer (rows der Vorlage; ohne rows die ganze Spalte), ein
+    Aufruf pro Eigenschaft und Mehrfachbereich. Die Füllfarbe spart markierte
+    Zeilen aus, damit das Zeilen-Highlight sichtbar bleibt. Unterstrichen,
+    durchgestrichen und Ausrichtung bietet das xlwings-Objektmodell nicht an.
+    """
+    highlighted = {int(row_idx) for row_idx in (row_highlights or {})}
+    for header, template in column_styles.items():
+        if not template or header not in headers or data_row_count <= 0:
+            continue
+        rows = template.get('rows')
+        rows = range(data_row_count) if rows is None else [int(r) for r in rows if 0 <= int(r) < data_row_count]
+        if not rows:
+            continue
+        col = headers.index(header) + 1
+        excel_rows = [row_idx + 2 for row_idx in rows]  # +2 für Header (1-basiert)
+        style = template.get('style') or {}
+        font_info = template.get('font') or {}
+        
+        try:
+            fill = style.get('fill')
+            rgb = hex_to_rgb(fill) if isinstance(fill, str) else None
+            if rgb:
+                fill_rows = [row for row, row_idx in zip(excel_rows, rows) if row_idx not in highlighted]
+                _log_com_failures(f"Data-Join-Füllfarbe '{header}'",
+                                  com.set_column_cells(fill_rows, col, 'color', lambda rng: setattr(rng, 'color', rgb)))
+            
+            font = {}
+            if font_info.get('name') or style.get('fontName'):
+                font['name'] = font_info.get('name') or style.get('fontName')
+            if font_info.get('size') or style.get('fontSize'):
+                font['size'] = font_info.get('size') or style.get('fontSize')
+            if font_info.get('bold') or style.get('bold'):
+                font['bold'] = True
+            if font_info.get('italic') or style.get('italic'):
+                font['italic'] = True
+            color = hex_to_rgb(font_info.get('color') or style.get('fontColor'))
+            if color:
+                font['color'] = color
+            if font:
+                def set_font(rng):
+                    for name, value in font.items():
+                        setattr(rng.font, name, value)
+                _log_com_failures(f"Data-Join-Schrift '{header}'",
+                                  com.set_column_cells(excel_rows, col, 'font', set_font))
+            
+            number_format = template.get('numberFormat')
+            if number_format:
+                _log_com_failures(f"Data-Join-Zahlenformat '{header}'",
+                                  com.set_column_cells(excel_rows, col, 'numberFormat',
+                                                       lambda rng: setattr(rng, 'number_format', number_format)))
+        except Exception as e:
+            print(f"[xlwings] Data-Join-Formatierung '{header}' FEHLER: {e}", file=sys.stderr, flush=True)
 
 
 def check_excel_available():
@@ -747,11 +835,13 @@ def main():
     command = sys.argv[1]
     
     if command == 'write_sheet':
-        # Daten von stdin lesen (für große Datenmengen)
-        input_data = sys.stdin.read()
-        
+        # Daten von stdin lesen (für große Datenmengen, ggf. als NDJSON-Stream)
         try:
-            params = json.loads(input_data)
+            params = read_write_params(sys.stdin)
+            # xlwings schreibt Daten als Block - braucht die komplette Liste
+            changes = params.get('changes', {})
+            if 'data' in changes:
+                changes['data'] = materialize_rows(changes['data'])
         except json.JSONDecodeError as e:
             print(json.dumps({'success': False, 'error': f'JSON Parse Error: {str(e)}'}))
             sys.exit(1)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Excel xlwings Worker - persistenter Prozess für xlwings-Lesen und -Schreiben
+
+Statt pro Operation excel_reader_xlwings.py / excel_writer_xlwings.py neu zu
+starten (Python-Start + Excel-Start), hält dieser Prozess einen Pool warmer
+Excel-Instanzen (excel_app_pool.py) und nimmt Befehle als JSON-Zeilen
+über stdin entgegen - gleiches Protokoll wie die Live-Session:
+
+    {"id": 1, "action": "readSheet", "filePath": "...", "sheetName": "...", "options": {}}
+    {"id": 2, "action": "listSheets", "filePath": "..."}
+    {"id": 3, "action": "writeSheet", "filePath": "...", "outputPath": "...", "sheetName": "...", "changes": {}}
+    {"id": 4, "action": "stats"} / {"action": "warmUp"} / {"action": "ping"} / {"action": "quit"}
+
+Antworten als JSON-Zeile auf stdout (mit derselben id), Logs auf stderr.
+
+Aufruf:
+    python excel_xlwings_worker.py [--backend xlwings|fake] [--pool-size N]
+                                   [--max-uses N] [--max-memory-mb N]
+"""
+
+import argparse
+import json
+import sys
+import os
+import platform
+
+# Für embedded Python auf Windows: pywin32 DLLs finden (wie im Writer)
+if platform.system() == 'Windows':
+    pywin32_dll = os.path.join(sys.prefix, 'Lib', 'site-packages', 'pywin32_system32')
+    if os.path.exists(pywin32_dll):
+        os.environ['PATH'] = pywin32_dll + os.pathsep + os.environ.get('PATH', '')
+    python_dir = os.path.dirname(sys.executable)
+    if os.path.exists(os.path.join(python_dir, 'pythoncom311.dll')):
+        os.environ['PATH'] = python_dir + os.pathsep + os.environ.get('PATH', '')
+    win32_dir = os.path.join(sys.prefix, 'Lib', 'site-packages', 'win32')
+    if os.path.exists(win32_dir):
+        sys.path.insert(0, win32_dir)
+    win32_lib = os.path.join(sys.prefix, 'Lib', 'site-packages', 'win32', 'lib')
+    if os.path.exists(win32_lib):
+        sys.path.insert(0, win32_lib)
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from excel_app_pool import (ExcelAppPool, create_backend, set_active_pool,
+                            DEFAULT_POOL_SIZE, DEFAULT_MAX_USES, DEFAULT_MAX_MEMORY_MB)
+
+
+class XlwingsWorker:
+    """Befehlsschleife um einen ExcelAppPool"""
+
+    def __init__(self, pool: ExcelAppPool):
+        self.pool = pool
+        self._is_running = True
+        set_active_pool(pool)
+
+    def _log(self, msg):
+        print(f"[XlwingsWorker] {msg}", file=sys.stderr, flush=True)
+
+    def _respond(self, data):
+        print(json.dumps(data, ensure_ascii=False, default=str), flush=True)
+
+    def _require_excel(self):
+        if self.pool.backend.name != 'xlwings':
+            return {'success': False, 'error': f'Backend "{self.pool.backend.name}" kann keine Dateien verarbeiten'}
+        return None
+
+    def handle_command(self, cmd):
+        action = cmd.get('action') if isinstance(cmd, dict) else None
+
+        if action == 'ping':
+            return {'success': True, 'message': 'pong', 'backend': self.pool.backend.name}
+
+        if action == 'stats':
+            return {'success': True, 'stats': self.pool.get_stats()}
+
+        if action == 'warmUp':
+            self.pool.warm_up()
+            return {'success': True, 'stats': self.pool.get_stats()}
+
+        if action == 'quit':
+            self._is_running = False
+            return {'success': True, 'message': 'Worker beendet'}
+
+        if action in ('readSheet', 'listSheets', 'writeSheet'):
+            error = self._require_excel()
+            if error:
+                return error
+
+        if action == 'readSheet':
+            from excel_reader_xlwings import read_sheet_xlwings
+            return read_sheet_xlwings(cmd.get('filePath'), cmd.get('sheetName'), cmd.get('options') or {})
+
+        if action == 'listSheets':
+            from excel_reader_xlwings import list_sheets_xlwings
+            return list_sheets_xlwings(cmd.get('filePath'))
+
+        if action == 'writeSheet':
+            from excel_writer_xlwings import write_sheet_xlwings
+            return write_sheet_xlwings(cmd.get('filePath'), cmd.get('outputPath'),
+                                       cmd.get('sheetName'), cmd.get('changes') or {})
+
+        return {'success': False, 'error': f'Unbekannte Aktion: {action}'}
+
+    def run(self):
+        """Hauptschleife - liest JSON-Befehle von stdin"""
+        self._log(f"Worker gestartet (Backend: {self.pool.backend.name}, Pool: {self.pool.size})")
+
+        while self._is_running:
+            cmd = None
+            try:
+                line = sys.stdin.readline()
+                if not line:
+                    self._log("EOF erreicht, beende...")
+                    break
+
+                line = line.strip()
+                if not line:
+                    continue
+
+                try:
+                    cmd = json.loads(line)
+                except json.JSONDecodeError as e:
+                    self._respond({'success': False, 'error': f'Ungültiges JSON: {e}'})
+                    continue
+
+                result = self.handle_command(cmd)
+                if isinstance(cmd, dict) and 'id' in cmd:
+                    result = dict(result, id=cmd['id'])
+                self._respond(result)
+
+            except KeyboardInterrupt:
+                self._log("Interrupted, beende...")
+                break
+            except Exception as e:
+                self._log(f"Fehler: {e}")
+                error = {'success': False, 'error': str(e)}
+                if isinstance(cmd, dict) and 'id' in cmd:
+                    error['id'] = cmd['id']
+                self._respond(error)
+
+        self.pool.shutdown()
+        set_active_pool(None)
+        self._log("Worker beendet")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Persistenter xlwings-Worker mit Excel-App-Pool')
+    parser.add_argument('--backend', default='xlwings', choices=['xlwings', 'fake'])
+    parser.add_argument('--pool-size', type=int, default=DEFAULT_POOL_SIZE)
+    parser.add_argument('--max-uses', type=int, default=DEFAULT_MAX_USES)
+    parser.add_argument('--max-memory-mb', type=float, default=DEFAULT_MAX_MEMORY_MB)
+    args = parser.parse_args()
+
+    # Auf Windows: stdin/stdout als UTF-8
+    if sys.platform == 'win32':
+        import io
+        sys.stdin = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    try:
+        backend = create_backend(args.backend)
+    except Exception as e:
+        print(json.dumps({'success': False, 'error': f'xlwings import failed: {e}'}), flush=True)
+        sys.exit(1)
+
+    pool = ExcelAppPool(backend, size=args.pool_size, max_uses=args.max_uses,
+                        max_memory_mb=args.max_memory_mb)
+    XlwingsWorker(pool).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,646 @@
+#!/usr/bin/env python3
+"""
+ZIP-Writer für XLSX-Ausgaben (Excel Data Sync Pro)
+
+Ersetzt zipfile.ZipFile(..., ZIP_DEFLATED) beim Neupacken von Archiven:
+- Konfigurierbare Kompression: 'stored', 'fast' (Level 1), 'default' (Level 6), 'best' (Level 9)
+- Große Members (Sheet-XML, sharedStrings) werden in 1-MB-Blöcken parallel
+  komprimiert (zlib gibt dabei die GIL frei) und in Reihenfolge geschrieben.
+  Jeder Block nutzt die letzten 32 KB des Vorgängers als Dictionary (wie pigz),
+  das Ergebnis ist ein normaler DEFLATE-Stream.
+
+Zwischenstände (z.B. nach openpyxl-Fixups) werden als STORED geschrieben und
+erst beim Abschluss EINMAL mit dem konfigurierten Level komprimiert
+(siehe finalize_archive). Dabei werden die Members blockweise aus dem
+Zwischenstand gelesen - im Speicher liegen nur die Blöcke in Arbeit, nie das
+ganze Archiv.
+
+Nur Standardbibliothek (embedded Python unter Windows hat kein lxml).
+"""
+
+import os
+import shutil
+import struct
+import sys
+import time
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Kompressions-Einstellungen: Name -> (Methode, Level)
+COMPRESSION_SETTINGS = {
+    'stored': (zipfile.ZIP_STORED, None),
+    'fast': (zipfile.ZIP_DEFLATED, 1),
+    'default': (zipfile.ZIP_DEFLATED, 6),
+    'best': (zipfile.ZIP_DEFLATED, 9),
+}
+
+# Umgebungsvariable für die Standard-Kompression der Ausgabe
+COMPRESSION_ENV = 'EXCEL_SYNC_ZIP_COMPRESSION'
+
+# Blockgröße für parallele Kompression
+CHUNK_SIZE = 1024 * 1024
+
+# DEFLATE-Fenster (Dictionary für den Folgeblock)
+_WINDOW_SIZE = 32 * 1024
+
+# Ab dieser Größe (Summe aller Members) lohnt sich ein eigenes ZIP nicht mehr
+# ohne ZIP64 - dann Fallback auf zipfile
+_ZIP64_LIMIT = 0xFFFF0000
+
+_output_compression = None
+
+
+def resolve_compression(setting):
+    """
+    Wandelt eine Kompressions-Einstellung in (Methode, Level) um.
+
+    Args:
+        setting: 'stored' | 'fast' | 'default' | 'best' | Level 0-9 | None (= 'default')
+
+    Raises:
+        ValueError bei unbekannter Einstellung
+    """
+    if setting is None:
+        setting = 'default'
+    if isinstance(setting, str) and setting.strip().isdigit():
+        setting = int(setting.strip())
+    if isinstance(setting, bool):
+        raise ValueError(f'Ungültige Kompression: {setting!r}')
+    if isinstance(setting, int):
+        if not 0 <= setting <= 9:
+            raise ValueError(f'Kompressions-Level muss 0-9 sein: {setting}')
+        if setting == 0:
+            return zipfile.ZIP_STORED, None
+        return zipfile.ZIP_DEFLATED, setting
+    key = str(setting).strip().lower()
+    if key not in COMPRESSION_SETTINGS:
+        raise ValueError(f'Unbekannte Kompression: {setting!r} (erlaubt: {", ".join(COMPRESSION_SETTINGS)})')
+    return COMPRESSION_SETTINGS[key]
+
+
+def set_output_compression(setting):
+    """Setzt die Kompression der endgültigen Ausgabe (None = Umgebungsvariable bzw. 'default')"""
+    global _output_compression
+    if setting is not None:
+        resolve_compression(setting)  # früh validieren
+    _output_compression = setting
+
+
+def get_output_compression():
+    """Aktuelle Kompression der endgültigen Ausgabe"""
+    if _output_compression is not None:
+        return _output_compression
+    return os.environ.get(COMPRESSION_ENV) or 'default'
+
+
+def default_workers():
+    """Anzahl Kompressions-Threads (max. 4, mind. 1)"""
+    return max(1, min(4, os.cpu_count() or 1))
+
+
+# =============================================================================
+# Kompression (läuft in den Worker-Threads)
+# =============================================================================
+
+def _deflate_block(data, level, zdict, final):
+    """
+    Komprimiert einen Block als Raw-DEFLATE.
+
+    Nicht-finale Blöcke enden mit Z_SYNC_FLUSH (byte-aligned, kein Endblock),
+    so dass die Blöcke direkt aneinandergehängt werden können.
+    """
+    if zdict:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15, zdict=zdict)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+def _crc32(data):
+    return zlib.crc32(data) & 0xFFFFFFFF
+
+
+# =============================================================================
+# ZIP-Strukturen
+# =============================================================================
+
+def _make_zipinfo(name_or_info):
+    if isinstance(name_or_info, zipfile.ZipInfo):
+        return name_or_info
+    info = zipfile.ZipInfo(name_or_info, date_time=time.localtime(time.time())[:6])
+    info.external_attr = 0o600 << 16
+    return info
+
+
+def _copy_zipinfo(item):
+    """Neue ZipInfo mit Name, Datum und Attributen eines vorhandenen Members"""
+    info = zipfile.ZipInfo(item.filename, date_time=item.date_time)
+    info.external_attr = item.external_attr
+    info.internal_attr = item.internal_attr
+    info.create_system = item.create_system
+    return info
+
+
+def _dos_datetime(date_time):
+    year, month, day, hour, minute, second = date_time
+    year = max(1980, year)
+    dos_date = (year - 1980) << 9 | month << 5 | day
+    dos_time = hour << 11 | minute << 5 | (second // 2)
+    return dos_time, dos_date
+
+
+def _encode_name(filename):
+    try:
+        return filename.encode('ascii'), 0
+    except UnicodeEncodeError:
+        return filename.encode('utf-8'), 0x800  # Bit 11: Dateiname ist UTF-8
+
+
+class _Entry:
+    """Ein Member in Arbeit: Header-Daten + (zukünftige) komprimierte Blöcke"""
+
+    __slots__ = ('info', 'method', 'size', 'crc', 'blocks')
+
+    def __init__(self, info, method, size, crc, blocks):
+        self.info = info
+        self.method = method
+        self.size = size
+        self.crc = crc          # int oder Future
+        self.blocks = blocks    # Liste aus bytes oder Futures
+
+
+class DeflatedMember:
+    """
+    Bereits komprimierter Inhalt für write_passthrough_archive: aneinander
+    hängbare Raw-DEFLATE-Blöcke (alle bis auf den letzten mit Z_SYNC_FLUSH)
+    samt CRC und Größe der unkomprimierten Daten.
+    """
+
+    __slots__ = ('crc', 'size', 'blocks')
+
+    def __init__(self, crc, size, blocks):
+        self.crc = crc
+        self.size = size
+        self.blocks = blocks
+
+
+def _result(value):
+    return value.result() if hasattr(value, 'result') else value
+
+
+class _RawZipWriter:
+    """Minimaler ZIP-Writer für bereits komprimierte Members (ohne ZIP64)"""
+
+    def __init__(self, fp):
+        self._fp = fp
+        self._central = []
+        self._offset = 0
+        self._streamed = None
+
+    def _write(self, data):
+        self._fp.write(data)
+        self._offset += len(data)
+
+    def add(self, info, method, crc, size, blocks):
+        name, flags = _encode_name(info.filename)
+        dos_time, dos_date = _dos_datetime(info.date_time)
+        compressed_size = sum(len(b) for b in blocks)
+        header_offset = self._offset
+
+        self._write(struct.pack(
+            '<IHHHHHIIIHH', 0x04034b50, 20, flags, method, dos_time, dos_date,
+            crc, compressed_size, size, len(name), 0))
+        self._write(name)
+        for block in blocks:
+            self._write(block)
+
+        self._central.append((name, flags, method, dos_time, dos_date, crc,
+                              compressed_size, size, info, header_offset))
+
+    def begin(self, info, method):
+        """
+        Startet ein Member, dessen Blöcke nach und nach kommen (write_block).
+        CRC und Größen stehen erst danach fest - sie folgen als Data Descriptor
+        (Bit 3), der lokale Header bleibt bei 0. Kein seek() nötig.
+        """
+        name, flags = _encode_name(info.filename)
+        flags |= 0x08
+        dos_time, dos_date = _dos_datetime(info.date_time)
+        self._streamed = [name, flags, method, dos_time, dos_date, info, self._offset, 0]
+        self._write(struct.pack(
+            '<IHHHHHIIIHH', 0x04034b50, 20, flags, method, dos_time, dos_date,
+            0, 0, 0, len(name), 0))
+        self._write(name)
+
+    def write_block(self, block):
+        self._write(block)
+        self._streamed[7] += len(block)
+
+    def end(self, crc, size):
+        """Schließt das mit begin() gestartete Member ab (Data Descriptor)"""
+        name, flags, method, dos_time, dos_date, info, header_offset, compressed_size = self._streamed
+        self._streamed = None
+        self._write(struct.pack('<IIII', 0x08074b50, crc, compressed_size, size))
+        self._central.append((name, flags, method, dos_time, dos_date, crc,
+                              compressed_size, size, info, header_offset))
+
+    def close(self):
+        central_offset = self._offset
+        for (name, flags, method, dos_time, dos_date, crc,
+             compressed_size, size, info, header_offset) in self._central:
+            self._write(struct.pack(
+                '<IHHHHHHIIIHHHHHII', 0x02014b50,
+                (info.create_system << 8) | 20, 20, flags, method, dos_time, dos_date,
+                crc, compressed_size, size, len(name), 0, 0, 0,
+                info.internal_attr, info.external_attr & 0xFFFFFFFF, header_offset))
+            self._write(name)
+        central_size = self._offset - central_offset
+        count = len(self._central)
+        self._write(struct.pack('<IHHHHIIH', 0x06054b50, 0, 0, count, count,
+                                central_size, central_offset, 0))
+
+
+# =============================================================================
+# Öffentliche API
+# =============================================================================
+
+def _open_target(target_path, password=None):
+    """
+    Ausgabe-Stream: normale Datei oder - mit Passwort - der verschlüsselnde
+    CFB-Writer (excel_package_crypto), der das ZIP im selben Durchlauf
+    segmentweise verschlüsselt. Beide werden nur sequentiell beschrieben.
+    """
+    if not password:
+        return open(target_path, 'wb')
+    from excel_package_crypto import EncryptedPackageWriter
+    return EncryptedPackageWriter(target_path, password)
+
+
+def write_zip_archive(target_path, members, compression='default', workers=None, password=None):
+    """
+    Schreibt ein ZIP-Archiv mit parallel komprimierten Members.
+
+    Args:
+        target_path: Ausgabedatei (wird überschrieben)
+        members: Liste von (Name oder ZipInfo, bytes) in Ausgabe-Reihenfolge
+        compression: Siehe resolve_compression
+        workers: Anzahl Threads (None = default_workers())
+        password: Ausgabe mit Passwort verschlüsseln (ECMA-376 Agile)
+
+    Returns:
+        Dict mit Statistik {'members', 'size', 'compressedSize'}
+    """
+    method, level = resolve_compression(compression)
+    members = [(_make_zipinfo(info), data) for info, data in members]
+
+    total_size = sum(len(data) for _, data in members)
+    if total_size >= _ZIP64_LIMIT or len(members) >= 0xFFFF:
+        # Riesige Archive: zipfile übernimmt ZIP64 (sequentiell)
+        return _write_zip_sequential(target_path, members, method, level, password)
+
+    workers = workers or default_workers()
+    stats = {'members': len(members), 'size': total_size, 'compressedSize': 0}
+    # Begrenzt die Anzahl gleichzeitig gehaltener Blöcke
+    max_in_flight = workers * 4
+
+    with ThreadPoolExecutor(max_workers=workers) as pool, _open_target(target_path, password) as fp:
+        writer = _RawZipWriter(fp)
+        pending = deque()
+        in_flight = 0
+
+        def flush_head():
+            entry = pending.popleft()
+            blocks = [_result(b) for b in entry.blocks]
+            writer.add(entry.info, entry.method, _result(entry.crc), entry.size, blocks)
+            stats['compressedSize'] += sum(len(b) for b in blocks)
+            return len(entry.blocks)
+
+        for info, data in members:
+            data = bytes(data) if not isinstance(data, bytes) else data
+            size = len(data)
+
+            if method == zipfile.ZIP_STORED or info.filename.endswith('/'):
+                crc = pool.submit(_crc32, data) if size >= CHUNK_SIZE else _crc32(data)
+                entry = _Entry(info, zipfile.ZIP_STORED, size, crc, [data])
+            elif size <= CHUNK_SIZE:
+                block = pool.submit(_deflate_block, data, level, None, True)
+                entry = _Entry(info, zipfile.ZIP_DEFLATED, size, _crc32(data), [block])
+            else:
+                view = memoryview(data)
+                blocks = []
+                for start in range(0, size, CHUNK_SIZE):
+                    end = min(start + CHUNK_SIZE, size)
+                    zdict = bytes(view[max(0, start - _WINDOW_SIZE):start]) if start else None
+                    blocks.append(pool.submit(_deflate_block, view[start:end], level, zdict, end == size))
+                entry = _Entry(info, zipfile.ZIP_DEFLATED, size, pool.submit(_crc32, data), blocks)
+
+            pending.append(entry)
+            in_flight += len(entry.blocks)
+            while len(pending) > 1 and in_flight > max_in_flight:
+                in_flight -= flush_head()
+
+        while pending:
+            flush_head()
+        writer.close()
+
+    return stats
+
+
+def _write_zip_sequential(target_path, members, method, level, password=None):
+    """Fallback über zipfile (ZIP64-fähig, nicht parallel)"""
+    stats = {'members': len(members), 'size': 0, 'compressedSize': 0}
+    # Ohne seek() schreibt zipfile Data Descriptors - passt zum verschlüsselnden Stream
+    with _open_target(target_path, password) as fp, \
+            zipfile.ZipFile(fp, 'w', method, allowZip64=True, compresslevel=level) as zf:
+        for info, data in members:
+            info.compress_type = method
+            zf.writestr(info, data, compress_type=method, compresslevel=level)
+            stats['size'] += info.file_size
+            stats['compressedSize'] += info.compress_size
+    return stats
+
+
+def read_archive_members(source_path, replacements=None):
+    """
+    Liest alle Members eines Archivs (Reihenfolge bleibt erhalten).
+
+    Args:
+        replacements: Optional - Dict {Name: bytes} mit ersetzten Inhalten
+    """
+    replacements = replacements or {}
+    members = []
+    with zipfile.ZipFile(source_path, 'r') as zin:
+        for item in zin.infolist():
+            info = _copy_zipinfo(item)
+            data = replacements.get(item.filename)
+            if data is None:
+                data = zin.read(item.filename)
+            members.append((info, data))
+    return members
+
+
+def _read_raw_member(fp, item):
+    """Komprimierte Daten eines Members direkt aus dem Archiv (ohne Entpacken)"""
+    fp.seek(item.header_offset)
+    header = fp.read(30)
+    if len(header) != 30 or header[:4] != b'PK\x03\x04':
+        raise zipfile.BadZipFile(f'Ungültiger lokaler Header: {item.filename}')
+    name_length, extra_length = struct.unpack('<HH', header[26:30])
+    fp.seek(item.header_offset + 30 + name_length + extra_length)
+    return fp.read(item.compress_size)
+
+
+def read_raw_archive(source_path):
+    """
+    Liest alle Members eines Archivs als rohe, komprimierte Bytes (z.B. für
+    eine Vorlage, aus der viele Dateien erzeugt werden).
+
+    Returns:
+        (Liste der ZipInfos, Dict {Name: komprimierte Bytes})
+
+    Raises:
+        ValueError bei ZIP64-Archiven oder verschlüsselten Members
+    """
+    with zipfile.ZipFile(source_path, 'r') as zin, open(source_path, 'rb') as fp:
+        items = zin.infolist()
+        if _needs_zipfile(items):
+            raise ValueError('Archiv mit ZIP64 oder Verschlüsselung kann nicht roh übernommen werden')
+        return items, {item.filename: _read_raw_member(fp, item) for item in items}
+
+
+def _needs_zipfile(items, extra_members=0, extra_size=0):
+    """ZIP64 bzw. verschlüsselte Members kann _RawZipWriter nicht übernehmen"""
+    return (len(items) + extra_members >= 0xFFFF
+            or sum(item.compress_size for item in items) + extra_size >= _ZIP64_LIMIT
+            or any(item.flag_bits & 0x1 for item in items))
+
+
+def write_passthrough_archive(target_path, items, read_raw, replacements, additions=None, compression=None):
+    """
+    Schreibt ein Archiv aus vorhandenen Members plus wenigen Änderungen.
+
+    Unveränderte Members werden als rohe, komprimierte Bytes übernommen
+    (kein Entpacken, kein erneutes Komprimieren).
+
+    Args:
+        items: ZipInfos der Quelle in Ausgabe-Reihenfolge
+        read_raw: Funktion ZipInfo -> komprimierte Bytes
+        replacements: Dict {Name: bytes, DeflatedMember oder None} - None entfernt das Member
+        additions: Liste von (Name, bytes) - neue Members, am Ende angehängt
+        compression: Kompression für geänderte/neue Members (None = Ausgabe-Einstellung)
+
+    Returns:
+        Dict mit Statistik {'members', 'copied', 'written'}
+    """
+    additions = additions or []
+    method, level = resolve_compression(compression if compression is not None else get_output_compression())
+    stats = {'members': 0, 'copied': 0, 'written': 0}
+
+    with open(target_path, 'wb') as out:
+        writer = _RawZipWriter(out)
+
+        def write_new(info, data):
+            if isinstance(data, DeflatedMember):
+                writer.add(info, zipfile.ZIP_DEFLATED, data.crc, data.size, data.blocks)
+            elif method == zipfile.ZIP_STORED or info.filename.endswith('/'):
+                writer.add(info, zipfile.ZIP_STORED, _crc32(data), len(data), [data])
+            else:
+                writer.add(info, zipfile.ZIP_DEFLATED, _crc32(data), len(data),
+                           [_deflate_block(data, level, None, True)])
+            stats['written'] += 1
+
+        for item in items:
+            if item.filename in replacements:
+                data = replacements[item.filename]
+                if data is not None:
+                    write_new(_copy_zipinfo(item), data)
+            else:
+                writer.add(item, item.compress_type, item.CRC, item.file_size, [read_raw(item)])
+                stats['copied'] += 1
+        for name, data in additions:
+            write_new(_make_zipinfo(name), data)
+        writer.close()
+
+    stats['members'] = stats['copied'] + stats['written']
+    return stats
+
+
+def rewrite_archive(source_path, target_path, replacements, additions=None, compression=None):
+    """
+    Schreibt ein Archiv mit wenigen geänderten Members neu - unveränderte
+    Members roh übernommen (siehe write_passthrough_archive). Bei großen
+    Arbeitsmappen ist das der Unterschied zwischen Millisekunden und Sekunden.
+
+    Args:
+        replacements: Dict {Name: bytes oder None} - None entfernt das Member
+        additions: Liste von (Name, bytes) - neue Members, am Ende angehängt
+        compression: Kompression für geänderte/neue Members (None = Ausgabe-Einstellung)
+
+    Returns:
+        Dict mit Statistik {'members', 'copied', 'written'}
+    """
+    additions = additions or []
+    with zipfile.ZipFile(source_path, 'r') as zin:
+        items = zin.infolist()
+
+    new_size = sum(len(data) for data in replacements.values() if data) + sum(len(d) for _, d in additions)
+    if _needs_zipfile(items, len(additions), new_size):
+        # ZIP64 bzw. verschlüsselte Members: über zipfile neu packen
+        members = [(info, data) for info, data in read_archive_members(source_path, replacements)
+                   if not (info.filename in replacements and replacements[info.filename] is None)]
+        members.extend((_make_zipinfo(name), data) for name, data in additions)
+        stats = write_zip_archive(target_path, members, compression=compression)
+        return {'members': stats['members'], 'copied': 0, 'written': stats['members']}
+
+    with open(source_path, 'rb') as fp:
+        return write_passthrough_archive(target_path, items, lambda item: _read_raw_member(fp, item),
+                                         replacements, additions, compression)
+
+
+def archive_needs_finalize(path, compression=None):
+    """
+    Prüft ob ein Archiv unkomprimierte XML-Members enthält (Zwischenstand),
+    die mit der konfigurierten Kompression neu gepackt werden sollten.
+    """
+    method, _ = resolve_compression(compression if compression is not None else get_output_compression())
+    if method == zipfile.ZIP_STORED:
+        return False
+    try:
+        with zipfile.ZipFile(path, 'r') as zf:
+            return any(item.compress_type == zipfile.ZIP_STORED and item.file_size > 0
+                       and item.filename.endswith(('.xml', '.rels', '.vml'))
+                       for item in zf.infolist())
+    except (zipfile.BadZipFile, OSError):
+        return False
+
+
+def _write_zip_streamed(target_path, zin, method, level, workers=None, password=None):
+    """
+    Packt die Members eines geöffneten Archivs neu, ohne sie ganz zu lesen.
+
+    Members bis CHUNK_SIZE werden wie in write_zip_archive komprimiert. Größere
+    werden in CHUNK_SIZE-Blöcken gelesen, parallel komprimiert (Dictionary wie
+    dort) und per begin/write_block/end geschrieben, sobald sie fertig sind.
+    Gleichzeitig in Arbeit sind höchstens workers * 4 Blöcke - der Speicher
+    hängt nicht von der Größe der Mappe ab.
+    """
+    workers = workers or default_workers()
+    items = zin.infolist()
+    stats = {'members': len(items), 'size': 0, 'compressedSize': 0}
+    max_in_flight = workers * 4
+
+    with ThreadPoolExecutor(max_workers=workers) as pool, _open_target(target_path, password) as fp:
+        writer = _RawZipWriter(fp)
+        # Ausgabe in Reihenfolge: ('entry', _Entry) | ('begin', info, method) |
+        # ('block', bytes oder Future) | ('end', crc, size)
+        pending = deque()
+        in_flight = 0
+
+        def flush_head():
+            op = pending.popleft()
+            if op[0] == 'entry':
+                entry = op[1]
+                blocks = [_result(b) for b in entry.blocks]
+                writer.add(entry.info, entry.method, _result(entry.crc), entry.size, blocks)
+                stats['compressedSize'] += sum(len(b) for b in blocks)
+                return len(blocks)
+            if op[0] == 'begin':
+                writer.begin(op[1], op[2])
+                return 0
+            if op[0] == 'block':
+                block = _result(op[1])
+                writer.write_block(block)
+                stats['compressedSize'] += len(block)
+                return 1
+            writer.end(op[1], op[2])
+            return 0
+
+        def push(op, blocks):
+            nonlocal in_flight
+            pending.append(op)
+            in_flight += blocks
+            while len(pending) > 1 and in_flight > max_in_flight:
+                in_flight -= flush_head()
+
+        for item in items:
+            info = _copy_zipinfo(item)
+            stored = method == zipfile.ZIP_STORED or item.is_dir()
+            stats['size'] += item.file_size
+
+            if item.file_size <= CHUNK_SIZE:
+                data = zin.read(item)
+                if stored:
+                    entry = _Entry(info, zipfile.ZIP_STORED, len(data), _crc32(data), [data])
+                else:
+                    block = pool.submit(_deflate_block, data, level, None, True)
+                    entry = _Entry(info, zipfile.ZIP_DEFLATED, len(data), _crc32(data), [block])
+                push(('entry', entry), len(entry.blocks))
+                continue
+
+            push(('begin', info, zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED), 0)
+            crc = 0
+            size = 0
+            with zin.open(item) as src:
+                chunk = src.read(CHUNK_SIZE)
+                zdict = None
+                while chunk:
+                    following = src.read(CHUNK_SIZE)
+                    crc = zlib.crc32(chunk, crc)
+                    size += len(chunk)
+                    if stored:
+                        push(('block', chunk), 1)
+                    else:
+                        push(('block', pool.submit(_deflate_block, chunk, level, zdict, not following)), 1)
+                        zdict = chunk[-_WINDOW_SIZE:]
+                    chunk = following
+            push(('end', crc & 0xFFFFFFFF, size), 0)
+
+        while pending:
+            flush_head()
+        writer.close()
+
+    return stats
+
+
+def _finalize_sequential(target_path, zin, method, level, password=None):
+    """Fallback über zipfile (ZIP64), Members als Stream kopiert"""
+    stats = {'members': 0, 'size': 0, 'compressedSize': 0}
+    with _open_target(target_path, password) as fp, \
+            zipfile.ZipFile(fp, 'w', method, allowZip64=True, compresslevel=level) as zout:
+        for item in zin.infolist():
+            info = _copy_zipinfo(item)
+            info.compress_type = zipfile.ZIP_STORED if item.is_dir() else method
+            info.file_size = item.file_size  # zipfile wählt daran ZIP64
+            with zin.open(item) as src, zout.open(info, 'w') as dst:
+                shutil.copyfileobj(src, dst, CHUNK_SIZE)
+            stats['members'] += 1
+            stats['size'] += info.file_size
+            stats['compressedSize'] += info.compress_size
+    return stats
+
+
+def finalize_archive(source_path, target_path, compression=None, workers=None, password=None):
+    """
+    Packt ein Archiv mit der konfigurierten Kompression neu - mit password
+    direkt verschlüsselt (kein zweiter Durchlauf über die Datei).
+
+    Die Members werden blockweise aus source_path gelesen (siehe
+    _write_zip_streamed), nicht vorab in den Speicher.
+
+    Returns:
+        Statistik-Dict {'members', 'size', 'compressedSize'}
+    """
+    compression = compression if compression is not None else get_output_compression()
+    method, level = resolve_compression(compression)
+    start = time.time()
+    with zipfile.ZipFile(source_path, 'r') as zin:
+        items = zin.infolist()
+        if len(items) >= 0xFFFF or sum(item.file_size for item in items) >= _ZIP64_LIMIT:
+            stats = _finalize_sequential(target_path, zin, method, level, password)
+        else:
+            stats = _write_zip_streamed(target_path, zin, method, level, workers, password)
+    sys.stderr.write(f"[ZIP] Finalisiert ({compression}{', verschlüsselt' if password else ''}): "
+                     f"{stats['size']} -> {stats['compressedSize']} Bytes in {time.time() - start:.2f}s\n")
+    return stats
@@ -0,0 +1,301 @@
+/**
+ * Netzlaufwerk-Modus für Excel Data Sync Pro
+ *
+ * Auf SMB-/AFP-Freigaben sind viele kleine, wahlfreie Zugriffe (ZIP-Verzeichnis,
+ * einzelne XML-Members, mehrfaches Neuschreiben) extrem langsam. Für Netzwerkpfade
+ * arbeiten Reader und Writer deshalb ausschließlich auf lokalen Kopien:
+ *
+ * 1. pull(): Datei EINMAL sequentiell in den lokalen Cache kopieren.
+ *    Der Cache wird über Größe + mtime validiert (Read-Through-Cache).
+ * 2. Alle Lese-/Schreibvorgänge laufen lokal.
+ * 3. push(): Ergebnis mit EINER sequentiellen Kopie in eine Staging-Datei neben
+ *    der Zieldatei schreiben und dann atomar umbenennen. Andere Rechner sehen
+ *    nie eine halb geschriebene Datei.
+ *
+ * Die Erkennung von Netzwerkpfaden kommt aus main.js (networkLog.isNetworkPath),
+ * siehe setNetworkPathDetector().
+ */
+
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const crypto = require('crypto');
+
+// Standard-Verzeichnis für den lokalen Cache
+const DEFAULT_CACHE_DIR = path.join(os.tmpdir(), 'excel-data-sync-pro', 'network-cache');
+// Maximale Anzahl gecachter Dateien (älteste werden verworfen)
+const DEFAULT_MAX_ENTRIES = 8;
+// Wiederholungen beim Umbenennen (Datei kann kurz von Excel/Virenscanner gesperrt sein)
+const RENAME_RETRIES = 5;
+const RENAME_RETRY_DELAY_MS = 200;
+
+function sleep(ms) {
+    return new Promise(resolve => setTimeout(resolve, ms));
+}
+
+class NetworkStagingCache {
+    /**
+     * @param {Object} [options]
+     * @param {string} [options.cacheDir] - Lokales Cache-Verzeichnis
+     * @param {number} [options.maxEntries] - Maximale Anzahl gecachter Dateien
+     * @param {Function} [options.isNetworkPath] - Erkennung von Netzwerkpfaden
+     * @param {Object} [options.fs] - fs.promises-kompatibles Objekt für Zugriffe auf
+     *        die Freigabe (für Tests mit künstlicher Latenz)
+     */
+    constructor(options = {}) {
+        this.cacheDir = options.cacheDir || DEFAULT_CACHE_DIR;
+        this.maxEntries = options.maxEntries || DEFAULT_MAX_ENTRIES;
+        this.detector = options.isNetworkPath || null;
+        this.remoteFs = options.fs || fs.promises;
+        this.pending = new Map(); // Laufende pull()-Aufrufe pro Cache-Key
+        this.stats = { hits: 0, misses: 0, pushes: 0 };
+    }
+
+    /**
+     * Setzt die Erkennung von Netzwerkpfaden
+     * @param {Function|null} detector - (filePath) => boolean
+     */
+    setNetworkPathDetector(detector) {
+        this.detector = detector;
+    }
+
+    isNetworkPath(filePath) {
+        if (!filePath || !this.detector) return false;
+        try {
+            return !!this.detector(filePath);
+        } catch (e) {
+            return false;
+        }
+    }
+
+    _key(remotePath) {
+        return crypto.createHash('sha1').update(path.resolve(remotePath)).digest('hex').substring(0, 20);
+    }
+
+    _entryPaths(remotePath) {
+        const key = this._key(remotePath);
+        return {
+            key,
+            file: path.join(this.cacheDir, key + path.extname(remotePath)),
+            meta: path.join(this.cacheDir, key + '.json')
+        };
+    }
+
+    _ensureCacheDir() {
+        fs.mkdirSync(this.cacheDir, { recursive: true });
+    }
+
+    _readMeta(metaPath) {
+        try {
+            return JSON.parse(fs.readFileSync(metaPath, 'utf8'));
+        } catch (e) {
+            return null;
+        }
+    }
+
+    _writeMeta(metaPath, remotePath, stat) {
+        const meta = {
+            remotePath: path.resolve(remotePath),
+            size: stat.size,
+            mtimeMs: stat.mtimeMs,
+            cachedAt: Date.now()
+        };
+        fs.writeFileSync(metaPath, JSON.stringify(meta));
+    }
+
+    /**
+     * Liefert einen lokalen Pfad mit aktuellem Inhalt der Datei.
+     * Lokale Pfade werden unverändert zurückgegeben.
+     *
+     * @param {string} remotePath - Pfad auf der Freigabe
+     * @returns {Promise<string>} Lokaler Pfad (nur lesen - nicht verändern!)
+     */
+    async pull(remotePath) {
+        if (!this.isNetworkPath(remotePath)) return remotePath;
+
+        const entry = this._entryPaths(remotePath);
+        if (this.pending.has(entry.key)) return this.pending.get(entry.key);
+
+        const promise = this._pull(remotePath, entry).finally(() => this.pending.delete(entry.key));
+        this.pending.set(entry.key, promise);
+        return promise;
+    }
+
+    /**
+     * Lokaler Pfad, unter dem pull() die Datei ablegt (ohne Zugriff auf die
+     * Freigabe). Für Caches, die nach dem lokalen Pfad geführt werden.
+     *
+     * @param {string} remotePath - Pfad auf der Freigabe
+     * @returns {string} Lokaler Pfad (lokale Pfade unverändert)
+     */
+    localPath(remotePath) {
+        if (!this.isNetworkPath(remotePath)) return remotePath;
+        return this._entryPaths(remotePath).file;
+    }
+
+    async _pull(remotePath, entry) {
+        const remoteStat = await this.remoteFs.stat(remotePath);
+        const meta = this._readMeta(entry.meta);
+
+        if (meta && meta.size === remoteStat.size && meta.mtimeMs === remoteStat.mtimeMs) {
+            try {
+                if (fs.statSync(entry.file).size === remoteStat.size) {
+                    this.stats.hits++;
+                    this._touch(entry.meta);
+                    return entry.file;
+                }
+            } catch (e) {
+                // Cache-Datei fehlt - neu laden
+            }
+        }
+
+        // Einmal sequentiell in eine temporäre Datei kopieren, dann lokal umbenennen
+        this.stats.misses++;
+        this._ensureCacheDir();
+        const tempFile = `${entry.file}.${process.pid}-${Date.now()}.part`;
+        try {
+            await this.remoteFs.copyFile(remotePath, tempFile);
+            fs.renameSync(tempFile, entry.file);
+        } catch (error) {
+            try { fs.unlinkSync(tempFile); } catch (e) { /* ignorieren */ }
+            throw error;
+        }
+        this._writeMeta(entry.meta, remotePath, remoteStat);
+        this._evict(entry.key);
+        return entry.file;
+    }
+
+    /**
+     * Legt eine lokale Arbeitsdatei für ein Ziel auf der Freigabe an
+     * (noch nicht existierend - der Writer erzeugt sie).
+     *
+     * @param {string} remotePath - Endgültiger Pfad auf der Freigabe
+     * @returns {string} Lokaler Pfad
+     */
+    createWorkFile(remotePath) {
+        this._ensureCacheDir();
+        const random = crypto.randomBytes(6).toString('hex');
+        return path.join(this.cacheDir, `work-${random}${path.extname(remotePath)}`);
+    }
+
+    /**
+     * Verwirft eine lokale Arbeitsdatei
+     */
+    discardWorkFile(localPath) {
+        try { fs.unlinkSync(localPath); } catch (e) { /* ignorieren */ }
+    }
+
+    /**
+     * Überträgt eine lokale Datei auf die Freigabe: eine sequentielle Kopie in eine
+     * Staging-Datei neben dem Ziel, dann atomares Umbenennen.
+     * Die lokale Datei wird danach als Cache-Kopie des Ziels übernommen.
+     *
+     * @param {string} localPath - Fertige lokale Datei
+     * @param {string} remotePath - Zielpfad auf der Freigabe
+     */
+    async push(localPath, remotePath) {
+        const stagedPath = path.join(
+            path.dirname(remotePath),
+            `.~stage-${path.basename(remotePath)}-${process.pid}-${Date.now()}`
+        );
+
+        try {
+            await this.remoteFs.copyFile(localPath, stagedPath);
+            await this._renameWithRetry(stagedPath, remotePath);
+        } catch (error) {
+            try { await this.remoteFs.unlink(stagedPath); } catch (e) { /* ignorieren */ }
+            throw error;
+        }
+        this.stats.pushes++;
+
+        // Lokale Datei wird zur Cache-Kopie (nächstes pull() ist ein Treffer)
+        const entry = this._entryPaths(remotePath);
+        try {
+            const remoteStat = await this.remoteFs.stat(remotePath);
+            this._ensureCacheDir();
+            if (path.resolve(localPath) !== path.resolve(entry.file)) {
+                fs.renameSync(localPath, entry.file);
+            }
+            this._writeMeta(entry.meta, remotePath, remoteStat);
+            this._evict(entry.key);
+        } catch (e) {
+            // Cache ist optional - beim nächsten pull() wird neu geladen
+            this.invalidate(remotePath);
+            this.discardWorkFile(localPath);
+        }
+    }
+
+    async _renameWithRetry(fromPath, toPath) {
+        for (let attempt = 0; ; attempt++) {
+            try {
+                await this.remoteFs.rename(fromPath, toPath);
+                return;
+            } catch (error) {
+                const retryable = error.code === 'EPERM' || error.code === 'EBUSY' || error.code === 'EACCES';
+                if (!retryable || attempt >= RENAME_RETRIES - 1) throw error;
+                await sleep(RENAME_RETRY_DELAY_MS);
+            }
+        }
+    }
+
+    /**
+     * Entfernt eine Datei aus dem Cache
+     */
+    invalidate(remotePath) {
+        const entry = this._entryPaths(remotePath);
+        try { fs.unlinkSync(entry.file); } catch (e) { /* ignorieren */ }
+        try { fs.unlinkSync(entry.meta); } catch (e) { /* ignorieren */ }
+    }
+
+    _touch(metaPath) {
+        const now = new Date();
+        try { fs.utimesSync(metaPath, now, now); } catch (e) { /* ignorieren */ }
+    }
+
+    /**
+     * Verwirft die ältesten Einträge wenn mehr als maxEntries gecacht sind
+     */
+    _evict(keepKey) {
+        let metas;
+        try {
+            metas = fs.readdirSync(this.cacheDir).filter(name => name.endsWith('.json'));
+        } catch (e) {
+            return;
+        }
+        if (metas.length <= this.maxEntries) return;
+
+        const entries = metas
+            .map(name => {
+                const metaPath = path.join(this.cacheDir, name);
+                try {
+                    return { metaPath, key: name.slice(0, -5), mtimeMs: fs.statSync(metaPath).mtimeMs };
+                } catch (e) {
+                    return null;
+                }
+            })
+            .filter(entry => entry && entry.key !== keepKey)
+            .sort((a, b) => a.mtimeMs - b.mtimeMs);
+
+        for (const entry of entries.slice(0, metas.length - this.maxEntries)) {
+            const meta = this._readMeta(entry.metaPath);
+            if (meta && meta.remotePath) {
+                this.invalidate(meta.remotePath);
+            } else {
+                try { fs.unlinkSync(entry.metaPath); } catch (e) { /* ignorieren */ }
+            }
+        }
+    }
+}
+
+// Gemeinsame Instanz für Bridge und main.js
+let sharedCache = null;
+
+function getNetworkStaging() {
+    if (!sharedCache) sharedCache = new NetworkStagingCache();
+    return sharedCache;
+}
+
+module.exports = {
+    NetworkStagingCache,
+    getNetworkStaging
+};
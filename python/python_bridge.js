@@ -9,6 +9,10 @@
 const { spawn } = require('child_process');
 const path = require('path');
 const fs = require('fs');
+const os = require('os');
+const { buildRowDelta, computeRowFingerprints } = require('./excel_row_delta');
+const { getNetworkStaging } = require('./network_staging');
+const { XlwingsWorkerClient } = require('./excel_worker_bridge');
 
 // Sichere Log-Funktion (verhindert EIO-Fehler wenn keine Konsole vorhanden)
 function safeLog(...args) {
@@ -277,10 +281,147 @@ function resetExcelCache() {
     _excelCheckPromise = null;
 }
 
+// Persistenter xlwings-Worker mit Pool warmer Excel-Instanzen (excel_xlwings_worker.py)
+let _xlwingsWorker = null;
+let _xlwingsWorkerEnabled = true;
+
+/**
+ * Aktiviert/deaktiviert den persistenten xlwings-Worker.
+ * Deaktiviert startet jede xlwings-Operation wieder ein eigenes Script (und Excel).
+ */
+function setXlwingsWorkerEnabled(enabled) {
+    _xlwingsWorkerEnabled = !!enabled;
+    if (!_xlwingsWorkerEnabled) {
+        shutdownXlwingsWorker();
+    }
+}
+
+function getXlwingsWorker() {
+    if (!_xlwingsWorker) {
+        _xlwingsWorker = new XlwingsWorkerClient({
+            pythonPath: getPythonPath(),
+            scriptPath: path.join(getPythonBasePath(), 'excel_xlwings_worker.py'),
+            log: safeLog
+        });
+    }
+    return _xlwingsWorker;
+}
+
+/**
+ * Beendet den xlwings-Worker samt Excel-Instanzen (z.B. beim Beenden der App)
+ */
+async function shutdownXlwingsWorker() {
+    if (_xlwingsWorker) {
+        const worker = _xlwingsWorker;
+        _xlwingsWorker = null;
+        await worker.stop();
+    }
+}
+
+/**
+ * Führt einen Befehl im xlwings-Worker aus.
+ * Gibt null zurück, wenn der Worker nicht verfügbar ist oder abgestürzt ist -
+ * der Aufrufer verwendet dann den bisherigen Script-Aufruf.
+ * Bei einem Timeout kommt ein Fehlerergebnis (timedOut) statt null: der Auftrag
+ * kann in Excel noch laufen, ein zweiter Schreibvorgang auf dieselbe Datei wäre unsicher.
+ */
+async function callXlwingsWorker(command) {
+    if (!_xlwingsWorkerEnabled) return null;
+    const scriptPath = path.join(getPythonBasePath(), 'excel_xlwings_worker.py');
+    if (!fs.existsSync(scriptPath)) return null;
+    
+    try {
+        const startTime = Date.now();
+        const result = await getXlwingsWorker().request(command);
+        safeLog(`[Python] xlwings-Worker ${command.action} in ${Date.now() - startTime}ms`);
+        return result;
+    } catch (error) {
+        if (error.timedOut) {
+            safeError(`[Python] xlwings-Worker ${command.action}: ${error.message}`);
+            return { success: false, error: error.message, timedOut: true };
+        }
+        safeLog(`[Python] xlwings-Worker fehlgeschlagen (${error.message}) - verwende Script-Aufruf`);
+        return null;
+    }
+}
+
+// Persistenter Worker für passwortgeschützte Dateien (excel_package_worker.py):
+// hält entschlüsselte Pakete im Speicher, Lesen/Schreiben ohne temporäre Klartext-Dateien
+let _packageWorker = null;
+
+const CFB_SIGNATURE = Buffer.from([0xd0, 0xcf, 0x11, 0xe0, 0xa1, 0xb1, 0x1a, 0xe1]);
+
+/**
+ * Verschlüsselte Office-Datei (CFB-Container statt ZIP)?
+ */
+function isEncryptedPackage(filePath) {
+    let fd = null;
+    try {
+        fd = fs.openSync(filePath, 'r');
+        const head = Buffer.alloc(8);
+        return fs.readSync(fd, head, 0, 8, 0) === 8 && head.equals(CFB_SIGNATURE);
+    } catch (e) {
+        return false;
+    } finally {
+        if (fd !== null) fs.closeSync(fd);
+    }
+}
+
+function getPackageWorker() {
+    if (!_packageWorker) {
+        _packageWorker = new XlwingsWorkerClient({
+            pythonPath: getPythonPath(),
+            scriptPath: path.join(getPythonBasePath(), 'excel_package_worker.py'),
+            name: 'PackageWorker',
+            log: safeLog
+        });
+    }
+    return _packageWorker;
+}
+
+/**
+ * Beendet den Package-Worker (der Klartext im Speicher wird dabei überschrieben)
+ */
+async function shutdownPackageWorker() {
+    if (_packageWorker) {
+        const worker = _packageWorker;
+        _packageWorker = null;
+        await worker.stop();
+    }
+}
+
+/**
+ * Führt einen Befehl im Package-Worker aus (Passwörter nur über stdin, nie im Log).
+ * Gibt null zurück, wenn der Worker nicht verfügbar ist.
+ * @param {Object} [options] - timeoutMs und writeBody wie XlwingsWorkerClient.request
+ */
+async function callPackageWorker(command, { timeoutMs, writeBody } = {}) {
+    const scriptPath = path.join(getPythonBasePath(), 'excel_package_worker.py');
+    if (!fs.existsSync(scriptPath)) return null;
+    
+    try {
+        const startTime = Date.now();
+        const result = await getPackageWorker().request(command, timeoutMs, writeBody);
+        safeLog(`[Python] Package-Worker ${command.action} in ${Date.now() - startTime}ms`);
+        return result;
+    } catch (error) {
+        safeLog(`[Python] Package-Worker fehlgeschlagen (${error.message})`);
+        return null;
+    }
+}
+
+/**
+ * Verwirft entschlüsselte Pakete im Package-Worker (eine Datei oder alle)
+ */
+async function evictDecryptedPackages(filePath = null) {
+    if (!_packageWorker || !_packageWorker.isRunning) return { success: true, evicted: 0 };
+    return (await callPackageWorker({ action: 'evict', filePath })) || { success: false, evicted: 0 };
+}
+
 /**
  * Führt ein Python-Script aus und gibt das JSON-Ergebnis zurück
  */
-async function callPython(scriptName, args = []) {
+async function callPython(scriptName, args = [], input = null) {
     const pythonPath = getPythonPath();
     const basePath = getPythonBasePath();
     const scriptPath = path.join(basePath, scriptName);
@@ -294,6 +435,14 @@ async function callPython(scriptName, args = []) {
         const startTime = Date.now();
         const proc = spawn(pythonPath, [scriptPath, ...args]);
         
+        // Größere Eingaben (z.B. Zeilen) als JSON über stdin statt Kommandozeile
+        if (input) {
+            proc.stdin.on('error', (error) => {
+                safeError(`[Python] stdin error:`, error.message);
+            });
+            proc.stdin.end(JSON.stringify(input));
+        }
+        
         let stdout = '';
         let stderr = '';
         
@@ -339,9 +488,16 @@ async function callPython(scriptName, args = []) {
 /**
  * Liste alle Sheets in einer Excel-Datei
  * Verwendet openpyxl (schneller zum Lesen der Metadaten)
+ *
+ * options.password: verschlüsselte Datei über den Package-Worker (entschlüsselt einmal, danach Cache)
  */
-async function listSheets(filePath) {
-    return await callPython('excel_reader.py', ['list_sheets', filePath]);
+async function listSheets(filePath, options = {}) {
+    const localPath = await getNetworkStaging().pull(filePath);
+    if (options.password && isEncryptedPackage(localPath)) {
+        return (await callPackageWorker({ action: 'listSheets', filePath: localPath, password: options.password })) ||
+            { success: false, error: 'Package-Worker nicht verfügbar' };
+    }
+    return await callPython('excel_reader.py', ['list_sheets', localPath]);
 }
 
 /**
@@ -350,19 +506,34 @@ async function listSheets(filePath) {
  * 
  * @param {string} filePath - Pfad zur Excel-Datei
  * @param {string} sheetName - Name des Sheets
+ * @param {Object} [options] - { password: Passwort einer verschlüsselten Datei }
  * @returns {Promise<Object>} Sheet-Daten im Format für die GUI
  */
-async function readSheet(filePath, sheetName) {
+async function readSheet(filePath, sheetName, options = {}) {
     let result;
     let method = 'openpyxl';
     
+    // Netzlaufwerk: aus lokaler Cache-Kopie lesen
+    filePath = await getNetworkStaging().pull(filePath);
+    
+    // Verschlüsselte Datei: openpyxl im Package-Worker liest aus dem entschlüsselten Paket
+    const encrypted = options.password && isEncryptedPackage(filePath);
+    
     // Prüfe ob Excel verfügbar ist
-    const excelAvailable = await isExcelAvailable();
+    const excelAvailable = !encrypted && await isExcelAvailable();
     
-    if (excelAvailable) {
-        // Primär: xlwings verwenden (native Excel-Integration)
+    if (encrypted) {
+        result = await callPackageWorker({ action: 'readSheet', filePath, sheetName, password: options.password });
+        if (!result) {
+            return { success: false, error: 'Package-Worker nicht verfügbar' };
+        }
+    } else if (excelAvailable) {
+        // Primär: xlwings verwenden (native Excel-Integration), über den Worker mit warmem Excel
         try {
-            result = await callPython('excel_reader_xlwings.py', ['read_sheet', filePath, sheetName]);
+            result = await callXlwingsWorker({ action: 'readSheet', filePath, sheetName });
+            if (!result) {
+                result = await callPython('excel_reader_xlwings.py', ['read_sheet', filePath, sheetName]);
+            }
             method = 'xlwings';
         } catch (xlwingsError) {
             safeLog(`[Python] xlwings-Lesen fehlgeschlagen, Fallback auf openpyxl: ${xlwingsError.message}`);
@@ -411,11 +582,390 @@ async function readSheet(filePath, sheetName) {
         // Hyperlinks (falls vorhanden)
         cellHyperlinks: result.cellHyperlinks || {},
         
+        // Zeilen-Fingerprints für Delta-Writes beim Speichern
+        rowFingerprints: result.rowFingerprints || null,
+        
         // Methode die verwendet wurde
         method: result.method || 'openpyxl'
     };
 }
 
+/**
+ * Startet excel_workbook_reader.py (oder options.script) und übergibt jeden NDJSON-Datensatz an
+ * onRecord, sobald seine Zeile vollständig ist. stdout wird nie komplett
+ * gepuffert - nur die jeweils unvollständige letzte Zeile.
+ *
+ * @param {string[]} args - Befehl und Argumente für das Script
+ * @param {Function} onRecord - Callback pro Datensatz
+ * @param {Object} [options]
+ * @param {AbortSignal} [options.signal] - Bricht das Lesen ab (beendet den Prozess)
+ * @param {boolean} [options.lowPriority] - Prozess mit niedriger Priorität (Vorab-Lesen)
+ * @param {Function} [options.isFinal] - Erkennt den Abschluss-Datensatz
+ * @param {string} [options.script] - Anderes NDJSON-Script im Python-Verzeichnis
+ * @param {Object} [options.input] - Konfiguration, die als JSON über stdin geht
+ * @returns {Promise<Object>} Abschluss-Datensatz
+ */
+function streamWorkbookReader(args, onRecord, options = {}) {
+    const script = options.script || 'excel_workbook_reader.py';
+    const scriptPath = path.join(getPythonBasePath(), script);
+    const label = args[0] || script;
+    const isFinal = options.isFinal || (record => record.type === 'done');
+
+    return new Promise((resolve, reject) => {
+        const startTime = Date.now();
+        const proc = spawn(getPythonPath(), [scriptPath, ...args], { signal: options.signal });
+        if (options.input) {
+            proc.stdin.on('error', () => {});
+            proc.stdin.end(JSON.stringify(options.input));
+        }
+        let buffer = '';
+        let stderr = '';
+        let final = null;
+        
+        if (options.lowPriority && proc.pid) {
+            try {
+                os.setPriority(proc.pid, os.constants.priority.PRIORITY_BELOW_NORMAL);
+            } catch (e) {
+                // Priorität ist nur eine Optimierung
+            }
+        }
+
+        const handleLine = (line) => {
+            if (!line.trim()) return;
+            let record;
+            try {
+                record = JSON.parse(line);
+            } catch (e) {
+                safeError(`[Python] ${label} JSON Parse Error: ${e.message}`);
+                return;
+            }
+            if (isFinal(record)) {
+                final = record;
+            }
+            try {
+                onRecord(record);
+            } catch (error) {
+                safeError(`[Python] ${label} Callback-Fehler:`, error.message);
+            }
+        };
+
+        // setEncoding: Multibyte-Zeichen an Chunk-Grenzen bleiben intakt
+        proc.stdout.setEncoding('utf8');
+        proc.stdout.on('data', (data) => {
+            buffer += data;
+            const lines = buffer.split('\n');
+            buffer = lines.pop();
+            for (const line of lines) {
+                handleLine(line);
+            }
+        });
+
+        proc.stderr.on('data', (data) => {
+            stderr += data.toString();
+        });
+
+        proc.on('close', (code) => {
+            handleLine(buffer);
+            safeLog(`[Python] ${label} beendet in ${Date.now() - startTime}ms, code=${code}`);
+            if (final) {
+                resolve(final);
+            } else {
+                reject(new Error(stderr || `Python script exited with code ${code}`));
+            }
+        });
+
+        proc.on('error', (error) => {
+            safeError(`[Python] Spawn error:`, error.message);
+            reject(error);
+        });
+    });
+}
+
+/**
+ * Liest mehrere Sheets in einem Aufruf (excel_workbook_reader.py).
+ * Gemeinsame Teile werden einmal geparst, die Sheets parallel gelesen und
+ * jedes Sheet an onSheet übergeben, sobald es fertig ist.
+ *
+ * @param {string} filePath - Pfad zur Excel-Datei
+ * @param {string[]|null} sheetNames - Zu lesende Sheets (null = alle)
+ * @param {Function} onSheet - Callback ({ sheetName, index, result }) pro fertigem Sheet
+ * @param {Object} [options] - { signal, lowPriority } (siehe streamWorkbookReader)
+ * @returns {Promise<Object>} Abschluss-Datensatz { success, sheetCount, workers, durationMs }
+ */
+async function readWorkbook(filePath, sheetNames, onSheet, options = {}) {
+    const localPath = await getNetworkStaging().pull(filePath);
+    const args = ['read_workbook', localPath];
+    if (sheetNames && sheetNames.length > 0) {
+        args.push(JSON.stringify(sheetNames));
+    }
+    const startTime = Date.now();
+    return streamWorkbookReader(args, (record) => {
+        if (record.type === 'sheet') {
+            safeLog(`[Python] readWorkbook: "${record.sheetName}" nach ${Date.now() - startTime}ms`);
+            onSheet(record);
+        }
+    }, options);
+}
+
+/**
+ * Liest ein Sheet progressiv: onRecord erhält nacheinander den meta-Datensatz
+ * (Header), "rows"-Datensätze mit je ~5000 Zeilen samt Styles und den
+ * end-Datensatz (verbundene Zellen, ausgeblendete Spalten, Hyperlinks).
+ *
+ * @param {string} filePath - Pfad zur Excel-Datei
+ * @param {string} sheetName - Name des Sheets
+ * @param {Function} onRecord - Callback pro Datensatz
+ * @param {Object} [options] - { signal, lowPriority } (siehe streamWorkbookReader)
+ * @returns {Promise<Object>} end-Datensatz ({ success, rowCount, columnCount, ... } oder { success: false, error })
+ */
+async function readSheetStream(filePath, sheetName, onRecord, options = {}) {
+    const localPath = await getNetworkStaging().pull(filePath);
+    return streamWorkbookReader(['read_sheet', localPath, sheetName], onRecord, {
+        ...options,
+        isFinal: record => record.type === 'end'
+    });
+}
+
+/**
+ * Arbeitsblatt-Verwaltung auf Paketebene (excel_sheet_ops.py): nur workbook.xml,
+ * Beziehungen, Content-Types und betroffene Formeln werden neu geschrieben,
+ * alle übrigen Teile roh übernommen.
+ *
+ * @param {string} operation - 'add' | 'delete' | 'rename' | 'clone' | 'move'
+ * @param {string} filePath - Pfad zur Excel-Datei (wird direkt geändert)
+ * @param {Array} args - Sheet-Name(n) bzw. Name + Index
+ * @returns {Promise<Object>} { success, sheets } oder { success: false, error, packageError? }
+ */
+async function manageSheet(operation, filePath, args = []) {
+    return await callPython('excel_sheet_ops.py', [operation, filePath, ...args.map(String)]);
+}
+
+/**
+ * Erzeugt viele Monatsdateien aus einer Vorlage (excel_month_batch.py).
+ * Die Vorlage wird einmal gelesen, jede Datei nur gepatcht (Sheet-Name,
+ * Header-Zellen) und roh geschrieben - parallel in Worker-Prozessen.
+ *
+ * @param {Object} config - { templatePath, sheetName?, sheetNamePattern?, cells?, jobs: [{ outputPath, ... }] }
+ * @param {Function} [onFile] - Callback pro fertiger Datei ({ index, outputPath, success, error? })
+ * @param {Object} [options] - { signal } (siehe streamWorkbookReader)
+ * @returns {Promise<Object>} Abschluss-Datensatz { success, files, failed, filesPerSecond }
+ */
+async function createMonthFiles(config, onFile, options = {}) {
+    const templatePath = await getNetworkStaging().pull(config.templatePath);
+    return streamWorkbookReader([], (record) => {
+        if (record.type === 'file' && onFile) {
+            onFile(record);
+        }
+    }, {
+        ...options,
+        script: 'excel_month_batch.py',
+        input: { ...config, templatePath }
+    });
+}
+
+/**
+ * Hängt Zeilen ab der ersten freien Zeile an (excel_row_append.py): nur das
+ * Sheet-XML wird durchlaufen, die übrigen Teile roh übernommen.
+ *
+ * @param {string} filePath - Pfad zur Excel-Datei (wird direkt geändert)
+ * @param {string} sheetName - Ziel-Sheet
+ * @param {Array} rows - Pro Zeile [[Spalte, Wert, istDatum], ...] (Werte bereits umgewandelt)
+ * @param {Object} [options] - { checkColumns, templateRow }
+ * @returns {Promise<Object>} { success, insertedCount, startRow } oder { success: false, error, packageError? }
+ */
+async function appendRows(filePath, sheetName, rows, options = {}) {
+    return await callPython('excel_row_append.py', [], {
+        filePath,
+        sheetName,
+        rows,
+        checkColumns: options.checkColumns || [1],
+        templateRow: options.templateRow || null
+    });
+}
+
+/**
+ * Vergleicht zwei Sheets über eine Schlüsselspalte (excel_sheet_diff.py):
+ * beide Sheets gestreamt, Hash-Join, bei großen Sheets mit Partitionsdateien.
+ *
+ * @param {string} sourcePath - Datei mit dem neuen Stand
+ * @param {string} sourceSheet - Sheet im neuen Stand
+ * @param {string} targetPath - Datei mit dem alten Stand
+ * @param {string} targetSheet - Sheet im alten Stand
+ * @param {Object} [options] - { keyColumn (Nummer, Buchstabe oder Header), maxMemoryRows }
+ * @returns {Promise<Object>} { success, added, deleted, changed: [[Quelle, Ziel, [Spalten]]], unchanged, ... }
+ */
+async function diffSheets(sourcePath, sourceSheet, targetPath, targetSheet, options = {}) {
+    return await callPython('excel_sheet_diff.py', [], {
+        sourcePath,
+        sourceSheet,
+        targetPath,
+        targetSheet,
+        keyColumn: options.keyColumn || 1,
+        maxMemoryRows: options.maxMemoryRows || null
+    });
+}
+
+/**
+ * Exportiert ein Sheet reduziert auf Kopfzeile + ausgewählte Zeilen (excel_filtered_export.py):
+ * Sheet-XML in einem Durchlauf, Shared Strings gekürzt, Bereiche umgerechnet.
+ * Die Quelldatei bleibt unverändert.
+ *
+ * @param {string} sourcePath - Quelldatei
+ * @param {string} targetPath - Zieldatei
+ * @param {string} sheetName - Sheet, das gefiltert wird
+ * @param {Object} options - { rows (Datenzeilen 0-basiert, aufsteigend) oder flagColumn + flagValues,
+ *                             headerRow, compression }
+ * @returns {Promise<Object>} { success, keptRows, sourceRows, sharedStrings, ... }
+ */
+async function exportFilteredRows(sourcePath, targetPath, sheetName, options = {}) {
+    return await callPython('excel_filtered_export.py', [], {
+        sourcePath,
+        outputPath: targetPath,
+        sheetName,
+        rows: options.rows || null,
+        flagColumn: options.flagColumn || null,
+        flagValues: options.flagValues || null,
+        headerRow: options.headerRow || 1,
+        compression: options.compression || null
+    });
+}
+
+/**
+ * Verschlüsselt ein fertiges XLSX mit Passwort (excel_package_crypto.py, ECMA-376 Agile):
+ * die Datei wird nur sequentiell gelesen, nicht geladen. Quelle und Ziel dürfen gleich sein.
+ *
+ * @returns {Promise<Object>} { success, size, encryptedSize, cryptoUnavailable }
+ */
+async function encryptPackage(sourcePath, targetPath, password) {
+    return await callPython('excel_package_crypto.py', [], {
+        action: 'encrypt',
+        sourcePath,
+        targetPath,
+        password
+    });
+}
+
+// Ab dieser Zeilenzahl werden die Daten als NDJSON-Stream an den Writer geschickt
+const STREAM_MIN_ROWS = 1000;
+// Zeilen pro stdin-Chunk beim Streaming
+const STREAM_CHUNK_ROWS = 2000;
+
+/**
+ * Schreibt einen Chunk in einen Stream und wartet bei Backpressure auf 'drain'.
+ * Löst auch auf wenn der Stream geschlossen wird (Prozess beendet), damit nichts hängt.
+ */
+function writeChunk(stream, chunk) {
+    return new Promise((resolve) => {
+        if (stream.destroyed || !stream.writable) {
+            resolve(false);
+            return;
+        }
+        if (stream.write(chunk)) {
+            resolve(true);
+            return;
+        }
+        const done = () => {
+            stream.removeListener('drain', done);
+            stream.removeListener('close', done);
+            stream.removeListener('error', done);
+            resolve(!stream.destroyed);
+        };
+        stream.once('drain', done);
+        stream.once('close', done);
+        stream.once('error', done);
+    });
+}
+
+/**
+ * Wird config.changes.data gestreamt? Dann die Konfiguration ohne data (mit dataStream.rows)
+ */
+function streamedConfigHeader(config) {
+    const data = config.changes && config.changes.data;
+    if (!Array.isArray(data) || data.length < STREAM_MIN_ROWS) return null;
+    return {
+        ...config,
+        changes: { ...config.changes, data: undefined, dataStream: { rows: data.length } }
+    };
+}
+
+/**
+ * Schreibt die Datenzeilen als NDJSON in Chunks zu STREAM_CHUNK_ROWS
+ * @returns {Promise<boolean>} false, wenn der Stream vorher geschlossen wurde
+ */
+async function writeRowsNdjson(stream, data) {
+    for (let start = 0; start < data.length; start += STREAM_CHUNK_ROWS) {
+        const end = Math.min(start + STREAM_CHUNK_ROWS, data.length);
+        let chunk = '';
+        for (let i = start; i < end; i++) {
+            chunk += JSON.stringify(data[i] || []) + '\n';
+        }
+        if (!await writeChunk(stream, chunk)) return false;
+    }
+    return true;
+}
+
+/**
+ * Sendet die Writer-Konfiguration über stdin.
+ * Große Datenmengen werden als NDJSON gestreamt (siehe excel_stream_input.py):
+ * Zeile 1 = Konfiguration ohne data (mit dataStream.rows), danach eine Zeile pro Datenzeile.
+ * So entsteht nie ein einzelner JSON-String mit dem kompletten Payload.
+ */
+async function writeConfigToStdin(stdin, config) {
+    const header = streamedConfigHeader(config);
+    
+    if (!header) {
+        stdin.write(JSON.stringify(config));
+        stdin.end();
+        return;
+    }
+    
+    if (!await writeChunk(stdin, JSON.stringify(header) + '\n')) return;
+    if (!await writeRowsNdjson(stdin, config.changes.data)) return;
+    stdin.end();
+}
+
+// Package-Worker writeSheet: Entschlüsseln, Schreiben und Verschlüsseln wachsen mit der Größe.
+// Ein Timeout beendet den Worker und verwirft damit alle entschlüsselten Pakete.
+const PACKAGE_WRITE_BASE_TIMEOUT_MS = 10 * 60 * 1000;
+const PACKAGE_WRITE_MS_PER_1000_CELLS = 100;
+const PACKAGE_WRITE_MS_PER_MB = 2000;
+
+/**
+ * Timeout für writeSheet im Package-Worker nach Zellenzahl und Größe der Quelle
+ */
+function packageWriteTimeoutMs(config) {
+    const changes = config.changes || {};
+    const data = Array.isArray(changes.data) ? changes.data : [];
+    const columns = Math.max((changes.headers || []).length, data.length ? (data[0] || []).length : 0);
+    let sourceBytes = 0;
+    for (const filePath of [config.filePath, config.originalPath]) {
+        try {
+            if (filePath) sourceBytes = Math.max(sourceBytes, fs.statSync(filePath).size);
+        } catch (e) {
+            // Fehlt die Datei, meldet der Worker den Fehler
+        }
+    }
+    return PACKAGE_WRITE_BASE_TIMEOUT_MS +
+        Math.ceil(data.length * columns / 1000) * PACKAGE_WRITE_MS_PER_1000_CELLS +
+        Math.ceil(sourceBytes / (1024 * 1024)) * PACKAGE_WRITE_MS_PER_MB;
+}
+
+/**
+ * writeSheet im Package-Worker. Große Daten gehen wie beim Script als NDJSON
+ * hinter der Befehlszeile (dataStream), nicht als eine riesige JSON-Zeile.
+ */
+function writeSheetInPackageWorker(config) {
+    const timeoutMs = packageWriteTimeoutMs(config);
+    const header = streamedConfigHeader(config);
+    if (!header) {
+        return callPackageWorker({ action: 'writeSheet', ...config }, { timeoutMs });
+    }
+    return callPackageWorker({ action: 'writeSheet', ...header }, {
+        timeoutMs,
+        writeBody: (stdin) => writeRowsNdjson(stdin, config.changes.data)
+    });
+}
+
 /**
  * Schreibt Daten in eine Excel-Datei mit vollständiger Style-Erhaltung
  * Verwendet primär xlwings für perfekte CF-Erhaltung, Fallback auf openpyxl
@@ -423,6 +973,18 @@ async function readSheet(filePath, sheetName) {
 async function writeExcel(config) {
     const pythonPath = getPythonPath();
     
+    // Verschlüsselte Quelle/Original: Package-Worker liest direkt aus dem entschlüsselten Paket
+    // (xlwings und ein neuer Script-Prozess müssten jedes Mal neu entschlüsseln)
+    if (config.sourcePassword &&
+        (isEncryptedPackage(config.filePath) || isEncryptedPackage(config.originalPath))) {
+        const workerResult = await writeSheetInPackageWorker(config);
+        if (!workerResult) {
+            return { success: false, error: 'Passwortgeschützte Quelle: Package-Worker nicht verfügbar', method: 'error' };
+        }
+        workerResult.method = workerResult.method || 'openpyxl';
+        return workerResult;
+    }
+    
     // Prüfe ob Excel verfügbar ist
     const excelAvailable = await isExcelAvailable();
     
@@ -446,6 +1008,24 @@ async function writeExcel(config) {
         return { success: false, error: `Script nicht gefunden: ${scriptPath}`, method: 'error' };
     }
     
+    // xlwings: zuerst den persistenten Worker (kein Excel-Neustart pro Speichern).
+    // Große Sheets gehen an das Script - nur dort werden die Zeilen als NDJSON gestreamt.
+    const dataRows = config.changes && Array.isArray(config.changes.data) ? config.changes.data.length : 0;
+    if (useXlwings && dataRows < STREAM_MIN_ROWS) {
+        const workerResult = await callXlwingsWorker({
+            action: 'writeSheet',
+            filePath: config.filePath,
+            outputPath: config.outputPath,
+            sheetName: config.sheetName,
+            changes: config.changes || {}
+        });
+        if (workerResult) {
+            // Auch nach einem Timeout kein Script-Aufruf: der Worker könnte noch schreiben
+            workerResult.method = 'xlwings';
+            return workerResult;
+        }
+    }
+    
     return new Promise((resolve, reject) => {
         const startTime = Date.now();
         safeLog(`[Python] Starte: ${pythonPath} ${scriptPath} write_sheet`);
@@ -521,10 +1101,10 @@ async function writeExcel(config) {
             // Nicht reject - warte auf close event für vollständige Fehlermeldung
         });
 
-        // Sende Daten über stdin (für große Datenmengen)
-        const jsonData = JSON.stringify(config);
-        pythonProcess.stdin.write(jsonData);
-        pythonProcess.stdin.end();
+        // Sende Daten über stdin (große Datenmengen als NDJSON-Stream)
+        writeConfigToStdin(pythonProcess.stdin, config).catch((error) => {
+            safeError(`[Python] stdin Streaming-Fehler:`, error.message);
+        });
     });
 }
 
@@ -565,21 +1145,128 @@ async function writeExcelOpenpyxl(config) {
         });
         
         pythonProcess.on('error', reject);
+        pythonProcess.stdin.on('error', (error) => {
+            safeError(`[Python] stdin error:`, error.message);
+        });
         
-        pythonProcess.stdin.write(JSON.stringify(config));
-        pythonProcess.stdin.end();
+        writeConfigToStdin(pythonProcess.stdin, config).catch((error) => {
+            safeError(`[Python] stdin Streaming-Fehler:`, error.message);
+        });
     });
 }
 
+/**
+ * Kopiert eine Datei über eine temporäre Datei im Zielverzeichnis und benennt sie
+ * dann atomar um. Nutzt Copy-on-Write (Reflink) wenn das Dateisystem es unterstützt.
+ */
+function stageCopyFile(sourcePath, targetPath) {
+    const stagedPath = path.join(
+        path.dirname(targetPath),
+        `.~stage-${path.basename(targetPath)}-${process.pid}-${Date.now()}`
+    );
+    try {
+        fs.copyFileSync(sourcePath, stagedPath, fs.constants.COPYFILE_FICLONE);
+        fs.renameSync(stagedPath, targetPath);
+    } catch (error) {
+        try { fs.unlinkSync(stagedPath); } catch (e) { /* ignorieren */ }
+        throw error;
+    }
+}
+
+/**
+ * Prüft ob für ein Sheet ein Zeilen-Delta statt der kompletten Daten gesendet werden kann.
+ * Nur bei reinem Daten-Update (fullRewrite ohne Zeilen-/Spalten-Struktur-Änderungen)
+ * und wenn das Frontend die Fingerprints vom Laden mitschickt.
+ */
+function canUseRowDelta(sheet, hasRowOps, hasColOps) {
+    return !!(sheet.fullRewrite && !sheet.structuralChange && !hasRowOps && !hasColOps &&
+              !(sheet.rowMapping && sheet.rowMapping.length > 0) &&
+              Array.isArray(sheet.data) && Array.isArray(sheet.rowFingerprints));
+}
+
+/**
+ * Prüft ob ein Sheet nur gefiltert exportiert wird: keine Bearbeitungen, keine Zeilen-/
+ * Spalten-Operationen, rowMapping in Datei-Reihenfolge (keine Sortierung). Dann reicht
+ * der gefilterte XML-Export statt des Writers mit rowMapping.
+ */
+function canUseFilteredExport(sheet, hasRowOps, hasColOps) {
+    const mapping = sheet.rowMapping;
+    if (!sheet.filteredRowsOnly || hasRowOps || hasColOps || !Array.isArray(mapping)) return false;
+    if (sheet.changedCells && Object.keys(sheet.changedCells).length > 0) return false;
+    for (let i = 1; i < mapping.length; i++) {
+        if (!(mapping[i] > mapping[i - 1])) return false;
+    }
+    return true;
+}
+
 /**
  * Exportiert mehrere Sheets mit xlwings/openpyxl
  * Öffnet Original-Datei, modifiziert Sheets und speichert unter neuem Pfad
+ *
+ * options.compression: ZIP-Kompression der Ausgabe ('fast' | 'default' | 'best' | 'stored'),
+ * ohne Angabe gilt EXCEL_SYNC_ZIP_COMPRESSION bzw. 'default'
+ *
+ * Liegen Quelle oder Ziel auf einem Netzlaufwerk, läuft der komplette Export auf
+ * lokalen Kopien (network_staging.js): Quelle einmal holen, lokal schreiben,
+ * Ergebnis mit einer Kopie + atomarem Umbenennen zurückschreiben.
  */
 async function exportMultipleSheets(sourcePath, targetPath, sheets, options = {}) {
+    const staging = getNetworkStaging();
+    const originalPath = options.originalSourcePath || sourcePath;
+    
+    if (!staging.isNetworkPath(sourcePath) && !staging.isNetworkPath(targetPath) &&
+        !staging.isNetworkPath(originalPath)) {
+        return exportMultipleSheetsLocal(sourcePath, targetPath, sheets, options);
+    }
+    
+    // Fehlende Quelldatei: Lokaler Export liefert die bekannte Fehlermeldung
+    if (!fs.existsSync(sourcePath)) {
+        return exportMultipleSheetsLocal(sourcePath, targetPath, sheets, options);
+    }
+    
+    let localSource, localOriginal;
+    const localTarget = staging.isNetworkPath(targetPath) ? staging.createWorkFile(targetPath) : targetPath;
+    try {
+        localSource = await staging.pull(sourcePath);
+        localOriginal = originalPath === sourcePath ? localSource : await staging.pull(originalPath);
+    } catch (error) {
+        safeError(`[Python] Netzlaufwerk: Laden fehlgeschlagen:`, error.message);
+        return { success: false, error: `Datei konnte nicht vom Netzlaufwerk geladen werden: ${error.message}` };
+    }
+    safeLog(`[Python] Netzlaufwerk-Modus: ${sourcePath} -> lokal ${localSource}`);
+    
+    const result = await exportMultipleSheetsLocal(localSource, localTarget, sheets, {
+        ...options,
+        originalSourcePath: localOriginal
+    });
+    
+    if (localTarget !== targetPath) {
+        if (!result.success) {
+            staging.discardWorkFile(localTarget);
+            return result;
+        }
+        try {
+            await staging.push(localTarget, targetPath);
+        } catch (error) {
+            staging.discardWorkFile(localTarget);
+            safeError(`[Python] Netzlaufwerk: Zurückschreiben fehlgeschlagen:`, error.message);
+            return { success: false, error: `Datei konnte nicht auf das Netzlaufwerk geschrieben werden: ${error.message}` };
+        }
+    }
+    
+    result.networkStaging = true;
+    return result;
+}
+
+/**
+ * Export auf lokalen Pfaden (siehe exportMultipleSheets)
+ */
+async function exportMultipleSheetsLocal(sourcePath, targetPath, sheets, options = {}) {
     const results = [];
     let hasError = false;
     let errorMessage = '';
     let actualMethod = null; // Track the ACTUAL method used, not what was planned
+    const rowFingerprints = {}; // Neue Fingerprints der per Delta geschriebenen Sheets
     
     // Original-Datei für Style-Wiederherstellung (falls Markierungen entfernt werden)
     const originalSourcePath = options.originalSourcePath || sourcePath;
@@ -593,21 +1280,29 @@ async function exportMultipleSheets(sourcePath, targetPath, sheets, options = {}
         };
     }
     
-    // Zuerst: Kopiere die Original-Datei zum Ziel (falls unterschiedlich)
-    // So bleiben alle Sheets, Formatierungen, etc. erhalten
-    if (sourcePath !== targetPath) {
-        try {
-            fs.copyFileSync(sourcePath, targetPath);
-        } catch (copyError) {
-            safeError(`[Python] Fehler beim Kopieren:`, copyError.message);
-            return { success: false, error: `Fehler beim Kopieren: ${copyError.message}` };
-        }
-    }
+    // Keine Vorab-Kopie der Original-Datei mehr: Der erste Writer-Aufruf liest direkt
+    // aus der Quelle und ersetzt das Ziel atomar (Staging in excel_staging.py).
+    // Alle weiteren Aufrufe arbeiten dann auf dem Ziel.
+    let currentInput = sourcePath;
+    
+    // ZIP-Kompression: Nur der letzte Schreibvorgang erzeugt die endgültige Datei,
+    // alle Zwischenstände werden unkomprimiert ('stored') geschrieben.
+    // Passwortschutz: Der letzte Schreibvorgang verschlüsselt im selben Durchlauf
+    // (Python-Writer), sonst wird die fertige Datei danach verschlüsselt.
+    const sheetNeedsWrite = (sheet) => !(sheet.fromFile && !sheet.changedCells && !sheet.data?.length && !sheet.fullRewrite);
+    const lastWriteIndex = sheets.map(sheetNeedsWrite).lastIndexOf(true);
+    const outputCompression = options.compression || null;
+    let encrypted = false;
     
     // Jetzt: Nur Sheets mit echten Änderungen modifizieren
-    for (const sheet of sheets) {
+    for (const [sheetIndex, sheet] of sheets.entries()) {
+        const compression = sheetIndex === lastWriteIndex ? outputCompression : 'stored';
+        const password = (sheetIndex === lastWriteIndex && options.password) || null;
+        // Passwort der Quelle: jeder Aufruf liest das Original (Style-Wiederherstellung) mit
+        const sourcePassword = options.sourcePassword || null;
+        
         // Überspringe Sheets ohne Änderungen (fromFile: true und keine editedCells/data)
-        if (sheet.fromFile && !sheet.changedCells && !sheet.data?.length && !sheet.fullRewrite) {
+        if (!sheetNeedsWrite(sheet)) {
             results.push(sheet.sheetName);
             continue;
         }
@@ -621,15 +1316,33 @@ async function exportMultipleSheets(sourcePath, targetPath, sheets, options = {}
                               (sheet.deletedColumnIndices && sheet.deletedColumnIndices.length > 0) ||
                               sheet.insertedColumnInfo || sheet.columnOrder;
             
+            // Nur Filter aktiv: Zeilen direkt im Sheet-XML auswählen statt Writer mit rowMapping
+            if (!sourcePassword && canUseFilteredExport(sheet, hasRowOps, hasColOps)) {
+                const filtered = await exportFilteredRows(currentInput, targetPath, sheet.sheetName, {
+                    rows: sheet.rowMapping,
+                    compression
+                });
+                if (filtered.success) {
+                    results.push(sheet.sheetName);
+                    currentInput = targetPath;
+                    actualMethod = filtered.method;
+                    safeLog(`[Python] Sheet "${sheet.sheetName}" gefiltert exportiert: ${filtered.keptRows} von ${filtered.sourceRows} Zeilen (${filtered.durationMs}ms)`);
+                    continue;
+                }
+                safeLog(`[Python] Gefilterter Export für "${sheet.sheetName}" nicht möglich (${filtered.error}) - verwende Writer`);
+            }
+            
             if (hasRowOps && hasColOps) {
                 // KOMBINIERTE OPERATIONEN: Erst Zeilen, dann Spalten (zwei separate Aufrufe)
                 safeLog(`[Python] Kombinierte Ops: Erst Zeilen, dann Spalten für "${sheet.sheetName}"`);
                 
                 // SCHRITT 1: Zeilen-Operationen (OHNE Spalten-Ops, OHNE fullRewrite)
                 const rowConfig = {
-                    filePath: targetPath,
+                    filePath: currentInput,
                     outputPath: targetPath,
                     originalPath: originalSourcePath,
+                    compression: 'stored',  // Zwischenstand
+                    sourcePassword,
                     sheetName: sheet.sheetName,
                     changes: {
                         headers: sheet.headers || [],
@@ -662,15 +1375,19 @@ async function exportMultipleSheets(sourcePath, targetPath, sheets, options = {}
                     safeError(`[Python] Zeilen-Ops für "${sheet.sheetName}" fehlgeschlagen:`, rowResult.error);
                     continue;
                 }
+                currentInput = targetPath;
                 // Track actual method used (might be fallback)
                 if (rowResult.method) actualMethod = rowResult.method;
                 safeLog(`[Python] Zeilen-Ops für "${sheet.sheetName}" erfolgreich (${rowResult.method})`);
                 
                 // SCHRITT 2: Spalten-Operationen (mit allen Daten, fullRewrite=true)
                 const colConfig = {
-                    filePath: targetPath,
+                    filePath: currentInput,
                     outputPath: targetPath,
                     originalPath: originalSourcePath,
+                    compression,
+                    password,
+                    sourcePassword,
                     sheetName: sheet.sheetName,
                     changes: {
                         headers: sheet.headers || [],
@@ -703,6 +1420,7 @@ async function exportMultipleSheets(sourcePath, targetPath, sheets, options = {}
                     safeError(`[Python] Spalten-Ops für "${sheet.sheetName}" fehlgeschlagen:`, colResult.error);
                 } else {
                     results.push(sheet.sheetName);
+                    encrypted = !!colResult.encrypted;
                     // Track actual method used
                     if (colResult.method) actualMethod = colResult.method;
                     safeLog(`[Python] Spalten-Ops für "${sheet.sheetName}" erfolgreich (${colResult.method})`);
@@ -711,9 +1429,12 @@ async function exportMultipleSheets(sourcePath, targetPath, sheets, options = {}
             } else {
                 // EINZELNE OPERATIONEN: Normaler Aufruf (bestehender Code)
                 const config = {
-                    filePath: targetPath,
+                    filePath: currentInput,
                     outputPath: targetPath,
                     originalPath: originalSourcePath,
+                    compression,
+                    password,
+                    sourcePassword,
                     sheetName: sheet.sheetName,
                     changes: {
                         headers: sheet.headers || [],
@@ -739,6 +1460,16 @@ async function exportMultipleSheets(sourcePath, targetPath, sheets, options = {}
                     }
                 };
                 
+                // Delta-Write: Nur geänderte Zeilen über stdin schicken
+                let currentFingerprints = null;
+                if (canUseRowDelta(sheet, hasRowOps, hasColOps)) {
+                    currentFingerprints = computeRowFingerprints(sheet.data);
+                    const rowDelta = buildRowDelta(sheet.data, sheet.rowFingerprints, currentFingerprints);
+                    config.changes.data = [];
+                    config.changes.rowDelta = rowDelta;
+                    safeLog(`[Python] Delta-Write für "${sheet.sheetName}": ${rowDelta.rows.length} von ${rowDelta.rowCount} Zeilen geändert`);
+                }
+                
                 const result = await writeExcel(config);
             
                 if (!result.success) {
@@ -747,6 +1478,9 @@ async function exportMultipleSheets(sourcePath, targetPath, sheets, options = {}
                     safeError(`[Python] Sheet "${sheet.sheetName}" failed:`, result.error);
                 } else {
                     results.push(sheet.sheetName);
+                    currentInput = targetPath;
+                    if (currentFingerprints) rowFingerprints[sheet.sheetName] = currentFingerprints;
+                    encrypted = !!result.encrypted;
                     // Track actual method used
                     if (result.method) actualMethod = result.method;
                     safeLog(`[Python] Sheet "${sheet.sheetName}" erfolgreich (${result.method})`);
@@ -764,9 +1498,46 @@ async function exportMultipleSheets(sourcePath, targetPath, sheets, options = {}
         return { success: false, error: errorMessage };
     }
     
-    // Passwortschutz anwenden falls gewünscht
-    // xlwings/openpyxl unterstützt keinen Passwortschutz, daher verwenden wir xlsx-populate
-    if (options.password) {
+    // Kein Sheet geschrieben, Quelle verschlüsselt: entschlüsselt bzw. neu verschlüsselt übernehmen
+    if (currentInput === sourcePath && options.sourcePassword && isEncryptedPackage(sourcePath)) {
+        const copyResult = await callPackageWorker({
+            action: 'copyPackage',
+            filePath: sourcePath,
+            outputPath: targetPath,
+            sourcePassword: options.sourcePassword,
+            password: options.password || null
+        });
+        if (!copyResult || !copyResult.success) {
+            const reason = copyResult ? copyResult.error : 'Package-Worker nicht verfügbar';
+            safeError(`[Python] Fehler beim Übernehmen der verschlüsselten Quelle:`, reason);
+            return { success: false, error: `Fehler beim Kopieren: ${reason}` };
+        }
+        currentInput = targetPath;
+        encrypted = !!copyResult.encrypted;
+    }
+    
+    // Kein Sheet geschrieben (nur unveränderte Sheets): Ziel ist eine Kopie der Quelle
+    if (currentInput === sourcePath && sourcePath !== targetPath) {
+        try {
+            stageCopyFile(sourcePath, targetPath);
+        } catch (copyError) {
+            safeError(`[Python] Fehler beim Kopieren:`, copyError.message);
+            return { success: false, error: `Fehler beim Kopieren: ${copyError.message}` };
+        }
+    }
+    
+    // Passwortschutz, falls der letzte Schreibvorgang nicht schon verschlüsselt hat
+    // (xlwings, gefilterter Export, keine Änderungen): fertige Datei in einem Durchlauf
+    // verschlüsseln. xlsx-populate (Datei komplett neu laden) nur noch als Fallback.
+    if (options.password && !encrypted) {
+        const encryptResult = await encryptPackage(targetPath, targetPath, options.password)
+            .catch(error => ({ success: false, error: error.message }));
+        encrypted = !!encryptResult.success;
+        if (!encrypted) {
+            safeLog(`[Python] Verschlüsselung im Python-Writer nicht möglich (${encryptResult.error}) - verwende xlsx-populate`);
+        }
+    }
+    if (options.password && !encrypted) {
         try {
             const XlsxPopulate = require('xlsx-populate');
             const pwWorkbook = await XlsxPopulate.fromFileAsync(targetPath);
@@ -784,6 +1555,8 @@ async function exportMultipleSheets(sourcePath, targetPath, sheets, options = {}
         success: true,
         message: `${results.length} Sheet(s) exportiert`,
         sheetsExported: results,
+        rowFingerprints,
+        encrypted: options.password ? encrypted : undefined,
         method: finalMethod
     };
 }
@@ -812,13 +1585,30 @@ module.exports = {
     callPython,
     listSheets,
     readSheet,
+    readWorkbook,
+    readSheetStream,
+    manageSheet,
+    appendRows,
+    diffSheets,
+    exportFilteredRows,
+    encryptPackage,
+    createMonthFiles,
     writeExcel,
     writeExcelOpenpyxl,
     exportMultipleSheets,
     checkExcelAvailable,
+    getNetworkStaging,
     hasXlwingsSupport,
     isExcelAvailable,
     resetExcelCache,
     setExcelEngine,
-    getExcelEngine
+    getExcelEngine,
+    setXlwingsWorkerEnabled,
+    shutdownXlwingsWorker,
+    evictDecryptedPackages,
+    shutdownPackageWorker,
+    // NDJSON-Streaming an den Writer (für test-stream-input.py)
+    writeConfigToStdin,
+    STREAM_MIN_ROWS,
+    STREAM_CHUNK_ROWS
 };
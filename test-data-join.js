@@ -0,0 +1,140 @@
+/**
+ * Test: Data Join (python/excel_data_join.js)
+ *
+ * - Doppelte Schlüssel in der Quelle: erstes Vorkommen zählt, weitere gezählt
+ * - Leere Schlüssel (null, '', nur Leerzeichen, 0) in Quelle und Ziel: kein Treffer
+ * - Schlüssel werden getrimmt und als String verglichen (1 == '1')
+ * - originalKeys: eigene Zuordnung über dieselbe Hash-Tabelle
+ * - Vorlage pro Spalte: häufigste Formatierung der getroffenen Quellzeilen,
+ *   bei Gleichstand die zuerst erreichte; fehlende Einträge zählen mit
+ * - rows der Vorlage: nur Zielzeilen mit Treffer
+ * - Ergebnis wie der frühere Join im Renderer (Map pro Zeile nachschlagen)
+ *
+ * Aufruf: node test-data-join.js
+ */
+
+const assert = require('assert');
+const {
+    joinKey, buildJoinTable, probeJoinTable, dominantValue, columnStyleTemplates, joinSheet
+} = require('./python/excel_data_join');
+
+function testKeys() {
+    assert.strictEqual(joinKey('  A-1 '), 'A-1');
+    assert.strictEqual(joinKey(17), '17');
+    for (const empty of [null, undefined, '', '   ', 0, false]) {
+        assert.strictEqual(joinKey(empty), '', `${JSON.stringify(empty)} ist kein Schlüssel`);
+    }
+
+    const source = [['k1', 'a'], [' k2', 'b'], ['k1', 'c'], [null, 'd'], ['   ', 'e'], ['k2 ', 'f'], [3, 'g'], null];
+    const { table, duplicateKeys } = buildJoinTable(source, 0);
+    assert.strictEqual(duplicateKeys, 2, 'k1 und k2 doppelt');
+    assert.deepStrictEqual([...table.entries()], [['k1', 0], ['k2', 1], ['3', 6]], 'erstes Vorkommen zählt');
+
+    const probe = probeJoinTable(table, ['k2', '', 'x', 'k1', '3', 3, '  ', null, 'K1']);
+    assert.deepStrictEqual([...probe.rows], [1, -1, -1, 0, 6, 6, -1, -1, -1]);
+    assert.strictEqual(probe.matched, 4);
+    assert.strictEqual(probe.emptyKeys, 3);
+    assert.strictEqual(probe.unmatched, 2, "'x' und 'K1' (Groß-/Kleinschreibung zählt)");
+    console.log('✓ Schlüssel: doppelt -> erstes Vorkommen, leer -> kein Treffer, getrimmt');
+}
+
+function testOriginalKeys() {
+    const sheet = { data: [['Key', 'Wert'], ['a', 1], ['b', 2], ['a', 3]] };
+    const join = joinSheet(sheet, 0, ['b', 'a', 'c'], { originalKeys: ['a', '', 'b', 'b'] });
+    assert.deepStrictEqual([...join.rows], [1, 0, -1]);
+    assert.deepStrictEqual([...join.originalRows], [0, -1, 1, 1]);
+    assert.deepStrictEqual(join.stats, {
+        targetRows: 3, sourceRows: 3, matched: 2, unmatched: 1, emptyKeys: 0, duplicateKeys: 1
+    }, 'Statistik nur über die Zielschlüssel, Header nicht als Quellzeile');
+    assert.strictEqual(joinSheet(sheet, 0, ['a']).originalRows, null, 'ohne originalKeys keine Zuordnung');
+    assert.deepStrictEqual(joinSheet(sheet, 0, ['a']).templates, {}, 'ohne Spalten keine Vorlagen');
+    console.log('✓ originalKeys über dieselbe Hash-Tabelle');
+}
+
+function testDominantValue() {
+    const yellow = { fill: '#FFFF00' };
+    const red = { fill: '#FF0000' };
+    // Zeilen-Keys inkl. Header: Datenzeile i -> i + 1
+    const styles = { '1-0': yellow, '2-0': red, '3-0': red, '4-0': yellow, '6-0': yellow };
+
+    assert.deepStrictEqual(dominantValue(styles, [0, 1, 2, 3, 5], 0), yellow, '3x gelb gegen 2x rot');
+    // Gleichstand: die zuerst erreichte Anzahl gewinnt (Reihenfolge der Quellzeilen)
+    assert.deepStrictEqual(dominantValue(styles, [0, 1, 2, 3], 0), red, 'rot erreicht 2 zuerst');
+    assert.deepStrictEqual(dominantValue(styles, [3, 0, 1, 2], 0), yellow, 'gelb erreicht 2 zuerst');
+    assert.deepStrictEqual(dominantValue(styles, [1, 0], 0), red);
+    // Fehlende Einträge zählen mit: Gleichstand mit "ohne Format" -> zuerst erreicht
+    assert.strictEqual(dominantValue(styles, [4, 0], 0), null, 'ohne Eintrag zuerst');
+    assert.deepStrictEqual(dominantValue(styles, [0, 4], 0), yellow);
+    assert.strictEqual(dominantValue(styles, [4, 6, 0], 0), null, 'Mehrheit ohne Format');
+    // Gleiche Objekte aus verschiedenen Zellen zählen zusammen (JSON-Vergleich)
+    assert.deepStrictEqual(dominantValue({ '1-0': { a: 1 }, '2-0': { a: 1 }, '3-0': 'x' }, [2, 0, 1], 0), { a: 1 });
+    assert.strictEqual(dominantValue(undefined, [0], 0), null);
+    assert.strictEqual(dominantValue(styles, [], 0), null);
+    console.log('✓ dominantValue: Mehrheit, Gleichstand -> zuerst erreicht, fehlende Einträge zählen');
+}
+
+function testTemplates() {
+    const sheet = {
+        data: [['Key', 'Preis', 'Notiz'], ['a', 1, 'x'], ['b', 2, 'y'], ['c', 3, 'z'], ['d', 4, 'w']],
+        cellStyles: { '0-1': { fill: '#CCCCCC' }, '1-1': { fill: '#FFFF00' }, '2-1': { fill: '#FFFF00' },
+                      '3-1': { fill: '#FF0000' }, '4-1': { fill: '#FF0000' } },
+        cellFonts: { '1-2': { bold: true } },
+        numberFormats: { '1-1': '0.00', '2-1': '0.00', '3-1': '0.00' }
+    };
+    // Ziel trifft a, b, b, c - d nicht; die rote Einzelzelle (c) fällt weg
+    const join = joinSheet(sheet, 0, ['b', 'x', 'a', '', 'b', 'c'], { columns: [1, 2] });
+    const price = join.templates[1];
+    assert.deepStrictEqual(price.style, { fill: '#FFFF00' });
+    assert.strictEqual(price.numberFormat, '0.00');
+    assert.strictEqual(price.font, null);
+    assert.deepStrictEqual(price.headerStyle, { fill: '#CCCCCC' });
+    assert.deepStrictEqual(price.rows, [0, 2, 4, 5], 'Vorlage nur für Zielzeilen mit Treffer');
+
+    const note = join.templates[2];
+    assert.strictEqual(note.font, null, 'fett nur in einer von drei getroffenen Quellzeilen');
+    assert.strictEqual(note.style, null);
+    assert.strictEqual(note.headerStyle, null);
+    assert.deepStrictEqual(note.rows, price.rows);
+
+    // Keine Treffer: leere Vorlage, keine Zeilen
+    const none = columnStyleTemplates(sheet, Int32Array.from([-1, -1]), [1]);
+    assert.deepStrictEqual(none[1], { style: null, font: null, numberFormat: null,
+                                      headerStyle: { fill: '#CCCCCC' }, rows: [] });
+    console.log('✓ Vorlagen: häufigste Formatierung, Einzelzellen fallen weg, rows = Trefferzeilen');
+}
+
+function legacyJoin(sourceData, sourceKeyIndex, targetKeys) {
+    // Früher im Renderer: Map über alle Quellzeilen (letztes Vorkommen gewinnt beim Wert)
+    const map = new Map();
+    sourceData.forEach((row, index) => {
+        const key = String(row[sourceKeyIndex] || '').trim();
+        if (key) map.set(key, index);
+    });
+    return targetKeys.map(value => {
+        const key = String(value || '').trim();
+        return key && map.has(key) ? map.get(key) : -1;
+    });
+}
+
+function testRandomAgainstLegacy() {
+    let seed = 7;
+    const random = () => (seed = (seed * 1103515245 + 12345) % 2147483648) / 2147483648;
+    const keys = ['', ' ', null, 0, ...Array.from({ length: 40 }, (_, i) => (i % 3 ? `K${i}` : i))];
+    for (let round = 0; round < 50; round++) {
+        // Eindeutige Quellschlüssel: dann gleicht der Join dem alten genau
+        const unique = [...new Set(keys.map(joinKey).filter(Boolean))].filter(() => random() < 0.6);
+        const sourceRows = unique.map((key, i) => [random() < 0.5 ? ` ${key} ` : key, i]);
+        const targetKeys = Array.from({ length: 60 }, () => keys[Math.floor(random() * keys.length)]);
+        const join = joinSheet({ data: [['Key', 'Nr'], ...sourceRows] }, 0, targetKeys);
+        assert.deepStrictEqual([...join.rows], legacyJoin(sourceRows, 0, targetKeys), `Runde ${round}`);
+        assert.strictEqual(join.stats.duplicateKeys, 0);
+    }
+    console.log('✓ Ohne doppelte Schlüssel identisch mit dem früheren Renderer-Join');
+}
+
+testKeys();
+testOriginalKeys();
+testDominantValue();
+testTemplates();
+testRandomAgainstLegacy();
+console.log('\nAlle Tests erfolgreich');
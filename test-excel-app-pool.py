@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Test: Excel App Pool (python/excel_app_pool.py) mit dem Fake-Backend
+
+Prüft ohne Excel: Wiederverwendung warmer Instanzen, Recycling nach N
+Operationen und über der Speichergrenze, Crash-Recovery, Workbook-Isolation,
+Begrenzung paralleler Ausleihen und den Worker-Prozess (--backend fake).
+
+Aufruf: python3 test-excel-app-pool.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BASE_DIR, 'python'))
+from excel_app_pool import ExcelAppPool, FakeAppBackend
+
+
+def test_reuse():
+    backend = FakeAppBackend()
+    pool = ExcelAppPool(backend, size=1, max_uses=0, max_memory_mb=None)
+    for i in range(20):
+        with pool.lease() as app:
+            book = app.books.open(f'datei-{i}.xlsx')
+            book.close()
+    stats = pool.get_stats()
+    assert len(backend.started) == 1, stats
+    assert stats['starts'] == 1 and stats['reuses'] == 19 and stats['leases'] == 20, stats
+    assert backend.started[0].opened == 20
+    pool.shutdown()
+    assert backend.quit_count == 1 and backend.kill_count == 0
+    print('✓ 20 Operationen mit einer Excel-Instanz (1 Start, 19 Wiederverwendungen)')
+
+
+def test_recycle_after_uses():
+    backend = FakeAppBackend()
+    pool = ExcelAppPool(backend, size=1, max_uses=5, max_memory_mb=None)
+    for _ in range(12):
+        with pool.lease():
+            pass
+    stats = pool.get_stats()
+    assert stats['starts'] == 3 and stats['recycled'] == 2, stats
+    assert backend.quit_count == 2, 'recycelte Instanzen werden regulär beendet'
+    pool.shutdown()
+    print('✓ Recycling nach max_uses (12 Operationen, max 5 -> 3 Starts)')
+
+
+def test_recycle_on_memory():
+    backend = FakeAppBackend()
+    pool = ExcelAppPool(backend, size=1, max_uses=0, max_memory_mb=500)
+    with pool.lease():
+        pass
+    with pool.lease() as app:
+        app.memory = 800 * 1024 * 1024  # Excel ist gewachsen
+    with pool.lease():
+        pass
+    stats = pool.get_stats()
+    assert stats['starts'] == 2 and stats['recycled'] == 1, stats
+    pool.shutdown()
+    print('✓ Recycling über der Speichergrenze')
+
+
+def test_crash_recovery():
+    backend = FakeAppBackend()
+    pool = ExcelAppPool(backend, size=1, max_uses=0, max_memory_mb=None)
+
+    # Absturz zwischen zwei Operationen: Health-Check beim Ausleihen
+    with pool.lease() as app:
+        first = app
+    first.crash()
+    with pool.lease() as app:
+        assert app is not first, 'abgestürzte Instanz darf nicht ausgeliehen werden'
+        second = app
+    assert backend.kill_count == 1
+
+    # Absturz während einer Operation: Instanz wird bei Rückgabe verworfen
+    try:
+        with pool.lease() as app:
+            app.crash()
+            app.books.open('x.xlsx')
+    except RuntimeError:
+        pass
+    with pool.lease() as app:
+        assert app is not second
+        third = app
+
+    # Fehler ohne Absturz (z.B. Sheet fehlt): Instanz bleibt im Pool
+    try:
+        with pool.lease():
+            raise ValueError('Sheet nicht gefunden')
+    except ValueError:
+        pass
+    with pool.lease() as app:
+        assert app is third
+
+    stats = pool.get_stats()
+    assert stats['crashes'] == 2 and stats['starts'] == 3, stats
+    pool.shutdown()
+    print('✓ Crash-Recovery: tote Instanzen werden ersetzt, gesunde nach Fehler behalten')
+
+
+def test_workbook_isolation():
+    backend = FakeAppBackend()
+    pool = ExcelAppPool(backend, size=1, max_uses=0, max_memory_mb=None)
+    with pool.lease() as app:
+        app.books.open('vergessen.xlsx')
+        app.books.open('auch-vergessen.xlsx', read_only=True)
+    with pool.lease() as app:
+        assert len(app.books) == 0, 'Workbooks der vorherigen Ausleihe sind noch offen'
+    assert pool.get_stats()['strayBooksClosed'] == 2
+
+    # Auch über acquire()/release() (so verwenden Reader und Writer den Pool)
+    lease = pool.acquire()
+    lease.app.books.open('writer.xlsx')
+    lease.release(failed=True)
+    assert len(backend.started[0].books) == 0
+
+    # Schon vor der Ausleihe offene Workbooks bleiben offen - obwohl jede
+    # Abfrage (wie bei xlwings) neue Book-Wrapper liefert
+    app = backend.started[0]
+    kept = app.books.open('vorher.xlsx')
+    assert next(iter(app.books)) is not next(iter(app.books))
+    with pool.lease() as leased:
+        leased.books.open('vergessen.xlsx')
+    assert [book.name for book in app.books] == ['vorher.xlsx'] and not kept.closed
+    assert pool.get_stats()['strayBooksClosed'] == 4
+    pool.shutdown()
+    print('✓ Workbook-Isolation: offene Workbooks werden bei Rückgabe geschlossen, vorherige bleiben')
+
+
+def test_concurrency():
+    backend = FakeAppBackend(start_delay=0.05)
+    pool = ExcelAppPool(backend, size=2, max_uses=0, max_memory_mb=None)
+    active = []
+    peak = [0]
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(5):
+            with pool.lease() as app:
+                with lock:
+                    active.append(app)
+                    peak[0] = max(peak[0], len(active))
+                    assert len(set(map(id, active))) == len(active), 'Instanz doppelt ausgeliehen'
+                time.sleep(0.01)
+                with lock:
+                    active.remove(app)
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = pool.get_stats()
+    assert peak[0] <= 2 and stats['starts'] == 2, (peak, stats)
+    assert stats['leases'] == 30 and stats['leased'] == 0, stats
+    pool.shutdown()
+    print(f'✓ 6 Threads x 5 Operationen über 2 Instanzen (max. {peak[0]} gleichzeitig)')
+
+
+def test_worker_process():
+    script = os.path.join(BASE_DIR, 'python', 'excel_xlwings_worker.py')
+    proc = subprocess.Popen([sys.executable, script, '--backend', 'fake', '--pool-size', '2'],
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+
+    def request(cmd):
+        proc.stdin.write(json.dumps(cmd) + '\n')
+        proc.stdin.flush()
+        return json.loads(proc.stdout.readline())
+
+    try:
+        ping = request({'id': 1, 'action': 'ping'})
+        assert ping['success'] and ping['backend'] == 'fake' and ping['id'] == 1, ping
+        warm = request({'id': 2, 'action': 'warmUp'})
+        assert warm['stats']['starts'] == 2 and warm['stats']['idle'] == 2, warm
+        read = request({'id': 3, 'action': 'readSheet', 'filePath': 'x.xlsx'})
+        assert not read['success'] and read['id'] == 3, read
+        assert request({'id': 4, 'action': 'quit'})['success']
+        assert proc.wait(timeout=5) == 0
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+    print('✓ Worker-Prozess: ping, warmUp, Fehler pro Anfrage, quit')
+
+
+def main():
+    test_reuse()
+    test_recycle_after_uses()
+    test_recycle_on_memory()
+    test_crash_recovery()
+    test_workbook_isolation()
+    test_concurrency()
+    test_worker_process()
+    print('\nAlle Tests erfolgreich')
+
+
+if __name__ == '__main__':
+    main()
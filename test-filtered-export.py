@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Test: Export nur markierter/gefilterter Zeilen (python/excel_filtered_export.py)
+
+Die Testmappe wird direkt als XML gebaut (mit echter sharedStrings.xml inkl.
+Rich-Text-Eintrag, calcChain.xml und _xlnm._FilterDatabase), damit jeder Teil
+kontrolliert ist. Geprüft werden:
+
+- fortlaufende Zeilennummern (r an <row> und <c>), Kopfzeile bleibt Zeile 1
+- sharedStrings.xml nur noch mit verwendeten Einträgen, neu nummeriert -
+  auch in den anderen Sheets
+- verbundene Zellen, bedingte Formatierung, Datenüberprüfung, autoFilter,
+  dimension und _xlnm._FilterDatabase umgerechnet bzw. entfernt
+- calcChain.xml samt Beziehung und Override entfernt
+- Formeln behalten ihre alten Zeilenbezüge (wie im Modul dokumentiert:
+  "Formeln bleiben unverändert stehen"), gemeinsame Formeln werden zum Wert
+- Prädikat (Flag-Spalte) und explizite Zeilen liefern dasselbe Ergebnis,
+  die Quelldatei bleibt unverändert
+
+Aufruf:
+    python3 test-filtered-export.py
+"""
+
+import os
+import re
+import shutil
+import sys
+import tempfile
+import zipfile
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+from openpyxl import load_workbook
+
+from excel_filtered_export import export_filtered_rows
+
+NS_MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+NS = {'m': NS_MAIN}
+
+# Shared Strings der Quelle (Index = Position)
+SHARED = ['Nur gelöscht', 'Flag', 'Name', 'Wert', 'x', 'Anna', 'Bernd', 'Clara', 'Dora', 'Emil',
+          'Frieda', 'Gustav', 'Nur Blatt 2', 'Formel']
+# Datenzeilen 2..9: (Flag, Name-Index, Wert); markiert sind 3, 5 und 8
+DATA = {2: (None, 0, 10), 3: (4, 5, 20), 4: (None, 6, 30), 5: (4, 7, 40),
+        6: (None, 8, 50), 7: (None, 9, 60), 8: (4, 10, 70), 9: (None, 11, 80)}
+KEPT = [3, 5, 8]
+
+CONTENT_TYPES = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">\
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>\
+<Default Extension="xml" ContentType="application/xml"/>\
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>\
+<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>\
+<Override PartName="/xl/worksheets/sheet2.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>\
+<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>\
+<Override PartName="/xl/sharedStrings.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>\
+<Override PartName="/xl/calcChain.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.calcChain+xml"/>\
+</Types>'''
+
+ROOT_RELS = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">\
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>\
+</Relationships>'''
+
+WORKBOOK = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" \
+xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">\
+<sheets><sheet name="Daten" sheetId="1" r:id="rId1"/><sheet name="Andere" sheetId="2" r:id="rId2"/></sheets>\
+<definedNames><definedName name="_xlnm._FilterDatabase" localSheetId="0" hidden="1">Daten!$A$1:$D$9</definedName>\
+<definedName name="Summe">Daten!$C$2:$C$9</definedName></definedNames>\
+<calcPr calcId="191029"/></workbook>'''
+
+WORKBOOK_RELS = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">\
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>\
+<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet2.xml"/>\
+<Relationship Id="rId3" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>\
+<Relationship Id="rId4" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" Target="sharedStrings.xml"/>\
+<Relationship Id="rId5" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/calcChain" Target="calcChain.xml"/>\
+</Relationships>'''
+
+STYLES = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">\
+<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font><font><b/><sz val="11"/><name val="Calibri"/></font></fonts>\
+<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>\
+<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>\
+<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>\
+<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>\
+<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>\
+<cellStyles count="1"><cellStyle name="Standard" xfId="0" builtinId="0"/></cellStyles>\
+<dxfs count="1"><dxf><font><b/></font></dxf></dxfs></styleSheet>'''
+
+CALC_CHAIN = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<calcChain xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">\
+<c r="D2" i="1"/><c r="D5"/><c r="D6"/><c r="D8"/></calcChain>'''
+
+
+def shared_strings_xml():
+    items = []
+    for text in SHARED:
+        if text == 'Formel':
+            # Rich Text mit Phonetik - wird unverändert übernommen
+            items.append('<si><r><rPr><b/></rPr><t>Form</t></r><r><t>el</t></r><rPh sb="0" eb="1"><t>ふ</t></rPh></si>')
+        else:
+            items.append(f'<si><t>{text}</t></si>')
+    return ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<sst xmlns="{NS_MAIN}" count="99" uniqueCount="{len(SHARED)}">' + ''.join(items) + '</sst>')
+
+
+def sheet1_xml():
+    rows = ['<row r="1" spans="1:6"><c r="A1" s="1" t="s"><v>1</v></c><c r="B1" s="1" t="s"><v>2</v></c>'
+            '<c r="C1" s="1" t="s"><v>3</v></c><c r="D1" s="1" t="s"><v>13</v></c></row>']
+    for number, (flag, name, value) in DATA.items():
+        cells = []
+        if flag is not None:
+            cells.append(f'<c r="A{number}" t="s"><v>{flag}</v></c>')
+        cells.append(f'<c r="B{number}" t="s"><v>{name}</v></c>')
+        cells.append(f'<c r="C{number}"><v>{value}</v></c>')
+        if number == 5:
+            cells.append(f'<c r="D5"><f t="shared" ref="D5:D6" si="0">C5*3</f><v>{value * 3}</v></c>')
+        elif number == 6:
+            cells.append(f'<c r="D6"><f t="shared" si="0"/><v>{value * 3}</v></c>')
+        else:
+            cells.append(f'<c r="D{number}"><f>C{number}*2</f><v>{value * 2}</v></c>')
+        rows.append(f'<row r="{number}" spans="1:6">' + ''.join(cells) + '</row>')
+    return ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<worksheet xmlns="{NS_MAIN}"><dimension ref="A1:F9"/><sheetData>' + ''.join(rows) + '</sheetData>'
+            '<autoFilter ref="A1:D9"/>'
+            '<mergeCells count="4"><mergeCell ref="E1:F1"/><mergeCell ref="B3:C3"/>'
+            '<mergeCell ref="B4:B5"/><mergeCell ref="E8:F9"/></mergeCells>'
+            '<conditionalFormatting sqref="C2:C9"><cfRule type="cellIs" dxfId="0" priority="1" operator="greaterThan">'
+            '<formula>25</formula></cfRule></conditionalFormatting>'
+            '<conditionalFormatting sqref="E4"><cfRule type="cellIs" dxfId="0" priority="2" operator="equal">'
+            '<formula>1</formula></cfRule></conditionalFormatting>'
+            '<conditionalFormatting sqref="C5 C7"><cfRule type="cellIs" dxfId="0" priority="3" operator="equal">'
+            '<formula>0</formula></cfRule></conditionalFormatting>'
+            '<dataValidations count="1"><dataValidation type="list" sqref="A2:A9"><formula1>"x"</formula1>'
+            '</dataValidation></dataValidations></worksheet>')
+
+
+def sheet2_xml():
+    # Verwendet einen String, der in Blatt 1 nur in entfernten Zeilen steht
+    return ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<worksheet xmlns="{NS_MAIN}"><dimension ref="A1:B2"/><sheetData>'
+            '<row r="1"><c r="A1" t="s"><v>6</v></c><c r="B1" t="s"><v>12</v></c></row>'
+            '<row r="2"><c r="A2" t="s"><v>5</v></c><c r="B2"><f>Daten!C3</f><v>20</v></c></row>'
+            '</sheetData></worksheet>')
+
+
+def create_workbook(path):
+    parts = {
+        '[Content_Types].xml': CONTENT_TYPES,
+        '_rels/.rels': ROOT_RELS,
+        'xl/workbook.xml': WORKBOOK,
+        'xl/_rels/workbook.xml.rels': WORKBOOK_RELS,
+        'xl/styles.xml': STYLES,
+        'xl/sharedStrings.xml': shared_strings_xml(),
+        'xl/calcChain.xml': CALC_CHAIN,
+        'xl/worksheets/sheet1.xml': sheet1_xml(),
+        'xl/worksheets/sheet2.xml': sheet2_xml(),
+    }
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, text in parts.items():
+            zf.writestr(name, text.encode('utf-8'))
+
+
+def read_part(path, name):
+    with zipfile.ZipFile(path) as zf:
+        return zf.read(name).decode('utf-8')
+
+
+def shared_texts(path):
+    """Texte der <si>-Einträge (ohne Phonetik) und das <sst>-Element"""
+    root = ET.fromstring(read_part(path, 'xl/sharedStrings.xml'))
+    texts = [''.join(t.text or '' for t in si.findall('m:t', NS) + si.findall('m:r/m:t', NS))
+             for si in root.findall('m:si', NS)]
+    return texts, root
+
+
+def check_export(source, output):
+    sheet = read_part(output, 'xl/worksheets/sheet1.xml')
+    root = ET.fromstring(sheet)
+
+    # Zeilen: Kopfzeile unverändert, Treffer 3/5/8 als 2/3/4, Zellreferenzen mit
+    rows = root.findall('m:sheetData/m:row', NS)
+    assert [row.get('r') for row in rows] == ['1', '2', '3', '4']
+    for row in rows:
+        assert all(re.sub(r'[A-Z]+', '', c.get('r')) == row.get('r') for c in row.findall('m:c', NS))
+    # Kopfzeile: nur die Shared-String-Indizes sind neu (Flag 1 -> 0, ..., Formel 13 -> 3)
+    source_header = re.search(r'<row r="1".*?</row>', read_part(source, 'xl/worksheets/sheet1.xml')).group(0)
+    remapped = {'1': '0', '2': '1', '3': '2', '13': '3'}
+    assert re.sub(r'<v>(\d+)</v>', lambda m: f'<v>{remapped[m.group(1)]}</v>', source_header) in sheet
+
+    # Werte über die neuen Shared-String-Indizes (openpyxl liest sharedStrings.xml)
+    wb = load_workbook(output)
+    ws = wb['Daten']
+    # C2 liegt in der verbundenen Zelle B2:C2 (openpyxl liefert dort None)
+    assert [[c.value for c in row] for row in ws.iter_rows(min_row=1, max_row=4, max_col=3)] == [
+        ['Flag', 'Name', 'Wert'], ['x', 'Anna', None], ['x', 'Clara', 40], ['x', 'Frieda', 70]]
+    assert '<c r="C2"><v>20</v></c>' in sheet
+    assert ws.max_row == 4
+    other = wb['Andere']
+    assert [[c.value for c in row] for row in other.iter_rows(max_col=2)] == [
+        ['Bernd', 'Nur Blatt 2'], ['Anna', '=Daten!C3']]
+
+    # sharedStrings.xml: nur verwendete Einträge in Reihenfolge der ersten Verwendung
+    texts, sst = shared_texts(output)
+    assert texts == ['Flag', 'Name', 'Wert', 'Formel', 'x', 'Anna', 'Clara', 'Frieda', 'Bernd', 'Nur Blatt 2'], texts
+    assert sst.get('uniqueCount') == '10' and sst.get('count') == '13', dict(sst.attrib)
+    assert '<rPh sb="0" eb="1"><t>ふ</t></rPh>' in read_part(output, 'xl/sharedStrings.xml'), 'Rich Text verändert'
+    other_xml = read_part(output, 'xl/worksheets/sheet2.xml')
+    assert '<c r="A1" t="s"><v>8</v></c><c r="B1" t="s"><v>9</v></c>' in other_xml
+    assert '<f>Daten!C3</f>' in other_xml
+
+    # Formeln behalten ihre alten Zeilenbezüge (dokumentiertes Verhalten):
+    # D8 steht jetzt in Zeile 4, rechnet aber weiter mit C8
+    assert '<c r="D4"><f>C8*2</f><v>140</v></c>' in sheet
+    # Gemeinsame Formel (Master D5, Folgezelle D6 entfällt): nur der Wert bleibt
+    assert '<c r="D3"><v>120</v></c>' in sheet
+    assert 't="shared"' not in sheet
+
+    # dimension, autoFilter, verbundene Zellen, bedingte Formatierung, Datenüberprüfung
+    assert root.find('m:dimension', NS).get('ref') == 'A1:F4'
+    assert root.find('m:autoFilter', NS).get('ref') == 'A1:D4'
+    merges = root.find('m:mergeCells', NS)
+    assert [m.get('ref') for m in merges.findall('m:mergeCell', NS)] == ['E1:F1', 'B2:C2']
+    assert merges.get('count') == '2'
+    assert [cf.get('sqref') for cf in root.findall('m:conditionalFormatting', NS)] == ['C2:C4', 'C3']
+    validations = root.find('m:dataValidations', NS)
+    assert validations.find('m:dataValidation', NS).get('sqref') == 'A2:A4' and validations.get('count') == '1'
+
+    # _xlnm._FilterDatabase folgt dem autoFilter, andere Namen bleiben
+    workbook = read_part(output, 'xl/workbook.xml')
+    assert '<definedName name="_xlnm._FilterDatabase" localSheetId="0" hidden="1">Daten!$A$1:$D$4</definedName>' in workbook
+    assert '<definedName name="Summe">Daten!$C$2:$C$9</definedName>' in workbook
+
+    # calcChain entfernt: Teil, Beziehung und Override
+    with zipfile.ZipFile(output) as zf:
+        assert 'xl/calcChain.xml' not in zf.namelist()
+    assert 'calcChain' not in read_part(output, 'xl/_rels/workbook.xml.rels')
+    assert 'calcChain' not in read_part(output, '[Content_Types].xml')
+    return sheet
+
+
+def test_export(base_dir):
+    source = os.path.join(base_dir, 'Quelle.xlsx')
+    create_workbook(source)
+    with open(source, 'rb') as f:
+        original = f.read()
+
+    by_flag = os.path.join(base_dir, 'Flag.xlsx')
+    result = export_filtered_rows(source, by_flag, 'Daten', flag_column='A', flag_values=['x'])
+    assert result['success'], result.get('error')
+    assert result['sourceRows'] == 8 and result['keptRows'] == 3 and result['lastRow'] == 4, result
+    assert result['sharedStrings'] == 10 and result['removedSharedStrings'] == 4, result
+    sheet = check_export(source, by_flag)
+    print('✓ Flag-Spalte: Zeilen neu nummeriert, Shared Strings gekürzt und in allen Sheets umgestellt')
+    print('✓ Verbundene Zellen, bedingte Formatierung, autoFilter und _FilterDatabase umgerechnet, calcChain entfernt')
+    print('✓ Formeln behalten ihre alten Zeilenbezüge, gemeinsame Formeln werden zum Wert')
+
+    # Explizite Datenzeilen (0-basiert ab Zeile 2) - identisches Ergebnis
+    by_rows = os.path.join(base_dir, 'Zeilen.xlsx')
+    result = export_filtered_rows(source, by_rows, 'Daten', rows=[number - 2 for number in KEPT])
+    assert result['success'] and result['keptRows'] == 3, result
+    assert check_export(source, by_rows) == sheet
+    for name in ('xl/sharedStrings.xml', 'xl/worksheets/sheet2.xml', 'xl/workbook.xml'):
+        assert read_part(by_rows, name) == read_part(by_flag, name), name
+    print('✓ Explizite Zeilen liefern dasselbe Ergebnis wie die Flag-Spalte')
+
+    # Ohne Treffer: nur die Kopfzeile, Bereiche entfallen bzw. bleiben beim Kopf
+    empty = os.path.join(base_dir, 'Leer.xlsx')
+    result = export_filtered_rows(source, empty, 'Daten', flag_column=1, flag_values=['gibt es nicht'])
+    assert result['success'] and result['keptRows'] == 0 and result['lastRow'] == 1, result
+    ws = load_workbook(empty)['Daten']
+    assert ws.max_row == 1 and ws['B1'].value == 'Name'
+    assert not re.search(r'<conditionalFormatting', read_part(empty, 'xl/worksheets/sheet1.xml'))
+    print('✓ Ohne Treffer bleibt nur die Kopfzeile')
+
+    # Fehler und unveränderte Quelle
+    assert export_filtered_rows(source, empty, 'Fehlt', rows=[0])['success'] is False
+    assert export_filtered_rows(source, empty, 'Daten', rows=[3, 1])['success'] is False
+    assert export_filtered_rows(source, empty, 'Daten')['success'] is False
+    with open(source, 'rb') as f:
+        assert f.read() == original, 'Quelldatei verändert'
+    print('✓ Fehlerfälle, Quelldatei unverändert')
+
+
+def main():
+    base_dir = tempfile.mkdtemp(prefix='filtered-export-test-')
+    try:
+        test_export(base_dir)
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+    print('\nAlle Tests erfolgreich')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Test: Formatierung per Data Join importierter Spalten (importedColumnStyles)
+
+Die Vorlage einer importierten Spalte gilt nur für die Zeilen mit Treffer
+(rows). Geprüft in beiden Writern:
+
+- openpyxl (python/excel_writer.py): FALL 2 (fullRewrite) und Pipeline
+  (Spalte eingefügt) über write_sheet - Trefferzeilen bekommen Füllung, Schrift
+  und Zahlenformat als gemeinsamen Style-Eintrag, Zeilen ohne Treffer bleiben
+  unformatiert, Zeilen-Highlights bleiben oben; Vorlage ohne rows (älterer
+  Stand) gilt für die ganze Spalte
+- xlwings (python/excel_writer_xlwings.py): gefälschtes Sheet zählt die
+  Aufrufe - gleiche Zeilen, ein Aufruf pro Eigenschaft und Mehrfachbereich,
+  Füllfarbe spart markierte Zeilen aus
+
+Aufruf:
+    python3 test-imported-column-styles.py
+"""
+
+import contextlib
+import io
+import os
+import re
+import shutil
+import sys
+import tempfile
+import types
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BASE_DIR, 'python'))
+from openpyxl import Workbook, load_workbook
+
+from excel_writer import write_sheet
+
+ROWS = 8
+MATCHED = [0, 2, 3, 6]
+HIGHLIGHTED = 3
+TEMPLATE = {
+    'style': {'fill': '#FFFF00', 'bold': True},
+    'font': {'color': '#C00000', 'size': 12},
+    'numberFormat': '0.00',
+    'headerStyle': None,
+    'rows': MATCHED + [ROWS + 5]  # außerhalb der Daten: ignoriert
+}
+
+
+def create_workbook(path):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Daten'
+    ws.append(['Key', 'Name'])
+    for i in range(ROWS):
+        ws.append([f'k{i}', f'Name {i}'])
+    wb.save(path)
+
+
+def joined_data():
+    return [[f'k{i}', i * 1.5 if i in MATCHED else '', f'Name {i}'] for i in range(ROWS)]
+
+
+def run_write(source, output, changes):
+    log = io.StringIO()
+    with contextlib.redirect_stderr(log):
+        result = write_sheet(source, output, 'Daten', changes)
+    assert result['success'], result
+    return log.getvalue()
+
+
+def column_state(path, col):
+    ws = load_workbook(path)['Daten']
+    state = []
+    for row in range(2, ROWS + 2):
+        cell = ws.cell(row=row, column=col)
+        fill = cell.fill.fgColor.rgb if cell.fill.fill_type == 'solid' else None
+        state.append((fill, bool(cell.font.bold), cell.font.color.rgb if cell.font.color else None,
+                      cell.number_format, cell.style_id))
+    return state
+
+
+def check_openpyxl_column(path, label, rows=MATCHED):
+    state = column_state(path, 2)
+    for row_idx, (fill, bold, color, number_format, _) in enumerate(state):
+        if row_idx in rows:
+            expected_fill = 'FF90EE90' if row_idx == HIGHLIGHTED else 'FFFFFF00'
+            assert fill == expected_fill, f'{label}: Zeile {row_idx} Füllung {fill}'
+            assert bold and color == 'FFC00000' and number_format == '0.00', f'{label}: Zeile {row_idx}'
+        else:
+            assert fill is None and not bold and number_format == 'General', \
+                f'{label}: Zeile {row_idx} ohne Treffer formatiert ({fill}, {bold}, {number_format})'
+    # Ein Style-Eintrag für alle nicht markierten Trefferzeilen
+    style_ids = {state[row_idx][4] for row_idx in rows if row_idx != HIGHLIGHTED}
+    assert len(style_ids) == 1, f'{label}: {len(style_ids)} Style-Einträge'
+
+
+def test_openpyxl(base_dir):
+    source = os.path.join(base_dir, 'Quelle.xlsx')
+    create_workbook(source)
+    headers = ['Key', 'Preis', 'Name']
+    highlights = {str(HIGHLIGHTED): 'green'}
+
+    # FALL 2: Daten schon mit eingefügter Spalte, fullRewrite
+    output = os.path.join(base_dir, 'fall2.xlsx')
+    log = run_write(source, output, {
+        'headers': headers, 'data': joined_data(), 'fullRewrite': True, 'structuralChange': True,
+        'importedColumnStyles': {'Preis': TEMPLATE}, 'rowHighlights': highlights
+    })
+    assert '[FALL 2]' in log and '[PIPELINE]' not in log
+    check_openpyxl_column(output, 'FALL 2')
+
+    # Pipeline: Spalte einfügen
+    output = os.path.join(base_dir, 'pipeline.xlsx')
+    log = run_write(source, output, {
+        'headers': headers, 'data': joined_data(), 'fullRewrite': True, 'structuralChange': True,
+        'insertedColumns': {'operations': [{'position': 1, 'count': 1, 'headers': ['Preis']}]},
+        'importedColumnStyles': {'Preis': TEMPLATE}, 'rowHighlights': highlights
+    })
+    assert 'Schritt 10b' in log, 'Pipeline-Pfad nicht durchlaufen'
+    check_openpyxl_column(output, 'Pipeline')
+
+    # Vorlage ohne rows (älterer Stand): ganze Spalte
+    legacy = {key: value for key, value in TEMPLATE.items() if key != 'rows'}
+    output = os.path.join(base_dir, 'alt.xlsx')
+    run_write(source, output, {
+        'headers': headers, 'data': joined_data(), 'fullRewrite': True, 'structuralChange': True,
+        'importedColumnStyles': {'Preis': legacy}, 'rowHighlights': highlights
+    })
+    check_openpyxl_column(output, 'ohne rows', rows=range(ROWS))
+
+    # Keine Trefferzeile: Spalte bleibt unformatiert
+    output = os.path.join(base_dir, 'leer.xlsx')
+    run_write(source, output, {
+        'headers': headers, 'data': joined_data(), 'fullRewrite': True, 'structuralChange': True,
+        'importedColumnStyles': {'Preis': dict(TEMPLATE, rows=[])}
+    })
+    assert all(fill is None and not bold for fill, bold, *_ in column_state(output, 2))
+    print('✓ openpyxl (FALL 2 und Pipeline): Vorlage nur auf Trefferzeilen, Highlight bleibt oben')
+
+
+# =============================================================================
+# xlwings mit gefälschtem Sheet
+# =============================================================================
+
+class FakeCell:
+    def __init__(self):
+        self.color = None
+        self.number_format = 'General'
+        self.font = types.SimpleNamespace(bold=False, italic=False, size=11, name='Calibri', color=None)
+
+
+class FakeRange:
+    """Mehrfachbereich einer Spalte ('B2:B2,B4:B5'); Eigenschaften gehen an alle Zellen"""
+
+    def __init__(self, sheet, address):
+        self.cells = []
+        for area in address.split(','):
+            match = re.fullmatch(r'([A-Z]+)(\d+):([A-Z]+)(\d+)', area)
+            column, first, _, last = match.groups()
+            self.cells += [sheet.cell(column, row) for row in range(int(first), int(last) + 1)]
+        self.font = _FontProxy(self.cells)
+
+    def __setattr__(self, name, value):
+        if name in ('color', 'number_format'):
+            for cell in self.cells:
+                setattr(cell, name, value)
+        else:
+            object.__setattr__(self, name, value)
+
+
+class _FontProxy:
+    def __init__(self, cells):
+        object.__setattr__(self, '_cells', cells)
+
+    def __setattr__(self, name, value):
+        for cell in self._cells:
+            setattr(cell.font, name, value)
+
+
+class FakeSheet:
+    def __init__(self):
+        self.cells = {}
+        self.addresses = []
+
+    def cell(self, column, row):
+        return self.cells.setdefault((column, row), FakeCell())
+
+    def range(self, address):
+        self.addresses.append(address)
+        return FakeRange(self, address)
+
+
+def test_xlwings():
+    module = types.ModuleType('xlwings')
+    module.App = lambda **kwargs: (_ for _ in ()).throw(RuntimeError('Im Test kein Excel'))
+    sys.modules['xlwings'] = module
+    import excel_writer_xlwings as writer
+    from excel_com_batch import ComBatcher
+
+    sheet = FakeSheet()
+    com = ComBatcher(sheet)
+    templates = {'Preis': TEMPLATE, 'Fehlt': TEMPLATE, 'Leer': dict(TEMPLATE, rows=[])}
+    writer._apply_imported_column_styles_xlwings(com, ['Key', 'Preis', 'Name', 'Leer'], templates, ROWS,
+                                                 {str(HIGHLIGHTED): 'green'})
+
+    for row_idx in range(ROWS):
+        cell = sheet.cell('B', row_idx + 2)
+        if row_idx in MATCHED:
+            expected_fill = None if row_idx == HIGHLIGHTED else (255, 255, 0)
+            assert cell.color == expected_fill, f'Zeile {row_idx}: Füllung {cell.color}'
+            assert cell.font.bold and cell.font.color == (192, 0, 0) and cell.font.size == 12
+            assert cell.number_format == '0.00'
+        else:
+            assert cell.color is None and not cell.font.bold and cell.number_format == 'General', \
+                f'Zeile {row_idx} ohne Treffer formatiert'
+    assert not [key for key in sheet.cells if key[0] != 'B'], 'andere Spalten verändert'
+
+    # Ein Aufruf pro Eigenschaft: Mehrfachbereich der Trefferzeilen (Excel-Zeilen 2, 4-5, 8)
+    assert com.calls == {'color': 1, 'font': 1, 'numberFormat': 1}, com.calls
+    assert sheet.addresses == ['B2:B2,B4:B4,B8:B8', 'B2:B2,B4:B5,B8:B8', 'B2:B2,B4:B5,B8:B8'], sheet.addresses
+
+    # Ohne rows: ganze Spalte
+    sheet = FakeSheet()
+    legacy = {key: value for key, value in TEMPLATE.items() if key != 'rows'}
+    writer._apply_imported_column_styles_xlwings(ComBatcher(sheet), ['Key', 'Preis'], {'Preis': legacy}, ROWS)
+    assert all(sheet.cell('B', row).color == (255, 255, 0) for row in range(2, ROWS + 2))
+    print('✓ xlwings: Vorlage nur auf Trefferzeilen, ein Aufruf pro Eigenschaft, Highlight ausgespart')
+
+
+def main():
+    base_dir = tempfile.mkdtemp(prefix='imported-styles-test-')
+    try:
+        test_openpyxl(base_dir)
+        test_xlwings()
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+    print('\nAlle Tests erfolgreich')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+/**
+ * Test + Benchmark für den Duplikat-Index (python/excel_key_index.js)
+ *
+ * Baut einen Index über 1.000.000 Schlüssel, lädt ihn von der Platte,
+ * trägt angehängte Zeilen nach und vergleicht die Batch-Abfrage einer
+ * Warteschlange mit der bisherigen linearen Suche (checkForDuplicate).
+ *
+ * Aufruf: node test-key-index.js
+ */
+const assert = require('assert');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { KeyIndex, KeyIndexStore } = require('./python/excel_key_index');
+
+const KEY_COUNT = 1000000;
+const QUEUE_SIZE = 200;
+
+// Bisherige Prüfung im Renderer (linear über alle Zeilen und Spalten ab Startspalte)
+function checkForDuplicateLinear(data, value, dataStartCol) {
+    const valueStr = String(value).toLowerCase().trim();
+    for (let i = 0; i < data.length; i++) {
+        const row = data[i];
+        for (let j = dataStartCol - 1; j < row.length; j++) {
+            if (row[j] && String(row[j]).toLowerCase().trim() === valueStr) {
+                return i + 2;
+            }
+        }
+    }
+    return null;
+}
+
+function timed(fn) {
+    const started = process.hrtime.bigint();
+    const result = fn();
+    return [result, Number(process.hrtime.bigint() - started) / 1e6];
+}
+
+async function test() {
+    const indexDir = fs.mkdtempSync(path.join(os.tmpdir(), 'key-index-test-'));
+    const targetFile = path.join(indexDir, 'Ziel.xlsx');
+    fs.writeFileSync(targetFile, 'v1');
+
+    try {
+        // Zieldaten: Flag-Spalte, Kommentar, Schlüssel ab Spalte 3 (Startspalte)
+        const data = [];
+        for (let i = 0; i < KEY_COUNT; i++) {
+            data.push(['', '', `AUF-${String(i).padStart(7, '0')}`, i % 7 === 0 ? 'Berlin' : 'München']);
+        }
+        const columns = { startColumn: 3 };
+
+        // Kleine Korrektheitsprüfungen
+        const small = KeyIndex.build([['x', '', ' Abc '], ['', '', 'abc', 42], ['', '', null, 0]], columns);
+        assert.strictEqual(small.lookup('ABC'), 2);
+        assert.strictEqual(small.lookup(42), 3);
+        assert.strictEqual(small.lookup('42'), 3);
+        assert.strictEqual(small.lookup('x'), null, 'Spalten vor der Startspalte zählen nicht');
+        assert.strictEqual(small.lookup(''), null);
+        small.add([['Neu', 5], ['abc', 9]]);
+        assert.strictEqual(small.lookup('neu'), 5);
+        assert.strictEqual(small.lookup('abc'), 2, 'Erstes Vorkommen bleibt erhalten');
+        const copy = KeyIndex.deserialize(small.serialize());
+        assert.deepStrictEqual(copy.lookupMany(['abc', 'NEU', '42', 'fehlt']), [2, 5, 3, null]);
+        console.log('✓ Normalisierung, Nachtragen, Serialisierung');
+
+        // Aufbau mit 1M Schlüsseln + Speichern
+        const store = new KeyIndexStore({ indexDir });
+        let buildMs = Date.now();
+        const built = await store.ensure(targetFile, 'Daten', columns, async () => data);
+        buildMs = Date.now() - buildMs;
+        const fileSize = fs.statSync(path.join(indexDir, fs.readdirSync(indexDir).find(n => n.endsWith('.idx')))).size;
+        assert.strictEqual(built.size, KEY_COUNT + 2);  // + 'Berlin', 'München'
+        console.log(`✓ Aufbau: ${built.size} Schlüssel in ${buildMs} ms, Index-Datei ${(fileSize / 1048576).toFixed(1)} MB`);
+
+        // Neue Sitzung: Laden von der Platte statt Neuaufbau
+        const fresh = new KeyIndexStore({ indexDir });
+        const [loaded, loadMs] = timed(() => fresh.get(targetFile, 'Daten', columns));
+        assert.ok(loaded, 'Index muss von der Platte geladen werden');
+        assert.strictEqual(fresh.stats.builds, 0);
+        console.log(`✓ Laden aus dem Index-Verzeichnis: ${loadMs.toFixed(1)} ms`);
+
+        // Warteschlange: Hälfte vorhanden (verteilt, auch am Ende), Hälfte neu
+        const queue = [];
+        for (let i = 0; i < QUEUE_SIZE; i++) {
+            queue.push(i % 2 === 0
+                ? `auf-${String(Math.floor(i * KEY_COUNT / QUEUE_SIZE)).padStart(7, '0')}`
+                : `NEU-${i}`);
+        }
+        const [batch, batchMs] = timed(() => loaded.lookupMany(queue));
+        const [linear, linearMs] = timed(() => queue.map(value => checkForDuplicateLinear(data, value, 3)));
+        assert.deepStrictEqual(batch, linear);
+        console.log(`✓ Warteschlange mit ${QUEUE_SIZE} Werten: Index ${batchMs.toFixed(2)} ms, linear ${linearMs.toFixed(0)} ms (${Math.round(linearMs / Math.max(batchMs, 0.01))}x)`);
+
+        // Zeilen angehängt: Index wird nachgetragen statt neu aufgebaut
+        const previous = `${fs.statSync(targetFile).size}:${fs.statSync(targetFile).mtimeMs}`;
+        fs.writeFileSync(targetFile, 'v2 - länger');
+        const appended = [['NEU-1', KEY_COUNT + 2], ['Hamburg', KEY_COUNT + 2]];
+        const [updated, updateMs] = timed(() => fresh.update(targetFile, 'Daten', columns, previous, appended));
+        assert.ok(updated);
+        const reloaded = new KeyIndexStore({ indexDir }).get(targetFile, 'Daten', columns);
+        assert.ok(reloaded, 'Nachgetragener Index passt zum neuen Dateistand');
+        assert.strictEqual(reloaded.lookup('neu-1'), KEY_COUNT + 2);
+        assert.strictEqual(reloaded.lookup('hamburg'), KEY_COUNT + 2);
+        assert.strictEqual(reloaded.lookup('auf-0000000'), 2);
+        console.log(`✓ Nachtragen von ${appended.length} Schlüsseln inkl. Speichern: ${updateMs.toFixed(1)} ms`);
+
+        // Fremde Änderung: Index ist ungültig und wird neu aufgebaut
+        fs.writeFileSync(targetFile, 'extern geändert');
+        assert.strictEqual(new KeyIndexStore({ indexDir }).get(targetFile, 'Daten', columns), null);
+        assert.strictEqual(fresh.update(targetFile, 'Daten', columns, previous, appended), false);
+        console.log('✓ Fremde Änderung macht den Index ungültig');
+
+        console.log('\nAlle Tests erfolgreich');
+    } finally {
+        fs.rmSync(indexDir, { recursive: true, force: true });
+    }
+}
+
+test().catch(e => {
+    console.error('Fehler:', e.message);
+    process.exit(1);
+});
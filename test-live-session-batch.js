@@ -0,0 +1,139 @@
+/**
+ * Microbenchmark: Befehle/Sekunde durch die Live-Session-Bridge
+ *
+ * Vergleicht einzeln gesendete Befehle (await pro Befehl), gepipelinte Befehle
+ * (alle sofort senden, Antworten über Request-ID) und einen batch-Befehl.
+ * Läuft mit dem Memory-Backend, also ohne Excel.
+ *
+ * Aufruf: node test-live-session-batch.js [anzahl]
+ */
+const assert = require('assert');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { execFileSync } = require('child_process');
+const { ExcelLiveSession } = require('./python/excel_live_bridge');
+const pythonBridge = require('./python/python_bridge');
+
+const COUNT = parseInt(process.argv[2], 10) || 2000;
+const ROWS = 5000;
+
+function createWorkbook(filePath, rows) {
+    const script = [
+        'import sys',
+        'from openpyxl import Workbook',
+        'wb = Workbook(); ws = wb.active; ws.title = "S"',
+        'ws.append(["h1", "h2", "h3"])',
+        `for i in range(${rows}): ws.append([f"r{i}", i, i * 1.5])`,
+        'wb.save(sys.argv[1])'
+    ].join('\n');
+    execFileSync(pythonBridge.getPythonPath(), ['-c', script, filePath]);
+}
+
+// Indizes bleiben unter ROWS - 10 (Test 3 löscht vorher einige Zeilen)
+function commandFor(i) {
+    return i % 2 === 0
+        ? { action: 'setCellValue', rowIndex: (i * 7) % (ROWS - 10), colIndex: i % 3, value: `v${i}` }
+        : { action: 'hideRow', rowIndex: (i * 13) % (ROWS - 10), hidden: i % 4 === 1 };
+}
+
+function report(label, elapsedMs) {
+    const opsPerSec = Math.round(COUNT / (elapsedMs / 1000));
+    console.log(`  ${label.padEnd(30)} ${String(Math.round(elapsedMs)).padStart(7)} ms  ${String(opsPerSec).padStart(9)} ops/s`);
+    return opsPerSec;
+}
+
+async function test() {
+    const baseDir = fs.mkdtempSync(path.join(os.tmpdir(), 'live-batch-test-'));
+    const sourceFile = path.join(baseDir, 'quelle.xlsx');
+    createWorkbook(sourceFile, ROWS);
+
+    // Bridge-Logs (console.log pro Befehl) nicht mitmessen
+    const originalLog = console.log;
+    const session = new ExcelLiveSession();
+    try {
+        console.log = () => {};
+        await session.start({ backend: 'memory' });
+        const ping = await session._sendCommand({ action: 'ping' });
+        let opened = await session.openFile(sourceFile, 'S');
+        console.log = originalLog;
+        assert.strictEqual(ping.backend, 'memory');
+        assert.ok(opened.success, opened.error);
+
+        // 1. Korrektheit: Pipelining liefert jede Antwort an den richtigen Aufrufer
+        const echoes = await Promise.all([0, 1, 2, 3, 4].map(i =>
+            session.setCellValue(i, 0, `p${i}`)));
+        echoes.forEach((result, i) => {
+            assert.strictEqual(result.row, i);
+            assert.strictEqual(result.value, `p${i}`);
+            assert.strictEqual(result.id, undefined, 'Request-ID ist intern');
+        });
+        console.log('✓ Pipelining: Antworten werden über die Request-ID zugeordnet');
+
+        // 2. Batch: Ergebnis pro Befehl, Reihenfolge wie gesendet, Fehler einzeln
+        const batch = await session.batch([
+            { action: 'setCellValue', rowIndex: 0, colIndex: 1, value: 'b0' },
+            { action: 'deleteRow', rowIndex: 999999 },
+            { action: 'getData' }
+        ]);
+        assert.strictEqual(batch.executed, 3);
+        assert.strictEqual(batch.failed, 1);
+        assert.strictEqual(batch.success, false);
+        assert.strictEqual(batch.results[0].value, 'b0');
+        assert.strictEqual(batch.results[1].success, false);
+        assert.strictEqual(batch.results[2].data[0][1], 'b0');
+
+        const stopped = await session.batch([
+            { action: 'deleteRow', rowIndex: 999999 },
+            { action: 'setCellValue', rowIndex: 0, colIndex: 1, value: 'nie' }
+        ], { stopOnError: true });
+        assert.strictEqual(stopped.executed, 1);
+        console.log('✓ batch: Ergebnis pro Befehl, stopOnError bricht ab');
+
+        // 3. Mehrfachauswahl löschen: ein Roundtrip, Indizes vom aktuellen Stand
+        const before = (await session.getData()).data;
+        const toDelete = [3, 10, 4, 200, 10];
+        console.log = () => {};
+        const deleted = await session.deleteRows(toDelete);
+        console.log = originalLog;
+        assert.ok(deleted.success, JSON.stringify(deleted));
+        const after = (await session.getData()).data;
+        const expected = before.filter((_, i) => ![3, 4, 10, 200].includes(i));
+        assert.deepStrictEqual(after, expected);
+        console.log('✓ deleteRows: Mehrfachauswahl in einem Roundtrip');
+
+        // 4. Benchmark
+        const commands = Array.from({ length: COUNT }, (_, i) => commandFor(i));
+        console.log(`\nBenchmark: ${COUNT} Befehle (setCellValue/hideRow), Memory-Backend\n`);
+
+        let started = process.hrtime.bigint();
+        for (const command of commands) {
+            await session._sendCommand(command);
+        }
+        const sequential = report('einzeln (await pro Befehl)', Number(process.hrtime.bigint() - started) / 1e6);
+
+        started = process.hrtime.bigint();
+        const pipelined = await Promise.all(commands.map(command => session._sendCommand(command)));
+        const pipelinedOps = report('gepipelined (Request-IDs)', Number(process.hrtime.bigint() - started) / 1e6);
+        assert.ok(pipelined.every(result => result.success), JSON.stringify(pipelined.find(result => !result.success)));
+
+        started = process.hrtime.bigint();
+        const batched = await session.batch(commands);
+        const batchedOps = report('batch (ein Roundtrip)', Number(process.hrtime.bigint() - started) / 1e6);
+        assert.ok(batched.success);
+        assert.strictEqual(batched.results.length, COUNT);
+
+        console.log(`\n  Faktor gepipelined: ${(pipelinedOps / sequential).toFixed(1)}x, batch: ${(batchedOps / sequential).toFixed(1)}x`);
+        console.log('\nAlle Tests erfolgreich');
+    } finally {
+        console.log = () => {};
+        await session.quit();
+        console.log = originalLog;
+        fs.rmSync(baseDir, { recursive: true, force: true });
+    }
+}
+
+test().catch(e => {
+    console.error('Fehler:', e.message);
+    process.exit(1);
+});
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Test: Versionierte Änderungen der Live-Session (python/excel_change_log.py,
+getChanges in excel_live_session.py)
+
+Ein Client hält einen getData-Stand mit Version und holt danach nur
+getChanges(sinceVersion). Die Deltas werden hier wie im Frontend auf den
+alten Stand angewendet - das Ergebnis muss dem aktuellen getData entsprechen:
+
+- Memory-Backend: zufällige Einzelbefehle, Abfrage von verschiedenen
+  Zwischenständen aus
+- Memory-Backend: zusammengefasste batch-Befehle (excel_op_coalescer)
+- Protokoll verdichtet (max_entries klein) bzw. Version unbekannt: Snapshot
+- Excel-Backend (gefälschtes Sheet mit Formel): Formeln werden neu berechnet,
+  daher Snapshot statt Zell-Deltas; ohne Änderung leere Deltas
+
+Aufruf:
+    python3 test-live-session-changes.py
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+from openpyxl import Workbook
+
+from excel_change_log import ChangeLog
+from excel_live_session import ExcelLiveSession
+from excel_memory_session import MemoryLiveSession
+
+ROWS = 30
+COLS = 5
+
+
+def create_workbook(path):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Daten'
+    ws.append([f'H{c}' for c in range(COLS)])
+    for r in range(ROWS):
+        ws.append([f'r{r}c{c}' for c in range(COLS)])
+    wb.save(path)
+
+
+def replay(headers, data, changes):
+    """Wendet getChanges-Deltas auf einen Client-Stand an (Semantik siehe excel_change_log.py)"""
+    headers = list(headers)
+    data = [list(row) for row in data]
+    for change in changes:
+        kind = change['type']
+        if kind == 'cells':
+            for row, col, value in change['cells']:
+                data[row][col] = value
+        elif kind == 'insertRows':
+            for _ in range(change['count']):
+                data.insert(change['index'], [None] * len(headers))
+        elif kind == 'deleteRows':
+            del data[change['index']]
+        elif kind == 'moveRow':
+            data.insert(change['to'], data.pop(change['from']))
+        elif kind == 'insertColumns':
+            index, count = change['index'], change['count']
+            new_headers = (change.get('headers') or [])[:count]
+            headers[index:index] = new_headers + [None] * (count - len(new_headers))
+            for row in data:
+                row[index:index] = [None] * count
+        elif kind == 'deleteColumns':
+            del headers[change['index']]
+            for row in data:
+                del row[change['index']]
+        elif kind == 'moveColumn':
+            headers.insert(change['to'], headers.pop(change['from']))
+            for row in data:
+                row.insert(change['to'], row.pop(change['from']))
+        elif kind not in ('hideRow', 'hideColumn', 'highlightRow'):
+            raise AssertionError(f'Unbekannter Delta-Typ {kind}')
+    return headers, data
+
+
+def random_command(rng, rows, cols, step):
+    kind = rng.random()
+    if kind < 0.3:
+        return {'action': 'setCellValue', 'rowIndex': rng.randrange(rows), 'colIndex': rng.randrange(cols),
+                'value': rng.choice([f'v{step}', step, step * 0.5, None, True])}
+    if kind < 0.4 and rows > 5:
+        return {'action': 'deleteRow', 'rowIndex': rng.randrange(rows)}
+    if kind < 0.5:
+        return {'action': 'insertRow', 'rowIndex': rng.randint(0, rows), 'count': rng.randint(1, 2)}
+    if kind < 0.6:
+        return {'action': 'moveRow', 'fromIndex': rng.randrange(rows), 'toIndex': rng.randrange(rows)}
+    if kind < 0.65 and cols > 2:
+        return {'action': 'deleteColumn', 'colIndex': rng.randrange(cols)}
+    if kind < 0.72:
+        count = rng.randint(1, 2)
+        return {'action': 'insertColumn', 'colIndex': rng.randint(0, cols), 'count': count,
+                'headers': [f'N{step}_{i}' for i in range(rng.randint(0, count))]}
+    if kind < 0.8:
+        return {'action': 'moveColumn', 'fromIndex': rng.randrange(cols), 'toIndex': rng.randrange(cols)}
+    if kind < 0.87:
+        return {'action': 'hideRow', 'rowIndex': rng.randrange(rows), 'hidden': rng.random() < 0.7}
+    if kind < 0.94:
+        return {'action': 'highlightRow', 'rowIndex': rng.randrange(rows), 'color': rng.choice(['#FF0000', None])}
+    return {'action': 'hideColumn', 'colIndex': rng.randrange(cols)}
+
+
+def open_memory(path, max_entries=None):
+    session = MemoryLiveSession()
+    session._log = lambda message: None
+    if max_entries:
+        session.changes = ChangeLog(max_entries=max_entries)
+    result = session.handle_command({'action': 'open', 'filePath': path, 'sheetName': 'Daten'})
+    assert result['success'], result
+    return session
+
+
+def client_state(session):
+    state = session.handle_command({'action': 'getData'})
+    assert state['success']
+    return state
+
+
+def assert_replay(session, state, label):
+    current = client_state(session)
+    response = session.handle_command({'action': 'getChanges', 'sinceVersion': state['version']})
+    assert response['success'] and response['version'] == current['version'], label
+    if response['snapshot']:
+        headers, data = response['headers'], response['data']
+    else:
+        headers, data = replay(state['headers'], state['data'], response['changes'])
+    assert headers == current['headers'], f'{label}: Header weichen ab'
+    assert data == current['data'], f'{label}: Daten weichen ab'
+    return response
+
+
+def test_single_commands(path):
+    replayed = 0
+    for seed in range(60):
+        rng = random.Random(seed)
+        session = open_memory(path)
+        states = [client_state(session)]
+        for step in range(40):
+            current = client_state(session)
+            rows, cols = len(current['data']), len(current['headers'])
+            session.handle_command(random_command(rng, rows, cols, step))
+            if rng.random() < 0.3:
+                states.append(client_state(session))
+        for state in states:
+            response = assert_replay(session, state, f'Seed {seed}, Version {state["version"]}')
+            assert not response['snapshot'], 'Memory-Backend liefert ohne Verdichtung Deltas'
+            replayed += 1
+    print(f'✓ Einzelbefehle: {replayed} Client-Stände per getChanges auf getData gebracht')
+
+
+def test_batches(path):
+    for seed in range(60):
+        rng = random.Random(1000 + seed)
+        session = open_memory(path)
+        state = client_state(session)
+        for step in range(5):
+            current = client_state(session)
+            rows, cols = len(current['data']), len(current['headers'])
+            # Gleichartige Folgen, damit der Coalescer zusammenfasst
+            kind = rng.choice(['deleteRow', 'moveRow', 'insertRow', 'moveColumn', 'mixed'])
+            commands = []
+            for i in range(rng.randint(2, 8)):
+                if kind == 'deleteRow' and rows > 5:
+                    commands.append({'action': 'deleteRow', 'rowIndex': rng.randrange(rows)})
+                    rows -= 1
+                elif kind == 'moveRow':
+                    commands.append({'action': 'moveRow', 'fromIndex': rng.randrange(rows), 'toIndex': rng.randrange(rows)})
+                elif kind == 'insertRow':
+                    commands.append({'action': 'insertRow', 'rowIndex': rng.randint(0, rows), 'count': 1})
+                    rows += 1
+                elif kind == 'moveColumn':
+                    commands.append({'action': 'moveColumn', 'fromIndex': rng.randrange(cols), 'toIndex': rng.randrange(cols)})
+                else:
+                    commands.append(random_command(rng, rows, cols, step * 10 + i))
+                    break
+            result = session.handle_command({'action': 'batch', 'commands': commands})
+            assert result['executed'] == len(commands)
+            if step == 2:
+                assert_replay(session, state, f'Batch Seed {seed} (Zwischenstand)')
+        assert_replay(session, state, f'Batch Seed {seed}')
+    print('✓ batch (zusammengefasst): Deltas reproduzieren getData')
+
+
+def test_trimmed_log(path):
+    session = open_memory(path, max_entries=10)
+    old_state = client_state(session)
+    for step in range(25):
+        session.handle_command({'action': 'setCellValue', 'rowIndex': step, 'colIndex': step % COLS, 'value': step})
+        if step == 20:
+            recent_state = client_state(session)
+    response = assert_replay(session, old_state, 'verdichtet')
+    assert response['snapshot'], 'verdichtetes Protokoll muss Snapshot liefern'
+    response = assert_replay(session, recent_state, 'nach Verdichtung')
+    assert not response['snapshot'] and len(response['changes']) == 1  # Zell-Deltas zusammengefasst
+
+    for since in (None, 'x', True, -1, session.changes.version + 5):
+        response = session.handle_command({'action': 'getChanges', 'sinceVersion': since})
+        assert response['snapshot'], f'Version {since!r} muss Snapshot liefern'
+
+    # Neue Datei geöffnet: Protokoll verworfen
+    session.handle_command({'action': 'open', 'filePath': path, 'sheetName': 'Daten'})
+    assert assert_replay(session, recent_state, 'nach open')['snapshot']
+    print('✓ Verdichtetes Protokoll, unbekannte Version, neu geöffnet: Snapshot')
+
+
+class FormulaSheet:
+    """xlwings-Sheet mit einer Summenformel in der letzten Spalte (Excel rechnet nach)"""
+
+    def __init__(self):
+        self.cells = [['A', 'B', 'Summe']] + [[r, r * 10, None] for r in range(5)]
+        self._recalculate()
+
+    def _recalculate(self):
+        for row in self.cells[1:]:
+            row[2] = (row[0] or 0) + (row[1] or 0)
+
+    def range(self, address):
+        sheet = self
+
+        class _Cell:
+            @property
+            def value(self):
+                return sheet.cells[address[0] - 1][address[1] - 1]
+
+            @value.setter
+            def value(self, value):
+                sheet.cells[address[0] - 1][address[1] - 1] = value
+                sheet._recalculate()
+        return _Cell()
+
+    @property
+    def used_range(self):
+        sheet = self
+
+        class _Used:
+            value = [list(row) for row in sheet.cells]
+        return _Used()
+
+
+def test_excel_backend():
+    session = ExcelLiveSession()
+    session._log = lambda message: None
+    session.worksheet = FormulaSheet()
+    state = client_state(session)
+
+    response = session.handle_command({'action': 'getChanges', 'sinceVersion': state['version']})
+    assert not response['snapshot'] and response['changes'] == [], 'ohne Änderung leere Deltas'
+
+    session.handle_command({'action': 'setCellValue', 'rowIndex': 2, 'colIndex': 0, 'value': 100})
+    response = assert_replay(session, state, 'Excel-Backend')
+    assert response['snapshot'], 'Excel-Backend muss nach Änderungen einen Snapshot liefern'
+    assert response['data'][2][2] == 120, 'neu berechnete Formel fehlt'
+
+    # Zur Kontrolle: die reinen Zell-Deltas hätten die Formelzelle nicht erfasst
+    headers, data = replay(state['headers'], state['data'], session.changes.since(state['version']))
+    assert data != response['data']
+    print('✓ Excel-Backend: Snapshot nach Änderungen (Formeln neu berechnet), sonst leere Deltas')
+
+
+def main():
+    base_dir = tempfile.mkdtemp(prefix='live-changes-test-')
+    try:
+        path = os.path.join(base_dir, 'Mappe.xlsx')
+        create_workbook(path)
+        test_single_commands(path)
+        test_batches(path)
+        test_trimmed_log(path)
+        test_excel_backend()
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+    print('\nAlle Tests erfolgreich')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Test: Zusammenfassen von Zeilen-/Spalten-Operationen (python/excel_op_coalescer.py)
+
+Die Excel-Live-Session läuft gegen ein gefälschtes xlwings-Sheet, das jeden
+Excel-Aufruf zählt. Dieselben Befehle werden einmal einzeln und einmal als
+batch (mit Coalescer) ausgeführt - der Endzustand muss identisch sein, die
+Zahl der Excel-Aufrufe kleiner.
+
+Aufruf: python3 test-live-session-coalesce.py
+"""
+
+import os
+import random
+import re
+import sys
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+from excel_live_session import ExcelLiveSession
+from excel_memory_session import MemoryLiveSession
+from excel_op_coalescer import coalesce_commands
+
+
+def column_number(letters):
+    number = 0
+    for ch in letters:
+        number = number * 26 + ord(ch) - 64
+    return number
+
+
+class FakeSheet:
+    """Minimales xlwings-Sheet: Werte-Raster + versteckte Zeilen, zählt Aufrufe"""
+
+    def __init__(self, rows, cols):
+        self.cells = [[f'H{c}' for c in range(cols)]]
+        self.cells += [[f'r{r}c{c}' for c in range(cols)] for r in range(rows)]
+        self.hidden = [False] * (rows + 1)
+        self.calls = Counter()
+
+    @property
+    def width(self):
+        return max(len(row) for row in self.cells)
+
+    def grow(self, rows, cols):
+        while len(self.cells) < rows:
+            self.cells.append([])
+            self.hidden.append(False)
+        for row in self.cells:
+            row.extend([None] * (cols - len(row)))
+
+    def range(self, address):
+        return FakeRange(self, address)
+
+    @property
+    def used_range(self):
+        self.calls['used_range'] += 1
+        sheet = self
+
+        class _Used:
+            class last_cell:
+                row = len(sheet.cells)
+                column = sheet.width
+        return _Used()
+
+    def snapshot(self):
+        width = self.width
+        rows = [row + [None] * (width - len(row)) for row in self.cells]
+        while rows and all(v is None for v in rows[-1]):
+            rows.pop()
+        return rows
+
+
+class FakeRange:
+    def __init__(self, sheet, address):
+        self.sheet = sheet
+        self.areas = [self._parse(part) for part in address.split(',')] if isinstance(address, str) \
+            else [('cell', address[0], address[1], address[0], address[1])]
+
+    @staticmethod
+    def _parse(part):
+        if re.fullmatch(r'\d+:\d+', part):
+            a, b = map(int, part.split(':'))
+            return ('rows', a, 0, b, 0)
+        if re.fullmatch(r'[A-Z]+:[A-Z]+', part):
+            a, b = part.split(':')
+            return ('cols', 0, column_number(a), 0, column_number(b))
+        cells = re.findall(r'([A-Z]+)(\d+)', part)
+        (c1, r1), (c2, r2) = cells[0], cells[-1]
+        return ('cell', int(r1), column_number(c1), int(r2), column_number(c2))
+
+    @property
+    def api(self):
+        return self
+
+    def delete(self):
+        self.sheet.calls['delete'] += 1
+        sheet = self.sheet
+        kind = self.areas[0][0]
+        if kind == 'rows':
+            doomed = {r for _, a, _, b, _ in self.areas for r in range(a, b + 1)}
+            keep = [i for i in range(len(sheet.cells)) if i + 1 not in doomed]
+            sheet.cells = [sheet.cells[i] for i in keep]
+            sheet.hidden = [sheet.hidden[i] for i in keep]
+        else:
+            doomed = {c for _, _, a, _, b in self.areas for c in range(a, b + 1)}
+            sheet.cells = [[v for c, v in enumerate(row, 1) if c not in doomed] for row in sheet.cells]
+
+    def insert(self, shift):
+        self.sheet.calls['insert'] += 1
+        sheet = self.sheet
+        kind, r1, c1, r2, c2 = self.areas[0]
+        if kind == 'rows':
+            sheet.grow(r1 - 1, 0)
+            for _ in range(r2 - r1 + 1):
+                sheet.cells.insert(r1 - 1, [None] * sheet.width)
+                sheet.hidden.insert(r1 - 1, False)
+        else:
+            sheet.grow(0, c1 - 1)
+            for row in sheet.cells:
+                row[c1 - 1:c1 - 1] = [None] * (c2 - c1 + 1)
+
+    def _block(self):
+        kind, r1, c1, r2, c2 = self.areas[0]
+        sheet = self.sheet
+        if kind == 'rows':
+            c1, c2 = 1, sheet.width
+        elif kind == 'cols':
+            r1, r2 = 1, len(sheet.cells)
+        sheet.grow(r2, c2)
+        return kind, r1, c1, [row[c1 - 1:c2] for row in sheet.cells[r1 - 1:r2]], sheet.hidden[r1 - 1:r2]
+
+    def _copy_to(self, destination):
+        self.sheet.calls['copy'] += 1
+        kind, r1, _, block, hidden = self._block()
+        _, dr, dc, _, _ = destination.areas[0]
+        sheet = self.sheet
+        sheet.grow(dr + len(block) - 1, dc + max(len(row) for row in block) - 1)
+        for i, values in enumerate(block):
+            sheet.cells[dr - 1 + i][dc - 1:dc - 1 + len(values)] = values
+            if kind == 'rows':
+                sheet.hidden[dr - 1 + i] = hidden[i]
+
+    def Copy(self, Destination):
+        self._copy_to(Destination)
+
+    def copy_range(self, destination):
+        self._copy_to(destination)
+
+    @property
+    def value(self):
+        return None
+
+    @value.setter
+    def value(self, value):
+        self.sheet.calls['value'] += 1
+        _, r, c, _, _ = self.areas[0]
+        values = value if isinstance(value, list) else [value]
+        self.sheet.grow(r, c + len(values) - 1)
+        self.sheet.cells[r - 1][c - 1:c - 1 + len(values)] = values
+
+    @property
+    def row_height(self):
+        return None
+
+    @row_height.setter
+    def row_height(self, height):
+        self.sheet.calls['row_height'] += 1
+        _, r, _, _, _ = self.areas[0]
+        self.sheet.grow(r, 0)
+        self.sheet.hidden[r - 1] = height == 0
+
+
+def excel_session(rows=40, cols=6):
+    session = ExcelLiveSession()
+    session.worksheet = FakeSheet(rows, cols)
+    session._log = lambda message: None
+    return session
+
+
+def run_both(commands, rows=40, cols=6):
+    """Führt Befehle einzeln und als batch aus, liefert beide Sheets"""
+    single = excel_session(rows, cols)
+    single_results = [single.handle_command(dict(cmd)) for cmd in commands]
+    batched = excel_session(rows, cols)
+    batch_result = batched.run_batch([dict(cmd) for cmd in commands])
+    assert batch_result['results'] == single_results, 'Ergebnisse pro Befehl weichen ab'
+    assert batched.worksheet.snapshot() == single.worksheet.snapshot(), 'Endzustand weicht ab'
+    return single.worksheet, batched.worksheet
+
+
+def total_calls(sheet):
+    return sum(sheet.calls.values())
+
+
+def test_repeated_delete():
+    commands = [{'action': 'deleteRow', 'rowIndex': 10}] * 3
+    single, batched = run_both(commands)
+    assert single.calls['delete'] == 3 and batched.calls['delete'] == 1
+    print(f'✓ deleteRow 10, 10, 10: {single.calls["delete"]} -> {batched.calls["delete"]} Lösch-Aufruf')
+
+
+def test_scattered_deletes():
+    rng = random.Random(3)
+    rows = 1000
+    indices = sorted(rng.sample(range(rows), 300), reverse=True)
+    commands = [{'action': 'deleteRow', 'rowIndex': i} for i in indices]
+    single, batched = run_both(commands, rows=rows)
+    assert single.calls['delete'] == 300
+    assert batched.calls['delete'] < 30, batched.calls
+    print(f'✓ 300 verstreute deleteRow: {single.calls["delete"]} -> {batched.calls["delete"]} '
+          f'Union-Löschungen (Adressen max. 255 Zeichen)')
+
+    hidden = [{'action': 'hideRow', 'rowIndex': 4}, {'action': 'hideRow', 'rowIndex': 9}]
+    commands = hidden + [{'action': 'deleteRow', 'rowIndex': i} for i in (5, 5, 2, 20)]
+    single, batched = run_both(commands)
+    assert batched.hidden == single.hidden
+    print('✓ Löschen über mehrere Bereiche erhält versteckte Zeilen')
+
+
+def test_move_chain():
+    commands = [{'action': 'moveRow', 'fromIndex': f, 'toIndex': t}
+                for f, t in ((3, 8), (4, 2), (10, 3), (5, 6), (2, 9))]
+    single, batched = run_both(commands)
+    print(f'✓ 5 moveRow: {total_calls(single)} -> {total_calls(batched)} Excel-Aufrufe (eine Permutation)')
+    assert total_calls(batched) < total_calls(single)
+
+    back_and_forth = [{'action': 'moveRow', 'fromIndex': 3, 'toIndex': 7},
+                      {'action': 'moveRow', 'fromIndex': 7, 'toIndex': 3}]
+    single, batched = run_both(back_and_forth)
+    assert total_calls(batched) == 0
+    print(f'✓ Hin-und-zurück-Move: {total_calls(single)} -> 0 Aufrufe')
+
+    columns = [{'action': 'moveColumn', 'fromIndex': f, 'toIndex': t} for f, t in ((0, 4), (1, 3), (5, 0))]
+    single, batched = run_both(columns)
+    assert total_calls(batched) < total_calls(single)
+    print(f'✓ 3 moveColumn: {total_calls(single)} -> {total_calls(batched)} Excel-Aufrufe')
+
+
+def test_inserts():
+    commands = [{'action': 'insertRow', 'rowIndex': 5, 'count': 1},
+                {'action': 'insertRow', 'rowIndex': 6, 'count': 2},
+                {'action': 'insertRow', 'rowIndex': 5, 'count': 1}]
+    single, batched = run_both(commands)
+    assert batched.calls['insert'] == 1
+    columns = [{'action': 'insertColumn', 'colIndex': 2, 'count': 1, 'headers': ['A']},
+               {'action': 'insertColumn', 'colIndex': 2, 'count': 2, 'headers': ['B', 'C']},
+               {'action': 'insertColumn', 'colIndex': 5, 'count': 1, 'headers': ['D']}]
+    single_cols, batched_cols = run_both(columns)
+    assert batched_cols.calls['insert'] == 1
+    print(f'✓ angrenzende Inserts: Zeilen {single.calls["insert"]} -> 1, '
+          f'Spalten {single_cols.calls["insert"]} -> 1 Einfüge-Aufruf')
+
+
+def random_commands(rng, rows, cols, count):
+    commands = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.25 and rows > 5:
+            # Lösch-Folge (teils angrenzend, teils verstreut)
+            start = rng.randrange(rows - 3)
+            for _ in range(rng.randint(1, 4)):
+                index = start if rng.random() < 0.5 else rng.randrange(rows)
+                commands.append({'action': 'deleteRow', 'rowIndex': index})
+                rows -= 1
+                if rows <= 5:
+                    break
+                start = min(start, rows - 1)
+        elif kind < 0.45:
+            for _ in range(rng.randint(1, 4)):
+                commands.append({'action': 'moveRow', 'fromIndex': rng.randrange(rows),
+                                 'toIndex': rng.randrange(rows)})
+        elif kind < 0.6:
+            position = rng.randint(0, rows)
+            for _ in range(rng.randint(1, 3)):
+                n = rng.randint(1, 2)
+                commands.append({'action': 'insertRow', 'rowIndex': position + rng.randint(0, 1), 'count': n})
+                rows += n
+        elif kind < 0.7 and cols > 3:
+            commands.append({'action': 'deleteColumn', 'colIndex': rng.randrange(cols)})
+            cols -= 1
+        elif kind < 0.8:
+            for _ in range(rng.randint(1, 3)):
+                commands.append({'action': 'moveColumn', 'fromIndex': rng.randrange(cols),
+                                 'toIndex': rng.randrange(cols)})
+        elif kind < 0.9:
+            n = rng.randint(1, 2)
+            commands.append({'action': 'insertColumn', 'colIndex': rng.randint(0, cols), 'count': n,
+                             'headers': [f'N{len(commands)}_{i}' for i in range(n)]})
+            cols += n
+        else:
+            commands.append({'action': 'setCellValue', 'rowIndex': rng.randrange(rows),
+                             'colIndex': rng.randrange(cols), 'value': f'v{len(commands)}'})
+    return commands
+
+
+def test_random_sequences():
+    single_total = batched_total = 0
+    for seed in range(200):
+        rng = random.Random(seed)
+        commands = random_commands(rng, 40, 6, 25)
+        single, batched = run_both(commands)
+        single_total += total_calls(single)
+        batched_total += total_calls(batched)
+    print(f'✓ 200 zufällige Folgen identisch; Excel-Aufrufe gesamt {single_total} -> {batched_total}')
+
+
+def test_memory_backend():
+    """Memory-Backend: gleiche Schritte, gleicher Zustand wie einzeln"""
+    import tempfile
+    from openpyxl import Workbook
+    path = os.path.join(tempfile.mkdtemp(prefix='coalesce-test-'), 'q.xlsx')
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'S'
+    ws.append([f'H{c}' for c in range(6)])
+    for r in range(40):
+        ws.append([f'r{r}c{c}' for c in range(6)])
+    wb.save(path)
+
+    for seed in range(100):
+        commands = random_commands(random.Random(seed), 40, 6, 25)
+        single, batched = MemoryLiveSession(), MemoryLiveSession()
+        for session in (single, batched):
+            session._log = lambda message: None
+            session.open_file(path, 'S')
+        single_results = [single.handle_command(dict(cmd)) for cmd in commands]
+        batch_result = batched.run_batch([dict(cmd) for cmd in commands])
+        assert batch_result['results'] == single_results
+        assert batched.get_data() == single.get_data()
+    print('✓ Memory-Backend: 100 zufällige Folgen als batch identisch zur Einzel-Ausführung')
+
+
+def test_plan():
+    steps = coalesce_commands([{'action': 'deleteRow', 'rowIndex': i} for i in (10, 10, 10, 2)])
+    assert steps == [{'kind': 'delete', 'axis': 'row', 'members': [0, 1, 2, 3],
+                      'ranges': [(10, 3), (2, 1)]}]
+    steps = coalesce_commands([{'action': 'deleteRow', 'rowIndex': 1}, {'action': 'getData'},
+                               {'action': 'deleteRow', 'rowIndex': 1}])
+    assert [step['kind'] for step in steps] == ['single', 'single', 'single']
+    print('✓ Plan: Bereiche im Ausgangsstand, Gruppen enden an anderen Befehlen')
+
+
+if __name__ == '__main__':
+    test_plan()
+    test_repeated_delete()
+    test_scattered_deletes()
+    test_move_chain()
+    test_inserts()
+    test_random_sequences()
+    test_memory_backend()
+    print('\nAlle Tests erfolgreich')
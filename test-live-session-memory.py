@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Test: Live-Session Memory-Backend (python/excel_memory_session.py)
+
+Zufällige Operationsfolgen laufen parallel gegen das Memory-Backend und ein
+naives Listen-Modell. Verglichen werden getData nach jeder Folge und die mit
+openpyxl gelesene Datei nach dem Speichern (Werte, Reihenfolge, versteckte
+Zeilen/Spalten, Markierungen). Am Ende ein kleiner Durchsatz-Benchmark.
+
+Aufruf:
+    python3 test-live-session-memory.py
+    python3 test-live-session-memory.py --seeds 50 --ops 80
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+from openpyxl import Workbook, load_workbook
+from excel_memory_session import MemoryLiveSession, PositionIndex
+
+
+def create_workbook(path, rows, cols):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Daten'
+    ws.append([f'H{c}' for c in range(cols)])
+    for r in range(rows):
+        ws.append([f'r{r}c{c}' for c in range(cols)])
+    wb.save(path)
+
+
+class ListModel:
+    """Referenz: Zeilen als Liste von Dicts, trivial korrekt"""
+
+    def __init__(self, rows, cols):
+        self.headers = [f'H{c}' for c in range(cols)]
+        self.data = [[f'r{r}c{c}' for c in range(cols)] for r in range(rows)]
+        self.hidden_rows = [False] * rows
+        self.highlights = [None] * rows
+        self.hidden_cols = [False] * cols
+
+    def trim(self):
+        """Nach dem Speichern: leere Zeilen am Ende gibt es in der Datei nicht"""
+        while self.data and self.highlights[-1] is None and all(v is None for v in self.data[-1]):
+            for lst in (self.data, self.hidden_rows, self.highlights):
+                lst.pop()
+
+    def apply(self, cmd):
+        action = cmd['action']
+        if action == 'deleteRow':
+            i = cmd['rowIndex']
+            for lst in (self.data, self.hidden_rows, self.highlights):
+                del lst[i]
+        elif action == 'insertRow':
+            i, n = cmd['rowIndex'], cmd['count']
+            self.data[i:i] = [[None] * len(self.headers) for _ in range(n)]
+            self.hidden_rows[i:i] = [False] * n
+            self.highlights[i:i] = [None] * n
+        elif action == 'moveRow':
+            for lst in (self.data, self.hidden_rows, self.highlights):
+                lst.insert(cmd['toIndex'], lst.pop(cmd['fromIndex']))
+        elif action == 'hideRow':
+            self.hidden_rows[cmd['rowIndex']] = cmd['hidden']
+        elif action == 'highlightRow':
+            self.highlights[cmd['rowIndex']] = cmd['color']
+        elif action == 'deleteColumn':
+            i = cmd['colIndex']
+            del self.headers[i]
+            del self.hidden_cols[i]
+            for row in self.data:
+                del row[i]
+        elif action == 'insertColumn':
+            i, n = cmd['colIndex'], cmd['count']
+            self.headers[i:i] = cmd['headers']
+            self.hidden_cols[i:i] = [False] * n
+            for row in self.data:
+                row[i:i] = [None] * n
+        elif action == 'moveColumn':
+            src, dst = cmd['fromIndex'], cmd['toIndex']
+            self.headers.insert(dst, self.headers.pop(src))
+            self.hidden_cols.insert(dst, self.hidden_cols.pop(src))
+            for row in self.data:
+                row.insert(dst, row.pop(src))
+        elif action == 'hideColumn':
+            self.hidden_cols[cmd['colIndex']] = cmd['hidden']
+        elif action == 'setCellValue':
+            self.data[cmd['rowIndex']][cmd['colIndex']] = cmd['value']
+
+
+def random_command(rng, model, step):
+    rows, cols = len(model.data), len(model.headers)
+    choices = ['insertRow', 'setCellValue', 'hideRow', 'highlightRow', 'insertColumn']
+    if rows > 1:
+        choices += ['deleteRow', 'moveRow', 'moveRow']
+    if cols > 2:
+        choices += ['deleteColumn', 'moveColumn', 'hideColumn']
+    action = rng.choice(choices)
+    if action == 'insertRow':
+        return {'action': action, 'rowIndex': rng.randint(0, rows), 'count': rng.randint(1, 3)}
+    if action == 'deleteRow':
+        return {'action': action, 'rowIndex': rng.randrange(rows)}
+    if action == 'moveRow':
+        return {'action': action, 'fromIndex': rng.randrange(rows), 'toIndex': rng.randrange(rows)}
+    if action == 'hideRow':
+        return {'action': action, 'rowIndex': rng.randrange(rows), 'hidden': rng.random() < 0.7}
+    if action == 'highlightRow':
+        return {'action': action, 'rowIndex': rng.randrange(rows),
+                'color': rng.choice(['green', 'yellow', None])}
+    if action == 'insertColumn':
+        n = rng.randint(1, 2)
+        return {'action': action, 'colIndex': rng.randint(0, cols), 'count': n,
+                'headers': [f'N{step}_{i}' for i in range(n)]}
+    if action == 'deleteColumn':
+        return {'action': action, 'colIndex': rng.randrange(cols)}
+    if action == 'moveColumn':
+        return {'action': action, 'fromIndex': rng.randrange(cols), 'toIndex': rng.randrange(cols)}
+    if action == 'hideColumn':
+        return {'action': action, 'colIndex': rng.randrange(cols), 'hidden': rng.random() < 0.7}
+    return {'action': 'setCellValue', 'rowIndex': rng.randrange(rows), 'colIndex': rng.randrange(cols),
+            'value': f'v{step}'}
+
+
+def check_file(path, model):
+    wb = load_workbook(path)
+    ws = wb['Daten']
+    headers = [c.value for c in ws[1]][:len(model.headers)]
+    assert headers == model.headers, f'Header: {headers} != {model.headers}'
+    for r, expected in enumerate(model.data):
+        values = [ws.cell(row=r + 2, column=c + 1).value for c in range(len(model.headers))]
+        assert values == expected, f'Zeile {r}: {values} != {expected}'
+        assert bool(ws.row_dimensions[r + 2].hidden) == model.hidden_rows[r], f'Zeile {r} versteckt?'
+        fill = ws.cell(row=r + 2, column=1).fill
+        if model.highlights[r] is not None:
+            assert fill.fill_type == 'solid', f'Zeile {r} nicht markiert'
+    for c, hidden in enumerate(model.hidden_cols):
+        from openpyxl.utils import get_column_letter
+        assert bool(ws.column_dimensions[get_column_letter(c + 1)].hidden) == hidden, f'Spalte {c} versteckt?'
+    wb.close()
+
+
+def test_position_index(rng):
+    index = PositionIndex(1000)
+    reference = list(range(1000))
+    next_key = 1000
+    for _ in range(3000):
+        op = rng.random()
+        if op < 0.3:
+            pos, n = rng.randint(0, len(reference)), rng.randint(1, 5)
+            index.insert(pos, next_key, n)
+            reference[pos:pos] = range(next_key, next_key + n)
+            next_key += n
+        elif op < 0.5 and len(reference) > 10:
+            pos = rng.randrange(len(reference) - 5)
+            n = rng.randint(1, 5)
+            index.delete(pos, n)
+            del reference[pos:pos + n]
+        else:
+            src, dst = rng.randrange(len(reference)), rng.randrange(len(reference))
+            index.move(src, dst)
+            reference.insert(dst, reference.pop(src))
+    assert list(index.keys()) == reference
+    assert all(index.key_at(i) == reference[i] for i in range(0, len(reference), 37))
+    print('✓ PositionIndex stimmt nach 3000 Operationen mit list überein')
+
+
+def test_random_sequences(work_dir, seeds, ops):
+    source = os.path.join(work_dir, 'quelle.xlsx')
+    create_workbook(source, 30, 6)
+    for seed in range(seeds):
+        rng = random.Random(seed)
+        session = MemoryLiveSession()
+        model = ListModel(30, 6)
+        assert session.handle_command({'action': 'open', 'filePath': source, 'sheetName': 'Daten'})['success']
+
+        for step in range(ops):
+            cmd = random_command(rng, model, step)
+            result = session.handle_command(cmd)
+            assert result['success'], f'Seed {seed}, {cmd}: {result}'
+            model.apply(cmd)
+
+            # Zwischendurch speichern: gespeicherter Stand wird neue Basis
+            if step == ops // 2:
+                middle = os.path.join(work_dir, f'mitte-{seed}.xlsx')
+                result = session.handle_command({'action': 'save', 'outputPath': middle})
+                assert result['success'], f'Seed {seed}: {result}'
+                check_file(middle, model)
+                model.trim()
+
+        data = session.handle_command({'action': 'getData'})
+        assert data['headers'] == model.headers, f'Seed {seed}: Header weichen ab'
+        assert data['data'] == model.data, f'Seed {seed}: getData weicht ab'
+
+        target = os.path.join(work_dir, f'ziel-{seed}.xlsx')
+        result = session.handle_command({'action': 'save', 'outputPath': target})
+        assert result['success'], f'Seed {seed}: {result}'
+        check_file(target, model)
+    print(f'✓ {seeds} zufällige Folgen à {ops} Operationen: getData und gespeicherte Datei korrekt')
+
+
+def benchmark(work_dir):
+    source = os.path.join(work_dir, 'gross.xlsx')
+    create_workbook(source, 20000, 8)
+    session = MemoryLiveSession()
+    session.handle_command({'action': 'open', 'filePath': source, 'sheetName': 'Daten'})
+    rng = random.Random(7)
+    count = 20000
+    start = time.perf_counter()
+    for i in range(count):
+        n = len(session.rows)
+        op = i % 4
+        if op == 0:
+            session.handle_command({'action': 'moveRow', 'fromIndex': rng.randrange(n), 'toIndex': rng.randrange(n)})
+        elif op == 1:
+            session.handle_command({'action': 'insertRow', 'rowIndex': rng.randrange(n), 'count': 1})
+        elif op == 2:
+            session.handle_command({'action': 'deleteRow', 'rowIndex': rng.randrange(n)})
+        else:
+            session.handle_command({'action': 'setCellValue', 'rowIndex': rng.randrange(n),
+                                    'colIndex': rng.randrange(8), 'value': f'x{i}'})
+    elapsed = time.perf_counter() - start
+    print(f'  Benchmark: {count} Operationen auf 20000 Zeilen in {elapsed:.2f} s '
+          f'({count / elapsed:,.0f} ops/s, ohne Prozess-Grenze)')
+
+    start = time.perf_counter()
+    result = session.handle_command({'action': 'save', 'outputPath': os.path.join(work_dir, 'gross-ziel.xlsx')})
+    assert result['success'], result
+    print(f'  Speichern in einem Durchlauf: {time.perf_counter() - start:.2f} s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Test Memory-Backend der Live-Session')
+    parser.add_argument('--seeds', type=int, default=20)
+    parser.add_argument('--ops', type=int, default=40)
+    parser.add_argument('--no-benchmark', action='store_true')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='live-memory-test-')
+    try:
+        test_position_index(random.Random(1))
+        test_random_sequences(work_dir, args.seeds, args.ops)
+        if not args.no_benchmark:
+            benchmark(work_dir)
+        print('\nAlle Tests erfolgreich')
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Benchmark: "Neuer Monat" als Batch (excel_month_batch)
+
+Erzeugt N Monatsdateien (Abteilung x Monat) aus einer Vorlage und misst den
+Durchsatz in Dateien pro Sekunde:
+
+- pro Datei: Vorlage kopieren, Sheet umbenennen, Header setzen (openpyxl -
+  entspricht dem bisherigen Laden + Speichern der ganzen Mappe)
+- Batch sequentiell: Vorlage einmal gelesen, Patchen im Speicher, rohe Members
+- Batch mit Worker-Prozessen
+
+Jede Ausgabe wird geprüft (Sheet-Name, definierter Name, Header-Zelle,
+bedingte Formatierung, Formel im Nachbar-Sheet).
+
+Aufruf:
+    python3 test-month-batch.py                  # 40 Abteilungen x 1 Monat, 20.000 Zeilen
+    python3 test-month-batch.py --departments 10 --months 3 --rows 5000
+    python3 test-month-batch.py --skip-openpyxl  # ohne Vergleich pro Datei
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+from excel_month_batch import run_month_batch, MAX_WORKERS
+from excel_zip_writer import write_zip_archive
+
+NS = ('xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+      'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"')
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet2.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<workbook {NS}><bookViews><workbookView/></bookViews>'
+    '<sheets><sheet name="Vorlage" sheetId="1" r:id="rId1"/><sheet name="Summen" sheetId="2" r:id="rId2"/></sheets>'
+    '<definedNames><definedName name="Betraege">Vorlage!$C$2:$C$20001</definedName>'
+    '<definedName name="_xlnm._FilterDatabase" localSheetId="0" hidden="1">Vorlage!$A$1:$E$1</definedName></definedNames>'
+    '</workbook>'
+)
+WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet2.xml"/>'
+    '<Relationship Id="rId3" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+    '</Relationships>'
+)
+STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font><font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border/></borders><cellStyleXfs count="1"><xf/></cellStyleXfs>'
+    '<cellXfs count="2"><xf/><xf fontId="1" applyFont="1"/></cellXfs>'
+    '<dxfs count="1"><dxf><fill><patternFill><bgColor rgb="FFFFC7CE"/></patternFill></fill></dxf></dxfs>'
+    '</styleSheet>'
+)
+HEADERS = ['Abteilung', 'Kunde', 'Betrag', 'Status', 'Datum']
+
+
+def build_template(path, rows):
+    """Vorlage: Datensheet mit Header, bedingter Formatierung, Autofilter + Summen-Sheet"""
+    rng = random.Random(7)
+    words = ['Kunde', 'Auftrag', 'Lieferung', 'Rechnung', 'Berlin', 'Hamburg', 'München', 'offen', 'erledigt']
+    header = ''.join(f'<c r="{chr(65 + i)}1" s="1" t="inlineStr"><is><t>{name}</t></is></c>'
+                     for i, name in enumerate(HEADERS))
+    parts = [f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<worksheet {NS}>'
+             f'<sheetViews><sheetView tabSelected="1" workbookViewId="0"/></sheetViews>'
+             f'<sheetData><row r="1">{header}</row>']
+    for row in range(2, rows + 2):
+        parts.append(
+            f'<row r="{row}"><c r="A{row}" t="inlineStr"><is><t>{rng.choice(words)}</t></is></c>'
+            f'<c r="B{row}" t="inlineStr"><is><t>{rng.choice(words)} {rng.randint(1, 99999)}</t></is></c>'
+            f'<c r="C{row}"><v>{rng.random() * 10000:.2f}</v></c>'
+            f'<c r="D{row}" t="inlineStr"><is><t>{rng.choice(words)}</t></is></c>'
+            f'<c r="E{row}"><v>{rng.randint(45000, 46000)}</v></c></row>')
+    parts.append('</sheetData><autoFilter ref="A1:E1"/>'
+                 f'<conditionalFormatting sqref="C2:C{rows + 1}"><cfRule type="cellIs" dxfId="0" priority="1" '
+                 'operator="greaterThan"><formula>Vorlage!$F$1</formula></cfRule></conditionalFormatting>'
+                 '</worksheet>')
+    summary = (f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<worksheet {NS}><sheetData>'
+               '<row r="1"><c r="A1"><f>SUM(Vorlage!C:C)</f></c><c r="B1"><f>SUM(Betraege)</f></c></row>'
+               '</sheetData></worksheet>')
+    write_zip_archive(path, [
+        ('[Content_Types].xml', CONTENT_TYPES.encode('utf-8')),
+        ('_rels/.rels', ROOT_RELS.encode('utf-8')),
+        ('xl/workbook.xml', WORKBOOK.encode('utf-8')),
+        ('xl/_rels/workbook.xml.rels', WORKBOOK_RELS.encode('utf-8')),
+        ('xl/styles.xml', STYLES.encode('utf-8')),
+        ('xl/worksheets/sheet1.xml', ''.join(parts).encode('utf-8')),
+        ('xl/worksheets/sheet2.xml', summary.encode('utf-8')),
+    ])
+
+
+def make_config(template, out_dir, departments, months):
+    month_names = [f'2026-{m:02d}' for m in range(1, months + 1)]
+    return {
+        'templatePath': template,
+        'sheetName': 'Vorlage',
+        'sheetNamePattern': '{month}',
+        'cells': {'F1': 'Abteilung {department} - {month}'},
+        'jobs': [{'outputPath': os.path.join(out_dir, f'Abteilung{d:02d}_{month}.xlsx'),
+                  'department': f'{d:02d}', 'month': month}
+                 for d in range(1, departments + 1) for month in month_names]
+    }
+
+
+def per_file_openpyxl(config):
+    """Bisheriger Weg (nachgebildet): Kopie laden, umbenennen, Header setzen, komplett speichern"""
+    import openpyxl
+    for job in config['jobs']:
+        shutil.copyfile(config['templatePath'], job['outputPath'])
+        wb = openpyxl.load_workbook(job['outputPath'])
+        ws = wb[config['sheetName']]
+        ws.title = job['month']
+        ws['F1'] = f"Abteilung {job['department']} - {job['month']}"
+        wb.save(job['outputPath'])
+
+
+def verify(config):
+    for job in config['jobs']:
+        with zipfile.ZipFile(job['outputPath']) as zf:
+            assert zf.testzip() is None, f"CRC-Fehler in {job['outputPath']}"
+            workbook = zf.read('xl/workbook.xml').decode('utf-8')
+            sheet = zf.read('xl/worksheets/sheet1.xml').decode('utf-8')
+            summary = zf.read('xl/worksheets/sheet2.xml').decode('utf-8')
+        month = job['month']
+        assert f'name="{month}"' in workbook, f'Sheet nicht umbenannt: {job["outputPath"]}'
+        assert f"'{month}'!$C$2" in workbook, 'Definierter Name nicht angepasst'
+        assert f"Abteilung {job['department']} - {month}" in sheet, 'Header-Zelle fehlt'
+        assert f"<formula>'{month}'!$F$1</formula>" in sheet, 'Bedingte Formatierung nicht angepasst'
+        assert f"SUM('{month}'!C:C)" in summary, 'Formel im Summen-Sheet nicht angepasst'
+
+
+def measure(label, func, files):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f'{label:<40} {elapsed:8.2f} s {files / elapsed:10.1f} Dateien/s')
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark "Neuer Monat" als Batch')
+    parser.add_argument('--departments', type=int, default=40)
+    parser.add_argument('--months', type=int, default=1)
+    parser.add_argument('--rows', type=int, default=20000, help='Datenzeilen in der Vorlage')
+    parser.add_argument('--workers', type=int, default=None, help=f'Worker-Prozesse (Standard: bis {MAX_WORKERS})')
+    parser.add_argument('--skip-openpyxl', action='store_true', help='Vergleich pro Datei auslassen')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='month-bench-')
+    try:
+        template = os.path.join(work_dir, 'vorlage.xlsx')
+        build_template(template, args.rows)
+        files = args.departments * args.months
+        print(f'Vorlage: {args.rows} Zeilen, {os.path.getsize(template) / 1024:.0f} KB, {files} Dateien\n')
+        print(f'{"Variante":<40} {"Zeit":>10} {"Durchsatz":>18}')
+        print('-' * 70)
+
+        baseline = None
+        if not args.skip_openpyxl:
+            try:
+                import openpyxl  # noqa: F401
+                out_dir = os.path.join(work_dir, 'openpyxl')
+                os.makedirs(out_dir)
+                baseline = measure('pro Datei (openpyxl laden + speichern)',
+                                   lambda: per_file_openpyxl(make_config(template, out_dir, args.departments, args.months)),
+                                   files)
+            except ImportError:
+                print('openpyxl nicht installiert - Vergleich pro Datei übersprungen')
+
+        for label, workers in (('Batch sequentiell', 1), ('Batch mit Worker-Prozessen', args.workers or MAX_WORKERS)):
+            out_dir = os.path.join(work_dir, f'batch{workers}')
+            config = make_config(template, out_dir, args.departments, args.months)
+            result = {}
+            elapsed = measure(f'{label} ({workers})',
+                              lambda: result.update(run_month_batch(config, max_workers=workers)), files)
+            assert result['success'], result
+            verify(config)
+            if baseline:
+                print(f'{"":<40} Faktor {baseline / elapsed:.1f}x gegenüber pro Datei')
+            if workers > 1 and result['workers'] < 2:
+                print(f'{"":<40} (nur {result["workers"] or 1} Prozess - os.cpu_count() = {os.cpu_count()})')
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print('\nAlle Ausgaben verifiziert (CRC, Sheet-Name, Namen, Header, bedingte Formatierung, Formeln).')
+
+
+if __name__ == '__main__':
+    main()
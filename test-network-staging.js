@@ -0,0 +1,171 @@
+/**
+ * Test für den Netzlaufwerk-Modus (python/network_staging.js)
+ *
+ * Ein lokales Verzeichnis mit künstlicher Latenz simuliert die Freigabe:
+ * jeder Zugriff darauf kostet LATENCY_MS und wird gezählt.
+ *
+ * Aufruf: node test-network-staging.js
+ */
+const assert = require('assert');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { execFileSync } = require('child_process');
+const { NetworkStagingCache } = require('./python/network_staging');
+const pythonBridge = require('./python/python_bridge');
+
+const LATENCY_MS = 30;
+
+function sleep(ms) {
+    return new Promise(resolve => setTimeout(resolve, ms));
+}
+
+/**
+ * fs.promises mit künstlicher Latenz und Zähler pro Operation
+ */
+function createLatencyFs(latencyMs) {
+    const calls = {};
+    const wrap = (name) => async (...args) => {
+        calls[name] = (calls[name] || 0) + 1;
+        await sleep(latencyMs);
+        return fs.promises[name](...args);
+    };
+    return {
+        calls,
+        reset() { for (const key of Object.keys(calls)) delete calls[key]; },
+        stat: wrap('stat'),
+        copyFile: wrap('copyFile'),
+        rename: wrap('rename'),
+        unlink: wrap('unlink')
+    };
+}
+
+function createWorkbook(filePath, rows) {
+    const script = [
+        'import sys',
+        'from openpyxl import Workbook',
+        'wb = Workbook(); ws = wb.active; ws.title = "S"',
+        'ws.append(["h1", "h2", "h3"])',
+        `for i in range(${rows}): ws.append([f"r{i}", i, i * 1.5])`,
+        'wb.save(sys.argv[1])'
+    ].join('\n');
+    execFileSync(pythonBridge.getPythonPath(), ['-c', script, filePath]);
+}
+
+function listStaged(dir) {
+    return fs.readdirSync(dir).filter(name => name.startsWith('.~stage'));
+}
+
+async function test() {
+    const baseDir = fs.mkdtempSync(path.join(os.tmpdir(), 'network-staging-test-'));
+    const shareDir = path.join(baseDir, 'share');
+    const cacheDir = path.join(baseDir, 'cache');
+    fs.mkdirSync(shareDir);
+
+    const remoteFs = createLatencyFs(LATENCY_MS);
+    const isNetworkPath = (filePath) => path.resolve(filePath).startsWith(shareDir + path.sep);
+    const remoteFile = path.join(shareDir, 'Daten.xlsx');
+    createWorkbook(remoteFile, 2000);
+
+    try {
+        // 1. Read-Through-Cache: erster Zugriff kopiert, zweiter ist ein Treffer
+        const cache = new NetworkStagingCache({ cacheDir, isNetworkPath, fs: remoteFs });
+        const local1 = await cache.pull(remoteFile);
+        assert.notStrictEqual(local1, remoteFile);
+        assert.deepStrictEqual(fs.readFileSync(local1), fs.readFileSync(remoteFile));
+        assert.strictEqual(remoteFs.calls.copyFile, 1);
+
+        remoteFs.reset();
+        const local2 = await cache.pull(remoteFile);
+        assert.strictEqual(local2, local1);
+        assert.deepStrictEqual(remoteFs.calls, { stat: 1 }, 'Treffer darf nur stat() auf der Freigabe machen');
+        console.log('✓ pull: Kopie beim ersten Zugriff, danach Cache-Treffer (nur stat)');
+
+        // Lokale Pfade werden nicht angefasst
+        const localOnly = path.join(baseDir, 'lokal.xlsx');
+        assert.strictEqual(await cache.pull(localOnly), localOnly);
+
+        // 2. Änderung auf der Freigabe (andere mtime) invalidiert den Cache
+        const future = new Date(Date.now() + 60000);
+        fs.utimesSync(remoteFile, future, future);
+        remoteFs.reset();
+        await cache.pull(remoteFile);
+        assert.strictEqual(remoteFs.calls.copyFile, 1, 'geänderte mtime muss neu laden');
+        console.log('✓ pull: Änderung auf der Freigabe (mtime/Größe) lädt neu');
+
+        // 3. push: eine Kopie + atomares Umbenennen, keine Staging-Reste
+        const workFile = cache.createWorkFile(remoteFile);
+        fs.copyFileSync(local1, workFile);
+        fs.appendFileSync(workFile, Buffer.alloc(16));  // Inhalt unterscheidbar machen
+        const expected = fs.readFileSync(workFile);
+        remoteFs.reset();
+        await cache.push(workFile, remoteFile);
+        assert.deepStrictEqual(fs.readFileSync(remoteFile), expected);
+        assert.strictEqual(remoteFs.calls.copyFile, 1);
+        assert.strictEqual(remoteFs.calls.rename, 1);
+        assert.deepStrictEqual(listStaged(shareDir), []);
+        assert.ok(!fs.existsSync(workFile), 'Arbeitsdatei wird zur Cache-Kopie');
+
+        remoteFs.reset();
+        const afterPush = await cache.pull(remoteFile);
+        assert.deepStrictEqual(remoteFs.calls, { stat: 1 }, 'nach push ist die Datei gecacht');
+        assert.deepStrictEqual(fs.readFileSync(afterPush), expected);
+        console.log('✓ push: eine sequentielle Kopie + Rename, Ergebnis ist sofort gecacht');
+
+        // 4. Fehlgeschlagener Upload lässt die Zieldatei unverändert
+        const failingFs = {
+            ...remoteFs,
+            copyFile: async (src, dst) => {
+                fs.writeFileSync(dst, 'halb geschrieben');
+                throw Object.assign(new Error('Verbindung getrennt'), { code: 'ECONNRESET' });
+            }
+        };
+        const failingCache = new NetworkStagingCache({ cacheDir, isNetworkPath, fs: failingFs });
+        const brokenWork = failingCache.createWorkFile(remoteFile);
+        fs.writeFileSync(brokenWork, 'neu');
+        await assert.rejects(() => failingCache.push(brokenWork, remoteFile));
+        assert.deepStrictEqual(fs.readFileSync(remoteFile), expected);
+        assert.deepStrictEqual(listStaged(shareDir), []);
+        failingCache.discardWorkFile(brokenWork);
+        console.log('✓ push: Abbruch hinterlässt weder Teil-Datei noch Staging-Reste');
+
+        // 5. Export über die Bridge: Python arbeitet nur lokal
+        const staging = pythonBridge.getNetworkStaging();
+        staging.cacheDir = cacheDir;
+        staging.remoteFs = remoteFs;
+        staging.setNetworkPathDetector(isNetworkPath);
+
+        const sheet = await pythonBridge.readSheet(remoteFile, 'S');
+        assert.ok(sheet.success, sheet.error);
+        const data = sheet.data;
+        data[10][0] = 'NETZ';
+        data[1999][2] = 'ende';
+
+        const targetFile = path.join(shareDir, 'Daten-neu.xlsx');
+        remoteFs.reset();
+        const started = Date.now();
+        const result = await pythonBridge.exportMultipleSheets(remoteFile, targetFile, [{
+            sheetName: 'S', headers: sheet.headers, data, fullRewrite: true, structuralChange: false
+        }], {});
+        const elapsed = Date.now() - started;
+        assert.ok(result.success, result.error);
+        assert.ok(result.networkStaging);
+        const remoteOps = Object.values(remoteFs.calls).reduce((a, b) => a + b, 0);
+        assert.deepStrictEqual(listStaged(shareDir), []);
+
+        staging.setNetworkPathDetector(null);  // direkt lesen zur Kontrolle
+        const check = await pythonBridge.readSheet(targetFile, 'S');
+        assert.strictEqual(check.data[10][0], 'NETZ');
+        assert.strictEqual(check.data[1999][2], 'ende');
+        console.log(`✓ Export: ${remoteOps} Zugriffe auf die Freigabe (${JSON.stringify(remoteFs.calls)}), ${elapsed} ms`);
+
+        console.log('\nAlle Tests erfolgreich');
+    } finally {
+        fs.rmSync(baseDir, { recursive: true, force: true });
+    }
+}
+
+test().catch(e => {
+    console.error('Fehler:', e.message);
+    process.exit(1);
+});
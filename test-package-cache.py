@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Test: Cache entschlüsselter Pakete (python/excel_package_cache.py)
+
+Eine passwortgeschützte Mappe wird einmal entschlüsselt, danach lesen Reader
+und Writer aus dem Klartext im Speicher. Geprüft werden Cache-Treffer,
+falsches Passwort, Änderung der Datei (neuer Fingerprint), Budget und das
+Überschreiben des Klartexts beim Verdrängen.
+
+Aufruf:
+    python3 test-package-cache.py
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+from openpyxl import Workbook, load_workbook
+
+from excel_package_crypto import encrypt_package, is_encrypted, decrypt_package
+from excel_package_cache import DecryptedPackageCache, get_package_cache, copy_package
+from excel_reader import read_sheet, list_sheets
+from excel_writer import write_sheet
+
+PASSWORD = 'Geheim-ÄÖÜ-123'
+
+
+def create_encrypted(path, rows, marker='r'):
+    plain = path + '.plain.xlsx'
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'S'
+    ws.append(['h1', 'h2', 'h3'])
+    for i in range(rows):
+        ws.append([f'{marker}{i}', i, i * 1.5])
+    wb.create_sheet('Leer')['A1'] = 'unverändert'
+    wb.save(plain)
+    encrypt_package(plain, path, PASSWORD)
+    os.remove(plain)
+
+
+def test_reader(base_dir):
+    source = os.path.join(base_dir, 'Quelle.xlsx')
+    create_encrypted(source, 2000)
+    cache = get_package_cache()
+    before = cache.stats()
+
+    assert list_sheets(source, password=PASSWORD)['sheets'] == ['S', 'Leer']
+    result = read_sheet(source, 'S', password=PASSWORD)
+    assert result['success'], result.get('error')
+    assert result['data'][10][0] == 'r10'
+
+    stats = cache.stats()
+    assert stats['misses'] - before['misses'] == 1, stats
+    assert stats['hits'] - before['hits'] == 1, stats
+
+    wrong = read_sheet(source, 'S', password='falsch')
+    assert not wrong['success'] and wrong.get('needsPassword'), wrong
+    print('✓ Reader: einmal entschlüsselt, danach Cache-Treffer; falsches Passwort -> needsPassword')
+
+    # Geänderte Datei: neuer Fingerprint, alter Klartext wird verworfen
+    time.sleep(0.01)
+    create_encrypted(source, 2000, marker='neu')
+    assert read_sheet(source, 'S', password=PASSWORD)['data'][10][0] == 'neu10'
+    assert cache.stats()['entries'] == stats['entries']
+    print('✓ Geänderte Datei wird neu entschlüsselt')
+    return source
+
+
+def test_writer(base_dir, source):
+    sheet = read_sheet(source, 'S', password=PASSWORD)
+    data = [list(row) for row in sheet['data']]
+    data[10][0] = 'GEÄNDERT'
+    target = os.path.join(base_dir, 'Export.xlsx')
+    result = write_sheet(source, target, 'S', {'headers': sheet['headers'], 'data': data, 'fullRewrite': True},
+                         password=PASSWORD, source_password=PASSWORD)
+    assert result['success'], result.get('error')
+    assert is_encrypted(target)
+    decrypted = os.path.join(base_dir, 'Export-klar.xlsx')
+    decrypt_package(target, decrypted, PASSWORD)
+    ws = load_workbook(decrypted)['S']
+    assert ws['A12'].value == 'GEÄNDERT'
+    assert ws['B2001'].value == 1999
+    print('✓ Writer: verschlüsselte Quelle direkt aus dem Cache, Ausgabe neu verschlüsselt')
+
+    copy = os.path.join(base_dir, 'Kopie.xlsx')
+    assert copy_package(source, copy, source_password=PASSWORD)['success']
+    assert not is_encrypted(copy)
+    assert load_workbook(copy)['Leer']['A1'].value == 'unverändert'
+    print('✓ copy_package: unverändert übernommen (ohne Passwort)')
+
+
+def test_budget(base_dir):
+    first = os.path.join(base_dir, 'Eins.xlsx')
+    second = os.path.join(base_dir, 'Zwei.xlsx')
+    create_encrypted(first, 3000)
+    create_encrypted(second, 3000)
+
+    # Budget für eineinhalb Klartexte
+    plain = os.path.join(base_dir, 'Eins-klar.xlsx')
+    decrypt_package(first, plain, PASSWORD)
+    cache = DecryptedPackageCache(budget_bytes=int(os.path.getsize(plain) * 1.5))
+    reader = cache.open(first, PASSWORD)
+    plaintext = reader._plaintext
+    assert reader.read(2) == b'PK'
+
+    # Zweite Datei verdrängt die erste - der offene Reader bleibt gültig
+    cache.open(second, PASSWORD).close()
+    assert cache.stats()['evictions'] == 1 and cache.stats()['entries'] == 1
+    assert plaintext.buffer is not None
+    reader.seek(0)
+    assert reader.read(2) == b'PK'
+
+    reader.close()
+    assert plaintext.buffer is None, 'Klartext nach dem letzten Reader nicht überschrieben'
+    print('✓ Budget: LRU-Verdrängung, Zeroize nach dem letzten Reader')
+
+    tiny = DecryptedPackageCache(budget_bytes=1024)
+    reader = tiny.open(first, PASSWORD)
+    plaintext = reader._plaintext
+    reader.close()
+    assert tiny.stats()['uncached'] == 1 and tiny.stats()['entries'] == 0
+    assert plaintext.buffer is None
+    print('✓ Zu große Pakete werden nicht gecacht')
+
+
+def main():
+    base_dir = tempfile.mkdtemp(prefix='package-cache-test-')
+    try:
+        source = test_reader(base_dir)
+        test_writer(base_dir, source)
+        test_budget(base_dir)
+    finally:
+        get_package_cache().evict()
+        shutil.rmtree(base_dir, ignore_errors=True)
+    print('\nAlle Tests erfolgreich')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Test: Agile Encryption gegen msoffcrypto-tool (python/excel_package_crypto.py)
+
+Unsere Ausgabe wird mit msoffcrypto entschlüsselt - inklusive Prüfung der
+Datenintegrität (verify_integrity=True, HMAC über EncryptedPackage). Damit ist
+sichergestellt, dass Excel die Dateien öffnen kann, ohne dass hier ein Excel
+läuft. Größen: leeres ZIP, unter einem Segment (4096 Bytes), genau an und knapp über
+der Segmentgrenze, mehrere Segmente und eine echte Mappe. Umgekehrt muss
+iter_decrypted von msoffcrypto verschlüsselte Dateien lesen.
+
+Ohne msoffcrypto (pip install msoffcrypto-tool) wird der Test übersprungen.
+
+Aufruf:
+    python3 test-package-crypto.py
+"""
+
+import importlib.util
+import io
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import zipfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+from openpyxl import Workbook, load_workbook
+
+from excel_package_crypto import (PackageCryptoError, available, decrypt_package, encrypt_package, is_encrypted,
+                                  iter_decrypted)
+
+PASSWORD = 'Geheim-ÄÖÜ-123'
+# Klartext-Größen in Bytes: leeres ZIP, an der Segmentgrenze (4096), mehrere Segmente
+SIZES = [22, 100, 4095, 4096, 4097, 3 * 4096 + 17, 300000]
+
+
+def zip_of_size(size):
+    """
+    Gültiges ZIP mit genau size Bytes (msoffcrypto prüft den Klartext als ZIP):
+    ein unkomprimierter Member mit Zufallsdaten, der Rest als ZIP-Kommentar
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as zf:
+        if size > 200:
+            zf.writestr('d.bin', os.urandom(size - 200))
+    missing = size - len(buffer.getvalue())
+    assert 0 <= missing <= 0xFFFF
+    with zipfile.ZipFile(buffer, 'a') as zf:
+        zf.comment = os.urandom(missing)
+    data = buffer.getvalue()
+    assert len(data) == size and zipfile.is_zipfile(io.BytesIO(data))
+    return data
+
+
+def msoffcrypto_decrypt(path, password):
+    import msoffcrypto
+    with open(path, 'rb') as fp:
+        office = msoffcrypto.OfficeFile(fp)
+        assert office.is_encrypted()
+        office.load_key(password=password)
+        out = io.BytesIO()
+        office.decrypt(out, verify_integrity=True)
+    return out.getvalue()
+
+
+def test_sizes(base_dir):
+    for size in SIZES:
+        plain = zip_of_size(size)
+        source = os.path.join(base_dir, f'klar-{size}.bin')
+        target = os.path.join(base_dir, f'geschuetzt-{size}.xlsx')
+        with open(source, 'wb') as f:
+            f.write(plain)
+        stats = encrypt_package(source, target, PASSWORD)
+        assert stats['size'] == size and is_encrypted(target)
+        assert msoffcrypto_decrypt(target, PASSWORD) == plain, f'msoffcrypto: Inhalt bei {size} Bytes'
+        assert b''.join(iter_decrypted(target, PASSWORD)) == plain, f'iter_decrypted: Inhalt bei {size} Bytes'
+    print(f'✓ msoffcrypto entschlüsselt unsere Ausgabe mit Integritätsprüfung ({len(SIZES)} Größen, {SIZES[0]} - {SIZES[-1]} Bytes)')
+
+
+def test_workbook(base_dir):
+    plain = os.path.join(base_dir, 'Mappe.xlsx')
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Daten'
+    ws.append(['Name', 'Wert'])
+    for i in range(2000):
+        ws.append([f'Zeile {i}', i])
+    wb.save(plain)
+
+    target = os.path.join(base_dir, 'Mappe-geschuetzt.xlsx')
+    encrypt_package(plain, target, PASSWORD)
+    decrypted = msoffcrypto_decrypt(target, PASSWORD)
+    with open(plain, 'rb') as f:
+        assert decrypted == f.read()
+    ws = load_workbook(io.BytesIO(decrypted))['Daten']
+    assert ws['A2001'].value == 'Zeile 1999'
+
+    # Umgekehrt: von msoffcrypto verschlüsselt, von uns gelesen
+    import msoffcrypto
+    foreign = os.path.join(base_dir, 'Fremd.xlsx')
+    with open(plain, 'rb') as fin, open(foreign, 'wb') as fout:
+        msoffcrypto.OfficeFile(fin).encrypt(PASSWORD, fout)
+    restored = os.path.join(base_dir, 'Fremd-klar.xlsx')
+    decrypt_package(foreign, restored, PASSWORD)
+    with open(plain, 'rb') as a, open(restored, 'rb') as b:
+        assert a.read() == b.read()
+    print('✓ Echte Mappe in beide Richtungen (unsere Verschlüsselung <-> msoffcrypto)')
+
+
+def test_errors(base_dir):
+    target = os.path.join(base_dir, 'geschuetzt-100.xlsx')
+    try:
+        b''.join(iter_decrypted(target, 'falsch'))
+        raise AssertionError('Falsches Passwort nicht erkannt')
+    except PackageCryptoError as e:
+        assert 'Passwort' in str(e)
+
+    # Ein Byte im EncryptedPackage verändert: HMAC schlägt an (msoffcrypto und wir)
+    import msoffcrypto
+    with open(os.path.join(base_dir, f'geschuetzt-{SIZES[-1]}.xlsx'), 'rb') as f:
+        data = bytearray(f.read())
+    # EncryptedPackage beginnt mit der Klartext-Größe (uint64), danach der Chiffretext
+    start = data.find(struct.pack('<Q', SIZES[-1]))
+    assert start > 0 and data.find(struct.pack('<Q', SIZES[-1]), start + 1) < 0
+    data[start + 8 + 20] ^= 0x01
+    tampered = os.path.join(base_dir, 'manipuliert.xlsx')
+    with open(tampered, 'wb') as f:
+        f.write(data)
+    for decrypt in (lambda: msoffcrypto_decrypt(tampered, PASSWORD),
+                    lambda: b''.join(iter_decrypted(tampered, PASSWORD))):
+        try:
+            decrypt()
+            raise AssertionError('Manipulation nicht erkannt')
+        except (PackageCryptoError, msoffcrypto.exceptions.InvalidKeyError):
+            pass
+    print('✓ Falsches Passwort und manipulierte Daten werden erkannt')
+
+
+def main():
+    if importlib.util.find_spec('msoffcrypto') is None:
+        print('msoffcrypto-tool nicht installiert - Test übersprungen')
+        return
+    if not available():
+        print('libcrypto nicht verfügbar - Test übersprungen')
+        return
+
+    base_dir = tempfile.mkdtemp(prefix='package-crypto-test-')
+    try:
+        test_sizes(base_dir)
+        test_workbook(base_dir)
+        test_errors(base_dir)
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+    print('\nAlle Tests erfolgreich')
+
+
+if __name__ == '__main__':
+    main()
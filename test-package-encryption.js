@@ -0,0 +1,118 @@
+/**
+ * Test für den Passwortschutz im Python-Writer (python/excel_package_crypto.py)
+ *
+ * Export mit Passwort verschlüsselt im selben Durchlauf wie das Schreiben
+ * (ECMA-376 Agile). Geprüft wird der Round-Trip mit der bisherigen
+ * Entschlüsselung über xlsx-populate - und umgekehrt, dass von xlsx-populate
+ * verschlüsselte Dateien im Python-Modul lesbar sind.
+ *
+ * Aufruf: node test-package-encryption.js
+ */
+const assert = require('assert');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { execFileSync } = require('child_process');
+const XlsxPopulate = require('xlsx-populate');
+const pythonBridge = require('./python/python_bridge');
+
+const PASSWORD = 'Geheim-ÄÖÜ-123';
+const CFB_SIGNATURE = Buffer.from([0xd0, 0xcf, 0x11, 0xe0, 0xa1, 0xb1, 0x1a, 0xe1]);
+
+function createWorkbook(filePath, rows) {
+    const script = [
+        'import sys',
+        'from openpyxl import Workbook',
+        'wb = Workbook(); ws = wb.active; ws.title = "S"',
+        'ws.append(["h1", "h2", "h3"])',
+        `for i in range(${rows}): ws.append([f"r{i}", i, i * 1.5])`,
+        'wb.create_sheet("Leer")["A1"] = "unverändert"',
+        'wb.save(sys.argv[1])'
+    ].join('\n');
+    execFileSync(pythonBridge.getPythonPath(), ['-c', script, filePath]);
+}
+
+function isEncrypted(filePath) {
+    const fd = fs.openSync(filePath, 'r');
+    const head = Buffer.alloc(8);
+    fs.readSync(fd, head, 0, 8, 0);
+    fs.closeSync(fd);
+    return head.equals(CFB_SIGNATURE);
+}
+
+function runCrypto(config) {
+    const script = path.join(__dirname, 'python', 'excel_package_crypto.py');
+    const output = execFileSync(pythonBridge.getPythonPath(), [script], { input: JSON.stringify(config) });
+    return JSON.parse(output.toString());
+}
+
+async function test() {
+    const baseDir = fs.mkdtempSync(path.join(os.tmpdir(), 'package-encryption-test-'));
+    const sourceFile = path.join(baseDir, 'Quelle.xlsx');
+    createWorkbook(sourceFile, 5000);
+
+    try {
+        // 1. Export mit Änderungen: Writer verschlüsselt im selben Durchlauf
+        const sheet = await pythonBridge.readSheet(sourceFile, 'S');
+        const data = sheet.data.map(row => [...row]);
+        data[10][0] = 'GEÄNDERT';
+        const targetFile = path.join(baseDir, 'Export.xlsx');
+        const result = await pythonBridge.exportMultipleSheets(sourceFile, targetFile, [{
+            sheetName: 'S', headers: sheet.headers, data, fullRewrite: true, structuralChange: false
+        }, {
+            sheetName: 'Leer', fromFile: true
+        }], { password: PASSWORD });
+        assert.ok(result.success, result.error);
+        assert.strictEqual(result.encrypted, true);
+        assert.ok(isEncrypted(targetFile));
+
+        const workbook = await XlsxPopulate.fromFileAsync(targetFile, { password: PASSWORD });
+        assert.strictEqual(workbook.sheet('S').cell('A12').value(), 'GEÄNDERT');
+        assert.strictEqual(workbook.sheet('S').cell('B5001').value(), 4999);
+        assert.strictEqual(workbook.sheet('Leer').cell('A1').value(), 'unverändert');
+        await assert.rejects(XlsxPopulate.fromFileAsync(targetFile, { password: 'falsch' }));
+        console.log(`✓ Export mit Passwort: ${fs.statSync(targetFile).size} Bytes, mit xlsx-populate lesbar`);
+
+        // 2. Keine Änderungen: fertige Datei wird nachträglich verschlüsselt (ohne xlsx-populate)
+        const copyFile = path.join(baseDir, 'Kopie.xlsx');
+        const copyResult = await pythonBridge.exportMultipleSheets(sourceFile, copyFile, [{
+            sheetName: 'S', fromFile: true
+        }], { password: PASSWORD });
+        assert.ok(copyResult.success, copyResult.error);
+        assert.strictEqual(copyResult.encrypted, true);
+        const copy = await XlsxPopulate.fromFileAsync(copyFile, { password: PASSWORD });
+        assert.strictEqual(copy.sheet('S').cell('A12').value(), 'r10');
+        console.log('✓ Export ohne Änderungen: nachträglich verschlüsselt');
+
+        // 3. Umgekehrt: von xlsx-populate verschlüsselt, im Python-Modul entschlüsselt
+        const populated = path.join(baseDir, 'Populate.xlsx');
+        const decrypted = path.join(baseDir, 'Entschluesselt.xlsx');
+        const plain = await XlsxPopulate.fromFileAsync(sourceFile);
+        await plain.toFileAsync(populated, { password: PASSWORD });
+        const decryptResult = runCrypto({ action: 'decrypt', sourcePath: populated, targetPath: decrypted, password: PASSWORD });
+        assert.ok(decryptResult.success, decryptResult.error);
+        const check = await pythonBridge.readSheet(decrypted, 'S');
+        assert.strictEqual(check.data[10][0], 'r10');
+        assert.strictEqual(runCrypto({ action: 'decrypt', sourcePath: populated, targetPath: decrypted, password: 'falsch' }).success, false);
+        console.log('✓ xlsx-populate -> Python entschlüsselt');
+
+        // 4. Verschlüsseln in-place (Quelle == Ziel) über die Bridge
+        const inPlace = path.join(baseDir, 'InPlace.xlsx');
+        fs.copyFileSync(sourceFile, inPlace);
+        const encryptResult = await pythonBridge.encryptPackage(inPlace, inPlace, PASSWORD);
+        assert.ok(encryptResult.success, encryptResult.error);
+        assert.ok(isEncrypted(inPlace));
+        const reopened = await XlsxPopulate.fromFileAsync(inPlace, { password: PASSWORD });
+        assert.strictEqual(reopened.sheet('S').cell('C3').value(), 1.5);
+        console.log('✓ encryptPackage in-place');
+
+        console.log('\nAlle Tests erfolgreich');
+    } finally {
+        fs.rmSync(baseDir, { recursive: true, force: true });
+    }
+}
+
+test().catch(e => {
+    console.error('Fehler:', e.message);
+    process.exit(1);
+});
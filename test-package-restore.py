@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Test: Wiederherstellung aus verschlüsselter Quelle ohne Klartext auf der Platte
+(restore_table_xml_from_original, restore_external_links_from_original und
+fix_xlsx_relationships in python/excel_writer.py)
+
+Die Quelle ist passwortgeschützt, write_sheet reicht den PackageReader
+(entschlüsselter Klartext im Speicher) als original_path weiter. Table-XML,
+externalLinks und workbook.xml müssen direkt aus dem Archiv gelesen werden:
+
+- FALL 3 (editedCells) und FALL 2 (fullRewrite) durchlaufen die Wiederherstellung
+- Kein tempfile.mkdtemp() und kein neuer Eintrag im temporären Verzeichnis
+- Table-XML und externalLink wie im Original (xr:uid, mc:Ignorable bleiben),
+  geänderte Zelle und Tabelle in der entschlüsselten Ausgabe
+
+Aufruf:
+    python3 test-package-restore.py
+"""
+
+import contextlib
+import io
+import os
+import re
+import shutil
+import sys
+import tempfile
+import zipfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+from openpyxl import Workbook, load_workbook
+from openpyxl.worksheet.table import Table
+
+from excel_package_crypto import encrypt_package, decrypt_package
+from excel_package_cache import get_package_cache
+from excel_writer import write_sheet
+
+PASSWORD = 'Geheim-123'
+ROWS = 20
+TABLE_UID = '{6A3F2C1B-0D4E-4F5A-9B8C-7D6E5F4A3B2C}'
+
+EXTERNAL_LINK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<externalLink xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006" mc:Ignorable="x14" '
+    'xmlns:x14="http://schemas.microsoft.com/office/spreadsheetml/2009/9/main">'
+    '<externalBook xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" r:id="rId1">'
+    '<sheetNames><sheetName val="Preise"/></sheetNames>'
+    '<sheetDataSet><sheetData sheetId="0"><row r="1"><cell r="A1"><v>42</v></cell></row></sheetData></sheetDataSet>'
+    '</externalBook></externalLink>'
+)
+EXTERNAL_LINK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/externalLinkPath" '
+    'Target="Preise.xlsx" TargetMode="External"/></Relationships>'
+)
+
+
+def create_plain(path):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Daten'
+    ws.append(['Nr', 'Name', 'Wert'])
+    for i in range(ROWS):
+        ws.append([i, f'Name {i}', i * 2.5])
+    ws.add_table(Table(displayName='Daten_Tabelle', ref=f'A1:C{ROWS + 1}'))
+    wb.save(path)
+
+
+def add_original_parts(path):
+    """Ergänzt, was openpyxl beim Speichern verliert: xr:uid der Tabelle, externalLink mit mc:Ignorable"""
+    with zipfile.ZipFile(path) as zf:
+        members = [(info.filename, zf.read(info)) for info in zf.infolist()]
+    out = []
+    for name, data in members:
+        text = data.decode('utf-8')
+        if name == 'xl/tables/table1.xml':
+            text = text.replace('<table ', '<table xmlns:xr="http://schemas.microsoft.com/office/spreadsheetml/2014/revision" '
+                                f'xr:uid="{TABLE_UID}" ', 1)
+        elif name == 'xl/workbook.xml':
+            text = text.replace('</sheets>', '</sheets><externalReferences>'
+                                '<externalReference r:id="rIdExt1"/></externalReferences>', 1)
+        elif name == 'xl/_rels/workbook.xml.rels':
+            text = text.replace('</Relationships>', '<Relationship Id="rIdExt1" '
+                                'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/externalLink" '
+                                'Target="externalLinks/externalLink1.xml"/></Relationships>')
+        elif name == '[Content_Types].xml':
+            text = text.replace('</Types>', '<Override PartName="/xl/externalLinks/externalLink1.xml" '
+                                'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.externalLink+xml"/></Types>')
+        out.append((name, text.encode('utf-8')))
+    out.append(('xl/externalLinks/externalLink1.xml', EXTERNAL_LINK.encode('utf-8')))
+    out.append(('xl/externalLinks/_rels/externalLink1.xml.rels', EXTERNAL_LINK_RELS.encode('utf-8')))
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, data in out:
+            zf.writestr(name, data)
+
+
+def create_encrypted(path):
+    plain = path + '.plain.xlsx'
+    create_plain(plain)
+    add_original_parts(plain)
+    with zipfile.ZipFile(plain) as zf:
+        original = {name: zf.read(name) for name in zf.namelist()}
+    encrypt_package(plain, path, PASSWORD)
+    os.remove(plain)
+    return original
+
+
+@contextlib.contextmanager
+def no_temp_dirs():
+    """Zählt mkdtemp()-Aufrufe und neue Einträge im temporären Verzeichnis"""
+    created = []
+    real_mkdtemp = tempfile.mkdtemp
+
+    def recording_mkdtemp(*args, **kwargs):
+        path = real_mkdtemp(*args, **kwargs)
+        created.append(path)
+        return path
+
+    before = set(os.listdir(tempfile.gettempdir()))
+    tempfile.mkdtemp = recording_mkdtemp
+    try:
+        yield created
+    finally:
+        tempfile.mkdtemp = real_mkdtemp
+        created.extend(os.path.join(tempfile.gettempdir(), entry)
+                       for entry in set(os.listdir(tempfile.gettempdir())) - before)
+
+
+def save(source, target, changes):
+    log = io.StringIO()
+    with no_temp_dirs() as created, contextlib.redirect_stderr(log):
+        result = write_sheet(source, target, 'Daten', changes, password=PASSWORD, source_password=PASSWORD)
+    assert result['success'], result.get('error')
+    assert not created, f'Klartext-Verzeichnisse angelegt: {created}'
+    assert '[restore_table_xml] Starte Wiederherstellung' in log.getvalue(), 'Wiederherstellung nicht durchlaufen'
+    return log.getvalue()
+
+
+def decrypted_members(path, base_dir):
+    plain = os.path.join(base_dir, 'geprüft.xlsx')
+    decrypt_package(path, plain, PASSWORD)
+    with zipfile.ZipFile(plain) as zf:
+        members = {name: zf.read(name) for name in zf.namelist()}
+    return plain, members
+
+
+def check_output(target, original, base_dir, label):
+    plain, members = decrypted_members(target, base_dir)
+    table = members['xl/tables/table1.xml'].decode('utf-8')
+    assert f'xr:uid="{TABLE_UID}"' in table, f'{label}: xr:uid der Tabelle verloren'
+    assert re.search(rf'<table [^>]*ref="A1:C{ROWS + 1}"', table), f'{label}: Tabellenbereich'
+    assert members['xl/externalLinks/externalLink1.xml'] == original['xl/externalLinks/externalLink1.xml'], \
+        f'{label}: externalLink nicht wie im Original'
+    assert members['xl/workbook.xml'] == original['xl/workbook.xml'], f'{label}: workbook.xml'
+    ws = load_workbook(plain)['Daten']
+    assert ws['B5'].value == 'GEÄNDERT', f'{label}: Zelländerung fehlt'
+    assert list(ws.tables) == ['Daten_Tabelle']
+    return members
+
+
+def main():
+    base_dir = tempfile.mkdtemp(prefix='package-restore-test-')
+    try:
+        source = os.path.join(base_dir, 'Quelle.xlsx')
+        original = create_encrypted(source)
+
+        # FALL 3: einzelne Zelle geändert
+        target = os.path.join(base_dir, 'Zelle.xlsx')
+        log = save(source, target, {'editedCells': {'3-1': 'GEÄNDERT'}})
+        assert '[FALL 2]' not in log
+        members = check_output(target, original, base_dir, 'FALL 3')
+        assert members['xl/tables/table1.xml'] == original['xl/tables/table1.xml'], 'Table-XML nicht unverändert'
+        print('✓ FALL 3: Table-XML und externalLink aus dem Reader, kein temporäres Verzeichnis')
+
+        # FALL 2: kompletter Rewrite
+        data = [[i, f'Name {i}', i * 2.5] for i in range(ROWS)]
+        data[3][1] = 'GEÄNDERT'
+        target = os.path.join(base_dir, 'Rewrite.xlsx')
+        log = save(source, target, {'headers': ['Nr', 'Name', 'Wert'], 'data': data,
+                                    'fullRewrite': True, 'structuralChange': True})
+        assert '[FALL 2]' in log
+        check_output(target, original, base_dir, 'FALL 2')
+        print('✓ FALL 2: Wiederherstellung ohne Entpacken, Ausgabe wieder verschlüsselt')
+    finally:
+        get_package_cache().evict()
+        shutil.rmtree(base_dir, ignore_errors=True)
+    print('\nAlle Tests erfolgreich')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+/**
+ * Test für das Vorab-Lesen von Sheets (python/excel_prefetch_scheduler.js)
+ *
+ * Der Hintergrund-Leser ist hier eine Attrappe mit fester Lesedauer, die das
+ * AbortSignal beachtet. Geprüft werden: Vorlesen der Nachbarn, Vorrang und
+ * Abbruch bei Vordergrund-Anfragen (inkl. Wiederaufnahme), Warten auf einen
+ * laufenden Vorab-Lesevorgang desselben Sheets, Ungültigkeit nach Änderung
+ * der Datei (Größe + mtime) und invalidate() - auch für Netzlaufwerke, deren
+ * Einträge unter dem gestagten lokalen Pfad liegen.
+ *
+ * Aufruf: node test-prefetch-scheduler.js
+ */
+const assert = require('assert');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { SheetPrefetchScheduler } = require('./python/excel_prefetch_scheduler');
+const { NetworkStagingCache } = require('./python/network_staging');
+
+const READ_MS = 80;
+const SHEETS = ['Jan', 'Feb', 'Mar', 'Apr'];
+
+function sleep(ms) {
+    return new Promise(resolve => setTimeout(resolve, ms));
+}
+
+async function waitFor(predicate, label, timeoutMs = 3000) {
+    const started = Date.now();
+    while (!predicate()) {
+        if (Date.now() - started > timeoutMs) throw new Error(`Timeout: ${label}`);
+        await sleep(5);
+    }
+}
+
+function sheetResult(filePath, sheetName, source) {
+    const content = fs.readFileSync(filePath, 'utf8');
+    return { success: true, sheetName, source, content, headers: ['A'], data: [['A'], [sheetName]] };
+}
+
+/**
+ * Hintergrund-Leser mit Protokoll: jeder Aufruf wird mit Sheet, Start und
+ * Ausgang (fertig / abgebrochen) festgehalten
+ */
+function createReader() {
+    const calls = [];
+    const readSheet = (filePath, sheetName, signal) => new Promise((resolve, reject) => {
+        const call = { filePath, sheetName, state: 'running', signal };
+        calls.push(call);
+        const timer = setTimeout(() => {
+            call.state = 'done';
+            resolve(sheetResult(filePath, sheetName, 'prefetch'));
+        }, READ_MS);
+        signal.addEventListener('abort', () => {
+            clearTimeout(timer);
+            call.state = 'aborted';
+            reject(new Error('aborted'));
+        });
+    });
+    return { calls, readSheet };
+}
+
+function createScheduler(reader) {
+    return new SheetPrefetchScheduler({ readSheet: reader.readSheet, idleDelayMs: 10, neighbours: 1, recent: 0 });
+}
+
+async function testNeighbours(filePath) {
+    const reader = createReader();
+    const scheduler = createScheduler(reader);
+
+    const first = await scheduler.foreground(filePath, 'Feb', async () => sheetResult(filePath, 'Feb', 'foreground'));
+    assert.strictEqual(first.source, 'foreground');
+    scheduler.schedule(filePath, 'Feb', SHEETS);
+    await waitFor(() => scheduler.getStats().prefetched === 2, 'Nachbarn vorgelesen');
+    assert.deepStrictEqual(reader.calls.map(c => c.sheetName).sort(), ['Jan', 'Mar']);
+    assert.ok(reader.calls.every(c => c.state === 'done'));
+
+    // Sheet-Wechsel: aus dem Cache, ohne Loader
+    let loaderCalled = false;
+    const hit = await scheduler.foreground(filePath, 'Mar', async () => { loaderCalled = true; return null; });
+    assert.strictEqual(hit.source, 'prefetch');
+    assert.strictEqual(loaderCalled, false);
+    assert.strictEqual(scheduler.getStats().hits, 1);
+    scheduler.clear();
+    console.log('✓ Nachbar-Sheets werden vorgelesen und beim Wechsel aus dem Cache bedient');
+}
+
+async function testForegroundAbort(filePath) {
+    const reader = createReader();
+    const scheduler = createScheduler(reader);
+    scheduler.schedule(filePath, 'Jan', SHEETS);
+    await waitFor(() => scheduler.inflight && scheduler.inflight.sheetName === 'Feb', 'Vorab-Lesen gestartet');
+    const prefetchCall = reader.calls[0];
+
+    // Vordergrund-Anfrage für ein anderes Sheet: Vorab-Lesen bricht sofort ab
+    let inflightDuringLoad = 'unset';
+    const result = await scheduler.foreground(filePath, 'Apr', async () => {
+        assert.strictEqual(prefetchCall.state, 'aborted');
+        assert.strictEqual(prefetchCall.signal.aborted, true);
+        await sleep(READ_MS);
+        inflightDuringLoad = scheduler.inflight;
+        return sheetResult(filePath, 'Apr', 'foreground');
+    });
+    assert.strictEqual(result.source, 'foreground');
+    assert.strictEqual(inflightDuringLoad, null, 'Während der Vordergrund-Anfrage darf nichts vorgelesen werden');
+    assert.strictEqual(scheduler.getStats().cancelled, 1);
+    assert.strictEqual(reader.calls.length, 1);
+
+    // Danach wird das abgebrochene Sheet wieder aufgenommen
+    await waitFor(() => scheduler.get(filePath, 'Feb'), 'Abgebrochenes Sheet nachgeholt');
+    assert.strictEqual(reader.calls.filter(c => c.sheetName === 'Feb').length, 2);
+    scheduler.clear();
+    console.log('✓ Vordergrund hat Vorrang: Vorab-Lesen abgebrochen, danach wieder aufgenommen');
+}
+
+async function testJoinInflight(filePath) {
+    const reader = createReader();
+    const scheduler = createScheduler(reader);
+    scheduler.schedule(filePath, 'Jan', SHEETS);
+    await waitFor(() => scheduler.inflight && scheduler.inflight.sheetName === 'Feb', 'Vorab-Lesen gestartet');
+
+    let loaderCalled = false;
+    const result = await scheduler.foreground(filePath, 'Feb', async () => { loaderCalled = true; return null; });
+    assert.strictEqual(result.source, 'prefetch');
+    assert.strictEqual(loaderCalled, false);
+    assert.strictEqual(reader.calls[0].state, 'done');
+    assert.strictEqual(scheduler.getStats().joined, 1);
+    scheduler.clear();
+    console.log('✓ Laufendes Vorab-Lesen desselben Sheets wird abgewartet statt neu gelesen');
+}
+
+async function testSignature(filePath) {
+    const reader = createReader();
+    const scheduler = createScheduler(reader);
+    await scheduler.foreground(filePath, 'Jan', async () => sheetResult(filePath, 'Jan', 'foreground'));
+    assert.ok(scheduler.get(filePath, 'Jan'));
+
+    // Gespeichert: andere Größe und Änderungszeit -> Eintrag gilt nicht mehr
+    fs.writeFileSync(filePath, 'v2 - gespeichert');
+    const future = new Date(Date.now() + 5000);
+    fs.utimesSync(filePath, future, future);
+    assert.strictEqual(scheduler.get(filePath, 'Jan'), null);
+    assert.strictEqual(scheduler.getStats().entries, 0);
+    const reread = await scheduler.foreground(filePath, 'Jan', async () => sheetResult(filePath, 'Jan', 'foreground'));
+    assert.strictEqual(reread.content, 'v2 - gespeichert');
+
+    // Datei ändert sich während des Vorlesens: Ergebnis wird verworfen
+    scheduler.schedule(filePath, 'Jan', SHEETS);
+    await waitFor(() => scheduler.inflight, 'Vorab-Lesen gestartet');
+    fs.writeFileSync(filePath, 'v3 - während des Lesens geändert');
+    await waitFor(() => reader.calls.length > 0 && reader.calls[0].state === 'done', 'Vorab-Lesen fertig');
+    await sleep(5);
+    assert.strictEqual(scheduler.get(filePath, reader.calls[0].sheetName), null);
+    assert.ok(scheduler.getStats().failed >= 1);
+    scheduler.clear();
+    console.log('✓ Einträge gelten nur für den gelesenen Dateistand (Größe + mtime)');
+}
+
+async function testInvalidate(baseDir) {
+    // Netzlaufwerk: excel:readSheet führt den Cache unter dem gestagten Pfad
+    const shareDir = path.join(baseDir, 'freigabe');
+    fs.mkdirSync(shareDir);
+    const remotePath = path.join(shareDir, 'Mappe.xlsx');
+    fs.writeFileSync(remotePath, 'remote v1');
+    const staging = new NetworkStagingCache({
+        cacheDir: path.join(baseDir, 'staging'),
+        isNetworkPath: filePath => filePath.startsWith(shareDir)
+    });
+    const localPath = await staging.pull(remotePath);
+    assert.notStrictEqual(localPath, remotePath);
+    assert.strictEqual(staging.localPath(remotePath), localPath, 'localPath() muss dem Pfad aus pull() entsprechen');
+    const plainPath = path.join(baseDir, 'lokal.xlsx');
+    assert.strictEqual(staging.localPath(plainPath), plainPath);
+
+    const reader = createReader();
+    const scheduler = createScheduler(reader);
+    await scheduler.foreground(localPath, 'Jan', async () => sheetResult(localPath, 'Jan', 'foreground'));
+    scheduler.schedule(localPath, 'Jan', SHEETS);
+    await waitFor(() => scheduler.inflight, 'Vorab-Lesen gestartet');
+
+    // Wie main.js nach einer Sheet-Operation auf der Freigabe (invalidatePrefetch)
+    scheduler.invalidate(staging.localPath(remotePath));
+    assert.strictEqual(scheduler.getStats().entries, 0);
+    assert.strictEqual(scheduler.getStats().queued, 0);
+    assert.strictEqual(reader.calls[0].state, 'aborted');
+    await sleep(READ_MS + 30);
+    assert.strictEqual(scheduler.getStats().entries, 0, 'Abgebrochenes Vorab-Lesen darf nicht nachlaufen');
+    scheduler.clear();
+    console.log('✓ invalidate über den gestagten Pfad: Einträge, Warteschlange und laufendes Lesen verworfen');
+}
+
+async function test() {
+    const baseDir = fs.mkdtempSync(path.join(os.tmpdir(), 'prefetch-test-'));
+    const filePath = path.join(baseDir, 'Mappe.xlsx');
+    fs.writeFileSync(filePath, 'v1');
+    try {
+        await testNeighbours(filePath);
+        await testForegroundAbort(filePath);
+        await testJoinInflight(filePath);
+        await testSignature(filePath);
+        await testInvalidate(baseDir);
+        console.log('\nAlle Tests erfolgreich');
+    } finally {
+        fs.rmSync(baseDir, { recursive: true, force: true });
+    }
+}
+
+test().catch(e => {
+    console.error('Fehler:', e.message);
+    process.exit(1);
+});
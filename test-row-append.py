@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Test: Zeilen auf Paketebene anhängen (python/excel_row_append.py)
+
+Geprüft werden die Suche nach der ersten freien Zeile (vorhandene leere,
+formatierte Zeilen werden ergänzt), die Formate aus der Vorlagenzeile,
+Datumsformate (Spaltenformat bzw. neues DD.MM.YYYY über _Styles.with_num_fmt),
+das Erweitern von dimension, Tabellen-ref, autoFilter, bedingter Formatierung
+und Datenüberprüfung - und dass alle nicht betroffenen Zeilen und Teile
+byte-gleich bleiben.
+
+Aufruf:
+    python3 test-row-append.py
+"""
+
+import os
+import re
+import shutil
+import sys
+import tempfile
+import zipfile
+import xml.etree.ElementTree as ET
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+from openpyxl import Workbook, load_workbook
+from openpyxl.formatting.rule import CellIsRule
+from openpyxl.styles import Font, PatternFill
+from openpyxl.worksheet.datavalidation import DataValidation
+from openpyxl.worksheet.table import Table
+
+from excel_row_append import append_rows
+
+NS_MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+YELLOW = PatternFill(start_color='FFFFFF00', end_color='FFFFFF00', fill_type='solid')
+BLUE = PatternFill(start_color='FF0000FF', end_color='FF0000FF', fill_type='solid')
+ROW_RE = re.compile(rb'<row\b[^>]*?\br="(\d+)"[^>]*?(?:/>|>.*?</row>)', re.S)
+
+# Excel-Seriennummern (Umwandlung macht main.js)
+SERIAL_2023_03_15 = 45000
+SERIAL_2023_06_23 = 45100
+
+
+def create_workbook(path):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Daten'
+    ws.append(['Flag', 'Kommentar', 'Auftrag', 'Datum', 'Menge', 'Termin'])
+    for i in range(10):
+        row = i + 2
+        ws.cell(row=row, column=1, value='x' if i % 3 == 0 else None)
+        ws.cell(row=row, column=3, value=f'AUF-{i:03d}')
+        ws.cell(row=row, column=4, value=i)
+        ws.cell(row=row, column=5, value=i * 1.5)
+    # Spaltenformat für Datumswerte in Spalte D (in den ersten 100 Zeilen)
+    ws['D2'] = datetime(2023, 1, 2)
+    ws['D2'].number_format = 'dd/mm/yy'
+    # Letzte Datenzeile = Vorlage: fett, gelb (ohne Datumsformat), Zahlenformat
+    ws['C11'].font = Font(bold=True)
+    ws['D11'].fill = YELLOW
+    ws['E11'].number_format = '#,##0.00'
+    # Leere, aber formatierte Zeilen direkt dahinter
+    ws['C12'].fill = BLUE
+    ws['A13'].fill = BLUE
+    # Fremde Zeile weiter unten - bleibt unberührt
+    ws['C16'] = 'Fremd'
+
+    ws.add_table(Table(displayName='Auftraege', ref='A1:F11'))
+    ws.conditional_formatting.add('C2:C11', CellIsRule(operator='equal', formula=['"AUF-001"'], fill=YELLOW))
+    ws.conditional_formatting.add('A1:F1', CellIsRule(operator='equal', formula=['"Flag"'], fill=BLUE))
+    validation = DataValidation(type='decimal', operator='greaterThan', formula1='0')
+    validation.add('E2:E11')
+    ws.add_data_validation(validation)
+
+    liste = wb.create_sheet('Liste')
+    liste.append(['Name', 'Wert'])
+    for i in range(3):
+        liste.append([f'n{i}', i])
+    liste.auto_filter.ref = 'A1:B4'
+
+    wb.create_sheet('Leer')
+    wb.save(path)
+
+
+def read_part(path, name):
+    with zipfile.ZipFile(path) as zf:
+        return zf.read(name)
+
+
+def sheet_rows(path, part):
+    """{Zeilennummer: rohes <row>-XML}"""
+    return {int(m.group(1)): m.group(0) for m in ROW_RE.finditer(read_part(path, part))}
+
+
+def tag_attr(path, part, tag, attr):
+    match = re.search(rb'<' + tag.encode() + rb'\b[^>]*>', read_part(path, part))
+    return ET.fromstring(match.group(0).rstrip(b'/>') + b'/>').get(attr) if match else None
+
+
+def cell_xf(path, part, ref):
+    match = re.search(rb'<c r="' + ref.encode() + rb'"([^>]*?)/?>', read_part(path, part))
+    style = re.search(rb's="(\d+)"', match.group(1)) if match else None
+    return int(style.group(1)) if style else 0
+
+
+def cell_xfs(path):
+    root = ET.fromstring(read_part(path, 'xl/styles.xml'))
+    return root.find(f'{{{NS_MAIN}}}cellXfs').findall(f'{{{NS_MAIN}}}xf')
+
+
+def test_append(base, base_dir):
+    path = os.path.join(base_dir, 'anhaengen.xlsx')
+    shutil.copy(base, path)
+    part = 'xl/worksheets/sheet1.xml'
+    before = sheet_rows(path, part)
+    xfs_before = len(cell_xfs(path))
+
+    rows = [
+        [[1, 'x', False], [3, 'AUF-NEU-1', False], [4, SERIAL_2023_03_15, True], [5, 12.5, False],
+         [6, SERIAL_2023_06_23, True]],
+        [[3, 'AUF-NEU-2', False], [4, SERIAL_2023_06_23, True]],
+        [[3, 'Ä<&> "Test"\x01', False], [5, 7, False]],
+    ]
+    result = append_rows(path, 'Daten', rows, [1, 3])
+    assert result['success'], result.get('error')
+    assert result['startRow'] == 12 and result['insertedCount'] == 3, result
+    assert result['extendedTables'] == 1 and result['extendedRanges'] == 2, result
+
+    # Nicht betroffene Zeilen byte-gleich (Header, Daten, fremde Zeile)
+    after = sheet_rows(path, part)
+    for number in list(range(1, 12)) + [16]:
+        assert after[number] == before[number], f'Zeile {number} verändert'
+    # Vorhandene formatierte Zelle ohne neuen Wert bleibt erhalten
+    original_a13 = re.search(rb'<c r="A13".*?(?:/>|</c>)', before[13]).group(0)
+    assert b' s="' in original_a13 and original_a13 in after[13]
+
+    # Formate aus der Vorlagenzeile 11
+    for col in ('C', 'E'):
+        template = cell_xf(path, part, f'{col}11')
+        for number in (12, 13, 14):
+            if f'{col}{number}'.encode() in after[number]:
+                assert cell_xf(path, part, f'{col}{number}') == template, f'{col}{number}'
+
+    # Datumswerte: Spaltenformat von D2 mit Füllung aus D11, Spalte F neues DD.MM.YYYY
+    xfs = cell_xfs(path)
+    assert len(xfs) == xfs_before + 2, 'Ein neuer xf-Eintrag pro (Style, Format)'
+    d_style = cell_xf(path, part, 'D12')
+    assert cell_xf(path, part, 'D13') == d_style
+    assert xfs[d_style].get('numFmtId') == xfs[cell_xf(path, part, 'D2')].get('numFmtId')
+    assert xfs[d_style].get('fillId') == xfs[cell_xf(path, part, 'D11')].get('fillId')
+    assert xfs[d_style].get('applyNumberFormat') == '1'
+
+    wb = load_workbook(path)
+    ws = wb['Daten']
+    assert ws['D12'].number_format == 'dd/mm/yy'
+    assert ws['D12'].fill.fgColor.rgb == 'FFFFFF00'
+    assert ws['D12'].value == datetime(2023, 3, 15)
+    assert ws['F12'].number_format == 'DD.MM.YYYY'
+    assert ws['F12'].value == datetime(2023, 6, 23)
+    assert ws['C12'].font.bold and ws['E12'].number_format == '#,##0.00'
+    assert ws['A12'].value == 'x' and ws['C13'].value == 'AUF-NEU-2' and ws['E14'].value == 7
+    raw = read_part(path, part)
+    assert 'Ä&lt;&amp;&gt; "Test"_x0001_'.encode() in raw, 'Text nicht escaped'
+    assert ws['C16'].value == 'Fremd'
+
+    # dimension, Tabelle, bedingte Formatierung, Datenüberprüfung
+    assert tag_attr(path, part, 'dimension', 'ref') == 'A1:F16'
+    table = ET.fromstring(read_part(path, 'xl/tables/table1.xml'))
+    assert table.get('ref') == 'A1:F14'
+    assert table.find(f'{{{NS_MAIN}}}autoFilter').get('ref') == 'A1:F14'
+    sqrefs = [m.decode() for m in re.findall(rb'<conditionalFormatting sqref="([^"]+)"', raw)]
+    assert sorted(sqrefs) == ['A1:F1', 'C2:C14'], sqrefs
+    assert tag_attr(path, part, 'dataValidation', 'sqref') == 'E2:E14'
+
+    # Andere Teile unverändert
+    with zipfile.ZipFile(base) as zf:
+        names = zf.namelist()
+    for name in names:
+        if name not in (part, 'xl/styles.xml', 'xl/tables/table1.xml'):
+            assert read_part(path, name) == read_part(base, name), f'{name} verändert'
+    print('✓ Anhängen: erste freie Zeile 12, formatierte Leerzeilen ergänzt, Vorlagen- und Datumsformate')
+    print('✓ dimension, Tabelle, bedingte Formatierung und Datenüberprüfung erweitert, Rest byte-gleich')
+
+    # Zweiter Durchlauf mit fester Vorlagenzeile: Lücke vor der fremden Zeile,
+    # der abgeleitete Datums-xf wird wiederverwendet
+    before = sheet_rows(path, part)
+    result = append_rows(path, 'Daten', [[[3, 'AUF-NEU-4', False], [4, SERIAL_2023_03_15, True]]], [1, 3],
+                         template_row=11)
+    assert result['startRow'] == 15, result
+    after = sheet_rows(path, part)
+    for number in list(range(1, 15)) + [16]:
+        assert after[number] == before[number], f'Zeile {number} verändert'
+    assert len(cell_xfs(path)) == xfs_before + 2
+    assert cell_xf(path, part, 'D15') == d_style and cell_xf(path, part, 'C15') == cell_xf(path, part, 'C11')
+    assert append_rows(path, 'Daten', [], [1, 3])['insertedCount'] == 0
+    assert ET.fromstring(read_part(path, 'xl/tables/table1.xml')).get('ref') == 'A1:F15'
+    print('✓ Zweiter Durchlauf (templateRow): Zeile 15 vor der fremden Zeile, xf wiederverwendet')
+
+
+def test_other_sheets(base, base_dir):
+    path = os.path.join(base_dir, 'liste.xlsx')
+    shutil.copy(base, path)
+    result = append_rows(path, 'Liste', [[[1, 'n3', False], [2, 3, False]], [[1, 'n4', False]]], [1])
+    assert result['success'] and result['startRow'] == 5, result
+    part = 'xl/worksheets/sheet2.xml'
+    assert tag_attr(path, part, 'autoFilter', 'ref') == 'A1:B6'
+    assert tag_attr(path, part, 'dimension', 'ref') == 'A1:B6'
+    assert read_part(path, 'xl/worksheets/sheet1.xml') == read_part(base, 'xl/worksheets/sheet1.xml')
+    assert [c.value for c in load_workbook(path)['Liste']['A']] == ['Name', 'n0', 'n1', 'n2', 'n3', 'n4']
+    print('✓ autoFilter des Sheets erweitert')
+
+    result = append_rows(path, 'Leer', [[[1, 'erste', False]]], [1])
+    assert result['success'] and result['startRow'] == 2, result
+    assert load_workbook(path)['Leer']['A2'].value == 'erste'
+    assert append_rows(path, 'Fehlt', [[[1, 'x', False]]], [1])['success'] is False
+    print('✓ Leeres Sheet und fehlendes Sheet')
+
+
+def main():
+    base_dir = tempfile.mkdtemp(prefix='row-append-test-')
+    try:
+        base = os.path.join(base_dir, 'Basis.xlsx')
+        create_workbook(base)
+        test_append(base, base_dir)
+        test_other_sheets(base, base_dir)
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+    print('\nAlle Tests erfolgreich')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Test: Zeilen-Fingerprints und Delta-Writes (excel_row_delta.py / .js)
+
+1. Fingerprints aus Python und JavaScript stimmen für dieselben Werte überein
+   (Ganzzahlen, Floats in Exponentenschreibweise, Wahrheitswerte, Datumswerte,
+   Datums-Strings wie vom Reader, leere Zellen und leere Zellen am Zeilenende).
+2. buildRowDelta (JS) auf Fingerprints des Python-Readers enthält genau die
+   geänderten und angehängten Zeilen.
+3. Speichern mit rowDelta bzw. rowFingerprints ergibt dieselbe Datei wie ein
+   vollständiges fullRewrite (Sheet-XML, Styles und Shared Strings identisch).
+
+Benötigt node (für excel_row_delta.js) und openpyxl.
+
+Aufruf:
+    python3 test-row-delta.py
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import zipfile
+from datetime import date, datetime
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BASE_DIR, 'python'))
+from openpyxl import Workbook
+from openpyxl.styles import Font, PatternFill
+
+from excel_reader import read_sheet
+from excel_row_delta import build_row_delta, compute_row_fingerprints, resolve_rows_to_write
+from excel_writer import write_sheet
+
+YELLOW = PatternFill(start_color='FFFFFF00', end_color='FFFFFF00', fill_type='solid')
+
+# Datumswerte gehen als {"$date": ISO} an node und werden dort zu Date-Objekten
+NODE_SCRIPT = r"""
+const { computeRowFingerprints, buildRowDelta } = require(process.argv[1]);
+const revive = (key, value) => (value && value.$date ? new Date(value.$date) : value);
+const input = JSON.parse(require('fs').readFileSync(0, 'utf8'), revive);
+const output = input.fingerprints
+    ? buildRowDelta(input.rows, input.fingerprints)
+    : computeRowFingerprints(input.rows);
+process.stdout.write(JSON.stringify(output));
+"""
+
+VALUE_ROWS = [
+    [1, 2, 3],
+    [1.0, -0.0, 1e21, 2 ** 53],
+    [0.1, 123.456, -1.25, 1 / 3],
+    [1e-5, 1.5e-7, -0.000001, 2.5e-300, 1.7976931348623157e308],
+    [True, False, 'True', '1'],
+    ['Müller', 'ÄÖÜ ß', '日本語', '😀 emoji', 'a\tb\nc'],
+    [datetime(2024, 1, 5, 13, 45, 7), date(2023, 12, 31), datetime(2020, 2, 29, 0, 0, 0, 250000)],
+    ['05.01.2024', '05.01.2024 13:45:00', '2024-01-05'],
+    ['', None, 'x', '', None],
+    ['a', '', None],
+    ['a'],
+    [None, None],
+    [],
+    [0, '', 0.0, '0'],
+]
+
+
+def _to_json(value):
+    if isinstance(value, (date, datetime)):
+        if not isinstance(value, datetime):
+            value = datetime(value.year, value.month, value.day)
+        return {'$date': value.isoformat(timespec='milliseconds') + 'Z'}
+    return value
+
+
+def run_node(payload):
+    script = os.path.join(BASE_DIR, 'python', 'excel_row_delta.js')
+    completed = subprocess.run(['node', '-e', NODE_SCRIPT, script],
+                               input=json.dumps(payload, default=_to_json, ensure_ascii=False),
+                               capture_output=True, text=True, encoding='utf-8', check=True)
+    return json.loads(completed.stdout)
+
+
+def test_fingerprint_parity():
+    rows = [[_to_json(v) for v in row] for row in VALUE_ROWS]
+    js = run_node({'rows': rows})
+    py = compute_row_fingerprints(VALUE_ROWS)
+    for row, js_fp, py_fp in zip(VALUE_ROWS, js, py):
+        assert js_fp == py_fp, f'Fingerprint weicht ab für {row!r}: JS {js_fp}, Python {py_fp}'
+
+    # Leere Werte am Zeilenende zählen nicht, andere Typen schon
+    assert py[9] == py[10], '[a, "", None] und [a] müssen gleich sein'
+    assert py[11] == py[12], 'leere Zeilen müssen gleich sein'
+    assert len(set(compute_row_fingerprints([[1], ['1'], [True], [1.5]]))) == 4, 'Typen müssen unterscheidbar sein'
+    print(f'✓ Fingerprints: Python und JavaScript stimmen für {len(VALUE_ROWS)} Zeilen überein')
+
+
+def create_workbook(path):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Daten'
+    ws.append(['Name', 'Menge', 'Preis', 'Datum', 'Notiz'])
+    for cell in ws[1]:
+        cell.font = Font(bold=True)
+    for i in range(200):
+        ws.append([f'Artikel {i}', i, round(i * 0.15, 2), datetime(2024, 1, 1 + i % 28),
+                   'ÄÖÜ' if i % 13 == 0 else None])
+        if i % 10 == 0:
+            ws.cell(row=i + 2, column=1).fill = YELLOW
+    wb.save(path)
+
+
+def sheet_members(path):
+    with zipfile.ZipFile(path) as zf:
+        return {name: zf.read(name) for name in zf.namelist()
+                if name.startswith('xl/worksheets/') or name in ('xl/styles.xml', 'xl/sharedStrings.xml')}
+
+
+def test_delta_save_equals_full_rewrite(base_dir):
+    source = os.path.join(base_dir, 'Quelle.xlsx')
+    create_workbook(source)
+    loaded = read_sheet(source, 'Daten')
+    headers, data, fingerprints = loaded['headers'], loaded['data'], loaded['rowFingerprints']
+
+    changed = [list(row) for row in data]
+    changed[3][1] = 9999
+    changed[50][0] = 'Geändert ÄÖÜ'
+    changed[117][4] = ''
+    changed[199][2] = 0.00001
+    changed.append(['Neu', 1, 2.5, '05.01.2024', 'angehängt'])
+    expected_rows = [3, 50, 117, 199, 200]
+
+    # Delta aus JS (wie python_bridge.js) auf Fingerprints des Python-Readers
+    js_delta = run_node({'rows': changed, 'fingerprints': fingerprints})
+    assert [entry[0] for entry in js_delta['rows']] == expected_rows, js_delta['rows']
+    assert js_delta['rowCount'] == len(changed)
+    assert build_row_delta(changed, fingerprints) == js_delta, 'Python- und JS-Delta weichen ab'
+    row_count, rows = resolve_rows_to_write(changed, None, fingerprints)
+    assert row_count == len(changed) and [idx for idx, _ in rows] == expected_rows
+
+    outputs = {}
+    variants = {
+        'voll': {'headers': headers, 'data': changed, 'fullRewrite': True},
+        'rowDelta': {'headers': headers, 'data': [], 'rowDelta': js_delta, 'fullRewrite': True},
+        'rowFingerprints': {'headers': headers, 'data': changed, 'rowFingerprints': fingerprints,
+                            'fullRewrite': True},
+    }
+    for label, changes in variants.items():
+        output = os.path.join(base_dir, f'{label}.xlsx')
+        result = write_sheet(source, output, 'Daten', changes)
+        assert result['success'], (label, result)
+        outputs[label] = sheet_members(output)
+
+    for label in ('rowDelta', 'rowFingerprints'):
+        assert outputs[label].keys() == outputs['voll'].keys(), label
+        for name, content in outputs['voll'].items():
+            assert outputs[label][name] == content, f'{label}: {name} weicht vom vollständigen Schreiben ab'
+
+    reread = read_sheet(os.path.join(base_dir, 'rowDelta.xlsx'), 'Daten')
+    assert reread['data'][3][1] == 9999 and reread['data'][50][0] == 'Geändert ÄÖÜ'
+    assert reread['data'][200][0] == 'Neu'
+    print('✓ Delta-Save (rowDelta aus JS, rowFingerprints) ergibt dieselbe Datei wie fullRewrite')
+
+
+def main():
+    test_fingerprint_parity()
+    base_dir = tempfile.mkdtemp(prefix='row-delta-test-')
+    try:
+        test_delta_save_equals_full_rewrite(base_dir)
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+    print('\nAlle Tests erfolgreich')
+
+
+if __name__ == '__main__':
+    main()
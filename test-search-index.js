@@ -0,0 +1,346 @@
+/**
+ * Test + Benchmark für den Trigramm-Such-Index (python/excel_search_index.js)
+ *
+ * Vergleicht die Kandidaten des Index mit der linearen Suche des Renderers
+ * (parseSearchQuery / rowMatchesQuery / matchesTerm werden direkt aus
+ * src/index.html geladen) auf Zufallsdaten: einfache, AND-, OR- und gemischte
+ * Anfragen, Platzhalter * und ?, Begriffe unter 3 Zeichen und
+ * Groß-/Kleinschreibung. Der Index darf keine Treffer verlieren - jede Zeile,
+ * die linear gefunden wird, muss unter den Kandidaten sein.
+ *
+ * Kurze Begriffe schränken über Uni-/Bigramme ein, nur reine Platzhalter
+ * nicht. Seitenweise Suche: gleiche Treffer wie die Liste ohne Seiten, die
+ * Verifikation endet mit der vollen Seite, total ist dann hochgerechnet.
+ *
+ * Danach: Serialisieren/Laden, Ungültigkeit bei geändertem Fingerprint und
+ * ein Benchmark mit 500.000 Zeilen x 5 Spalten (ganze Liste und erste Seite).
+ *
+ * Aufruf: node test-search-index.js [seed]
+ */
+const assert = require('assert');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { TrigramIndex, SearchIndexStore, rowText } = require('./python/excel_search_index');
+
+const RANDOM_ROWS = 3000;
+const RANDOM_QUERIES = 1500;
+const BENCH_ROWS = 500000;
+const PAGE_SIZE = 100;
+
+// Suchfunktionen des Renderers (unverändert aus src/index.html)
+function loadRendererSearch() {
+    const html = fs.readFileSync(path.join(__dirname, 'src', 'index.html'), 'utf8');
+    const start = html.indexOf('// ==================== Search Functions');
+    const end = html.indexOf('// Kandidaten-Zeilen aus dem Trigramm-Index', start);
+    assert.ok(start >= 0 && end > start, 'Suchfunktionen in src/index.html nicht gefunden');
+    return new Function(`${html.slice(start, end)}
+        return { wildcardToRegex, matchesTerm, parseSearchQuery, rowMatchesQuery };`)();
+}
+const { parseSearchQuery, rowMatchesQuery } = loadRendererSearch();
+
+// Wie search() im Renderer: ohne Operatoren ist die ganze Eingabe ein Begriff
+function parseQuery(query) {
+    query = query.trim();
+    return / (AND|OR) /i.test(query) ? parseSearchQuery(query) : { type: 'simple', term: query };
+}
+
+// Reproduzierbarer Zufall (mulberry32)
+function createRandom(seed) {
+    let state = seed >>> 0;
+    const next = () => {
+        state = (state + 0x6D2B79F5) >>> 0;
+        let t = state;
+        t = Math.imul(t ^ (t >>> 15), t | 1);
+        t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+        return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+    };
+    next.int = (n) => Math.floor(next() * n);
+    next.pick = (list) => list[next.int(list.length)];
+    return next;
+}
+
+const WORDS = [
+    'Projekt', 'Alpha', 'Beta', 'München', 'MÜNCHEN', 'Straße', 'Köln', 'Zürich', 'Übergabe',
+    'äöü', 'Item', 'x', 'ab', 'AUF-', '2024', '2025', '(Test)', 'a.b', '50%', '[neu]', '$Preis', 'Ä-Ö'
+];
+
+function randomCell(random) {
+    const kind = random();
+    if (kind < 0.12) return random() < 0.5 ? null : '';
+    if (kind < 0.25) return random.int(100000);
+    const count = 1 + random.int(3);
+    const words = [];
+    for (let i = 0; i < count; i++) {
+        words.push(random() < 0.3 ? random.pick(WORDS) + random.int(1000) : random.pick(WORDS));
+    }
+    return words.join(random() < 0.8 ? ' ' : '');
+}
+
+function randomRows(random, count) {
+    const rows = [];
+    for (let i = 0; i < count; i++) {
+        const row = [];
+        const width = 3 + random.int(3);
+        for (let col = 0; col < width; col++) row.push(randomCell(random));
+        rows.push(row);
+    }
+    return rows;
+}
+
+function flipCase(random, text) {
+    return [...text].map(ch => (random() < 0.5 ? ch.toUpperCase() : ch.toLowerCase())).join('');
+}
+
+/**
+ * Suchbegriff aus einer zufälligen Zelle: Teilstring (auch unter 3 Zeichen)
+ * oder Platzhalter-Muster, das auf die ganze Zelle passt; gelegentlich ohne Treffer
+ */
+function randomTerm(random, rows) {
+    for (;;) {
+        let term;
+        const row = random.pick(rows);
+        const cell = String(random.pick(row) || '');
+        const kind = random();
+        if (!cell || kind < 0.08) {
+            term = random.pick(['qqq', 'zz', 'Ärger', '*q?q*', 'x']);
+        } else if (kind < 0.55) {
+            const start = random.int(cell.length);
+            term = cell.substr(start, 1 + random.int(8));
+        } else {
+            // Platzhalter: einzelne Zeichen durch ?, Abschnitte durch * ersetzen
+            term = '';
+            for (let i = 0; i < cell.length; i++) {
+                const r = random();
+                if (r < 0.12) term += '?';
+                else if (r < 0.2) {
+                    term += '*';
+                    i += random.int(4);
+                } else term += cell[i];
+            }
+            if (random() < 0.3) term = '*' + term.slice(random.int(term.length));
+            if (!/[*?]/.test(term)) term += '*';
+        }
+        term = flipCase(random, term).trim();
+        if (term && !/ (AND|OR) /i.test(` ${term} `)) return term;
+    }
+}
+
+function randomQuery(random, rows) {
+    const kind = random.int(4);
+    const terms = (n) => Array.from({ length: n }, () => randomTerm(random, rows));
+    if (kind === 0) return terms(1)[0];
+    if (kind === 1) return terms(2 + random.int(2)).join(random() < 0.5 ? ' AND ' : ' and ');
+    if (kind === 2) return terms(2 + random.int(2)).join(' OR ');
+    return [terms(2).join(' AND '), terms(1)[0], terms(2).join(' AND ')].slice(0, 2 + random.int(2)).join(' OR ');
+}
+
+function linearSearch(rows, parsed) {
+    const result = [];
+    rows.forEach((row, rowIndex) => {
+        if (rowMatchesQuery(row, parsed)) result.push(rowIndex);
+    });
+    return result;
+}
+
+/**
+ * Keine falschen Negative: jede linear gefundene Zeile ist Kandidat, und die
+ * Suche mit Verifikation liefert genau die lineare Trefferliste
+ */
+function assertNoFalseNegatives(index, rows, query) {
+    const parsed = parseQuery(query);
+    const expected = linearSearch(rows, parsed);
+    const candidates = index.candidates(parsed);
+    if (candidates) {
+        const set = new Set(candidates);
+        for (const rowIndex of expected) {
+            assert.ok(set.has(rowIndex), `Zeile ${rowIndex} fehlt in den Kandidaten für "${query}"`);
+        }
+    }
+    const found = index.search(parsed, rowIndex => rowMatchesQuery(rows[rowIndex], parsed));
+    assert.deepStrictEqual(found.rows, expected, `Trefferliste für "${query}"`);
+    return { parsed, expected, candidates };
+}
+
+function testFixedQueries() {
+    const rows = [
+        ['Projekt Alpha', 'MÜNCHEN', 2025],
+        ['projekt beta', 'münchen', null, 'Straße 5'],
+        ['Item', 'Köln', 2024, ''],
+        ['AUF-0042', 'Zürich', 'a.b (Test)'],
+        ['ab', 'x', 0]
+    ];
+    const index = TrigramIndex.build(rows.map(row => rowText(row)));
+    const cases = [
+        ['münchen', [0, 1]],
+        ['MüNcHeN', [0, 1]],
+        ['projekt AND münchen', [0, 1]],
+        ['Alpha OR Köln', [0, 2]],
+        ['projekt AND beta OR zürich', [1, 3]],
+        ['m?nchen', [0, 1]],
+        ['*Test*', [3]],
+        ['auf-*', [3]],
+        ['ab', [4]],
+        ['x', [4]],
+        ['alpha münchen', []], // Über die Zellgrenze "Projekt Alpha" | "MÜNCHEN" hinweg kein Treffer
+        ['2025', [0]]
+    ];
+    for (const [query, expected] of cases) {
+        const { expected: linear } = assertNoFalseNegatives(index, rows, query);
+        assert.deepStrictEqual(linear, expected, `Erwartete Treffer für "${query}"`);
+    }
+    // Kurze Begriffe über Bi- bzw. Unigramme, nie über Zellgrenzen ("2025" | "" | "ab")
+    assert.deepStrictEqual([...index.candidates(parseQuery('ab'))], [4], 'Bigramm schränkt ein');
+    assert.deepStrictEqual([...index.candidates(parseQuery('*x?'))], [4], 'Unigramm schränkt ein');
+    assert.deepStrictEqual([...index.candidates(parseQuery('ab OR münchen'))], [0, 1, 4]);
+    assert.deepStrictEqual([...index.candidates(parseQuery('ab AND münchen'))], []);
+    assert.deepStrictEqual([...index.candidates(parseQuery('5a'))], [], 'Zeichenpaar über die Zellgrenze');
+    assert.strictEqual(index.candidates(parseQuery('*')), null, 'Nur Platzhalter schränkt nicht ein');
+    assert.strictEqual(index.candidates(parseQuery('?* OR köln')), null, 'OR mit uneinschränkbarem Teil');
+    console.log('✓ Feste Anfragen: Groß-/Kleinschreibung, Platzhalter, kurze Begriffe, Zellgrenzen');
+}
+
+function testRandomQueries(seed) {
+    const random = createRandom(seed);
+    const rows = randomRows(random, RANDOM_ROWS);
+    const index = TrigramIndex.build(rows.map(row => rowText(row)));
+    const copy = TrigramIndex.deserialize(index.serialize());
+    const stats = { simple: 0, and: 0, or: 0, mixed: 0, restricted: 0, hits: 0 };
+
+    for (let i = 0; i < RANDOM_QUERIES; i++) {
+        const query = randomQuery(random, rows);
+        const { parsed, expected, candidates } = assertNoFalseNegatives(index, rows, query);
+        stats[parsed.parts ? 'mixed' : parsed.type]++;
+        if (candidates) stats.restricted++;
+        if (expected.length) stats.hits++;
+        assert.deepStrictEqual(copy.candidates(parsed), candidates, 'Geladener Index liefert andere Kandidaten');
+    }
+    for (const type of ['simple', 'and', 'or', 'mixed']) {
+        assert.ok(stats[type] > RANDOM_QUERIES / 10, `Zu wenige ${type}-Anfragen`);
+    }
+    assert.ok(stats.restricted > RANDOM_QUERIES / 3 && stats.hits > RANDOM_QUERIES / 3, 'Test wäre ohne Aussagekraft');
+    console.log(`✓ ${RANDOM_QUERIES} Zufallsanfragen (Seed ${seed}): keine falschen Negative ` +
+        `(${stats.simple} einfach, ${stats.and} AND, ${stats.or} OR, ${stats.mixed} gemischt; ` +
+        `${stats.restricted} eingeschränkt, ${stats.hits} mit Treffern), Serialisierung identisch`);
+}
+
+function testPaging(seed) {
+    const random = createRandom(seed + 1);
+    const rows = randomRows(random, RANDOM_ROWS);
+    const index = TrigramIndex.build(rows.map(row => rowText(row)));
+    for (const query of ['ab', 'x', '*ln', 'münchen', 'projekt OR köln', '2024 AND a', '?']) {
+        const parsed = parseQuery(query);
+        const expected = linearSearch(rows, parsed);
+        for (const [offset, limit] of [[0, 10], [5, 20], [0, expected.length], [expected.length, 10]]) {
+            let calls = 0;
+            const page = index.search(parsed, rowIndex => (calls++, rowMatchesQuery(rows[rowIndex], parsed)), { offset, limit });
+            assert.deepStrictEqual(page.rows, expected.slice(offset, offset + limit), `Seite ${offset}+${limit} für "${query}"`);
+            if (page.totalExact) {
+                assert.strictEqual(page.total, expected.length, `total für "${query}"`);
+                assert.strictEqual(calls, page.candidates);
+            } else {
+                // Frühes Ende: nur bis zum letzten Treffer der Seite geprüft, total hochgerechnet
+                assert.strictEqual(page.rows.length, limit);
+                assert.ok(calls < page.candidates && page.total >= offset + limit && page.total <= page.candidates,
+                    `Hochrechnung für "${query}": ${page.total}`);
+            }
+        }
+        const all = index.search(parsed, rowIndex => rowMatchesQuery(rows[rowIndex], parsed));
+        assert.ok(all.totalExact && all.total === expected.length);
+    }
+    console.log('✓ Seitenweise Suche: gleiche Treffer, Verifikation endet mit der vollen Seite');
+}
+
+async function testStore(baseDir) {
+    const filePath = path.join(baseDir, 'Quelle.xlsx');
+    fs.writeFileSync(filePath, 'v1');
+    const rows = [['Projekt Alpha', 'München'], ['Beta', 'Köln']];
+    const store = new SearchIndexStore({ indexDir: path.join(baseDir, 'index') });
+    const built = await store.ensure(filePath, 'Daten', null, async () => rows);
+    assert.strictEqual(built.rowCount, 2);
+    assert.strictEqual(store.stats.builds, 1);
+
+    // Neue Sitzung: von der Platte, kein Neuaufbau
+    const fresh = new SearchIndexStore({ indexDir: path.join(baseDir, 'index') });
+    const loaded = fresh.get(filePath, 'Daten');
+    assert.ok(loaded, 'Index muss von der Platte geladen werden');
+    assert.strictEqual(fresh.stats.loads, 1);
+    assert.deepStrictEqual([...loaded.candidates(parseQuery('köln'))], [1]);
+
+    // Datei geändert: alter Fingerprint - Index gilt nicht mehr und wird neu aufgebaut
+    fs.writeFileSync(filePath, 'v2 - gespeichert');
+    const future = new Date(Date.now() + 5000);
+    fs.utimesSync(filePath, future, future);
+    assert.strictEqual(fresh.get(filePath, 'Daten'), null, 'Veralteter Index darf nicht verwendet werden');
+    const rebuilt = await fresh.ensure(filePath, 'Daten', null, async () => [...rows, ['Neu', 'Köln']]);
+    assert.strictEqual(fresh.stats.builds, 1);
+    assert.deepStrictEqual([...rebuilt.candidates(parseQuery('köln'))], [1, 2]);
+    assert.strictEqual(TrigramIndex.deserialize(Buffer.from('kein Index')), null);
+    console.log('✓ Speichern/Laden über den Fingerprint, veralteter Index wird verworfen');
+}
+
+function timed(fn) {
+    const started = process.hrtime.bigint();
+    const result = fn();
+    return [result, Number(process.hrtime.bigint() - started) / 1e6];
+}
+
+async function benchmark(baseDir) {
+    const cities = ['München', 'Köln', 'Zürich', 'Hamburg', 'Berlin', 'Straßburg', 'Wien'];
+    const random = createRandom(1);
+    const rows = [];
+    for (let i = 0; i < BENCH_ROWS; i++) {
+        rows.push([
+            `AUF-${String(i).padStart(7, '0')}`,
+            cities[i % cities.length],
+            `${random.pick(WORDS)} ${random.pick(WORDS)} ${random.int(10000)}`,
+            random.int(1000000),
+            `${1 + (i % 28)}.${1 + (i % 12)}.${2020 + (i % 6)}`
+        ]);
+    }
+    const filePath = path.join(baseDir, 'Gross.xlsx');
+    fs.writeFileSync(filePath, 'gross');
+    const store = new SearchIndexStore({ indexDir: path.join(baseDir, 'index') });
+    let buildMs = Date.now();
+    const index = await store.ensure(filePath, 'Daten', null, async () => rows);
+    buildMs = Date.now() - buildMs;
+    console.log(`✓ Aufbau im Worker: ${BENCH_ROWS} Zeilen x 5 Spalten in ${buildMs} ms, ` +
+        `${index.terms.length} N-Gramme, ${(index.serialize().length / 1048576).toFixed(1)} MB`);
+
+    const queries = ['auf-0412345', 'AUF-00123*', 'zürich AND 2023', 'Projekt AND Beta OR Straßburg AND 50%', '(test)', 'ab', '*ln'];
+    for (const query of queries) {
+        const parsed = parseQuery(query);
+        const [expected, linearMs] = timed(() => linearSearch(rows, parsed));
+        const [found, indexMs] = timed(() => index.search(parsed, rowIndex => rowMatchesQuery(rows[rowIndex], parsed)));
+        assert.deepStrictEqual(found.rows, expected, `Trefferliste für "${query}"`);
+        assert.ok(found.candidates < BENCH_ROWS, `"${query}" schränkt über den Index nicht ein`);
+        let calls = 0;
+        const [page, pageMs] = timed(() => index.search(parsed, rowIndex => (calls++, rowMatchesQuery(rows[rowIndex], parsed)),
+            { offset: 0, limit: PAGE_SIZE }));
+        assert.deepStrictEqual(page.rows, expected.slice(0, PAGE_SIZE));
+        assert.ok(page.totalExact || calls < found.candidates, `"${query}": Seite prüft alle Kandidaten`);
+        console.log(`  "${query}": ${expected.length} Treffer, ${found.candidates} Kandidaten - ` +
+            `Index ${indexMs.toFixed(1)} ms, linear ${linearMs.toFixed(0)} ms (${(linearMs / Math.max(indexMs, 0.01)).toFixed(1)}x), ` +
+            `erste Seite ${pageMs.toFixed(1)} ms (${calls} geprüft, total ${page.totalExact ? '' : '~'}${page.total})`);
+    }
+}
+
+async function test() {
+    const seed = Number(process.argv[2]) || Date.now() % 100000;
+    const baseDir = fs.mkdtempSync(path.join(os.tmpdir(), 'search-index-test-'));
+    try {
+        testFixedQueries();
+        testRandomQueries(seed);
+        testPaging(seed);
+        await testStore(baseDir);
+        await benchmark(baseDir);
+        console.log('\nAlle Tests erfolgreich');
+    } finally {
+        fs.rmSync(baseDir, { recursive: true, force: true });
+    }
+}
+
+test().catch(e => {
+    console.error('Fehler:', e.message);
+    process.exit(1);
+});
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Test + Benchmark: schlüsselbasierter Sheet-Vergleich (excel_sheet_diff)
+
+Erzeugt zwei Sheets mit N Zeilen (Shared Strings wie aus Excel) - Stand alt
+und Stand neu mit geänderten, gelöschten und angehängten Zeilen - und prüft
+das Ergebnis des Vergleichs im Speicher und mit ausgelagerten Partitionen.
+Vorab eine kleine Mappe mit Inline-Strings, Formeln und
+Wahrheitswerten (langsamer Weg über _TOKEN_RE).
+
+Aufruf:
+    python3 test-sheet-diff.py                 # 2 x 500.000 Zeilen
+    python3 test-sheet-diff.py --rows 50000
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+from excel_sheet_diff import diff_sheets
+
+NS = ('xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+      'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"')
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/sharedStrings.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+    '</Types>'
+)
+ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<workbook {NS}><sheets><sheet name="Daten" sheetId="1" r:id="rId1"/></sheets></workbook>'
+)
+WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" Target="sharedStrings.xml"/>'
+    '</Relationships>'
+)
+HEADERS = ['Auftrag', 'Kunde', 'Menge', 'Ort', 'Preis', 'Status', 'Bemerkung', 'Nr']
+
+
+def column_letter(index):
+    letters = ''
+    index += 1
+    while index:
+        index, rest = divmod(index - 1, 26)
+        letters = chr(65 + rest) + letters
+    return letters
+
+
+def write_workbook(path, rows, cell_xml=None):
+    """Sheet 'Daten' mit Header + rows; Texte als Shared Strings (wie Excel)"""
+    strings = {}
+
+    def cell(ref, value):
+        if cell_xml:
+            custom = cell_xml(ref, value)
+            if custom:
+                return custom
+        if isinstance(value, (int, float)):
+            return f'<c r="{ref}"><v>{value}</v></c>'
+        return f'<c r="{ref}" s="1" t="s"><v>{strings.setdefault(value, len(strings))}</v></c>'
+
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+        zf.writestr('[Content_Types].xml', CONTENT_TYPES)
+        zf.writestr('_rels/.rels', ROOT_RELS)
+        zf.writestr('xl/workbook.xml', WORKBOOK)
+        zf.writestr('xl/_rels/workbook.xml.rels', WORKBOOK_RELS)
+        with zf.open('xl/worksheets/sheet1.xml', 'w') as f:
+            last = f'{column_letter(len(HEADERS) - 1)}{len(rows) + 1}'
+            f.write(f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<worksheet {NS}>'
+                    f'<dimension ref="A1:{last}"/><sheetData>'.encode())
+            buffer = []
+            for number, row in enumerate([HEADERS] + rows, 1):
+                buffer.append(f'<row r="{number}">' + ''.join(
+                    cell(f'{column_letter(col)}{number}', value)
+                    for col, value in enumerate(row) if value != '') + '</row>')
+                if len(buffer) >= 5000:
+                    f.write(''.join(buffer).encode())
+                    buffer = []
+            f.write(''.join(buffer).encode())
+            f.write(b'</sheetData></worksheet>')
+        zf.writestr('xl/sharedStrings.xml', f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<sst {NS}>'
+                    + ''.join(f'<si><t>{escape(text)}</t></si>' for text in strings) + '</sst>')
+
+
+def check_special_cells(temp_dir):
+    """Inline-Strings, Formeln, Wahrheitswerte, Header-Suche, fehlendes Sheet"""
+    old = [['A-1', 'x', 1, '', '', '', '', 1], ['A-2', 'y', 2, '', '', '', '', 2], ['A-3', 'z', 3, '', '', '', '', 3]]
+    new = [['A-2', 'y', 2, '', '', '', '', 2], ['A-1', 'x', 1, '', '', '', '', 1], ['A-3', 'z', 4, '', '', '', '', 3],
+           ['A-4', 'neu', 1, '', '', '', '', 4]]
+
+    def inline(ref, value):
+        # Spalte B als Inline-String, Spalte C als Formel mit Ergebnis, Spalte H als Wahrheitswert
+        if ref.startswith('B') and ref != 'B1':
+            return f'<c r="{ref}" t="inlineStr"><is><t>{escape(value)}</t></is></c>'
+        if ref.startswith('C') and ref != 'C1':
+            return f'<c r="{ref}"><f>H{ref[1:]}*1</f><v>{value}</v></c>'
+        if ref.startswith('H') and ref != 'H1':
+            return f'<c r="{ref}" t="b"><v>{1 if value % 2 else 0}</v></c>'
+        return None
+
+    old_path = os.path.join(temp_dir, 'alt-klein.xlsx')
+    new_path = os.path.join(temp_dir, 'neu-klein.xlsx')
+    write_workbook(old_path, old, inline)
+    write_workbook(new_path, new, inline)
+
+    result = diff_sheets(new_path, 'Daten', old_path, 'Daten', 'Auftrag')
+    assert result['success'], result
+    assert result['added'] == [3], result
+    assert result['deleted'] == [], result
+    assert result['changed'] == [[2, 2, [2]]], result
+    assert result['unchanged'] == 2
+    assert diff_sheets(new_path, 'Daten', old_path, 'Daten', 'A')['changed'] == [[2, 2, [2]]]
+    assert not diff_sheets(new_path, 'Daten', old_path, 'Fehlt', 1)['success']
+    assert not diff_sheets(new_path, 'Daten', old_path, 'Daten', 'Unbekannt')['success']
+    print('✓ Inline-Strings, Formeln, Wahrheitswerte, Schlüssel per Header/Buchstabe, Fehlerfälle')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark schlüsselbasierter Sheet-Vergleich')
+    parser.add_argument('--rows', type=int, default=500000)
+    args = parser.parse_args()
+
+    temp_dir = tempfile.mkdtemp(prefix='sheet-diff-test-')
+    try:
+        check_special_cells(temp_dir)
+
+        n = args.rows
+        old = [[f'AUF-{i:07d}', f'Kunde {i}', i % 97, f'Ort {i % 50}', i * 0.5,
+                'offen' if i % 3 else '', f'Bemerkung {i % 1000}', i] for i in range(n)]
+        new = [list(row) for row in old]
+        changed = set(range(0, n, 50))
+        for i in changed:
+            new[i][2] = -1
+        deleted = {i for i in range(n) if i % 100 == 7}
+        new = [row for i, row in enumerate(new) if i not in deleted]
+        added = n // 100
+        new += [[f'NEU-{i:07d}', 'Neukunde', 1, '', 0, '', '', 0] for i in range(added)]
+
+        old_path = os.path.join(temp_dir, 'alt.xlsx')
+        new_path = os.path.join(temp_dir, 'neu.xlsx')
+        started = time.time()
+        write_workbook(old_path, old)
+        write_workbook(new_path, new)
+        print(f'Testdaten: 2 x {n} Zeilen x {len(HEADERS)} Spalten in {time.time() - started:.1f} s')
+
+        for label, limit in (('im Speicher', n * 2), ('ausgelagert', max(n // 10, 1000))):
+            result = diff_sheets(new_path, 'Daten', old_path, 'Daten', 'Auftrag', max_memory_rows=limit)
+            assert result['success'], result
+            assert result['spilled'] == (label == 'ausgelagert'), result['spilled']
+            assert result['deleted'] == sorted(deleted)
+            assert len(result['added']) == added
+            assert all(new[row][0].startswith('NEU-') for row in result['added'])
+            assert {target for _, target, _ in result['changed']} == changed
+            assert all(columns == [2] for _, _, columns in result['changed'])
+            assert result['unchanged'] == n - len(deleted) - len(changed)
+            print(f'✓ {label}: {len(result["added"])} hinzugefügt, {len(result["deleted"])} gelöscht, '
+                  f'{len(result["changed"])} geändert, {result["partitions"]} Partitionen '
+                  f'in {result["durationMs"] / 1000:.1f} s')
+
+        print('\nAlle Tests erfolgreich')
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
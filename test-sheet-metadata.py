@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Test: Metadaten-Durchlauf des xlwings-Readers (python/excel_sheet_metadata.py)
+
+read_sheet_metadata + clip_metadata ersetzen die beiden openpyxl-Ladevorgänge
+in read_sheet_xlwings. Verglichen wird mit der bisherigen openpyxl-Auswertung
+(Referenz unten) auf handgeschriebenen Paketen:
+
+- Verbundene Zellen, AutoFilter, ausgeblendete Zeilen und Spalten - auch
+  <col min max hidden> über mehrere Spalten und Einträge außerhalb des
+  gelesenen Bereichs
+- Spaltenbreiten
+- Füllfarben und Schriften (Theme-Farben, <b val="0"/>, Zellen ohne r-Attribut,
+  Zellen und Zeilen, die im XML fehlen)
+- Gestyltes Standardformat (cellXfs[0] mit eigener Schrift): auch fehlende
+  Zellen tragen das Format
+- Aktives Sheet laut Excel weicht von workbook.xml ab: read_sheet_xlwings
+  (gefälschtes xlwings) liest die Metadaten des Sheets, das Excel liefert
+
+Benötigt openpyxl, kein Excel.
+
+Aufruf:
+    python3 test-sheet-metadata.py
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import types
+import zipfile
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BASE_DIR, 'python'))
+from openpyxl import load_workbook
+
+from excel_sheet_metadata import clip_metadata, read_sheet_metadata
+
+NS = ('xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+      'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"')
+
+CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>
+<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>
+<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>
+<Override PartName="/xl/worksheets/sheet2.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>
+</Types>"""
+
+ROOT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>
+</Relationships>"""
+
+# Reihenfolge der Sheets im Paket weicht von der in workbook.xml ab (rId2 -> sheet1)
+WORKBOOK = f"""<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook {NS}>
+<bookViews><workbookView activeTab="0"/></bookViews>
+<sheets>
+<sheet name="Daten" sheetId="1" r:id="rId2"/>
+<sheet name="Zweites" sheetId="2" r:id="rId1"/>
+</sheets>
+</workbook>"""
+
+WORKBOOK_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet2.xml"/>
+<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="/xl/worksheets/sheet1.xml"/>
+<Relationship Id="rId3" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>
+</Relationships>"""
+
+PLAIN_FONT = '<font><sz val="11"/><color theme="1"/><name val="Calibri"/></font>'
+STYLED_FONT = '<font><b/><sz val="12"/><color rgb="FF1F4E79"/><name val="Verdana"/></font>'
+
+STYLES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<styleSheet {ns}>
+<fonts count="5">
+{default_font}
+<font><b/><sz val="11"/><color rgb="FFC00000"/><name val="Calibri"/></font>
+<font><i/><sz val="14"/><color rgb="FF000000"/><name val="Georgia"/></font>
+<font><b val="0"/><i val="1"/><sz val="10.5"/><color theme="4"/><name val="Arial"/></font>
+<font><sz val="11"/><color rgb="FF00B050"/><name val="Calibri"/></font>
+</fonts>
+<fills count="5">
+<fill><patternFill patternType="none"/></fill>
+<fill><patternFill patternType="gray125"/></fill>
+<fill><patternFill patternType="solid"><fgColor rgb="FFFFFF00"/><bgColor indexed="64"/></patternFill></fill>
+<fill><patternFill patternType="solid"><fgColor theme="5" tint="0.6"/><bgColor indexed="64"/></patternFill></fill>
+<fill><patternFill patternType="solid"><fgColor rgb="FF92D050"/><bgColor indexed="64"/></patternFill></fill>
+</fills>
+<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>
+<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>
+<cellXfs count="6">
+<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>
+<xf numFmtId="0" fontId="0" fillId="2" borderId="0" xfId="0" applyFill="1"/>
+<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>
+<xf numFmtId="0" fontId="2" fillId="4" borderId="0" xfId="0" applyFont="1" applyFill="1"/>
+<xf numFmtId="0" fontId="3" fillId="3" borderId="0" xfId="0" applyFont="1" applyFill="1"/>
+<xf numFmtId="14" fontId="4" fillId="0" borderId="0" xfId="0" applyFont="1" applyNumberFormat="1"/>
+</cellXfs>
+<cellStyles count="1"><cellStyle name="Standard" xfId="0" builtinId="0"/></cellStyles>
+</styleSheet>"""
+
+
+def _cell(ref, value, style=None):
+    s = f' s="{style}"' if style is not None else ''
+    r = f' r="{ref}"' if ref else ''
+    if isinstance(value, str):
+        return f'<c{r}{s} t="inlineStr"><is><t>{value}</t></is></c>'
+    if value is None:
+        return f'<c{r}{s}/>'
+    return f'<c{r}{s}><v>{value}</v></c>'
+
+
+# Daten: A1:F8 gelesen. Spalten C:E über einen <col>-Eintrag ausgeblendet,
+# F:H eine Breite (G, H liegen außerhalb), Zeilen 3 und 6 ausgeblendet,
+# Zeile 7 fehlt, Zeile 10 ausgeblendet außerhalb des Bereichs.
+SHEET_DATEN = f"""<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<worksheet {NS}>
+<dimension ref="A1:F10"/>
+<cols>
+<col min="1" max="1" width="20.5" customWidth="1"/>
+<col min="2" max="2" width="12" customWidth="1"/>
+<col min="3" max="5" width="9" hidden="1" customWidth="1"/>
+<col min="6" max="8" width="30.25" customWidth="1"/>
+</cols>
+<sheetData>
+<row r="1">{_cell('A1', 'Name', 2)}{_cell('B1', 'Wert', 2)}{_cell('C1', 'X')}{_cell('D1', 'Y', 1)}{_cell('E1', 'Z')}{_cell('F1', 'Datum', 2)}</row>
+<row r="2">{_cell('A2', 'a', 1)}{_cell('B2', 1)}{_cell('D2', 'verbunden', 3)}{_cell('F2', 45000, 5)}</row>
+<row r="3" hidden="1">{_cell('A3', 'b')}{_cell('B3', 2, 4)}{_cell('C3', None, 1)}</row>
+<row>{_cell(None, 'c', 3)}{_cell(None, 3)}{_cell(None, None, 4)}</row>
+<row r="5">{_cell('A5', 'd')}</row>
+<row r="6" hidden="1" spans="1:6">{_cell('B6', 5, 1)}{_cell('F6', 'f', 2)}</row>
+<row r="8">{_cell('A8', 'Summe', 3)}{_cell('C8', 10, 0)}{_cell('E8', 'e', 4)}{_cell('F8', 'g', 1)}</row>
+<row r="10" hidden="1">{_cell('G10', 'außerhalb', 1)}</row>
+</sheetData>
+<autoFilter ref="A1:F8"/>
+<mergeCells count="2"><mergeCell ref="A8:B8"/><mergeCell ref="D2:E2"/></mergeCells>
+</worksheet>"""
+
+# Zweites: dünn besetzt, ohne <cols>, ohne Filter; A1:C4 gelesen
+SHEET_ZWEITES = f"""<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<worksheet {NS}>
+<sheetData>
+<row r="1">{_cell('A1', 'K', 3)}{_cell('C1', 'L')}</row>
+<row r="2" hidden="true">{_cell('B2', 7, 2)}</row>
+<row r="4">{_cell('A4', 'x', 1)}{_cell('C4', 9, 5)}</row>
+</sheetData>
+<mergeCells count="1"><mergeCell ref="A3:C3"/></mergeCells>
+</worksheet>"""
+
+RANGES = {'Daten': (8, 6), 'Zweites': (4, 3)}
+
+
+def build_package(path, default_font=PLAIN_FONT):
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('[Content_Types].xml', CONTENT_TYPES)
+        zf.writestr('_rels/.rels', ROOT_RELS)
+        zf.writestr('xl/workbook.xml', WORKBOOK)
+        zf.writestr('xl/_rels/workbook.xml.rels', WORKBOOK_RELS)
+        zf.writestr('xl/styles.xml', STYLES.format(ns=NS, default_font=default_font))
+        zf.writestr('xl/worksheets/sheet1.xml', SHEET_DATEN)
+        zf.writestr('xl/worksheets/sheet2.xml', SHEET_ZWEITES)
+
+
+# =============================================================================
+# Referenz: bisherige openpyxl-Auswertung aus read_sheet_xlwings
+# =============================================================================
+
+def _argb_to_hex(argb):
+    if not argb or argb == '00000000':
+        return None
+    if len(argb) == 8:
+        return '#' + argb[2:].upper()
+    if len(argb) == 6:
+        return '#' + argb.upper()
+    return None
+
+
+def openpyxl_reference(path, sheet_name, max_row, max_col):
+    """
+    Wie vorher mit openpyxl - nur ausgeblendete Spalten werden über den
+    ganzen <col>-Bereich aufgelöst (vorher nur die erste Spalte) und die
+    Breiten kommen aus den Spalteneinträgen (vorher per COM).
+    """
+    wb = load_workbook(path, data_only=True)
+    ws = wb[sheet_name]
+
+    hidden_columns, widths = set(), {}
+    for dim in ws.column_dimensions.values():
+        for col in range(dim.min, min(dim.max, max_col) + 1):
+            if dim.hidden:
+                hidden_columns.add(col - 1)
+            elif dim.width:
+                widths[str(col - 1)] = dim.width
+
+    hidden_rows = []
+    for row_idx in range(2, max_row + 1):
+        row_dim = ws.row_dimensions.get(row_idx)
+        if row_dim and row_dim.hidden:
+            hidden_rows.append(row_idx - 2)
+
+    cell_styles, cell_fonts = {}, {}
+    for row_idx in range(1, max_row + 1):
+        for col_idx in range(1, max_col + 1):
+            key = f'{row_idx - 1}-{col_idx - 1}'
+            cell = ws.cell(row=row_idx, column=col_idx)
+            if cell.fill and cell.fill.fgColor and cell.fill.fgColor.rgb:
+                rgb = cell.fill.fgColor.rgb
+                if isinstance(rgb, str) and len(rgb) >= 6 and rgb != '00000000':
+                    hex_color = _argb_to_hex(rgb)
+                    if hex_color:
+                        cell_styles[key] = hex_color
+            font = cell.font
+            font_info = {}
+            if font.bold:
+                font_info['bold'] = True
+            if font.italic:
+                font_info['italic'] = True
+            if font.color and isinstance(font.color.rgb, str) and font.color.rgb != '00000000':
+                hex_color = _argb_to_hex(font.color.rgb)
+                if hex_color and hex_color != '#000000':
+                    font_info['color'] = hex_color
+            if font.size and font.size != 11:
+                font_info['size'] = font.size
+            if font.name and font.name.lower() not in ['calibri', 'arial']:
+                font_info['name'] = font.name
+            if font_info:
+                cell_fonts[key] = font_info
+
+    result = {
+        'mergedCells': sorted(str(r) for r in ws.merged_cells.ranges),
+        'autoFilterRange': ws.auto_filter.ref or None,
+        'hiddenColumns': sorted(hidden_columns),
+        'hiddenRows': hidden_rows,
+        'columnWidths': widths,
+        'cellStyles': cell_styles,
+        'cellFonts': cell_fonts
+    }
+    wb.close()
+    return result
+
+
+def assert_same(actual, expected, label):
+    actual = dict(actual, mergedCells=sorted(actual['mergedCells']))
+    for key, value in expected.items():
+        # Der Reader lässt autoFilterRange ohne Filter weg
+        assert actual.get(key) == value, f'{label}, {key}:\n  XML:      {actual.get(key)}\n  openpyxl: {value}'
+
+
+def compare(path, label):
+    for sheet_name, (max_row, max_col) in RANGES.items():
+        meta = read_sheet_metadata(path, sheet_name)
+        assert meta['sheetName'] == sheet_name
+        clipped = clip_metadata(meta, max_row, max_col)
+        expected = openpyxl_reference(path, sheet_name, max_row, max_col)
+        assert_same(clipped, expected, f'{label}/{sheet_name}')
+
+
+# =============================================================================
+# Tests
+# =============================================================================
+
+def test_structure(base_dir):
+    path = os.path.join(base_dir, 'Struktur.xlsx')
+    build_package(path)
+    compare(path, 'Struktur')
+
+    clipped = clip_metadata(read_sheet_metadata(path, 'Daten'), *RANGES['Daten'])
+    assert clipped['hiddenColumns'] == [2, 3, 4], 'Spaltenbereich C:E nicht vollständig'
+    assert clipped['hiddenRows'] == [1, 4], 'Zeile 10 liegt außerhalb'
+    assert clipped['columnWidths'] == {'0': 20.5, '1': 12.0, '5': 30.25}
+    assert clipped['mergedCells'] == ['A8:B8', 'D2:E2'] and clipped['autoFilterRange'] == 'A1:F8'
+
+    # Ohne Namen: aktives Sheet laut workbook.xml, Pfad über absolutes Rel-Target
+    assert read_sheet_metadata(path)['sheetName'] == 'Daten'
+    try:
+        read_sheet_metadata(path, 'Fehlt')
+        raise AssertionError('unbekanntes Sheet nicht erkannt')
+    except KeyError:
+        pass
+    print('✓ Verbunden, AutoFilter, ausgeblendete Zeilen/Spalten (auch <col>-Bereiche), Breiten wie openpyxl')
+
+
+def test_styles(base_dir):
+    path = os.path.join(base_dir, 'Styles.xlsx')
+    build_package(path)
+    compare(path, 'Styles')
+    daten = clip_metadata(read_sheet_metadata(path, 'Daten'), *RANGES['Daten'])
+    assert daten['cellStyles']['3-0'] == '#92D050', 'Zelle ohne r-Attribut'
+    assert daten['cellFonts']['3-0'] == {'italic': True, 'size': 14, 'name': 'Georgia'}
+    assert '2-1' not in daten['cellStyles'], 'Theme-Füllfarbe gemeldet'
+    assert daten['cellFonts']['2-1'] == {'italic': True, 'size': 10.5}, '<b val="0"/> oder Theme-Farbe falsch'
+
+    # Ohne Styles: keine Zellformate
+    meta = read_sheet_metadata(path, 'Daten', extract_styles=False)
+    assert meta['cellFormats'] == {} and meta['formats'] == []
+    empty = clip_metadata(meta, *RANGES['Daten'])
+    assert empty['cellStyles'] == {} and empty['cellFonts'] == {}
+    print('✓ Füllfarben und Schriften wie openpyxl (Theme-Farben, val="0", Zellen ohne r)')
+
+
+def test_styled_default(base_dir):
+    path = os.path.join(base_dir, 'Standardformat.xlsx')
+    build_package(path, default_font=STYLED_FONT)
+    compare(path, 'Standardformat')
+
+    max_row, max_col = RANGES['Daten']
+    daten = clip_metadata(read_sheet_metadata(path, 'Daten'), max_row, max_col)
+    default = {'bold': True, 'size': 12, 'color': '#1F4E79', 'name': 'Verdana'}
+    # Fehlende Zeile 7, fehlende Zelle E2 (verbunden), vorhandene Zelle ohne s
+    for key in ('6-0', '6-5', '1-4', '4-0', '1-1'):
+        assert daten['cellFonts'][key] == default, f'{key} ohne Standardformat'
+    assert len(daten['cellFonts']) == max_row * max_col, 'jede Zelle hat eine Schrift'
+    print('✓ Gestyltes Standardformat: auch fehlende Zellen tragen cellXfs[0]')
+
+
+# -----------------------------------------------------------------------------
+# read_sheet_xlwings mit gefälschtem xlwings: Excel meldet ein anderes aktives Sheet
+# -----------------------------------------------------------------------------
+
+class FakeSheet:
+    def __init__(self, ws, max_row, max_col):
+        self.name = ws.title
+        self._values = [[cell.value for cell in row]
+                        for row in ws.iter_rows(min_row=1, max_row=max_row, max_col=max_col)]
+        last = types.SimpleNamespace(row=max_row, column=max_col)
+        self.used_range = types.SimpleNamespace(last_cell=last)
+
+    def range(self, first, last):
+        return types.SimpleNamespace(value=self._values)
+
+
+class FakeSheets(list):
+    active = None
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return next(sheet for sheet in self if sheet.name == key)
+        return list.__getitem__(self, key)
+
+
+def fake_app(path, active_name):
+    wb = load_workbook(path, data_only=True)
+    sheets = FakeSheets(FakeSheet(wb[name], *RANGES[name]) for name in wb.sheetnames)
+    sheets.active = sheets[active_name]
+    wb.close()
+    book = types.SimpleNamespace(sheets=sheets, close=lambda: None)
+    return types.SimpleNamespace(books=types.SimpleNamespace(open=lambda file_path, read_only=False: book))
+
+
+def test_active_sheet_fallback(base_dir):
+    path = os.path.join(base_dir, 'Aktiv.xlsx')
+    build_package(path, default_font=STYLED_FONT)
+
+    module = types.ModuleType('xlwings')
+    module.App = lambda **kwargs: (_ for _ in ()).throw(RuntimeError('Im Test kein Excel'))
+    sys.modules['xlwings'] = module
+    import excel_reader_xlwings as reader
+
+    real_open_app = reader._open_app
+    calls = []
+    real_read = reader.read_sheet_metadata
+
+    def counting_read(file_path, sheet_name=None, extract_styles=True):
+        calls.append(sheet_name)
+        return real_read(file_path, sheet_name, extract_styles)
+
+    reader.read_sheet_metadata = counting_read
+    try:
+        # workbook.xml: Daten aktiv - Excel meldet Zweites
+        reader._open_app = lambda: (fake_app(path, 'Zweites'), None)
+        result = reader.read_sheet_xlwings(path)
+        assert result['success'], result
+        assert result['sheetName'] == 'Zweites'
+        assert calls == [None, 'Zweites'], f'Metadaten nicht neu gelesen: {calls}'
+        expected = openpyxl_reference(path, 'Zweites', *RANGES['Zweites'])
+        assert_same(result, expected, 'Excel-Aktiv/Zweites')
+
+        # Übereinstimmend: kein zweiter Durchlauf
+        calls.clear()
+        reader._open_app = lambda: (fake_app(path, 'Daten'), None)
+        result = reader.read_sheet_xlwings(path)
+        assert result['sheetName'] == 'Daten' and calls == [None], calls
+        assert_same(result, openpyxl_reference(path, 'Daten', *RANGES['Daten']), 'Excel-Aktiv/Daten')
+    finally:
+        reader._open_app = real_open_app
+        reader.read_sheet_metadata = real_read
+    print('✓ Aktives Sheet laut Excel weicht ab: Metadaten des gelesenen Sheets')
+
+
+def main():
+    base_dir = tempfile.mkdtemp(prefix='sheet-metadata-test-')
+    try:
+        test_structure(base_dir)
+        test_styles(base_dir)
+        test_styled_default(base_dir)
+        test_active_sheet_fallback(base_dir)
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+    print('\nAlle Tests erfolgreich')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Test: Arbeitsblätter auf Paketebene (python/excel_sheet_ops.py)
+
+Eine Mappe mit Sheet-Namen in Anführungszeichen, Formeln auf andere Sheets,
+globalen und sheet-lokalen Namen, Tabelle, Diagramm, Kommentar, Pivot-Quelle
+und docProps/app.xml (wie von Excel geschrieben) wird umbenannt, kopiert,
+verschoben und gelöscht. Geprüft wird das Ergebnis im Paket und beim Laden
+mit openpyxl - und dass nicht betroffene Teile byte-gleich bleiben.
+
+Aufruf:
+    python3 test-sheet-ops.py
+"""
+
+import os
+import re
+import shutil
+import sys
+import tempfile
+import zipfile
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+from openpyxl import Workbook, load_workbook
+from openpyxl.chart import BarChart, Reference
+from openpyxl.comments import Comment
+from openpyxl.workbook.defined_name import DefinedName
+from openpyxl.worksheet.table import Table
+
+from excel_sheet_ops import add_sheet, delete_sheet, rename_sheet, clone_sheet, move_sheet
+
+NS = {
+    'm': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main',
+    'c': 'http://schemas.openxmlformats.org/drawingml/2006/chart',
+    'vt': 'http://schemas.openxmlformats.org/officeDocument/2006/docPropsVTypes',
+    'ep': 'http://schemas.openxmlformats.org/officeDocument/2006/extended-properties',
+    'rel': 'http://schemas.openxmlformats.org/package/2006/relationships',
+}
+
+APP_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Properties xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties" '
+    'xmlns:vt="http://schemas.openxmlformats.org/officeDocument/2006/docPropsVTypes">'
+    '<Application>Microsoft Excel</Application><HeadingPairs><vt:vector size="4" baseType="variant">'
+    '<vt:variant><vt:lpstr>Arbeitsblätter</vt:lpstr></vt:variant><vt:variant><vt:i4>3</vt:i4></vt:variant>'
+    '<vt:variant><vt:lpstr>Benannte Bereiche</vt:lpstr></vt:variant><vt:variant><vt:i4>1</vt:i4></vt:variant>'
+    '</vt:vector></HeadingPairs><TitlesOfParts><vt:vector size="4" baseType="lpstr">'
+    '<vt:lpstr>Mein Blatt</vt:lpstr><vt:lpstr>Summen</vt:lpstr><vt:lpstr>Drittes</vt:lpstr>'
+    '<vt:lpstr>Gesamt</vt:lpstr></vt:vector></TitlesOfParts></Properties>'
+)
+PIVOT_CACHE = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<pivotCacheDefinition xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'refreshOnLoad="1" recordCount="0"><cacheSource type="worksheet">'
+    '<worksheetSource ref="A1:B6" sheet="Mein Blatt"/></cacheSource><cacheFields count="0"/>'
+    '</pivotCacheDefinition>'
+)
+PIVOT_PART = 'xl/pivotCache/pivotCacheDefinition1.xml'
+
+FORMULAS = {
+    'A1': "='Mein Blatt'!B2*2",
+    'A2': "=SUM('Mein Blatt'!B2:B6)",
+    'A3': '="Mein Blatt!A1"',           # Zeichenkette - bleibt immer unverändert
+    'A4': '=Gesamt',
+    'A5': '=Drittes!A1+1',
+}
+
+
+def create_workbook(path):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Mein Blatt'
+    for row in [['Name', 'Wert']] + [[f'n{i}', i * 10] for i in range(5)]:
+        ws.append(row)
+    ws.add_table(Table(displayName='Tab1', ref='A1:B6'))
+    chart = BarChart()
+    chart.add_data(Reference(ws, min_col=2, min_row=2, max_row=6))
+    ws.add_chart(chart, 'D2')
+    ws['A2'].comment = Comment('Hinweis', 'Test')
+
+    sums = wb.create_sheet('Summen')
+    for ref, formula in FORMULAS.items():
+        sums[ref] = formula
+    third = wb.create_sheet('Drittes')
+    third['A1'] = 5
+    third.print_area = 'A1:C3'
+
+    wb.defined_names['Gesamt'] = DefinedName('Gesamt', attr_text="'Mein Blatt'!$B$2:$B$6")
+    ws.defined_names['Lokal'] = DefinedName('Lokal', attr_text="'Mein Blatt'!$A$1")
+    plain = path + '.tmp'
+    wb.save(plain)
+
+    # app.xml wie von Excel und eine Pivot-Quelle (openpyxl schreibt beides nicht)
+    with zipfile.ZipFile(plain) as source, zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as target:
+        for info in source.infolist():
+            data = APP_XML.encode('utf-8') if info.filename == 'docProps/app.xml' else source.read(info)
+            target.writestr(info, data)
+        target.writestr(PIVOT_PART, PIVOT_CACHE)
+    os.remove(plain)
+
+
+def read_part(path, name):
+    with zipfile.ZipFile(path) as zf:
+        return zf.read(name)
+
+
+def part_names(path):
+    with zipfile.ZipFile(path) as zf:
+        return zf.namelist()
+
+
+def defined_names(path):
+    """{(Name, localSheetId): Formel} aus workbook.xml"""
+    root = ET.fromstring(read_part(path, 'xl/workbook.xml'))
+    return {(n.get('name'), n.get('localSheetId')): n.text for n in root.iter(f"{{{NS['m']}}}definedName")}
+
+
+def app_titles(path):
+    root = ET.fromstring(read_part(path, 'docProps/app.xml'))
+    titles = [e.text for e in root.find('ep:TitlesOfParts', NS).iter(f"{{{NS['vt']}}}lpstr")]
+    sheet_count = int(root.find('ep:HeadingPairs', NS).iter(f"{{{NS['vt']}}}i4").__next__().text)
+    return titles, sheet_count
+
+
+def chart_formulas(path, part='xl/charts/chart1.xml'):
+    return [f.text for f in ET.fromstring(read_part(path, part)).iter(f"{{{NS['c']}}}f")]
+
+
+def formulas(path):
+    ws = load_workbook(path)['Summen']
+    return {ref: ws[ref].value for ref in FORMULAS}
+
+
+def case(base, base_dir, name):
+    path = os.path.join(base_dir, f'{name}.xlsx')
+    shutil.copy(base, path)
+    return path
+
+
+def test_rename(base, base_dir):
+    path = case(base, base_dir, 'rename')
+    result = rename_sheet(path, 'Mein Blatt', "Jan's Daten")
+    assert result['success'], result.get('error')
+    assert result['sheets'] == ["Jan's Daten", 'Summen', 'Drittes']
+
+    # Name mit Apostroph: in Formeln gequotet und verdoppelt
+    expected = dict(FORMULAS, A1="='Jan''s Daten'!B2*2", A2="=SUM('Jan''s Daten'!B2:B6)")
+    assert formulas(path) == expected, formulas(path)
+    names = defined_names(path)
+    assert names[('Gesamt', None)] == "'Jan''s Daten'!$B$2:$B$6"
+    assert names[('Lokal', '0')] == "'Jan''s Daten'!$A$1"
+    assert names[('_xlnm.Print_Area', '2')] == "'Drittes'!$A$1:$C$3"
+    assert chart_formulas(path) == ["'Jan''s Daten'!$B$2:$B$6"]
+    source = ET.fromstring(read_part(path, PIVOT_PART)).find('.//m:worksheetSource', NS)
+    assert source.get('sheet') == "Jan's Daten"
+    assert app_titles(path) == (["Jan's Daten", 'Summen', 'Drittes', 'Gesamt'], 3)
+
+    # Nicht betroffene Teile byte-gleich
+    for part in ('xl/worksheets/sheet1.xml', 'xl/worksheets/sheet3.xml', 'xl/tables/table1.xml', 'xl/styles.xml'):
+        assert read_part(path, part) == read_part(base, part), f'{part} verändert'
+
+    # Zurück auf einen einfachen Namen: ohne Anführungszeichen
+    assert rename_sheet(path, "Jan's Daten", 'Daten')['success']
+    assert formulas(path)['A1'] == '=Daten!B2*2'
+    assert chart_formulas(path) == ['Daten!$B$2:$B$6']
+    # Nur Groß-/Kleinschreibung ändern ist erlaubt
+    assert rename_sheet(path, 'Daten', 'DATEN')['sheets'][0] == 'DATEN'
+    assert load_workbook(path)['DATEN']['B6'].value == 40
+    print('✓ Umbenennen: Formeln, definierte Namen, Diagramm, Pivot-Quelle und app.xml folgen')
+
+
+def test_clone(base, base_dir):
+    path = case(base, base_dir, 'clone')
+    result = clone_sheet(path, 'Mein Blatt', 'Kopie')
+    assert result['success'], result.get('error')
+    assert result['sheets'] == ['Mein Blatt', 'Summen', 'Drittes', 'Kopie']
+
+    wb = load_workbook(path)
+    original, copy = wb['Mein Blatt'], wb['Kopie']
+    assert [[c.value for c in row] for row in copy.iter_rows()] == \
+        [[c.value for c in row] for row in original.iter_rows()]
+    assert list(copy.tables) == ['Tab1_2'] and copy.tables['Tab1_2'].ref == 'A1:B6'
+    assert list(original.tables) == ['Tab1']
+    assert copy['A2'].comment is not None and copy['A2'].comment.text == 'Hinweis'
+
+    # Tabellen-ids eindeutig, Zeichnung und Diagramm dupliziert (Kopie zeigt auf ihr eigenes Diagramm)
+    names = part_names(path)
+    table_ids = [ET.fromstring(read_part(path, n)).get('id') for n in names if re.match(r'xl/tables/table\d+\.xml$', n)]
+    assert len(table_ids) == 2 and len(set(table_ids)) == 2, table_ids
+    assert len([n for n in names if re.match(r'xl/charts/chart\d+\.xml$', n)]) == 2
+    drawings = [n for n in names if re.match(r'xl/drawings/drawing\d+\.xml$', n)]
+    assert len(drawings) == 2
+    copied_rels = ET.fromstring(read_part(path, 'xl/drawings/_rels/drawing2.xml.rels'))
+    assert [r.get('Target') for r in copied_rels] == ['/xl/charts/chart2.xml']
+
+    # Sheet-lokaler Name für die Kopie, die Kopie ist nicht mit ausgewählt
+    assert defined_names(path)[('Lokal', '3')] == 'Kopie!$A$1'
+    assert defined_names(path)[('Lokal', '0')] == "'Mein Blatt'!$A$1"
+    copy_part = 'xl/worksheets/sheet4.xml'
+    assert b'tabSelected' not in read_part(path, copy_part)
+    assert app_titles(path) == (['Mein Blatt', 'Summen', 'Drittes', 'Kopie', 'Gesamt'], 4)
+    assert read_part(path, 'xl/worksheets/sheet1.xml') == read_part(base, 'xl/worksheets/sheet1.xml')
+    print('✓ Kopieren: Tabelle mit neuem Namen, Zeichnung/Diagramm/Kommentar dupliziert, lokale Namen')
+
+
+def test_move(base, base_dir):
+    path = case(base, base_dir, 'move')
+    result = move_sheet(path, 'Drittes', 0)
+    assert result['success'], result.get('error')
+    assert result['sheets'] == ['Drittes', 'Mein Blatt', 'Summen']
+
+    # localSheetId folgt den Sheets, das aktive Sheet wandert mit
+    names = defined_names(path)
+    assert names[('_xlnm.Print_Area', '0')] == "'Drittes'!$A$1:$C$3"
+    assert names[('Lokal', '1')] == "'Mein Blatt'!$A$1"
+    view = ET.fromstring(read_part(path, 'xl/workbook.xml')).find('.//m:workbookView', NS)
+    assert view.get('activeTab') == '1'
+    assert app_titles(path) == (['Drittes', 'Mein Blatt', 'Summen', 'Gesamt'], 3)
+
+    wb = load_workbook(path)
+    assert wb.sheetnames == ['Drittes', 'Mein Blatt', 'Summen']
+    assert wb['Drittes'].print_area == "'Drittes'!$A$1:$C$3"
+    assert 'Lokal' in wb['Mein Blatt'].defined_names
+
+    # Index außerhalb: ans Ende; gleiche Position: nichts zu schreiben
+    assert move_sheet(path, 'Drittes', 99)['sheets'] == ['Mein Blatt', 'Summen', 'Drittes']
+    assert defined_names(path)[('_xlnm.Print_Area', '2')] == "'Drittes'!$A$1:$C$3"
+    assert defined_names(path)[('Lokal', '0')] == "'Mein Blatt'!$A$1"
+    assert move_sheet(path, 'Summen', 1)['writtenMembers'] == 0
+    print('✓ Verschieben: localSheetId und activeTab folgen, Index wird begrenzt')
+
+
+def test_delete(base, base_dir):
+    path = case(base, base_dir, 'delete')
+    result = delete_sheet(path, 'Mein Blatt')
+    assert result['success'], result.get('error')
+    assert result['sheets'] == ['Summen', 'Drittes']
+
+    expected = dict(FORMULAS, A1='=#REF!B2*2', A2='=SUM(#REF!B2:B6)')
+    assert formulas(path) == expected, formulas(path)
+    names = defined_names(path)
+    assert names[('Gesamt', None)] == '#REF!$B$2:$B$6'
+    assert ('Lokal', '0') not in names and ('Lokal', None) not in names
+    assert names[('_xlnm.Print_Area', '1')] == "'Drittes'!$A$1:$C$3"
+    assert app_titles(path) == (['Summen', 'Drittes', 'Gesamt'], 2)
+
+    # Nur vom Sheet genutzte Teile entfernt (samt Content-Types)
+    names = part_names(path)
+    for part in ('xl/worksheets/sheet1.xml', 'xl/tables/table1.xml', 'xl/drawings/drawing1.xml',
+                 'xl/charts/chart1.xml', 'xl/comments/comment1.xml'):
+        assert part not in names, f'{part} nicht entfernt'
+        assert ('/' + part).encode() not in read_part(path, '[Content_Types].xml')
+    assert 'xl/styles.xml' in names and PIVOT_PART in names
+    assert read_part(path, 'xl/worksheets/sheet3.xml') == read_part(base, 'xl/worksheets/sheet3.xml')
+    assert load_workbook(path).sheetnames == ['Summen', 'Drittes']
+    print('✓ Löschen: Verweise werden #REF!, lokale Namen entfernt, abhängige Teile gelöscht')
+
+
+def test_add(base, base_dir):
+    path = case(base, base_dir, 'add')
+    result = add_sheet(path, 'Neu')
+    assert result['success'], result.get('error')
+    assert result['sheets'] == ['Mein Blatt', 'Summen', 'Drittes', 'Neu']
+    assert app_titles(path) == (['Mein Blatt', 'Summen', 'Drittes', 'Neu', 'Gesamt'], 4)
+    wb = load_workbook(path)
+    assert wb['Neu'].max_row == 1 and wb['Neu']['A1'].value is None
+    print('✓ Hinzufügen: leeres Sheet am Ende')
+
+
+def test_errors(base, base_dir):
+    path = case(base, base_dir, 'errors')
+    original = open(path, 'rb').read()
+    failures = [
+        (add_sheet(path, 'summen'), 'existiert bereits'),
+        (rename_sheet(path, 'Summen', 'DRITTES'), 'existiert bereits'),
+        (clone_sheet(path, 'Summen', 'Mein Blatt'), 'existiert bereits'),
+        (rename_sheet(path, 'Summen', 'a/b'), 'ungültige Zeichen'),
+        (rename_sheet(path, 'Summen', "'Rand"), 'ungültige Zeichen'),
+        (rename_sheet(path, 'Summen', 'x' * 32), 'höchstens 31'),
+        (rename_sheet(path, 'Summen', '   '), 'nicht leer'),
+        (add_sheet(path, 'History'), 'reserviert'),
+        (rename_sheet(path, 'Fehlt', 'Neu'), 'nicht gefunden'),
+        (delete_sheet(path, 'Fehlt'), 'nicht gefunden'),
+    ]
+    for result, message in failures:
+        assert result['success'] is False and message in result['error'], result
+        assert not result.get('packageError'), result
+    assert open(path, 'rb').read() == original, 'Datei nach Fehler verändert'
+
+    # Letztes (sichtbares) Sheet
+    single = os.path.join(base_dir, 'single.xlsx')
+    wb = Workbook()
+    wb.active.title = 'Einzig'
+    wb.create_sheet('Versteckt').sheet_state = 'hidden'
+    wb.save(single)
+    assert 'letzte sichtbare' in delete_sheet(single, 'Einzig')['error']
+    assert delete_sheet(single, 'Versteckt')['success']
+    assert 'letzte Arbeitsblatt' in delete_sheet(single, 'Einzig')['error']
+    assert rename_sheet(os.path.join(base_dir, 'fehlt.xlsx'), 'A', 'B')['success'] is False
+    print('✓ Doppelte und ungültige Namen, fehlende Sheets, letztes Sheet: Fehler, Datei unverändert')
+
+
+def main():
+    base_dir = tempfile.mkdtemp(prefix='sheet-ops-test-')
+    try:
+        base = os.path.join(base_dir, 'Basis.xlsx')
+        create_workbook(base)
+        test_rename(base, base_dir)
+        test_clone(base, base_dir)
+        test_move(base, base_dir)
+        test_delete(base, base_dir)
+        test_add(base, base_dir)
+        test_errors(base, base_dir)
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+    print('\nAlle Tests erfolgreich')
+
+
+if __name__ == '__main__':
+    main()
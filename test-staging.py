@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Test: Datei-Staging (python/excel_staging.py)
+
+- Exception innerhalb von StagedOutput: Zieldatei unverändert, Staging-Datei weg
+- Ohne commit(): Staging-Datei weg, Ziel unverändert
+- commit(): Ziel wird per Rename ersetzt (neuer Inode, offene Leser sehen den
+  alten Inhalt, Rechte der alten Zieldatei bleiben), Wiederholung bei
+  PermissionError (Windows: Datei noch geöffnet)
+- seed_from: Fehler beim Vorbelegen hinterlässt keine Staging-Datei
+- fast_copy: Reflink -> copy_file_range -> gepufferte Kopie; jeder Fallback
+  liefert denselben Inhalt und Zeitstempel, auch wenn copy_file_range
+  mittendrin abbricht
+
+Aufruf:
+    python3 test-staging.py
+"""
+
+import errno
+import os
+import shutil
+import stat
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+import excel_staging
+from excel_staging import StagedOutput, atomic_replace, fast_copy, staging_path
+
+PAYLOAD = os.urandom(3 * 1024 * 1024 + 17)  # mehr als ein Kopierpuffer
+
+
+def _write(path, content):
+    with open(path, 'wb') as f:
+        f.write(content)
+
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _leftovers(directory):
+    return [name for name in os.listdir(directory) if name.startswith('.~stage-')]
+
+
+def test_exception_keeps_target(base_dir):
+    target = os.path.join(base_dir, 'Ziel.xlsx')
+    _write(target, b'alt')
+    try:
+        with StagedOutput(target) as staged:
+            _write(staged.path, b'neu, halb geschrieben')
+            raise RuntimeError('Abbruch beim Schreiben')
+    except RuntimeError:
+        pass
+    assert _read(target) == b'alt', 'Zieldatei wurde verändert'
+    assert not _leftovers(base_dir), _leftovers(base_dir)
+
+    # Ohne commit() ebenso
+    with StagedOutput(target) as staged:
+        _write(staged.path, b'neu')
+    assert _read(target) == b'alt' and not _leftovers(base_dir)
+
+    # Fehler beim Vorbelegen (Quelle fehlt)
+    try:
+        StagedOutput(target, seed_from=os.path.join(base_dir, 'fehlt.xlsx'))
+        raise AssertionError('fehlende Quelle nicht erkannt')
+    except FileNotFoundError:
+        pass
+    assert not _leftovers(base_dir), 'seed_from-Fehler hinterlässt Staging-Datei'
+    print('✓ Exception/kein commit: Zieldatei unverändert, keine Staging-Datei')
+
+
+def test_commit_is_atomic(base_dir):
+    target = os.path.join(base_dir, 'Mappe.xlsx')
+    _write(target, b'alt')
+    os.chmod(target, 0o640)
+    old_inode = os.stat(target).st_ino
+
+    with open(target, 'rb') as reader:
+        with StagedOutput(target) as staged:
+            assert os.path.dirname(staged.path) == base_dir, 'Staging nicht im Zielverzeichnis'
+            assert staged.path.endswith('.xlsx')
+            assert not staged.has_content()
+            _write(staged.path, b'neu')
+            assert staged.has_content()
+            assert _read(target) == b'alt', 'Ziel vor commit() verändert'
+            staged.commit()
+            staged.commit()  # zweites commit() ist wirkungslos
+        # Offener Leser sieht weiter den alten Inhalt (Rename, kein Überschreiben)
+        assert reader.read() == b'alt'
+
+    assert _read(target) == b'neu'
+    assert os.stat(target).st_ino != old_inode, 'Ziel wurde überschrieben statt ersetzt'
+    assert stat.S_IMODE(os.stat(target).st_mode) == 0o640, 'Dateirechte nicht übernommen'
+    assert not _leftovers(base_dir)
+
+    # seed_from belegt die Staging-Datei vor
+    copy = os.path.join(base_dir, 'Kopie.xlsx')
+    with StagedOutput(copy, seed_from=target) as staged:
+        assert _read(staged.path) == b'neu'
+        staged.commit()
+    assert _read(copy) == b'neu'
+    print('✓ commit(): Ziel per Rename ersetzt, Rechte übernommen, offene Leser unberührt')
+
+
+def test_replace_retries(base_dir):
+    target = os.path.join(base_dir, 'Gesperrt.xlsx')
+    _write(target, b'alt')
+    staged = staging_path(target)
+    _write(staged, b'neu')
+
+    real_replace = os.replace
+    attempts = []
+
+    def locked_replace(src, dst):
+        attempts.append(dst)
+        if len(attempts) < 3:
+            raise PermissionError(errno.EACCES, 'Datei ist geöffnet')
+        real_replace(src, dst)
+
+    excel_staging.os.replace = locked_replace
+    try:
+        atomic_replace(staged, target, delay=0)
+        assert len(attempts) == 3 and _read(target) == b'neu'
+
+        # Bleibt gesperrt: Fehler, Ziel unverändert
+        attempts.clear()
+        staged = staging_path(target)
+        _write(staged, b'noch neuer')
+        excel_staging.os.replace = lambda src, dst: (_ for _ in ()).throw(PermissionError(errno.EACCES, 'gesperrt'))
+        try:
+            atomic_replace(staged, target, retries=2, delay=0)
+            raise AssertionError('PermissionError nicht weitergegeben')
+        except PermissionError:
+            pass
+        assert _read(target) == b'neu'
+        os.remove(staged)
+    finally:
+        excel_staging.os.replace = real_replace
+    print('✓ atomic_replace: Wiederholung bei PermissionError')
+
+
+def _check_copy(src, dst, expected_method, label):
+    method = fast_copy(src, dst)
+    assert method == expected_method, f'{label}: {method} statt {expected_method}'
+    assert _read(dst) == PAYLOAD, f'{label}: Inhalt weicht ab'
+    assert int(os.stat(dst).st_mtime) == int(os.stat(src).st_mtime), f'{label}: Zeitstempel nicht übernommen'
+    os.remove(dst)
+
+
+def test_fast_copy_fallbacks(base_dir):
+    src = os.path.join(base_dir, 'Quelle.xlsx')
+    _write(src, PAYLOAD)
+    os.utime(src, (1_600_000_000, 1_600_000_000))
+    dst = os.path.join(base_dir, 'Kopie.xlsx')
+
+    native = fast_copy(src, dst)
+    assert _read(dst) == PAYLOAD
+    os.remove(dst)
+
+    real_reflink = excel_staging._try_reflink
+    real_copy_file_range = getattr(os, 'copy_file_range', None)
+    try:
+        # Kein Reflink (z.B. ext4, NTFS)
+        excel_staging._try_reflink = lambda s, d: False
+        if real_copy_file_range is not None:
+            _check_copy(src, dst, 'copy_file_range', 'ohne Reflink')
+
+            # copy_file_range bricht nach dem ersten Block ab (z.B. EXDEV)
+            def failing_copy_file_range(fd_in, fd_out, count, *args):
+                if os.fstat(fd_out).st_size > 0:
+                    raise OSError(errno.EXDEV, 'Invalid cross-device link')
+                return real_copy_file_range(fd_in, fd_out, min(count, 1024 * 1024))
+
+            os.copy_file_range = failing_copy_file_range
+            _check_copy(src, dst, 'buffered', 'copy_file_range bricht ab')
+
+            # copy_file_range liefert 0 (Dateisystem kopiert nicht)
+            os.copy_file_range = lambda fd_in, fd_out, count, *args: 0
+            _check_copy(src, dst, 'buffered', 'copy_file_range liefert 0')
+
+        # Kein copy_file_range (macOS, Windows)
+        if real_copy_file_range is not None:
+            del os.copy_file_range
+        _check_copy(src, dst, 'buffered', 'ohne copy_file_range')
+
+        # Reflink scheitert am Dateisystem (ioctl-Fehler) - Zieldatei darf keine Reste behalten
+        excel_staging._try_reflink = real_reflink
+        if sys.platform.startswith('linux'):
+            import fcntl
+            real_ioctl = fcntl.ioctl
+            fcntl.ioctl = lambda *args: (_ for _ in ()).throw(OSError(errno.EOPNOTSUPP, 'not supported'))
+            try:
+                _write(dst, b'x' * (len(PAYLOAD) + 100))  # längere Altdatei
+                _check_copy(src, dst, 'buffered', 'Reflink-Fehler')
+            finally:
+                fcntl.ioctl = real_ioctl
+    finally:
+        excel_staging._try_reflink = real_reflink
+        if real_copy_file_range is not None:
+            os.copy_file_range = real_copy_file_range
+    print(f'✓ fast_copy: Fallbacks liefern identische Kopien (hier nativ: {native})')
+
+
+def main():
+    base_dir = tempfile.mkdtemp(prefix='staging-test-')
+    try:
+        test_exception_keeps_target(base_dir)
+        test_commit_is_atomic(base_dir)
+        test_replace_retries(base_dir)
+        test_fast_copy_fallbacks(base_dir)
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+    print('\nAlle Tests erfolgreich')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Test: NDJSON-Streaming der write_sheet-Daten (python_bridge.js writeConfigToStdin
+-> python/excel_stream_input.py)
+
+1. writeConfigToStdin (node) erzeugt den Stream: Zeile 1 Konfiguration mit
+   dataStream, danach eine Zeile pro Datenzeile in Chunks zu STREAM_CHUNK_ROWS.
+   Die Zeilenzahl liegt knapp über mehreren Chunk-Grenzen, die Ausgabe hat
+   Backpressure (kleiner Puffer).
+2. read_write_params/StreamedRows lesen den Stream in wenigen Bytes pro Read -
+   Mehrbyte-Zeichen (Umlaute, CJK, Emoji) werden dabei zerteilt.
+3. Abgeschnittener Stream (fehlende Zeilen, halbe Zeile) ist ein Fehler -
+   write_sheet meldet ihn und die Zieldatei bleibt unverändert.
+4. FALL 2 (fullRewrite ohne Strukturänderung) liest die Zeilen lazy und ergibt
+   dieselbe Datei wie mit einer materialisierten Liste.
+5. Unterhalb von STREAM_MIN_ROWS bleibt es beim einzeiligen JSON.
+6. Passwortgeschützte Quelle (writeExcel -> Package-Worker): die Zeilen gehen
+   ebenfalls als NDJSON hinter der Befehlszeile, mit größenabhängigem Timeout.
+   Bricht writeSheet ab, bevor die Zeilen gelesen sind, überspringt der Worker
+   sie - die nächste Anfrage an denselben Worker läuft normal.
+
+Benötigt node und openpyxl.
+
+Aufruf:
+    python3 test-stream-input.py
+"""
+
+import contextlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import zipfile
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BASE_DIR, 'python'))
+from openpyxl import Workbook
+
+from excel_stream_input import StreamedRows, materialize_rows, read_write_params
+from excel_writer import write_sheet
+
+NODE_SCRIPT = r"""
+const fs = require('fs');
+const bridge = require(process.argv[1]);
+const config = JSON.parse(fs.readFileSync(0, 'utf8'));
+// Kleiner Puffer, damit writeChunk auf 'drain' warten muss
+const out = fs.createWriteStream(process.argv[2], { highWaterMark: 1024 });
+out.on('close', () => process.stdout.write(JSON.stringify({
+    minRows: bridge.STREAM_MIN_ROWS, chunkRows: bridge.STREAM_CHUNK_ROWS
+})));
+bridge.writeConfigToStdin(out, config);
+"""
+
+PACKAGE_NODE_SCRIPT = r"""
+const fs = require('fs');
+const bridge = require(process.argv[1]);
+const { XlwingsWorkerClient } = require(process.argv[2]);
+// Anfragen an den Worker mitschreiben (ohne Daten und Passwörter)
+const requests = [];
+const request = XlwingsWorkerClient.prototype.request;
+XlwingsWorkerClient.prototype.request = function (command, timeoutMs, writeBody) {
+    const changes = command.changes || {};
+    requests.push({ action: command.action, timeoutMs: timeoutMs || null, writeBody: !!writeBody,
+                    dataStream: changes.dataStream || null, inlineRows: Array.isArray(changes.data) ? changes.data.length : null });
+    return request.call(this, command, timeoutMs, writeBody);
+};
+(async () => {
+    const results = [];
+    for (const config of JSON.parse(fs.readFileSync(0, 'utf8'))) {
+        results.push(await bridge.writeExcel(config));
+    }
+    await bridge.shutdownPackageWorker();
+    process.stdout.write('\n' + JSON.stringify({ results, requests }));
+})();
+"""
+
+SAMPLES = ['Müller', 'Größe ÄÖÜ ß', '日本語テキスト', '😀👍🏽 emoji', 'a\tb', 'Zeile\nmit Umbruch', '"quoted"', '€ 1.234,56']
+
+
+class TrickleReader(io.RawIOBase):
+    """Liefert die Bytes in Stücken von 1-7 Byte (wie zerteilte Pipe-Reads)"""
+
+    def __init__(self, payload):
+        self._payload = payload
+        self._pos = 0
+        self._step = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        self._step = self._step % 7 + 1
+        piece = self._payload[self._pos:self._pos + min(self._step, len(buffer))]
+        buffer[:len(piece)] = piece
+        self._pos += len(piece)
+        return len(piece)
+
+
+def text_stream(payload):
+    return io.TextIOWrapper(io.BufferedReader(TrickleReader(payload), buffer_size=8), encoding='utf-8')
+
+
+def make_rows(count):
+    return [[f'{SAMPLES[i % len(SAMPLES)]} {i}', i, round(i * 0.5, 1), i % 3 == 0, '' if i % 5 else SAMPLES[-i % 8]]
+            for i in range(count)]
+
+
+def stream_with_node(config, path):
+    script = os.path.join(BASE_DIR, 'python', 'python_bridge.js')
+    completed = subprocess.run(['node', '-e', NODE_SCRIPT, script, path],
+                               input=json.dumps(config, ensure_ascii=False),
+                               capture_output=True, text=True, encoding='utf-8', check=True)
+    with open(path, 'rb') as f:
+        return f.read(), json.loads(completed.stdout)
+
+
+def test_chunked_stream(base_dir):
+    _, limits = stream_with_node({'changes': {'data': []}}, os.path.join(base_dir, 'probe.ndjson'))
+    chunk_rows = limits['chunkRows']
+    row_count = 2 * chunk_rows + 3  # über zwei Chunk-Grenzen hinaus
+    rows = make_rows(row_count)
+    config = {'filePath': 'a.xlsx', 'sheetName': 'Daten', 'changes': {'headers': ['A'], 'data': rows, 'fullRewrite': True}}
+    payload, _ = stream_with_node(config, os.path.join(base_dir, 'stream.ndjson'))
+
+    lines = payload.decode('utf-8').split('\n')
+    assert lines[-1] == '' and len(lines) == row_count + 2, 'eine Zeile pro Datenzeile plus Konfiguration'
+    header = json.loads(lines[0])
+    assert header['changes']['dataStream'] == {'rows': row_count} and 'data' not in header['changes']
+
+    params = read_write_params(text_stream(payload))
+    data = params['changes']['data']
+    assert isinstance(data, StreamedRows) and len(data) == row_count
+    assert params['changes']['headers'] == ['A'] and params['changes']['fullRewrite'] is True
+    for index, (expected, actual) in enumerate(zip(rows, data)):
+        assert expected == actual, f'Zeile {index} weicht ab (Chunk-Grenze bei {chunk_rows})'
+    print(f'✓ {row_count} Zeilen über Chunk-Grenzen ({chunk_rows}) und zerteilte Mehrbyte-Zeichen gelesen')
+
+    # Unterhalb der Schwelle: einzeiliges JSON wie bisher
+    small = make_rows(limits['minRows'] - 1)
+    payload, _ = stream_with_node({'changes': {'data': small}}, os.path.join(base_dir, 'small.json'))
+    assert b'\n' not in payload
+    assert read_write_params(text_stream(payload))['changes']['data'] == small
+    print(f'✓ unter {limits["minRows"]} Zeilen einzeiliges JSON')
+
+
+def test_truncated_stream():
+    rows = make_rows(10)
+    header = json.dumps({'changes': {'dataStream': {'rows': 10}}}) + '\n'
+    body = ''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in rows)
+
+    # Fehlende Zeilen
+    data = read_write_params(text_stream((header + body[:body.index('\n', 200) + 1]).encode('utf-8')))['changes']['data']
+    try:
+        list(data)
+        raise AssertionError('fehlende Zeilen nicht erkannt')
+    except ValueError as e:
+        assert 'vorzeitig' in str(e)
+
+    # Halbe Zeile (mitten in einem Mehrbyte-Zeichen abgeschnitten)
+    raw = (header + body).encode('utf-8')
+    cut = raw.index('日'.encode('utf-8')) + 1
+    data = read_write_params(text_stream(raw[:cut]))['changes']['data']
+    try:
+        data.materialize()
+        raise AssertionError('halbe Zeile nicht erkannt')
+    except ValueError:
+        pass
+
+    # Zweites Iterieren über einen gelesenen Stream
+    data = read_write_params(text_stream((header + body).encode('utf-8')))['changes']['data']
+    assert list(data) == rows
+    try:
+        list(data)
+        raise AssertionError('zweites Iterieren nicht erkannt')
+    except RuntimeError:
+        pass
+    print('✓ abgeschnittener Stream (fehlende Zeilen, halbe Zeile) wird erkannt')
+
+
+def create_workbook(path, rows):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Daten'
+    ws.append(['Name', 'Nr', 'Wert', 'Flag', 'Notiz'])
+    for i in range(rows):
+        ws.append([f'Alt {i}', i, 0, False, None])
+    wb.save(path)
+
+
+def sheet_xml(path):
+    with zipfile.ZipFile(path) as zf:
+        return {name: zf.read(name) for name in zf.namelist() if name.startswith('xl/')}
+
+
+def test_fall2_lazy(base_dir):
+    rows = make_rows(3000)
+    source = os.path.join(base_dir, 'Quelle.xlsx')
+    create_workbook(source, 2500)
+    headers = ['Name', 'Nr', 'Wert', 'Flag', 'Notiz']
+
+    listed = os.path.join(base_dir, 'liste.xlsx')
+    result = write_sheet(source, listed, 'Daten', {'headers': headers, 'data': rows, 'fullRewrite': True})
+    assert result['success'], result
+
+    header = json.dumps({'changes': {'headers': headers, 'fullRewrite': True, 'dataStream': {'rows': len(rows)}}})
+    body = ''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in rows)
+    params = read_write_params(text_stream((header + '\n' + body).encode('utf-8')))
+    streamed = params['changes']['data']
+    output = os.path.join(base_dir, 'stream.xlsx')
+    result = write_sheet(source, output, 'Daten', params['changes'])
+    assert result['success'], result
+    assert streamed._rows is None, 'FALL 2 hat den Stream materialisiert'
+    assert sheet_xml(output) == sheet_xml(listed), 'gestreamt und als Liste geschrieben weichen ab'
+    print('✓ FALL 2 liest lazy und ergibt dieselbe Datei wie eine Liste')
+
+    # Strukturelle Pfade materialisieren
+    params = read_write_params(text_stream((header + '\n' + body).encode('utf-8')))
+    assert materialize_rows(params['changes']['data']) == rows
+
+    # Abgeschnitten: Fehler, Ziel unverändert
+    target = os.path.join(base_dir, 'ziel.xlsx')
+    shutil.copy(listed, target)
+    before = open(target, 'rb').read()
+    cut = body[:body.index('\n', len(body) // 2) + 1]
+    params = read_write_params(text_stream((header + '\n' + cut).encode('utf-8')))
+    result = write_sheet(source, target, 'Daten', params['changes'])
+    assert not result['success'] and 'vorzeitig' in result['error'], result
+    assert open(target, 'rb').read() == before, 'Zieldatei wurde verändert'
+    assert os.listdir(base_dir).count('ziel.xlsx') == 1
+    assert not [name for name in os.listdir(base_dir) if name.startswith('.~stage-ziel')], 'Staging-Datei liegen geblieben'
+    print('✓ abgeschnittener Stream in FALL 2: Fehler, Zieldatei unverändert')
+
+
+def test_package_worker(base_dir):
+    from openpyxl import load_workbook
+    from excel_package_crypto import encrypt_package
+
+    password = 'Geheim-123'
+    plain = os.path.join(base_dir, 'klartext.xlsx')
+    create_workbook(plain, 1200)
+    source = os.path.join(base_dir, 'Verschlüsselt.xlsx')
+    encrypt_package(plain, source, password)
+
+    headers = ['Name', 'Nr', 'Wert', 'Flag', 'Notiz']
+    rows = make_rows(1500)
+    base = {'filePath': source, 'sheetName': 'Daten', 'sourcePassword': password}
+    configs = [
+        # Abbruch vor dem Lesen der Zeilen (falsches Passwort) - die Zeilen müssen übersprungen werden
+        dict(base, outputPath=os.path.join(base_dir, 'fehler.xlsx'), sourcePassword='falsch',
+             changes={'headers': headers, 'data': rows, 'fullRewrite': True}),
+        dict(base, outputPath=os.path.join(base_dir, 'gross.xlsx'),
+             changes={'headers': headers, 'data': rows, 'fullRewrite': True}),
+        dict(base, outputPath=os.path.join(base_dir, 'klein.xlsx'), changes={'editedCells': {'0-0': 'GEÄNDERT'}}),
+    ]
+    completed = subprocess.run(['node', '-e', PACKAGE_NODE_SCRIPT, os.path.join(BASE_DIR, 'python', 'python_bridge.js'),
+                                os.path.join(BASE_DIR, 'python', 'excel_worker_bridge.js')],
+                               input=json.dumps(configs, ensure_ascii=False),
+                               capture_output=True, text=True, encoding='utf-8', check=True, timeout=300)
+    report = json.loads(completed.stdout.rstrip().rsplit('\n', 1)[-1])
+    failed, large, small = report['results']
+    writes = [item for item in report['requests'] if item['action'] == 'writeSheet']
+
+    assert not failed['success'], failed
+    assert large['success'], large
+    assert small['success'], small
+    assert [item['dataStream'] for item in writes] == [{'rows': 1500}, {'rows': 1500}, None], writes
+    assert [item['writeBody'] for item in writes] == [True, True, False]
+    assert writes[0]['inlineRows'] is None, 'Zeilen in der Befehlszeile'
+    assert all(item['timeoutMs'] for item in writes)
+    assert writes[1]['timeoutMs'] > writes[2]['timeoutMs'], 'Timeout wächst nicht mit der Datenmenge'
+
+    # Direkt am Worker: genau eine Antwort pro Anfrage, die Datenzeilen werden
+    # nicht als Befehle gelesen
+    from excel_package_cache import DecryptedPackageCache
+    from excel_package_worker import PackageWorker
+    header = dict(configs[0], action='writeSheet', id=1,
+                  changes={'headers': headers, 'fullRewrite': True, 'dataStream': {'rows': len(rows)}})
+    body = ''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in rows)
+    commands = json.dumps(header) + '\n' + body + json.dumps({'id': 2, 'action': 'ping'}) + '\n'
+    stdin, stdout = sys.stdin, sys.stdout
+    sys.stdin, sys.stdout = io.StringIO(commands), io.StringIO()
+    try:
+        with contextlib.redirect_stderr(io.StringIO()):
+            PackageWorker(DecryptedPackageCache()).run()
+        responses = [json.loads(line) for line in sys.stdout.getvalue().splitlines()]
+    finally:
+        sys.stdin, sys.stdout = stdin, stdout
+    assert [response.get('id') for response in responses] == [1, 2], responses
+    assert not responses[0]['success'] and responses[1]['message'] == 'pong'
+
+    # Ohne password ist die Ausgabe unverschlüsselt
+    ws = load_workbook(os.path.join(base_dir, 'gross.xlsx'), read_only=True)['Daten']
+    written = [list(row) for row in ws.iter_rows(min_row=2, values_only=True)]
+    assert len(written) == len(rows) and written[0][0] == rows[0][0] and written[-1][1] == rows[-1][1]
+    print(f'✓ Package-Worker: {len(rows)} Zeilen als NDJSON, Abbruch überspringt die Zeilen, nächste Anfrage läuft')
+
+
+def main():
+    base_dir = tempfile.mkdtemp(prefix='stream-input-test-')
+    try:
+        test_chunked_stream(base_dir)
+        test_truncated_stream()
+        test_fall2_lazy(base_dir)
+        test_package_worker(base_dir)
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+    print('\nAlle Tests erfolgreich')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Test: Workbook-Reader (python/excel_workbook_reader.py) gegen den Einzel-Sheet-Reader
+
+read_workbook liest mehrere Sheets in einem Aufruf (inline bzw. in
+Worker-Prozessen), read_sheet streamt ein Sheet als NDJSON (meta, rows...,
+end). Beide Ergebnisse müssen dem bisherigen Lesen eines einzelnen Sheets
+entsprechen - Vergleich mit excel_reader.read_sheet
+(openpyxl): Header, Daten, cellStyles-Keys (Füllung, fett), Formeln,
+verbundene Zellen, ausgeblendete Zeilen und Spalten.
+
+Bekannte Unterschiede (kein Fehler):
+- Formelzellen: openpyxl liefert die Formel als Wert, der Workbook-Reader den
+  gespeicherten Wert (wie ExcelJS) - eine von openpyxl erzeugte Datei hat keinen
+- Formeln: ohne führendes "=" (Format des ExcelJS-Readers)
+
+Aufruf:
+    python3 test-workbook-reader.py
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+PYTHON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python')
+sys.path.insert(0, PYTHON_DIR)
+from openpyxl import Workbook
+from openpyxl.styles import Font, PatternFill
+
+from excel_reader import read_sheet
+from excel_workbook_reader import read_workbook
+
+RED = PatternFill(start_color='FFFF0000', end_color='FFFF0000', fill_type='solid')
+GREEN = PatternFill(start_color='FF00FF00', end_color='FF00FF00', fill_type='solid')
+ROWS = 120
+
+
+def create_workbook(path):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Daten'
+    ws.append(['Name', 'Menge', 'Preis', 'Aktiv', 'Summe', 'Notiz'])
+    for cell in ws[1]:
+        cell.font = Font(bold=True)
+    for i in range(ROWS):
+        row = i + 2
+        if i == 40:
+            continue  # Lücke: Zeile ohne <row>
+        values = [f'Artikel {i % 17}', i, round(i * 1.25, 2), i % 3 == 0, f'=B{row}*C{row}',
+                  'ÄÖÜ ß' if i % 11 == 0 else None]
+        for col, value in enumerate(values, start=1):
+            if value is not None:
+                ws.cell(row=row, column=col, value=value)
+        if i % 7 == 0:
+            ws.cell(row=row, column=1).fill = RED
+        if i % 9 == 0:
+            ws.cell(row=row, column=3).font = Font(bold=True)
+    ws.merge_cells('A5:B5')
+    ws.merge_cells('C10:D12')
+    ws.row_dimensions[8].hidden = True
+    ws.row_dimensions[30].hidden = True
+    ws.column_dimensions['D'].hidden = True
+
+    second = wb.create_sheet('Zweites')
+    second.append(['X', 'Y', 'Z'])
+    for i in range(25):
+        second.append([f'x{i}', i * 2, f'z{i % 4}'])
+    second['B3'].fill = GREEN
+    second.merge_cells('A20:C20')
+    second.column_dimensions['C'].hidden = True
+    second.row_dimensions[4].hidden = True
+
+    wb.create_sheet('Leer')
+    wb.save(path)
+
+
+def _keys_with(styles, predicate):
+    return {key for key, style in styles.items() if predicate(style)}
+
+
+def assert_parity(result, reference, label):
+    """Ergebnis des Workbook-Readers gegen excel_reader.read_sheet"""
+    assert result['success'], result.get('error')
+    assert result['headers'] == reference['headers'], f'{label}: Header weichen ab'
+
+    # Formelzellen haben in einer openpyxl-Datei keinen gespeicherten Wert
+    formulas = reference['cellFormulas']
+    expected = [[('' if f'{r + 1}-{c}' in formulas else value) for c, value in enumerate(row)]
+                for r, row in enumerate(reference['data'])]
+    assert result['data'][0] == result['headers'], f'{label}: Header nicht an Position 0'
+    assert result['data'][1:] == expected, f'{label}: Daten weichen ab'
+    assert len(result['rowFingerprints']) == len(expected), f'{label}: Fingerprints'
+
+    assert result['cellFormulas'] == {key: value[1:] for key, value in formulas.items()}, f'{label}: Formeln'
+
+    # cellStyles-Keys: Füllfarbe und Fettdruck an denselben Zellen
+    assert _keys_with(result['cellStyles'], lambda s: 'fill' in s) == set(reference['cellStyles']), \
+        f'{label}: Füllfarben an anderen Zellen'
+    bold_reference = _keys_with(reference['cellFonts'], lambda f: f.get('bold'))
+    assert _keys_with(result['cellStyles'], lambda s: s.get('bold')) == bold_reference, \
+        f'{label}: Fettdruck an anderen Zellen'
+
+    assert sorted(result['mergedCells']) == sorted(reference['mergedCells']), f'{label}: verbundene Zellen'
+    assert result['hiddenRows'] == reference['hiddenRows'], f'{label}: ausgeblendete Zeilen'
+    assert result['hiddenColumns'] == reference['hiddenColumns'], f'{label}: ausgeblendete Spalten'
+
+
+def test_read_workbook(path):
+    references = {name: read_sheet(path, name) for name in ('Daten', 'Zweites', 'Leer')}
+
+    for label, workers in (('inline', None), ('Worker-Prozesse', 2)):
+        records = []
+        done = read_workbook(path, None, records.append, max_workers=workers)
+        assert done['success']
+        header = records[0]
+        assert header['type'] == 'workbook' and header['sheets'] == ['Daten', 'Zweites', 'Leer']
+        assert (header['workers'] > 0) == (workers is not None), header
+        sheets = {r['sheetName']: r['result'] for r in records if r['type'] == 'sheet'}
+        assert set(sheets) == {'Daten', 'Zweites', 'Leer'}
+        for name, reference in references.items():
+            assert_parity(sheets[name], reference, f'{label}/{name}')
+        print(f'✓ read_workbook ({label}): alle Sheets wie der Einzel-Sheet-Reader')
+
+    # Auswahl und unbekannte Sheets
+    records = []
+    read_workbook(path, ['Zweites', 'Fehlt'], records.append)
+    sheets = {r['sheetName']: r['result'] for r in records if r['type'] == 'sheet'}
+    assert sheets['Fehlt']['success'] is False
+    assert_parity(sheets['Zweites'], references['Zweites'], 'Auswahl/Zweites')
+    print('✓ read_workbook: Sheet-Auswahl, unbekanntes Sheet als Fehler')
+    return references
+
+
+def stream_sheet(path, sheet_name, batch_rows):
+    """read_sheet über die Kommandozeile (wie python_bridge.readSheetStream), Datensätze als Liste"""
+    output = subprocess.run([sys.executable, os.path.join(PYTHON_DIR, 'excel_workbook_reader.py'),
+                             'read_sheet', path, sheet_name, str(batch_rows)],
+                            capture_output=True, check=True).stdout.decode('utf-8')
+    return [json.loads(line) for line in output.splitlines() if line.strip()]
+
+
+def assemble(records):
+    """Datensätze zusammensetzen wie der Data Explorer (meta -> rows -> end)"""
+    meta, batches, end = records[0], records[1:-1], records[-1]
+    assert meta['type'] == 'meta' and end['type'] == 'end', [r['type'] for r in records]
+    assert all(batch['type'] == 'rows' for batch in batches)
+    result = {'success': end['success'], 'headers': meta['headers'], 'data': [meta['headers']],
+              'rowFingerprints': [], 'hiddenRows': [], 'cellStyles': dict(meta['cellStyles']),
+              'cellFormulas': dict(meta['cellFormulas'])}
+    for batch in batches:
+        assert batch['start'] == len(result['data']) - 1, 'Batches nicht lückenlos'
+        assert len(batch['rowFingerprints']) == len(batch['rows'])
+        result['data'].extend(batch['rows'])
+        result['rowFingerprints'].extend(batch['rowFingerprints'])
+        result['hiddenRows'].extend(batch['hiddenRows'])
+        result['cellStyles'].update(batch['cellStyles'])
+        result['cellFormulas'].update(batch['cellFormulas'])
+    for row in result['data']:
+        row.extend([''] * (end['columnCount'] - len(row)))
+    result.update(hiddenColumns=end['hiddenColumns'], mergedCells=end['mergedCells'])
+    assert end['rowCount'] == len(result['data']) - 1
+    return result
+
+
+def test_read_sheet_stream(path, references):
+    inline = []
+    read_workbook(path, None, inline.append)
+    whole = {r['sheetName']: r['result'] for r in inline if r['type'] == 'sheet'}
+
+    for name, reference in references.items():
+        for batch_rows in (7, 5000):
+            records = stream_sheet(path, name, batch_rows)
+            assert all(len(r['rows']) <= batch_rows for r in records if r['type'] == 'rows')
+            result = assemble(records)
+            assert_parity(result, reference, f'Stream {batch_rows}/{name}')
+            for key in ('data', 'rowFingerprints', 'cellStyles', 'cellFormulas', 'hiddenRows', 'hiddenColumns'):
+                assert result[key] == whole[name][key], f'Stream {batch_rows}/{name}: {key} anders als read_workbook'
+    batches = sum(1 for r in stream_sheet(path, 'Daten', 7) if r['type'] == 'rows')
+    assert batches == -(-ROWS // 7), batches
+    print(f'✓ read_sheet (NDJSON): {batches} Batches zusammengesetzt = Einzel-Sheet-Reader = read_workbook')
+
+    missing = stream_sheet(path, 'Fehlt', 7)
+    assert len(missing) == 1 and missing[0]['type'] == 'end' and missing[0]['success'] is False
+    print('✓ read_sheet: unbekanntes Sheet als end-Datensatz mit Fehler')
+
+
+def main():
+    base_dir = tempfile.mkdtemp(prefix='workbook-reader-test-')
+    try:
+        path = os.path.join(base_dir, 'Mappe.xlsx')
+        create_workbook(path)
+        references = test_read_workbook(path)
+        test_read_sheet_stream(path, references)
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+    print('\nAlle Tests erfolgreich')
+
+
+if __name__ == '__main__':
+    main()
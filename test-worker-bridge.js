@@ -0,0 +1,166 @@
+/**
+ * Test: Worker-Client (python/excel_worker_bridge.js)
+ *
+ * Ein gefälschter Worker (node statt Python, gleiches JSON-Zeilen-Protokoll)
+ * prüft die Zuordnung der Antworten und das Verhalten bei Timeouts:
+ * - Antworten in anderer Reihenfolge landen bei der richtigen Anfrage
+ * - Antworten mit unbekannter ID (verspätet) oder ohne ID lösen keine andere
+ *   Anfrage auf
+ * - Timeout: Anfrage schlägt mit timedOut fehl, der hängende Worker wird sofort
+ *   beendet (kein quit hinter dem hängenden Auftrag), der nächste Aufruf startet neu
+ * - Fehlermeldung ohne ID vor dem Beenden (Import-Fehler) erscheint im Fehler
+ * - Zeilen hinter der Befehlszeile (writeBody, NDJSON mit Backpressure): eine
+ *   gleichzeitige Anfrage landet erst danach auf stdin
+ *
+ * Aufruf: node test-worker-bridge.js
+ */
+
+const assert = require('assert');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { XlwingsWorkerClient } = require('./python/excel_worker_bridge');
+
+const FAKE_WORKER = `
+const readline = require('readline');
+const respond = (data) => process.stdout.write(JSON.stringify(data) + '\\n');
+let streamed = null;
+readline.createInterface({ input: process.stdin }).on('line', (line) => {
+    if (streamed) {
+        // Datenzeilen der laufenden rows-Anfrage - alles andere wäre ein Protokollfehler
+        streamed.rows.push(JSON.parse(line));
+        if (streamed.rows.length === streamed.cmd.rows) {
+            const rows = streamed.rows;
+            respond({ id: streamed.cmd.id, success: true, count: rows.length, last: rows[rows.length - 1] });
+            streamed = null;
+        }
+        return;
+    }
+    const cmd = JSON.parse(line);
+    switch (cmd.action) {
+        case 'rows':
+            streamed = { cmd, rows: [] };
+            break;
+        case 'echo':
+            // Vorher eine veraltete Antwort und eine Meldung ohne ID
+            if (cmd.stale) {
+                respond({ id: 99999, success: true, value: 'veraltet' });
+                respond({ success: false, error: 'Meldung ohne ID' });
+            }
+            setTimeout(() => respond({ id: cmd.id, success: true, value: cmd.value }), cmd.delay || 0);
+            break;
+        case 'hang':
+            break;
+        case 'crash':
+            respond({ success: false, error: 'xlwings import failed: kein Modul' });
+            process.exit(1);
+            break;
+        case 'quit':
+            respond({ id: cmd.id, success: true });
+            process.exit(0);
+            break;
+    }
+});
+`;
+
+function createClient(scriptPath) {
+    const logs = [];
+    const client = new XlwingsWorkerClient({
+        pythonPath: process.execPath,
+        scriptPath,
+        name: 'TestWorker',
+        log: (message) => logs.push(message)
+    });
+    return { client, logs };
+}
+
+async function testRouting(scriptPath) {
+    const { client, logs } = createClient(scriptPath);
+    const slow = client.request({ action: 'echo', value: 'langsam', delay: 150, stale: true });
+    const fast = client.request({ action: 'echo', value: 'schnell', delay: 10 });
+    assert.deepStrictEqual(await fast, { success: true, value: 'schnell' });
+    assert.deepStrictEqual(await slow, { success: true, value: 'langsam' },
+        'veraltete Antwort oder Meldung ohne ID wurde zugeordnet');
+    assert.strictEqual(logs.filter(line => line.includes('verworfen')).length, 2);
+    await client.stop();
+    assert.strictEqual(client.isRunning, false);
+    console.log('✓ Antworten nach ID zugeordnet, unbekannte ID und fehlende ID verworfen');
+}
+
+async function testTimeout(scriptPath) {
+    const { client } = createClient(scriptPath);
+    await client.request({ action: 'echo', value: 1 });
+    const proc = client.process;
+    const closed = new Promise(resolve => proc.once('close', resolve));
+    // Wartet hinter dem hängenden Auftrag - Ergebnis gleich abholen (sonst unbehandelte Ablehnung)
+    const other = client.request({ action: 'hang' }, 60000).then(() => null, error => error);
+
+    const start = Date.now();
+    await assert.rejects(client.request({ action: 'hang' }, 100), (error) => {
+        assert.strictEqual(error.timedOut, true);
+        return true;
+    });
+    // Sofort beendet, nicht erst nach dem 10-s-quit-Timeout von stop()
+    assert.strictEqual(client.isRunning, false);
+    await closed;
+    assert.ok(Date.now() - start < 2000, `Worker erst nach ${Date.now() - start}ms beendet`);
+    // Andere offene Anfragen an den beendeten Worker schlagen fehl - ohne timedOut,
+    // der Aufrufer darf für sie auf den Script-Aufruf ausweichen
+    const otherError = await other;
+    assert.ok(otherError instanceof Error && !otherError.timedOut, otherError);
+
+    // Nächster Aufruf startet einen neuen Worker
+    assert.deepStrictEqual(await client.request({ action: 'echo', value: 2 }), { success: true, value: 2 });
+    assert.notStrictEqual(client.process, proc);
+    await client.stop();
+    console.log(`✓ Timeout: timedOut-Fehler, Worker nach ${Date.now() - start}ms beendet, Neustart beim nächsten Aufruf`);
+}
+
+async function testStartupError(scriptPath) {
+    const { client } = createClient(scriptPath);
+    await assert.rejects(client.request({ action: 'crash' }), /xlwings import failed: kein Modul/);
+    assert.strictEqual(client.isRunning, false);
+    console.log('✓ Fehlermeldung ohne ID erscheint im Fehler beim Beenden');
+}
+
+async function testStreamedBody(scriptPath) {
+    const { client } = createClient(scriptPath);
+    const ROWS = 20000;
+    let finished = false;
+    const writeBody = async (stdin) => {
+        for (let start = 0; start < ROWS; start += 500) {
+            let chunk = '';
+            for (let i = start; i < start + 500; i++) chunk += JSON.stringify([i, 'Zeile ' + 'x'.repeat(40)]) + '\n';
+            if (!stdin.write(chunk)) await new Promise(resolve => stdin.once('drain', resolve));
+        }
+        finished = true;
+    };
+    const streamed = client.request({ action: 'rows', rows: ROWS }, 30000, writeBody);
+    // Gleichzeitige Anfrage: darf nicht zwischen die Datenzeilen geraten
+    const echo = client.request({ action: 'echo', value: 'danach' });
+    assert.deepStrictEqual(await streamed, { success: true, count: ROWS, last: [ROWS - 1, 'Zeile ' + 'x'.repeat(40)] });
+    assert.deepStrictEqual(await echo, { success: true, value: 'danach' });
+    assert.ok(finished);
+    await client.stop();
+    console.log(`✓ ${ROWS} Zeilen hinter der Befehlszeile, gleichzeitige Anfrage erst danach`);
+}
+
+async function main() {
+    const dir = fs.mkdtempSync(path.join(os.tmpdir(), 'worker-bridge-test-'));
+    const scriptPath = path.join(dir, 'fake_worker.js');
+    fs.writeFileSync(scriptPath, FAKE_WORKER);
+    try {
+        await testRouting(scriptPath);
+        await testTimeout(scriptPath);
+        await testStartupError(scriptPath);
+        await testStreamedBody(scriptPath);
+    } finally {
+        fs.rmSync(dir, { recursive: true, force: true });
+    }
+    console.log('\nAlle Tests erfolgreich');
+}
+
+main().catch((error) => {
+    console.error(error);
+    process.exit(1);
+});
@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+Test: Gebündelte Excel-Aufrufe im xlwings-Writer (python/excel_com_batch.py)
+
+Ein gefälschtes xlwings-Objektmodell (Sheet mit Werten, Zeilenhöhen,
+Spaltenbreiten und Füllfarben) zählt jeden Excel-Aufruf. Derselbe
+Schreibvorgang läuft einmal durch write_sheet_xlwings (gebündelt) und einmal
+als Einzel-Aufrufe pro Zeile/Spalte wie bisher - der Endzustand muss
+identisch sein, die Zahl der Aufrufe deutlich kleiner. Ohne Excel lauffähig.
+
+Zeilen, die Excel ablehnt (broken_rows, z.B. verbundene/geschützte Zellen),
+dürfen nur sich selbst kosten: die übrigen Bereiche und die übrigen Zeilen
+des gescheiterten Bereichs werden trotzdem gesetzt bzw. gelöscht.
+
+Aufruf: python3 test-xlwings-com-batch.py
+"""
+
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import types
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BASE_DIR, 'python'))
+
+
+# =============================================================================
+# Fake xlwings
+# =============================================================================
+
+def column_number(letters):
+    number = 0
+    for ch in letters:
+        number = number * 26 + ord(ch) - 64
+    return number
+
+
+class FakeSheet:
+    """Zeilen als Records (Werte, Höhe, Farben pro Zelle), zählt Aufrufe"""
+
+    def __init__(self, name, rows, cols, multi_area=True, broken_rows=()):
+        self.name = name
+        self.multi_area = multi_area
+        self.broken_rows = set(broken_rows)
+        self.rows = [self._new_row(cols, [f'H{c}' for c in range(cols)])]
+        self.rows += [self._new_row(cols, [f'r{r}c{c}' for c in range(cols)]) for r in range(rows)]
+        self.widths = [8.43] * cols
+        self.calls = 0
+
+    @staticmethod
+    def _new_row(cols, values=None):
+        return {'values': list(values) if values else [None] * cols, 'height': 15.0, 'colors': [None] * cols}
+
+    @property
+    def cols(self):
+        return len(self.widths)
+
+    def range(self, first, second=None):
+        if second is not None:
+            a, b = FakeRange.from_any(self, first), FakeRange.from_any(self, second)
+            (r1, c1, _, _), (_, _, r2, c2) = a.areas[0], b.areas[-1]
+            return FakeRange(self, [(r1, c1, r2, c2)])
+        return FakeRange.from_any(self, first)
+
+    @property
+    def used_range(self):
+        last = types.SimpleNamespace(row=len(self.rows), column=self.cols)
+        return types.SimpleNamespace(last_cell=last)
+
+    def snapshot(self):
+        return ([(row['values'], row['height'], row['colors']) for row in self.rows], list(self.widths))
+
+
+class FakeRange:
+    def __init__(self, sheet, areas):
+        self.sheet = sheet
+        self.areas = areas  # [(r1, c1, r2, c2)] 1-basiert, None = ganze Zeile/Spalte
+
+    @classmethod
+    def from_any(cls, sheet, ref):
+        if isinstance(ref, FakeRange):
+            return ref
+        if isinstance(ref, tuple):
+            return cls(sheet, [(ref[0], ref[1], ref[0], ref[1])])
+        parts = ref.split(',')
+        if len(parts) > 1 and not sheet.multi_area:
+            sheet.calls += 1  # abgelehnter Aufruf kostet trotzdem einen Roundtrip
+            raise RuntimeError('Mehrfachbereich nicht unterstützt')
+        areas = []
+        for part in parts:
+            m = re.fullmatch(r'(\d+):(\d+)', part)
+            if m:
+                areas.append((int(m.group(1)), None, int(m.group(2)), None))
+                continue
+            m = re.fullmatch(r'([A-Z]+):([A-Z]+)', part)
+            if m:
+                areas.append((None, column_number(m.group(1)), None, column_number(m.group(2))))
+                continue
+            m = re.fullmatch(r'([A-Z]+)(\d+):([A-Z]+)(\d+)', part)
+            if m:
+                areas.append((int(m.group(2)), column_number(m.group(1)), int(m.group(4)), column_number(m.group(3))))
+                continue
+            raise ValueError(f'Adresse nicht unterstützt: {part}')
+        return cls(sheet, areas)
+
+    def _rows(self):
+        for r1, _, r2, _ in self.areas:
+            yield from range(r1, r2 + 1)
+
+    def _cols(self):
+        for _, c1, _, c2 in self.areas:
+            yield from range(c1, c2 + 1)
+
+    def _grow(self, row):
+        while len(self.sheet.rows) < row:
+            self.sheet.rows.append(FakeSheet._new_row(self.sheet.cols))
+
+    def _check_broken(self):
+        """Excel lehnt den ganzen Aufruf ab, wenn eine gesperrte Zeile darin liegt"""
+        if self.sheet.broken_rows and self.areas[0][0] is not None and \
+                self.sheet.broken_rows.intersection(self._rows()):
+            self.sheet.calls += 1
+            raise RuntimeError('Bereich gesperrt')
+
+    @property
+    def row_height(self):
+        raise NotImplementedError
+
+    @row_height.setter
+    def row_height(self, height):
+        self._check_broken()
+        self.sheet.calls += 1
+        for row in self._rows():
+            self._grow(row)
+            self.sheet.rows[row - 1]['height'] = height
+
+    @property
+    def column_width(self):
+        raise NotImplementedError
+
+    @column_width.setter
+    def column_width(self, width):
+        self.sheet.calls += 1
+        for col in self._cols():
+            self.sheet.widths[col - 1] = width
+
+    @property
+    def color(self):
+        raise NotImplementedError
+
+    @color.setter
+    def color(self, rgb):
+        self._check_broken()
+        self.sheet.calls += 1
+        for r1, c1, r2, c2 in self.areas:
+            for row in range(r1, r2 + 1):
+                self._grow(row)
+                for col in range(c1 or 1, (c2 or self.sheet.cols) + 1):
+                    self.sheet.rows[row - 1]['colors'][col - 1] = rgb
+
+    @property
+    def value(self):
+        raise NotImplementedError
+
+    @value.setter
+    def value(self, values):
+        self.sheet.calls += 1
+        r1, c1 = self.areas[0][0], self.areas[0][1]
+        values = values if isinstance(values, list) and values and isinstance(values[0], list) else [[values]]
+        for dr, row_values in enumerate(values):
+            self._grow(r1 + dr)
+            for dc, value in enumerate(row_values):
+                self.sheet.rows[r1 + dr - 1]['values'][c1 + dc - 1] = value
+
+    def delete(self):
+        self._check_broken()
+        self.sheet.calls += 1
+        if self.areas[0][0] is not None:
+            doomed = set(self._rows())
+            self.sheet.rows = [row for i, row in enumerate(self.sheet.rows, 1) if i not in doomed]
+        else:
+            doomed = set(self._cols())
+            keep = [c for c in range(1, self.sheet.cols + 1) if c not in doomed]
+            self.sheet.widths = [self.sheet.widths[c - 1] for c in keep]
+            for row in self.sheet.rows:
+                row['values'] = [row['values'][c - 1] for c in keep]
+                row['colors'] = [row['colors'][c - 1] for c in keep]
+
+    def insert(self, shift='down'):
+        self.sheet.calls += 1
+        assert len(self.areas) == 1 and shift == 'right'
+        _, c1, _, c2 = self.areas[0]
+        count = c2 - c1 + 1
+        self.sheet.widths[c1 - 1:c1 - 1] = [8.43] * count
+        for row in self.sheet.rows:
+            row['values'][c1 - 1:c1 - 1] = [None] * count
+            row['colors'][c1 - 1:c1 - 1] = [None] * count
+
+
+class FakeSheets(list):
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return next(s for s in self if s.name == key)
+        return list.__getitem__(self, key)
+
+
+class FakeWorkbook:
+    def __init__(self, app, sheet):
+        self.app = app
+        self.sheets = FakeSheets([sheet])
+        self.saves = 0
+
+    def save(self):
+        self.saves += 1
+
+    def close(self):
+        self.app.open_books.remove(self)
+
+
+class FakeXwApp:
+    def __init__(self, sheet_factory):
+        self.sheet_factory = sheet_factory
+        self.open_books = []
+        self.books = types.SimpleNamespace(open=self._open)
+
+    def _open(self, path, read_only=False):
+        book = FakeWorkbook(self, self.sheet_factory())
+        self.open_books.append(book)
+        return book
+
+
+def install_fake_xlwings():
+    module = types.ModuleType('xlwings')
+    module.apps = []
+    module.App = lambda **kwargs: (_ for _ in ()).throw(RuntimeError('Im Test nur über den Pool'))
+    sys.modules['xlwings'] = module
+
+
+install_fake_xlwings()
+import excel_writer_xlwings as writer  # noqa: E402
+from excel_app_pool import ExcelAppBackend, ExcelAppPool, set_active_pool  # noqa: E402
+from excel_com_batch import MAX_ADDRESS_LENGTH, ComBatcher, index_runs, pack_addresses  # noqa: E402
+
+
+class FakeXwBackend(ExcelAppBackend):
+    name = 'fake-xlwings'
+
+    def __init__(self):
+        self.app = None
+
+    def start(self):
+        return self.app
+
+    def is_alive(self, app):
+        return True
+
+    def open_books(self, app):
+        return list(app.open_books)
+
+    def close_book(self, app, book):
+        book.close()
+
+    def quit(self, app):
+        pass
+
+    def kill(self, app):
+        pass
+
+
+# =============================================================================
+# Referenz: bisheriges Verhalten, ein Aufruf pro Zeile/Spalte/Zelle
+# =============================================================================
+
+COLORS = {'green': (144, 238, 144), 'yellow': (255, 255, 0), 'red': (255, 107, 107)}
+
+
+def apply_unbatched(ws, changes):
+    letter = writer._get_column_letter
+    for row_idx in sorted(changes.get('deletedRows', []), reverse=True):
+        ws.range(f'{row_idx + 2}:{row_idx + 2}').delete()
+    for row_idx in set(changes.get('hiddenRows', [])):
+        ws.range(f'{row_idx + 2}:{row_idx + 2}').row_height = 0
+    num_cols = len(changes['headers'])
+    for row_idx, color in changes.get('rowHighlights', {}).items():
+        ws.range(f'A{int(row_idx) + 2}:{letter(num_cols)}{int(row_idx) + 2}').color = COLORS[color]
+    for row_idx in changes.get('clearedRowHighlights', []):
+        for col in range(1, num_cols + 1):
+            ws.range((row_idx + 2, col)).color = None
+    for col_idx in sorted(changes.get('deletedColumns', []), reverse=True):
+        ws.range(f'{letter(col_idx + 1)}:{letter(col_idx + 1)}').delete()
+    for op in (changes.get('insertedColumns') or {}).get('operations', []):
+        for i in range(op['count']):
+            ws.range(f'{letter(op["position"] + 1 + i)}:{letter(op["position"] + 1 + i)}').insert(shift='right')
+        for i, header in enumerate(op['headers']):
+            ws.range((1, op['position'] + 1 + i)).value = header
+    for col_idx in set(changes.get('hiddenColumns', [])):
+        ws.range(f'{letter(col_idx + 1)}:{letter(col_idx + 1)}').column_width = 0
+
+
+def random_changes(rng, rows, cols):
+    deleted = rng.sample(range(rows), rows // 4)
+    remaining = rows - len(deleted)
+    # Teils zusammenhängend, teils verstreut - wie echte Filter/Mehrfachauswahl
+    hidden = list(range(10, 10 + remaining // 5)) + rng.sample(range(remaining), remaining // 5)
+    highlights = {str(r): rng.choice(list(COLORS)) for r in rng.sample(range(remaining), remaining // 10)}
+    cleared = rng.sample(range(remaining), remaining // 20)
+    deleted_cols = rng.sample(range(cols), 2)
+    final_cols = cols - 2
+    return {
+        'headers': [f'H{c}' for c in range(final_cols + 1)],
+        'deletedRows': deleted,
+        'hiddenRows': hidden,
+        'rowHighlights': highlights,
+        'clearedRowHighlights': cleared,
+        'deletedColumns': deleted_cols,
+        'insertedColumns': {'operations': [{'position': 1, 'count': 1, 'headers': ['Neu']}]},
+        'hiddenColumns': [0, final_cols - 1],
+        'structuralChange': True
+    }
+
+
+def run_writer(work_dir, changes, rows, cols, multi_area=True, broken_rows=()):
+    created = []
+    backend = FakeXwBackend()
+    backend.app = FakeXwApp(lambda: created.append(FakeSheet('Daten', rows, cols, multi_area, broken_rows))
+                            or created[-1])
+    pool = ExcelAppPool(backend, size=1, max_uses=0, max_memory_mb=None)
+    set_active_pool(pool)
+    try:
+        source = os.path.join(work_dir, 'quelle.xlsx')
+        with open(source, 'wb') as f:
+            f.write(b'fake')
+        result = writer.write_sheet_xlwings(source, os.path.join(work_dir, 'ziel.xlsx'), 'Daten', changes)
+    finally:
+        set_active_pool(None)
+    assert result['success'], result
+    return created[0], result
+
+
+def test_pack_addresses():
+    rng = random.Random(3)
+    rows = sorted(rng.sample(range(2, 200000), 5000))
+    runs = index_runs(rows)
+    addresses = [f'{first}:{last}' for first, last in runs]
+    chunks = pack_addresses(addresses)
+    assert all(len(','.join(chunk)) <= MAX_ADDRESS_LENGTH for chunk in chunks)
+    assert [a for chunk in chunks for a in chunk] == addresses
+    covered = [r for first, last in runs for r in range(first, last + 1)]
+    assert covered == rows
+    print(f'✓ Adressen: {len(rows)} Zeilen -> {len(runs)} Bereiche -> {len(chunks)} Aufrufe (max. {MAX_ADDRESS_LENGTH} Zeichen)')
+
+
+def test_writer(work_dir, seeds=5, rows=2000, cols=12):
+    for multi_area in (True, False):
+        total_batched = total_unbatched = 0
+        for seed in range(seeds):
+            changes = random_changes(random.Random(seed), rows, cols)
+            sheet, result = run_writer(work_dir, changes, rows, cols, multi_area)
+
+            reference = FakeSheet('Daten', rows, cols)
+            apply_unbatched(reference, changes)
+            assert sheet.snapshot() == reference.snapshot(), f'Seed {seed}: Endzustand weicht ab'
+
+            calls = result['comCalls']
+            assert calls['total'] == sheet.calls, (calls, sheet.calls)
+            assert calls['unbatched'] == reference.calls, (calls, reference.calls)
+            assert sheet.calls < reference.calls
+            total_batched += sheet.calls
+            total_unbatched += reference.calls
+        label = 'Mehrfachbereiche' if multi_area else 'ohne Mehrfachbereiche (Fallback)'
+        print(f'✓ {seeds} Schreibvorgänge, {label}: identischer Endzustand, '
+              f'{total_unbatched} -> {total_batched} Excel-Aufrufe ({total_unbatched / total_batched:.0f}x weniger)')
+
+
+def test_hide_5000_rows(work_dir):
+    # Beispiel aus der Anforderung: 5000 Zeilen ausblenden (jede zweite = schlechtester Fall)
+    changes = {'headers': ['A', 'B'], 'hiddenRows': list(range(0, 10000, 2)), 'structuralChange': True}
+    sheet, result = run_writer(work_dir, changes, 10000, 2)
+    hidden = [i for i, row in enumerate(sheet.rows[1:]) if row['height'] == 0]
+    assert hidden == changes['hiddenRows']
+    print(f'✓ 5000 Zeilen ausblenden (verstreut): {result["comCalls"]["total"]} statt 5000 Excel-Aufrufe')
+
+
+def test_failing_area(work_dir):
+    # Zeile 13 (Excel) lehnt jede Änderung ab - liegt mitten im Bereich 10..29
+    broken = 13
+    changes = {'headers': ['A', 'B'], 'structuralChange': True,
+               'hiddenRows': list(range(8, 28)) + list(range(40, 400, 3)),
+               'rowHighlights': {str(r): 'green' for r in list(range(5, 20)) + list(range(100, 300, 7))}}
+    for multi_area in (True, False):
+        sheet, result = run_writer(work_dir, changes, 500, 2, multi_area, broken_rows={broken})
+        hidden = [i for i, row in enumerate(sheet.rows[1:]) if row['height'] == 0]
+        assert hidden == sorted(set(changes['hiddenRows']) - {broken - 2}), 'Zeilen nach dem Fehler nicht ausgeblendet'
+        colored = [i for i, row in enumerate(sheet.rows[1:]) if row['colors'][0] is not None]
+        assert colored == sorted({int(r) for r in changes['rowHighlights']} - {broken - 2}), 'Markierungen fehlen'
+        calls = result['comCalls']
+        assert calls['failed'] == {'rowHeight': 1, 'color': 1}, calls
+        assert calls['total'] == sheet.calls, (calls, sheet.calls)
+
+    # Löschen: alle anderen Zeilen werden gelöscht (von unten nach oben), dann Fehler
+    sheet = FakeSheet('Daten', 50, 2, broken_rows={broken})
+    com = ComBatcher(sheet)
+    try:
+        com.delete_rows([5, 6, 11, 12, 13, 14, 15, 30])
+        raise AssertionError('gescheiterte Löschung nicht gemeldet')
+    except RuntimeError as e:
+        assert '13:13' in str(e)
+    # Excel-Zeile n = Datenzeile n - 2; nur 13 (r11) bleibt stehen
+    remaining = [row['values'][0] for row in sheet.rows[1:]]
+    assert remaining == [f'r{i}c0' for i in range(50) if i not in (3, 4, 9, 10, 12, 13, 28)], remaining
+    print('✓ Gescheiterter Bereich: nur dessen Zeilen einzeln wiederholt, alle übrigen angewendet')
+
+
+def main():
+    work_dir = tempfile.mkdtemp(prefix='com-batch-test-')
+    try:
+        test_pack_addresses()
+        test_writer(work_dir)
+        test_hide_5000_rows(work_dir)
+        test_failing_area(work_dir)
+        print('\nAlle Tests erfolgreich')
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
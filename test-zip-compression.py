@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Benchmark: ZIP-Kompression der XLSX-Ausgabe (excel_zip_writer)
+
+Vergleicht Speicherzeit und Dateigröße für Level 1, 6 und 9 (parallel)
+mit dem bisherigen sequentiellen zipfile-Ansatz (ZIP_DEFLATED, Level 6).
+
+Aufruf:
+    python3 test-zip-compression.py                 # synthetische Mappe, ~60 MB
+    python3 test-zip-compression.py --size-mb 20    # kleinere Mappe
+    python3 test-zip-compression.py datei.xlsx      # vorhandene Mappe neu packen
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+from excel_zip_writer import write_zip_archive, read_archive_members, default_workers
+
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Daten" sheetId="1" r:id="rId1"/></sheets></workbook>'
+)
+WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+
+def build_synthetic_members(target_file_mb):
+    """
+    Erzeugt eine Mappe mit einem großen Sheet (Inline-Strings + Zahlen).
+    Die Rohgröße wird so gewählt, dass die Datei bei Level 6 etwa target_file_mb groß ist.
+    """
+    rng = random.Random(42)
+    words = ['Kunde', 'Auftrag', 'Lieferung', 'Rechnung', 'Berlin', 'Hamburg', 'München', 'offen', 'erledigt']
+    # Erfahrungswert: Level 6 komprimiert diese Daten etwa um Faktor 5.8
+    target_raw = int(target_file_mb * 5.8 * 1024 * 1024)
+
+    parts = ['<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+             '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>']
+    size = len(parts[0])
+    row = 1
+    while size < target_raw:
+        cells = (
+            f'<c r="A{row}" t="inlineStr"><is><t>{rng.choice(words)} {rng.randint(1, 99999)}</t></is></c>'
+            f'<c r="B{row}"><v>{rng.random() * 100000:.4f}</v></c>'
+            f'<c r="C{row}"><v>{rng.randint(1, 10 ** 9)}</v></c>'
+            f'<c r="D{row}" t="inlineStr"><is><t>{rng.choice(words)}</t></is></c>'
+            f'<c r="E{row}"><v>{rng.randint(40000, 46000)}</v></c>'
+        )
+        line = f'<row r="{row}">{cells}</row>'
+        parts.append(line)
+        size += len(line)
+        row += 1
+    parts.append('</sheetData></worksheet>')
+
+    return [
+        ('[Content_Types].xml', CONTENT_TYPES.encode('utf-8')),
+        ('_rels/.rels', ROOT_RELS.encode('utf-8')),
+        ('xl/workbook.xml', WORKBOOK.encode('utf-8')),
+        ('xl/_rels/workbook.xml.rels', WORKBOOK_RELS.encode('utf-8')),
+        ('xl/worksheets/sheet1.xml', ''.join(parts).encode('utf-8')),
+    ]
+
+
+def write_sequential(path, members, level):
+    """Bisheriger Ansatz: zipfile, ein Member nach dem anderen"""
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED, compresslevel=level) as zf:
+        for name, data in members:
+            zf.writestr(name, data)
+
+
+def verify(path, members):
+    with zipfile.ZipFile(path, 'r') as zf:
+        bad = zf.testzip()
+        assert bad is None, f'CRC-Fehler in {bad}'
+        for info, data in members:
+            name = info.filename if isinstance(info, zipfile.ZipInfo) else info
+            assert zf.read(name) == data, f'Inhalt weicht ab: {name}'
+
+
+def measure(label, func, path):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    size_mb = os.path.getsize(path) / (1024 * 1024)
+    print(f'{label:<34} {elapsed:8.2f} s {size_mb:10.1f} MB')
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark ZIP-Kompression')
+    parser.add_argument('xlsx', nargs='?', help='Vorhandene XLSX-Datei (sonst synthetisch)')
+    parser.add_argument('--size-mb', type=float, default=60, help='Zielgröße der synthetischen Mappe (Level 6)')
+    parser.add_argument('--workers', type=int, default=None, help='Kompressions-Threads')
+    args = parser.parse_args()
+
+    if args.xlsx:
+        members = read_archive_members(args.xlsx)
+        source = args.xlsx
+    else:
+        members = build_synthetic_members(args.size_mb)
+        source = f'synthetisch (~{args.size_mb:g} MB bei Level 6)'
+
+    raw_mb = sum(len(data) for _, data in members) / (1024 * 1024)
+    workers = args.workers or default_workers()
+    print(f'Mappe: {source}, {len(members)} Members, {raw_mb:.1f} MB unkomprimiert, {workers} Threads\n')
+    print(f'{"Variante":<34} {"Zeit":>10} {"Größe":>13}')
+    print('-' * 59)
+
+    out_dir = tempfile.mkdtemp(prefix='zip-bench-')
+    try:
+        path = os.path.join(out_dir, 'seq6.xlsx')
+        baseline = measure('zipfile sequentiell, Level 6', lambda: write_sequential(path, members, 6), path)
+        verify(path, members)
+
+        for setting, label in (('stored', 'STORED (Zwischenstand)'), ('fast', 'parallel, Level 1 (fast)'),
+                               ('default', 'parallel, Level 6 (default)'), ('best', 'parallel, Level 9 (best)')):
+            path = os.path.join(out_dir, f'{setting}.xlsx')
+            elapsed = measure(label, lambda: write_zip_archive(path, members, compression=setting,
+                                                               workers=workers), path)
+            verify(path, members)
+            print(f'{"":<34} Faktor {baseline / elapsed:.1f}x gegenüber sequentiell (Level 6)')
+    finally:
+        for f in os.listdir(out_dir):
+            os.remove(os.path.join(out_dir, f))
+        os.rmdir(out_dir)
+
+    print('\nAlle Archive verifiziert (CRC + Inhalt).')
+
+
+if __name__ == '__main__':
+    main()
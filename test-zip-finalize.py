@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Test: Abschluss-Kompression ohne das ganze Archiv im Speicher
+(finalize_archive in python/excel_zip_writer.py)
+
+Der Zwischenstand (STORED) wird blockweise gelesen und parallel komprimiert,
+große Members mit Data Descriptor geschrieben:
+
+- Inhalt identisch (alle Members, Reihenfolge, leeres Member, Ordner),
+  CRC geprüft, openpyxl liest die Mappe
+- Speicherspitze (tracemalloc) bleibt bei einem großen Sheet deutlich unter
+  der Sheet-Größe - der frühere Weg über read_archive_members liegt darüber
+- Mit Passwort: verschlüsselte Ausgabe entschlüsselt wieder zum Inhalt
+- ZIP64-Fallback (zipfile, ebenfalls als Stream) und 'stored'
+- write_sheet speichert den Zwischenstand über _save_workbook_stored
+  unkomprimiert, ohne openpyxl global umzustellen: ein anderes Speichern
+  während write_sheet (z.B. anderer Thread) bleibt komprimiert
+
+Aufruf:
+    python3 test-zip-finalize.py
+"""
+
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import tracemalloc
+import zipfile
+from contextlib import redirect_stderr
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+from openpyxl import Workbook, load_workbook
+
+import openpyxl.writer.excel
+import excel_writer
+import excel_zip_writer
+from excel_zip_writer import CHUNK_SIZE, finalize_archive, read_archive_members, write_zip_archive
+from excel_package_crypto import decrypt_package
+
+PASSWORD = 'Geheim-123'
+BIG_MB = 32
+WORKERS = 2
+
+
+def big_sheet_xml(size_mb):
+    rng = random.Random(7)
+    words = ['Kunde', 'Auftrag', 'Lieferung', 'Berlin', 'München', 'offen', 'erledigt']
+    parts = ['<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<worksheet><sheetData>']
+    size = 0
+    row = 1
+    while size < size_mb * 1024 * 1024:
+        line = (f'<row r="{row}"><c r="A{row}" t="inlineStr"><is><t>{rng.choice(words)} {rng.randint(1, 99999)}'
+                f'</t></is></c><c r="B{row}"><v>{rng.random() * 1000:.5f}</v></c></row>')
+        parts.append(line)
+        size += len(line)
+        row += 1
+    parts.append('</sheetData></worksheet>')
+    return ''.join(parts).encode('utf-8')
+
+
+def create_intermediate(path, size_mb):
+    """Zwischenstand wie nach den openpyxl-Fixups: alles STORED"""
+    members = [
+        ('[Content_Types].xml', b'<Types/>'),
+        ('xl/', b''),
+        ('xl/worksheets/sheet1.xml', big_sheet_xml(size_mb)),
+        ('xl/leer.xml', b''),
+        ('xl/grenze.xml', b'x' * CHUNK_SIZE),
+        ('xl/sharedStrings.xml', 'Grüße '.encode('utf-8') * 40000),
+    ]
+    write_zip_archive(path, members, compression='stored')
+    return read_archive_members(path)
+
+
+def check_same(path, expected, label):
+    with zipfile.ZipFile(path) as zf:
+        assert zf.testzip() is None, f'{label}: CRC-Fehler'
+        assert [item.filename for item in zf.infolist()] == [info.filename for info, _ in expected], \
+            f'{label}: Reihenfolge'
+        for info, data in expected:
+            assert zf.read(info.filename) == data, f'{label}: {info.filename} weicht ab'
+        return {item.filename: item for item in zf.infolist()}
+
+
+def finalize(source, target, **kwargs):
+    with redirect_stderr(io.StringIO()):
+        return finalize_archive(source, target, workers=WORKERS, **kwargs)
+
+
+def peak_mb(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 1048576
+    finally:
+        tracemalloc.stop()
+
+
+def test_content_and_memory(base_dir):
+    source = os.path.join(base_dir, 'zwischenstand.xlsx')
+    expected = create_intermediate(source, BIG_MB)
+    target = os.path.join(base_dir, 'final.xlsx')
+
+    peak = peak_mb(lambda: finalize(source, target, compression='default'))
+    items = check_same(target, expected, 'default')
+    sheet = items['xl/worksheets/sheet1.xml']
+    assert sheet.compress_type == zipfile.ZIP_DEFLATED and sheet.flag_bits & 0x08, 'großes Member ohne Data Descriptor'
+    assert sheet.compress_size < sheet.file_size / 3
+    assert not items['[Content_Types].xml'].flag_bits & 0x08, 'kleine Members mit Header wie bisher'
+    assert items['xl/'].compress_type == zipfile.ZIP_STORED
+
+    old_peak = peak_mb(lambda: write_zip_archive(os.path.join(base_dir, 'alt.xlsx'), read_archive_members(source),
+                                                 compression='default', workers=WORKERS))
+    # Fenster: workers * 4 Blöcke in Arbeit, dazu gelesener Block, Vorausblock, Ergebnisse
+    window_mb = (WORKERS * 4 + 6) * CHUNK_SIZE / 1048576
+    assert peak < window_mb, f'Speicherspitze {peak:.1f} MB bei {BIG_MB} MB Sheet (Fenster {window_mb:.0f} MB)'
+    assert old_peak > BIG_MB, f'Vergleich ohne Aussagekraft ({old_peak:.1f} MB)'
+    print(f'✓ Inhalt identisch, Speicherspitze {peak:.1f} MB statt {old_peak:.1f} MB ({BIG_MB} MB Sheet)')
+    return source, expected
+
+
+def test_openpyxl(base_dir):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Daten'
+    for i in range(40000):
+        ws.append([f'Zeile {i}', i, i * 0.5])
+    plain = os.path.join(base_dir, 'mappe.xlsx')
+    wb.save(plain)
+    source = os.path.join(base_dir, 'mappe-stored.xlsx')
+    write_zip_archive(source, read_archive_members(plain), compression='stored')
+    with zipfile.ZipFile(source) as zf:
+        assert zf.getinfo('xl/worksheets/sheet1.xml').file_size > CHUNK_SIZE
+
+    target = os.path.join(base_dir, 'mappe-final.xlsx')
+    finalize(source, target, compression='fast')
+    ws = load_workbook(target, read_only=True)['Daten']
+    rows = list(ws.iter_rows(values_only=True))
+    assert len(rows) == 40000 and rows[-1] == ('Zeile 39999', 39999, 19999.5)
+    print('✓ openpyxl liest die Mappe mit Data Descriptors')
+
+
+def test_password(base_dir, source, expected):
+    target = os.path.join(base_dir, 'verschluesselt.xlsx')
+    finalize(source, target, compression='default', password=PASSWORD)
+    with open(target, 'rb') as fp:
+        assert fp.read(8) == b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'kein CFB-Container'
+    plain = os.path.join(base_dir, 'entschluesselt.xlsx')
+    decrypt_package(target, plain, PASSWORD)
+    check_same(plain, expected, 'verschlüsselt')
+    print('✓ Mit Passwort: komprimiert und verschlüsselt in einem Durchlauf')
+
+
+def test_fallbacks(base_dir, source, expected):
+    target = os.path.join(base_dir, 'stored.xlsx')
+    finalize(source, target, compression='stored')
+    items = check_same(target, expected, 'stored')
+    assert all(item.compress_type == zipfile.ZIP_STORED for item in items.values())
+
+    original_limit = excel_zip_writer._ZIP64_LIMIT
+    excel_zip_writer._ZIP64_LIMIT = 1
+    try:
+        target = os.path.join(base_dir, 'zip64.xlsx')
+        stats = finalize(source, target, compression='fast')
+    finally:
+        excel_zip_writer._ZIP64_LIMIT = original_limit
+    check_same(target, expected, 'ZIP64-Fallback')
+    assert stats['members'] == len(expected) and stats['compressedSize'] < stats['size']
+    print("✓ 'stored' und ZIP64-Fallback (zipfile) liefern denselben Inhalt")
+
+
+def test_write_sheet_saves_stored(base_dir):
+    source = os.path.join(base_dir, 'quelle.xlsx')
+    wb = Workbook()
+    wb.active.title = 'Daten'
+    wb.active.append(['A', 'B'])
+    wb.active.append([1, 2])
+    wb.save(source)
+
+    intermediate = {}
+    foreign = os.path.join(base_dir, 'fremd.xlsx')
+    real_write_sheet = excel_writer._write_sheet
+
+    def observed_write_sheet(file_path, output_path, *args):
+        # Während write_sheet: jemand anderes speichert mit openpyxl
+        other = Workbook()
+        other.active.append(['fremd'] * 50)
+        other.save(foreign)
+        result = real_write_sheet(file_path, output_path, *args)
+        with zipfile.ZipFile(output_path) as zf:
+            intermediate.update({item.filename: item.compress_type for item in zf.infolist()})
+        return result
+
+    target = os.path.join(base_dir, 'ausgabe.xlsx')
+    excel_writer._write_sheet = observed_write_sheet
+    try:
+        with redirect_stderr(io.StringIO()):
+            result = excel_writer.write_sheet(source, target, 'Daten', {'editedCells': {'0-1': 99}})
+    finally:
+        excel_writer._write_sheet = real_write_sheet
+    assert result['success'], result
+    assert openpyxl.writer.excel.ZipFile is zipfile.ZipFile, 'openpyxl global umgestellt'
+
+    assert set(intermediate.values()) == {zipfile.ZIP_STORED}, 'Zwischenstand nicht unkomprimiert'
+    with zipfile.ZipFile(foreign) as zf:
+        assert zf.getinfo('xl/worksheets/sheet1.xml').compress_type == zipfile.ZIP_DEFLATED, \
+            'fremdes Speichern während write_sheet unkomprimiert'
+    with zipfile.ZipFile(target) as zf:
+        assert zf.getinfo('xl/worksheets/sheet1.xml').compress_type == zipfile.ZIP_DEFLATED
+    assert load_workbook(target)['Daten']['B2'].value == 99
+    print('✓ write_sheet: Zwischenstand unkomprimiert, anderes Speichern bleibt komprimiert')
+
+
+def main():
+    base_dir = tempfile.mkdtemp(prefix='zip-finalize-test-')
+    try:
+        source, expected = test_content_and_memory(base_dir)
+        test_openpyxl(base_dir)
+        test_password(base_dir, source, expected)
+        test_fallbacks(base_dir, source, expected)
+        test_write_sheet_saves_stored(base_dir)
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+    print('\nAlle Tests erfolgreich')
+
+
+if __name__ == '__main__':
+    main()